@@ -12,7 +12,8 @@ from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFError, CSRFProtect
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from app.utils.perf_utils import add_server_timing_header, log_request_duration
+from app.utils import sql_instrumentation
+from app.utils.perf_utils import add_server_timing_header, add_sql_server_timing, log_request_duration
 
 csrf = CSRFProtect()
 
@@ -40,10 +41,10 @@ def _configure_app(app, config_class):
 
 
 def _build_locale_selector(app):
-    """Create Babel locale selector with DB/user/session fallback."""
+    """Create Babel locale selector with DB/user/session fallback (employee language from the profile cache)."""
 
     def get_locale():
-        from app.utils.db_utils import get_db
+        from app.services.employee_profiles import get_employee_profile
 
         selected_lang = request.args.get("lang")
         if selected_lang:
@@ -62,27 +63,15 @@ def _build_locale_selector(app):
             and session.get("employee_id")
             and not session.get("manual_language_override")
         ):
-            conn = None
             try:
-                conn = get_db()
-                employee = conn.execute(
-                    """
-                    SELECT preferred_language FROM employees WHERE id = ?
-                    """,
-                    (session.get("employee_id"),),
-                ).fetchone()
-                preferred = employee["preferred_language"] if employee else None
+                profile = get_employee_profile(employee_id=session.get("employee_id"))
+                preferred = profile.preferred_language if profile else None
                 if preferred and preferred in app.config["LANGUAGES"]:
-                    session["language"] = preferred
+                    if session.get("language") != preferred:
+                        session["language"] = preferred
                     return preferred
             except Exception as exc:
                 app.logger.warning("Locale lookup failed: %s", exc)
-            finally:
-                if conn:
-                    try:
-                        conn.close()
-                    except Exception as exc:
-                        app.logger.debug("Failed to close locale DB connection: %s", exc)
 
         if "language" in session and session["language"] in app.config["LANGUAGES"]:
             return session["language"]
@@ -159,6 +148,8 @@ def _register_request_hooks(app, config_class):
     @app.before_request
     def _perf_start():
         g.perf_start = time.perf_counter()
+        if config_class.SQL_INSTRUMENTATION:
+            g.sql_stats_token = sql_instrumentation.begin_request(request.path)
 
     @app.after_request
     def _after_request(response):
@@ -174,11 +165,21 @@ def _register_request_hooks(app, config_class):
 
         if hasattr(g, "perf_start"):
             duration_ms = (time.perf_counter() - g.perf_start) * 1000
-            log_request_duration(request.path, duration_ms, app)
+            sql_stats = sql_instrumentation.current_stats() if "sql_stats_token" in g else None
+            log_request_duration(request.path, duration_ms, app, sql_stats)
             add_server_timing_header(response, request.path, duration_ms, app)
+            if sql_stats is not None:
+                add_sql_server_timing(response, request.path, duration_ms, sql_stats, app)
+                sql_instrumentation.report_request(sql_stats)
 
         return response
 
+    @app.teardown_request
+    def _sql_stats_end(_exc):
+        token = g.pop("sql_stats_token", None)
+        if token is not None:
+            sql_instrumentation.end_request(token)
+
 
 def _register_blueprints(app):
     """Import and register all blueprints."""
@@ -27,7 +27,7 @@ from flask import (
     url_for,
 )
 
-from app.blueprints.workflow_floor import _current_station_occupancy
+from app.services import ops_tv_snapshot_cache
 from app.services import workflow_constants as WC
 from app.services.mes_dashboard import build_mes_dashboard
 from app.services.ops_flow_intel import compute_production_flow_intel
@@ -43,6 +43,10 @@ from app.services.command_center_metrics_inputs import (
     sql_packaging_equiv_displays,
 )
 from app.services.workflow_finalize import force_release_card
+from app.services.workflow_http import workflow_event_stream_response
+from app.services.workflow_occupancy import resolve_station_occupancy, station_occupancy
+from app.services.workflow_read import production_day_for_event_ms
+from app.services.workflow_rollups import display_totals_by_day, station_day_totals
 from app.services.workflow_txn import run_with_busy_retry
 from app.utils.auth_utils import admin_required, role_required, session_has_admin_panel_access
 from app.utils.db_utils import db_read_only, db_transaction, get_db
@@ -87,39 +91,109 @@ _STATION_KIND_ORDER_ADD = [
 ]
 
 
-def _workflow_inventory_bag_name(conn: sqlite3.Connection, inventory_bag_id: int | None) -> str:
-    """PO-shipment-box-bag label for workflow/admin tables."""
-    if not inventory_bag_id:
-        return "—"
-    try:
-        row = conn.execute(
-            """
-            SELECT po.po_number, COALESCE(r.shipment_number, 1) AS shipment_number,
-                   sb.box_number, b.bag_number
-            FROM bags b
-            JOIN small_boxes sb ON b.small_box_id = sb.id
-            JOIN receiving r ON sb.receiving_id = r.id
-            LEFT JOIN purchase_orders po ON r.po_id = po.id
-            WHERE b.id = ?
-            """,
-            (int(inventory_bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        row = conn.execute(
-            """
-            SELECT po.po_number, 1 AS shipment_number, sb.box_number, b.bag_number
-            FROM bags b
-            JOIN small_boxes sb ON b.small_box_id = sb.id
-            JOIN receiving r ON sb.receiving_id = r.id
-            LEFT JOIN purchase_orders po ON r.po_id = po.id
-            WHERE b.id = ?
+def _workflow_inventory_bag_names(conn: sqlite3.Connection, inventory_bag_ids) -> dict[int, str]:
+    """PO-shipment-box-bag labels for many inventory bags (one query per 500 ids)."""
+    ids = sorted({int(i) for i in inventory_bag_ids if i})
+    out = {iid: f"bag-{iid}" for iid in ids}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i : i + 500]
+        qmarks = ",".join("?" * len(chunk))
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT b.id AS inv_id, po.po_number, COALESCE(r.shipment_number, 1) AS shipment_number,
+                       sb.box_number, b.bag_number
+                FROM bags b
+                JOIN small_boxes sb ON b.small_box_id = sb.id
+                JOIN receiving r ON sb.receiving_id = r.id
+                LEFT JOIN purchase_orders po ON r.po_id = po.id
+                WHERE b.id IN ({qmarks})
+                """,
+                tuple(chunk),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = conn.execute(
+                f"""
+                SELECT b.id AS inv_id, po.po_number, 1 AS shipment_number, sb.box_number, b.bag_number
+                FROM bags b
+                JOIN small_boxes sb ON b.small_box_id = sb.id
+                JOIN receiving r ON sb.receiving_id = r.id
+                LEFT JOIN purchase_orders po ON r.po_id = po.id
+                WHERE b.id IN ({qmarks})
+                """,
+                tuple(chunk),
+            ).fetchall()
+        for row in rows:
+            iid = int(row["inv_id"])
+            po_num = (row["po_number"] or f"REC{iid}").strip()
+            out[iid] = f"{po_num}-{int(row['shipment_number'])}-{row['box_number']}-{row['bag_number']}"
+    return out
+
+
+def _workflow_bag_live_rows(conn: sqlite3.Connection, workflow_bag_ids) -> dict[int, dict]:
+    """Receipt / product / inventory label for occupied bags, keyed by workflow bag id."""
+    ids = sorted({int(w) for w in workflow_bag_ids})
+    out: dict[int, dict] = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i : i + 500]
+        rows = conn.execute(
+            f"""
+            SELECT wb.id, wb.receipt_number, wb.product_id, pd.product_name, wb.inventory_bag_id
+            FROM workflow_bags wb
+            LEFT JOIN product_details pd ON pd.id = wb.product_id
+            WHERE wb.id IN ({",".join("?" * len(chunk))})
             """,
-            (int(inventory_bag_id),),
-        ).fetchone()
-    if not row:
-        return f"bag-{int(inventory_bag_id)}"
-    po_num = (row["po_number"] or f"REC{int(inventory_bag_id)}").strip()
-    return f"{po_num}-{int(row['shipment_number'])}-{row['box_number']}-{row['bag_number']}"
+            tuple(chunk),
+        ).fetchall()
+        for r in rows:
+            out[int(r["id"])] = dict(r)
+    names = _workflow_inventory_bag_names(conn, [r.get("inventory_bag_id") for r in out.values()])
+    for r in out.values():
+        inv_id = r.get("inventory_bag_id")
+        r["bag_name"] = names.get(int(inv_id)) if inv_id else "—"
+    return out
+
+
+def _station_live_from_occupancy(conn: sqlite3.Connection, stations: list[dict]) -> dict[int, dict]:
+    """Per-station live cell for ops TV / command center; one batched occupancy resolve for all stations."""
+    station_live: dict[int, dict] = {}
+    for st in stations:
+        sid = int(st["id"])
+        station_live[sid] = {
+            "status": "idle",
+            "workflow_bag_id": None,
+            "card_token": None,
+            "occupancy_started_at": None,
+            "paused_run_elapsed_label": None,
+            "product_name": None,
+            "receipt_number": None,
+            "bag_name": None,
+            "out_of_packaging_shortages": [],
+        }
+    # Match floor API: latest BAG_CLAIMED/STATION_RESUMED *at this station*, not the bag's latest claim globally.
+    occupancy = resolve_station_occupancy(conn, station_live.keys())
+    bag_rows = _workflow_bag_live_rows(
+        conn, [occ["workflow_bag_id"] for occ in occupancy.values() if occ]
+    )
+    for sid, occ in occupancy.items():
+        if not occ:
+            continue
+        wid = int(occ["workflow_bag_id"])
+        bd = bag_rows.get(wid, {})
+        station_live[sid] = {
+            "status": occ["status"],
+            "workflow_bag_id": wid,
+            "card_token": occ.get("card_token"),
+            "occupancy_started_at": occ.get("occupancy_started_at_ms"),
+            "paused_at_ms": occ.get("paused_at_ms"),
+            "paused_run_elapsed_label": _paused_run_elapsed_label(occ),
+            "product_name": bd.get("product_name"),
+            "flavor": bd.get("product_name"),
+            "receipt_number": bd.get("receipt_number"),
+            "bag_name": bd.get("bag_name", "—"),
+            "out_of_packaging_shortages": (occ.get("facts") or {}).get("out_of_packaging_shortages") or [],
+        }
+    return station_live
 
 
 def _format_elapsed_hms_from_delta_ms(delta_ms: int) -> str:
@@ -213,14 +287,14 @@ def _floor_station_day_stats(conn: sqlite3.Connection, start_ms: int, end_ms: in
         for r in conn.execute(
             f"""
             SELECT t.sid,
-                   AVG(CAST(json_extract(t.payload, '$.count_total') AS REAL)) AS avg_ct,
+                   AVG(t.p_count_total) AS avg_ct,
                    COUNT(*) AS n
             FROM (
-              SELECT we.payload AS payload, {sid_x} AS sid
+              SELECT we.p_count_total AS p_count_total, {sid_x} AS sid
               FROM workflow_events we
               WHERE we.event_type = 'BLISTER_COMPLETE'
                 AND we.occurred_at >= ? AND we.occurred_at < ?
-                AND json_extract(we.payload, '$.count_total') IS NOT NULL
+                AND we.p_count_total IS NOT NULL
             ) AS t
             WHERE t.sid IS NOT NULL AND t.sid > 0
             GROUP BY t.sid
@@ -234,14 +308,14 @@ def _floor_station_day_stats(conn: sqlite3.Connection, start_ms: int, end_ms: in
         for r in conn.execute(
             f"""
             SELECT t.sid,
-                   AVG(CAST(json_extract(t.payload, '$.count_total') AS REAL)) AS avg_ct,
+                   AVG(t.p_count_total) AS avg_ct,
                    COUNT(*) AS n
             FROM (
-              SELECT we.payload AS payload, {sid_x} AS sid
+              SELECT we.p_count_total AS p_count_total, {sid_x} AS sid
               FROM workflow_events we
               WHERE we.event_type = 'SEALING_COMPLETE'
                 AND we.occurred_at >= ? AND we.occurred_at < ?
-                AND json_extract(we.payload, '$.count_total') IS NOT NULL
+                AND we.p_count_total IS NOT NULL
             ) AS t
             WHERE t.sid IS NOT NULL AND t.sid > 0
             GROUP BY t.sid
@@ -435,7 +509,7 @@ def _displays_finalize_sum_range(conn: sqlite3.Connection, start_ms: int, end_ms
             LEFT JOIN product_details pd ON pd.id = wb.product_id
             WHERE we.occurred_at >= ? AND we.occurred_at < ?
               AND we.event_type = 'PACKAGING_SNAPSHOT'
-              AND json_extract(we.payload, '$.reason') IN ({rin})
+              AND we.p_reason IN ({rin})
             """,
             (start_ms, end_ms),
         ).fetchone()
@@ -447,15 +521,14 @@ def _displays_finalize_sum_range(conn: sqlite3.Connection, start_ms: int, end_ms
 def _avg_daily_displays_finalize_prior_days(
     conn: sqlite3.Connection, today_start_ms: int, n_days: int
 ) -> float:
-    day_ms = 86400000
-    totals: list[float] = []
-    for i in range(1, n_days + 1):
-        day_end = today_start_ms - (i - 1) * day_ms
-        day_start = day_end - day_ms
-        totals.append(_displays_finalize_sum_range(conn, day_start, day_end))
-    if not totals:
+    if n_days <= 0:
         return 0.0
-    return float(sum(totals)) / float(len(totals))
+    today = production_day_for_event_ms(today_start_ms)
+    try:
+        totals = display_totals_by_day(conn, today - timedelta(days=n_days), today - timedelta(days=1))
+    except sqlite3.OperationalError:
+        return 0.0
+    return float(sum(totals.values())) / float(n_days)
 
 
 def _bag_sealed_awaiting_packaging(conn: sqlite3.Connection, bag_id: int) -> bool:
@@ -481,7 +554,7 @@ def _bag_sealed_awaiting_packaging(conn: sqlite3.Connection, bag_id: int) -> boo
                 event_type = 'BAG_FINALIZED'
                 OR (
                   event_type = 'PACKAGING_SNAPSHOT'
-                  AND json_extract(payload, '$.reason') = 'final_submit'
+                  AND p_reason = 'final_submit'
                 )
               )
             LIMIT 1
@@ -508,71 +581,27 @@ def _bag_sealed_awaiting_packaging(conn: sqlite3.Connection, bag_id: int) -> boo
         return False
 
 
+def _hist_station_days_7d(conn: sqlite3.Connection, today_start_ms: int) -> dict[int, dict[str, dict[str, float]]]:
+    today = production_day_for_event_ms(today_start_ms)
+    try:
+        return station_day_totals(conn, today - timedelta(days=7), today - timedelta(days=1))
+    except sqlite3.OperationalError:
+        return {}
+
+
 def _hist_station_totals_7d(conn: sqlite3.Connection, today_start_ms: int) -> dict[int, float]:
     """Packaging displays per station over the 7 NY days before today_start_ms (final + pause submits)."""
-    hist_start = today_start_ms - 7 * 24 * 3600 * 1000
     out: dict[int, float] = defaultdict(float)
-    sid_x = _floor_effective_station_id_expr()
-    eq = sql_packaging_equiv_displays()
-    rin = ops_packaging_snapshot_reasons_sql_in()
-    try:
-        for r in conn.execute(
-            f"""
-            SELECT grp.sid AS sid,
-                   COALESCE(SUM(grp.eq_disp), 0) AS d
-            FROM (
-              SELECT {sid_x} AS sid,
-                     ({eq}) AS eq_disp
-              FROM workflow_events we
-              JOIN workflow_bags wb ON wb.id = we.workflow_bag_id
-              LEFT JOIN product_details pd ON pd.id = wb.product_id
-              WHERE we.occurred_at >= ? AND we.occurred_at < ?
-                AND we.event_type = 'PACKAGING_SNAPSHOT'
-                AND json_extract(we.payload, '$.reason') IN ({rin})
-            ) AS grp
-            WHERE grp.sid IS NOT NULL AND grp.sid > 0
-            GROUP BY grp.sid
-            """,
-            (hist_start, today_start_ms),
-        ).fetchall():
-            out[int(r["sid"])] = float(r["d"] or 0)
-    except sqlite3.OperationalError:
-        pass
+    for sid, days in _hist_station_days_7d(conn, today_start_ms).items():
+        out[sid] = sum(m["displays"] for m in days.values())
     return out
 
 
 def _hist_tablets_by_station_7d(conn: sqlite3.Connection, today_start_ms: int) -> dict[int, float]:
     """Blister + sealing tablet counts per station over the 7 NY days before today_start_ms."""
-    hist_start = today_start_ms - 7 * 24 * 3600 * 1000
     out: dict[int, float] = defaultdict(float)
-    sid_x = _floor_effective_station_id_expr()
-    try:
-        for r in conn.execute(
-            f"""
-            SELECT t.sid,
-                   COALESCE(SUM(
-                     CASE
-                       WHEN t.event_type = 'BLISTER_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
-                       WHEN t.event_type = 'SEALING_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
-                       ELSE 0
-                     END
-                   ), 0) AS v
-            FROM (
-              SELECT we.event_type AS event_type, we.payload AS payload, {sid_x} AS sid
-              FROM workflow_events we
-              WHERE we.occurred_at >= ? AND we.occurred_at < ?
-                AND we.event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE')
-            ) AS t
-            WHERE t.sid IS NOT NULL AND t.sid > 0
-            GROUP BY t.sid
-            """,
-            (hist_start, today_start_ms),
-        ).fetchall():
-            out[int(r["sid"])] = float(r["v"] or 0)
-    except sqlite3.OperationalError:
-        pass
+    for sid, days in _hist_station_days_7d(conn, today_start_ms).items():
+        out[sid] = sum(m["tablets"] for m in days.values())
     return out
 
 
@@ -604,9 +633,9 @@ def _session_tablets_since_claim(
             SELECT COALESCE(SUM(
               CASE
                 WHEN we.event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE') THEN
-                  COALESCE(CAST(json_extract(we.payload, '$.count_total') AS REAL), 0)
+                  COALESCE(we.p_count_total, 0)
                 WHEN we.event_type = 'PACKAGING_SNAPSHOT'
-                     AND json_extract(we.payload, '$.reason') IN ({rin}) THEN
+                     AND we.p_reason IN ({rin}) THEN
                   ({eq})
                 ELSE 0
               END
@@ -755,49 +784,7 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
         except sqlite3.OperationalError:
             pass
 
-    station_live: dict[int, dict] = {}
-    for st in stations:
-        sid = int(st["id"])
-        station_live[sid] = {
-            "status": "idle",
-            "workflow_bag_id": None,
-            "card_token": None,
-            "occupancy_started_at": None,
-            "paused_run_elapsed_label": None,
-            "product_name": None,
-            "receipt_number": None,
-            "bag_name": None,
-            "out_of_packaging_shortages": [],
-        }
-    for st in stations:
-        sid = int(st["id"])
-        occ = _current_station_occupancy(conn, sid)
-        if not occ:
-            continue
-        wid = int(occ["workflow_bag_id"])
-        bag_row = conn.execute(
-            """
-            SELECT wb.id, wb.receipt_number, wb.product_id, pd.product_name, wb.inventory_bag_id
-            FROM workflow_bags wb
-            LEFT JOIN product_details pd ON pd.id = wb.product_id
-            WHERE wb.id = ?
-            """,
-            (wid,),
-        ).fetchone()
-        bd = dict(bag_row) if bag_row else {}
-        station_live[sid] = {
-            "status": occ["status"],
-            "workflow_bag_id": wid,
-            "card_token": occ.get("card_token"),
-            "occupancy_started_at": occ.get("occupancy_started_at_ms"),
-            "paused_at_ms": occ.get("paused_at_ms"),
-            "paused_run_elapsed_label": _paused_run_elapsed_label(occ),
-            "product_name": bd.get("product_name"),
-            "flavor": bd.get("product_name"),
-            "receipt_number": bd.get("receipt_number"),
-            "bag_name": _workflow_inventory_bag_name(conn, bd.get("inventory_bag_id")),
-            "out_of_packaging_shortages": (occ.get("facts") or {}).get("out_of_packaging_shortages") or [],
-        }
+    station_live = _station_live_from_occupancy(conn, stations)
 
     displays_today = _displays_finalize_sum_range(conn, start_ms, end_ms)
     avg_daily_displays_30d = _avg_daily_displays_finalize_prior_days(conn, start_ms, 30)
@@ -824,7 +811,7 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
               LEFT JOIN product_details pd ON pd.id = wb.product_id
               WHERE we.occurred_at >= ? AND we.occurred_at < ?
                 AND we.event_type = 'PACKAGING_SNAPSHOT'
-                AND json_extract(we.payload, '$.reason') IN ({rin})
+                AND we.p_reason IN ({rin})
             ) AS grp
             WHERE grp.sid IS NOT NULL AND grp.sid > 0
             GROUP BY grp.sid
@@ -852,14 +839,14 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
                    COALESCE(SUM(
                      CASE
                        WHEN t.event_type = 'BLISTER_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
+                         COALESCE(t.p_count_total, 0)
                        WHEN t.event_type = 'SEALING_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
+                         COALESCE(t.p_count_total, 0)
                        ELSE 0
                      END
                    ), 0) AS v
             FROM (
-              SELECT we.event_type AS event_type, we.payload AS payload, {sid_x} AS sid
+              SELECT we.event_type AS event_type, we.p_count_total AS p_count_total, {sid_x} AS sid
               FROM workflow_events we
               WHERE we.occurred_at >= ? AND we.occurred_at < ?
                 AND we.event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE')
@@ -895,7 +882,7 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
               LEFT JOIN product_details pd ON pd.id = wb.product_id
               WHERE we.occurred_at >= ? AND we.occurred_at < ?
                 AND we.event_type = 'PACKAGING_SNAPSHOT'
-                AND json_extract(we.payload, '$.reason') IN ({rin})
+                AND we.p_reason IN ({rin})
             ) AS grp
             WHERE grp.sid IS NOT NULL AND grp.sid > 0
             GROUP BY 1, 2
@@ -915,16 +902,16 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
                    COALESCE(SUM(
                      CASE
                        WHEN t.event_type = 'BLISTER_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
+                         COALESCE(t.p_count_total, 0)
                        WHEN t.event_type = 'SEALING_COMPLETE' THEN
-                         COALESCE(CAST(json_extract(t.payload, '$.count_total') AS REAL), 0)
+                         COALESCE(t.p_count_total, 0)
                        ELSE 0
                      END
                    ), 0) AS v
             FROM (
               SELECT we.occurred_at AS occurred_at,
                      we.event_type AS event_type,
-                     we.payload AS payload,
+                     we.p_count_total AS p_count_total,
                      {sid_x} AS sid
               FROM workflow_events we
               WHERE we.occurred_at >= ? AND we.occurred_at < ?
@@ -965,7 +952,7 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
                     event_type = 'BAG_FINALIZED'
                     OR (
                       event_type = 'PACKAGING_SNAPSHOT'
-                      AND json_extract(payload, '$.reason') = 'final_submit'
+                      AND p_reason = 'final_submit'
                     )
                   )
                 GROUP BY workflow_bag_id
@@ -1182,7 +1169,7 @@ def build_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None = None)
               LEFT JOIN product_details pd ON pd.id = wb.product_id
               WHERE we.occurred_at >= ? AND we.occurred_at < ?
                 AND we.event_type = 'PACKAGING_SNAPSHOT'
-                AND json_extract(we.payload, '$.reason') IN ({p_rin})
+                AND we.p_reason IN ({p_rin})
             ) AS fb
             GROUP BY fb.pname
             ORDER BY v DESC
@@ -1582,18 +1569,6 @@ def product_config():
                     canonical_category_labels.add(canon)
                 products.append(d)
 
-            # Check if category column exists and add it if missing
-            table_info = conn.execute("PRAGMA table_info(tablet_types)").fetchall()
-            has_category_column = any(col[1] == 'category' for col in table_info)
-
-            if not has_category_column:
-                try:
-                    conn.execute('ALTER TABLE tablet_types ADD COLUMN category TEXT')
-                    conn.commit()
-                    has_category_column = True
-                except Exception as e:
-                    current_app.logger.warning(f"Warning: Could not add category column: {e}")
-
             # Get all tablet types
             tablet_types_rows = conn.execute('''
                 SELECT * FROM tablet_types
@@ -1882,53 +1857,13 @@ def workflow_qr_management():
                     cards = [dict(r) for r in cards]
                 except sqlite3.OperationalError:
                     pass
+            card_bag_names = _workflow_inventory_bag_names(conn, [c.get("inventory_bag_id") for c in cards])
             for c in cards:
-                c["bag_name"] = _workflow_inventory_bag_name(conn, c.get("inventory_bag_id"))
+                inv_id = c.get("inventory_bag_id")
+                c["bag_name"] = card_bag_names.get(int(inv_id)) if inv_id else "—"
                 c["status_display"] = c.get("status") or "idle"
                 c["current_station_label"] = None
-            for st in stations:
-                sid = int(st["id"])
-                station_live[sid] = {
-                    "status": "idle",
-                    "workflow_bag_id": None,
-                    "card_token": None,
-                    "occupancy_started_at": None,
-                    "paused_run_elapsed_label": None,
-                    "product_name": None,
-                    "receipt_number": None,
-                    "bag_name": None,
-                    "out_of_packaging_shortages": [],
-                }
-            # Match floor API: latest BAG_CLAIMED/STATION_RESUMED *at this station*, not the bag's latest claim globally.
-            for st in stations:
-                sid = int(st["id"])
-                occ = _current_station_occupancy(conn, sid)
-                if not occ:
-                    continue
-                wid = int(occ["workflow_bag_id"])
-                bag_row = conn.execute(
-                    """
-                    SELECT wb.id, wb.receipt_number, wb.product_id, pd.product_name, wb.inventory_bag_id
-                    FROM workflow_bags wb
-                    LEFT JOIN product_details pd ON pd.id = wb.product_id
-                    WHERE wb.id = ?
-                    """,
-                    (wid,),
-                ).fetchone()
-                bd = dict(bag_row) if bag_row else {}
-                station_live[sid] = {
-                    "status": occ["status"],
-                    "workflow_bag_id": wid,
-                    "card_token": occ.get("card_token"),
-                    "occupancy_started_at": occ.get("occupancy_started_at_ms"),
-                    "paused_at_ms": occ.get("paused_at_ms"),
-                    "paused_run_elapsed_label": _paused_run_elapsed_label(occ),
-                    "product_name": bd.get("product_name"),
-                    "flavor": bd.get("product_name"),
-                    "receipt_number": bd.get("receipt_number"),
-                    "bag_name": _workflow_inventory_bag_name(conn, bd.get("inventory_bag_id")),
-                    "out_of_packaging_shortages": (occ.get("facts") or {}).get("out_of_packaging_shortages") or [],
-                }
+            station_live = _station_live_from_occupancy(conn, stations)
             bag_station_for_card_label = {}
             for st in stations:
                 sid = int(st["id"])
@@ -2068,13 +2003,22 @@ def command_center_final_output_summary():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def _cached_ops_tv_snapshot(conn: sqlite3.Connection, date_iso: str | None):
+    """Snapshot for the factory date of ``date_iso`` via the shared cache (see ops_tv_snapshot_cache)."""
+    date_label = _ny_today_bounds_ms(date_iso)[2]
+    is_today = date_label == _ny_today_bounds_ms(None)[2]
+    return ops_tv_snapshot_cache.get_snapshot(
+        conn, date_label, is_today, lambda: build_ops_tv_snapshot(conn, date_label)
+    )
+
+
 def _render_ops_tv_dashboard_page():
     """Fullscreen Pill Packing / MES wallboard HTML (shared by /ops-tv and /pill-packing)."""
     ver = read_version_constants().get("__version__", "1")
     initial_snapshot: dict = {}
     try:
         with db_read_only() as conn:
-            initial_snapshot = build_ops_tv_snapshot(conn, request.args.get("date"))
+            initial_snapshot = _cached_ops_tv_snapshot(conn, request.args.get("date")).payload()
     except Exception:
         current_app.logger.exception("ops_tv_dashboard bootstrap snapshot")
 
@@ -2108,6 +2052,7 @@ def _render_ops_tv_dashboard_page():
     html = render_template(
         "ops_tv_dashboard.html",
         snapshot_api_url=url_for("admin.ops_tv_snapshot_api"),
+        stream_api_url=url_for("admin.ops_tv_stream_api") if Config.SSE_ENABLED else "",
         command_center_url=cc,
         app_version=ver,
         initial_snapshot=initial_snapshot,
@@ -2139,16 +2084,24 @@ def pill_packing_command_center():
 def ops_tv_snapshot_api():
     try:
         with db_read_only() as conn:
-            payload = build_ops_tv_snapshot(conn, request.args.get("date"))
-        r = jsonify(payload)
-        r.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-        r.headers["Pragma"] = "no-cache"
-        return r
+            entry = _cached_ops_tv_snapshot(conn, request.args.get("date"))
+        r = current_app.response_class(entry.body, mimetype="application/json")
+        # Browsers may keep the body but must revalidate; unchanged snapshots come back as 304.
+        r.set_etag(entry.etag)
+        r.headers["Cache-Control"] = "private, no-cache"
+        return r.make_conditional(request)
     except Exception as e:
         current_app.logger.exception("ops_tv_snapshot_api")
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route("/command-center/ops-tv/api/stream")
+@role_required("dashboard")
+def ops_tv_stream_api():
+    """SSE: workflow event deltas plus ``snapshot`` notices when the cached snapshot is stale."""
+    return workflow_event_stream_response(request, include_payload=True, notify_snapshot=True)
+
+
 @bp.route("/admin/workflow-qr/release", methods=["POST"])
 @admin_required
 def workflow_qr_release_card():
@@ -2671,7 +2624,7 @@ def workflow_qr_remove_station():
                 flash("Unknown workflow station.", "error")
                 return redirect(stations_url)
             station = dict(row)
-            occ = _current_station_occupancy(conn, int(station_id))
+            occ = station_occupancy(conn, int(station_id))
             if occ and occ.get("status") in ("occupied", "paused"):
                 flash(
                     "Cannot remove a station while it has an active or paused bag.",
@@ -1,11 +1,16 @@
 """
 API routes - all /api/* endpoints
 """
+import hashlib
+import json
 from datetime import datetime, timedelta
 
 from flask import current_app, flash, jsonify, redirect, render_template, request, session, url_for
 
+from app.services.data_versions import read_data_versions
+from app.services.employee_profiles import bump_employee_profiles
 from app.utils.auth_utils import (
+    employee_required,
     role_required,
     verify_password,
 )
@@ -153,6 +158,7 @@ def set_language():
                         WHERE id = ?
                     ''', (language, session.get('employee_id')))
                     current_app.logger.info(f"Language preference saved to database: {language} for employee {session.get('employee_id')}")
+                bump_employee_profiles()
             except Exception as e:
                 current_app.logger.error(f"Failed to save language preference to database: {str(e)}")
                 # Continue without database save - session is still set
@@ -164,3 +170,19 @@ def set_language():
     except Exception as e:
         current_app.logger.error(f"Language setting error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/api/versions', methods=['GET'])
+@employee_required
+def get_data_versions():
+    """Change counters for the watched tables (``data_versions``); poll this instead of a full view."""
+    try:
+        with db_read_only() as conn:
+            versions = read_data_versions(conn)
+        r = jsonify({'success': True, 'versions': versions})
+        r.set_etag(hashlib.sha1(json.dumps(versions, sort_keys=True).encode()).hexdigest()[:24])
+        r.headers['Cache-Control'] = 'private, no-cache'
+        return r.make_conditional(request)
+    except Exception as e:
+        current_app.logger.error('get_data_versions: %s', e, exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
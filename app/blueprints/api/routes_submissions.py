@@ -31,6 +31,7 @@ from app.utils.auth_utils import (
 )
 from app.utils.db_utils import db_read_only, db_transaction
 from app.utils.eastern_datetime import parse_optional_eastern
+from app.utils.schema_registry import table_columns
 from app.utils.route_helpers import (
     ensure_app_settings_table,
     get_setting,
@@ -45,7 +46,7 @@ def get_submission_details(submission_id):
     """Get full details of a submission (viewable by all authenticated users)"""
     try:
         with db_read_only() as conn:
-            ws_columns = {row['name'] for row in conn.execute("PRAGMA table_info(warehouse_submissions)").fetchall()}
+            ws_columns = table_columns(conn, 'warehouse_submissions')
             case_count_select = "ws.case_count," if "case_count" in ws_columns else "NULL AS case_count,"
             loose_display_select = (
                 "ws.loose_display_count," if "loose_display_count" in ws_columns else "NULL AS loose_display_count,"
@@ -724,7 +725,7 @@ def edit_submission(submission_id):
 
             # Convert Row to dict for safe access
             submission = dict(submission)
-            ws_columns = {row['name'] for row in conn.execute("PRAGMA table_info(warehouse_submissions)").fetchall()}
+            ws_columns = table_columns(conn, 'warehouse_submissions')
 
             corrected_by = (
                 session.get('employee_name')
@@ -5,8 +5,11 @@ import traceback
 
 from flask import Blueprint, current_app, jsonify, request
 
+from app.services.employee_profiles import bump_employee_profiles
 from app.services.submission_calculator import calculate_repack_output_good
+from app.utils import cache_utils
 from app.utils.auth_utils import admin_required, hash_password
+from app.utils.db_pool import pool_metrics
 from app.utils.db_utils import db_read_only, db_transaction
 from app.utils.route_helpers import ensure_app_settings_table
 
@@ -263,7 +266,8 @@ def add_employee():
                 VALUES (?, ?, ?, ?)
             ''', (username, full_name, password_hash, role))
 
-            return jsonify({'success': True, 'message': f'Added employee: {full_name}'})
+        bump_employee_profiles()
+        return jsonify({'success': True, 'message': f'Added employee: {full_name}'})
     except Exception as e:
         current_app.logger.error(f"Error adding employee: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -296,10 +300,11 @@ def update_employee_role(employee_id):
                 WHERE id = ?
             ''', (new_role, employee_id))
 
-            return jsonify({
-                'success': True,
-                'message': f'Updated {employee["full_name"]} role to {new_role.replace("_", " ").title()}'
-            })
+        bump_employee_profiles()
+        return jsonify({
+            'success': True,
+            'message': f'Updated {employee["full_name"]} role to {new_role.replace("_", " ").title()}'
+        })
     except Exception as e:
         current_app.logger.error(f"Error updating employee role: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -326,8 +331,9 @@ def toggle_employee(employee_id):
                 WHERE id = ?
             ''', (new_status, employee_id))
 
-            status_text = 'activated' if new_status else 'deactivated'
-            return jsonify({'success': True, 'message': f'{employee["full_name"]} {status_text}'})
+        bump_employee_profiles()
+        status_text = 'activated' if new_status else 'deactivated'
+        return jsonify({'success': True, 'message': f'{employee["full_name"]} {status_text}'})
     except Exception as e:
         current_app.logger.error(f"Error toggling employee: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -349,7 +355,8 @@ def delete_employee(employee_id):
 
             conn.execute('DELETE FROM employees WHERE id = ?', (employee_id,))
 
-            return jsonify({'success': True, 'message': f'Deleted employee: {employee["full_name"]}'})
+        bump_employee_profiles()
+        return jsonify({'success': True, 'message': f'Deleted employee: {employee["full_name"]}'})
     except Exception as e:
         current_app.logger.error(f"Error deleting employee: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -673,6 +680,30 @@ def diagnose_submissions(receive_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/api/admin/db-pool', methods=['GET'])
+@admin_required
+def db_pool_stats():
+    """Connection pool checkout / busy-retry counters for this worker process"""
+    return jsonify({'success': True, 'pool': pool_metrics()})
+
+
+@bp.route('/api/admin/cache', methods=['GET'])
+@admin_required
+def cache_stats():
+    """In-process cache hit / miss / eviction counters for this worker process"""
+    return jsonify({'success': True, 'cache': cache_utils.stats()})
+
+
+@bp.route('/api/admin/cache/invalidate', methods=['POST'])
+@admin_required
+def invalidate_cache_namespace():
+    """Drop one cache namespace in this worker process (e.g. 'po_summary')"""
+    namespace = ((request.get_json(silent=True) or {}).get('namespace') or '').strip()
+    if not namespace:
+        return jsonify({'success': False, 'error': 'namespace is required'}), 400
+    return jsonify({'success': True, 'namespace': namespace, 'removed': cache_utils.invalidate(namespace)})
+
+
 @bp.route('/api/admin/fix-bag-assignments', methods=['POST'])
 @admin_required
 def fix_bag_assignments():
@@ -6,6 +6,7 @@ import time
 
 from flask import Blueprint, current_app, jsonify, request
 
+from app.services.blister_press_counter import blister_press_count
 from app.utils.auth_utils import admin_required, employee_required
 from app.utils.db_utils import db_read_only, db_transaction
 
@@ -22,66 +23,6 @@ def _normalize_machine_role(raw_role, default='sealing'):
     return role
 
 
-def _ensure_machine_metadata_columns(conn):
-    cols = {r[1] for r in conn.execute("PRAGMA table_info(machines)").fetchall()}
-    adds = []
-    if 'area_name' not in cols:
-        adds.append("ALTER TABLE machines ADD COLUMN area_name TEXT")
-    if 'machine_category' not in cols:
-        adds.append("ALTER TABLE machines ADD COLUMN machine_category TEXT")
-    if 'raw_materials_json' not in cols:
-        adds.append("ALTER TABLE machines ADD COLUMN raw_materials_json TEXT")
-    if 'components_json' not in cols:
-        adds.append("ALTER TABLE machines ADD COLUMN components_json TEXT")
-    if 'compressor_json' not in cols:
-        adds.append("ALTER TABLE machines ADD COLUMN compressor_json TEXT")
-    for sql in adds:
-        conn.execute(sql)
-
-
-def _ensure_asset_tracking_tables(conn):
-    conn.execute(
-        '''
-        CREATE TABLE IF NOT EXISTS compressors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            compressor_name TEXT NOT NULL UNIQUE,
-            status TEXT NOT NULL DEFAULT 'working',
-            machine_id INTEGER,
-            notes TEXT,
-            is_active BOOLEAN NOT NULL DEFAULT TRUE,
-            created_at INTEGER,
-            updated_at INTEGER
-        )
-        '''
-    )
-    conn.execute(
-        '''
-        CREATE TABLE IF NOT EXISTS blister_material_rolls (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            machine_id INTEGER NOT NULL,
-            material_type TEXT NOT NULL,
-            roll_code TEXT NOT NULL,
-            started_at_ms INTEGER NOT NULL,
-            ended_at_ms INTEGER,
-            start_press_count REAL NOT NULL DEFAULT 0,
-            end_press_count REAL,
-            blisters_per_press INTEGER NOT NULL DEFAULT 1,
-            total_blisters REAL,
-            status TEXT NOT NULL DEFAULT 'active'
-        )
-        '''
-    )
-    _ensure_compressor_metadata_columns(conn)
-
-
-def _ensure_compressor_metadata_columns(conn):
-    cols = {r[1] for r in conn.execute('PRAGMA table_info(compressors)').fetchall()}
-    if 'cost' not in cols:
-        conn.execute('ALTER TABLE compressors ADD COLUMN cost REAL')
-    if 'tank_size' not in cols:
-        conn.execute('ALTER TABLE compressors ADD COLUMN tank_size TEXT')
-
-
 def _compressor_description_from_body(data):
     """Persist as `notes` column; accept `description` (preferred) or legacy `notes`."""
     if not data:
@@ -167,32 +108,12 @@ def _roll_history_stats(conn, machine_id: int) -> dict:
 
 
 def _blister_press_count_for_station(conn, station_id):
+    """Cumulative presses for a blister station (persisted counter, see blister_press_counter)."""
     sid = _coerce_positive_int(station_id, 0)
     if sid < 1:
         return 0.0
     try:
-        row = conn.execute(
-            '''
-            SELECT COALESCE(SUM(
-                CASE
-                    WHEN json_extract(payload, '$.counter_end') IS NOT NULL
-                     AND json_extract(payload, '$.counter_start') IS NOT NULL
-                     AND CAST(json_extract(payload, '$.counter_end') AS REAL) >= CAST(json_extract(payload, '$.counter_start') AS REAL)
-                    THEN CAST(json_extract(payload, '$.counter_end') AS REAL) - CAST(json_extract(payload, '$.counter_start') AS REAL)
-                    ELSE COALESCE(CAST(json_extract(payload, '$.count_total') AS REAL), 0)
-                END
-            ), 0) AS presses
-            FROM workflow_events
-            WHERE event_type = 'BLISTER_COMPLETE'
-              AND (
-                station_id = ?
-                OR CAST(json_extract(payload, '$.station_id') AS INTEGER) = ?
-                OR CAST(json_extract(payload, '$.stationId') AS INTEGER) = ?
-              )
-            ''',
-            (sid, sid, sid),
-        ).fetchone()
-        return float(row['presses'] or 0)
+        return blister_press_count(conn, sid)
     except Exception:
         return 0.0
 
@@ -209,8 +130,6 @@ def get_machines():
             if not normalized_role:
                 return jsonify({'success': False, 'error': 'Invalid role.'}), 400
         with db_read_only() as conn:
-            _ensure_machine_metadata_columns(conn)
-            _ensure_asset_tracking_tables(conn)
             if normalized_role:
                 machines = conn.execute(
                     '''
@@ -277,8 +196,6 @@ def create_machine():
             return jsonify({'success': False, 'error': 'Invalid output-units value'}), 400
 
         with db_transaction() as conn:
-            _ensure_machine_metadata_columns(conn)
-            _ensure_asset_tracking_tables(conn)
             existing = conn.execute('SELECT id FROM machines WHERE machine_name = ?', (machine_name,)).fetchone()
             if existing:
                 return jsonify({'success': False, 'error': 'Machine name already exists'}), 400
@@ -329,8 +246,6 @@ def update_machine(machine_id):
             return jsonify({'success': False, 'error': 'Invalid output-units value'}), 400
 
         with db_transaction() as conn:
-            _ensure_machine_metadata_columns(conn)
-            _ensure_asset_tracking_tables(conn)
             machine = conn.execute('SELECT id FROM machines WHERE id = ?', (machine_id,)).fetchone()
             if not machine:
                 return jsonify({'success': False, 'error': 'Machine not found'}), 404
@@ -390,7 +305,6 @@ def delete_machine(machine_id):
 def get_compressors():
     try:
         with db_read_only() as conn:
-            _ensure_asset_tracking_tables(conn)
             rows = conn.execute(
                 '''
                 SELECT c.id, c.compressor_name, c.status, c.machine_id,
@@ -426,7 +340,6 @@ def create_compressor():
         cost_val = _optional_float_from_value(data.get('cost'))
         tank_val = (data.get('tank_size') or '').strip() or None
         with db_transaction() as conn:
-            _ensure_asset_tracking_tables(conn)
             conn.execute(
                 '''
                 INSERT INTO compressors (
@@ -467,7 +380,6 @@ def update_compressor(compressor_id):
                 return jsonify({'success': False, 'error': 'Compressor name is required'}), 400
         now_ms = int(time.time() * 1000)
         with db_transaction() as conn:
-            _ensure_asset_tracking_tables(conn)
             row = conn.execute(
                 '''
                 SELECT compressor_name, notes, cost, tank_size FROM compressors
@@ -539,7 +451,6 @@ def get_blister_roll_summary():
         station_id = _coerce_positive_int(request.args.get('station_id'), 0)
         machine_id = _coerce_positive_int(request.args.get('machine_id'), 0)
         with db_read_only() as conn:
-            _ensure_asset_tracking_tables(conn)
             if machine_id < 1 and station_id > 0:
                 machine_id = _resolve_machine_id_from_station(conn, station_id) or 0
             if station_id < 1 and machine_id > 0:
@@ -597,7 +508,6 @@ def change_blister_material_roll():
         machine_id = _coerce_positive_int(data.get('machine_id'), 0)
         roll_code = (data.get('roll_code') or '').strip()
         with db_transaction() as conn:
-            _ensure_asset_tracking_tables(conn)
             if machine_id < 1 and station_id > 0:
                 machine_id = _resolve_machine_id_from_station(conn, station_id) or 0
             if machine_id < 1:
@@ -11,6 +11,7 @@ from flask import Blueprint, current_app, jsonify, request, session
 from app.services.purchase_order_service import create_or_update_overs_po_for_push, get_overs_po_preview
 from app.services.purchase_order_service import create_overs_po as create_overs_po_service
 from app.services.zoho_service import parse_zoho_item_weight_grams, zoho_api
+from app.services.zoho_sync_state import read_sync_state
 from app.utils.auth_utils import role_required
 from app.utils.db_utils import db_read_only, db_transaction
 
@@ -88,7 +89,8 @@ def sync_zoho_pos():
             current_app.logger.info("✅ Database connection established")
 
             current_app.logger.info("📡 Calling Zoho API sync function...")
-            success, message = zoho_api.sync_tablet_pos_to_db(conn)
+            full = str(request.values.get('full', '')).lower() in ('1', 'true', 'yes')
+            success, message = zoho_api.sync_tablet_pos_to_db(conn, full=full)
             current_app.logger.info(f"✅ Sync completed. Success: {success}, Message: {message}")
 
             if success:
@@ -102,6 +104,15 @@ def sync_zoho_pos():
         return jsonify({'error': f'Sync failed: {str(e)}', 'success': False}), 500
 
 
+@bp.route('/api/zoho_sync_status')
+@role_required('dashboard')
+def zoho_sync_status():
+    """Progress of the running (or last) Zoho PO sync, for polling while a sync is in flight."""
+    with db_read_only() as conn:
+        state = read_sync_state(conn)
+    return jsonify({'success': True, 'state': state})
+
+
 @bp.route('/api/create_overs_po/<int:po_id>', methods=['POST'])
 @role_required('dashboard')
 def create_overs_po(po_id):
@@ -289,23 +289,6 @@ def save_receives():
             return jsonify({'success': False, 'error': 'Only warehouse leads, managers, and admins can assign POs'}), 403
 
         with db_transaction() as conn:
-            # Ensure tablet_type_id column exists
-            c = conn.cursor()
-            c.execute('PRAGMA table_info(bags)')
-            existing_bags_cols = [row[1] for row in c.fetchall()]
-            if 'tablet_type_id' not in existing_bags_cols:
-                try:
-                    conn.execute('ALTER TABLE bags ADD COLUMN tablet_type_id INTEGER')
-                    conn.commit()
-                except Exception as e:
-                    if conn:
-                        try:
-                            conn.rollback()
-                        except Exception:
-                            # Keep original migration warning path.
-                            pass
-                    current_app.logger.warning(f"Could not add tablet_type_id column: {e}")
-
             # Get current user name
             received_by = 'Unknown'
             if session.get('employee_id'):
@@ -817,51 +800,60 @@ def get_po_receives(po_id):
         return jsonify({'error': str(e)}), 500
 
 
-RECEIVES_LIST_CACHE_KEY = 'api_receives_list'
-RECEIVES_LIST_CACHE_TTL = 30.0
+RECEIVES_LIST_CACHE_NAMESPACE = 'receives_list'
+# Entries are keyed on the receiving / purchase_orders data_versions, so they stay valid until
+# one of those tables changes; the short TTL applies only to databases without the counters.
+RECEIVES_LIST_CACHE_TTL = 600.0
+RECEIVES_LIST_UNVERSIONED_TTL = 30.0
+RECEIVES_LIST_VERSION_TABLES = ('receiving', 'purchase_orders')
+
+
+def _build_receives_list():
+    with db_read_only() as conn:
+        receives = conn.execute('''
+            SELECT r.id,
+                   r.received_date,
+                   po.po_number,
+                   r.po_id,
+                   r.receive_name
+            FROM receiving r
+            LEFT JOIN purchase_orders po ON r.po_id = po.id
+            ORDER BY COALESCE(r.received_date, r.created_at) DESC, r.id DESC
+            LIMIT 100
+        ''').fetchall()
+
+        receives_list = []
+        for r in receives:
+            receive_dict = dict(r)
+            if not receive_dict.get('receive_name') and receive_dict.get('po_number'):
+                receive_number_result = conn.execute('''
+                    SELECT COUNT(*) + 1 as receive_number
+                    FROM receiving r2
+                    WHERE r2.po_id = ?
+                    AND (r2.received_date < ?
+                         OR (r2.received_date = ? AND r2.id < ?))
+                ''', (receive_dict['po_id'], receive_dict.get('received_date'), receive_dict.get('received_date'), receive_dict.get('id'))).fetchone()
+                receive_number = receive_number_result['receive_number'] if receive_number_result else 1
+                receive_dict['receive_name'] = f"{receive_dict['po_number']}-{receive_number}"
+            receives_list.append(receive_dict)
+
+        return {'success': True, 'receives': receives_list}
 
 
 @bp.route('/api/receives/list', methods=['GET'])
 @role_required('dashboard')
 def get_receives_list():
-    """Get list of all receives for reporting (cached 30s)."""
-    from app.utils.cache_utils import get as cache_get
-    from app.utils.cache_utils import set as cache_set
-    cached = cache_get(RECEIVES_LIST_CACHE_KEY)
-    if cached is not None:
-        return jsonify(cached)
+    """Get list of all receives for reporting (cached until receives/POs change)."""
+    from app.services.data_versions import versions_key
+    from app.utils.cache_utils import get_or_set
     try:
         with db_read_only() as conn:
-            receives = conn.execute('''
-                SELECT r.id,
-                       r.received_date,
-                       po.po_number,
-                       r.po_id,
-                       r.receive_name
-                FROM receiving r
-                LEFT JOIN purchase_orders po ON r.po_id = po.id
-                ORDER BY COALESCE(r.received_date, r.created_at) DESC, r.id DESC
-                LIMIT 100
-            ''').fetchall()
-
-            receives_list = []
-            for r in receives:
-                receive_dict = dict(r)
-                if not receive_dict.get('receive_name') and receive_dict.get('po_number'):
-                    receive_number_result = conn.execute('''
-                        SELECT COUNT(*) + 1 as receive_number
-                        FROM receiving r2
-                        WHERE r2.po_id = ?
-                        AND (r2.received_date < ?
-                             OR (r2.received_date = ? AND r2.id < ?))
-                    ''', (receive_dict['po_id'], receive_dict.get('received_date'), receive_dict.get('received_date'), receive_dict.get('id'))).fetchone()
-                    receive_number = receive_number_result['receive_number'] if receive_number_result else 1
-                    receive_dict['receive_name'] = f"{receive_dict['po_number']}-{receive_number}"
-                receives_list.append(receive_dict)
-
-            payload = {'success': True, 'receives': receives_list}
-            cache_set(RECEIVES_LIST_CACHE_KEY, payload, RECEIVES_LIST_CACHE_TTL)
-            return jsonify(payload)
+            version = versions_key(conn, RECEIVES_LIST_VERSION_TABLES)
+        ttl = RECEIVES_LIST_CACHE_TTL if version is not None else RECEIVES_LIST_UNVERSIONED_TTL
+        payload = get_or_set(
+            version or 'unversioned', _build_receives_list, ttl, namespace=RECEIVES_LIST_CACHE_NAMESPACE
+        )
+        return jsonify(payload)
     except Exception as e:
         current_app.logger.error(f"Error getting receives list: {str(e)}")
         traceback.print_exc()
@@ -1,83 +1,63 @@
 """
 Reports API routes for generating production and vendor reports.
 """
+import os
 import traceback
 from datetime import datetime
 
 from config import Config
-from flask import Blueprint, current_app, jsonify, make_response, request
+from flask import Blueprint, current_app, jsonify, make_response, request, send_file
 
+from app.services import report_jobs
 from app.services import reporting_analytics_service as analytics
-from app.services.report_service import ProductionReportGenerator
+from app.services.data_versions import versions_key
 from app.utils.auth_utils import role_required
-from app.utils.cache_utils import get
-from app.utils.cache_utils import set as cache_set
-from app.utils.db_utils import db_read_only
+from app.utils.cache_utils import get_or_set
+from app.utils.db_utils import db_read_only, db_transaction
 
-PO_SUMMARY_CACHE_KEY = 'api_reports_po_summary'
+PO_SUMMARY_CACHE_NAMESPACE = 'po_summary'
+# Entries are keyed on the data_versions of the tables below, so a write is visible at once; the
+# TTL only bounds how stale the shipment tracking columns can get. After it, the old payload is
+# served for up to PO_SUMMARY_STALE_SECONDS while one background build refreshes it.
 PO_SUMMARY_CACHE_TTL = 30.0
+PO_SUMMARY_STALE_SECONDS = 30.0
+PO_SUMMARY_VERSION_TABLES = ('purchase_orders', 'warehouse_submissions')
 
 bp = Blueprint('api_reports', __name__)
 
 
+def _pdf_response(pdf_content, filename):
+    response = make_response(pdf_content)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @bp.route('/api/reports/production', methods=['POST'])
 @role_required('dashboard')
 def generate_production_report():
-    """Generate comprehensive production report PDF"""
+    """Generate comprehensive production report PDF (served from the report cache when data is unchanged)"""
     try:
-        data = request.get_json() or {}
+        try:
+            params = report_jobs.normalize_report_params(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        start_date = data.get('start_date')
-        end_date = data.get('end_date')
-        po_numbers = data.get('po_numbers', [])
-        tablet_type_id = data.get('tablet_type_id')
-        report_type = data.get('report_type', 'production')
-        receive_id = data.get('receive_id')
-
-        if start_date:
+        filename = report_jobs.report_filename(params['report_type'])
+        with db_read_only() as conn:
+            cache_key = report_jobs.report_cache_key(conn, params)
+        cached_path = report_jobs.cached_report_path(cache_key)
+        if cached_path:
+            with open(cached_path, 'rb') as fh:
+                return _pdf_response(fh.read(), filename)
+
+        pdf_content = report_jobs.render_report(Config.DATABASE_PATH, params)
+        if cache_key:
             try:
-                datetime.strptime(start_date, '%Y-%m-%d')
-            except ValueError:
-                return jsonify({'error': 'Invalid start_date format. Use YYYY-MM-DD'}), 400
-
-        if end_date:
-            try:
-                datetime.strptime(end_date, '%Y-%m-%d')
-            except ValueError:
-                return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
-
-        generator = ProductionReportGenerator(db_path=Config.DATABASE_PATH)
-
-        if report_type == 'vendor':
-            pdf_content = generator.generate_vendor_report(
-                start_date=start_date,
-                end_date=end_date,
-                po_numbers=po_numbers if po_numbers else None,
-                tablet_type_id=tablet_type_id
-            )
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'vendor_report_{timestamp}.pdf'
-        elif report_type == 'receive':
-            if not receive_id:
-                return jsonify({'error': 'Receive ID is required for receive reports'}), 400
-            pdf_content = generator.generate_receive_report(receive_id=receive_id)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'receive_report_{timestamp}.pdf'
-        else:
-            pdf_content = generator.generate_production_report(
-                start_date=start_date,
-                end_date=end_date,
-                po_numbers=po_numbers if po_numbers else None,
-                tablet_type_id=tablet_type_id
-            )
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'production_report_{timestamp}.pdf'
-
-        response = make_response(pdf_content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        return response
+                report_jobs.store_report(cache_key, pdf_content)
+            except OSError as e:
+                current_app.logger.warning(f"Could not cache report: {e}")
+        return _pdf_response(pdf_content, filename)
 
     except Exception as e:
         error_trace = traceback.format_exc()
@@ -88,84 +68,147 @@ def generate_production_report():
         }), 500
 
 
+@bp.route('/api/reports/jobs', methods=['POST'])
+@role_required('dashboard')
+def submit_report_job():
+    """Queue a PDF report (same body as /api/reports/production); poll the returned job for progress."""
+    try:
+        params = report_jobs.normalize_report_params(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        with db_transaction() as conn:
+            job = report_jobs.submit_report_job(conn, params)
+        if job['status'] == 'queued':
+            report_jobs.dispatch_report_jobs()
+        return jsonify({'success': True, 'job': report_jobs.public_job(job)}), 202
+    except Exception as e:
+        current_app.logger.error(f"Report job submit error: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({'success': False, 'error': f'Could not queue report: {str(e)}'}), 500
+
+
+@bp.route('/api/reports/jobs/<job_id>')
+@role_required('dashboard')
+def get_report_job(job_id):
+    """Status and progress (0..1) of a queued report."""
+    with db_read_only() as conn:
+        job = report_jobs.get_report_job(conn, job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    if report_jobs.job_is_stale(job):
+        # Its worker died and no new submission has triggered a claim: retry or fail it now.
+        with db_transaction() as conn:
+            report_jobs.requeue_stale_jobs(conn)
+            job = report_jobs.get_report_job(conn, job_id)
+        if job['status'] == 'queued':
+            report_jobs.dispatch_report_jobs()
+    return jsonify({'success': True, 'job': report_jobs.public_job(job)})
+
+
+@bp.route('/api/reports/jobs/<job_id>/download')
+@role_required('dashboard')
+def download_report_job(job_id):
+    """PDF of a finished report job."""
+    with db_read_only() as conn:
+        job = report_jobs.get_report_job(conn, job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'success': False, 'error': f"Report is {job['status']}", 'job': report_jobs.public_job(job)}), 409
+    path = job['result_path']
+    if not path or not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'Report file has expired; submit it again'}), 410
+    return send_file(path, mimetype='application/pdf', as_attachment=True, download_name=job['filename'])
+
+
+def _build_po_summary():
+    """PO summary payload; opens its own connection so a stale entry can be refreshed in the background."""
+    with db_read_only() as conn:
+        po_count_row = conn.execute('SELECT COUNT(*) as count FROM purchase_orders').fetchone()
+        po_count = dict(po_count_row) if po_count_row else {'count': 0}
+        if not po_count or po_count.get('count', 0) == 0:
+            return {
+                'success': True,
+                'pos': [],
+                'total_count': 0,
+                'message': 'No purchase orders found'
+            }
+
+        query = '''
+            SELECT
+            po.id,
+            po.po_number,
+            po.tablet_type,
+            COALESCE(po.internal_status, 'Active') as internal_status,
+            COALESCE(po.ordered_quantity, 0) as ordered_quantity,
+            COALESCE(po.current_good_count, 0) as current_good_count,
+            COALESCE(po.current_damaged_count, 0) as current_damaged_count,
+            po.created_at,
+            po.updated_at,
+            (SELECT COUNT(*) FROM warehouse_submissions WHERE assigned_po_id = po.id) as submission_count,
+            (SELECT MAX(created_at) FROM warehouse_submissions WHERE assigned_po_id = po.id) as last_submission,
+            (SELECT MAX(actual_delivery) FROM shipments WHERE po_id = po.id) as actual_delivery,
+            (SELECT MAX(delivered_at) FROM shipments WHERE po_id = po.id) as delivered_at,
+            (SELECT MAX(tracking_status) FROM shipments WHERE po_id = po.id) as tracking_status
+        FROM purchase_orders po
+        WHERE po.po_number IS NOT NULL
+        ORDER BY po.created_at DESC
+            LIMIT 100
+        '''
+        pos = conn.execute(query).fetchall()
+
+        po_list = []
+        for po_row in pos:
+            po = dict(po_row)
+
+            pack_time = None
+            delivery_date = po.get('actual_delivery') or po.get('delivered_at')
+            completion_date = po.get('last_submission') or (po.get('updated_at')[:10] if po.get('internal_status') == 'Complete' and po.get('updated_at') else None)
+
+            if delivery_date and completion_date:
+                try:
+                    del_dt = datetime.strptime(str(delivery_date)[:10], '%Y-%m-%d')
+                    comp_dt = datetime.strptime(str(completion_date)[:10], '%Y-%m-%d')
+                    pack_time = (comp_dt - del_dt).days
+                except (ValueError, TypeError):
+                    pack_time = None
+
+            po_list.append({
+                'po_number': po.get('po_number') or 'N/A',
+                'tablet_type': po.get('tablet_type') or 'N/A',
+                'status': po.get('internal_status') or 'Active',
+                'ordered': int(po.get('ordered_quantity') or 0),
+                'produced': int(po.get('current_good_count') or 0),
+                'damaged': int(po.get('current_damaged_count') or 0),
+                'created_date': str(po['created_at'])[:10] if po.get('created_at') else None,
+                'submissions': int(po.get('submission_count') or 0),
+                'pack_time_days': pack_time,
+                'tracking_status': po.get('tracking_status')
+            })
+
+        payload = {
+            'success': True,
+            'pos': po_list,
+            'total_count': len(po_list)
+        }
+        return payload
+
+
 @bp.route('/api/reports/po-summary')
 @role_required('dashboard')
 def get_po_summary_for_reports():
-    """Get summary of POs available for reporting (cached 30s)."""
-    cached = get(PO_SUMMARY_CACHE_KEY)
-    if cached is not None:
-        return jsonify(cached)
+    """Get summary of POs available for reporting (cached until POs/submissions change, at most 30s)."""
     try:
         with db_read_only() as conn:
-            po_count_row = conn.execute('SELECT COUNT(*) as count FROM purchase_orders').fetchone()
-            po_count = dict(po_count_row) if po_count_row else {'count': 0}
-            if not po_count or po_count.get('count', 0) == 0:
-                return jsonify({
-                    'success': True,
-                    'pos': [],
-                    'total_count': 0,
-                    'message': 'No purchase orders found'
-                })
-
-            query = '''
-                SELECT
-                po.id,
-                po.po_number,
-                po.tablet_type,
-                COALESCE(po.internal_status, 'Active') as internal_status,
-                COALESCE(po.ordered_quantity, 0) as ordered_quantity,
-                COALESCE(po.current_good_count, 0) as current_good_count,
-                COALESCE(po.current_damaged_count, 0) as current_damaged_count,
-                po.created_at,
-                po.updated_at,
-                (SELECT COUNT(*) FROM warehouse_submissions WHERE assigned_po_id = po.id) as submission_count,
-                (SELECT MAX(created_at) FROM warehouse_submissions WHERE assigned_po_id = po.id) as last_submission,
-                (SELECT MAX(actual_delivery) FROM shipments WHERE po_id = po.id) as actual_delivery,
-                (SELECT MAX(delivered_at) FROM shipments WHERE po_id = po.id) as delivered_at,
-                (SELECT MAX(tracking_status) FROM shipments WHERE po_id = po.id) as tracking_status
-            FROM purchase_orders po
-            WHERE po.po_number IS NOT NULL
-            ORDER BY po.created_at DESC
-                LIMIT 100
-            '''
-            pos = conn.execute(query).fetchall()
-
-            po_list = []
-            for po_row in pos:
-                po = dict(po_row)
-
-                pack_time = None
-                delivery_date = po.get('actual_delivery') or po.get('delivered_at')
-                completion_date = po.get('last_submission') or (po.get('updated_at')[:10] if po.get('internal_status') == 'Complete' and po.get('updated_at') else None)
-
-                if delivery_date and completion_date:
-                    try:
-                        del_dt = datetime.strptime(str(delivery_date)[:10], '%Y-%m-%d')
-                        comp_dt = datetime.strptime(str(completion_date)[:10], '%Y-%m-%d')
-                        pack_time = (comp_dt - del_dt).days
-                    except (ValueError, TypeError):
-                        pack_time = None
-
-                po_list.append({
-                    'po_number': po.get('po_number') or 'N/A',
-                    'tablet_type': po.get('tablet_type') or 'N/A',
-                    'status': po.get('internal_status') or 'Active',
-                    'ordered': int(po.get('ordered_quantity') or 0),
-                    'produced': int(po.get('current_good_count') or 0),
-                    'damaged': int(po.get('current_damaged_count') or 0),
-                    'created_date': str(po['created_at'])[:10] if po.get('created_at') else None,
-                    'submissions': int(po.get('submission_count') or 0),
-                    'pack_time_days': pack_time,
-                    'tracking_status': po.get('tracking_status')
-                })
-
-            payload = {
-                'success': True,
-                'pos': po_list,
-                'total_count': len(po_list)
-            }
-            cache_set(PO_SUMMARY_CACHE_KEY, payload, PO_SUMMARY_CACHE_TTL)
-            return jsonify(payload)
+            version = versions_key(conn, PO_SUMMARY_VERSION_TABLES)
+        payload = get_or_set(
+            version or 'unversioned',
+            _build_po_summary,
+            PO_SUMMARY_CACHE_TTL,
+            namespace=PO_SUMMARY_CACHE_NAMESPACE,
+            stale_seconds=PO_SUMMARY_STALE_SECONDS,
+        )
+        return jsonify(payload)
     except Exception as e:
         error_trace = traceback.format_exc()
         current_app.logger.error(f"Error in get_po_summary_for_reports: {e}\n{error_trace}")
@@ -322,6 +365,7 @@ def reports_stage_yield():
                 date_to or '',
                 tablet_type_id=tablet_type_id,
                 machine_id=machine_id,
+                workers=Config.STAGE_YIELD_WORKERS,
             )
             if not data.get('success'):
                 return jsonify(data), 400
@@ -3,13 +3,14 @@
 from __future__ import annotations
 
 import hmac
+import sqlite3
 
 from config import Config
 from flask import Blueprint, current_app, jsonify, request
 
 from app.services import telegram_bot_service as bot
-from app.services import telegram_reporting_service as reports
-from app.utils.db_utils import db_read_only
+from app.services import telegram_outbox as outbox
+from app.utils.db_utils import db_transaction
 
 bp = Blueprint("api_telegram", __name__)
 
@@ -38,6 +39,7 @@ def _webhook_identity_ok(path_token: str | None) -> bool:
 
 
 def _telegram_handle_update():
+    """Queue the command in ``telegram_outbox`` and acknowledge; the reply is sent in the background."""
     payload = request.get_json(silent=True) or {}
     message = bot.extract_message(payload)
     if not message:
@@ -47,44 +49,29 @@ def _telegram_handle_update():
         return jsonify({"ok": False, "error": "unauthorized_chat_or_user"}), 403
 
     chat_id = (message.get("chat") or {}).get("id")
-    text = message.get("text") or ""
-    cmd, args = bot.parse_command(text)
-    if not cmd:
-        bot.telegram_send_message(chat_id, bot.help_text())
-        return jsonify({"ok": True})
-
+    if chat_id is None:
+        return jsonify({"ok": True, "ignored": "no_chat"})
+    cmd, args = bot.parse_command(message.get("text") or "")
+    update_id = payload.get("update_id")
     try:
-        if cmd in ("/start", "/help"):
-            reply = bot.help_text()
-        elif cmd == "/daily":
-            day_iso, full_day = bot.parse_daily_command_args(args)
-            with db_read_only() as conn:
-                summary = reports.build_daily_summary(conn, day_iso=day_iso, full_day=full_day)
-            reply = bot.format_daily_summary(summary)
-        elif cmd == "/status":
-            station_kind = (args or "").strip().lower()
-            if station_kind not in ("blister", "sealing", "packaging"):
-                reply = "Usage: /status blister OR /status sealing OR /status packaging"
-            else:
-                with db_read_only() as conn:
-                    station = reports.get_station_current_bag(conn, station_kind)
-                reply = bot.format_station_status(station_kind, station)
-        elif cmd == "/counts":
-            arg = (args or "").strip().lower()
-            if arg != "today":
-                reply = "Usage: /counts today"
-            else:
-                with db_read_only() as conn:
-                    counts = reports.count_bags_blistered_today(conn)
-                reply = bot.format_counts_today(counts)
-        else:
-            reply = "Unknown command.\n\n" + bot.help_text()
-        bot.telegram_send_message(chat_id, reply)
-    except Exception as exc:
-        current_app.logger.error("telegram_webhook command failed: %s", exc, exc_info=True)
+        with db_transaction() as conn:
+            queued = outbox.enqueue_command(
+                conn,
+                chat_id=chat_id,
+                command=cmd,
+                args=args,
+                update_id=update_id if isinstance(update_id, int) else None,
+            )
+    except sqlite3.Error as exc:
+        # Not queued: let Telegram redeliver the update.
+        current_app.logger.error("telegram_webhook enqueue failed: %s", exc, exc_info=True)
         return jsonify({"ok": False, "error": "command_failed"}), 500
 
-    return jsonify({"ok": True})
+    try:
+        outbox.dispatch_outbox()
+    except Exception as exc:
+        current_app.logger.error("telegram_webhook dispatch failed: %s", exc, exc_info=True)
+    return jsonify({"ok": True, "queued": queued})
 
 
 @bp.route("/api/telegram/webhook", methods=["POST"])
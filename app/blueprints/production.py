@@ -31,6 +31,7 @@ from app.utils.route_helpers import (
     ensure_machine_counts_table,
     ensure_submission_type_column,
 )
+from app.utils.schema_registry import table_columns
 
 bp = Blueprint('production', __name__)
 
@@ -883,7 +884,7 @@ def repack_eligible_pos():
     """Open POs for repack PO selector (excludes Draft)."""
     try:
         with db_read_only() as conn:
-            po_columns = [row["name"] for row in conn.execute("PRAGMA table_info(purchase_orders)").fetchall()]
+            po_columns = table_columns(conn, "purchase_orders")
             has_vendor_name = "vendor_name" in po_columns
             vendor_select = "vendor_name" if has_vendor_name else "NULL AS vendor_name"
             rows = conn.execute(
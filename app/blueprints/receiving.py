@@ -7,6 +7,7 @@ from flask import Blueprint, current_app, flash, render_template, session
 
 from app.utils.auth_utils import employee_required, role_required
 from app.utils.db_utils import db_read_only
+from app.utils.schema_registry import table_columns
 
 bp = Blueprint('receiving', __name__)
 
@@ -28,7 +29,7 @@ def receiving_list():
             # Get unique categories for dropdown grouping
             categories = sorted(list(set(tt['category'] for tt in tablet_types if tt.get('category'))))
 
-            po_columns = [row['name'] for row in conn.execute("PRAGMA table_info(purchase_orders)").fetchall()]
+            po_columns = table_columns(conn, 'purchase_orders')
             has_vendor_name = 'vendor_name' in po_columns
             vendor_select = 'vendor_name' if has_vendor_name else "NULL as vendor_name"
             vendor_po_sql = 'po.vendor_name AS vendor_name' if has_vendor_name else "NULL AS vendor_name"
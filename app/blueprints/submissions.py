@@ -1,36 +1,38 @@
 """
 Submissions routes
 """
-import csv
-import io
 import sqlite3
 import traceback
 from datetime import datetime, timezone
 
 from flask import (
     Blueprint,
+    Response,
     current_app,
     flash,
-    make_response,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 
 from app.blueprints.workflow_staff import _bag_display_name
 from app.services import workflow_constants as WC
 from app.services.submission_list_enrichment import (
+    apply_bag_running_totals,
     attach_receive_name_for_submission_row,
-    enrich_submission_row_running_totals,
-    new_running_totals_state,
 )
 from app.services.submission_query_service import apply_resolved_bag_fields
+from app.services.submissions_export_service import EXPORT_LAYOUTS, gzip_chunks, iter_submissions_csv
 from app.services.submissions_view_service import (
     append_submission_archive_tab_filters,
     append_submission_common_filters,
-    append_submission_sort,
+    build_submissions_export_query,
+    fetch_bag_running_totals,
+    fetch_receipt_group_page,
+    fetch_receipt_group_rows,
 )
 from app.services.workflow_read import (
     display_stage_label,
@@ -376,125 +378,6 @@ def delete_workflow_bag(workflow_bag_id: int):
     return redirect(url_for("submissions.submissions_list", **q))
 
 
-def group_by_receipt(submissions, sort_by='created_at', sort_order='desc', filter_submission_type=None):
-    """
-    Group submissions by receipt_number while maintaining sort order within groups.
-
-    Args:
-        submissions: List of submission dictionaries
-        sort_by: Current sort column
-        sort_order: 'asc' or 'desc'
-        filter_submission_type: If set, skip grouping
-
-    Returns:
-        List of submissions grouped by receipt_number
-    """
-    # Skip grouping if filtering by a single submission type
-    if filter_submission_type:
-        return submissions
-
-    # Group by receipt_number
-    groups = {}
-    null_receipts = []
-
-    for sub in submissions:
-        receipt = sub.get('receipt_number')
-        if receipt is None or receipt == '':
-            null_receipts.append(sub)
-        else:
-            if receipt not in groups:
-                groups[receipt] = []
-            groups[receipt].append(sub)
-
-    # Sort groups by the newest/most relevant submission in each group
-    # For default sort (created_at desc), use newest submission's created_at
-    # For other sorts, use the primary sort value from first submission in group
-    def get_group_sort_key(receipt_group):
-        if sort_by == 'created_at':
-            # Use newest submission's created_at (max for desc, min for asc)
-            if sort_order == 'desc':
-                return max(sub.get('created_at', '') for sub in receipt_group)
-            else:
-                return min(sub.get('created_at', '') for sub in receipt_group)
-        elif sort_by == 'receipt_number':
-            # Sort numerically by receipt_number (e.g., "2786-13" should come after "2786-9")
-            receipt = receipt_group[0].get('receipt_number', '')
-            if not receipt or '-' not in receipt:
-                return (999999, 999999)  # Put invalid receipts at end
-            try:
-                parts = receipt.split('-', 1)
-                return (int(parts[0]), int(parts[1]))
-            except (ValueError, IndexError):
-                return (999999, 999999)  # Put invalid receipts at end
-        elif sort_by == 'total':
-            # Use calculated_total/individual_calc
-            if sort_order == 'desc':
-                return max(sub.get('individual_calc', 0) or sub.get('calculated_total', 0) or 0 for sub in receipt_group)
-            else:
-                return min(sub.get('individual_calc', 0) or sub.get('calculated_total', 0) or 0 for sub in receipt_group)
-        else:
-            # Use the sort value from first submission (already sorted)
-            # For string fields, get the first one in sort order
-            if sort_order == 'desc':
-                # For desc, we want the "highest" value (last alphabetically for strings)
-                values = [sub.get(sort_by, '') for sub in receipt_group if sub.get(sort_by)]
-                return max(values) if values else ''
-            else:
-                # For asc, we want the "lowest" value (first alphabetically for strings)
-                values = [sub.get(sort_by, '') for sub in receipt_group if sub.get(sort_by)]
-                return min(values) if values else ''
-
-    # Sort groups
-    sorted_groups = sorted(groups.items(),
-                          key=lambda x: get_group_sort_key(x[1]),
-                          reverse=(sort_order == 'desc'))
-
-    # Flatten groups back into list
-    result = []
-    for _receipt, group in sorted_groups:
-        result.extend(group)
-
-    # Handle NULL receipts - merge them properly based on sort order instead of appending at end
-    # This ensures bottle/variety pack submissions appear in correct chronological position
-    if null_receipts:
-        if sort_by == 'created_at':
-            # Merge null_receipts with result based on created_at
-            all_submissions = result + null_receipts
-            all_submissions.sort(key=lambda x: x.get('created_at', ''), reverse=(sort_order == 'desc'))
-            return all_submissions
-        else:
-            # For other sort types, append null receipts at end (existing behavior)
-            result.extend(null_receipts)
-
-    return result
-
-
-def _created_at_sort_timestamp(val) -> float:
-    """
-    Parse a naive UTC-ish timestamp string (or datetime) for ordering.
-    Missing/invalid values return ``-inf`` so they sort last when using descending order.
-    """
-    if val is None:
-        return float("-inf")
-    if isinstance(val, datetime):
-        try:
-            return val.replace(tzinfo=timezone.utc).timestamp()
-        except (OSError, ValueError, OverflowError):
-            pass
-    s = str(val).strip()
-    if not s:
-        return float("-inf")
-    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
-        try:
-            return datetime.strptime(s[:26], fmt).replace(tzinfo=timezone.utc).timestamp()
-        except ValueError:
-            continue
-    try:
-        return datetime.strptime(s[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
-    except ValueError:
-        return float("-inf")
-
-
 def _parse_utc_like_datetime(val):
     """Parse DB timestamps (UTC-like naive strings) to datetime."""
     if val is None:
@@ -531,52 +414,6 @@ def _duration_display(start_val, end_val) -> str:
     return f"{seconds}s"
 
 
-def _submission_calendar_date_end_ts(sub: dict) -> float:
-    """
-    Business calendar day from submission_date / filter_date (date-only), end-of-day UTC.
-    Catches cases where submission_date reflects \"today\" while created_at lags for some paths.
-    """
-    fd = sub.get("submission_date") or sub.get("filter_date")
-    if fd is None:
-        return float("-inf")
-    if hasattr(fd, "strftime"):
-        sfd = fd.strftime("%Y-%m-%d")[:10]
-    else:
-        sfd = str(fd).strip()[:10]
-    if len(sfd) < 10:
-        return float("-inf")
-    try:
-        return (
-            datetime.strptime(sfd + " 23:59:59", "%Y-%m-%d %H:%M:%S")
-            .replace(tzinfo=timezone.utc)
-            .timestamp()
-        )
-    except ValueError:
-        return float("-inf")
-
-
-def _row_latest_activity_ts(s: dict) -> float:
-    """Latest instant associated with this submission row (for receipt-group ordering)."""
-    return max(
-        _created_at_sort_timestamp(s.get("created_at")),
-        _created_at_sort_timestamp(s.get("bag_end_time")),
-        _created_at_sort_timestamp(s.get("bag_start_time")),
-        _submission_calendar_date_end_ts(s),
-    )
-
-
-def _aggregate_bag_time_sort_value(raw_ts, reverse: bool) -> float:
-    """
-    Single scalar for sorting by bag start/end on the parent row.
-    Repeating groups with *no* aggregated time sort **last** for both asc and desc.
-    """
-    t = _created_at_sort_timestamp(raw_ts) if raw_ts else float("-inf")
-    if t == float("-inf"):
-        # Nulls last: smallest in desc (sink), largest in asc (sink)
-        return float("-inf") if reverse else float("inf")
-    return t
-
-
 def _pick_parent_bag_submission(children):
     """Prefer a row with receive_name (highest id wins); else max id."""
     with_name = [s for s in children if s.get("receive_name")]
@@ -633,13 +470,6 @@ def build_receipt_groups(submissions_processed):
 
         parent_bag = _pick_parent_bag_submission(ch)
 
-        # Order parent rows by latest activity in the receipt (any line; max over created/bag times/submission date).
-        latest_ts = float("-inf")
-        for s in ch:
-            latest_ts = max(latest_ts, _row_latest_activity_ts(s))
-        max_child_id = max((s.get("id") or 0) for s in ch) if ch else 0
-        latest_submission_sort_key = (latest_ts, max_child_id)
-
         out.append(
             {
                 "group_key": gk,
@@ -650,66 +480,11 @@ def build_receipt_groups(submissions_processed):
                 "bag_end_time": bag_end_max,
                 "product_label": product_label,
                 "parent_bag_sub": parent_bag,
-                "latest_submission_sort_key": latest_submission_sort_key,
             }
         )
     return out
 
 
-def sort_receipt_groups(groups, sort_by, sort_order):
-    """
-    Sort aggregated receipt groups (warehouse list).
-
-    ``sort_by=created_at`` (Recent) orders receipts by the latest **activity** among
-    child rows: max of ``created_at``, ``bag_start_time``, ``bag_end_time``, and end of
-    ``submission_date`` / ``filter_date`` calendar day.
-
-    ``sort_by=bag_end`` / ``bag_start`` use aggregated bag times; receipts with no time
-    sort last (fixed: previously missing times could incorrectly rank first when sort_desc).
-    """
-    sort_by = (sort_by or "created_at").strip()
-    sort_order = (sort_order or "desc").strip().lower()
-    reverse = sort_order == "desc"
-
-    def receipt_tuple(receipt_str):
-        if not receipt_str or "-" not in receipt_str:
-            return (999999, 999999)
-        try:
-            parts = str(receipt_str).split("-", 1)
-            return (int(parts[0]), int(parts[1]))
-        except (ValueError, IndexError):
-            return (999999, 999999)
-
-    def sort_key(g):
-        ch = g["children"]
-        if sort_by == "receipt_number":
-            return receipt_tuple(g.get("receipt_number"))
-        if sort_by == "total":
-            return g["receipt_total"]
-        if sort_by == "product_name":
-            return g.get("product_label") or ""
-        if sort_by == "employee_name":
-            vals = [s.get("employee_name") or "" for s in ch]
-            if not vals:
-                return ""
-            return max(vals) if reverse else min(vals)
-        if sort_by == "bag_start":
-            return _aggregate_bag_time_sort_value(g.get("bag_start_time"), reverse)
-        if sort_by == "bag_end":
-            return _aggregate_bag_time_sort_value(g.get("bag_end_time"), reverse)
-        if sort_by == "created_at":
-            return g.get("latest_submission_sort_key") or (float("-inf"), 0)
-        # Fallback: same as created_at — latest submission time in receipt
-        return g.get("latest_submission_sort_key") or (float("-inf"), 0)
-
-    if sort_by == "receipt_number":
-        return sorted(groups, key=lambda g: receipt_tuple(g.get("receipt_number")), reverse=reverse)
-    if sort_by in ("bag_start", "bag_end", "created_at"):
-        return sorted(groups, key=sort_key, reverse=reverse)
-
-    return sorted(groups, key=sort_key, reverse=reverse)
-
-
 @bp.route('/submissions')
 @role_required('submissions')
 def submissions_list():
@@ -773,116 +548,9 @@ def submissions_list():
             sort_by = request.args.get('sort_by', 'created_at')  # Default sort by created_at
             sort_order = request.args.get('sort_order', 'desc')  # Default descending
 
-            # Build query with optional filters
-            # Use stored receive_name from receiving table
-            query = '''
-            SELECT ws.*, po.po_number, po.closed as po_closed, po.id as po_id_for_filter, po.zoho_po_id,
-                   m.machine_name AS machine_display_name,
-                   COALESCE(m.machine_role, 'sealing') AS machine_role,
-                   pd.packages_per_display, pd.tablets_per_package,
-                   COALESCE(pd.tablets_per_package, (
-                       SELECT pd2.tablets_per_package
-                       FROM product_details pd2
-                       JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                       WHERE tt2.inventory_item_id = ws.inventory_item_id
-                       LIMIT 1
-                   )) as tablets_per_package_final,
-                   tt.inventory_item_id, tt.id as tablet_type_id, tt.tablet_type_name,
-                   COALESCE(ws.po_assignment_verified, 0) as po_verified,
-                   COALESCE(ws.needs_review, 0) as needs_review,
-                   COALESCE(pd.is_variety_pack, 0) as is_variety_pack,
-                   ws.admin_notes,
-                   COALESCE(ws.submission_type, 'packaged') as submission_type,
-                   COALESCE(ws.submission_date, DATE(ws.created_at)) as filter_date,
-                   COALESCE(b.bag_label_count, ws.bag_label_count, 0) as bag_label_count,
-                   b.bag_label_count as receive_bag_count,
-                   ws.bag_id,
-                   r.id as receive_id,
-                   r.received_date,
-                   r.receive_name as stored_receive_name,
-                   COALESCE(sb.box_number, ws.box_number) AS resolved_box_number,
-                   COALESCE(b.bag_number, ws.bag_number) AS resolved_bag_number,
-                   CASE COALESCE(ws.submission_type, 'packaged')
-                       WHEN 'machine' THEN COALESCE(
-                           CASE
-                               WHEN COALESCE(m.machine_role, 'sealing') = 'sealing' THEN
-                                   MAX(
-                                       COALESCE(ws.tablets_pressed_into_cards, 0),
-                                       COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, (
-                                           SELECT pd2.tablets_per_package
-                                           FROM product_details pd2
-                                           JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                                           WHERE tt2.inventory_item_id = ws.inventory_item_id
-                                           LIMIT 1
-                                       ), 0)
-                                   )
-                               ELSE
-                                   COALESCE(ws.tablets_pressed_into_cards, 0)
-                           END,
-                           ws.loose_tablets,
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)),
-                           0
-                       )
-                       WHEN 'bottle' THEN COALESCE(
-                           (SELECT SUM(sbd.tablets_deducted) FROM submission_bag_deductions sbd WHERE sbd.submission_id = ws.id),
-                           COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
-                       )
-                       WHEN 'repack' THEN (
-                           (ws.displays_made * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0))
-                       )
-                       ELSE (
-                           (ws.displays_made * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                       ws.loose_tablets
-                       )
-                   END as calculated_total
-            FROM warehouse_submissions ws
-            LEFT JOIN purchase_orders po ON ws.assigned_po_id = po.id
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            LEFT JOIN tablet_types tt ON pd.tablet_type_id = tt.id
-            LEFT JOIN bags b ON ws.bag_id = b.id
-            LEFT JOIN small_boxes sb ON b.small_box_id = sb.id
-            LEFT JOIN receiving r ON sb.receiving_id = r.id
-            LEFT JOIN machines m ON ws.machine_id = m.id
-            WHERE 1=1
-            '''
-
-            params = []
-
-            query, params = append_submission_common_filters(
-                query,
-                params,
+            where_sql, params = append_submission_common_filters(
+                '',
+                [],
                 {
                     'po_id': filter_po_id,
                     'item_id': filter_item_id,
@@ -893,92 +561,58 @@ def submissions_list():
                     'receipt_number': filter_receipt_number,
                 },
             )
-            query = append_submission_archive_tab_filters(
-                query,
+            where_sql = append_submission_archive_tab_filters(
+                where_sql,
                 show_archived,
                 active_tab,
                 relax_po_closed_for_receipt_search=bool((filter_receipt_number or "").strip()),
             )
 
-            # Get submissions ordered by created_at ASC for running total calculation
-            # Always use created_at ASC for running totals regardless of user's sort preference
-            query_asc = query + ' ORDER BY ws.created_at ASC'
-            submissions_raw_asc = conn.execute(query_asc, params).fetchall()
-
-            totals_state = new_running_totals_state()
-            submissions_dict = {}  # Store by submission ID for later lookup
-
-            # First pass: Calculate running totals in chronological order (oldest first)
-            for sub in submissions_raw_asc:
-                sub_dict = dict(sub)
+            # Grouping, ordering and pagination (one row per receipt group) run in SQL; only the
+            # page's rows are fetched, and their per-bag running totals come from window sums.
+            per_page = 15
+            group_page = fetch_receipt_group_page(
+                conn,
+                where_sql,
+                params,
+                sort_by,
+                sort_order,
+                page=request.args.get('page', 1, type=int) or 1,
+                per_page=per_page,
+                cursor=request.args.get('cursor'),
+                # no list filters: page from the receipt-group index for this tab
+                scope=None if params else (active_tab, show_archived),
+            )
+            page = group_page['page']
+            total_groups = group_page['total']
+            total_pages = group_page['total_pages']
+
+            submissions_processed = [
+                dict(row) for row in fetch_receipt_group_rows(conn, where_sql, params, group_page['group_keys'])
+            ]
+            for sub_dict in submissions_processed:
                 apply_resolved_bag_fields(sub_dict)
-                enrich_submission_row_running_totals(
-                    sub_dict, totals_state, bag_submission_use="loose_tablets"
+            running_totals = fetch_bag_running_totals(conn, where_sql, params, submissions_processed)
+
+            for sub_dict in submissions_processed:
+                totals = running_totals.get(sub_dict.get('id')) or {}
+                apply_bag_running_totals(
+                    sub_dict,
+                    bag_total=totals.get('bag_total') or 0,
+                    machine_total=totals.get('machine_total') or 0,
+                    packaged_total=totals.get('packaged_total') or 0,
                 )
                 attach_receive_name_for_submission_row(conn, sub_dict)
-                sub_dict["station_duration_display"] = _duration_display(
-                    sub_dict.get("bag_start_time"),
-                    sub_dict.get("bag_end_time"),
-                )
-
-                # Store in dict by submission ID for lookup
-                submissions_dict[sub_dict.get("id")] = sub_dict
-
-            # Second pass: Get submissions in display order (based on user's sort preference) and apply pre-calculated running totals
-            query = append_submission_sort(query, sort_by, sort_order)
-
-            submissions_raw = conn.execute(query, params).fetchall()
-            submissions_processed = []
-
-            for sub in submissions_raw:
-                sub_dict = dict(sub)
-                apply_resolved_bag_fields(sub_dict)
-                sub_id = sub_dict.get('id')
-                # Get the pre-calculated running totals from the first pass
-                if sub_id in submissions_dict:
-                    pre_calculated = submissions_dict[sub_id]
-                    sub_dict['bag_submission_tablets_total'] = pre_calculated.get('bag_submission_tablets_total', 0)
-                    sub_dict['machine_tablets_total'] = pre_calculated.get('machine_tablets_total', 0)
-                    sub_dict['packaged_tablets_total'] = pre_calculated.get('packaged_tablets_total', 0)
-                    sub_dict['cumulative_bag_tablets'] = pre_calculated.get('cumulative_bag_tablets', 0)
-                    sub_dict['count_status'] = pre_calculated.get('count_status', 'no_bag')
-                    sub_dict['has_discrepancy'] = pre_calculated.get('has_discrepancy', 0)
-                    sub_dict['receive_name'] = pre_calculated.get('receive_name')
-                    sub_dict['station_duration_display'] = pre_calculated.get('station_duration_display', '—')
-
-                # Individual calculation for display
                 individual_calc = sub_dict.get('calculated_total', 0) or 0
                 sub_dict['individual_calc'] = individual_calc
                 sub_dict['total_tablets'] = individual_calc  # Set total_tablets for frontend compatibility
-                if 'station_duration_display' not in sub_dict:
-                    sub_dict['station_duration_display'] = _duration_display(
-                        sub_dict.get('bag_start_time'),
-                        sub_dict.get('bag_end_time'),
-                    )
-
-                submissions_processed.append(sub_dict)
-
-            receipt_groups_all = sort_receipt_groups(
-                build_receipt_groups(submissions_processed), sort_by, sort_order
-            )
+                sub_dict['station_duration_display'] = _duration_display(
+                    sub_dict.get('bag_start_time'),
+                    sub_dict.get('bag_end_time'),
+                )
 
-            # Pagination (one row per receipt group)
-            page = request.args.get('page', 1, type=int)
-            per_page = 15
-            total_groups = len(receipt_groups_all)
-            if total_groups == 0:
-                total_pages = 0
-                page = 1
-                receipt_groups = []
-            else:
-                total_pages = (total_groups + per_page - 1) // per_page
-                if page > total_pages:
-                    page = total_pages
-                if page < 1:
-                    page = 1
-                start_idx = (page - 1) * per_page
-                end_idx = start_idx + per_page
-                receipt_groups = receipt_groups_all[start_idx:end_idx]
+            groups_by_key = {g['group_key']: g for g in build_receipt_groups(submissions_processed)}
+            receipt_groups = [groups_by_key[k] for k in group_page['group_keys'] if k in groups_by_key]
 
             # Count unverified submissions (respecting current filters)
             unverified_query = '''
@@ -1030,7 +664,9 @@ def submissions_list():
                 'has_prev': page > 1,
                 'has_next': page < total_pages,
                 'prev_page': page - 1 if page > 1 else None,
-                'next_page': page + 1 if page < total_pages else None
+                'next_page': page + 1 if page < total_pages else None,
+                'prev_cursor': group_page['prev_cursor'],
+                'next_cursor': group_page['next_cursor'],
             }
 
             # Get filter info for display
@@ -1116,7 +752,11 @@ def submissions_list():
 @bp.route('/submissions/export')
 @role_required('submissions')
 def export_submissions_csv():
-    """Export submissions to CSV with all active filters applied"""
+    """Export submissions to CSV with all active filters applied.
+
+    Streams rows as they are read. ``gzip=1`` compresses the download; ``layout=columnar`` emits
+    the analytics layout (see ``submissions_export_service``).
+    """
     try:
         with db_read_only() as conn:
             # Get filter parameters from query string (same as all_submissions)
@@ -1140,101 +780,14 @@ def export_submissions_csv():
             sort_by = request.args.get('sort_by', 'created_at')
             sort_order = request.args.get('sort_order', 'asc')  # Default ASC for CSV export
 
-            # Build query with optional filters (same logic as all_submissions)
-            query = '''
-            SELECT ws.*, po.po_number, po.closed as po_closed,
-                   m.machine_name AS machine_display_name,
-                   COALESCE(m.machine_role, 'sealing') AS machine_role,
-                   pd.packages_per_display, pd.tablets_per_package,
-                   COALESCE(pd.tablets_per_package, (
-                       SELECT pd2.tablets_per_package
-                       FROM product_details pd2
-                       JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                       WHERE tt2.inventory_item_id = ws.inventory_item_id
-                       LIMIT 1
-                   )) as tablets_per_package_final,
-                   tt.inventory_item_id, tt.tablet_type_name,
-                   COALESCE(ws.po_assignment_verified, 0) as po_verified,
-                   ws.admin_notes,
-                   COALESCE(ws.submission_date, DATE(ws.created_at)) as filter_date,
-                   CASE COALESCE(ws.submission_type, 'packaged')
-                       WHEN 'machine' THEN COALESCE(
-                           CASE
-                               WHEN COALESCE(m.machine_role, 'sealing') = 'sealing' THEN
-                                   MAX(
-                                       COALESCE(ws.tablets_pressed_into_cards, 0),
-                                       COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, (
-                                           SELECT pd2.tablets_per_package
-                                           FROM product_details pd2
-                                           JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                                           WHERE tt2.inventory_item_id = ws.inventory_item_id
-                                           LIMIT 1
-                                       ), 0)
-                                   )
-                               ELSE
-                                   COALESCE(ws.tablets_pressed_into_cards, 0)
-                           END,
-                           ws.loose_tablets,
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)),
-                           0
-                       )
-                       WHEN 'bottle' THEN COALESCE(
-                           (SELECT SUM(sbd.tablets_deducted) FROM submission_bag_deductions sbd WHERE sbd.submission_id = ws.id),
-                           COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
-                       )
-                       WHEN 'repack' THEN (
-                           (ws.displays_made * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0))
-                       )
-                       ELSE (
-                           (ws.displays_made * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                           (ws.packs_remaining * COALESCE(pd.tablets_per_package, (
-                               SELECT pd2.tablets_per_package
-                               FROM product_details pd2
-                               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
-                               WHERE tt2.inventory_item_id = ws.inventory_item_id
-                               LIMIT 1
-                           ), 0)) +
-                       ws.loose_tablets
-                       )
-                   END as calculated_total
-            FROM warehouse_submissions ws
-            LEFT JOIN purchase_orders po ON ws.assigned_po_id = po.id
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            LEFT JOIN tablet_types tt ON pd.tablet_type_id = tt.id
-            LEFT JOIN machines m ON ws.machine_id = m.id
-            WHERE 1=1
-            '''
-
-            params = []
+            layout = request.args.get('layout', 'report', type=str)
+            if layout not in EXPORT_LAYOUTS:
+                layout = 'report'
+            use_gzip = request.args.get('gzip', '', type=str).lower() in ('1', 'true', 'yes')
 
-            query, params = append_submission_common_filters(
-                query,
-                params,
+            where_sql, params = append_submission_common_filters(
+                '',
+                [],
                 {
                     'po_id': filter_po_id,
                     'item_id': filter_item_id,
@@ -1245,119 +798,16 @@ def export_submissions_csv():
                     'receipt_number': filter_receipt_number,
                 },
             )
-            query = append_submission_archive_tab_filters(
-                query,
+            where_sql = append_submission_archive_tab_filters(
+                where_sql,
                 show_archived,
                 active_tab,
                 relax_po_closed_for_receipt_search=bool((filter_receipt_number or "").strip()),
             )
-            query = append_submission_sort(query, sort_by, sort_order)
-
-            submissions_raw = conn.execute(query, params).fetchall()
-
-            # Calculate running totals by bag PER PO (same logic as all_submissions)
-            bag_cumulative_packaged = {}
-            submissions_processed = []
-
-            for sub in submissions_raw:
-                sub_dict = dict(sub)
-                bag_identifier = f"{sub_dict.get('box_number', '')}/{sub_dict.get('bag_number', '')}"
-                bag_key = (sub_dict.get('assigned_po_id'), sub_dict.get('product_name'), bag_identifier)
-
-                individual_calc = sub_dict.get('calculated_total', 0) or 0
-                submission_type = sub_dict.get('submission_type', 'packaged')
-
-                if bag_key not in bag_cumulative_packaged:
-                    bag_cumulative_packaged[bag_key] = 0
-                if submission_type == 'packaged':
-                    bag_cumulative_packaged[bag_key] += individual_calc
-
-                sub_dict['individual_calc'] = individual_calc
-                sub_dict['total_tablets'] = individual_calc
-                sub_dict['cumulative_bag_tablets'] = bag_cumulative_packaged[bag_key]
-
-                bag_count = sub_dict.get('bag_label_count', 0) or 0
-                packaged_cumulative = bag_cumulative_packaged[bag_key]
-
-                if bag_count == 0:
-                    sub_dict['count_status'] = 'No Bag Label'
-                elif abs(packaged_cumulative - bag_count) <= 5:
-                    sub_dict['count_status'] = 'Match'
-                elif packaged_cumulative < bag_count:
-                    sub_dict['count_status'] = 'Under'
-                else:
-                    sub_dict['count_status'] = 'Over'
-
-                if submission_type == 'repack':
-                    sub_dict['count_status'] = 'Repack PO'
-
-                submissions_processed.append(sub_dict)
-
-            # Group submissions by receipt_number while maintaining sort order within groups
-            submissions_processed = group_by_receipt(submissions_processed, sort_by, sort_order, filter_submission_type)
-
-            # Create CSV in memory
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            # Write header row
-            writer.writerow([
-            'Submission Date',
-            'Created At',
-            'Employee Name',
-            'Product Name',
-            'Submission Type',
-            'Machine',
-            'Tablet Type',
-            'PO Number',
-            'PO Closed',
-            'Box Number',
-            'Bag Number',
-            'Displays Made',
-            'Packs Remaining',
-            'Bottle Sealing Machine Count',
-            'Loose Tablets',
-            'Cards re-opened',
-            'Total Tablets (Individual)',
-            'Cumulative bag (packaged)',
-            'Bag Label Count',
-            'Count Status',
-            'PO Assignment Verified',
-            'Admin Notes'
-            ])
-
-            # Write data rows (respecting sort order)
-            for sub in submissions_processed:
-                submission_date = sub.get('submission_date') or sub.get('filter_date') or ''
-                created_at = sub.get('created_at', '')
-                if isinstance(created_at, str):
-                    # Format datetime for CSV.
-                    created_at = created_at[:19]  # Truncate to seconds
-
-                writer.writerow([
-                    submission_date,
-                    created_at,
-                    sub.get('employee_name', ''),
-                    sub.get('product_name', ''),
-                    sub.get('submission_type', 'packaged'),
-                    sub.get('machine_display_name') or '',
-                    sub.get('tablet_type_name', ''),
-                    sub.get('po_number', ''),
-                    'Yes' if sub.get('po_closed') else 'No',
-                    sub.get('box_number', ''),
-                    sub.get('bag_number', ''),
-                    sub.get('displays_made', 0),
-                    sub.get('packs_remaining', 0),
-                    sub.get('bottle_sealing_machine_count', ''),
-                    sub.get('loose_tablets', 0),
-                    sub.get('cards_reopened', 0),
-                    sub.get('individual_calc', 0),
-                    sub.get('cumulative_bag_tablets', 0),
-                    sub.get('bag_label_count', 0),
-                    sub.get('count_status', ''),
-                    'Yes' if sub.get('po_verified', 0) else 'No',
-                    sub.get('admin_notes', '')
-                ])
+            # Receipt grouping is skipped when filtering by a single submission type.
+            query, params = build_submissions_export_query(
+                where_sql, params, sort_by, sort_order, group_receipts=not filter_submission_type
+            )
 
             # Generate filename with date range if applicable
             filename_parts = ['submissions']
@@ -1366,21 +816,38 @@ def export_submissions_csv():
             if filter_date_to:
                 filename_parts.append(f'to_{filter_date_to}')
             if filter_tablet_type_id:
-                filename_parts.append(f'type_{submissions_processed[0].get("tablet_type_name", "unknown") if submissions_processed else "unknown"}')
+                tt_info = conn.execute(
+                    'SELECT tablet_type_name FROM tablet_types WHERE id = ?', (filter_tablet_type_id,)
+                ).fetchone()
+                filename_parts.append(f'type_{tt_info["tablet_type_name"] if tt_info else "unknown"}')
             if filter_po_id:
                 po_info = conn.execute('SELECT po_number FROM purchase_orders WHERE id = ?', (filter_po_id,)).fetchone()
                 if po_info:
                     filename_parts.append(f'po_{po_info["po_number"]}')
+            if layout == 'columnar':
+                filename_parts.append('columnar')
 
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"{'_'.join(filename_parts)}_{timestamp}.csv"
 
-            # Create response
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'text/csv; charset=utf-8'
-            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-            return response
+        def generate():
+            # Own connection: the stream outlives this view function.
+            try:
+                with db_read_only() as export_conn:
+                    yield from iter_submissions_csv(export_conn, query, params, layout=layout)
+            except Exception as exc:
+                current_app.logger.error("Error streaming submissions CSV: %s", exc)
+                raise
+
+        body = stream_with_context(generate())
+        if use_gzip:
+            response = Response(gzip_chunks(body), mimetype='application/gzip')
+            filename += '.gz'
+        else:
+            response = Response(body, content_type='text/csv; charset=utf-8')
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
     except Exception as e:
         current_app.logger.error(f"Error exporting submissions CSV: {e}")
         traceback.print_exc()
@@ -3,7 +3,6 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import sqlite3
 
@@ -12,21 +11,39 @@ from flask import Blueprint, render_template, request, session
 from app.services import workflow_constants as WC
 from app.services.production_submission_helpers import ProductionSubmissionError
 from app.services.workflow_append import append_workflow_event
+from app.services.workflow_bag_state import (
+    active_shortages,
+    load_bag_state,
+    load_station_state,
+    open_station_sessions,
+    station_hold_details,
+    station_lane_finished,
+    station_pause_details,
+)
+from app.services.workflow_event_batch import (
+    load_event_receipts,
+    normalize_idempotency_key,
+    parse_event_batch,
+    prune_event_receipts,
+    store_event_receipt,
+)
 from app.services.workflow_finalize import try_finalize
-from app.services.workflow_http import rate_limit_floor, read_json_body, workflow_json
+from app.services.workflow_http import (
+    rate_limit_floor,
+    read_json_body,
+    workflow_event_stream_response,
+    workflow_json,
+)
+from app.services.workflow_occupancy import station_facts, station_occupancy
 from app.services.workflow_product_mapping import (
     ensure_workflow_bag_product_for_flow,
     production_flow_for_event_or_station,
 )
 from app.services.workflow_read import (
-    display_stage_label,
     floor_bag_verification,
-    mechanical_bag_facts,
     production_flow_for_bag,
-    progress_summary,
 )
-from app.services.workflow_shortages import active_out_of_packaging_shortages
-from app.services.workflow_txn import run_with_busy_retry
+from app.services.workflow_txn import immediate_transaction, run_with_busy_retry
 from app.services.workflow_warehouse_bridge import sync_workflow_warehouse_events
 from app.services.workflow_variety_sources import (
     active_variety_parent_for_source_bag,
@@ -34,12 +51,12 @@ from app.services.workflow_variety_sources import (
     resolve_source_cards,
     source_payload_for_parent,
 )
-from app.utils.db_utils import get_db
+from app.utils.db_utils import get_db, get_read_db
+from config import Config
 
 LOGGER = logging.getLogger(__name__)
 
 bp = Blueprint("workflow_floor", __name__, url_prefix="/workflow")
-_HOLD_RELEASE_REASON = "out_of_packaging"
 
 
 def _log_floor_correlation(route: str, data: dict) -> None:
@@ -88,58 +105,6 @@ def _resolve_card(conn, card_token: str):
     ).fetchone()
 
 
-def _pause_metadata(payload: dict) -> dict:
-    meta = payload.get("metadata") if isinstance(payload, dict) else None
-    return meta if isinstance(meta, dict) else {}
-
-
-def _pause_reason_for_event(event_type: str, payload: dict) -> str | None:
-    """Machine-readable pause reason, when this event pauses station occupancy."""
-    if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
-        reason = str(payload.get("reason") or "").strip()
-        if reason == "paused_end_of_day":
-            return "end_of_day"
-        if reason == _HOLD_RELEASE_REASON:
-            return _HOLD_RELEASE_REASON
-        return None
-    if event_type in (
-        WC.EVENT_BLISTER_COMPLETE,
-        WC.EVENT_SEALING_COMPLETE,
-        WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
-        WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
-        WC.EVENT_BOTTLE_STICKER_COMPLETE,
-    ):
-        meta = _pause_metadata(payload)
-        reason = str(meta.get("reason") or "").strip()
-        if reason == _HOLD_RELEASE_REASON:
-            return _HOLD_RELEASE_REASON
-        if reason == "material_change" and event_type == WC.EVENT_BLISTER_COMPLETE:
-            return "material_change"
-        if meta.get("paused") or reason == "end_of_day":
-            return reason or "end_of_day"
-        return None
-    return None
-
-
-def _is_resume_lock_pause_reason(reason: str | None) -> bool:
-    if reason is None:
-        return False
-    return reason != _HOLD_RELEASE_REASON
-
-
-def _is_resume_lock_pause_event(event_type: str, payload: dict) -> bool:
-    return _is_resume_lock_pause_reason(_pause_reason_for_event(event_type, payload))
-
-
-def _is_hold_release_pause_event(event_type: str, payload: dict) -> bool:
-    return _pause_reason_for_event(event_type, payload) == _HOLD_RELEASE_REASON
-
-
-def _is_pause_workflow_event(event_type: str, payload: dict) -> bool:
-    """True if this event represents a paused handoff at the station."""
-    return _pause_reason_for_event(event_type, payload) is not None
-
-
 def _occupancy_lane_finished_at_station(
     conn: sqlite3.Connection,
     *,
@@ -154,272 +119,50 @@ def _occupancy_lane_finished_at_station(
     Without this, occupancy stayed forever on the latest BAG_CLAIMED row even after BLISTER_COMPLETE,
     blocking new scans at blister/sealing lanes.
     """
-    kind = (station_kind or "sealing").strip().lower()
-    rows = conn.execute(
-        """
-        SELECT event_type, payload
-        FROM workflow_events
-        WHERE workflow_bag_id = ? AND station_id = ?
-        ORDER BY occurred_at ASC, id ASC
-        """,
-        (workflow_bag_id, station_id),
-    ).fetchall()
-    session_active = False
-    for row in rows:
-        et = row["event_type"]
-        try:
-            pl = json.loads(row["payload"]) if row["payload"] else {}
-        except (json.JSONDecodeError, TypeError):
-            pl = {}
-        if not isinstance(pl, dict):
-            pl = {}
-        if et in (WC.EVENT_BAG_CLAIMED, WC.EVENT_STATION_RESUMED):
-            session_active = True
-            continue
-        if not session_active:
-            continue
-        if kind == "blister":
-            if et == WC.EVENT_BLISTER_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "sealing":
-            if et == WC.EVENT_SEALING_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "combined":
-            if et == WC.EVENT_SEALING_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "packaging":
-            if et == WC.EVENT_PACKAGING_TAKEN_FOR_ORDER:
-                return True
-            if et == WC.EVENT_PACKAGING_SNAPSHOT and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "bottle_handpack":
-            if et == WC.EVENT_BOTTLE_HANDPACK_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "bottle_cap_seal":
-            if et == WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-        elif kind == "bottle_stickering":
-            if et == WC.EVENT_BOTTLE_STICKER_COMPLETE and not _is_resume_lock_pause_event(et, pl):
-                return True
-    return False
+    state = load_station_state(conn, workflow_bag_id, station_id)
+    return station_lane_finished(state, station_kind)
 
 
 def _station_pause_at_ms(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> int | None:
     """When resume is required, Unix ms of the pause-style submit that caused it."""
-    if not _station_needs_resume(conn, workflow_bag_id, station_id):
-        return None
-    rows = conn.execute(
-        """
-        SELECT event_type, payload, occurred_at
-        FROM workflow_events
-        WHERE workflow_bag_id = ? AND station_id = ?
-        ORDER BY occurred_at ASC, id ASC
-        """,
-        (workflow_bag_id, station_id),
-    ).fetchall()
-    last_pause: int | None = None
-    for row in rows:
-        et = row["event_type"]
-        try:
-            pl = json.loads(row["payload"]) if row["payload"] else {}
-        except (json.JSONDecodeError, TypeError):
-            pl = {}
-        if not isinstance(pl, dict):
-            pl = {}
-        if et == WC.EVENT_BAG_CLAIMED:
-            last_pause = None
-        elif et == WC.EVENT_STATION_RESUMED:
-            last_pause = None
-        elif et in (
-            WC.EVENT_BLISTER_COMPLETE,
-            WC.EVENT_SEALING_COMPLETE,
-            WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
-            WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
-            WC.EVENT_BOTTLE_STICKER_COMPLETE,
-            WC.EVENT_PACKAGING_SNAPSHOT,
-        ):
-            if _is_resume_lock_pause_event(et, pl):
-                try:
-                    last_pause = int(row["occurred_at"])
-                except (TypeError, ValueError):
-                    last_pause = None
-            else:
-                last_pause = None
-    return last_pause
+    state = load_station_state(conn, workflow_bag_id, station_id)
+    return state["paused_at"] if state["needs_resume"] else None
 
 
 def _station_hold_details(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> dict[str, str] | None:
     """Details from the latest hold-and-release event for the current station session."""
-    rows = conn.execute(
-        """
-        SELECT event_type, payload
-        FROM workflow_events
-        WHERE workflow_bag_id = ? AND station_id = ?
-        ORDER BY occurred_at ASC, id ASC
-        """,
-        (workflow_bag_id, station_id),
-    ).fetchall()
-    last: dict[str, str] | None = None
-    for row in rows:
-        et = row["event_type"]
-        try:
-            pl = json.loads(row["payload"]) if row["payload"] else {}
-        except (json.JSONDecodeError, TypeError):
-            pl = {}
-        if not isinstance(pl, dict):
-            pl = {}
-        if et in (WC.EVENT_BAG_CLAIMED, WC.EVENT_STATION_RESUMED):
-            last = None
-            continue
-        reason = _pause_reason_for_event(et, pl)
-        if reason == _HOLD_RELEASE_REASON:
-            meta = _pause_metadata(pl)
-            material_type = str(meta.get("material_type") or "").strip().lower()
-            last = {"reason": _HOLD_RELEASE_REASON}
-            if material_type:
-                last["material_type"] = material_type
-            continue
-        # Any normal completion clears hold state for this session.
-        if et in (
-            WC.EVENT_BLISTER_COMPLETE,
-            WC.EVENT_SEALING_COMPLETE,
-            WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
-            WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
-            WC.EVENT_BOTTLE_STICKER_COMPLETE,
-            WC.EVENT_PACKAGING_SNAPSHOT,
-            WC.EVENT_PACKAGING_TAKEN_FOR_ORDER,
-        ) and not _is_pause_workflow_event(et, pl):
-            last = None
-            continue
-    return last
+    return station_hold_details(load_station_state(conn, workflow_bag_id, station_id))
 
 
 def _station_needs_resume(conn: sqlite3.Connection, workflow_bag_id: int, station_id: int) -> bool:
     """
     After a resume-lock pause submit, operators must emit STATION_RESUMED before more counts.
-    Walk station-scoped events in order; last resume-lock pause without a later resume means resume is required.
+    The last resume-lock pause without a later resume or normal submit means resume is required.
     """
-    rows = conn.execute(
-        """
-        SELECT event_type, payload
-        FROM workflow_events
-        WHERE workflow_bag_id = ? AND station_id = ?
-        ORDER BY occurred_at ASC, id ASC
-        """,
-        (workflow_bag_id, station_id),
-    ).fetchall()
-    needs_resume = False
-    for row in rows:
-        et = row["event_type"]
-        try:
-            pl = json.loads(row["payload"]) if row["payload"] else {}
-        except (json.JSONDecodeError, TypeError):
-            pl = {}
-        if not isinstance(pl, dict):
-            pl = {}
-        if et == WC.EVENT_BAG_CLAIMED:
-            needs_resume = False
-        elif et == WC.EVENT_STATION_RESUMED:
-            needs_resume = False
-        elif et in (
-            WC.EVENT_BLISTER_COMPLETE,
-            WC.EVENT_SEALING_COMPLETE,
-            WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
-            WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
-            WC.EVENT_BOTTLE_STICKER_COMPLETE,
-            WC.EVENT_PACKAGING_SNAPSHOT,
-        ):
-            if _is_resume_lock_pause_event(et, pl):
-                needs_resume = True
-            else:
-                needs_resume = False
-    return needs_resume
+    return bool(load_station_state(conn, workflow_bag_id, station_id)["needs_resume"])
 
 
 def _station_pause_details(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> dict[str, str] | None:
     """Details from the pause-style event that currently requires resume."""
-    if not _station_needs_resume(conn, workflow_bag_id, station_id):
-        return None
-    rows = conn.execute(
-        """
-        SELECT event_type, payload
-        FROM workflow_events
-        WHERE workflow_bag_id = ? AND station_id = ?
-        ORDER BY occurred_at ASC, id ASC
-        """,
-        (workflow_bag_id, station_id),
-    ).fetchall()
-    last: dict[str, str] | None = None
-    for row in rows:
-        et = row["event_type"]
-        try:
-            pl = json.loads(row["payload"]) if row["payload"] else {}
-        except (json.JSONDecodeError, TypeError):
-            pl = {}
-        if not isinstance(pl, dict):
-            pl = {}
-        if et in (WC.EVENT_BAG_CLAIMED, WC.EVENT_STATION_RESUMED):
-            last = None
-            continue
-        reason = _pause_reason_for_event(et, pl)
-        if reason is None:
-            continue
-        if not _is_resume_lock_pause_reason(reason):
-            continue
-        assert reason is not None
-        meta = _pause_metadata(pl)
-        out = {"reason": reason}
-        material_type = str(meta.get("material_type") or "").strip().lower()
-        if material_type:
-            out["material_type"] = material_type
-        last = out
-    return last
+    return station_pause_details(load_station_state(conn, workflow_bag_id, station_id))
 
 
 def _station_has_claimed_bag(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> bool:
-    row = conn.execute(
-        """
-        SELECT 1
-        FROM workflow_events
-        WHERE workflow_bag_id = ?
-          AND event_type = ?
-          AND station_id = ?
-        LIMIT 1
-        """,
-        (workflow_bag_id, WC.EVENT_BAG_CLAIMED, station_id),
-    ).fetchone()
-    return bool(row)
+    return bool(load_station_state(conn, workflow_bag_id, station_id)["claimed"])
 
 
 def _station_occupancy_started_at(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> int | None:
-    row = conn.execute(
-        """
-        SELECT occurred_at
-        FROM workflow_events
-        WHERE workflow_bag_id = ?
-          AND station_id = ?
-          AND event_type IN (?, ?)
-        ORDER BY occurred_at DESC, id DESC
-        LIMIT 1
-        """,
-        (workflow_bag_id, station_id, WC.EVENT_BAG_CLAIMED, WC.EVENT_STATION_RESUMED),
-    ).fetchone()
-    if not row:
-        return None
-    try:
-        return int(row["occurred_at"])
-    except (TypeError, ValueError):
-        return None
+    return load_station_state(conn, workflow_bag_id, station_id)["session_started_at"]
 
 
 def _assigned_card_token_for_bag(conn: sqlite3.Connection, workflow_bag_id: int) -> str | None:
@@ -444,6 +187,13 @@ def _packaging_active_incomplete_bags(
     conn: sqlite3.Connection, station_id: int
 ) -> list[int]:
     """Bag IDs with an open packaging session at this station (claimed, lane not finished)."""
+    sessions = open_station_sessions(conn, station_id)
+    if sessions is not None:
+        return [
+            int(s["workflow_bag_id"])
+            for s in sessions
+            if not station_lane_finished(s, "packaging")
+        ]
     rows = conn.execute(
         """
         SELECT DISTINCT we.workflow_bag_id AS wid
@@ -508,137 +258,20 @@ def _validate_packaging_station_claim(
 
 
 def _current_station_occupancy(conn: sqlite3.Connection, station_id: int) -> dict | None:
-    sk_row = conn.execute(
-        """
-        SELECT COALESCE(station_kind, 'sealing') AS station_kind
-        FROM workflow_stations
-        WHERE id = ?
-        """,
-        (station_id,),
-    ).fetchone()
-    station_kind = (sk_row["station_kind"] if sk_row else None) or "sealing"
-
-    if station_kind == "packaging":
-        active_ids = _packaging_active_incomplete_bags(conn, station_id)
-        if not active_ids:
-            return None
-
-        def _slot_sort_key(wid: int) -> tuple[int, int]:
-            st = _station_occupancy_started_at(conn, wid, station_id)
-            return (st if st is not None else 0, wid)
-
-        slots: list[dict] = []
-        for wid in sorted(active_ids, key=_slot_sort_key):
-            facts = _station_facts_payload(conn, wid, station_id)
-            tok = _assigned_card_token_for_bag(conn, wid)
-            started = _station_occupancy_started_at(conn, wid, station_id)
-            st_ms = int(started) if started is not None else 0
-            slot_status = "paused" if facts.get("resume_required") else "occupied"
-            pause_at_slot = (
-                _station_pause_at_ms(conn, wid, station_id)
-                if facts.get("resume_required")
-                else None
-            )
-            slots.append(
-                {
-                    "workflow_bag_id": wid,
-                    "card_token": tok,
-                    "production_flow": production_flow_for_bag(conn, wid),
-                    "occupancy_started_at_ms": st_ms,
-                    "paused_at_ms": pause_at_slot,
-                    "facts": facts,
-                    "status": slot_status,
-                }
-            )
-        primary = slots[0]
-        overall_paused = any(s["facts"].get("resume_required") for s in slots)
-        pause_primary = (
-            _station_pause_at_ms(conn, primary["workflow_bag_id"], station_id)
-            if overall_paused
-            else None
-        )
-        return {
-            "status": "paused" if overall_paused else "occupied",
-            "workflow_bag_id": primary["workflow_bag_id"],
-            "card_token": primary["card_token"],
-            "occupancy_started_at_ms": primary["occupancy_started_at_ms"],
-            "paused_at_ms": pause_primary,
-            "facts": primary["facts"],
-            "packaging_slots": slots,
-        }
-
-    row = conn.execute(
-        """
-        SELECT we.workflow_bag_id, we.occurred_at, qc.scan_token AS card_token
-        FROM workflow_events we
-        JOIN qr_cards qc
-          ON qc.assigned_workflow_bag_id = we.workflow_bag_id
-         AND qc.status = ?
-        WHERE we.station_id = ?
-          AND we.event_type IN (?, ?)
-        ORDER BY we.occurred_at DESC, we.id DESC
-        LIMIT 1
-        """,
-        (
-            WC.QR_CARD_STATUS_ASSIGNED,
-            station_id,
-            WC.EVENT_BAG_CLAIMED,
-            WC.EVENT_STATION_RESUMED,
-        ),
-    ).fetchone()
-    if not row:
-        return None
-    bag_id = int(row["workflow_bag_id"])
-    if _occupancy_lane_finished_at_station(
-        conn,
-        station_id=station_id,
-        workflow_bag_id=bag_id,
-        station_kind=station_kind,
-    ):
-        return None
-    started_at = int(row["occurred_at"])
-    facts = _station_facts_payload(conn, bag_id, station_id)
-    status = "paused" if facts.get("resume_required") else "occupied"
-    pause_at = (
-        _station_pause_at_ms(conn, bag_id, station_id) if status == "paused" else None
-    )
-    return {
-        "status": status,
-        "workflow_bag_id": bag_id,
-        "card_token": row["card_token"],
-        "occupancy_started_at_ms": started_at,
-        "paused_at_ms": pause_at,
-        "facts": facts,
-    }
+    return station_occupancy(conn, station_id)
 
 
 def _station_facts_payload(
     conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
 ) -> dict:
-    facts = mechanical_bag_facts(conn, workflow_bag_id)
-    out_of_packaging = active_out_of_packaging_shortages(facts["events"])
-    station_claimed = _station_has_claimed_bag(conn, workflow_bag_id, station_id)
-    station_needs_resume = _station_needs_resume(conn, workflow_bag_id, station_id)
-    occupancy_started_at = _station_occupancy_started_at(conn, workflow_bag_id, station_id)
-    pause_details = _station_pause_details(conn, workflow_bag_id, station_id)
-    hold_details = _station_hold_details(conn, workflow_bag_id, station_id)
-    return {
-        "event_counts_by_type": facts["event_counts_by_type"],
-        "latest_event_type": facts["latest_event_type"],
-        "display_stage_label": display_stage_label(facts),
-        "progress_summary": progress_summary(facts),
-        "station_claimed": station_claimed,
-        "claim_required": not station_claimed,
-        "station_needs_resume": station_needs_resume,
-        "resume_required": bool(station_claimed and station_needs_resume),
-        "pause_details": pause_details,
-        "hold_details": hold_details,
-        "out_of_packaging_shortages": out_of_packaging,
-        "occupancy_started_at_ms": occupancy_started_at,
-        "occupying_card_token": _assigned_card_token_for_bag(conn, workflow_bag_id),
-        "bag_verification": floor_bag_verification(conn, workflow_bag_id),
-        "production_flow": production_flow_for_bag(conn, workflow_bag_id),
-    }
+    verification = floor_bag_verification(conn, workflow_bag_id)
+    return station_facts(
+        load_bag_state(conn, workflow_bag_id),
+        load_station_state(conn, workflow_bag_id, station_id),
+        card_token=_assigned_card_token_for_bag(conn, workflow_bag_id),
+        verification=verification,
+        production_flow=verification.get("production_flow") or production_flow_for_bag(conn, workflow_bag_id),
+    )
 
 
 def _is_event_allowed_for_station(station_kind: str, event_type: str) -> bool:
@@ -777,8 +410,7 @@ def _blocking_upstream_shortage_for_packaging_submit(
         return None
     if str(payload.get("reason") or "").strip() != "final_submit":
         return None
-    facts = mechanical_bag_facts(conn, workflow_bag_id)
-    for shortage in active_out_of_packaging_shortages(facts["events"]):
+    for shortage in active_shortages(load_bag_state(conn, workflow_bag_id)):
         if str(shortage.get("stage") or "").lower() == "sealing":
             return shortage
     return None
@@ -792,8 +424,7 @@ def _normalize_packaging_snapshot_for_upstream_shortage(
     reason = str(out.get("reason") or "").strip()
     if reason not in {"final_submit", "paused_end_of_day"}:
         return out, None
-    facts = mechanical_bag_facts(conn, workflow_bag_id)
-    for shortage in active_out_of_packaging_shortages(facts["events"]):
+    for shortage in active_shortages(load_bag_state(conn, workflow_bag_id)):
         if str(shortage.get("stage") or "").lower() != "sealing":
             continue
         meta = out.get("metadata") if isinstance(out.get("metadata"), dict) else {}
@@ -905,7 +536,7 @@ def manual_station():
 @bp.route("/station/<path:station_token>")
 def station_page(station_token: str):
     """Per-station floor UI (camera allowed via Permissions-Policy)."""
-    conn = get_db()
+    conn = get_read_db()
     try:
         row = _resolve_station(conn, station_token)
         if not row:
@@ -918,6 +549,7 @@ def station_page(station_token: str):
             station_label=row["label"],
             machine_name=r.get("machine_name"),
             station_kind=r.get("station_kind") or "sealing",
+            event_stream_enabled=Config.SSE_ENABLED,
             is_admin_user=bool(
                 session.get("admin_authenticated")
                 or (session.get("employee_role") == "admin")
@@ -935,7 +567,7 @@ def api_resolve_station():
     token = (data.get("station_token") or "").strip()
     if not token:
         return workflow_json("WORKFLOW_VALIDATION", "station_token required")
-    conn = get_db()
+    conn = get_read_db()
     try:
         row = _resolve_station(conn, token)
         if not row:
@@ -959,6 +591,22 @@ def api_resolve_station():
         conn.close()
 
 
+@bp.route("/floor/api/stream")
+@rate_limit_floor
+def api_floor_stream():
+    """SSE: workflow event deltas (no payloads) so station pages refresh right after scans elsewhere."""
+    token = (request.args.get("station_token") or "").strip()
+    if not token:
+        return workflow_json("WORKFLOW_VALIDATION", "station_token required")
+    conn = get_read_db()
+    try:
+        if not _resolve_station(conn, token):
+            return workflow_json("WORKFLOW_STATION_INVALID", "Unknown station token", status=404)
+    finally:
+        conn.close()
+    return workflow_event_stream_response(request, include_payload=False, notify_snapshot=False)
+
+
 @bp.route("/floor/api/bag", methods=["POST"])
 @rate_limit_floor
 def api_bag_status():
@@ -968,7 +616,7 @@ def api_bag_status():
     card_token = (data.get("card_token") or "").strip()
     if not station_token or not card_token:
         return workflow_json("WORKFLOW_VALIDATION", "station_token and card_token required")
-    conn = get_db()
+    conn = get_read_db()
     try:
         st = _resolve_station(conn, station_token)
         if not st:
@@ -999,287 +647,339 @@ def api_bag_status():
         conn.close()
 
 
-@bp.route("/floor/api/event", methods=["POST"])
-@rate_limit_floor
-def api_append_event():
-    data = read_json_body(request)
-    _log_floor_correlation("api_append_event", data)
-    station_token = (data.get("station_token") or "").strip()
-    card_token = (data.get("card_token") or "").strip()
-    event_type = (data.get("event_type") or "").strip()
-    payload = data.get("payload") or {}
-    device_id = (data.get("device_id") or "").strip() or None
-
+def _floor_event_fields_error(station_token: str, card_token: str, event_type: str):
     if not station_token or not card_token or not event_type:
         return workflow_json("WORKFLOW_VALIDATION", "station_token, card_token, event_type required")
-
     if event_type in (WC.EVENT_BAG_FINALIZED, WC.EVENT_CARD_FORCE_RELEASED):
         return workflow_json(
             "WORKFLOW_VALIDATION",
             "Use /floor/api/finalize or staff force-release for terminal events",
         )
+    return None
 
-    conn = get_db()
-    try:
-        st = _resolve_station(conn, station_token)
-        if not st:
-            return workflow_json("WORKFLOW_STATION_INVALID", "Unknown station", status=404)
-        card = _resolve_card(conn, card_token)
-        if not card:
-            return workflow_json("WORKFLOW_BAG_NOT_FOUND", "Unknown card", status=404)
-        if card["assigned_workflow_bag_id"] is None:
-            return workflow_json("WORKFLOW_VALIDATION", "Card not assigned")
-        bag_id = int(card["assigned_workflow_bag_id"])
-        locked_response = _variety_source_lock_response(conn, bag_id)
-        if locked_response is not None:
-            return locked_response
-        st_dict = dict(st)
-        station_kind = (st_dict.get("station_kind") or "sealing").strip().lower()
-        if not _is_event_allowed_for_station(station_kind, event_type):
-            return workflow_json(
-                "WORKFLOW_VALIDATION",
-                f"{event_type} is not allowed for station type '{station_kind}'",
-                details={
-                    "reason": "wrong_station_type",
-                    "station_kind": station_kind,
-                    "event_type": event_type,
-                },
-                status=400,
-            )
-        ev_flow = _event_flow(event_type)
-        mapping_flow = production_flow_for_event_or_station(event_type, station_kind)
-        if mapping_flow:
-            map_status, map_body = ensure_workflow_bag_product_for_flow(
-                conn,
-                workflow_bag_id=bag_id,
-                production_flow=mapping_flow,
-                selected_product_id=_selected_product_id_from_payload(
-                    payload if isinstance(payload, dict) else {}
-                ),
-                station_id=int(st["id"]),
-                device_id=device_id,
-            )
-            if map_status == "reject":
-                reason = map_body.get("reason")
-                if reason == "wrong_production_flow":
-                    return workflow_json(
-                        "WORKFLOW_VALIDATION",
-                        f"{event_type} is not allowed for {map_body.get('production_flow')} workflow bags.",
-                        details={
-                            **map_body,
-                            "event_type": event_type,
-                        },
-                        status=400,
-                    )
-                if reason == "ambiguous_product_mapping":
-                    return workflow_json(
-                        "WORKFLOW_PRODUCT_MAPPING",
-                        "Choose which product this tablet is running as on this station.",
-                        details=map_body,
-                        status=409,
-                    )
-                if reason == "no_product_mapping":
-                    return workflow_json(
-                        "WORKFLOW_PRODUCT_MAPPING",
-                        "No product is configured for this tablet on this station type.",
-                        details=map_body,
-                        status=400,
-                    )
+
+def _append_floor_event(
+    conn: sqlite3.Connection,
+    *,
+    station_token: str,
+    card_token: str,
+    event_type: str,
+    payload,
+    device_id: str | None,
+    occurred_at: int | None = None,
+):
+    """
+    Validate one floor event and append it (no warehouse bridge, no commit).
+
+    Returns a ``workflow_json`` error response, or a dict with ``workflow_bag_id`` / ``station_id`` /
+    ``event_id``; ``event_id`` is None when the event was an idempotent no-op (claim at a station
+    that already holds the bag, resume when not paused). Appended events also carry
+    ``event_type``, the normalized ``payload`` and the ``station`` row for the bridge.
+    """
+    st = _resolve_station(conn, station_token)
+    if not st:
+        return workflow_json("WORKFLOW_STATION_INVALID", "Unknown station", status=404)
+    card = _resolve_card(conn, card_token)
+    if not card:
+        return workflow_json("WORKFLOW_BAG_NOT_FOUND", "Unknown card", status=404)
+    if card["assigned_workflow_bag_id"] is None:
+        return workflow_json("WORKFLOW_VALIDATION", "Card not assigned")
+    bag_id = int(card["assigned_workflow_bag_id"])
+    locked_response = _variety_source_lock_response(conn, bag_id)
+    if locked_response is not None:
+        return locked_response
+    st_dict = dict(st)
+    station_kind = (st_dict.get("station_kind") or "sealing").strip().lower()
+    if not _is_event_allowed_for_station(station_kind, event_type):
+        return workflow_json(
+            "WORKFLOW_VALIDATION",
+            f"{event_type} is not allowed for station type '{station_kind}'",
+            details={
+                "reason": "wrong_station_type",
+                "station_kind": station_kind,
+                "event_type": event_type,
+            },
+            status=400,
+        )
+    ev_flow = _event_flow(event_type)
+    mapping_flow = production_flow_for_event_or_station(event_type, station_kind)
+    if mapping_flow:
+        map_status, map_body = ensure_workflow_bag_product_for_flow(
+            conn,
+            workflow_bag_id=bag_id,
+            production_flow=mapping_flow,
+            selected_product_id=_selected_product_id_from_payload(
+                payload if isinstance(payload, dict) else {}
+            ),
+            station_id=int(st["id"]),
+            device_id=device_id,
+        )
+        if map_status == "reject":
+            reason = map_body.get("reason")
+            if reason == "wrong_production_flow":
+                return workflow_json(
+                    "WORKFLOW_VALIDATION",
+                    f"{event_type} is not allowed for {map_body.get('production_flow')} workflow bags.",
+                    details={
+                        **map_body,
+                        "event_type": event_type,
+                    },
+                    status=400,
+                )
+            if reason == "ambiguous_product_mapping":
                 return workflow_json(
                     "WORKFLOW_PRODUCT_MAPPING",
-                    "Could not map this tablet to a product for this station.",
+                    "Choose which product this tablet is running as on this station.",
+                    details=map_body,
+                    status=409,
+                )
+            if reason == "no_product_mapping":
+                return workflow_json(
+                    "WORKFLOW_PRODUCT_MAPPING",
+                    "No product is configured for this tablet on this station type.",
                     details=map_body,
                     status=400,
                 )
-
-        bag_flow = production_flow_for_bag(conn, bag_id)
-        if ev_flow and ev_flow != bag_flow:
-            return workflow_json(
-                "WORKFLOW_VALIDATION",
-                f"{event_type} is not allowed for {bag_flow} workflow bags.",
-                details={
-                    "reason": "wrong_production_flow",
-                    "production_flow": bag_flow,
-                    "event_flow": ev_flow,
-                    "event_type": event_type,
-                },
-                status=400,
-            )
-        if (
-            event_type == WC.EVENT_BAG_CLAIMED
-            and station_kind == "packaging"
-            and not _workflow_bag_has_product(conn, bag_id)
-        ):
             return workflow_json(
                 "WORKFLOW_PRODUCT_MAPPING",
-                "Scan this bag at a card or bottle station before packaging.",
-                details={"reason": "product_not_mapped", "station_kind": station_kind},
+                "Could not map this tablet to a product for this station.",
+                details=map_body,
                 status=400,
             )
-        if event_type in (
-            WC.EVENT_PACKAGING_SNAPSHOT,
-            WC.EVENT_PACKAGING_TAKEN_FOR_ORDER,
-        ) and not _workflow_bag_has_product(conn, bag_id):
+
+    bag_flow = production_flow_for_bag(conn, bag_id)
+    if ev_flow and ev_flow != bag_flow:
+        return workflow_json(
+            "WORKFLOW_VALIDATION",
+            f"{event_type} is not allowed for {bag_flow} workflow bags.",
+            details={
+                "reason": "wrong_production_flow",
+                "production_flow": bag_flow,
+                "event_flow": ev_flow,
+                "event_type": event_type,
+            },
+            status=400,
+        )
+    if (
+        event_type == WC.EVENT_BAG_CLAIMED
+        and station_kind == "packaging"
+        and not _workflow_bag_has_product(conn, bag_id)
+    ):
+        return workflow_json(
+            "WORKFLOW_PRODUCT_MAPPING",
+            "Scan this bag at a card or bottle station before packaging.",
+            details={"reason": "product_not_mapped", "station_kind": station_kind},
+            status=400,
+        )
+    if event_type in (
+        WC.EVENT_PACKAGING_SNAPSHOT,
+        WC.EVENT_PACKAGING_TAKEN_FOR_ORDER,
+    ) and not _workflow_bag_has_product(conn, bag_id):
+        return workflow_json(
+            "WORKFLOW_PRODUCT_MAPPING",
+            "This bag must be scanned through its card or bottle production station before packaging.",
+            details={"reason": "product_not_mapped", "station_kind": station_kind},
+            status=400,
+        )
+    station_id = int(st["id"])
+    if event_type == WC.EVENT_BAG_CLAIMED and station_kind == "packaging":
+        claim_err = _validate_packaging_station_claim(
+            conn, station_id=station_id, workflow_bag_id=bag_id
+        )
+        if claim_err:
+            err_code, err_msg = claim_err
+            return workflow_json(err_code, err_msg, status=400)
+    if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
+        payload = _normalize_packaging_snapshot_payload(conn, bag_id, payload)
+        payload, _converted_upstream_shortage = _normalize_packaging_snapshot_for_upstream_shortage(
+            conn, bag_id, payload
+        )
+    if event_type == WC.EVENT_BOTTLE_HANDPACK_COMPLETE:
+        try:
+            payload = _normalize_bottle_handpack_sources(
+                conn,
+                workflow_bag_id=bag_id,
+                main_card_token=card_token,
+                payload=payload if isinstance(payload, dict) else {},
+            )
+        except ValueError as ve:
             return workflow_json(
-                "WORKFLOW_PRODUCT_MAPPING",
-                "This bag must be scanned through its card or bottle production station before packaging.",
-                details={"reason": "product_not_mapped", "station_kind": station_kind},
+                "WORKFLOW_VALIDATION",
+                str(ve),
+                details={"reason": "invalid_source_bag"},
                 status=400,
             )
-        station_id = int(st["id"])
-        if event_type == WC.EVENT_BAG_CLAIMED and station_kind == "packaging":
-            claim_err = _validate_packaging_station_claim(
-                conn, station_id=station_id, workflow_bag_id=bag_id
-            )
-            if claim_err:
-                err_code, err_msg = claim_err
-                return workflow_json(err_code, err_msg, status=400)
-        if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
-            payload = _normalize_packaging_snapshot_payload(conn, bag_id, payload)
-            payload, _converted_upstream_shortage = _normalize_packaging_snapshot_for_upstream_shortage(
-                conn, bag_id, payload
+    station_claimed = _station_has_claimed_bag(conn, bag_id, station_id)
+    if event_type != WC.EVENT_BAG_CLAIMED and not station_claimed:
+        return workflow_json(
+            "WORKFLOW_VALIDATION",
+            "Bag must be claimed at this station before submitting counts.",
+            details={"reason": "claim_required", "station_kind": station_kind},
+            status=400,
+        )
+    if event_type == WC.EVENT_BAG_CLAIMED and station_claimed:
+        return {"workflow_bag_id": bag_id, "station_id": station_id, "event_id": None}
+    if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
+        shortage = _blocking_upstream_shortage_for_packaging_submit(conn, bag_id, payload)
+        if shortage:
+            return workflow_json(
+                "WORKFLOW_VALIDATION",
+                "This bag has limited cards from sealing. Submit a partial packaging count; do not finalize yet.",
+                details={
+                    "reason": "upstream_out_of_packaging",
+                    "stage": shortage.get("stage"),
+                    "material": shortage.get("material"),
+                    "state": shortage.get("state"),
+                },
+                status=409,
             )
-        if event_type == WC.EVENT_BOTTLE_HANDPACK_COMPLETE:
-            try:
-                payload = _normalize_bottle_handpack_sources(
-                    conn,
-                    workflow_bag_id=bag_id,
-                    main_card_token=card_token,
-                    payload=payload if isinstance(payload, dict) else {},
-                )
-            except ValueError as ve:
-                return workflow_json(
-                    "WORKFLOW_VALIDATION",
-                    str(ve),
-                    details={"reason": "invalid_source_bag"},
-                    status=400,
-                )
-        station_claimed = _station_has_claimed_bag(conn, bag_id, station_id)
-        if event_type != WC.EVENT_BAG_CLAIMED and not station_claimed:
+    station_needs_resume = _station_needs_resume(conn, bag_id, station_id)
+    if event_type == WC.EVENT_STATION_RESUMED and not station_needs_resume:
+        return {"workflow_bag_id": bag_id, "station_id": station_id, "event_id": None}
+    if station_needs_resume and event_type in (
+        WC.EVENT_BLISTER_COMPLETE,
+        WC.EVENT_SEALING_COMPLETE,
+        WC.EVENT_OPERATOR_CHANGE,
+        WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
+        WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
+        WC.EVENT_BOTTLE_STICKER_COMPLETE,
+        WC.EVENT_PACKAGING_SNAPSHOT,
+        WC.EVENT_PACKAGING_TAKEN_FOR_ORDER,
+    ):
+        return workflow_json(
+            "WORKFLOW_VALIDATION",
+            "Resume this bag at this station before submitting counts (tap Resume).",
+            details={"reason": "resume_required", "station_kind": station_kind},
+            status=400,
+        )
+    if event_type == WC.EVENT_PACKAGING_TAKEN_FOR_ORDER:
+        try:
+            _dt = int((payload or {}).get("displays_taken") or 0)
+        except (TypeError, ValueError):
+            _dt = 0
+        if _dt < 1:
             return workflow_json(
                 "WORKFLOW_VALIDATION",
-                "Bag must be claimed at this station before submitting counts.",
-                details={"reason": "claim_required", "station_kind": station_kind},
+                "displays_taken must be at least 1 for taken-for-order.",
                 status=400,
             )
-        if event_type == WC.EVENT_BAG_CLAIMED and station_claimed:
-            return {
-                "ok": True,
-                "workflow_bag_id": bag_id,
-                "facts": _station_facts_payload(conn, bag_id, station_id),
-                "idempotent_duplicate": True,
-            }
-        if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
-            shortage = _blocking_upstream_shortage_for_packaging_submit(conn, bag_id, payload)
-            if shortage:
-                return workflow_json(
-                    "WORKFLOW_VALIDATION",
-                    "This bag has limited cards from sealing. Submit a partial packaging count; do not finalize yet.",
-                    details={
-                        "reason": "upstream_out_of_packaging",
-                        "stage": shortage.get("stage"),
-                        "material": shortage.get("material"),
-                        "state": shortage.get("state"),
-                    },
-                    status=409,
-                )
-        station_needs_resume = _station_needs_resume(conn, bag_id, station_id)
-        if event_type == WC.EVENT_STATION_RESUMED and not station_needs_resume:
-            return {
-                "ok": True,
-                "workflow_bag_id": bag_id,
-                "facts": _station_facts_payload(conn, bag_id, station_id),
-                "idempotent_duplicate": True,
-            }
-        if station_needs_resume and event_type in (
-            WC.EVENT_BLISTER_COMPLETE,
-            WC.EVENT_SEALING_COMPLETE,
-            WC.EVENT_OPERATOR_CHANGE,
-            WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
-            WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
-            WC.EVENT_BOTTLE_STICKER_COMPLETE,
-            WC.EVENT_PACKAGING_SNAPSHOT,
-            WC.EVENT_PACKAGING_TAKEN_FOR_ORDER,
+    if event_type == WC.EVENT_BLISTER_COMPLETE:
+        is_handpack_rest = bool(
+            isinstance(payload, dict)
+            and isinstance(payload.get("metadata"), dict)
+            and payload.get("metadata", {}).get("handpack_rest")
+        )
+        if is_handpack_rest and not (
+            session.get("admin_authenticated")
+            or (session.get("employee_role") == "admin")
         ):
             return workflow_json(
                 "WORKFLOW_VALIDATION",
-                "Resume this bag at this station before submitting counts (tap Resume).",
-                details={"reason": "resume_required", "station_kind": station_kind},
-                status=400,
+                "Hand pack the rest is restricted to admin users.",
+                details={"reason": "admin_required", "action": "handpack_rest"},
+                status=403,
             )
-        if event_type == WC.EVENT_PACKAGING_TAKEN_FOR_ORDER:
+    try:
+        event_id = append_workflow_event(
+            conn,
+            event_type,
+            payload,
+            bag_id,
+            station_id=station_id,
+            device_id=device_id,
+            occurred_at=occurred_at,
+        )
+    except ValueError as ve:
+        return workflow_json("WORKFLOW_VALIDATION", str(ve), details={"hint": "payload_keys"})
+    return {
+        "workflow_bag_id": bag_id,
+        "station_id": station_id,
+        "event_id": event_id,
+        "event_type": event_type,
+        "payload": payload if isinstance(payload, dict) else {},
+        "station": st_dict,
+    }
+
+
+@bp.route("/floor/api/event", methods=["POST"])
+@rate_limit_floor
+def api_append_event():
+    """
+    Append one floor event. The station page sends an ``idempotency_key``; it is recorded in
+    ``workflow_event_receipts`` with the result, so a retry of an event that was already committed
+    (online, or later through the offline batch) returns the stored result with ``duplicate: true``.
+    """
+    data = read_json_body(request)
+    _log_floor_correlation("api_append_event", data)
+    station_token = (data.get("station_token") or "").strip()
+    card_token = (data.get("card_token") or "").strip()
+    event_type = (data.get("event_type") or "").strip()
+    payload = data.get("payload") or {}
+    device_id = (data.get("device_id") or "").strip() or None
+    try:
+        idempotency_key = normalize_idempotency_key(data.get("idempotency_key"))
+        client_ts = int(data["client_ts"]) if data.get("client_ts") is not None else None
+    except (TypeError, ValueError) as ve:
+        return workflow_json("WORKFLOW_VALIDATION", str(ve))
+
+    fields_error = _floor_event_fields_error(station_token, card_token, event_type)
+    if fields_error is not None:
+        return fields_error
+
+    conn = get_db()
+    try:
+        if idempotency_key:
+            stored = _stored_event_response(conn, idempotency_key, station_token)
+            if stored is not None:
+                return stored
+        appended = _append_floor_event(
+            conn,
+            station_token=station_token,
+            card_token=card_token,
+            event_type=event_type,
+            payload=payload,
+            device_id=device_id,
+        )
+        if not isinstance(appended, dict):
+            return appended
+        bag_id = appended["workflow_bag_id"]
+        station_id = appended["station_id"]
+        result = {"ok": True, "workflow_bag_id": bag_id, "event_id": appended["event_id"]}
+        if appended["event_id"] is None:
+            result["idempotent_duplicate"] = True
+        else:
             try:
-                _dt = int((payload or {}).get("displays_taken") or 0)
-            except (TypeError, ValueError):
-                _dt = 0
-            if _dt < 1:
-                return workflow_json(
-                    "WORKFLOW_VALIDATION",
-                    "displays_taken must be at least 1 for taken-for-order.",
-                    status=400,
+                bridge_result = sync_workflow_warehouse_events(
+                    conn,
+                    bag_id,
+                    event_type,
+                    appended["payload"],
+                    appended["station"],
+                    event_id=appended["event_id"],
                 )
-        if event_type == WC.EVENT_BLISTER_COMPLETE:
-            is_handpack_rest = bool(
-                isinstance(payload, dict)
-                and isinstance(payload.get("metadata"), dict)
-                and payload.get("metadata", {}).get("handpack_rest")
-            )
-            if is_handpack_rest and not (
-                session.get("admin_authenticated")
-                or (session.get("employee_role") == "admin")
-            ):
-                return workflow_json(
-                    "WORKFLOW_VALIDATION",
-                    "Hand pack the rest is restricted to admin users.",
-                    details={"reason": "admin_required", "action": "handpack_rest"},
-                    status=403,
+            except ProductionSubmissionError as pse:
+                conn.rollback()
+                return _machine_sync_error(pse)
+            except Exception as sync_exc:
+                LOGGER.exception(
+                    "workflow warehouse bridge failed workflow_bag_id=%s: %s", bag_id, sync_exc
+                )
+                conn.rollback()
+                return _warehouse_sync_error()
+            if bridge_result is not None:
+                result["warehouse_sync"] = bridge_result
+        if idempotency_key:
+            receipt = {"idempotency_key": idempotency_key, "device_id": device_id, "client_ts": client_ts}
+            try:
+                store_event_receipt(conn, receipt, result)
+            except sqlite3.IntegrityError:
+                # A concurrent retry of the same event committed first: keep its result.
+                conn.rollback()
+                return _stored_event_response(conn, idempotency_key, station_token) or workflow_json(
+                    "WORKFLOW_BUSY_RETRY", "Database busy; retry once after a short wait", status=503
                 )
-        try:
-            event_id = append_workflow_event(
-                conn,
-                event_type,
-                payload,
-                bag_id,
-                station_id=station_id,
-                device_id=device_id,
-            )
-        except ValueError as ve:
-            return workflow_json("WORKFLOW_VALIDATION", str(ve), details={"hint": "payload_keys"})
-        pl = payload if isinstance(payload, dict) else {}
-        bridge_result = None
-        try:
-            bridge_result = sync_workflow_warehouse_events(
-                conn, bag_id, event_type, pl, st_dict, event_id=event_id
-            )
-        except ProductionSubmissionError as pse:
-            conn.rollback()
-            body = pse.body if isinstance(pse.body, dict) else {}
-            msg = body.get("error") or "Machine submission could not be saved."
-            return workflow_json(
-                "WORKFLOW_MACHINE_SYNC",
-                msg,
-                status=pse.status_code or 400,
-                details={k: v for k, v in body.items() if k != "error"},
-            )
-        except Exception as sync_exc:
-            LOGGER.exception(
-                "workflow warehouse bridge failed workflow_bag_id=%s: %s", bag_id, sync_exc
-            )
-            conn.rollback()
-            return workflow_json(
-                "WORKFLOW_WAREHOUSE_SYNC",
-                "Could not sync workflow to warehouse submissions.",
-                status=500,
-            )
         conn.commit()
-        out = {
-            "ok": True,
-            "workflow_bag_id": bag_id,
-            "facts": _station_facts_payload(conn, bag_id, station_id),
-        }
-        if bridge_result is not None:
-            out["warehouse_sync"] = bridge_result
-        return out
+        return {**result, "facts": _station_facts_payload(conn, bag_id, station_id)}
     except sqlite3.OperationalError as oe:
         conn.rollback()
         if "locked" in str(oe).lower():
@@ -1294,6 +994,186 @@ def api_append_event():
         conn.close()
 
 
+def _stored_event_response(conn, idempotency_key: str, station_token: str) -> dict | None:
+    """Stored result of an already accepted event, with current station facts; None if unseen."""
+    stored = load_event_receipts(conn, [idempotency_key]).get(idempotency_key)
+    if stored is None:
+        return None
+    out = {**stored, "duplicate": True}
+    st = _resolve_station(conn, station_token)
+    if st and stored.get("workflow_bag_id") is not None:
+        out["facts"] = _station_facts_payload(conn, int(stored["workflow_bag_id"]), int(st["id"]))
+    return out
+
+
+def _machine_sync_error(pse: ProductionSubmissionError):
+    body = pse.body if isinstance(pse.body, dict) else {}
+    msg = body.get("error") or "Machine submission could not be saved."
+    return workflow_json(
+        "WORKFLOW_MACHINE_SYNC",
+        msg,
+        status=pse.status_code or 400,
+        details={k: v for k, v in body.items() if k != "error"},
+    )
+
+
+def _warehouse_sync_error():
+    return workflow_json(
+        "WORKFLOW_WAREHOUSE_SYNC",
+        "Could not sync workflow to warehouse submissions.",
+        status=500,
+    )
+
+
+def _batch_error_result(response) -> dict:
+    resp, status = response
+    return {"ok": False, "status": status, **(resp.get_json() or {})}
+
+
+def _batch_skipped_result() -> dict:
+    return {
+        "ok": False,
+        "status": 409,
+        "code": "WORKFLOW_BATCH_SKIPPED",
+        "message": "Not applied: another event for this card in the batch was rejected.",
+    }
+
+
+def _apply_batched_event(conn, ev: dict) -> tuple[dict, dict | None]:
+    """
+    Append and bridge one batched event in its own savepoint, as ``/floor/api/event`` would.
+
+    Returns the event's result and the appended event (None when it was rejected and rolled back).
+    """
+    error = _floor_event_fields_error(ev["station_token"], ev["card_token"], ev["event_type"])
+    if error is not None:
+        return _batch_error_result(error), None
+    conn.execute("SAVEPOINT floor_batch_event")
+    appended = _append_floor_event(
+        conn,
+        station_token=ev["station_token"],
+        card_token=ev["card_token"],
+        event_type=ev["event_type"],
+        payload=ev["payload"],
+        device_id=ev["device_id"],
+        occurred_at=ev["client_ts"],
+    )
+    failure = None if isinstance(appended, dict) else appended
+    result = {}
+    if failure is None:
+        result = {"ok": True, "workflow_bag_id": appended["workflow_bag_id"], "event_id": appended["event_id"]}
+        if appended["event_id"] is None:
+            result["idempotent_duplicate"] = True
+        else:
+            try:
+                bridge_result = sync_workflow_warehouse_events(
+                    conn,
+                    appended["workflow_bag_id"],
+                    appended["event_type"],
+                    appended["payload"],
+                    appended["station"],
+                    event_id=appended["event_id"],
+                )
+            except ProductionSubmissionError as pse:
+                failure = _machine_sync_error(pse)
+            except Exception as sync_exc:
+                LOGGER.exception(
+                    "workflow warehouse bridge failed workflow_bag_id=%s: %s",
+                    appended["workflow_bag_id"],
+                    sync_exc,
+                )
+                failure = _warehouse_sync_error()
+            else:
+                if bridge_result is not None:
+                    result["warehouse_sync"] = bridge_result
+    if failure is not None:
+        conn.execute("ROLLBACK TO floor_batch_event")
+        conn.execute("RELEASE floor_batch_event")
+        return _batch_error_result(failure), None
+    store_event_receipt(conn, ev, result)
+    conn.execute("RELEASE floor_batch_event")
+    return result, appended
+
+
+def _apply_floor_event_batch(conn, events: list[dict]) -> list[dict]:
+    """
+    Per-event results for a parsed batch (caller holds the write transaction).
+
+    Events are applied in submitted order, each appended and bridged like a single online event.
+    The bridge stays per event rather than once per bag: every machine pause or packaging snapshot
+    writes its own warehouse row (count, receipt, end time), and a bridge failure rolls back only
+    its own event's savepoint. After a card's first rejection its later events are skipped (they usually depend on it);
+    other cards carry on.
+    """
+    prune_event_receipts(conn, Config.FLOOR_EVENT_RECEIPT_RETENTION_DAYS)
+    receipts = load_event_receipts(conn, [ev["idempotency_key"] for ev in events])
+    results: list = [None] * len(events)
+    rejected_cards: set[str] = set()
+    last_accepted: dict[str, tuple[int, dict]] = {}
+    for ev in events:
+        stored = receipts.get(ev["idempotency_key"])
+        if stored is not None:
+            results[ev["index"]] = {**stored, "duplicate": True}
+            continue
+        if ev["card_token"] in rejected_cards:
+            results[ev["index"]] = _batch_skipped_result()
+            continue
+        results[ev["index"]], appended = _apply_batched_event(conn, ev)
+        if appended is None:
+            rejected_cards.add(ev["card_token"])
+        else:
+            last_accepted[ev["card_token"]] = (ev["index"], appended)
+    for index, appended in last_accepted.values():
+        results[index]["facts"] = _station_facts_payload(conn, appended["workflow_bag_id"], appended["station_id"])
+    return results
+
+
+@bp.route("/floor/api/events/batch", methods=["POST"])
+@rate_limit_floor
+def api_append_events_batch():
+    """
+    Replay a tablet's offline queue: ``{"events": [{idempotency_key, client_ts, station_token,
+    card_token, event_type, payload, device_id?}, ...]}`` in the order they were recorded.
+
+    All events are validated, appended and bridged to warehouse submissions in submitted order in
+    one ``BEGIN IMMEDIATE`` transaction, and the response lists one result per event. Each event is stamped with its ``client_ts``
+    (clamped to now and to the bag's latest event). Events whose key was already accepted, here or
+    by ``/floor/api/event``, return the stored result with ``duplicate: true``.
+    """
+    data = read_json_body(request)
+    _log_floor_correlation("api_append_events_batch", data)
+    try:
+        events = parse_event_batch(data, max_events=Config.FLOOR_EVENT_BATCH_MAX_EVENTS)
+    except ValueError as ve:
+        return workflow_json("WORKFLOW_VALIDATION", str(ve))
+
+    conn = get_db()
+    try:
+
+        def _run():
+            with immediate_transaction(conn):
+                return _apply_floor_event_batch(conn, events)
+
+        try:
+            results = run_with_busy_retry(_run, op_name="floor_event_batch")
+        except sqlite3.OperationalError as oe:
+            if "locked" in str(oe).lower():
+                LOGGER.error("WORKFLOW_BUSY_RETRY event batch: %s", oe)
+                return workflow_json(
+                    "WORKFLOW_BUSY_RETRY",
+                    "Database busy; retry once after a short wait",
+                    status=503,
+                )
+            raise
+        return {
+            "ok": True,
+            "accepted": sum(1 for r in results if r.get("ok")),
+            "results": results,
+        }
+    finally:
+        conn.close()
+
+
 @bp.route("/floor/api/finalize", methods=["POST"])
 @rate_limit_floor
 def api_finalize():
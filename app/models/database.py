@@ -33,10 +33,15 @@ def init_db():
         logger.warning(f"Database file not found at {Config.DATABASE_PATH}")
         return
 
-    # Run migrations to ensure columns exist
+    # Run migrations to ensure columns exist (skipped while the recorded schema fingerprint matches)
     try:
-        from app.models.migrations import MigrationRunner
+        from app.models.migrations import MigrationRunner, schema_is_current
         conn = sqlite3.connect(Config.DATABASE_PATH)
+        if Config.MIGRATIONS_SKIP_WHEN_CURRENT and schema_is_current(conn):
+            conn.close()
+            _migrations_run = True
+            logger.info("Database schema is current; migrations skipped")
+            return
         cursor = conn.cursor()
 
         runner = MigrationRunner(cursor)
@@ -1,12 +1,68 @@
 """
 Database migration utilities
 Handles schema changes and column additions
+
+A clean run records a schema fingerprint (digest of the schema-defining code in app/models and
+app/services plus the resulting sqlite_master) in ``schema_state``; ``init_db`` skips the runner
+while the fingerprint still matches, so worker boots after the first do no DDL or introspection.
 """
+import functools
+import hashlib
 import logging
 import sqlite3
+from pathlib import Path
+
+from app.utils.schema_registry import has_column
 
 logger = logging.getLogger(__name__)
 
+_APP_DIR = Path(__file__).resolve().parent.parent
+
+SCHEMA_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        fingerprint TEXT NOT NULL,
+        recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _code_digest():
+    """Digest of the sources that define the schema (runner hooks import their DDL from app/services)."""
+    digest = hashlib.sha256()
+    for path in sorted([*(_APP_DIR / 'models').glob('*.py'), *(_APP_DIR / 'services').glob('*.py')]):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def schema_fingerprint(conn):
+    """Code digest + every sqlite_master entry; changes with a deploy or any DDL."""
+    digest = hashlib.sha256(_code_digest().encode())
+    for row in conn.execute("SELECT type, name, COALESCE(sql, '') FROM sqlite_master ORDER BY type, name"):
+        digest.update("\x1f".join(str(value) for value in row).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def schema_is_current(conn):
+    """True when the fingerprint recorded by the last clean run matches the database and code."""
+    try:
+        row = conn.execute("SELECT fingerprint FROM schema_state WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return False
+    return row is not None and row[0] == schema_fingerprint(conn)
+
+
+class _WarningCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
 
 class MigrationRunner:
     """Runs database migrations safely"""
@@ -15,8 +71,31 @@ class MigrationRunner:
         self.c = cursor
 
     def run_all(self):
-        """Run all migrations"""
+        """Run all migrations; records the schema fingerprint when none of them logged a warning"""
+        warnings = _WarningCounter()
+        logger.addHandler(warnings)
+        try:
+            self._run_migrations()
+        finally:
+            logger.removeHandler(warnings)
+        if warnings.count:
+            logger.info("Schema fingerprint not recorded: %d migration warning(s)", warnings.count)
+            return
+        self._record_schema_fingerprint()
+
+    def _record_schema_fingerprint(self):
+        try:
+            self.c.execute(SCHEMA_STATE_DDL)
+            self.c.execute(
+                "INSERT OR REPLACE INTO schema_state (id, fingerprint) VALUES (1, ?)",
+                (schema_fingerprint(self.c.connection),),
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Could not record schema fingerprint: %s", exc)
+
+    def _run_migrations(self):
         self._migrate_machines()
+        self._migrate_asset_tracking()
         self._migrate_purchase_orders()
         self._migrate_po_lines()
         self._migrate_tablet_types()
@@ -32,6 +111,19 @@ class MigrationRunner:
         self._migrate_machine_counts()
         self._migrate_submission_bag_deductions()
         self._migrate_workflow()
+        self._migrate_workflow_event_payload_columns()
+        self._migrate_workflow_bag_state()
+        self._migrate_workflow_rollups()
+        self._migrate_zoho_sync_state()
+        self._migrate_bag_ledger()
+        self._migrate_data_versions()
+        self._migrate_report_jobs()
+        self._migrate_carrier_tokens()
+        self._migrate_blister_press_counters()
+        self._migrate_workflow_event_receipts()
+        self._migrate_telegram_outbox()
+        self._migrate_zoho_push_jobs()
+        self._migrate_submission_receipt_groups()
 
     def _migrate_machines(self):
         """Migrate machines table"""
@@ -47,6 +139,55 @@ class MigrationRunner:
         except sqlite3.Error as exc:
             logger.warning("Could not backfill machines.machine_role: %s", exc)
 
+        # Asset metadata edited from the machines admin page
+        for column in ('area_name', 'machine_category', 'raw_materials_json', 'components_json', 'compressor_json'):
+            self._add_column_if_not_exists('machines', column, 'TEXT')
+
+    def _migrate_asset_tracking(self):
+        """Compressors and blister material rolls (machines admin / command center)"""
+        try:
+            self.c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS compressors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    compressor_name TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL DEFAULT 'working',
+                    machine_id INTEGER,
+                    notes TEXT,
+                    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+                    created_at INTEGER,
+                    updated_at INTEGER
+                )
+                """
+            )
+            self.c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blister_material_rolls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    machine_id INTEGER NOT NULL,
+                    material_type TEXT NOT NULL,
+                    roll_code TEXT NOT NULL,
+                    started_at_ms INTEGER NOT NULL,
+                    ended_at_ms INTEGER,
+                    start_press_count REAL NOT NULL DEFAULT 0,
+                    end_press_count REAL,
+                    blisters_per_press INTEGER NOT NULL DEFAULT 1,
+                    total_blisters REAL,
+                    status TEXT NOT NULL DEFAULT 'active'
+                )
+                """
+            )
+            self.c.execute(
+                """
+                CREATE INDEX IF NOT EXISTS ix_blister_material_rolls_machine_status
+                ON blister_material_rolls(machine_id, status, material_type)
+                """
+            )
+        except sqlite3.Error as exc:
+            logger.warning("asset tracking migration: %s", exc)
+        self._add_column_if_not_exists('compressors', 'cost', 'REAL')
+        self._add_column_if_not_exists('compressors', 'tank_size', 'TEXT')
+
     def _migrate_purchase_orders(self):
         """Migrate purchase_orders table"""
         # Add zoho_status column
@@ -184,6 +325,10 @@ class MigrationRunner:
         # Add admin_notes column
         self._add_column_if_not_exists('warehouse_submissions', 'admin_notes', 'TEXT')
 
+        # Packaging case breakdown
+        self._add_column_if_not_exists('warehouse_submissions', 'case_count', 'INTEGER DEFAULT 0')
+        self._add_column_if_not_exists('warehouse_submissions', 'loose_display_count', 'INTEGER DEFAULT 0')
+
         # Add submission_type column
         if not self._column_exists('warehouse_submissions', 'submission_type'):
             try:
@@ -261,6 +406,7 @@ class MigrationRunner:
             'last_checkpoint': 'TEXT',
             'delivered_at': 'DATE',
             'last_checked_at': 'TIMESTAMP',
+            'next_check_at': 'TIMESTAMP',
         }
         for col, coltype in columns_to_add.items():
             self._add_column_if_not_exists('shipments', col, coltype)
@@ -397,9 +543,6 @@ class MigrationRunner:
             self.c.execute(
                 "CREATE INDEX IF NOT EXISTS ix_workflow_events_occurred ON workflow_events(occurred_at)"
             )
-            self.c.execute(
-                "CREATE INDEX IF NOT EXISTS ix_workflow_events_type ON workflow_events(event_type)"
-            )
             self.c.execute(
                 """
                 CREATE INDEX IF NOT EXISTS ix_workflow_events_bag_occurred_id
@@ -490,12 +633,161 @@ class MigrationRunner:
         except sqlite3.Error as exc:
             logger.warning("workflow migration: %s", exc)
 
+    def _migrate_workflow_event_payload_columns(self):
+        """Typed hot payload columns + composite indexes — mirrors Alembic o2p3q4r5s6t7 / b5c6d7e8f9a0; backfills once."""
+        from app.services.workflow_append import (
+            PAYLOAD_COLUMNS,
+            WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL,
+            WORKFLOW_EVENT_PAYLOAD_COLUMNS_DDL,
+        )
+
+        try:
+            added = False
+            for column, _key, sql_type in PAYLOAD_COLUMNS:
+                if not self._column_exists("workflow_events", column):
+                    self.c.execute(f"ALTER TABLE workflow_events ADD COLUMN {column} {sql_type}")
+                    added = True
+            for ddl in WORKFLOW_EVENT_PAYLOAD_COLUMNS_DDL:
+                self.c.execute(ddl)
+            # (event_type, occurred_at) covers every lookup the single-column index served.
+            self.c.execute("DROP INDEX IF EXISTS ix_workflow_events_type")
+            # append_workflow_event fills the columns in its INSERT; the trigger only cost an UPDATE per append.
+            self.c.execute("DROP TRIGGER IF EXISTS trg_workflow_events_payload_columns_ins")
+            if added:
+                self.c.execute(WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL)
+                logger.info("workflow_events payload columns backfilled for %s row(s)", self.c.rowcount)
+        except sqlite3.Error as exc:
+            logger.warning("workflow_events payload columns migration: %s", exc)
+
+    def _migrate_workflow_bag_state(self):
+        """Per-bag workflow projection — mirrors Alembic n1o2p3q4r5s6; backfills once from events."""
+        from app.services.workflow_bag_state import (
+            WORKFLOW_BAG_STATE_DDL,
+            rebuild_workflow_bag_state,
+        )
+
+        try:
+            for ddl in WORKFLOW_BAG_STATE_DDL:
+                self.c.execute(ddl)
+            has_state = self.c.execute("SELECT 1 FROM workflow_bag_state LIMIT 1").fetchone()
+            has_events = self.c.execute("SELECT 1 FROM workflow_events LIMIT 1").fetchone()
+            if not has_state and has_events:
+                report = rebuild_workflow_bag_state(self.c.connection, repair=True)
+                logger.info("workflow_bag_state backfilled for %s bag(s)", report["bags_checked"])
+        except sqlite3.Error as exc:
+            logger.warning("workflow_bag_state migration: %s", exc)
+
+    def _migrate_workflow_rollups(self):
+        """Daily station/product/operator rollups — mirrors Alembic p3q4r5s6t7u8; rolls closed days once."""
+        from app.services.workflow_rollups import WORKFLOW_ROLLUPS_DDL, refresh_workflow_rollups
+
+        try:
+            for ddl in WORKFLOW_ROLLUPS_DDL:
+                self.c.execute(ddl)
+            if not self.c.execute("SELECT 1 FROM workflow_rollup_state").fetchone():
+                report = refresh_workflow_rollups(self.c.connection)
+                logger.info("workflow rollups backfilled through %s", report["rolled_through"])
+        except sqlite3.Error as exc:
+            logger.warning("workflow rollups migration: %s", exc)
+
+    def _migrate_zoho_sync_state(self):
+        """Zoho sync cursor/progress record — mirrors Alembic r5s6t7u8v9w0."""
+        from app.services.zoho_sync_state import ZOHO_SYNC_STATE_DDL
+
+        try:
+            for ddl in ZOHO_SYNC_STATE_DDL:
+                self.c.execute(ddl)
+        except sqlite3.Error as exc:
+            logger.warning("zoho_sync_state migration: %s", exc)
+
+    def _migrate_bag_ledger(self):
+        """Per-bag tablet ledger + maintenance triggers — mirrors Alembic s6t7u8v9w0x1; backfills once."""
+        from app.services.bag_ledger import ensure_bag_ledger
+
+        try:
+            if not ensure_bag_ledger(self.c.connection):
+                logger.info("bag_ledger skipped: submission/bag columns not present yet")
+        except sqlite3.Error as exc:
+            logger.warning("bag_ledger migration: %s", exc)
+
+    def _migrate_data_versions(self):
+        """Change counters + bump triggers — mirrors Alembic t7u8v9w0x1y2."""
+        from app.services.data_versions import ensure_data_versions
+
+        try:
+            ensure_data_versions(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("data_versions migration: %s", exc)
+
+    def _migrate_report_jobs(self):
+        """Background PDF report queue — mirrors Alembic u8v9w0x1y2z3."""
+        from app.services.report_jobs import ensure_report_jobs
+
+        try:
+            ensure_report_jobs(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("report_jobs migration: %s", exc)
+
+    def _migrate_carrier_tokens(self):
+        """Persisted carrier OAuth tokens for the tracking job — mirrors Alembic v9w0x1y2z3a4."""
+        from app.services.tracking_refresh import ensure_carrier_tokens
+
+        try:
+            ensure_carrier_tokens(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("carrier_tokens migration: %s", exc)
+
+    def _migrate_blister_press_counters(self):
+        """Per-station blister press counter + maintenance triggers — mirrors Alembic w0x1y2z3a4b5; backfills once."""
+        from app.services.blister_press_counter import ensure_blister_press_counters
+
+        try:
+            if not ensure_blister_press_counters(self.c.connection):
+                logger.info("blister_press_counters skipped: workflow_events not present yet")
+        except sqlite3.Error as exc:
+            logger.warning("blister_press_counters migration: %s", exc)
+
+    def _migrate_workflow_event_receipts(self):
+        """Idempotency receipts for batched floor events — mirrors Alembic y2z3a4b5c6d7."""
+        from app.services.workflow_event_batch import ensure_workflow_event_receipts
+
+        try:
+            ensure_workflow_event_receipts(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("workflow_event_receipts migration: %s", exc)
+
+    def _migrate_telegram_outbox(self):
+        """Telegram webhook command / reply queue — mirrors Alembic z3a4b5c6d7e8."""
+        from app.services.telegram_outbox import ensure_telegram_outbox
+
+        try:
+            ensure_telegram_outbox(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("telegram_outbox migration: %s", exc)
+
+    def _migrate_zoho_push_jobs(self):
+        """Zoho receive push queue — mirrors Alembic a4b5c6d7e8f9."""
+        from app.services.zoho_push_queue import ensure_zoho_push_jobs
+
+        try:
+            ensure_zoho_push_jobs(self.c.connection)
+        except sqlite3.Error as exc:
+            logger.warning("zoho_push_jobs migration: %s", exc)
+
+    def _migrate_submission_receipt_groups(self):
+        """Receipt-group index for the submissions list + maintenance triggers — mirrors Alembic c6d7e8f9a0b1."""
+        from app.services.submission_receipt_groups import ensure_submission_receipt_groups
+
+        try:
+            if not ensure_submission_receipt_groups(self.c.connection):
+                logger.info("submission_receipt_groups skipped: submission columns not present yet")
+        except sqlite3.Error as exc:
+            logger.warning("submission_receipt_groups migration: %s", exc)
+
     def _column_exists(self, table_name, column_name):
-        """Check if a column exists in a table"""
+        """Check if a column exists in a table (schema registry; reloads after each ALTER)"""
         try:
-            self.c.execute(f"PRAGMA table_info({table_name})")
-            existing_cols = [row[1] for row in self.c.fetchall()]
-            return column_name in existing_cols
+            return has_column(self.c.connection, table_name, column_name)
         except sqlite3.Error:
             return False
 
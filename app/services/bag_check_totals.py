@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import json
+import sqlite3
+from collections.abc import Iterable
 from typing import Any
 
 from app.services.submission_calculator import calculate_repack_output_good
 from app.services.submission_details_service import BLISTER_BLISTERS_PER_CUT
+from app.utils.spawn_pool import SpawnPool
 
 
 def _bag_match_params(conn, bag_id: int) -> dict[str, Any] | None:
@@ -92,7 +96,11 @@ def compute_bag_check_totals(conn, bag_id: int) -> dict[str, Any]:
         ''',
         bag_params + bag_params,
     ).fetchall()
+    return _totals_from_rows(bag, rows)
 
+
+def _totals_from_rows(bag: dict[str, Any], rows) -> dict[str, Any]:
+    """Accumulate one bag's matched submission rows (created_at, id order) into the check totals."""
     bag_submission_tablets_total = 0
     machine_blister_tablets_total = 0
     machine_sealing_tablets_total = 0
@@ -277,3 +285,126 @@ def compute_bag_check_totals(conn, bag_id: int) -> dict[str, Any]:
             'negative_blister_to_packaged': bool(neg_b_p),
         },
     }
+
+
+# Bag ids per set-based query; also the partition size handed to each pool worker.
+BATCH_CHUNK_BAGS = 500
+
+_SUBMISSION_ROW_COLUMNS = """
+               ws.*, pd.packages_per_display, pd.tablets_per_package,
+               COALESCE(pd.tablets_per_package, (
+                   SELECT pd2.tablets_per_package
+                   FROM product_details pd2
+                   JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
+                   WHERE tt2.inventory_item_id = ws.inventory_item_id
+                   LIMIT 1
+               )) AS tablets_per_package_final,
+               COALESCE(m.machine_role, 'sealing') AS machine_role"""
+
+# Same three-way match as compute_bag_check_totals (bag id, unassigned rows by item/bag/PO/box,
+# packaged rows sharing a receipt with either), evaluated for every bag in ``bp`` at once.
+_BATCH_ROWS_SQL = f"""
+    WITH bp AS (
+        SELECT b.id AS bag_id, tt.inventory_item_id, b.bag_number, r.po_id, sb.box_number
+        FROM bags b
+        JOIN small_boxes sb ON b.small_box_id = sb.id
+        JOIN receiving r ON sb.receiving_id = r.id
+        JOIN tablet_types tt ON b.tablet_type_id = tt.id
+        WHERE b.id IN (SELECT value FROM json_each(?))
+    ),
+    direct AS (
+        SELECT bp.bag_id, ws.id AS ws_id
+        FROM bp JOIN warehouse_submissions ws ON ws.bag_id = bp.bag_id
+        UNION
+        SELECT bp.bag_id, ws.id
+        FROM bp JOIN warehouse_submissions ws
+          ON ws.bag_id IS NULL
+         AND ws.inventory_item_id = bp.inventory_item_id
+         AND ws.bag_number = bp.bag_number
+         AND ws.assigned_po_id = bp.po_id
+         AND (ws.box_number = bp.box_number OR ws.box_number IS NULL)
+    ),
+    receipts AS (
+        SELECT DISTINCT d.bag_id, ws.receipt_number
+        FROM direct d JOIN warehouse_submissions ws ON ws.id = d.ws_id
+        WHERE TRIM(COALESCE(ws.receipt_number, '')) != ''
+    ),
+    members AS (
+        SELECT bag_id, ws_id FROM direct
+        UNION
+        SELECT rc.bag_id, ws.id
+        FROM receipts rc JOIN warehouse_submissions ws ON ws.receipt_number = rc.receipt_number
+        WHERE COALESCE(ws.submission_type, 'packaged') = 'packaged'
+    )
+    SELECT mb.bag_id AS check_bag_id, {_SUBMISSION_ROW_COLUMNS}
+    FROM members mb
+    JOIN warehouse_submissions ws ON ws.id = mb.ws_id
+    LEFT JOIN product_details pd ON ws.product_name = pd.product_name
+    LEFT JOIN machines m ON ws.machine_id = m.id
+    ORDER BY mb.bag_id, ws.created_at ASC, ws.id ASC
+"""
+
+
+def _batch_chunk(conn, bag_ids: list[int]) -> dict[int, dict[str, Any]]:
+    payload = json.dumps(bag_ids)
+    bags = {
+        row['id']: dict(row)
+        for row in conn.execute(
+            '''
+            SELECT b.id, b.bag_label_count, b.pill_count, tt.inventory_item_id, sb.box_number, r.po_id, b.bag_number
+            FROM bags b
+            JOIN small_boxes sb ON b.small_box_id = sb.id
+            JOIN receiving r ON sb.receiving_id = r.id
+            JOIN tablet_types tt ON b.tablet_type_id = tt.id
+            WHERE b.id IN (SELECT value FROM json_each(?))
+            ''',
+            (payload,),
+        )
+    }
+    rows_by_bag: dict[int, list[Any]] = {bag_id: [] for bag_id in bags}
+    for row in conn.execute(_BATCH_ROWS_SQL, (payload,)):
+        rows_by_bag[row[0]].append(row)
+    return {bag_id: _totals_from_rows(bags[bag_id], rows_by_bag[bag_id]) for bag_id in bags}
+
+
+def _chunk_worker(db_path: str, bag_ids: list[int]) -> dict[int, dict[str, Any]]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        return _batch_chunk(conn, bag_ids)
+    finally:
+        conn.close()
+
+
+_process_pool = SpawnPool()
+
+
+def _database_file(conn) -> str:
+    for row in conn.execute('PRAGMA database_list'):
+        if row[1] == 'main':
+            return row[2] or ''
+    return ''
+
+
+def compute_bag_check_totals_batch(
+    conn, bag_ids: Iterable[int], *, workers: int = 0, chunk_size: int = BATCH_CHUNK_BAGS
+) -> dict[int, dict[str, Any]]:
+    """
+    ``compute_bag_check_totals`` for many bags: two set-based queries per ``chunk_size`` bags.
+
+    With ``workers > 1`` and more than one chunk, chunks run in a process pool, each on its own
+    read-only connection to the same database file (so uncommitted writes on ``conn`` are not
+    seen). In-memory databases always run in-process. Bags that do not resolve to a receive /
+    tablet type are omitted, where the single-bag call returns ``{}``.
+    """
+    ids = list(dict.fromkeys(int(b) for b in bag_ids if b is not None))
+    chunks = [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    db_path = _database_file(conn) if workers > 1 and len(chunks) > 1 else ''
+    out: dict[int, dict[str, Any]] = {}
+    if db_path:
+        for part in _process_pool.get(workers).map(_chunk_worker, [db_path] * len(chunks), chunks):
+            out.update(part)
+    else:
+        for chunk in chunks:
+            out.update(_batch_chunk(conn, chunk))
+    return out
@@ -0,0 +1,363 @@
+"""
+Per-bag tablet ledger (``bag_ledger``): received, consumed and remaining tablets for each inventory bag.
+
+Rows are kept current by triggers on ``warehouse_submissions``, ``submission_bag_deductions``,
+``bags``, ``product_details`` and ``machines``, so every write path (and the workflow bridge)
+updates the ledger in its own transaction. Each trigger recomputes the affected bags from source
+rows rather than applying deltas, so the ledger always equals what the old per-request
+subqueries returned. ``reconcile_bag_ledger`` (scripts/reconcile_bag_ledger.py) reports drift.
+
+Two totals are derived for readers:
+  packaged_count — receiving pages / Zoho push: packaged (incl. loose) + bottle + variety deductions
+  remaining      — floor bridge: received minus packaged (excl. loose), bottle, variety, machine, repack
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from collections.abc import Iterable
+from typing import Any
+
+from app.utils.schema_registry import table_columns
+
+logger = logging.getLogger(__name__)
+
+LEDGER_COLUMNS = (
+    "received",
+    "packaged",
+    "packaged_loose",
+    "bottle",
+    "variety_deducted",
+    "machine",
+    "repack",
+    "packaged_count",
+    "remaining",
+)
+
+# Source columns the ledger SQL and triggers reference; older schemas without them keep the
+# per-request computation (see bag_ledger_counts).
+_REQUIRED_COLUMNS = {
+    "warehouse_submissions": (
+        "bag_id",
+        "submission_type",
+        "product_name",
+        "machine_id",
+        "displays_made",
+        "packs_remaining",
+        "loose_tablets",
+        "bottles_made",
+        "tablets_pressed_into_cards",
+    ),
+    "product_details": ("product_name", "packages_per_display", "tablets_per_package", "tablets_per_bottle"),
+    "machines": ("machine_role",),
+    "bags": ("bag_label_count", "pill_count"),
+    "submission_bag_deductions": ("bag_id", "tablets_deducted"),
+}
+
+_WS_PD = """
+    FROM warehouse_submissions ws
+    LEFT JOIN product_details pd ON ws.product_name = pd.product_name
+    WHERE ws.bag_id = b.id"""
+
+_CARDS_SQL = (
+    "(COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +"
+    " (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0))"
+)
+
+
+_MACHINE_SQL = """(SELECT COALESCE(SUM(
+                    CASE
+                      WHEN COALESCE(m.machine_role, 'sealing') = 'blister'
+                        THEN COALESCE(ws.tablets_pressed_into_cards, 0)
+                      ELSE MAX(
+                        COALESCE(ws.tablets_pressed_into_cards, 0),
+                        (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0)),
+                        COALESCE(ws.loose_tablets, 0)
+                      )
+                    END
+                ), 0)
+                FROM warehouse_submissions ws
+                LEFT JOIN product_details pd ON ws.product_name = pd.product_name
+                LEFT JOIN machines m ON ws.machine_id = m.id
+                WHERE ws.bag_id = b.id AND COALESCE(ws.submission_type, 'packaged') = 'machine')"""
+
+
+def ledger_source_sql(bag_filter_sql: str, *, pill_count: bool = True, machine: bool = True, deductions: bool = True) -> str:
+    """
+    SELECT producing ledger rows (``bag_id`` + LEDGER_COLUMNS) from source rows for bags matching ``bag_filter_sql``.
+
+    The keyword flags drop terms whose source table/column is absent (legacy or minimal schemas),
+    counting them as zero like the per-request queries did.
+    """
+    pill_sql = "NULLIF(b.pill_count, 0)" if pill_count else "NULL"
+    deductions_sql = (
+        "(SELECT COALESCE(SUM(sbd.tablets_deducted), 0) FROM submission_bag_deductions sbd WHERE sbd.bag_id = b.id)"
+        if deductions
+        else "0"
+    )
+    machine_sql = _MACHINE_SQL if machine else "0"
+    return f"""
+    SELECT bag_id, received, packaged, packaged_loose, bottle, variety_deducted, machine, repack,
+           packaged + packaged_loose + bottle + variety_deducted AS packaged_count,
+           MAX(0, received - (packaged + bottle + variety_deducted + machine + repack)) AS remaining
+    FROM (
+        SELECT b.id AS bag_id,
+               COALESCE(NULLIF(b.bag_label_count, 0), {pill_sql}, 0) AS received,
+               (SELECT COALESCE(SUM({_CARDS_SQL}), 0) {_WS_PD} AND ws.submission_type = 'packaged') AS packaged,
+               (SELECT COALESCE(SUM(COALESCE(ws.loose_tablets, 0)), 0) {_WS_PD}
+                  AND ws.submission_type = 'packaged') AS packaged_loose,
+               (SELECT COALESCE(SUM(COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)), 0) {_WS_PD}
+                  AND ws.submission_type = 'bottle') AS bottle,
+               {deductions_sql} AS variety_deducted,
+               {machine_sql} AS machine,
+               (SELECT COALESCE(SUM({_CARDS_SQL}), 0) {_WS_PD}
+                  AND COALESCE(ws.submission_type, 'packaged') = 'repack') AS repack
+        FROM bags b
+        WHERE {bag_filter_sql}
+    )
+    """
+
+
+def _refresh_sql(bag_filter_sql: str) -> str:
+    # DELETE + INSERT rather than INSERT OR REPLACE: inside a trigger an outer INSERT OR IGNORE
+    # would override REPLACE and silently keep the stale row.
+    return f"""
+    DELETE FROM bag_ledger WHERE bag_id IN (SELECT b.id FROM bags b WHERE {bag_filter_sql});
+    INSERT INTO bag_ledger (bag_id, {', '.join(LEDGER_COLUMNS)})
+    {ledger_source_sql(bag_filter_sql)};
+    """
+
+
+_SUBMISSION_COLUMNS = ", ".join(_REQUIRED_COLUMNS["warehouse_submissions"])
+_PRODUCT_COLUMNS = ", ".join(_REQUIRED_COLUMNS["product_details"][1:])
+
+# (trigger name, event clause, WHEN condition or None, [bag filters to refresh])
+_TRIGGERS = (
+    ("ws_ins", "INSERT ON warehouse_submissions", "NEW.bag_id IS NOT NULL", ["b.id = NEW.bag_id"]),
+    (
+        "ws_upd",
+        f"UPDATE OF {_SUBMISSION_COLUMNS} ON warehouse_submissions",
+        "OLD.bag_id IS NOT NULL OR NEW.bag_id IS NOT NULL",
+        ["b.id = NEW.bag_id", "b.id = OLD.bag_id AND OLD.bag_id IS NOT NEW.bag_id"],
+    ),
+    ("ws_del", "DELETE ON warehouse_submissions", "OLD.bag_id IS NOT NULL", ["b.id = OLD.bag_id"]),
+    ("sbd_ins", "INSERT ON submission_bag_deductions", None, ["b.id = NEW.bag_id"]),
+    (
+        "sbd_upd",
+        "UPDATE OF bag_id, tablets_deducted ON submission_bag_deductions",
+        None,
+        ["b.id = NEW.bag_id", "b.id = OLD.bag_id AND OLD.bag_id IS NOT NEW.bag_id"],
+    ),
+    ("sbd_del", "DELETE ON submission_bag_deductions", None, ["b.id = OLD.bag_id"]),
+    ("bags_ins", "INSERT ON bags", None, ["b.id = NEW.id"]),
+    ("bags_upd", "UPDATE OF bag_label_count, pill_count ON bags", None, ["b.id = NEW.id"]),
+    (
+        "pd_ins",
+        "INSERT ON product_details",
+        None,
+        ["b.id IN (SELECT bag_id FROM warehouse_submissions WHERE product_name = NEW.product_name)"],
+    ),
+    (
+        "pd_upd",
+        f"UPDATE OF product_name, {_PRODUCT_COLUMNS} ON product_details",
+        None,
+        [
+            "b.id IN (SELECT bag_id FROM warehouse_submissions"
+            " WHERE product_name = NEW.product_name OR product_name = OLD.product_name)"
+        ],
+    ),
+    (
+        "pd_del",
+        "DELETE ON product_details",
+        None,
+        ["b.id IN (SELECT bag_id FROM warehouse_submissions WHERE product_name = OLD.product_name)"],
+    ),
+    (
+        "machines_upd",
+        "UPDATE OF machine_role ON machines",
+        None,
+        ["b.id IN (SELECT bag_id FROM warehouse_submissions WHERE machine_id = NEW.id)"],
+    ),
+)
+
+# Shared by MigrationRunner and the Alembic revision (both IF NOT EXISTS).
+BAG_LEDGER_TABLE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS bag_ledger (
+        bag_id INTEGER PRIMARY KEY REFERENCES bags(id) ON DELETE CASCADE,
+        received INTEGER NOT NULL DEFAULT 0,
+        packaged INTEGER NOT NULL DEFAULT 0,
+        packaged_loose INTEGER NOT NULL DEFAULT 0,
+        bottle INTEGER NOT NULL DEFAULT 0,
+        variety_deducted INTEGER NOT NULL DEFAULT 0,
+        machine INTEGER NOT NULL DEFAULT 0,
+        repack INTEGER NOT NULL DEFAULT 0,
+        packaged_count INTEGER NOT NULL DEFAULT 0,
+        remaining INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_sbd_bag_id ON submission_bag_deductions(bag_id)",
+)
+
+
+def bag_ledger_trigger_ddl() -> list[str]:
+    statements = []
+    for suffix, event, when, filters in _TRIGGERS:
+        body = "".join(_refresh_sql(f) for f in filters)
+        when_sql = f"WHEN {when}" if when else ""
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_bag_ledger_{suffix}
+            AFTER {event} {when_sql}
+            BEGIN
+            {body}
+            END
+            """
+        )
+    statements.append(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_bag_ledger_bags_del
+        AFTER DELETE ON bags
+        BEGIN
+        DELETE FROM bag_ledger WHERE bag_id = OLD.id;
+        END
+        """
+    )
+    return statements
+
+
+def _missing_sources(conn: sqlite3.Connection) -> set[str]:
+    missing = set()
+    for table, columns in _REQUIRED_COLUMNS.items():
+        if not table_columns(conn, table).issuperset(columns):
+            missing.add(table)
+    return missing
+
+
+def bag_ledger_supported(conn: sqlite3.Connection) -> bool:
+    """True when every source column the ledger triggers reference exists (triggers fail at fire time otherwise)."""
+    return not _missing_sources(conn)
+
+
+def _fallback_source_sql(conn: sqlite3.Connection, bag_filter_sql: str) -> str:
+    missing = _missing_sources(conn)
+    ws_columns = table_columns(conn, "warehouse_submissions")
+    bag_columns = table_columns(conn, "bags")
+    return ledger_source_sql(
+        bag_filter_sql,
+        pill_count="pill_count" in bag_columns,
+        machine="machines" not in missing and "tablets_pressed_into_cards" in ws_columns,
+        deductions="submission_bag_deductions" not in missing,
+    )
+
+
+def _ledger_installed(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_bag_ledger_ws_ins'"
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_bag_ledger(conn: sqlite3.Connection, bag_ids: Iterable[int] | None = None) -> int:
+    """Recompute ledger rows from source (all bags, or ``bag_ids``); returns rows written."""
+    if bag_ids is None:
+        conn.execute("DELETE FROM bag_ledger")
+        cur = conn.execute(
+            f"INSERT INTO bag_ledger (bag_id, {', '.join(LEDGER_COLUMNS)}) {ledger_source_sql('1=1')}"
+        )
+        return cur.rowcount
+    ids = json.dumps(sorted({int(b) for b in bag_ids}))
+    conn.execute("DELETE FROM bag_ledger WHERE bag_id IN (SELECT value FROM json_each(?))", (ids,))
+    cur = conn.execute(
+        f"INSERT INTO bag_ledger (bag_id, {', '.join(LEDGER_COLUMNS)}) "
+        f"{ledger_source_sql('b.id IN (SELECT value FROM json_each(?))')}",
+        (ids,),
+    )
+    return cur.rowcount
+
+
+def ensure_bag_ledger(conn: sqlite3.Connection) -> bool:
+    """Create table + triggers and backfill when rows are missing; False when the schema cannot support it."""
+    if not bag_ledger_supported(conn):
+        return False
+    for ddl in BAG_LEDGER_TABLE_DDL:
+        conn.execute(ddl)
+    for ddl in bag_ledger_trigger_ddl():
+        conn.execute(ddl)
+    ledger_rows = conn.execute("SELECT COUNT(*) FROM bag_ledger").fetchone()[0]
+    bag_rows = conn.execute("SELECT COUNT(*) FROM bags").fetchone()[0]
+    if ledger_rows != bag_rows:
+        written = rebuild_bag_ledger(conn)
+        logger.info("bag_ledger backfilled for %d bags", written)
+    return True
+
+
+def bag_ledger_counts(conn: sqlite3.Connection, bag_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """
+    Ledger rows keyed by bag id (LEDGER_COLUMNS). Reads ``bag_ledger`` when it is installed;
+    bags without a row, or databases without the ledger, are computed from source rows.
+    """
+    ids = sorted({int(b) for b in bag_ids if b is not None})
+    if not ids:
+        return {}
+    payload = json.dumps(ids)
+    out: dict[int, dict[str, Any]] = {}
+    try:
+        installed = _ledger_installed(conn)
+    except sqlite3.Error:
+        installed = False
+    if installed:
+        for row in conn.execute(
+            f"SELECT bag_id, {', '.join(LEDGER_COLUMNS)} FROM bag_ledger WHERE bag_id IN (SELECT value FROM json_each(?))",
+            (payload,),
+        ):
+            out[int(row[0])] = dict(zip(LEDGER_COLUMNS, row[1:], strict=True))
+    missing = [b for b in ids if b not in out]
+    if missing:
+        source_sql = _fallback_source_sql(conn, "b.id IN (SELECT value FROM json_each(?))")
+        for row in conn.execute(source_sql, (json.dumps(missing),)):
+            out[int(row[0])] = dict(zip(LEDGER_COLUMNS, row[1:], strict=True))
+    return out
+
+
+def reconcile_bag_ledger(conn: sqlite3.Connection, *, fix: bool = False, limit: int = 50) -> dict[str, Any]:
+    """
+    Recompute every bag from source rows and compare with ``bag_ledger``.
+
+    Returns ``bags``, ``drifted`` (bags with any differing column), ``missing`` (no ledger row),
+    ``orphaned`` (ledger row without a bag), up to ``limit`` ``drift`` entries and, with
+    ``fix=True``, the number of rows rewritten.
+    """
+    source = {int(row[0]): tuple(row[1:]) for row in conn.execute(ledger_source_sql("1=1"))}
+    ledger = {
+        int(row[0]): tuple(row[1:])
+        for row in conn.execute(f"SELECT bag_id, {', '.join(LEDGER_COLUMNS)} FROM bag_ledger")
+    }
+    drift = []
+    drifted_ids = []
+    missing = [b for b in source if b not in ledger]
+    orphaned = [b for b in ledger if b not in source]
+    for bag_id, expected in source.items():
+        actual = ledger.get(bag_id)
+        if actual is None or actual == expected:
+            continue
+        drifted_ids.append(bag_id)
+        for column, want, have in zip(LEDGER_COLUMNS, expected, actual, strict=True):
+            if want != have and len(drift) < limit:
+                drift.append({"bag_id": bag_id, "column": column, "ledger": have, "source": want})
+    report: dict[str, Any] = {
+        "bags": len(source),
+        "drifted": len(drifted_ids),
+        "missing": len(missing),
+        "orphaned": len(orphaned),
+        "drift": drift,
+    }
+    if fix:
+        report["fixed"] = rebuild_bag_ledger(conn, drifted_ids + missing) if drifted_ids or missing else 0
+        if orphaned:
+            conn.execute(
+                "DELETE FROM bag_ledger WHERE bag_id IN (SELECT value FROM json_each(?))", (json.dumps(orphaned),)
+            )
+    return report
@@ -5,9 +5,14 @@ This service extracts the bag matching logic that was previously
 duplicated in blueprint files.
 """
 
+import json
+import logging
 import sqlite3
+import time
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 
 def find_matching_bags(
     conn: sqlite3.Connection, submission_dict: dict[str, Any], exclude_closed_bags: bool = False
@@ -272,86 +277,145 @@ def find_matching_bags_with_receive_names(
     return matching_bags
 
 
-def reevaluate_flagged_submissions(conn: sqlite3.Connection) -> int:
-    """
-    Re-evaluate all submissions flagged for review (needs_review = 1) that are unassigned.
+def _match_key(value: Any) -> Any:
+    """Coerce a submission-side value the way SQLite's INTEGER affinity would when compared to a bag column."""
+    if isinstance(value, str):
+        text = value.strip()
+        for cast in (int, float):
+            try:
+                return cast(text)
+            except ValueError:
+                pass
+    return value
 
-    After a PO is closed, some submissions that previously had multiple matches
-    may now have only one match. This function auto-assigns those submissions.
 
-    Args:
-        conn: Database connection object (must support writes)
+def _index_open_bags(conn: sqlite3.Connection, tablet_type_ids: set[int]) -> dict[tuple, list[tuple[int, int, bool]]]:
+    """
+    One pass over open bags for ``tablet_type_ids``, keyed the two ways ``find_matching_bags`` matches.
 
-    Returns:
-        Number of submissions that were auto-assigned
+    Keys are ``('box', tablet_type_id, box_number, bag_number)`` and ``('flavor', tablet_type_id, bag_number)``;
+    values are ``(bag_id, po_id, bag_closed)`` so the closed-bag filter can be applied per submission.
+    """
+    index: dict[tuple, list[tuple[int, int, bool]]] = {}
+    rows = conn.execute(
+        '''
+        SELECT b.id AS bag_id,
+               b.tablet_type_id,
+               sb.box_number,
+               b.bag_number,
+               COALESCE(b.status, 'Available') = 'Closed' AS bag_closed,
+               po.id AS po_id
+        FROM bags b
+        JOIN small_boxes sb ON b.small_box_id = sb.id
+        JOIN receiving r ON sb.receiving_id = r.id
+        JOIN purchase_orders po ON r.po_id = po.id
+        JOIN tablet_types tt ON b.tablet_type_id = tt.id
+        WHERE b.tablet_type_id IN (SELECT value FROM json_each(?))
+        AND (r.closed IS NULL OR r.closed = FALSE)
+        AND (po.closed IS NULL OR po.closed = 0)
+    ''',
+        (json.dumps(sorted(tablet_type_ids)),),
+    ).fetchall()
+    for row in rows:
+        entry = (row['bag_id'], row['po_id'], bool(row['bag_closed']))
+        index.setdefault(('box', row['tablet_type_id'], row['box_number'], row['bag_number']), []).append(entry)
+        index.setdefault(('flavor', row['tablet_type_id'], row['bag_number']), []).append(entry)
+    return index
+
+
+def match_flagged_submissions(conn: sqlite3.Connection) -> dict[str, Any]:
     """
-    import logging
+    Batch form of re-evaluating flagged (``needs_review = 1``), unassigned submissions.
 
-    logger = logging.getLogger(__name__)
+    Same rules as calling ``find_matching_bags`` per row — tablet type from ``inventory_item_id``
+    then ``product_details``, box number only when present, closed bags excluded for
+    non-packaged submissions — but with the lookups and open bags loaded once per run and the
+    unique-match assignments written in one ``executemany``.
 
-    # Get all flagged, unassigned submissions
-    flagged_submissions = conn.execute('''
+    Returns a report: ``flagged``, ``eligible`` (tablet type and bag number resolved),
+    ``assigned``, ``ambiguous``, ``unmatched`` and ``elapsed_ms``.
+    """
+    started = time.perf_counter()
+    flagged = conn.execute('''
         SELECT ws.id, ws.inventory_item_id, ws.bag_number, ws.box_number, ws.submission_type, ws.product_name
         FROM warehouse_submissions ws
         WHERE ws.needs_review = 1
         AND ws.bag_id IS NULL
     ''').fetchall()
-
-    if not flagged_submissions:
-        return 0
-
-    auto_assigned_count = 0
-
-    for submission in flagged_submissions:
-        sub_dict = dict(submission)
-        submission_id = sub_dict['id']
-        submission_type = sub_dict.get('submission_type', 'packaged')
-        exclude_closed_bags = submission_type != 'packaged'
-
-        # Get tablet_type_id from inventory_item_id
-        tablet_type_id = None
-        if sub_dict.get('inventory_item_id'):
-            tt_row = conn.execute(
-                '''
-                SELECT id FROM tablet_types WHERE inventory_item_id = ?
-            ''',
-                (sub_dict['inventory_item_id'],),
-            ).fetchone()
-            if tt_row:
-                tablet_type_id = tt_row['id']
-
-        # Fallback: get from product_details
-        if not tablet_type_id and sub_dict.get('product_name'):
-            pd_row = conn.execute(
-                '''
-                SELECT tablet_type_id FROM product_details WHERE product_name = ?
-            ''',
-                (sub_dict['product_name'],),
-            ).fetchone()
-            if pd_row:
-                tablet_type_id = pd_row['tablet_type_id']
-
-        if not tablet_type_id or not sub_dict.get('bag_number'):
+    report = {'flagged': len(flagged), 'eligible': 0, 'assigned': 0, 'ambiguous': 0, 'unmatched': 0}
+    if not flagged:
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+
+    # First row wins on duplicate keys, like the per-row fetchone() lookups.
+    type_by_item: dict[Any, int] = {}
+    for row in conn.execute('SELECT inventory_item_id, id FROM tablet_types ORDER BY rowid DESC'):
+        type_by_item[row[0]] = row[1]
+    type_by_product: dict[Any, int] = {}
+    for row in conn.execute('SELECT product_name, tablet_type_id FROM product_details ORDER BY rowid DESC'):
+        type_by_product[row[0]] = row[1]
+
+    candidates = []
+    for sub in flagged:
+        tablet_type_id = type_by_item.get(sub['inventory_item_id']) if sub['inventory_item_id'] else None
+        if not tablet_type_id and sub['product_name']:
+            tablet_type_id = type_by_product.get(sub['product_name'])
+        if not tablet_type_id or not sub['bag_number']:
             continue
+        box_raw = sub['box_number']
+        box_number = box_raw if (box_raw and str(box_raw).strip()) else None
+        bag_number = _match_key(sub['bag_number'])
+        if box_number is not None:
+            key = ('box', tablet_type_id, _match_key(box_number), bag_number)
+        else:
+            key = ('flavor', tablet_type_id, bag_number)
+        exclude_closed_bags = sub['submission_type'] != 'packaged'
+        candidates.append((sub['id'], key, exclude_closed_bags))
+    report['eligible'] = len(candidates)
+
+    index = _index_open_bags(conn, {key[1] for _sub_id, key, _exclude in candidates})
+    assignments = []
+    for submission_id, key, exclude_closed_bags in candidates:
+        bags = [bag for bag in index.get(key, ()) if not (exclude_closed_bags and bag[2])]
+        if len(bags) == 1:
+            bag_id, po_id, _closed = bags[0]
+            assignments.append((bag_id, po_id, submission_id))
+        elif bags:
+            report['ambiguous'] += 1
+        else:
+            report['unmatched'] += 1
 
-        sub_dict['tablet_type_id'] = tablet_type_id
+    if assignments:
+        conn.executemany(
+            '''
+            UPDATE warehouse_submissions
+            SET bag_id = ?, assigned_po_id = ?, needs_review = 0
+            WHERE id = ? AND bag_id IS NULL
+        ''',
+            assignments,
+        )
+    report['assigned'] = len(assignments)
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        "Flagged submission re-evaluation: %(assigned)d of %(flagged)d auto-assigned "
+        "(%(ambiguous)d ambiguous, %(unmatched)d unmatched) in %(elapsed_ms).1f ms",
+        report,
+    )
+    return report
 
-        # Find matching bags (will exclude closed POs now)
-        matching_bags = find_matching_bags(conn, sub_dict, exclude_closed_bags)
 
-        # If exactly 1 match, auto-assign
-        if len(matching_bags) == 1:
-            bag = matching_bags[0]
-            conn.execute(
-                '''
-                UPDATE warehouse_submissions
-                SET bag_id = ?, assigned_po_id = ?, needs_review = 0
-                WHERE id = ?
-            ''',
-                (bag['id'], bag.get('po_id'), submission_id),
-            )
+def reevaluate_flagged_submissions(conn: sqlite3.Connection) -> int:
+    """
+    Re-evaluate all submissions flagged for review (needs_review = 1) that are unassigned.
 
-            logger.info(f"Auto-assigned submission {submission_id} to bag {bag['id']} during re-evaluation")
-            auto_assigned_count += 1
+    After a PO is closed, some submissions that previously had multiple matches
+    may now have only one match. This function auto-assigns those submissions
+    (see ``match_flagged_submissions`` for the batch report).
 
-    return auto_assigned_count
+    Args:
+        conn: Database connection object (must support writes)
+
+    Returns:
+        Number of submissions that were auto-assigned
+    """
+    return match_flagged_submissions(conn)['assigned']
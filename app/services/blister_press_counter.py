@@ -0,0 +1,218 @@
+"""
+Cumulative blister press counter per workflow station (``blister_press_counters``).
+
+Blister material roll tracking needs "presses so far" for a station. Summing every
+``BLISTER_COMPLETE`` event on each poll grows with history, so triggers keep:
+
+  blister_press_events   — one row per BLISTER_COMPLETE event: its station and press count
+                           (``counter_end - counter_start`` when both are present, else ``count_total``)
+  blister_press_counters — per-station running total of ``blister_press_events.presses``
+
+Appending a ``BLISTER_COMPLETE`` event inserts its row; a ``SUBMISSION_CORRECTED`` event aimed at
+one re-derives that event's presses from the corrected payload; payload repairs and deletes are
+followed too. Counter rows change only through ``blister_press_events`` triggers, so the counter
+is always the sum of its events. Roll summaries read it by primary key.
+
+``rebuild_blister_press_counters`` recomputes both tables from ``workflow_events`` (backfill).
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+from app.services import workflow_constants as WC
+
+logger = logging.getLogger(__name__)
+
+
+def _presses_sql(payload_sql: str, path: str = "$") -> str:
+    end = f"CAST(json_extract({payload_sql}, '{path}.counter_end') AS REAL)"
+    start = f"CAST(json_extract({payload_sql}, '{path}.counter_start') AS REAL)"
+    total = f"CAST(json_extract({payload_sql}, '{path}.count_total') AS REAL)"
+    return f"""CASE WHEN NOT json_valid({payload_sql}) THEN 0
+        WHEN {end} IS NOT NULL AND {start} IS NOT NULL AND {end} >= {start} THEN {end} - {start}
+        ELSE COALESCE({total}, 0) END"""
+
+
+def _station_sql(row: str) -> str:
+    return f"""CASE WHEN {row}.station_id IS NOT NULL THEN {row}.station_id
+        WHEN json_valid({row}.payload) THEN COALESCE(
+            CAST(json_extract({row}.payload, '$.station_id') AS INTEGER),
+            CAST(json_extract({row}.payload, '$.stationId') AS INTEGER)
+        ) END"""
+
+
+BLISTER_PRESS_COUNTER_DDL: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS blister_press_events (
+        event_id INTEGER PRIMARY KEY,
+        station_id INTEGER NOT NULL,
+        presses REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS blister_press_counters (
+        station_id INTEGER PRIMARY KEY,
+        presses REAL NOT NULL DEFAULT 0,
+        events INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_events_ins
+    AFTER INSERT ON blister_press_events
+    BEGIN
+        INSERT INTO blister_press_counters (station_id, presses, events)
+        VALUES (NEW.station_id, NEW.presses, 1)
+        ON CONFLICT(station_id) DO UPDATE SET
+            presses = presses + excluded.presses,
+            events = events + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_events_upd
+    AFTER UPDATE OF presses ON blister_press_events
+    BEGIN
+        UPDATE blister_press_counters SET presses = presses + NEW.presses - OLD.presses
+        WHERE station_id = NEW.station_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_events_del
+    AFTER DELETE ON blister_press_events
+    BEGIN
+        UPDATE blister_press_counters SET presses = presses - OLD.presses, events = events - 1
+        WHERE station_id = OLD.station_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_workflow_events_ins
+    AFTER INSERT ON workflow_events
+    WHEN NEW.event_type = '{WC.EVENT_BLISTER_COMPLETE}' AND ({_station_sql("NEW")}) IS NOT NULL
+    BEGIN
+        INSERT INTO blister_press_events (event_id, station_id, presses)
+        VALUES (NEW.id, {_station_sql("NEW")}, {_presses_sql("NEW.payload")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_workflow_events_correction
+    AFTER INSERT ON workflow_events
+    WHEN NEW.event_type = '{WC.EVENT_SUBMISSION_CORRECTED}' AND json_valid(NEW.payload)
+     AND json_extract(NEW.payload, '$.corrected_event_type') = '{WC.EVENT_BLISTER_COMPLETE}'
+    BEGIN
+        UPDATE blister_press_events
+        SET presses = {_presses_sql("NEW.payload", "$.corrected_payload")}
+        WHERE event_id = CAST(json_extract(NEW.payload, '$.target_event_id') AS INTEGER);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_workflow_events_upd
+    AFTER UPDATE OF payload ON workflow_events
+    WHEN NEW.event_type = '{WC.EVENT_BLISTER_COMPLETE}'
+    BEGIN
+        UPDATE blister_press_events SET presses = {_presses_sql("NEW.payload")}
+        WHERE event_id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_blister_press_workflow_events_del
+    AFTER DELETE ON workflow_events
+    BEGIN
+        DELETE FROM blister_press_events WHERE event_id = OLD.id;
+    END
+    """,
+)
+
+
+def rebuild_blister_press_counters(conn: sqlite3.Connection) -> int:
+    """Recompute events and counters from ``workflow_events`` (caller commits); returns events counted."""
+    conn.execute("DELETE FROM blister_press_events")
+    conn.execute("DELETE FROM blister_press_counters")
+    cur = conn.execute(
+        f"""
+        INSERT INTO blister_press_events (event_id, station_id, presses)
+        SELECT id, station, presses FROM (
+            SELECT we.id, {_station_sql("we")} AS station, {_presses_sql("we.payload")} AS presses
+            FROM workflow_events we
+            WHERE we.event_type = ?
+        )
+        WHERE station IS NOT NULL
+        """,
+        (WC.EVENT_BLISTER_COMPLETE,),
+    )
+    counted = cur.rowcount
+    # Replay corrections oldest first so the latest one wins, as the trigger does going forward.
+    corrections = conn.execute(
+        """
+        SELECT payload FROM workflow_events
+        WHERE event_type = ? AND json_valid(payload)
+          AND json_extract(payload, '$.corrected_event_type') = ?
+        ORDER BY id
+        """,
+        (WC.EVENT_SUBMISSION_CORRECTED, WC.EVENT_BLISTER_COMPLETE),
+    ).fetchall()
+    for (payload,) in corrections:
+        conn.execute(
+            f"""
+            UPDATE blister_press_events
+            SET presses = (SELECT {_presses_sql("c.payload", "$.corrected_payload")} FROM (SELECT ? AS payload) c)
+            WHERE event_id = CAST(json_extract(?, '$.target_event_id') AS INTEGER)
+            """,
+            (payload, payload),
+        )
+    return counted
+
+
+def ensure_blister_press_counters(conn: sqlite3.Connection) -> bool:
+    """Create tables and triggers, backfilling once; False when ``workflow_events`` does not exist yet."""
+    if not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'workflow_events'"
+    ).fetchone():
+        return False
+    for ddl in BLISTER_PRESS_COUNTER_DDL:
+        conn.execute(ddl)
+    # Tables may predate the triggers (Alembic creates them empty): backfill while no event is tracked.
+    if not conn.execute("SELECT 1 FROM blister_press_events LIMIT 1").fetchone() and conn.execute(
+        "SELECT 1 FROM workflow_events WHERE event_type = ? LIMIT 1", (WC.EVENT_BLISTER_COMPLETE,)
+    ).fetchone():
+        counted = rebuild_blister_press_counters(conn)
+        if counted:
+            logger.info("blister press counters backfilled from %s event(s)", counted)
+    return True
+
+
+def _scan_press_count(conn: sqlite3.Connection, station_id: int) -> float:
+    """Sum over the station's BLISTER_COMPLETE events (before the counter table exists)."""
+    row = conn.execute(
+        """
+        SELECT COALESCE(SUM(
+            CASE
+                WHEN p_counter_end IS NOT NULL
+                 AND p_counter_start IS NOT NULL
+                 AND p_counter_end >= p_counter_start
+                THEN p_counter_end - p_counter_start
+                ELSE COALESCE(p_count_total, 0)
+            END
+        ), 0) AS presses
+        FROM workflow_events
+        WHERE event_type = 'BLISTER_COMPLETE'
+          AND (
+            station_id = ?
+            OR CAST(json_extract(payload, '$.station_id') AS INTEGER) = ?
+            OR CAST(json_extract(payload, '$.stationId') AS INTEGER) = ?
+          )
+        """,
+        (station_id, station_id, station_id),
+    ).fetchone()
+    return float(row[0] or 0)
+
+
+def blister_press_count(conn: sqlite3.Connection, station_id: int) -> float:
+    """Cumulative presses recorded for ``station_id`` (0 when it has none)."""
+    try:
+        row = conn.execute(
+            "SELECT presses FROM blister_press_counters WHERE station_id = ?", (station_id,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return _scan_press_count(conn, station_id)
+    return float(row[0]) if row else 0.0
@@ -8,6 +8,7 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+from datetime import date, timedelta
 from typing import Any
 
 _PAYLOAD_NUM = (
@@ -47,19 +48,19 @@ def ops_packaging_snapshot_reasons_sql_in() -> str:
 
 
 def sql_packaging_equiv_displays(
-    payload_col: str = "we.payload",
+    events_alias: str = "we",
     dpc_sql: str = "COALESCE(pd.displays_per_case, 0)",
 ) -> str:
-    """SQLite expr: total displays from snapshot payload + product (cases×DPC+loose or legacy)."""
-    p = payload_col
+    """
+    SQLite expr: total displays from snapshot counts + product (cases×DPC+loose or legacy).
+    Reads the typed ``p_*`` columns on ``workflow_events`` (see ``workflow_append.PAYLOAD_COLUMNS``).
+    """
+    e = events_alias
     return (
-        f"CASE WHEN json_extract({p}, '$.case_count') IS NOT NULL OR "
-        f"json_extract({p}, '$.loose_display_count') IS NOT NULL THEN "
-        f"COALESCE(CAST(json_extract({p}, '$.case_count') AS REAL), 0) * CAST(({dpc_sql}) AS REAL) + "
-        f"COALESCE(CAST(json_extract({p}, '$.loose_display_count') AS REAL), "
-        f"CAST(json_extract({p}, '$.display_count') AS REAL), 0) "
-        f"ELSE COALESCE(CAST(json_extract({p}, '$.display_count') AS REAL), "
-        f"CAST(json_extract({p}, '$.count_total') AS REAL), 0) END"
+        f"CASE WHEN {e}.p_case_count IS NOT NULL OR {e}.p_loose_display_count IS NOT NULL THEN "
+        f"COALESCE({e}.p_case_count, 0) * CAST(({dpc_sql}) AS REAL) + "
+        f"COALESCE({e}.p_loose_display_count, {e}.p_display_count, 0) "
+        f"ELSE COALESCE({e}.p_display_count, {e}.p_count_total, 0) END"
     )
 
 
@@ -100,9 +101,8 @@ def _payload_from_raw(raw: str | None) -> dict[str, Any]:
     return p if isinstance(p, dict) else {}
 
 
-def _float_from_payload(raw: str | None) -> dict[str, float | None]:
+def _float_from_payload(p: dict[str, Any]) -> dict[str, float | None]:
     out: dict[str, float | None] = {k: None for k in _PAYLOAD_NUM}
-    p = _payload_from_raw(raw)
     for k in _PAYLOAD_NUM:
         v = p.get(k)
         try:
@@ -324,11 +324,11 @@ def gather_workflow_event_rows(conn: sqlite3.Connection, start_ms: int, end_ms:
             (start_ms, end_ms, limit),
         )
         for r in q.fetchall():
-            raw_payload = dict(r)["payload"]
-            nums = _float_from_payload(str(raw_payload) if raw_payload not in (None, "") else None)
+            row = dict(r)
+            raw_payload = row["payload"]
             payload_obj = _payload_from_raw(str(raw_payload) if raw_payload not in (None, "") else None)
+            nums = _float_from_payload(payload_obj)
             payload_meta = payload_obj.get("metadata") if isinstance(payload_obj.get("metadata"), dict) else {}
-            row = dict(r)
             sid = row.get("sid")
             bid = row.get("bag_id")
             packaging_case_breakdown = (
@@ -690,7 +690,10 @@ def gather_station_analytics(
     day_start_ms: int,
     now_ms: int,
 ) -> dict[str, Any]:
-    """Station-specific current vs historical stats for focused command-center tabs."""
+    """
+    Station-specific current vs historical stats for focused command-center tabs.
+    Closed days are read from the daily rollups (``workflow_rollups``); only today is computed from events.
+    """
     station_meta: dict[int, dict[str, Any]] = {}
     for m in machines or []:
         try:
@@ -720,7 +723,13 @@ def gather_station_analytics(
     if not station_meta:
         return {"stations": {}}
 
-    start_30d = day_start_ms - (30 * 24 * 60 * 60_000)
+    from app.services.workflow_read import production_day_for_event_ms
+    from app.services.workflow_rollups import station_day_totals
+
+    one_day = 24 * 60 * 60_000
+    # Closed days come from the daily rollups; raw events are read for today plus the 7 days the
+    # runtime breakdown replays (and earlier claims that pair with today's submits).
+    start_7d = day_start_ms - (7 * one_day)
     end_ms = max(now_ms + 60_000, day_start_ms + 60_000)
     try:
         rows = conn.execute(
@@ -742,18 +751,24 @@ def gather_station_analytics(
               AND we.workflow_bag_id IS NOT NULL
             ORDER BY we.station_id, we.workflow_bag_id, we.occurred_at
             """,
-            (start_30d, end_ms),
+            (start_7d, end_ms),
         ).fetchall()
     except sqlite3.OperationalError:
         return {"stations": {str(k): dict(v) for k, v in station_meta.items()}}
 
-    one_day = 24 * 60 * 60_000
+    today = production_day_for_event_ms(day_start_ms)
+    try:
+        history = station_day_totals(conn, today - timedelta(days=30), today - timedelta(days=1))
+    except sqlite3.OperationalError:
+        history = {}
+
     daily: dict[int, list[float]] = {sid: [0.0] * 31 for sid in station_meta}
     hourly_today: dict[int, list[float]] = {sid: [0.0] * 24 for sid in station_meta}
     operator: dict[int, dict[str, dict[str, float | int | str]]] = {sid: {} for sid in station_meta}
     durations_today: dict[int, list[float]] = {sid: [] for sid in station_meta}
-    durations_7d: dict[int, list[float]] = {sid: [] for sid in station_meta}
-    durations_30d: dict[int, list[float]] = {sid: [] for sid in station_meta}
+    # (minutes, count) of closed-day cycle durations; today's are added from durations_today.
+    durations_7d: dict[int, list[float]] = {sid: [0.0, 0] for sid in station_meta}
+    durations_30d: dict[int, list[float]] = {sid: [0.0, 0] for sid in station_meta}
     events_today: dict[int, int] = {sid: 0 for sid in station_meta}
     starts: dict[tuple[int, int], tuple[int, str]] = {}
     runtime_by_station = _station_runtime_breakdown(
@@ -763,13 +778,17 @@ def gather_station_analytics(
         now_ms=now_ms,
     )
 
-    def _event_output(
-        sid: int, event_type: str, payload: dict[str, Any], displays_per_case: Any = 0
-    ) -> float:
+    def _unit_factor(sid: int) -> float:
         meta = station_meta.get(sid) or {}
         kind = str(meta.get("stationKind") or "")
         role = str(meta.get("machineRole") or "")
-        factor = float(meta.get("cardsPerTurn") or 1)
+        if kind in {"blister", "sealing"} or role in {"blister", "sealing"}:
+            return float(meta.get("cardsPerTurn") or 1)
+        return 1.0
+
+    def _event_output(
+        sid: int, event_type: str, payload: dict[str, Any], displays_per_case: Any = 0
+    ) -> float:
         et = event_type.upper()
         if et == "PACKAGING_SNAPSHOT":
             if str(payload.get("reason") or "").lower() not in _OPS_PKG_REASONS_LOWER:
@@ -781,9 +800,19 @@ def gather_station_analytics(
             count = 0.0
         if count <= 0:
             return 0.0
-        if kind in {"blister", "sealing"} or role in {"blister", "sealing"}:
-            return count * factor
-        return count
+        return count * _unit_factor(sid)
+
+    for sid in station_meta:
+        for day, m in history.get(sid, {}).items():
+            day_idx = (date.fromisoformat(day) - today).days
+            if not -30 <= day_idx < 0:
+                continue
+            daily[sid][day_idx + 30] += m["displays"] + m["units"] * _unit_factor(sid)
+            durations_30d[sid][0] += m["duration_min_sum"]
+            durations_30d[sid][1] += m["duration_n"]
+            if day_idx >= -7:
+                durations_7d[sid][0] += m["duration_min_sum"]
+                durations_7d[sid][1] += m["duration_n"]
 
     for r in rows:
         try:
@@ -805,11 +834,13 @@ def gather_station_analytics(
             continue
         if et not in _STATION_OUTPUT_EVENTS:
             continue
+        if at_ms < day_start_ms:
+            # Closed day (already in the rollups): only consume the claim it pairs with.
+            starts.pop(key, None)
+            continue
         output = _event_output(sid, et, payload, r["product_displays_per_case"])
-        day_idx = int((at_ms - day_start_ms) // one_day)
-        if -30 <= day_idx <= 0:
-            daily[sid][day_idx + 30] += output
-        if day_start_ms <= at_ms < day_start_ms + one_day:
+        if at_ms < day_start_ms + one_day:
+            daily[sid][30] += output
             hr = int((at_ms - day_start_ms) // 3600000)
             if 0 <= hr < 24:
                 hourly_today[sid][hr] += output
@@ -820,29 +851,25 @@ def gather_station_analytics(
             duration_min = (at_ms - started[0]) / 60000.0
             start_op = started[1] or op
             if 0.25 <= duration_min <= 24 * 60:
-                durations_30d[sid].append(duration_min)
-                if at_ms >= day_start_ms - (7 * one_day):
-                    durations_7d[sid].append(duration_min)
-                if at_ms >= day_start_ms:
-                    durations_today[sid].append(duration_min)
-        if at_ms >= day_start_ms:
-            bucket = operator[sid].setdefault(
-                op,
-                {"operator": op, "output": 0.0, "cycles": 0, "durationMinutes": 0.0},
+                durations_today[sid].append(duration_min)
+        bucket = operator[sid].setdefault(
+            op,
+            {"operator": op, "output": 0.0, "cycles": 0, "durationMinutes": 0.0},
+        )
+        bucket["output"] = float(bucket["output"]) + output
+        bucket["cycles"] = int(bucket["cycles"]) + 1
+        if duration_min is not None:
+            bucket["durationMinutes"] = float(bucket["durationMinutes"]) + duration_min
+        elif start_op and start_op != op:
+            prior = operator[sid].setdefault(
+                start_op,
+                {"operator": start_op, "output": 0.0, "cycles": 0, "durationMinutes": 0.0},
             )
-            bucket["output"] = float(bucket["output"]) + output
-            bucket["cycles"] = int(bucket["cycles"]) + 1
-            if duration_min is not None:
-                bucket["durationMinutes"] = float(bucket["durationMinutes"]) + duration_min
-            elif start_op and start_op != op:
-                prior = operator[sid].setdefault(
-                    start_op,
-                    {"operator": start_op, "output": 0.0, "cycles": 0, "durationMinutes": 0.0},
-                )
-                prior["durationMinutes"] = float(prior["durationMinutes"])
-
-    def _avg(vals: list[float]) -> float | None:
-        return round(sum(vals) / len(vals), 2) if vals else None
+            prior["durationMinutes"] = float(prior["durationMinutes"])
+
+    def _avg(vals: list[float], closed_sum: float = 0.0, closed_n: float = 0) -> float | None:
+        n = len(vals) + int(closed_n)
+        return round((sum(vals) + closed_sum) / n, 2) if n else None
 
     out: dict[str, Any] = {}
     elapsed_h = max(0.25, (now_ms - day_start_ms) / 3600000.0)
@@ -878,8 +905,8 @@ def gather_station_analytics(
             "dailyTrend30": trend,
             "hourlyToday": [round(x, 2) for x in hourly_today[sid]],
             "avgDurationTodayMinutes": _avg(durations_today[sid]),
-            "avgDuration7dMinutes": _avg(durations_7d[sid]),
-            "avgDuration30dMinutes": _avg(durations_30d[sid]),
+            "avgDuration7dMinutes": _avg(durations_today[sid], *durations_7d[sid]),
+            "avgDuration30dMinutes": _avg(durations_today[sid], *durations_30d[sid]),
             "runtime": runtime_by_station.get(sid)
             or {
                 "todayMinutes": {"running": 0.0, "paused": 0.0, "idle": 0.0},
@@ -0,0 +1,129 @@
+"""
+Change counters (``data_versions``) for cache keys and client polling.
+
+One row per watched table holds a counter that SQLite triggers bump on every insert, update and
+delete, in the writer's own transaction. Readers compare counters instead of running ``COUNT(*)``
+/ ``MAX()`` scans: ``GET /api/versions`` returns them, report and list caches key their entries
+on the versions of the tables they read, and the ops TV snapshot watermark includes them.
+
+Counters start at the install time in milliseconds (not 0) so a restored or recreated database
+does not reuse version numbers a long-lived cache has already seen.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable
+
+WATCHED_TABLES = (
+    "warehouse_submissions",
+    "bags",
+    "receiving",
+    "purchase_orders",
+    "workflow_events",
+    "app_settings",
+)
+
+DATA_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+_SEED_SQL = """
+    INSERT OR IGNORE INTO data_versions (name, version)
+    VALUES (?, CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))
+"""
+
+_EVENTS = (("ins", "INSERT"), ("upd", "UPDATE"), ("del", "DELETE"))
+
+# Tables whose derived columns are maintained by UPDATEs (payload repair trigger): only updates of
+# these source columns count as a change.
+_UPDATE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "workflow_events": (
+        "event_type",
+        "payload",
+        "occurred_at",
+        "workflow_bag_id",
+        "station_id",
+        "user_id",
+        "device_id",
+    ),
+}
+
+
+def trigger_name(table: str, suffix: str) -> str:
+    return f"trg_data_versions_{table}_{suffix}"
+
+
+def _trigger_ddl(table: str) -> list[tuple[str, str]]:
+    """``(trigger name, CREATE TRIGGER sql)`` per bump trigger; the sql matches sqlite_master.sql."""
+    out = []
+    for suffix, event in _EVENTS:
+        if event == "UPDATE" and table in _UPDATE_COLUMNS:
+            event = f"UPDATE OF {', '.join(_UPDATE_COLUMNS[table])}"
+        name = trigger_name(table, suffix)
+        out.append(
+            (
+                name,
+                f"""CREATE TRIGGER {name}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+        END""",
+            )
+        )
+    return out
+
+
+def ensure_data_versions(conn: sqlite3.Connection) -> list[str]:
+    """Create the table, seed counters and install triggers on the watched tables that exist; returns them."""
+    conn.execute(DATA_VERSIONS_DDL)
+    existing = {
+        row[0]
+        for row in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' for _ in WATCHED_TABLES)})",
+            WATCHED_TABLES,
+        )
+    }
+    installed = [t for t in WATCHED_TABLES if t in existing]
+    current = {
+        row[0]: row[1]
+        for row in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_data_versions_%'"
+        )
+    }
+    for table in installed:
+        conn.execute(_SEED_SQL, (table,))
+        for name, ddl in _trigger_ddl(table):
+            if current.get(name) == ddl:
+                continue
+            # Missing, or installed from an older definition (e.g. UPDATE without a column list).
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(ddl)
+    return installed
+
+
+def read_data_versions(conn: sqlite3.Connection, names: Iterable[str] | None = None) -> dict[str, int]:
+    """``{table: version}`` (all watched tables, or ``names``); empty when the table is not installed."""
+    try:
+        rows = conn.execute("SELECT name, version FROM data_versions").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    versions = {row[0]: int(row[1]) for row in rows}
+    if names is None:
+        return versions
+    return {name: versions[name] for name in names if name in versions}
+
+
+def versions_key(conn: sqlite3.Connection, names: Iterable[str]) -> str | None:
+    """
+    Compact cache-key fragment for ``names`` (``"bags=17;receiving=4"``), or None when any of them
+    is not tracked on this database — callers then fall back to their time-based behaviour.
+    """
+    names = tuple(names)
+    versions = read_data_versions(conn, names)
+    if len(versions) != len(names):
+        return None
+    return ";".join(f"{name}={versions[name]}" for name in names)
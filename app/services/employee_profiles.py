@@ -0,0 +1,139 @@
+"""
+Per-process cache of employee profiles (role, active flag, preferred language).
+
+``role_required`` and the Babel locale selector run on every request; they read this cache
+instead of opening a connection for one row. The whole (small) ``employees`` table is loaded in
+one query and kept until its **version stamp** moves: writers call ``bump_employee_profiles``
+after committing, which invalidates this process immediately and touches a stamp file next to
+the database so other gunicorn workers reload on their next lookup (an ``os.stat``, no query).
+``EMPLOYEE_PROFILE_CACHE_SECONDS`` bounds staleness for edits made outside the app.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EmployeeProfile:
+    id: int
+    username: str
+    role: str | None
+    is_active: bool
+    preferred_language: str | None
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    stamp: tuple[int, int]
+    loaded_at: float
+    by_username: dict[str, EmployeeProfile]
+    by_id: dict[int, EmployeeProfile]
+
+
+_lock = threading.Lock()
+_snapshots: dict[str, _Snapshot] = {}  # database path -> snapshot
+_local_generation = 0
+
+
+def _stamp_path(db_path: str) -> str:
+    return f"{os.path.abspath(db_path)}.employees-version"
+
+
+def _stamp(db_path: str) -> tuple[int, int]:
+    try:
+        mtime_ns = os.stat(_stamp_path(db_path)).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return (_local_generation, mtime_ns)
+
+
+def _load(db_path: str, stamp: tuple[int, int]) -> _Snapshot | None:
+    from app.utils.db_utils import db_read_only
+
+    try:
+        with db_read_only() as conn:
+            rows = conn.execute(
+                "SELECT id, username, role, is_active, preferred_language FROM employees"
+            ).fetchall()
+    except sqlite3.Error as exc:
+        logger.warning("Employee profile load failed: %s", exc)
+        return None
+    profiles = [
+        EmployeeProfile(
+            id=row["id"],
+            username=row["username"],
+            role=row["role"],
+            is_active=bool(row["is_active"]),
+            preferred_language=row["preferred_language"],
+        )
+        for row in rows
+    ]
+    return _Snapshot(
+        stamp=stamp,
+        loaded_at=time.monotonic(),
+        by_username={p.username: p for p in profiles},
+        by_id={p.id: p for p in profiles},
+    )
+
+
+def _snapshot() -> _Snapshot | None:
+    db_path = Config.DATABASE_PATH
+    stamp = _stamp(db_path)
+    snap = _snapshots.get(db_path)
+    max_age = float(Config.EMPLOYEE_PROFILE_CACHE_SECONDS)
+    if snap is not None and snap.stamp == stamp and time.monotonic() - snap.loaded_at < max_age:
+        return snap
+    with _lock:
+        snap = _snapshots.get(db_path)
+        if snap is not None and snap.stamp == stamp and time.monotonic() - snap.loaded_at < max_age:
+            return snap
+        snap = _load(db_path, stamp)
+        if snap is not None and max_age > 0:
+            _snapshots[db_path] = snap
+        return snap
+
+
+def get_employee_profile(username: str | None = None, employee_id: int | None = None) -> EmployeeProfile | None:
+    """Profile by username or id (active or not); None when unknown or the table cannot be read."""
+    snap = _snapshot()
+    if snap is None:
+        return None
+    if username is not None:
+        return snap.by_username.get(username)
+    if employee_id is None:
+        return None
+    try:
+        return snap.by_id.get(int(employee_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def bump_employee_profiles() -> None:
+    """Invalidate cached profiles in every worker; call after the employee write has committed."""
+    global _local_generation
+    with _lock:
+        _local_generation += 1
+        _snapshots.clear()
+    path = _stamp_path(Config.DATABASE_PATH)
+    try:
+        with open(path, "a", encoding="utf-8"):
+            pass
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+    except OSError as exc:
+        logger.warning("Could not touch employee profile stamp %s: %s", path, exc)
+
+
+def clear_employee_profiles() -> None:
+    """Drop this process's cache (tests)."""
+    with _lock:
+        _snapshots.clear()
@@ -121,7 +121,7 @@ def compute_production_flow_intel(
                 f"""
                 SELECT we.id, we.workflow_bag_id, we.event_type, we.payload, we.occurred_at, we.station_id,
                        COALESCE(ws.station_kind, '') AS skind,
-                       json_extract(we.payload, '$.reason') AS preason,
+                       we.p_reason AS preason,
                        COALESCE(wb.receipt_number, '') AS receipt_number,
                        COALESCE(pd.product_name, '') AS product_name
                 FROM workflow_events we
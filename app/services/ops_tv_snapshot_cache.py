@@ -0,0 +1,225 @@
+"""
+Shared, change-driven cache for the ops TV / command-center snapshot.
+
+Every wallboard polls the snapshot API every few seconds. Instead of rebuilding
+``build_ops_tv_snapshot`` per request per worker, the serialized payload is kept in one file per
+(database, factory date) next to the database, so all gunicorn workers share it. An entry is
+reused while:
+
+- its **watermark** still matches (max ``workflow_events.id`` / ``workflow_bags.id``, station and
+  machine row fingerprints, the ``app_settings`` version, and the ``data_versions`` counters for
+  workflow events and settings, which also move on updates and deletes), and
+- it is younger than the max age (the payload contains elapsed-time and pace figures, so even
+  an idle floor is rebuilt every ``OPS_TV_SNAPSHOT_MAX_AGE_SECONDS``; past dates use the much
+  longer ``OPS_TV_SNAPSHOT_PAST_MAX_AGE_SECONDS``).
+
+Each entry carries a strong ETag over the payload bytes so the API can answer ``304`` without
+touching the body.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from config import Config
+
+from app.utils import cache_utils
+
+LOGGER = logging.getLogger(__name__)
+
+# (label, SQL) parts of the watermark; each part is queried separately so a missing table on an
+# old database only blanks that part.
+_WATERMARK_PARTS: tuple[tuple[str, str], ...] = (
+    ("ev", "SELECT COALESCE(MAX(id), 0) FROM workflow_events"),
+    ("bag", "SELECT COALESCE(MAX(id), 0) FROM workflow_bags"),
+    ("st", "SELECT COUNT(*) || '.' || COALESCE(MAX(id), 0) FROM workflow_stations"),
+    (
+        "mc",
+        "SELECT COUNT(*) || '.' || COALESCE(MAX(id), 0) || '.' || COALESCE(MAX(updated_at), '') FROM machines",
+    ),
+    (
+        "set",
+        "SELECT COUNT(*) || '.' || COALESCE(MAX(id), 0) || '.' || COALESCE(MAX(updated_at), '') FROM app_settings",
+    ),
+    (
+        "dv",
+        "SELECT group_concat(version, '.') FROM (SELECT version FROM data_versions"
+        " WHERE name IN ('workflow_events', 'app_settings') ORDER BY name)",
+    ),
+)
+
+_PRUNE_AFTER_SECONDS = 2 * 86400
+
+# Parsed files are memoized in cache_utils (namespace below, key path -> (mtime_ns, entry)) so a
+# worker skips re-reading a file it already parsed; the LRU bounds one entry per viewed date.
+_MEMO_NAMESPACE = "ops_tv_files"
+_MEMO_TTL_SECONDS = 3600.0
+_BUILD_NAMESPACE = "ops_tv_build"
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    watermark: str
+    etag: str
+    built_at: float
+    body: bytes
+
+    def payload(self) -> dict[str, Any]:
+        return json.loads(self.body)
+
+
+def snapshot_watermark(conn: sqlite3.Connection) -> str:
+    """Cheap fingerprint of everything that invalidates a snapshot besides the clock."""
+    parts = []
+    for label, sql in _WATERMARK_PARTS:
+        try:
+            row = conn.execute(sql).fetchone()
+            parts.append(f"{label}={row[0] if row else ''}")
+        except sqlite3.OperationalError:
+            parts.append(f"{label}=-")
+    return ";".join(parts)
+
+
+def _cache_dir() -> str:
+    configured = (getattr(Config, "OPS_TV_SNAPSHOT_CACHE_DIR", "") or "").strip()
+    if configured:
+        return configured
+    return os.path.join(os.path.dirname(os.path.abspath(Config.DATABASE_PATH)), "snapshot_cache")
+
+
+def _entry_path(date_label: str) -> str:
+    db_tag = hashlib.sha1(os.path.realpath(Config.DATABASE_PATH).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(_cache_dir(), f"ops_tv_{db_tag}_{date_label}.snap")
+
+
+def _read_entry(path: str) -> SnapshotEntry | None:
+    """File layout: one JSON header line (watermark, etag, built_at) then the payload bytes."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    memo = cache_utils.get(path, namespace=_MEMO_NAMESPACE)
+    if memo and memo[0] == mtime_ns:
+        return memo[1]
+    try:
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            body = fh.read()
+        entry = SnapshotEntry(
+            watermark=str(header["watermark"]),
+            etag=str(header["etag"]),
+            built_at=float(header["built_at"]),
+            body=body,
+        )
+    except (OSError, ValueError, KeyError):
+        return None
+    cache_utils.set(path, (mtime_ns, entry), _MEMO_TTL_SECONDS, namespace=_MEMO_NAMESPACE)
+    return entry
+
+
+def _write_entry(path: str, entry: SnapshotEntry) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    header = json.dumps({"watermark": entry.watermark, "etag": entry.etag, "built_at": entry.built_at})
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".ops_tv_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(header.encode("utf-8") + b"\n" + entry.body)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _prune(directory)
+
+
+def _prune(directory: str) -> None:
+    """Drop entries for dates nobody has looked at recently (past-date views create one file each)."""
+    cutoff = time.time() - _PRUNE_AFTER_SECONDS
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith("ops_tv_"):
+            continue
+        full = os.path.join(directory, name)
+        try:
+            if os.stat(full).st_mtime < cutoff:
+                os.remove(full)
+        except OSError:
+            continue
+
+
+def _fresh(entry: SnapshotEntry | None, watermark: str, max_age: float) -> bool:
+    return bool(entry and entry.watermark == watermark and time.time() - entry.built_at < max_age)
+
+
+def serialize_snapshot(payload: dict[str, Any], watermark: str) -> SnapshotEntry:
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    etag = hashlib.sha1(body).hexdigest()[:24]
+    return SnapshotEntry(watermark=watermark, etag=etag, built_at=time.time(), body=body)
+
+
+def get_snapshot(
+    conn: sqlite3.Connection,
+    date_label: str,
+    is_today: bool,
+    build: Callable[[], dict[str, Any]],
+) -> SnapshotEntry:
+    """
+    Return the cached snapshot for ``date_label`` or call ``build()`` and store the result.
+    Concurrent requests in one worker wait for a single build; other workers pick the file up.
+    """
+    watermark = snapshot_watermark(conn)
+    if not getattr(Config, "OPS_TV_SNAPSHOT_CACHE_ENABLED", True):
+        return serialize_snapshot(build(), watermark)
+
+    max_age = float(
+        Config.OPS_TV_SNAPSHOT_MAX_AGE_SECONDS if is_today else Config.OPS_TV_SNAPSHOT_PAST_MAX_AGE_SECONDS
+    )
+    path = _entry_path(date_label)
+    entry = _read_entry(path)
+    if _fresh(entry, watermark, max_age):
+        return entry
+
+    def rebuild() -> SnapshotEntry:
+        current = _read_entry(path)
+        if _fresh(current, watermark, max_age):
+            return current
+        current = serialize_snapshot(build(), watermark)
+        try:
+            _write_entry(path, current)
+        except OSError:
+            LOGGER.warning("ops TV snapshot cache write failed for %s", path, exc_info=True)
+        return current
+
+    return cache_utils.single_flight((path, watermark), rebuild, namespace=_BUILD_NAMESPACE)
+
+
+def clear() -> None:
+    """Forget in-process state and remove this database's cache files (tests, admin resets)."""
+    cache_utils.invalidate(_MEMO_NAMESPACE)
+    prefix = os.path.basename(_entry_path("")).rsplit("_", 1)[0]
+    directory = _cache_dir()
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
@@ -18,6 +18,7 @@ from app.services.command_center_metrics_inputs import (
     ops_packaging_snapshot_reasons_sql_in,
     sql_packaging_equiv_displays,
 )
+from app.utils.schema_registry import has_column
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -56,14 +57,7 @@ def _inventory_po_options_like_receives(conn: sqlite3.Connection) -> list[dict[s
     merge hid POs whenever workflow rows lacked a resolved ``po_number``.
     """
     vendor_expr = "trim(COALESCE(po.vendor_name, ''))"
-    try:
-        cols = [
-            str(r["name"])
-            for r in conn.execute("PRAGMA table_info(purchase_orders)").fetchall()
-        ]
-        if "vendor_name" not in cols:
-            vendor_expr = "''"
-    except sqlite3.OperationalError:
+    if not has_column(conn, "purchase_orders", "vendor_name"):
         vendor_expr = "''"
     try:
         rows = conn.execute(
@@ -99,14 +93,6 @@ def _inventory_po_options_like_receives(conn: sqlite3.Connection) -> list[dict[s
     return out
 
 
-def _table_has_column(conn: sqlite3.Connection, table_name: str, column_name: str) -> bool:
-    try:
-        cols = [str(r["name"]) for r in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
-    except sqlite3.OperationalError:
-        return False
-    return column_name in cols
-
-
 def _count_finalize_events(conn: sqlite3.Connection, start_ms: int, end_ms: int) -> int:
     try:
         r = conn.execute(
@@ -130,9 +116,9 @@ def _sum_tablets_blister_sealing(conn: sqlite3.Connection, start_ms: int, end_ms
             SELECT COALESCE(SUM(
               CASE
                 WHEN event_type = 'BLISTER_COMPLETE' THEN
-                  COALESCE(CAST(json_extract(payload, '$.count_total') AS REAL), 0)
+                  COALESCE(p_count_total, 0)
                 WHEN event_type = 'SEALING_COMPLETE' THEN
-                  COALESCE(CAST(json_extract(payload, '$.count_total') AS REAL), 0)
+                  COALESCE(p_count_total, 0)
                 ELSE 0
               END
             ), 0) AS v
@@ -164,7 +150,7 @@ def _sum_tablets_packaging_final(conn: sqlite3.Connection, start_ms: int, end_ms
             LEFT JOIN product_details pd ON pd.id = wb.product_id
             WHERE we.occurred_at >= ? AND we.occurred_at < ?
               AND we.event_type = 'PACKAGING_SNAPSHOT'
-              AND json_extract(we.payload, '$.reason') IN ({rin})
+              AND we.p_reason IN ({rin})
             """,
             (start_ms, end_ms),
         ).fetchone()
@@ -187,7 +173,7 @@ def _median_cycle_min(conn: sqlite3.Connection, start_ms: int, end_ms: int) -> f
                     event_type = 'BAG_FINALIZED'
                     OR (
                       event_type = 'PACKAGING_SNAPSHOT'
-                      AND json_extract(payload, '$.reason') = 'final_submit'
+                      AND p_reason = 'final_submit'
                     )
                   )
                 GROUP BY workflow_bag_id
@@ -383,20 +369,20 @@ def build_pill_command_center_board_payload(
                    COUNT(DISTINCT we.workflow_bag_id) AS bags_ct,
                    SUM(
                      CASE
-                       WHEN json_extract(we.payload, '$.case_count') IS NOT NULL
-                         OR json_extract(we.payload, '$.loose_display_count') IS NOT NULL
+                       WHEN we.p_case_count IS NOT NULL
+                         OR we.p_loose_display_count IS NOT NULL
                        THEN
-                         COALESCE(CAST(json_extract(we.payload, '$.case_count') AS REAL), 0)
+                         COALESCE(we.p_case_count, 0)
                            * COALESCE(CAST(pd.displays_per_case AS REAL), 0)
                          + COALESCE(
-                             CAST(json_extract(we.payload, '$.loose_display_count') AS REAL),
-                             CAST(json_extract(we.payload, '$.display_count') AS REAL),
+                             we.p_loose_display_count,
+                             we.p_display_count,
                              0
                            )
                        ELSE
                          COALESCE(
-                           CAST(json_extract(we.payload, '$.display_count') AS REAL),
-                           CAST(json_extract(we.payload, '$.count_total') AS REAL),
+                           we.p_display_count,
+                           we.p_count_total,
                            0
                          )
                      END
@@ -406,24 +392,24 @@ def build_pill_command_center_board_payload(
             LEFT JOIN product_details pd ON pd.id = wb.product_id
             WHERE we.occurred_at >= ? AND we.occurred_at < ?
               AND we.event_type = 'PACKAGING_SNAPSHOT'
-              AND json_extract(we.payload, '$.reason') IN ({_pkg_rin})
+              AND we.p_reason IN ({_pkg_rin})
             GROUP BY wb.product_id
             HAVING SUM(
                      CASE
-                       WHEN json_extract(we.payload, '$.case_count') IS NOT NULL
-                         OR json_extract(we.payload, '$.loose_display_count') IS NOT NULL
+                       WHEN we.p_case_count IS NOT NULL
+                         OR we.p_loose_display_count IS NOT NULL
                        THEN
-                         COALESCE(CAST(json_extract(we.payload, '$.case_count') AS REAL), 0)
+                         COALESCE(we.p_case_count, 0)
                            * COALESCE(CAST(pd.displays_per_case AS REAL), 0)
                          + COALESCE(
-                             CAST(json_extract(we.payload, '$.loose_display_count') AS REAL),
-                             CAST(json_extract(we.payload, '$.display_count') AS REAL),
+                             we.p_loose_display_count,
+                             we.p_display_count,
                              0
                            )
                        ELSE
                          COALESCE(
-                           CAST(json_extract(we.payload, '$.display_count') AS REAL),
-                           CAST(json_extract(we.payload, '$.count_total') AS REAL),
+                           we.p_display_count,
+                           we.p_count_total,
                            0
                          )
                      END
@@ -453,10 +439,10 @@ def build_pill_command_center_board_payload(
 
     inventory_rows: list[dict] = []
     try:
-        shipment_expr = "COALESCE(rc.shipment_number, 1)" if _table_has_column(conn, "receiving", "shipment_number") else "1"
-        receiving_closed_filter = "AND COALESCE(rc.closed, 0) = 0" if _table_has_column(conn, "receiving", "closed") else ""
-        receiving_status_filter = "AND COALESCE(rc.status, 'published') = 'published'" if _table_has_column(conn, "receiving", "status") else ""
-        bag_status_filter = "AND COALESCE(bg.status, 'Available') != 'Closed'" if _table_has_column(conn, "bags", "status") else ""
+        shipment_expr = "COALESCE(rc.shipment_number, 1)" if has_column(conn, "receiving", "shipment_number") else "1"
+        receiving_closed_filter = "AND COALESCE(rc.closed, 0) = 0" if has_column(conn, "receiving", "closed") else ""
+        receiving_status_filter = "AND COALESCE(rc.status, 'published') = 'published'" if has_column(conn, "receiving", "status") else ""
+        bag_status_filter = "AND COALESCE(bg.status, 'Available') != 'Closed'" if has_column(conn, "bags", "status") else ""
         for r in conn.execute(
             f"""
             SELECT COALESCE(pd.product_name, '—') AS sku,
@@ -637,7 +623,7 @@ def build_pill_command_center_board_payload(
                    SUM(
                      CASE
                        WHEN we.event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE')
-                       THEN COALESCE(CAST(json_extract(we.payload, '$.count_total') AS REAL), 0)
+                       THEN COALESCE(we.p_count_total, 0)
                        ELSE 0
                      END
                    ) AS units_done
@@ -650,7 +636,7 @@ def build_pill_command_center_board_payload(
                 OR SUM(
                      CASE
                        WHEN we.event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE')
-                       THEN COALESCE(CAST(json_extract(we.payload, '$.count_total') AS REAL), 0)
+                       THEN COALESCE(we.p_count_total, 0)
                        ELSE 0
                      END
                    ) > 0
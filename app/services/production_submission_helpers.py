@@ -18,6 +18,7 @@ from app.utils.receive_tracking import (
     find_bag_for_submission_for_product,
 )
 from app.utils.route_helpers import get_setting
+from app.utils.schema_registry import has_column, table_columns
 
 
 class ProductionSubmissionError(Exception):
@@ -520,29 +521,12 @@ def _packaged_admin_notes(data):
     return normalize_optional_text(data.get('packaged_admin_notes') or data.get('admin_notes') or '')
 
 
-def _ensure_packaging_case_columns(conn) -> dict[str, bool]:
-    """Ensure optional packaging case columns exist on warehouse_submissions."""
-    try:
-        columns = {row[1] for row in conn.execute('PRAGMA table_info(warehouse_submissions)').fetchall()}
-    except Exception:
-        columns = set()
-    has_case_count = 'case_count' in columns
-    has_loose_display_count = 'loose_display_count' in columns
-    if not has_case_count:
-        try:
-            conn.execute('ALTER TABLE warehouse_submissions ADD COLUMN case_count INTEGER DEFAULT 0')
-            has_case_count = True
-        except sqlite3.OperationalError:
-            pass
-    if not has_loose_display_count:
-        try:
-            conn.execute('ALTER TABLE warehouse_submissions ADD COLUMN loose_display_count INTEGER DEFAULT 0')
-            has_loose_display_count = True
-        except sqlite3.OperationalError:
-            pass
+def _packaging_case_columns(conn) -> dict[str, bool]:
+    """Which optional packaging case columns warehouse_submissions has (added by MigrationRunner)."""
+    columns = table_columns(conn, 'warehouse_submissions')
     return {
-        'case_count': has_case_count,
-        'loose_display_count': has_loose_display_count,
+        'case_count': 'case_count' in columns,
+        'loose_display_count': 'loose_display_count' in columns,
     }
 
 
@@ -605,7 +589,7 @@ def execute_packaged_submission(conn, data, employee_name: str) -> dict:
         raise ProductionSubmissionError(400, {'error': error_msg})
 
     product = dict(product)
-    case_columns = _ensure_packaging_case_columns(conn)
+    case_columns = _packaging_case_columns(conn)
 
     packages_per_display = product.get('packages_per_display')
     tablets_per_package = product.get('tablets_per_package')
@@ -870,21 +854,12 @@ def execute_packaged_submission(conn, data, employee_name: str) -> dict:
             },
         )
 
-    try:
-        columns = [row[1] for row in conn.execute('PRAGMA table_info(warehouse_submissions)').fetchall()]
-        if 'inventory_item_id' not in columns:
-            current_app.logger.error('inventory_item_id column missing from warehouse_submissions table')
-            try:
-                conn.execute('ALTER TABLE warehouse_submissions ADD COLUMN inventory_item_id TEXT')
-                current_app.logger.info('Added inventory_item_id column to warehouse_submissions')
-            except Exception as alter_error:
-                current_app.logger.error(f'Failed to add inventory_item_id column: {alter_error}')
-                raise ProductionSubmissionError(
-                    500,
-                    {'error': 'Database schema error: inventory_item_id column missing. Please run migration script.'},
-                ) from alter_error
-    except Exception as pragma_error:
-        current_app.logger.error(f'Error checking table schema: {pragma_error}')
+    if not has_column(conn, 'warehouse_submissions', 'inventory_item_id'):
+        current_app.logger.error('inventory_item_id column missing from warehouse_submissions table')
+        raise ProductionSubmissionError(
+            500,
+            {'error': 'Database schema error: inventory_item_id column missing. Please run migration script.'},
+        )
 
     bag_start_for_order = None
     try:
@@ -5,6 +5,7 @@ Receiving service for business logic related to receiving operations.
 from collections.abc import Sequence
 from typing import Any
 
+from app.services.bag_ledger import bag_ledger_counts
 from app.services.zoho_service import parse_zoho_item_weight_grams, zoho_api
 from app.utils.db_utils import BagRepository, ReceivingRepository, db_read_only, db_transaction
 
@@ -252,52 +253,9 @@ def get_bag_with_packaged_count(bag_id: int) -> dict[str, Any] | None:
             receive_number = receive_number_row['receive_number'] if receive_number_row else 1
             bag['receive_name'] = f"{bag['po_number']}-{receive_number}"
 
-        # Calculate packaged_count from ALL submission types
-        # Packaged submissions (card products)
-        packaged_count_row = conn.execute(
-            '''
-            SELECT COALESCE(SUM(
-                (COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +
-                (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0)) +
-                COALESCE(ws.loose_tablets, 0)
-            ), 0) as total_packaged
-            FROM warehouse_submissions ws
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            WHERE ws.bag_id = ?
-            AND ws.submission_type = 'packaged'
-        ''',
-            (bag_id,),
-        ).fetchone()
-
-        # Bottle submissions (bottle-only products with bag_id)
-        bottle_direct_row = conn.execute(
-            '''
-            SELECT COALESCE(SUM(
-                COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
-            ), 0) as total_bottle
-            FROM warehouse_submissions ws
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            WHERE ws.submission_type = 'bottle' AND ws.bag_id = ?
-        ''',
-            (bag_id,),
-        ).fetchone()
-
-        # Variety pack deductions via junction table
-        bottle_junction_row = conn.execute(
-            '''
-            SELECT COALESCE(SUM(sbd.tablets_deducted), 0) as total_junction
-            FROM submission_bag_deductions sbd
-            WHERE sbd.bag_id = ?
-        ''',
-            (bag_id,),
-        ).fetchone()
-
-        # Total packaged = packaged + bottles + variety pack deductions
-        bag['packaged_count'] = (
-            (packaged_count_row['total_packaged'] if packaged_count_row else 0)
-            + (bottle_direct_row['total_bottle'] if bottle_direct_row else 0)
-            + (bottle_junction_row['total_junction'] if bottle_junction_row else 0)
-        )
+        # Packaged + bottle + variety pack deductions, maintained in bag_ledger
+        ledger = bag_ledger_counts(conn, [bag_id]).get(int(bag_id), {})
+        bag['packaged_count'] = ledger.get('packaged_count', 0)
 
         return bag
 
@@ -305,48 +263,9 @@ def get_bag_with_packaged_count(bag_id: int) -> dict[str, Any] | None:
 def get_packaged_counts_for_bag_ids(conn, bag_ids: Sequence[int]) -> dict[int, int]:
     """
     Batch packaged tablet totals per bag, matching get_bag_with_packaged_count
-    (packaged + bottle + variety-pack deductions).
+    (packaged + bottle + variety-pack deductions, read from bag_ledger).
     """
-    ids = [int(b) for b in bag_ids if b is not None]
-    if not ids:
-        return {}
-    placeholders = ','.join('?' * len(ids))
-    rows = conn.execute(
-        f'''
-        SELECT b.id AS bag_id,
-               (
-                 COALESCE((
-                   SELECT SUM(
-                     (COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +
-                     (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0)) +
-                     COALESCE(ws.loose_tablets, 0)
-                   )
-                   FROM warehouse_submissions ws
-                   LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-                   WHERE ws.bag_id = b.id AND ws.submission_type = 'packaged'
-                 ), 0) +
-                 COALESCE((
-                   SELECT SUM(COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0))
-                   FROM warehouse_submissions ws
-                   LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-                   WHERE ws.submission_type = 'bottle' AND ws.bag_id = b.id
-                 ), 0) +
-                 COALESCE((
-                   SELECT SUM(sbd.tablets_deducted)
-                   FROM submission_bag_deductions sbd
-                   WHERE sbd.bag_id = b.id
-                 ), 0)
-               ) AS packaged_count
-        FROM bags b
-        WHERE b.id IN ({placeholders})
-        ''',
-        tuple(ids),
-    ).fetchall()
-    out: dict[int, int] = {}
-    for row in rows:
-        d = dict(row)
-        out[int(d['bag_id'])] = int(d['packaged_count'] or 0)
-    return out
+    return {bag_id: int(row['packaged_count'] or 0) for bag_id, row in bag_ledger_counts(conn, bag_ids).items()}
 
 
 def extract_shipment_number(receive_name: str | None) -> str:
@@ -9,50 +9,16 @@ from __future__ import annotations
 import json
 from typing import Any
 
+from app.services.bag_ledger import bag_ledger_counts
+
 # Allocation JSON version stored in warehouse_submissions.repack_bag_allocations
 ALLOCATION_VERSION = 1
 
 
 def _packaged_tablets_for_bag(conn, bag_id: int) -> int:
-    """Good tablets already packaged from a bag (same logic as receiving_service.get_bag_with_packaged_count)."""
-    packaged_count_row = conn.execute(
-        """
-        SELECT COALESCE(SUM(
-            (COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +
-            (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0)) +
-            COALESCE(ws.loose_tablets, 0)
-        ), 0) as total_packaged
-        FROM warehouse_submissions ws
-        LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-        WHERE ws.bag_id = ?
-        AND ws.submission_type = 'packaged'
-        """,
-        (bag_id,),
-    ).fetchone()
-    bottle_direct_row = conn.execute(
-        """
-        SELECT COALESCE(SUM(
-            COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
-        ), 0) as total_bottle
-        FROM warehouse_submissions ws
-        LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-        WHERE ws.submission_type = 'bottle' AND ws.bag_id = ?
-        """,
-        (bag_id,),
-    ).fetchone()
-    bottle_junction_row = conn.execute(
-        """
-        SELECT COALESCE(SUM(sbd.tablets_deducted), 0) as total_junction
-        FROM submission_bag_deductions sbd
-        WHERE sbd.bag_id = ?
-        """,
-        (bag_id,),
-    ).fetchone()
-    return (
-        (packaged_count_row["total_packaged"] if packaged_count_row else 0)
-        + (bottle_direct_row["total_bottle"] if bottle_direct_row else 0)
-        + (bottle_junction_row["total_junction"] if bottle_junction_row else 0)
-    )
+    """Good tablets already packaged from a bag (``bag_ledger.packaged_count``, as on receiving pages)."""
+    row = bag_ledger_counts(conn, [bag_id]).get(int(bag_id))
+    return row["packaged_count"] if row else 0
 
 
 def _cards_reopened_for_bag(conn, bag_id: int) -> int:
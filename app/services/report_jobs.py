@@ -0,0 +1,374 @@
+"""
+Background PDF report jobs (``report_jobs`` queue in SQLite, rendered by a process pool).
+
+``submit_report_job`` records a job and returns it; ``dispatch_report_jobs`` hands the queue to a
+long-lived spawn process pool whose workers claim queued rows one at a time (``BEGIN IMMEDIATE``
++ ``UPDATE ... RETURNING``), so several app workers can share one queue without a broker.
+Workers publish progress on the job row while ``ProductionReportGenerator`` loads data and draws
+pages; a running job whose row has not moved for ``REPORT_JOB_TIMEOUT_SECONDS`` is re-queued once
+and then failed, either when the next job is claimed or when its status is polled.
+
+Finished PDFs are files named by a cache key over the normalized parameters and the
+``data_versions`` of the tables reports read. An identical request while those versions are
+unchanged (and the file is younger than ``REPORT_CACHE_MAX_AGE_SECONDS``, which bounds staleness
+of shipment fields) is answered from the file without queueing; an identical request while one
+is queued or running joins that job.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from config import Config
+
+from app.services import sqlite_work_queue as work_queue
+from app.services.data_versions import versions_key
+from app.services.reporting_analytics_service import REPORT_VERSION_TABLES
+from app.utils.spawn_pool import SpawnPool
+
+logger = logging.getLogger(__name__)
+
+REPORT_TYPES = ("production", "vendor", "receive")
+ACTIVE_STATUSES = ("queued", "running")
+_MAX_ATTEMPTS = 2
+_PROGRESS_INTERVAL_SECONDS = 0.25
+
+REPORT_JOBS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS report_jobs (
+        id TEXT PRIMARY KEY,
+        report_type TEXT NOT NULL,
+        params TEXT NOT NULL,
+        cache_key TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress REAL NOT NULL DEFAULT 0,
+        message TEXT,
+        filename TEXT,
+        result_path TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT,
+        updated_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_report_jobs_status ON report_jobs(status, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_report_jobs_cache_key ON report_jobs(cache_key)",
+)
+
+# Columns returned to API clients.
+_PUBLIC_FIELDS = (
+    "id",
+    "report_type",
+    "status",
+    "progress",
+    "message",
+    "filename",
+    "error",
+    "created_at",
+    "started_at",
+    "finished_at",
+)
+
+
+def ensure_report_jobs(conn: sqlite3.Connection) -> None:
+    for ddl in REPORT_JOBS_DDL:
+        conn.execute(ddl)
+
+
+def utc_now_text() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _valid_date(value: Any, field: str) -> str | None:
+    if not value:
+        return None
+    try:
+        datetime.strptime(str(value), "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid {field} format. Use YYYY-MM-DD") from None
+    return str(value)
+
+
+def normalize_report_params(data: dict[str, Any]) -> dict[str, Any]:
+    """Validate a report request body; raises ValueError with the message the API returns."""
+    report_type = data.get("report_type") or "production"
+    if report_type not in REPORT_TYPES:
+        report_type = "production"
+    params: dict[str, Any] = {"report_type": report_type}
+    if report_type == "receive":
+        if not data.get("receive_id"):
+            raise ValueError("Receive ID is required for receive reports")
+        try:
+            params["receive_id"] = int(data["receive_id"])
+        except (TypeError, ValueError):
+            raise ValueError("Receive ID must be an integer") from None
+        return params
+    params["start_date"] = _valid_date(data.get("start_date"), "start_date")
+    params["end_date"] = _valid_date(data.get("end_date"), "end_date")
+    params["po_numbers"] = sorted({str(p) for p in (data.get("po_numbers") or []) if p}) or None
+    params["tablet_type_id"] = data.get("tablet_type_id") or None
+    return params
+
+
+def report_filename(report_type: str) -> str:
+    return f"{report_type}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+
+def render_report(db_path: str, params: dict[str, Any], progress=None) -> bytes:
+    """Render the PDF for normalized ``params`` (same calls the synchronous endpoint makes)."""
+    from app.services.report_service import ProductionReportGenerator
+
+    generator = ProductionReportGenerator(db_path=db_path, progress=progress)
+    if params["report_type"] == "receive":
+        return generator.generate_receive_report(receive_id=params["receive_id"])
+    render = generator.generate_vendor_report if params["report_type"] == "vendor" else generator.generate_production_report
+    return render(
+        start_date=params["start_date"],
+        end_date=params["end_date"],
+        po_numbers=params["po_numbers"],
+        tablet_type_id=params["tablet_type_id"],
+    )
+
+
+# --- result cache --------------------------------------------------------------------------
+
+
+def _cache_dir() -> str:
+    configured = (getattr(Config, "REPORT_CACHE_DIR", "") or "").strip()
+    if configured:
+        return configured
+    return os.path.join(os.path.dirname(os.path.abspath(Config.DATABASE_PATH)), "report_cache")
+
+
+def report_cache_key(conn: sqlite3.Connection, params: dict[str, Any]) -> str | None:
+    """Key over parameters + data versions; None (no caching) on databases without data_versions."""
+    versions = versions_key(conn, REPORT_VERSION_TABLES)
+    if versions is None:
+        return None
+    raw = json.dumps({"params": params, "versions": versions}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+
+def _result_path(cache_dir: str, name: str) -> str:
+    return os.path.join(cache_dir, f"report_{name}.pdf")
+
+
+def cached_report_path(cache_key: str | None, cache_dir: str | None = None) -> str | None:
+    if not cache_key:
+        return None
+    path = _result_path(cache_dir or _cache_dir(), cache_key)
+    try:
+        age = time.time() - os.stat(path).st_mtime
+    except OSError:
+        return None
+    return path if age < float(Config.REPORT_CACHE_MAX_AGE_SECONDS) else None
+
+
+def store_report(name: str, pdf: bytes, cache_dir: str | None = None) -> str:
+    """Write ``pdf`` atomically as ``report_<name>.pdf``; returns the path."""
+    directory = cache_dir or _cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = _result_path(directory, name)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".report_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(pdf)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def prune_report_results(conn: sqlite3.Connection, cache_dir: str | None = None) -> int:
+    """Delete result files and finished job rows older than REPORT_RESULT_RETENTION_SECONDS."""
+    retention = float(Config.REPORT_RESULT_RETENTION_SECONDS)
+    directory = cache_dir or _cache_dir()
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    cutoff = time.time() - retention
+    for name in names:
+        if not name.startswith("report_"):
+            continue
+        full = os.path.join(directory, name)
+        try:
+            if os.stat(full).st_mtime < cutoff:
+                os.remove(full)
+                removed += 1
+        except OSError:
+            continue
+    before = (datetime.now(timezone.utc) - timedelta(seconds=retention)).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("DELETE FROM report_jobs WHERE status IN ('done', 'failed') AND created_at < ?", (before,))
+    return removed
+
+
+# --- queue -----------------------------------------------------------------------------------
+
+
+def public_job(row: sqlite3.Row | dict[str, Any] | None) -> dict[str, Any] | None:
+    if row is None:
+        return None
+    job = dict(row)
+    return {key: job.get(key) for key in _PUBLIC_FIELDS}
+
+
+def get_report_job(conn: sqlite3.Connection, job_id: str) -> dict[str, Any] | None:
+    try:
+        row = conn.execute("SELECT * FROM report_jobs WHERE id = ?", (job_id,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return dict(row) if row else None
+
+
+def submit_report_job(conn: sqlite3.Connection, params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Record a job for normalized ``params`` and return its row. A fresh cached result yields a job
+    that is already ``done``; an identical queued/running job is returned instead of a new one.
+    The caller commits, then calls ``dispatch_report_jobs`` when the status is ``queued``.
+    """
+    cache_key = report_cache_key(conn, params)
+    if cache_key:
+        active = conn.execute(
+            "SELECT * FROM report_jobs WHERE cache_key = ? AND status IN ('queued', 'running') ORDER BY created_at LIMIT 1",
+            (cache_key,),
+        ).fetchone()
+        if active:
+            return dict(active)
+    now = utc_now_text()
+    job = {
+        "id": uuid.uuid4().hex,
+        "report_type": params["report_type"],
+        "params": json.dumps(params, sort_keys=True),
+        "cache_key": cache_key,
+        "status": "queued",
+        "progress": 0.0,
+        "message": "Queued",
+        "filename": report_filename(params["report_type"]),
+        "result_path": None,
+        "created_at": now,
+        "finished_at": None,
+        "updated_at": now,
+    }
+    cached = cached_report_path(cache_key)
+    if cached:
+        job.update(status="done", progress=1.0, message="Served from cache", result_path=cached, finished_at=now)
+    columns = list(job)
+    conn.execute(
+        f"INSERT INTO report_jobs ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [job[c] for c in columns],
+    )
+    return job
+
+
+def _stale_cutoff() -> str:
+    return (datetime.now(timezone.utc) - timedelta(seconds=float(Config.REPORT_JOB_TIMEOUT_SECONDS))).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def job_is_stale(job: dict[str, Any]) -> bool:
+    """True for a running job whose worker has not touched the row within the timeout."""
+    return job.get("status") == "running" and (job.get("updated_at") or "") < _stale_cutoff()
+
+
+def requeue_stale_jobs(conn: sqlite3.Connection) -> None:
+    """Running jobs whose worker stopped reporting: retry once, then fail."""
+    cutoff = _stale_cutoff()
+    conn.execute(
+        """
+        UPDATE report_jobs
+        SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END,
+            error = CASE WHEN attempts < ? THEN error ELSE 'Worker stopped responding' END,
+            message = CASE WHEN attempts < ? THEN 'Re-queued' ELSE 'Failed' END,
+            updated_at = ?
+        WHERE status = 'running' AND updated_at < ?
+        """,
+        (_MAX_ATTEMPTS, _MAX_ATTEMPTS, _MAX_ATTEMPTS, utc_now_text(), cutoff),
+    )
+
+
+_CLAIM_SQL = """
+    UPDATE report_jobs
+    SET status = 'running', attempts = attempts + 1, started_at = ?, updated_at = ?, message = 'Started'
+    WHERE id = (SELECT id FROM report_jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1)
+    RETURNING id, params, cache_key
+"""
+
+
+def _claim_next(conn: sqlite3.Connection) -> sqlite3.Row | None:
+    now = utc_now_text()
+    return work_queue.claim_next(conn, _CLAIM_SQL, (now, now), reclaim=requeue_stale_jobs)
+
+
+def _run_job(conn: sqlite3.Connection, db_path: str, cache_dir: str, job: sqlite3.Row) -> None:
+    last = [0.0]
+
+    def progress(fraction: float, message: str) -> None:
+        now = time.monotonic()
+        if now - last[0] < _PROGRESS_INTERVAL_SECONDS:
+            return
+        last[0] = now
+        try:
+            conn.execute(
+                "UPDATE report_jobs SET progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                (round(fraction, 3), message, utc_now_text(), job["id"]),
+            )
+        except sqlite3.OperationalError:
+            logger.debug("report job %s progress write skipped", job["id"], exc_info=True)
+
+    try:
+        pdf = render_report(db_path, json.loads(job["params"]), progress=progress)
+        path = store_report(job["cache_key"] or job["id"], pdf, cache_dir)
+    except Exception as exc:
+        logger.exception("report job %s failed", job["id"])
+        conn.execute(
+            "UPDATE report_jobs SET status = 'failed', error = ?, message = 'Failed', finished_at = ?, updated_at = ? WHERE id = ?",
+            (str(exc), utc_now_text(), utc_now_text(), job["id"]),
+        )
+        return
+    now = utc_now_text()
+    conn.execute(
+        """
+        UPDATE report_jobs
+        SET status = 'done', progress = 1, message = 'Done', result_path = ?, finished_at = ?, updated_at = ?
+        WHERE id = ?
+        """,
+        (path, now, now, job["id"]),
+    )
+
+
+def run_report_jobs(db_path: str, cache_dir: str, max_jobs: int | None = None) -> int:
+    """Claim and render queued jobs until the queue is empty (or ``max_jobs``); returns jobs run."""
+    return work_queue.drain(
+        db_path,
+        _claim_next,
+        lambda conn, job: _run_job(conn, db_path, cache_dir, job),
+        max_rows=max_jobs,
+        cleanup=lambda conn: prune_report_results(conn, cache_dir),
+    )
+
+
+_process_pool = SpawnPool()
+
+
+def dispatch_report_jobs(db_path: str | None = None) -> None:
+    """Wake one pool worker to drain the queue (call after the submitting transaction commits)."""
+    pool = _process_pool.get(max(1, int(Config.REPORT_JOB_WORKERS)))
+    pool.submit(run_report_jobs, db_path or Config.DATABASE_PATH, _cache_dir())
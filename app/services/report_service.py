@@ -7,6 +7,7 @@ Generates comprehensive PO lifecycle reports with detailed production metrics
 import io
 import logging
 import sqlite3
+from collections.abc import Callable
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
@@ -33,13 +34,33 @@ def _safe_close(resource, label: str) -> None:
 class ProductionReportGenerator:
     """Generates comprehensive production cycle reports with detailed metrics"""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, progress: Callable[[float, str], None] | None = None):
+        """``progress(fraction, message)`` is called as data loads and pages render (background jobs)."""
         from config import Config
 
         self.db_path = db_path or Config.DATABASE_PATH
+        self.progress = progress
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
 
+    def _report_progress(self, fraction: float, message: str) -> None:
+        if self.progress is not None:
+            self.progress(min(max(fraction, 0.0), 1.0), message)
+
+    def _build_with_progress(self, doc: SimpleDocTemplate, story: list, expected_pages: int) -> None:
+        """doc.build reporting 0.6 -> 0.95 as pages are drawn (``expected_pages`` is an estimate)."""
+        if self.progress is None:
+            doc.build(story)
+            return
+        self._report_progress(0.6, "Rendering PDF")
+        expected = max(1, expected_pages)
+
+        def on_page(canvas, _doc):
+            page = canvas.getPageNumber()
+            self._report_progress(0.6 + 0.35 * min(1.0, page / expected), f"Rendered page {page}")
+
+        doc.build(story, onFirstPage=on_page, onLaterPages=on_page)
+
     def _setup_custom_styles(self):
         """Setup custom paragraph styles for the report"""
         self.styles.add(
@@ -131,6 +152,7 @@ class ProductionReportGenerator:
             story.append(Spacer(1, 10))
 
             # Get report data
+            self._report_progress(0.05, "Loading report data")
             report_data = self._get_report_data(start_date, end_date, po_numbers, tablet_type_id)
 
             # Executive Summary
@@ -144,8 +166,8 @@ class ProductionReportGenerator:
             # Overall Production Metrics
             story.extend(self._create_overall_metrics(report_data))
 
-            # Build PDF
-            doc.build(story)
+            # Build PDF (roughly a page per PO plus summary and metrics)
+            self._build_with_progress(doc, story, len(report_data['pos']) + 2)
             buffer.seek(0)
             return buffer.getvalue()
         except Exception as e:
@@ -243,10 +265,11 @@ class ProductionReportGenerator:
 
             total_pack_times = []
 
-            for po in pos:
+            for index, po in enumerate(pos):
                 # Convert to dict immediately
                 po_dict = dict(po)
                 po_data = self._get_detailed_po_data(conn, po_dict['id'])
+                self._report_progress(0.1 + 0.5 * (index + 1) / len(pos), f"Loaded PO {index + 1} of {len(pos)}")
 
                 # Calculate pack time if we have delivery and completion data
                 pack_time = self._calculate_pack_time(po_data)
@@ -1065,7 +1088,7 @@ class ProductionReportGenerator:
                 story.append(Paragraph("Please adjust your date range or PO selection.", self.styles['Normal']))
 
             # Build PDF
-            doc.build(story)
+            self._build_with_progress(doc, story, 1 + len(report_data['summary'].get('product_breakdown') or []) // 40)
             buffer.seek(0)
             return buffer.getvalue()
         except Exception as e:
@@ -1282,7 +1305,7 @@ class ProductionReportGenerator:
             elements.append(table)
 
             # Build PDF
-            doc.build(elements)
+            self._build_with_progress(doc, elements, 1 + len(bags_data) // 40)
             pdf_content = buffer.getvalue()
             buffer.close()
 
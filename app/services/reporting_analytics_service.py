@@ -7,11 +7,16 @@ Uses tablet_types.tablet_type_name as the primary "flavor" dimension for rows.
 from __future__ import annotations
 
 import hashlib
+import json
 import math
 import sqlite3
+import string
+from collections.abc import Iterable
 from datetime import datetime
+from functools import cached_property
 from typing import Any
 
+from app.services.data_versions import versions_key
 from app.services.submission_calculator import calculate_submission_total_with_fallback
 from app.services.submission_query_service import apply_resolved_bag_fields, build_submission_base_query
 
@@ -68,101 +73,204 @@ def _product_details_tuple(row: dict[str, Any]) -> tuple[dict | None, dict | Non
     return pd_primary, pd_fallback
 
 
-def packed_output_tablets(conn: sqlite3.Connection, sub: dict[str, Any]) -> int:
-    """Tablets counted as 'packed' production output for reporting."""
-    st = (sub.get("submission_type") or "packaged").lower()
-    if st in ("bag", "machine"):
-        return 0
-    if st == "bottle":
-        row = conn.execute(
-            "SELECT COALESCE(SUM(tablets_deducted), 0) AS t FROM submission_bag_deductions WHERE submission_id = ?",
-            (sub["id"],),
-        ).fetchone()
-        if row and (row["t"] or 0) > 0:
-            return int(row["t"])
-        tpb = 0
-        pn = sub.get("product_name")
-        if pn:
-            cfg = conn.execute(
-                """
-                SELECT tablets_per_bottle
-                FROM product_details
-                WHERE TRIM(LOWER(product_name)) = TRIM(LOWER(?))
-                """,
-                (pn,),
-            ).fetchone()
-            if cfg:
-                tpb = cfg["tablets_per_bottle"] or 0
-        return int((sub.get("bottles_made") or 0) * tpb)
-
-    pd_primary, pd_fallback = _product_details_tuple(sub)
-    return int(calculate_submission_total_with_fallback(sub, pd_primary, pd_fallback))
+def _tablet_type_names(conn: sqlite3.Connection) -> dict[int, str | None]:
+    return {int(r["id"]): r["tablet_type_name"] for r in conn.execute("SELECT id, tablet_type_name FROM tablet_types")}
 
 
-def packed_tablets_allocations(conn: sqlite3.Connection, sub: dict[str, Any]) -> list[tuple[int, int, int]]:
-    """
-    Split packed output by tablet flavor (and receiving) for reporting.
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
 
-    Variety-pack bottle submissions deduct from multiple reserved bags; each
-    ``submission_bag_deductions`` row ties to a ``bags.tablet_type_id`` so we
-    attribute tablets to the correct flavor/shipment instead of the variety
-    product's primary tablet type on ``product_details``.
 
-    Returns tuples of (tablet_type_id, tablets, receive_id) with receive_id -1
-    when unknown.
+def _sql_trim_lower(value: str) -> str:
+    """Python spelling of SQLite ``TRIM(LOWER(x))`` (ASCII-only case folding, spaces only)."""
+    return value.strip(" ").translate(_ASCII_LOWER)
+
+
+def _normalized_name(value: str) -> str:
+    """Python spelling of ``REPLACE(REPLACE(REPLACE(LOWER(TRIM(x)), '-', ''), ' ', ''), '_', '')``."""
+    return _sql_trim_lower(value).replace("-", "").replace(" ", "").replace("_", "")
+
+
+class ReportAllocationResolver:
+    """
+    Packed-output lookups for a set of report rows.
+
+    Bag deductions for every bottle row load in two queries up front; product configs,
+    tablet type names and the normalized-name -> tablet type fallback load once on first
+    use. Report loops then resolve each row in Python instead of issuing per-row queries.
+    Rows not passed to the constructor are still resolved (their deductions load on demand).
     """
-    st = (sub.get("submission_type") or "packaged").lower()
-    if st in ("bag", "machine"):
-        return []
-    if st == "bottle":
-        rows = conn.execute(
+
+    def __init__(self, conn: sqlite3.Connection, subs: Iterable[dict[str, Any]] = ()):
+        self._conn = conn
+        self._deducted: dict[int, int] = {}
+        self._deduction_rows: dict[int, list[tuple[Any, Any, int]]] = {}
+        self._loaded: set[int] = set()
+        self._load_deductions(
+            int(sub["id"])
+            for sub in subs
+            if sub.get("id") is not None and (sub.get("submission_type") or "packaged").lower() == "bottle"
+        )
+
+    def _load_deductions(self, submission_ids: Iterable[int]) -> None:
+        ids = [i for i in dict.fromkeys(submission_ids) if i not in self._loaded]
+        if not ids:
+            return
+        self._loaded.update(ids)
+        payload = json.dumps(ids)
+        for r in self._conn.execute(
+            """
+            SELECT submission_id, COALESCE(SUM(tablets_deducted), 0) AS t
+            FROM submission_bag_deductions
+            WHERE submission_id IN (SELECT value FROM json_each(?))
+            GROUP BY submission_id
+            """,
+            (payload,),
+        ):
+            self._deducted[int(r["submission_id"])] = r["t"] or 0
+        for r in self._conn.execute(
             """
-            SELECT b.tablet_type_id AS tid,
+            SELECT sbd.submission_id AS sid,
+                   b.tablet_type_id AS tid,
                    r.id AS receive_id,
                    SUM(sbd.tablets_deducted) AS tablets
             FROM submission_bag_deductions sbd
             JOIN bags b ON b.id = sbd.bag_id
             LEFT JOIN small_boxes sb ON sb.id = b.small_box_id
             LEFT JOIN receiving r ON r.id = sb.receiving_id
-            WHERE sbd.submission_id = ?
-            GROUP BY b.tablet_type_id, r.id
+            WHERE sbd.submission_id IN (SELECT value FROM json_each(?))
+            GROUP BY sbd.submission_id, b.tablet_type_id, r.id
             """,
-            (sub["id"],),
-        ).fetchall()
-        alloc_total = sum(int(r["tablets"] or 0) for r in rows)
-        if rows and alloc_total > 0:
-            out: list[tuple[int, int, int]] = []
-            for r in rows:
-                tid = r["tid"]
-                if tid is None:
-                    tt_key = -2
-                else:
-                    tt_key = int(tid)
-                rid = r["receive_id"]
-                if rid is None:
-                    recv = -1
-                else:
-                    recv = int(rid)
-                t = int(r["tablets"] or 0)
-                if t > 0:
-                    out.append((tt_key, t, recv))
-            return out
-        n = packed_output_tablets(conn, sub)
+            (payload,),
+        ):
+            self._deduction_rows.setdefault(int(r["sid"]), []).append((r["tid"], r["receive_id"], int(r["tablets"] or 0)))
+
+    @cached_property
+    def _tablets_per_bottle(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for r in self._conn.execute("SELECT product_name, tablets_per_bottle FROM product_details ORDER BY id"):
+            if r["product_name"] is not None:
+                out.setdefault(_sql_trim_lower(str(r["product_name"])), r["tablets_per_bottle"])
+        return out
+
+    @cached_property
+    def _type_names(self) -> dict[int, str | None]:
+        return _tablet_type_names(self._conn)
+
+    @cached_property
+    def _types_by_product_name(self) -> dict[str, tuple[int, str]]:
+        out: dict[str, tuple[int, str]] = {}
+        for r in self._conn.execute(
+            """
+            SELECT pd.product_name, tt.id, tt.tablet_type_name
+            FROM product_details pd
+            JOIN tablet_types tt ON pd.tablet_type_id = tt.id
+            ORDER BY pd.id
+            """
+        ):
+            if r["product_name"] is not None:
+                out.setdefault(_normalized_name(str(r["product_name"])), (int(r["id"]), str(r["tablet_type_name"])))
+        return out
+
+    @cached_property
+    def _types_by_type_name(self) -> dict[str, tuple[int, str]]:
+        out: dict[str, tuple[int, str]] = {}
+        for tid, name in sorted(self._type_names.items()):
+            if name is not None:
+                out.setdefault(_normalized_name(str(name)), (tid, str(name)))
+        return out
+
+    def _deductions_for(self, sub: dict[str, Any]) -> tuple[int, list[tuple[Any, Any, int]]]:
+        sid = int(sub["id"])
+        self._load_deductions((sid,))
+        return self._deducted.get(sid, 0), self._deduction_rows.get(sid, [])
+
+    def tablet_type_name(self, tid: int) -> str | None:
+        return self._type_names.get(tid)
+
+    def output_tablets(self, sub: dict[str, Any]) -> int:
+        """Tablets counted as 'packed' production output for reporting."""
+        st = (sub.get("submission_type") or "packaged").lower()
+        if st in ("bag", "machine"):
+            return 0
+        if st == "bottle":
+            deducted, _rows = self._deductions_for(sub)
+            if deducted > 0:
+                return int(deducted)
+            tpb = 0
+            pn = sub.get("product_name")
+            if pn:
+                tpb = self._tablets_per_bottle.get(_sql_trim_lower(str(pn))) or 0
+            return int((sub.get("bottles_made") or 0) * tpb)
+
+        pd_primary, pd_fallback = _product_details_tuple(sub)
+        return int(calculate_submission_total_with_fallback(sub, pd_primary, pd_fallback))
+
+    def allocations(self, sub: dict[str, Any]) -> list[tuple[int, int, int]]:
+        """(tablet_type_id, tablets, receive_id) split; see ``packed_tablets_allocations``."""
+        st = (sub.get("submission_type") or "packaged").lower()
+        if st in ("bag", "machine"):
+            return []
+        if st == "bottle":
+            _deducted, rows = self._deductions_for(sub)
+            if rows and sum(t for _tid, _rid, t in rows) > 0:
+                return [
+                    (-2 if tid is None else int(tid), t, -1 if rid is None else int(rid))
+                    for tid, rid, t in rows
+                    if t > 0
+                ]
+        n = self.output_tablets(sub)
         if n <= 0:
             return []
-        tid, _ = _flavor_id_name(sub, conn)
+        tid, _ = self.flavor(sub)
         tt_key = tid if tid is not None else -2
         rid = sub.get("receive_id")
         recv = -1 if rid is None else int(rid)
         return [(tt_key, n, recv)]
-    n = packed_output_tablets(conn, sub)
-    if n <= 0:
-        return []
-    tid, _ = _flavor_id_name(sub, conn)
-    tt_key = tid if tid is not None else -2
-    rid = sub.get("receive_id")
-    recv = -1 if rid is None else int(rid)
-    return [(tt_key, n, recv)]
+
+    def flavor(self, sub: dict[str, Any]) -> tuple[int | None, str]:
+        """(tablet_type_id, flavor name); see ``_flavor_id_name``."""
+        tid = sub.get("tablet_type_id")
+        name = sub.get("tablet_type_name")
+        if tid is not None:
+            tid = int(tid)
+            if name:
+                return tid, str(name)
+            name = self.tablet_type_name(tid)
+            if name:
+                return tid, str(name)
+            return tid, (sub.get("product_name") or "Unknown").strip()
+
+        # Last-resort mapping for legacy rows where SQL joins fail: normalized product_name
+        # against product_details.product_name, then tablet_types.tablet_type_name.
+        product_name = (sub.get("product_name") or "").strip()
+        if product_name:
+            key = _normalized_name(product_name)
+            hit = self._types_by_product_name.get(key) or self._types_by_type_name.get(key)
+            if hit:
+                return hit
+
+        return None, (sub.get("product_name") or "Unknown").strip()
+
+
+def packed_output_tablets(conn: sqlite3.Connection, sub: dict[str, Any]) -> int:
+    """Tablets counted as 'packed' production output for reporting."""
+    return ReportAllocationResolver(conn, (sub,)).output_tablets(sub)
+
+
+def packed_tablets_allocations(conn: sqlite3.Connection, sub: dict[str, Any]) -> list[tuple[int, int, int]]:
+    """
+    Split packed output by tablet flavor (and receiving) for reporting.
+
+    Variety-pack bottle submissions deduct from multiple reserved bags; each
+    ``submission_bag_deductions`` row ties to a ``bags.tablet_type_id`` so we
+    attribute tablets to the correct flavor/shipment instead of the variety
+    product's primary tablet type on ``product_details``.
+
+    Returns tuples of (tablet_type_id, tablets, receive_id) with receive_id -1
+    when unknown. Report loops should build one ``ReportAllocationResolver`` for
+    their row set instead of calling this per row.
+    """
+    return ReportAllocationResolver(conn, (sub,)).allocations(sub)
 
 
 def _tablets_per_display_by_flavor(conn: sqlite3.Connection) -> dict[int, float]:
@@ -264,55 +372,27 @@ def _flavor_id_name(sub: dict[str, Any], conn: sqlite3.Connection | None = None)
     Resolve flavor for a submission row. Prefer joined tablet_type_id / tablet_type_name
     (query uses COALESCE(product, inventory fallback, bag tablet type)).
     """
+    if conn is not None:
+        return ReportAllocationResolver(conn).flavor(sub)
     tid = sub.get("tablet_type_id")
     name = sub.get("tablet_type_name")
     if tid is not None:
-        tid = int(tid)
-        if name:
-            return tid, str(name)
-        if conn:
-            row = conn.execute(
-                "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-                (tid,),
-            ).fetchone()
-            if row and row["tablet_type_name"]:
-                return tid, str(row["tablet_type_name"])
-        return tid, (sub.get("product_name") or "Unknown").strip()
-
-    # Last-resort mapping for legacy rows where SQL joins fail:
-    # normalize product_name and match against both product_details.product_name
-    # and tablet_types.tablet_type_name.
-    product_name = (sub.get("product_name") or "").strip()
-    if conn and product_name:
-        norm_expr = "REPLACE(REPLACE(REPLACE(LOWER(TRIM({})), '-', ''), ' ', ''), '_', '')"
-        row = conn.execute(
-            f"""
-            SELECT tt.id, tt.tablet_type_name
-            FROM product_details pd
-            JOIN tablet_types tt ON pd.tablet_type_id = tt.id
-            WHERE {norm_expr.format('pd.product_name')} = {norm_expr.format('?')}
-            LIMIT 1
-            """,
-            (product_name,),
-        ).fetchone()
-        if not row:
-            row = conn.execute(
-                f"""
-                SELECT id, tablet_type_name
-                FROM tablet_types
-                WHERE {norm_expr.format('tablet_type_name')} = {norm_expr.format('?')}
-                LIMIT 1
-                """,
-                (product_name,),
-            ).fetchone()
-        if row:
-            return int(row["id"]), str(row["tablet_type_name"])
-
+        return int(tid), str(name) if name else (sub.get("product_name") or "Unknown").strip()
     return None, (sub.get("product_name") or "Unknown").strip()
 
 
+# Tables the report views read; their data_versions counters are the report fingerprint.
+REPORT_VERSION_TABLES = ("warehouse_submissions", "bags", "receiving", "purchase_orders")
+
+
 def get_report_fingerprint(conn: sqlite3.Connection) -> str:
-    """Lightweight version string for polling 'what changed'."""
+    """
+    Lightweight version string for polling 'what changed'. Uses the ``data_versions`` counters
+    (one primary-key read); databases without them fall back to count / max scans.
+    """
+    versions = versions_key(conn, REPORT_VERSION_TABLES)
+    if versions is not None:
+        return hashlib.sha256(versions.encode()).hexdigest()[:32]
     r1 = conn.execute(
         """
         SELECT
@@ -423,8 +503,10 @@ def _ordered_by_flavor(conn: sqlite3.Connection, po_id: int) -> dict[int, dict[s
     """Map tablet_type_id -> {ordered, line_name}."""
     rows = conn.execute(
         """
-        SELECT pl.inventory_item_id, pl.line_item_name, SUM(COALESCE(pl.quantity_ordered, 0)) AS q
+        SELECT pl.inventory_item_id, pl.line_item_name, SUM(COALESCE(pl.quantity_ordered, 0)) AS q,
+               tt.id AS tt_id, tt.tablet_type_name
         FROM po_lines pl
+        LEFT JOIN tablet_types tt ON tt.inventory_item_id = pl.inventory_item_id AND pl.inventory_item_id != ''
         WHERE pl.po_id = ?
         GROUP BY pl.inventory_item_id, pl.line_item_name
         """,
@@ -433,19 +515,12 @@ def _ordered_by_flavor(conn: sqlite3.Connection, po_id: int) -> dict[int, dict[s
     by_tt: dict[int, dict[str, Any]] = {}
     for row in rows:
         r = dict(row)
-        inv = r.get("inventory_item_id")
         q = int(r.get("q") or 0)
         line_name = r.get("line_item_name") or ""
-        tt = None
-        if inv:
-            tt = conn.execute(
-                "SELECT id, tablet_type_name FROM tablet_types WHERE inventory_item_id = ?",
-                (inv,),
-            ).fetchone()
-        if tt:
-            tid = int(tt["id"])
+        if r.get("tt_id") is not None:
+            tid = int(r["tt_id"])
             if tid not in by_tt:
-                by_tt[tid] = {"ordered": 0, "name": tt["tablet_type_name"], "line_name": line_name}
+                by_tt[tid] = {"ordered": 0, "name": r["tablet_type_name"], "line_name": line_name}
             by_tt[tid]["ordered"] += q
         else:
             # Unmapped line: synthetic key by hash of line name for display only
@@ -511,12 +586,13 @@ def _received_bags_by_flavor_receive(
 def _packed_by_flavor_receive(conn: sqlite3.Connection, po_id: int) -> dict[tuple[int | None, int], int]:
     """(tablet_type_id, receive_id) -> packed (receive_id -1 = unassigned)."""
     subs = _submission_report_rows(conn, po_id=po_id)
+    resolver = ReportAllocationResolver(conn, subs)
     packed: dict[tuple[int | None, int], int] = {}
     for sub in subs:
         st = (sub.get("submission_type") or "packaged").lower()
         if st in ("bag", "machine"):
             continue
-        for tid, tablets, rid in packed_tablets_allocations(conn, sub):
+        for tid, tablets, rid in resolver.allocations(sub):
             if tablets <= 0:
                 continue
             tt_key = tid if tid is not None else -2
@@ -538,17 +614,14 @@ def build_po_overview(conn: sqlite3.Connection, po_id: int) -> dict[str, Any]:
     ordered_map = _ordered_by_flavor(conn, po_id)
     recv_bags, _ = _received_bags_by_flavor_receive(conn, po_id)
     packed_map = _packed_by_flavor_receive(conn, po_id)
+    type_names = _tablet_type_names(conn)
 
     def _sort_name(tid: int) -> str:
         if tid == -2:
             return "ZZZ-Unmapped packed"
         if tid < 0:
             return ordered_map.get(tid, {}).get("name") or "Line item"
-        name_row = conn.execute(
-            "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-            (tid,),
-        ).fetchone()
-        return (name_row["tablet_type_name"] if name_row else "") or ""
+        return type_names.get(tid) or ""
 
     # Totals per flavor (across receives)
     flavor_ids = set()
@@ -562,12 +635,10 @@ def build_po_overview(conn: sqlite3.Connection, po_id: int) -> dict[str, Any]:
     for tid in sorted(flavor_ids, key=_sort_name):
         if tid == -2:
             flavor_name = "Unmapped (no tablet type)"
+        elif tid in type_names:
+            flavor_name = type_names[tid]
         else:
-            name_row = conn.execute(
-                "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-                (tid,),
-            ).fetchone()
-            flavor_name = name_row["tablet_type_name"] if name_row else ordered_map.get(tid, {}).get("name", "Unknown")
+            flavor_name = ordered_map.get(tid, {}).get("name", "Unknown")
 
         ordered = int(ordered_map.get(tid, {}).get("ordered", 0))
         received = sum(v["received"] for (r, t), v in recv_bags.items() if t == tid)
@@ -635,17 +706,14 @@ def build_po_shipments(conn: sqlite3.Connection, po_id: int) -> dict[str, Any]:
     recv_bags, _ = _received_bags_by_flavor_receive(conn, po_id)
     packed_map = _packed_by_flavor_receive(conn, po_id)
     ordered_map = _ordered_by_flavor(conn, po_id)
+    type_names = _tablet_type_names(conn)
 
     def _shipment_row_sort_name(tid: int) -> str:
         if tid == -2:
             return "ZZZ-Unmapped packed"
         if tid == -1:
             return "Unknown bag flavor"
-        nm = conn.execute(
-            "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-            (tid,),
-        ).fetchone()
-        return (nm["tablet_type_name"] if nm else "") or ""
+        return type_names.get(tid) or ""
 
     shipments: list[dict[str, Any]] = []
     for rec in receives:
@@ -665,11 +733,7 @@ def build_po_shipments(conn: sqlite3.Connection, po_id: int) -> dict[str, Any]:
             elif tid == -1:
                 flavor_name = "Unknown"
             else:
-                nm = conn.execute(
-                    "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-                    (tid,),
-                ).fetchone()
-                flavor_name = nm["tablet_type_name"] if nm else "Unknown"
+                flavor_name = type_names[tid] if tid in type_names else "Unknown"
             rb = recv_bags.get((rid, tid), {"received": 0, "bags": 0, "flavor_name": flavor_name})
             packed = packed_map.get((tid, rid), 0)
             sec_rows.append(
@@ -735,6 +799,7 @@ def build_trends(
     )
 
     tpd_map = _tablets_per_display_by_flavor(conn)
+    resolver = ReportAllocationResolver(conn, subs)
     packed_by_day: dict[str, int] = {}
     packed_displays_by_day: dict[str, float] = {}
     for sub in subs:
@@ -744,7 +809,7 @@ def build_trends(
         d = str(sub.get("filter_date") or sub.get("created_at", ""))[:10]
         if not d:
             continue
-        for tid, part, _rid in packed_tablets_allocations(conn, sub):
+        for tid, part, _rid in resolver.allocations(sub):
             if part <= 0:
                 continue
             if tablet_type_id is not None and tid != tablet_type_id:
@@ -822,6 +887,7 @@ def build_dimensions(
         date_to=dt,
     )
     tpd_map = _tablets_per_display_by_flavor(conn)
+    resolver = ReportAllocationResolver(conn, subs)
     by_flavor: dict[int, int] = {}
     by_flavor_displays: dict[int, float] = {}
     by_day_by_flavor: dict[int, dict[str, int]] = {}
@@ -851,7 +917,7 @@ def build_dimensions(
         if (sub.get("submission_type") or "packaged").lower() in ("bag", "machine"):
             return 0.0
         total = 0.0
-        for tid, part, _rid in packed_tablets_allocations(conn, sub):
+        for tid, part, _rid in resolver.allocations(sub):
             tpd = tpd_map.get(tid)
             if part > 0 and tpd and tpd > 0:
                 total += part / tpd
@@ -882,7 +948,7 @@ def build_dimensions(
 
     for sub in subs:
         st = (sub.get("submission_type") or "packaged").lower()
-        n = packed_output_tablets(conn, sub)
+        n = resolver.output_tablets(sub)
         day = str(sub.get("filter_date") or sub.get("created_at", ""))[:10]
 
         operator = (sub.get("employee_name") or "Unassigned").strip() or "Unassigned"
@@ -928,7 +994,7 @@ def build_dimensions(
         # Flavor/day packed totals: split variety-pack bottle deductions per bag flavor.
         if st in ("bag", "machine") or n <= 0:
             continue
-        for tid, part, _rid in packed_tablets_allocations(conn, sub):
+        for tid, part, _rid in resolver.allocations(sub):
             if part <= 0:
                 continue
             if tablet_type_id is not None and tid != tablet_type_id:
@@ -957,7 +1023,7 @@ def build_dimensions(
             ripped_cards = int(sub.get("loose_tablets") or 0)
         if ripped_cards <= 0:
             continue
-        tid, _fname = _flavor_id_name(sub, conn)
+        tid, _fname = resolver.flavor(sub)
         if tid is None:
             tid = -2
         if tablet_type_id is not None and tid != tablet_type_id:
@@ -972,6 +1038,7 @@ def build_dimensions(
         _ensure_staff(staffing_by_operator, operator)["ripped_cards"] += ripped_cards
         _ensure_staff(staffing_by_station, station)["ripped_cards"] += ripped_cards
 
+    type_names = _tablet_type_names(conn)
     flavor_list = []
     for tid, total in sorted(
         by_flavor.items(),
@@ -979,11 +1046,7 @@ def build_dimensions(
     ):
         label = None
         if tid >= 0:
-            nm = conn.execute(
-                "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-                (tid,),
-            ).fetchone()
-            label = nm["tablet_type_name"] if nm else str(tid)
+            label = type_names[tid] if tid in type_names else str(tid)
         else:
             label = "Unmapped"
         flavor_list.append(
@@ -1010,11 +1073,7 @@ def build_dimensions(
     ripped_by_flavor = []
     for tid, cards in sorted(ripped_cards_by_flavor.items(), key=lambda x: -x[1]):
         if tid >= 0:
-            nm = conn.execute(
-                "SELECT tablet_type_name FROM tablet_types WHERE id = ?",
-                (tid,),
-            ).fetchone()
-            label = nm["tablet_type_name"] if nm else str(tid)
+            label = type_names[tid] if tid in type_names else str(tid)
         else:
             label = "Unmapped"
         ripped_by_flavor.append(
@@ -1170,28 +1229,37 @@ def aggregate_stage_yield(
     date_to: str,
     tablet_type_id: int | None = None,
     machine_id: int | None = None,
+    workers: int = 0,
 ) -> dict[str, Any]:
     """
     Summarize per-bag counter error (stage transitions) over a date window.
     Excludes anomalous negative transitions for aggregate rate stats.
+    ``workers`` > 1 spreads the per-bag totals over a process pool (file-backed databases only).
     """
-    from app.services.bag_check_totals import compute_bag_check_totals
+    from app.services.bag_check_totals import compute_bag_check_totals_batch
 
     if not _parse_date(date_from) or not _parse_date(date_to):
         return {"success": False, "error": "date_from and date_to (YYYY-MM-DD) are required"}
     d0, d1 = _parse_date(date_from), _parse_date(date_to)
 
+    tt_sql = ""
+    params: list[Any] = [d0, d1]
+    if tablet_type_id is not None:
+        tt_sql = "AND ws.bag_id IN (SELECT id FROM bags WHERE tablet_type_id = ?)"
+        params.append(int(tablet_type_id))
     rows = conn.execute(
-        """
+        f"""
         SELECT DISTINCT ws.bag_id AS bag_id
         FROM warehouse_submissions ws
         WHERE ws.bag_id IS NOT NULL
           AND SUBSTR(COALESCE(ws.created_at, ''), 1, 10) >= ?
           AND SUBSTR(COALESCE(ws.created_at, ''), 1, 10) <= ?
+          {tt_sql}
         """,
-        (d0, d1),
+        params,
     ).fetchall()
     bag_ids = [r["bag_id"] for r in rows]
+    totals_by_bag = compute_bag_check_totals_batch(conn, bag_ids, workers=workers)
 
     # Per-transition accumulators: per-bag rates, and sum(error), sum(denom) for weighted mean
     def collect() -> dict[str, Any]:
@@ -1213,15 +1281,7 @@ def aggregate_stage_yield(
         bags_all_zero = 0
 
         for bid in bag_ids:
-            if tablet_type_id is not None:
-                bro = conn.execute(
-                    "SELECT tablet_type_id FROM bags WHERE id = ?",
-                    (bid,),
-                ).fetchone()
-                tid = dict(bro).get("tablet_type_id") if bro else None
-                if tid is None or int(tid) != int(tablet_type_id):
-                    continue
-            m = compute_bag_check_totals(conn, bid)
+            m = totals_by_bag.get(bid)
             if not m:
                 continue
             B = m.get("machine_blister_tablets_total", 0) or 0
@@ -0,0 +1,158 @@
+"""
+Shared plumbing for the SQLite work queues (``telegram_outbox``, ``zoho_push_jobs``, ``report_jobs``).
+
+Each queue module keeps its table, its claim / finish SQL and its handler; this module holds what
+they have in common:
+
+- ``connect``: an autocommit connection (``isolation_level=None``) with ``sqlite3.Row`` rows and
+  the app's busy timeout, so each claim and each handler write is its own short transaction;
+- ``claim_next``: ``BEGIN IMMEDIATE``, an optional reclaim of rows whose worker stopped, then the
+  queue's ``UPDATE ... RETURNING`` claim, so several app workers can share one queue without a broker;
+- ``drain``: claim and handle rows until none is claimable, then run the queue's cleanup;
+- ``backoff_seconds`` / ``next_due_in_seconds`` / ``prune_finished`` for queues with retries;
+- ``QueueWorker`` / ``dispatch``: a daemon thread per app worker, woken by new rows and by due
+  retries, or an inline drain when the queue's worker setting is off.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+IDLE_POLL_SECONDS = 60.0
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=float(Config.DB_BUSY_TIMEOUT_MS) / 1000, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def claim_next(
+    conn: sqlite3.Connection,
+    claim_sql: str,
+    params: Sequence[Any],
+    *,
+    reclaim: Callable[[sqlite3.Connection], Any] | None = None,
+) -> sqlite3.Row | None:
+    """Run ``reclaim`` (stale rows) and the ``UPDATE ... RETURNING`` ``claim_sql`` in one write transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if reclaim is not None:
+            reclaim(conn)
+        row = conn.execute(claim_sql, params).fetchone()
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+
+def drain(
+    db_path: str,
+    claim: Callable[[sqlite3.Connection], sqlite3.Row | None],
+    handle: Callable[[sqlite3.Connection, sqlite3.Row], Any],
+    *,
+    max_rows: int | None = None,
+    cleanup: Callable[[sqlite3.Connection], Any] | None = None,
+) -> int:
+    """Claim and handle rows until the queue has none due (or ``max_rows``); returns rows handled."""
+    conn = connect(db_path)
+    handled = 0
+    try:
+        while max_rows is None or handled < max_rows:
+            row = claim(conn)
+            if row is None:
+                break
+            handle(conn, row)
+            handled += 1
+        if handled and cleanup is not None:
+            cleanup(conn)
+    finally:
+        conn.close()
+    return handled
+
+
+def backoff_seconds(attempts: int, base: float, maximum: float) -> float:
+    """Exponential delay before retry ``attempts + 1`` (``base`` after the first failure)."""
+    return min(base * 2 ** max(attempts - 1, 0), maximum)
+
+
+def next_due_in_seconds(conn: sqlite3.Connection, table: str, status: str) -> float | None:
+    """Seconds until the earliest ``status`` row of ``table`` is due (0 when one is due now), None when idle."""
+    row = conn.execute(f"SELECT MIN(next_attempt_at) FROM {table} WHERE status = ?", (status,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return max(0.0, (int(row[0]) - now_ms()) / 1000)
+
+
+def prune_finished(conn: sqlite3.Connection, table: str, statuses: Sequence[str], retention_ms: int) -> int:
+    """Delete ``statuses`` rows of ``table`` not updated for ``retention_ms``; returns rows removed."""
+    placeholders = ",".join("?" * len(statuses))
+    return conn.execute(
+        f"DELETE FROM {table} WHERE status IN ({placeholders}) AND updated_at < ?",
+        (*statuses, now_ms() - retention_ms),
+    ).rowcount
+
+
+class QueueWorker:
+    """Per-process daemon thread draining one queue; woken by new rows and by due retries."""
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable[[str], Any],
+        next_due: Callable[[sqlite3.Connection], float | None] | None = None,
+    ) -> None:
+        self.name = name
+        self.process = process
+        self._next_due = next_due
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def wake(self, db_path: str) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(db_path,), name=self.name, daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self, db_path: str) -> None:
+        while True:
+            self._wake.clear()
+            wait = IDLE_POLL_SECONDS
+            try:
+                self.process(db_path)
+                if self._next_due is not None:
+                    conn = connect(db_path)
+                    try:
+                        due = self._next_due(conn)
+                    finally:
+                        conn.close()
+                    if due is not None:
+                        wait = min(max(due, 0.5), IDLE_POLL_SECONDS)
+            except Exception:
+                logger.exception("%s pass failed", self.name)
+            self._wake.wait(wait)
+
+
+def dispatch(worker: QueueWorker, enabled: bool, db_path: str | None = None) -> None:
+    """Wake ``worker`` when its setting is on, else drain the queue inline (call after the queuing commit)."""
+    db_path = db_path or Config.DATABASE_PATH
+    if enabled:
+        worker.wake(db_path)
+    else:
+        worker.process(db_path)
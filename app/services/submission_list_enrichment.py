@@ -1,90 +1,43 @@
 """
-Chronological running totals and display fields shared by submission list UIs (dashboard, submissions).
+Running-total and display fields shared by submission list UIs (dashboard, submissions).
 """
 
 from __future__ import annotations
 
-from typing import Any
-
 from app.services.packaged_submission_display import normalize_packaged_case_fields_for_ui
 from app.services.submission_query_service import common_receive_label_from_deductions
 
 
-def new_running_totals_state() -> dict[str, dict[Any, int]]:
-    return {
-        "bag_cumulative_packaged": {},
-        "bag_totals_bag": {},
-        "bag_totals_machine": {},
-        "bag_totals_packaged": {},
-    }
-
-
-def enrich_submission_row_running_totals(
+def apply_bag_running_totals(
     sub_dict: dict,
-    state: dict[str, dict[Any, int]],
     *,
-    bag_submission_use: str = "loose_tablets",
+    bag_total: int,
+    machine_total: int,
+    packaged_total: int,
+    cumulative_packaged: int | None = None,
 ) -> None:
     """
-    Update per-bag running totals for one row (caller iterates in chronological order).
+    Set running-total fields, ``count_status`` and ``has_discrepancy`` from the bag's totals so far.
 
-    bag_submission_use:
-      - ``loose_tablets`` — bag-type rows contribute ``loose_tablets`` (submissions list).
-      - ``individual_calc`` — bag-type rows contribute ``calculated_total`` (dashboard recent list).
+    Packaged rows also get their case / loose display fields normalized for pre-split rows.
     """
-    bag_identifier = f"{sub_dict.get('box_number', '')}/{sub_dict.get('bag_number', '')}"
-    bag_key = (sub_dict.get("assigned_po_id"), sub_dict.get("product_name"), bag_identifier)
-
-    individual_calc = sub_dict.get("calculated_total", 0) or 0
+    if cumulative_packaged is None:
+        cumulative_packaged = packaged_total
     submission_type = sub_dict.get("submission_type", "packaged")
     if submission_type == "packaged":
         normalize_packaged_case_fields_for_ui(sub_dict)
-
-    bag_cumulative_packaged = state["bag_cumulative_packaged"]
-    bag_totals_bag = state["bag_totals_bag"]
-    bag_totals_machine = state["bag_totals_machine"]
-    bag_totals_packaged = state["bag_totals_packaged"]
-
-    if bag_key not in bag_cumulative_packaged:
-        bag_cumulative_packaged[bag_key] = 0
-    if bag_key not in bag_totals_bag:
-        bag_totals_bag[bag_key] = 0
-    if bag_key not in bag_totals_machine:
-        bag_totals_machine[bag_key] = 0
-    if bag_key not in bag_totals_packaged:
-        bag_totals_packaged[bag_key] = 0
-
-    if submission_type == "bag":
-        if bag_submission_use == "individual_calc":
-            bag_totals_bag[bag_key] += individual_calc
-        else:
-            bag_count_value = sub_dict.get("loose_tablets", 0) or 0
-            bag_totals_bag[bag_key] += bag_count_value
-    elif submission_type == "machine":
-        bag_totals_machine[bag_key] += individual_calc
-    elif submission_type == "repack":
-        pass
-    elif submission_type == "packaged":
-        bag_totals_packaged[bag_key] += individual_calc
-
-    if submission_type == "packaged":
-        bag_cumulative_packaged[bag_key] += individual_calc
-
-    sub_dict["individual_calc"] = individual_calc
-    sub_dict["total_tablets"] = individual_calc
-    sub_dict["bag_submission_tablets_total"] = bag_totals_bag[bag_key]
-    sub_dict["machine_tablets_total"] = bag_totals_machine[bag_key]
-    sub_dict["packaged_tablets_total"] = bag_totals_packaged[bag_key]
-    sub_dict["cumulative_bag_tablets"] = bag_cumulative_packaged[bag_key]
+    sub_dict["bag_submission_tablets_total"] = bag_total
+    sub_dict["machine_tablets_total"] = machine_total
+    sub_dict["packaged_tablets_total"] = packaged_total
+    sub_dict["cumulative_bag_tablets"] = cumulative_packaged
 
     bag_count = sub_dict.get("bag_label_count", 0) or 0
-    packaged_cumulative = bag_cumulative_packaged[bag_key]
 
     if not sub_dict.get("bag_id"):
         sub_dict["count_status"] = "no_bag"
-    elif abs(packaged_cumulative - bag_count) <= 5:
+    elif abs(cumulative_packaged - bag_count) <= 5:
         sub_dict["count_status"] = "match"
-    elif packaged_cumulative < bag_count:
+    elif cumulative_packaged < bag_count:
         sub_dict["count_status"] = "under"
     else:
         sub_dict["count_status"] = "over"
@@ -0,0 +1,347 @@
+"""
+Receipt-group index for the warehouse /submissions list (``submission_receipt_groups``).
+
+One row per receipt group and list bucket (tab x archived) holds every group sort key the list
+offers, so a page of an unfiltered tab is an index range scan on
+``(tab, archived, <sort key>, last_id)`` rather than an aggregate over every submission.
+``submission_receipt_group_counts`` keeps the number of groups per bucket for the page count.
+
+Rows are kept current by triggers on ``warehouse_submissions``, ``purchase_orders``,
+``product_details``, ``tablet_types``, ``machines`` and ``submission_bag_deductions``. Like
+``bag_ledger`` they recompute the affected groups from source rows with the same SQL as
+``fetch_receipt_group_page``'s filtered path, so both paths order groups identically and their
+cursors are interchangeable. ``reconcile_submission_receipt_groups`` reports drift.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from typing import Any
+
+from app.services.submissions_view_service import RECEIPT_GROUP_KEY_SQL, SUBMISSION_LIST_FROM, _group_sort_sql
+from app.utils.schema_registry import table_columns
+
+logger = logging.getLogger(__name__)
+
+# Same buckets as append_submission_archive_tab_filters; rows outside every bucket (unknown
+# submission type, unexpected po.closed values) match no unfiltered tab and are not indexed.
+_TAB_SQL = """CASE
+        WHEN COALESCE(ws.submission_type, 'packaged') IN ('packaged', 'machine', 'repack') THEN 'packaged_machine'
+        WHEN COALESCE(ws.submission_type, 'packaged') = 'bottle' THEN 'bottles'
+        WHEN COALESCE(ws.submission_type, 'packaged') = 'bag' THEN 'bag'
+    END"""
+_ARCHIVED_SQL = "CASE WHEN po.closed IS NULL OR po.closed = FALSE THEN 0 WHEN po.closed = TRUE THEN 1 END"
+BUCKETS = tuple((tab, archived) for tab in ("packaged_machine", "bottles", "bag") for archived in (0, 1))
+
+# (sort_by, descending or None when the key is direction-independent, stored columns)
+_SORT_KEYS = (
+    ("created_at", None, ("k_created",)),
+    ("receipt_number", None, ("k_receipt_head", "k_receipt_tail")),
+    ("total", None, ("k_total",)),
+    ("product_name", None, ("k_product",)),
+    ("employee_name", False, ("k_employee_min",)),
+    ("employee_name", True, ("k_employee_max",)),
+    ("bag_start", False, ("k_bag_start_asc",)),
+    ("bag_start", True, ("k_bag_start_desc",)),
+    ("bag_end", False, ("k_bag_end_asc",)),
+    ("bag_end", True, ("k_bag_end_desc",)),
+)
+KEY_COLUMNS = tuple(column for _, _, columns in _SORT_KEYS for column in columns)
+
+_REQUIRED_COLUMNS = {
+    "warehouse_submissions": (
+        "receipt_number",
+        "submission_type",
+        "assigned_po_id",
+        "product_name",
+        "machine_id",
+        "bag_id",
+        "inventory_item_id",
+        "employee_name",
+        "created_at",
+        "submission_date",
+        "bag_start_time",
+        "bag_end_time",
+        "displays_made",
+        "packs_remaining",
+        "loose_tablets",
+        "bottles_made",
+        "tablets_pressed_into_cards",
+    ),
+    "purchase_orders": ("closed",),
+    "product_details": (
+        "product_name",
+        "tablet_type_id",
+        "packages_per_display",
+        "tablets_per_package",
+        "tablets_per_bottle",
+    ),
+    "tablet_types": ("inventory_item_id",),
+    "machines": ("machine_role",),
+    "bags": ("small_box_id",),
+    "small_boxes": ("receiving_id",),
+    "receiving": ("id",),
+    "submission_bag_deductions": ("submission_id", "tablets_deducted"),
+}
+
+
+def sort_columns(sort_by: str, descending: bool) -> tuple[str, ...]:
+    """Stored key columns for one list ordering (``GROUP_SORT_KEYS`` x direction)."""
+    for key, direction, columns in _SORT_KEYS:
+        if key == sort_by and direction in (None, descending):
+            return columns
+    return ("k_created",)
+
+
+def groups_source_sql(filter_sql: str) -> str:
+    """SELECT producing group rows (group_key, tab, archived, KEY_COLUMNS, last_id) for rows matching ``filter_sql``."""
+    row_cols: list[str] = []
+    keys: list[str] = []
+    for i, (sort_by, descending, columns) in enumerate(_SORT_KEYS):
+        cols, aggregates = _group_sort_sql(sort_by, bool(descending), alias=f"s{i}_")
+        row_cols.extend(cols)
+        keys.extend(f"{expr} AS {column}" for expr, column in zip(aggregates, columns, strict=True))
+    return f"""
+    SELECT group_key, tab, archived, {', '.join(keys)}, MAX(id) AS last_id
+    FROM (
+        SELECT {RECEIPT_GROUP_KEY_SQL} AS group_key, {_TAB_SQL} AS tab, {_ARCHIVED_SQL} AS archived,
+               ws.id AS id, {', '.join(row_cols)}
+        {SUBMISSION_LIST_FROM}
+        WHERE {filter_sql}
+    )
+    WHERE tab IS NOT NULL AND archived IS NOT NULL
+    GROUP BY group_key, tab, archived
+    """
+
+
+def _refresh_sql(receipts_sql: str, ids_sql: str) -> str:
+    # ``receipts_sql`` / ``ids_sql`` select column ``v``: receipt numbers, and ids of receipt-less rows.
+    # DELETE + INSERT rather than INSERT OR REPLACE (see bag_ledger._refresh_sql).
+    return f"""
+    DELETE FROM submission_receipt_groups WHERE group_key IN (
+        SELECT 'rec:' || v FROM ({receipts_sql}) UNION ALL SELECT 'null:' || v FROM ({ids_sql})
+    );
+    INSERT INTO submission_receipt_groups (group_key, tab, archived, {', '.join(KEY_COLUMNS)}, last_id)
+    {groups_source_sql(
+        f"ws.receipt_number IN (SELECT v FROM ({receipts_sql})) OR (ws.id IN (SELECT v FROM ({ids_sql}))"
+        " AND (ws.receipt_number IS NULL OR ws.receipt_number = ''))"
+    )};
+    """
+
+
+def _row_groups(*refs: str) -> tuple[str, str]:
+    """Groups of the NEW / OLD submission row itself."""
+    receipts = " UNION ".join(f"SELECT NULLIF({ref}.receipt_number, '') AS v" for ref in refs)
+    ids = " UNION ".join(f"SELECT {ref}.id AS v WHERE COALESCE({ref}.receipt_number, '') = ''" for ref in refs)
+    return receipts, ids
+
+
+def _matching_groups(condition: str) -> tuple[str, str]:
+    """Groups of every submission matching ``condition``."""
+    return (
+        f"SELECT receipt_number AS v FROM warehouse_submissions WHERE ({condition}) AND receipt_number <> ''",
+        f"SELECT id AS v FROM warehouse_submissions WHERE ({condition}) AND COALESCE(receipt_number, '') = ''",
+    )
+
+
+_SUBMISSION_COLUMNS = ", ".join(_REQUIRED_COLUMNS["warehouse_submissions"])
+_PRODUCT_COLUMNS = ", ".join(_REQUIRED_COLUMNS["product_details"])
+
+
+def _product_condition(*refs: str) -> str:
+    names = ", ".join(f"{ref}.product_name" for ref in refs)
+    type_ids = ", ".join(f"{ref}.tablet_type_id" for ref in refs)
+    # second term: rows without a product_details match fall back to the tablet type's product
+    return (
+        f"product_name IN ({names}) OR inventory_item_id IN "
+        f"(SELECT inventory_item_id FROM tablet_types WHERE id IN ({type_ids}))"
+    )
+
+
+# (trigger name, event clause, WHEN condition or None, (receipts, ids) to refresh)
+_TRIGGERS = (
+    ("ws_ins", "INSERT ON warehouse_submissions", None, _row_groups("NEW")),
+    ("ws_upd", f"UPDATE OF {_SUBMISSION_COLUMNS} ON warehouse_submissions", None, _row_groups("NEW", "OLD")),
+    ("ws_del", "DELETE ON warehouse_submissions", None, _row_groups("OLD")),
+    ("po_ins", "INSERT ON purchase_orders", None, _matching_groups("assigned_po_id = NEW.id")),
+    (
+        "po_upd",
+        "UPDATE OF closed ON purchase_orders",
+        "OLD.closed IS NOT NEW.closed",
+        _matching_groups("assigned_po_id = NEW.id"),
+    ),
+    ("po_del", "DELETE ON purchase_orders", None, _matching_groups("assigned_po_id = OLD.id")),
+    ("pd_ins", "INSERT ON product_details", None, _matching_groups(_product_condition("NEW"))),
+    (
+        "pd_upd",
+        f"UPDATE OF {_PRODUCT_COLUMNS} ON product_details",
+        None,
+        _matching_groups(_product_condition("NEW", "OLD")),
+    ),
+    ("pd_del", "DELETE ON product_details", None, _matching_groups(_product_condition("OLD"))),
+    (
+        "tt_upd",
+        "UPDATE OF inventory_item_id ON tablet_types",
+        "OLD.inventory_item_id IS NOT NEW.inventory_item_id",
+        _matching_groups("inventory_item_id IN (NEW.inventory_item_id, OLD.inventory_item_id)"),
+    ),
+    ("machines_upd", "UPDATE OF machine_role ON machines", None, _matching_groups("machine_id = NEW.id")),
+    ("sbd_ins", "INSERT ON submission_bag_deductions", None, _matching_groups("id = NEW.submission_id")),
+    (
+        "sbd_upd",
+        "UPDATE OF submission_id, tablets_deducted ON submission_bag_deductions",
+        None,
+        _matching_groups("id IN (NEW.submission_id, OLD.submission_id)"),
+    ),
+    ("sbd_del", "DELETE ON submission_bag_deductions", None, _matching_groups("id = OLD.submission_id")),
+)
+
+# Shared by MigrationRunner and the Alembic revision (both IF NOT EXISTS). Key columns are untyped
+# so they hold exactly the values the filtered path computes (cursor keys stay interchangeable).
+SUBMISSION_RECEIPT_GROUPS_DDL = (
+    f"""
+    CREATE TABLE IF NOT EXISTS submission_receipt_groups (
+        group_key TEXT NOT NULL,
+        tab TEXT NOT NULL,
+        archived INTEGER NOT NULL,
+        {', '.join(f'{column} NOT NULL' for column in KEY_COLUMNS)},
+        last_id INTEGER NOT NULL,
+        PRIMARY KEY (group_key, tab, archived)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS submission_receipt_group_counts (
+        tab TEXT NOT NULL,
+        archived INTEGER NOT NULL,
+        groups INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (tab, archived)
+    )
+    """,
+    *(
+        f"CREATE INDEX IF NOT EXISTS ix_srg_{columns[0][2:]} ON submission_receipt_groups"
+        f"(tab, archived, {', '.join(columns)}, last_id)"
+        for _, _, columns in _SORT_KEYS
+    ),
+    # list page-row fetch and running totals (Alembic q4r5s6t7u8v9 on migrated databases)
+    "CREATE INDEX IF NOT EXISTS ix_ws_receipt_number ON warehouse_submissions(receipt_number)",
+    "CREATE INDEX IF NOT EXISTS ix_ws_product_po ON warehouse_submissions(product_name, assigned_po_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_ws_po_receipt ON warehouse_submissions(assigned_po_id, receipt_number)",
+    "CREATE INDEX IF NOT EXISTS ix_sbd_submission_id ON submission_bag_deductions(submission_id)",
+)
+
+
+def receipt_groups_trigger_ddl() -> list[str]:
+    statements = []
+    for suffix, event, when, (receipts_sql, ids_sql) in _TRIGGERS:
+        when_sql = f"WHEN {when}" if when else ""
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_receipt_groups_{suffix}
+            AFTER {event} {when_sql}
+            BEGIN
+            {_refresh_sql(receipts_sql, ids_sql)}
+            END
+            """
+        )
+    for suffix, ref, delta in (("ins", "NEW", "+ 1"), ("del", "OLD", "- 1")):
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_receipt_group_counts_{suffix}
+            AFTER {'INSERT' if suffix == 'ins' else 'DELETE'} ON submission_receipt_groups
+            BEGIN
+            UPDATE submission_receipt_group_counts SET groups = groups {delta}
+            WHERE tab = {ref}.tab AND archived = {ref}.archived;
+            END
+            """
+        )
+    return statements
+
+
+def receipt_groups_supported(conn: sqlite3.Connection) -> bool:
+    """True when every source column the triggers reference exists (triggers fail at fire time otherwise)."""
+    return all(table_columns(conn, table).issuperset(columns) for table, columns in _REQUIRED_COLUMNS.items())
+
+
+def receipt_groups_installed(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_receipt_groups_ws_ins'"
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_submission_receipt_groups(conn: sqlite3.Connection) -> int:
+    """Recompute every group row and bucket count from source; returns rows written."""
+    conn.execute("DELETE FROM submission_receipt_groups")
+    cur = conn.execute(
+        f"INSERT INTO submission_receipt_groups (group_key, tab, archived, {', '.join(KEY_COLUMNS)}, last_id) "
+        f"{groups_source_sql('1=1')}"
+    )
+    conn.execute(
+        """
+        UPDATE submission_receipt_group_counts SET groups = (
+            SELECT COUNT(*) FROM submission_receipt_groups g
+            WHERE g.tab = submission_receipt_group_counts.tab AND g.archived = submission_receipt_group_counts.archived
+        )
+        """
+    )
+    return cur.rowcount
+
+
+def ensure_submission_receipt_groups(conn: sqlite3.Connection) -> bool:
+    """Create tables + triggers and backfill when empty; False when the schema cannot support them."""
+    if not receipt_groups_supported(conn):
+        return False
+    for ddl in SUBMISSION_RECEIPT_GROUPS_DDL:
+        conn.execute(ddl)
+    conn.executemany(
+        "INSERT OR IGNORE INTO submission_receipt_group_counts (tab, archived, groups) VALUES (?, ?, 0)", BUCKETS
+    )
+    for ddl in receipt_groups_trigger_ddl():
+        conn.execute(ddl)
+    empty = conn.execute("SELECT 1 FROM submission_receipt_groups LIMIT 1").fetchone() is None
+    if empty and conn.execute("SELECT 1 FROM warehouse_submissions LIMIT 1").fetchone() is not None:
+        written = rebuild_submission_receipt_groups(conn)
+        logger.info("submission_receipt_groups backfilled with %d groups", written)
+    return True
+
+
+def receipt_group_count(conn: sqlite3.Connection, tab: str, archived: bool) -> int:
+    row = conn.execute(
+        "SELECT groups FROM submission_receipt_group_counts WHERE tab = ? AND archived = ?", (tab, int(archived))
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def reconcile_submission_receipt_groups(conn: sqlite3.Connection, *, fix: bool = False) -> dict[str, Any]:
+    """
+    Recompute every group from source rows and compare with the table and bucket counts.
+
+    Returns ``groups``, ``drifted`` / ``missing`` / ``orphaned`` group counts, ``counts_drifted``
+    (buckets whose stored count is wrong) and, with ``fix=True``, the rows rewritten by a rebuild.
+    """
+    columns = ", ".join((*KEY_COLUMNS, "last_id"))
+    source = {
+        (row[0], row[1], row[2]): tuple(row[3:]) for row in conn.execute(f"SELECT * FROM ({groups_source_sql('1=1')})")
+    }
+    stored = {
+        (row[0], row[1], row[2]): tuple(row[3:])
+        for row in conn.execute(f"SELECT group_key, tab, archived, {columns} FROM submission_receipt_groups")
+    }
+    expected_counts: dict[tuple[str, int], int] = {}
+    for _, tab, archived in source:
+        expected_counts[(tab, archived)] = expected_counts.get((tab, archived), 0) + 1
+    counts_drifted = sum(
+        1 for tab, archived in BUCKETS if receipt_group_count(conn, tab, archived) != expected_counts.get((tab, archived), 0)
+    )
+    report: dict[str, Any] = {
+        "groups": len(source),
+        "drifted": sum(1 for key, value in source.items() if key in stored and stored[key] != value),
+        "missing": sum(1 for key in source if key not in stored),
+        "orphaned": sum(1 for key in stored if key not in source),
+        "counts_drifted": counts_drifted,
+    }
+    if fix:
+        drift = report["drifted"] or report["missing"] or report["orphaned"] or counts_drifted
+        report["fixed"] = rebuild_submission_receipt_groups(conn) if drift else 0
+    return report
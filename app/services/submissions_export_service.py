@@ -0,0 +1,150 @@
+"""
+Streaming CSV export of warehouse submissions.
+
+Rows come from ``build_submissions_export_query`` already in final order with their running bag
+totals, so the export iterates the cursor in chunks and never holds the full result in memory.
+Two layouts share one row shape:
+
+  report    -- the spreadsheet layout (labelled headers, Yes/No flags, status labels)
+  columnar  -- analytics layout: snake_case headers, 0/1 flags, status codes, submission id and
+               receipt number included, one value type per column
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+EXPORT_CHUNK_ROWS = 500
+
+# (columnar name, report header or None when the report layout omits the column)
+EXPORT_COLUMNS: tuple[tuple[str, str | None], ...] = (
+    ("submission_id", None),
+    ("receipt_number", None),
+    ("submission_date", "Submission Date"),
+    ("created_at", "Created At"),
+    ("employee_name", "Employee Name"),
+    ("product_name", "Product Name"),
+    ("submission_type", "Submission Type"),
+    ("machine", "Machine"),
+    ("tablet_type", "Tablet Type"),
+    ("po_number", "PO Number"),
+    ("po_closed", "PO Closed"),
+    ("box_number", "Box Number"),
+    ("bag_number", "Bag Number"),
+    ("displays_made", "Displays Made"),
+    ("packs_remaining", "Packs Remaining"),
+    ("bottle_sealing_machine_count", "Bottle Sealing Machine Count"),
+    ("loose_tablets", "Loose Tablets"),
+    ("cards_reopened", "Cards re-opened"),
+    ("total_tablets", "Total Tablets (Individual)"),
+    ("cumulative_bag_tablets", "Cumulative bag (packaged)"),
+    ("bag_label_count", "Bag Label Count"),
+    ("count_status", "Count Status"),
+    ("po_verified", "PO Assignment Verified"),
+    ("admin_notes", "Admin Notes"),
+)
+
+EXPORT_LAYOUTS = ("report", "columnar")
+
+_COUNT_STATUS_LABELS = {
+    "no_bag_label": "No Bag Label",
+    "match": "Match",
+    "under": "Under",
+    "over": "Over",
+    "repack_po": "Repack PO",
+}
+
+
+def export_count_status(row: dict[str, Any]) -> str:
+    """Packaged running total vs bag label count (``repack_po`` for repack rows)."""
+    if row.get("submission_type") == "repack":
+        return "repack_po"
+    bag_count = row.get("bag_label_count", 0) or 0
+    cumulative = row.get("cumulative_bag_tablets", 0) or 0
+    if bag_count == 0:
+        return "no_bag_label"
+    if abs(cumulative - bag_count) <= 5:
+        return "match"
+    return "under" if cumulative < bag_count else "over"
+
+
+def export_row_values(row: dict[str, Any], layout: str = "report") -> list[Any]:
+    created_at = row.get("created_at", "")
+    if isinstance(created_at, str):
+        created_at = created_at[:19]  # Truncate to seconds
+    status = export_count_status(row)
+    values = {
+        "submission_id": row.get("id"),
+        "receipt_number": row.get("receipt_number"),
+        "submission_date": row.get("submission_date") or row.get("filter_date") or "",
+        "created_at": created_at,
+        "employee_name": row.get("employee_name", ""),
+        "product_name": row.get("product_name", ""),
+        "submission_type": row.get("submission_type", "packaged"),
+        "machine": row.get("machine_display_name") or "",
+        "tablet_type": row.get("tablet_type_name", ""),
+        "po_number": row.get("po_number", ""),
+        "box_number": row.get("box_number", ""),
+        "bag_number": row.get("bag_number", ""),
+        "displays_made": row.get("displays_made", 0),
+        "packs_remaining": row.get("packs_remaining", 0),
+        "bottle_sealing_machine_count": row.get("bottle_sealing_machine_count", ""),
+        "loose_tablets": row.get("loose_tablets", 0),
+        "cards_reopened": row.get("cards_reopened", 0),
+        "total_tablets": row.get("calculated_total", 0) or 0,
+        "cumulative_bag_tablets": row.get("cumulative_bag_tablets", 0) or 0,
+        "bag_label_count": row.get("bag_label_count", 0),
+        "admin_notes": row.get("admin_notes", ""),
+    }
+    if layout == "columnar":
+        values["po_closed"] = 1 if row.get("po_closed") else 0
+        values["po_verified"] = 1 if row.get("po_verified", 0) else 0
+        values["count_status"] = status
+        return [values[name] for name, _label in EXPORT_COLUMNS]
+    values["po_closed"] = "Yes" if row.get("po_closed") else "No"
+    values["po_verified"] = "Yes" if row.get("po_verified", 0) else "No"
+    values["count_status"] = _COUNT_STATUS_LABELS[status]
+    return [values[name] for name, label in EXPORT_COLUMNS if label]
+
+
+def iter_submissions_csv(
+    conn,
+    sql: str,
+    params: list[Any],
+    *,
+    layout: str = "report",
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[str]:
+    """Header, then one CSV text chunk per ``chunk_rows`` rows fetched from the cursor."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if layout == "columnar":
+        writer.writerow([name for name, _label in EXPORT_COLUMNS])
+    else:
+        writer.writerow([label for _name, label in EXPORT_COLUMNS if label])
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        for row in rows:
+            writer.writerow(export_row_values(dict(row), layout))
+        chunk = buffer.getvalue()
+        if chunk:
+            yield chunk
+            buffer.seek(0)
+            buffer.truncate(0)
+        if not rows:
+            return
+
+
+def gzip_chunks(chunks: Iterable[str], *, level: int = 6) -> Iterator[bytes]:
+    """UTF-8 encode and gzip a text stream incrementally (a valid ``.gz`` member)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
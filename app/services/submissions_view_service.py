@@ -1,5 +1,8 @@
 """Helpers for submissions list/export query composition."""
 
+import base64
+import hashlib
+import json
 from typing import Any
 
 ALLOWED_SORT_COLUMNS = {
@@ -69,15 +72,526 @@ def append_submission_archive_tab_filters(
     return query
 
 
-def append_submission_sort(query: str, sort_by: str, sort_order: str) -> str:
-    sort_column = ALLOWED_SORT_COLUMNS.get(sort_by, 'ws.created_at')
+def submission_order_by_sql(sort_by: str, sort_order: str, *, prefix: str = 'ws.') -> str:
+    """ORDER BY body for the list/export sort options; ``prefix`` qualifies submission columns."""
     sort_direction = 'ASC' if str(sort_order).lower() == 'asc' else 'DESC'
     if sort_by == 'receipt_number':
-        query += f""" ORDER BY
-            CASE WHEN ws.receipt_number IS NULL THEN 1 ELSE 0 END,
-            CAST(SUBSTR(ws.receipt_number, 1, INSTR(ws.receipt_number, '-') - 1) AS INTEGER) {sort_direction},
-            CAST(SUBSTR(ws.receipt_number, INSTR(ws.receipt_number, '-') + 1) AS INTEGER) {sort_direction}
+        rn = f'{prefix}receipt_number'
+        return f"""
+            CASE WHEN {rn} IS NULL THEN 1 ELSE 0 END,
+            CAST(SUBSTR({rn}, 1, INSTR({rn}, '-') - 1) AS INTEGER) {sort_direction},
+            CAST(SUBSTR({rn}, INSTR({rn}, '-') + 1) AS INTEGER) {sort_direction}
         """
+    sort_column = ALLOWED_SORT_COLUMNS.get(sort_by, 'ws.created_at')
+    if sort_column.startswith('ws.'):
+        sort_column = prefix + sort_column[3:]
+    return f'{sort_column} {sort_direction}'
+
+
+def append_submission_sort(query: str, sort_by: str, sort_order: str) -> str:
+    return query + ' ORDER BY ' + submission_order_by_sql(sort_by, sort_order)
+
+
+# ---------------------------------------------------------------------------
+# Warehouse list: receipt-group pagination in SQL
+# ---------------------------------------------------------------------------
+
+_TABLETS_PER_PACKAGE_SQL = """COALESCE(pd.tablets_per_package, (
+                SELECT pd2.tablets_per_package
+                FROM product_details pd2
+                JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
+                WHERE tt2.inventory_item_id = ws.inventory_item_id
+                LIMIT 1
+            ), 0)"""
+
+
+def submission_calculated_total_sql(tablets_per_package: str = _TABLETS_PER_PACKAGE_SQL) -> str:
+    """Per-row tablet total by submission type; ``tablets_per_package`` is the product fallback expression."""
+    return f"""CASE COALESCE(ws.submission_type, 'packaged')
+        WHEN 'machine' THEN COALESCE(
+            CASE
+                WHEN COALESCE(m.machine_role, 'sealing') = 'sealing' THEN
+                    MAX(
+                        COALESCE(ws.tablets_pressed_into_cards, 0),
+                        COALESCE(ws.packs_remaining, 0) * {tablets_per_package}
+                    )
+                ELSE
+                    COALESCE(ws.tablets_pressed_into_cards, 0)
+            END,
+            ws.loose_tablets,
+            (ws.packs_remaining * {tablets_per_package}),
+            0
+        )
+        WHEN 'bottle' THEN COALESCE(
+            (SELECT SUM(sbd.tablets_deducted) FROM submission_bag_deductions sbd WHERE sbd.submission_id = ws.id),
+            COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
+        )
+        WHEN 'repack' THEN (
+            (ws.displays_made * COALESCE(pd.packages_per_display, 0) * {tablets_per_package}) +
+            (ws.packs_remaining * {tablets_per_package})
+        )
+        ELSE (
+            (ws.displays_made * COALESCE(pd.packages_per_display, 0) * {tablets_per_package}) +
+            (ws.packs_remaining * {tablets_per_package}) +
+            ws.loose_tablets
+        )
+    END"""
+
+
+SUBMISSION_CALCULATED_TOTAL_SQL = submission_calculated_total_sql()
+
+# Joins shared by the list query, the receipt-group page query and the running totals; the
+# filter helpers above reference po / pd / tt columns.
+SUBMISSION_LIST_FROM = """
+    FROM warehouse_submissions ws
+    LEFT JOIN purchase_orders po ON ws.assigned_po_id = po.id
+    LEFT JOIN product_details pd ON ws.product_name = pd.product_name
+    LEFT JOIN tablet_types tt ON pd.tablet_type_id = tt.id
+    LEFT JOIN bags b ON ws.bag_id = b.id
+    LEFT JOIN small_boxes sb ON b.small_box_id = sb.id
+    LEFT JOIN receiving r ON sb.receiving_id = r.id
+    LEFT JOIN machines m ON ws.machine_id = m.id
+"""
+
+SUBMISSION_LIST_SELECT = f"""
+    SELECT ws.*, po.po_number, po.closed as po_closed, po.id as po_id_for_filter, po.zoho_po_id,
+           m.machine_name AS machine_display_name,
+           COALESCE(m.machine_role, 'sealing') AS machine_role,
+           pd.packages_per_display, pd.tablets_per_package,
+           COALESCE(pd.tablets_per_package, (
+               SELECT pd2.tablets_per_package
+               FROM product_details pd2
+               JOIN tablet_types tt2 ON pd2.tablet_type_id = tt2.id
+               WHERE tt2.inventory_item_id = ws.inventory_item_id
+               LIMIT 1
+           )) as tablets_per_package_final,
+           tt.inventory_item_id, tt.id as tablet_type_id, tt.tablet_type_name,
+           COALESCE(ws.po_assignment_verified, 0) as po_verified,
+           COALESCE(ws.needs_review, 0) as needs_review,
+           COALESCE(pd.is_variety_pack, 0) as is_variety_pack,
+           ws.admin_notes,
+           COALESCE(ws.submission_type, 'packaged') as submission_type,
+           COALESCE(ws.submission_date, DATE(ws.created_at)) as filter_date,
+           COALESCE(b.bag_label_count, ws.bag_label_count, 0) as bag_label_count,
+           b.bag_label_count as receive_bag_count,
+           ws.bag_id,
+           r.id as receive_id,
+           r.received_date,
+           r.receive_name as stored_receive_name,
+           COALESCE(sb.box_number, ws.box_number) AS resolved_box_number,
+           COALESCE(b.bag_number, ws.bag_number) AS resolved_bag_number,
+           {SUBMISSION_CALCULATED_TOTAL_SQL} as calculated_total
+    {SUBMISSION_LIST_FROM}
+    WHERE 1=1
+"""
+
+# Same key format as ``build_receipt_groups``: one group per receipt, receipt-less rows alone.
+RECEIPT_GROUP_KEY_SQL = (
+    "CASE WHEN ws.receipt_number IS NULL OR ws.receipt_number = '' "
+    "THEN 'null:' || ws.id ELSE 'rec:' || ws.receipt_number END"
+)
+
+_MISSING_TS = 1e18  # stands in for +/-inf so missing times sort last
+
+
+def _epoch_sql(expr: str) -> str:
+    """Seconds since epoch for a naive UTC timestamp, falling back to its date part; NULL if unparseable."""
+    return (
+        f"((COALESCE(julianday({expr}), julianday(substr({expr}, 1, 10))) - 2440587.5) * 86400.0)"
+    )
+
+
+def _receipt_part_sql(part: str) -> str:
+    return f"CAST(TRIM({part}) AS INTEGER)"
+
+
+_RECEIPT_HEAD = "SUBSTR(ws.receipt_number, 1, INSTR(ws.receipt_number, '-') - 1)"
+_RECEIPT_TAIL = "SUBSTR(ws.receipt_number, INSTR(ws.receipt_number, '-') + 1)"
+_RECEIPT_PARSEABLE = (
+    f"INSTR(COALESCE(ws.receipt_number, ''), '-') > 0"
+    f" AND TRIM({_RECEIPT_HEAD}) GLOB '[0-9]*' AND TRIM({_RECEIPT_HEAD}) NOT GLOB '*[^0-9]*'"
+    f" AND TRIM({_RECEIPT_TAIL}) GLOB '[0-9]*' AND TRIM({_RECEIPT_TAIL}) NOT GLOB '*[^0-9]*'"
+)
+
+GROUP_SORT_KEYS = ('created_at', 'receipt_number', 'total', 'product_name', 'employee_name', 'bag_start', 'bag_end')
+
+
+def _group_sort_sql(sort_by: str, descending: bool, alias: str = 's') -> tuple[list[str], list[str]]:
+    """Row-level columns and per-group sort key aggregates for one receipt-group ordering.
+
+    Mirrors the old in-Python receipt ordering: ``created_at`` is the latest activity of any
+    child (created / bag times / end of the submission day), receipts sort by their two numeric
+    parts (unparseable last), bag times sort receipts with no time last in both directions.
+    Row columns are named ``{alias}1``, ``{alias}2``.
+    """
+    if sort_by == 'receipt_number':
+        return (
+            [
+                f"CASE WHEN {_RECEIPT_PARSEABLE} THEN {_receipt_part_sql(_RECEIPT_HEAD)} ELSE 999999 END AS {alias}1",
+                f"CASE WHEN {_RECEIPT_PARSEABLE} THEN {_receipt_part_sql(_RECEIPT_TAIL)} ELSE 999999 END AS {alias}2",
+            ],
+            [f"MAX({alias}1)", f"MAX({alias}2)"],
+        )
+    if sort_by == 'total':
+        return [f"{SUBMISSION_CALCULATED_TOTAL_SQL} AS {alias}1"], [f"SUM(COALESCE({alias}1, 0))"]
+    if sort_by == 'product_name':
+        return (
+            [f"NULLIF(ws.product_name, '') AS {alias}1"],
+            [
+                f"CASE COUNT(DISTINCT {alias}1) WHEN 0 THEN '' WHEN 1 THEN MIN({alias}1) "
+                f"ELSE MIN({alias}1) || ' (+' || (COUNT(DISTINCT {alias}1) - 1) || ' more)' END"
+            ],
+        )
+    if sort_by == 'employee_name':
+        return [f"COALESCE(ws.employee_name, '') AS {alias}1"], [f"MAX({alias}1)" if descending else f"MIN({alias}1)"]
+    if sort_by in ('bag_start', 'bag_end'):
+        column = 'ws.bag_start_time' if sort_by == 'bag_start' else 'ws.bag_end_time'
+        agg = 'MIN' if sort_by == 'bag_start' else 'MAX'
+        missing = -_MISSING_TS if descending else _MISSING_TS
+        return (
+            [f"NULLIF({column}, '') AS {alias}1"],
+            [f"COALESCE({_epoch_sql(f'{agg}({alias}1)')}, {missing!r})"],
+        )
+    day_end = "substr(COALESCE(ws.submission_date, DATE(ws.created_at)), 1, 10) || ' 23:59:59'"
+    parts = [
+        f"COALESCE({_epoch_sql(expr)}, {-_MISSING_TS!r})"
+        for expr in ("ws.created_at", "ws.bag_end_time", "ws.bag_start_time")
+    ]
+    parts.append(
+        f"CASE WHEN length(substr(COALESCE(ws.submission_date, DATE(ws.created_at)), 1, 10)) = 10 "
+        f"THEN COALESCE({_epoch_sql(day_end)}, {-_MISSING_TS!r}) ELSE {-_MISSING_TS!r} END"
+    )
+    return [f"MAX({', '.join(parts)}) AS {alias}1"], [f"MAX({alias}1)"]
+
+
+def _cursor_fingerprint(where_sql: str, params: list[Any], sort_by: str, descending: bool) -> str:
+    raw = json.dumps([where_sql, [str(p) for p in params], sort_by, descending])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_group_cursor(fingerprint: str, page: int, direction: str, keys: list[Any]) -> str:
+    """Opaque keyset token: the sort key of the group adjacent to the requested page."""
+    raw = json.dumps({"f": fingerprint, "p": page, "d": direction, "k": keys}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_group_cursor(token: str | None) -> dict[str, Any] | None:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(data, dict) or data.get("d") not in ("next", "prev") or not isinstance(data.get("k"), list):
+        return None
+    return data
+
+
+def fetch_receipt_group_page(
+    conn,
+    where_sql: str,
+    params: list[Any],
+    sort_by: str,
+    sort_order: str,
+    *,
+    page: int,
+    per_page: int,
+    cursor: str | None = None,
+    scope: tuple[str, bool] | None = None,
+) -> dict[str, Any]:
+    """One page of receipt-group keys, ordered and paginated in SQL.
+
+    ``where_sql`` / ``params`` are the filter fragments from ``append_submission_common_filters``
+    and ``append_submission_archive_tab_filters``. A ``cursor`` issued for the neighbouring page
+    of the same filters/sort seeks by key (no OFFSET); otherwise ``page`` is used as an offset.
+    Pass ``scope=(active_tab, show_archived)`` when ``where_sql`` holds only the archive/tab
+    filters: the page then reads the trigger-maintained ``submission_receipt_groups`` index and
+    its bucket count instead of aggregating every filtered row.
+    Returns ``group_keys`` in display order plus pagination numbers and the prev/next cursors.
+    """
+    from app.services.submission_receipt_groups import (
+        receipt_group_count,
+        receipt_groups_installed,
+        sort_columns,
+    )
+
+    sort_by = sort_by if sort_by in GROUP_SORT_KEYS else 'created_at'
+    descending = str(sort_order or 'desc').lower() != 'asc'
+    row_cols, group_keys = _group_sort_sql(sort_by, descending)
+    fingerprint = _cursor_fingerprint(where_sql, params, sort_by, descending)
+    key_names = [f"k{i}" for i in range(len(group_keys))] + ["last_id"]
+
+    indexed = scope is not None and receipt_groups_installed(conn)
+    if indexed:
+        tab, archived = scope
+        stored = sort_columns(sort_by, descending)
+        seek_cols = [*stored, "last_id"]
+        base = f"""
+            SELECT group_key, {', '.join(f'{c} AS k{i}' for i, c in enumerate(stored))}, last_id
+            FROM submission_receipt_groups
+            WHERE tab = ? AND archived = ?
+        """
+        base_args: list[Any] = [tab, int(bool(archived))]
     else:
-        query += f' ORDER BY {sort_column} {sort_direction}'
-    return query
+        seek_cols = key_names
+        base = f"""
+            WITH rows AS (
+                SELECT {RECEIPT_GROUP_KEY_SQL} AS group_key, ws.id AS id, {', '.join(row_cols)}
+                {SUBMISSION_LIST_FROM}
+                WHERE 1=1 {where_sql}
+            ),
+            groups AS (
+                SELECT group_key, {', '.join(f'{expr} AS k{i}' for i, expr in enumerate(group_keys))},
+                       MAX(id) AS last_id, COUNT(*) OVER () AS total_groups
+                FROM rows
+                GROUP BY group_key
+            )
+            SELECT group_key, {', '.join(key_names)}, total_groups FROM groups WHERE 1=1
+        """
+        base_args = list(params)
+
+    def run(seek_op: str | None, seek_keys: list[Any] | None, reverse: bool, offset: int):
+        sql = base
+        args = list(base_args)
+        if seek_op:
+            placeholders = ", ".join("?" for _ in seek_cols)
+            sql += f" AND ({', '.join(seek_cols)}) {seek_op} ({placeholders})"
+            args.extend(seek_keys)
+        direction = "DESC" if descending != reverse else "ASC"
+        sql += " ORDER BY " + ", ".join(f"{k} {direction}" for k in seek_cols)
+        sql += " LIMIT ? OFFSET ?"
+        args.extend([per_page, offset])
+        rows = conn.execute(sql, args).fetchall()
+        return list(reversed(rows)) if reverse else rows
+
+    page = max(1, int(page or 1))
+    token = decode_group_cursor(cursor)
+    rows = None
+    if token and token.get("f") == fingerprint and token.get("p") == page and len(token["k"]) == len(key_names):
+        forward = token["d"] == "next"
+        op = (">" if forward else "<") if not descending else ("<" if forward else ">")
+        rows = run(op, token["k"], not forward, 0)
+    if not rows:
+        rows = run(None, None, False, (page - 1) * per_page)
+    if indexed:
+        total = receipt_group_count(conn, tab, archived)
+    elif rows:
+        total = rows[0]["total_groups"]
+    else:
+        total = conn.execute(
+            f"SELECT COUNT(DISTINCT {RECEIPT_GROUP_KEY_SQL}) {SUBMISSION_LIST_FROM} WHERE 1=1 {where_sql}",
+            params,
+        ).fetchone()[0]
+    if not rows and total and page > 1:
+        page = (total + per_page - 1) // per_page
+        rows = run(None, None, False, (page - 1) * per_page)
+    total_pages = (total + per_page - 1) // per_page if total else 0
+    if not total:
+        page = 1
+
+    def keys_of(row) -> list[Any]:
+        return [row[k] for k in key_names]
+
+    return {
+        "group_keys": [row["group_key"] for row in rows],
+        "page": page,
+        "total": total,
+        "total_pages": total_pages,
+        "next_cursor": encode_group_cursor(fingerprint, page + 1, "next", keys_of(rows[-1]))
+        if rows and page < total_pages
+        else None,
+        "prev_cursor": encode_group_cursor(fingerprint, page - 1, "prev", keys_of(rows[0]))
+        if rows and page > 1
+        else None,
+    }
+
+
+def fetch_receipt_group_rows(conn, where_sql: str, params: list[Any], group_keys: list[str]) -> list[Any]:
+    """Full list rows (``SUBMISSION_LIST_SELECT``) for the given receipt groups only."""
+    receipts = [k[4:] for k in group_keys if k.startswith("rec:")]
+    ids = [int(k[5:]) for k in group_keys if k.startswith("null:")]
+    if not receipts and not ids:
+        return []
+    clauses = []
+    args = list(params)
+    if receipts:
+        clauses.append(f"ws.receipt_number IN ({', '.join('?' for _ in receipts)})")
+        args.extend(receipts)
+    if ids:
+        clauses.append(
+            f"((ws.receipt_number IS NULL OR ws.receipt_number = '') AND ws.id IN ({', '.join('?' for _ in ids)}))"
+        )
+        args.extend(ids)
+    sql = SUBMISSION_LIST_SELECT + where_sql + f" AND ({' OR '.join(clauses)}) ORDER BY ws.created_at, ws.id"
+    return conn.execute(sql, args).fetchall()
+
+
+_BAG_BOX_SQL = "CAST(COALESCE(sb.box_number, ws.box_number) AS TEXT)"
+_BAG_NUMBER_SQL = "CAST(COALESCE(b.bag_number, ws.bag_number) AS TEXT)"
+
+
+def fetch_bag_running_totals(conn, where_sql: str, params: list[Any], rows: list[dict]) -> dict[int, dict[str, Any]]:
+    """Per-bag running totals up to each of ``rows``, computed with window functions.
+
+    Bags are keyed by PO, product, box and bag number: bag rows add ``loose_tablets``, machine and
+    packaged rows add their calculated total, in ``created_at`` order under the current filters.
+    ``rows`` must already carry resolved box/bag numbers (``apply_resolved_bag_fields``); only
+    their partitions are scanned.
+    """
+    def as_text(value):
+        return None if value is None else str(value)
+
+    partitions = {
+        (r.get("assigned_po_id"), r.get("product_name"), as_text(r.get("box_number")), as_text(r.get("bag_number")))
+        for r in rows
+    }
+    if not partitions:
+        return {}
+    wanted = {r.get("id") for r in rows}
+    values = ", ".join("(?, ?, ?, ?)" for _ in partitions)
+    # (product, PO) pairs seek ix_ws_product_po, so the scan is bounded by the page's POs rather
+    # than every row of its products
+    pairs = sorted({(p[1], p[0]) for p in partitions if p[1] is not None}, key=lambda p: (p[0], str(p[1])))
+    args: list[Any] = [v for p in partitions for v in p]
+    args.extend(v for pair in pairs for v in pair)
+    args.extend(params)
+    calc = f"COALESCE({SUBMISSION_CALCULATED_TOTAL_SQL}, 0)"
+    partition = f"ws.assigned_po_id, ws.product_name, {_BAG_BOX_SQL}, {_BAG_NUMBER_SQL}"
+    window = f"OVER (PARTITION BY {partition} ORDER BY ws.created_at, ws.id ROWS UNBOUNDED PRECEDING)"
+    sql = f"""
+        WITH bag_keys(po_id, product_name, box_number, bag_number) AS (VALUES {values})
+        SELECT ws.id AS id,
+               SUM(CASE WHEN ws.submission_type = 'bag' THEN COALESCE(ws.loose_tablets, 0) ELSE 0 END) {window}
+                   AS bag_total,
+               SUM(CASE WHEN ws.submission_type = 'machine' THEN {calc} ELSE 0 END) {window} AS machine_total,
+               SUM(CASE WHEN ws.submission_type = 'packaged' THEN {calc} ELSE 0 END) {window} AS packaged_total
+        {SUBMISSION_LIST_FROM}
+        WHERE ({' OR '.join('(ws.product_name = ? AND ws.assigned_po_id IS ?)' for _ in pairs) or '0'})
+          AND EXISTS (
+            SELECT 1 FROM bag_keys k
+            WHERE ws.assigned_po_id IS k.po_id AND ws.product_name IS k.product_name
+              AND {_BAG_BOX_SQL} IS k.box_number AND {_BAG_NUMBER_SQL} IS k.bag_number
+        ) {where_sql}
+    """
+    out = {}
+    for row in conn.execute(sql, args).fetchall():
+        if row["id"] in wanted:
+            out[row["id"]] = {
+                "bag_total": row["bag_total"],
+                "machine_total": row["machine_total"],
+                "packaged_total": row["packaged_total"],
+            }
+    return out
+
+
+# ---------------------------------------------------------------------------
+# CSV export: receipt grouping and running totals in SQL so rows can stream
+# ---------------------------------------------------------------------------
+
+# First product per inventory item, resolved once per query instead of a correlated lookup per row.
+_EXPORT_TPP_FALLBACK_CTE = """
+    tpp_fallback AS (
+        SELECT tt2.inventory_item_id AS inventory_item_id, pd2.tablets_per_package AS tablets_per_package
+        FROM tablet_types tt2
+        JOIN product_details pd2 ON pd2.id = (
+            SELECT MIN(pd3.id) FROM product_details pd3 WHERE pd3.tablet_type_id = tt2.id
+        )
+        WHERE tt2.inventory_item_id IS NOT NULL
+    )
+"""
+
+_EXPORT_TPP_SQL = "COALESCE(pd.tablets_per_package, tpf.tablets_per_package, 0)"
+
+
+def build_submissions_export_query(
+    where_sql: str,
+    params: list[Any],
+    sort_by: str,
+    sort_order: str,
+    *,
+    group_receipts: bool = True,
+) -> tuple[str, list[Any]]:
+    """Export query yielding rows in final CSV order with ``cumulative_bag_tablets`` attached.
+
+    Rows are first numbered in the requested sort (``sort_seq``); the packaged running total per
+    PO / product / box / bag follows that order. With ``group_receipts`` the rows of one receipt
+    are kept together: receipts ordered by their newest/oldest ``created_at``, parsed receipt
+    number, max/min total or max/min sort value, receipt-less rows after them in sort order --
+    except for ``created_at``, where receipt-less rows are merged in by time.
+    """
+    descending = str(sort_order).lower() != 'asc'
+    direction = 'DESC' if descending else 'ASC'
+    agg = 'MAX' if descending else 'MIN'
+    group_window = "OVER (PARTITION BY receipt_number)"
+    if sort_by == 'created_at':
+        group_keys = [f"{agg}(created_at) {group_window}"]
+    elif sort_by == 'receipt_number':
+        group_keys = ["receipt_k1", "receipt_k2"]
+    elif sort_by == 'total':
+        group_keys = [f"{agg}(COALESCE(calculated_total, 0)) {group_window}"]
+    elif sort_by in ('employee_name', 'product_name'):
+        group_keys = [f"COALESCE({agg}(NULLIF({sort_by}, '')) {group_window}, '')"]
+    else:
+        group_keys = ["''"]
+
+    order = ["sort_seq"]
+    if group_receipts:
+        order = (
+            ["no_receipt"]
+            + [f"g{i} {direction}" for i in range(len(group_keys))]
+            + ["group_first_seq", "sort_seq"]
+        )
+        if sort_by == 'created_at':
+            order.insert(0, f"CASE WHEN any_no_receipt THEN created_at END {direction}")
+
+    sql = f"""
+        WITH {_EXPORT_TPP_FALLBACK_CTE},
+        base AS (
+            SELECT ws.id, ws.receipt_number, ws.assigned_po_id, ws.submission_date, ws.created_at,
+                   ws.employee_name, ws.product_name, ws.submission_type, ws.box_number, ws.bag_number,
+                   ws.displays_made, ws.packs_remaining, ws.bottle_sealing_machine_count, ws.loose_tablets,
+                   ws.cards_reopened, ws.bag_label_count, ws.admin_notes,
+                   m.machine_name AS machine_display_name, tt.tablet_type_name,
+                   po.po_number, po.closed AS po_closed,
+                   COALESCE(ws.po_assignment_verified, 0) AS po_verified,
+                   COALESCE(ws.submission_date, DATE(ws.created_at)) AS filter_date,
+                   {submission_calculated_total_sql(_EXPORT_TPP_SQL)} AS calculated_total,
+                   CASE WHEN {_RECEIPT_PARSEABLE} THEN {_receipt_part_sql(_RECEIPT_HEAD)} ELSE 999999 END
+                       AS receipt_k1,
+                   CASE WHEN {_RECEIPT_PARSEABLE} THEN {_receipt_part_sql(_RECEIPT_TAIL)} ELSE 999999 END
+                       AS receipt_k2
+            FROM warehouse_submissions ws
+            LEFT JOIN purchase_orders po ON ws.assigned_po_id = po.id
+            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
+            LEFT JOIN tablet_types tt ON pd.tablet_type_id = tt.id
+            LEFT JOIN machines m ON ws.machine_id = m.id
+            LEFT JOIN tpp_fallback tpf ON tpf.inventory_item_id = ws.inventory_item_id
+            WHERE 1=1 {where_sql}
+        ),
+        seq AS (
+            SELECT base.*, ROW_NUMBER() OVER (
+                ORDER BY {submission_order_by_sql(sort_by, sort_order, prefix='')}, id
+            ) AS sort_seq
+            FROM base
+        ),
+        shaped AS (
+            SELECT seq.*,
+                   SUM(CASE WHEN submission_type = 'packaged' THEN COALESCE(calculated_total, 0) ELSE 0 END) OVER (
+                       PARTITION BY assigned_po_id, product_name, CAST(box_number AS TEXT), CAST(bag_number AS TEXT)
+                       ORDER BY sort_seq ROWS UNBOUNDED PRECEDING
+                   ) AS cumulative_bag_tablets,
+                   (receipt_number IS NULL OR receipt_number = '') AS no_receipt
+            FROM seq
+        ),
+        grouped AS (
+            SELECT shaped.*,
+                   {', '.join(f"CASE WHEN no_receipt THEN NULL ELSE {expr} END AS g{i}" for i, expr in enumerate(group_keys))},
+                   CASE WHEN no_receipt THEN sort_seq ELSE MIN(sort_seq) {group_window} END AS group_first_seq,
+                   MAX(no_receipt) OVER () AS any_no_receipt
+            FROM shaped
+        )
+        SELECT * FROM grouped
+        ORDER BY {', '.join(order)}
+    """
+    return sql, list(params)
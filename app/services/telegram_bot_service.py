@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import logging
+import sqlite3
 
 import requests
 from config import Config
 from flask import current_app
 
+from app.services import telegram_reporting_service as reports
+
 _logger = logging.getLogger(__name__)
 
 
@@ -87,6 +90,29 @@ def telegram_send_message(chat_id: int, text: str) -> None:
         response.raise_for_status()
 
 
+def command_reply(conn: sqlite3.Connection, cmd: str, args: str) -> str:
+    """Reply text for a parsed chat command (``cmd`` is empty for plain text)."""
+    if not cmd or cmd in ("/start", "/help"):
+        return help_text()
+    if cmd == "/daily":
+        day_iso, full_day = parse_daily_command_args(args)
+        try:
+            summary = reports.cached_daily_summary(conn, day_iso=day_iso, full_day=full_day)
+        except ValueError:
+            return "Usage: /daily, /daily full, /daily YYYY-MM-DD or /daily YYYY-MM-DD full"
+        return format_daily_summary(summary)
+    if cmd == "/status":
+        station_kind = (args or "").strip().lower()
+        if station_kind not in ("blister", "sealing", "packaging"):
+            return "Usage: /status blister OR /status sealing OR /status packaging"
+        return format_station_status(station_kind, reports.get_station_current_bag(conn, station_kind))
+    if cmd == "/counts":
+        if (args or "").strip().lower() != "today":
+            return "Usage: /counts today"
+        return format_counts_today(reports.count_bags_blistered_today(conn))
+    return "Unknown command.\n\n" + help_text()
+
+
 def format_daily_summary(summary: dict) -> str:
     lines = [
         f"Daily production summary ({summary['day']}, America/New_York)",
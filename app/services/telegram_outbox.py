@@ -0,0 +1,213 @@
+"""
+Telegram webhook work queue (``telegram_outbox``) and its background sender.
+
+The webhook only authenticates an update and records the command: one row per chat command,
+keyed by Telegram's ``update_id`` so webhook redeliveries are ignored, and a command that is
+already waiting for the same chat is not queued again (``/daily`` sent three times while the first
+is pending yields one reply). The replies are then built and sent, by a daemon thread per app worker
+when ``TELEGRAM_OUTBOX_WORKER`` is on:
+
+- rows are claimed with ``BEGIN IMMEDIATE`` + ``UPDATE ... RETURNING``, so several app workers can
+  share one outbox; a chat's next row is claimed only after every earlier row for that chat has
+  been sent or given up on (per-chat ordering);
+- the reply is stored when it is first built, so a retry sends the same text;
+- failed sends are retried with exponential backoff (Telegram's ``retry_after`` on 429) up to
+  ``TELEGRAM_OUTBOX_MAX_ATTEMPTS``; other 4xx answers fail the row at once;
+- a row whose sender stopped (worker restart) is re-queued after
+  ``TELEGRAM_OUTBOX_CLAIM_TIMEOUT_SECONDS``.
+
+With ``TELEGRAM_OUTBOX_WORKER`` off (the default: synchronous workers never run app threads) no thread
+is started and the webhook drains the outbox inline.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+import requests
+from config import Config
+
+from app.services import sqlite_work_queue as work_queue
+from app.services import telegram_bot_service as bot
+
+logger = logging.getLogger(__name__)
+
+_BACKOFF_BASE_SECONDS = 2.0
+_BACKOFF_MAX_SECONDS = 300.0
+_RETENTION_MS = 7 * 86_400_000
+
+TELEGRAM_OUTBOX_DDL: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS telegram_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        update_id INTEGER UNIQUE,
+        chat_id INTEGER NOT NULL,
+        command TEXT NOT NULL,
+        args TEXT NOT NULL DEFAULT '',
+        reply TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL,
+        last_error TEXT,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_telegram_outbox_chat ON telegram_outbox(chat_id, status, id)",
+    "CREATE INDEX IF NOT EXISTS ix_telegram_outbox_status ON telegram_outbox(status, next_attempt_at)",
+)
+
+
+def ensure_telegram_outbox(conn: sqlite3.Connection) -> None:
+    for ddl in TELEGRAM_OUTBOX_DDL:
+        conn.execute(ddl)
+
+
+def enqueue_command(
+    conn: sqlite3.Connection,
+    *,
+    chat_id: int,
+    command: str,
+    args: str = "",
+    update_id: int | None = None,
+) -> str:
+    """
+    Queue a chat command (caller commits): ``"queued"``, ``"coalesced"`` (the same command is
+    already waiting for this chat) or ``"duplicate"`` (``update_id`` was seen before).
+    """
+    args = (args or "").strip()
+    if conn.execute(
+        """
+        SELECT 1 FROM telegram_outbox
+        WHERE chat_id = ? AND command = ? AND args = ? AND status = 'pending' AND reply IS NULL
+        LIMIT 1
+        """,
+        (chat_id, command, args),
+    ).fetchone():
+        return "coalesced"
+    now = work_queue.now_ms()
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO telegram_outbox (
+            update_id, chat_id, command, args, next_attempt_at, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (update_id, chat_id, command, args, now, now, now),
+    )
+    return "queued" if cur.rowcount else "duplicate"
+
+
+_CLAIM_SQL = """
+    UPDATE telegram_outbox
+    SET status = 'sending', attempts = attempts + 1, updated_at = ?
+    WHERE id = (
+        SELECT o.id FROM telegram_outbox o
+        WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+          AND NOT EXISTS (
+            SELECT 1 FROM telegram_outbox e
+            WHERE e.chat_id = o.chat_id AND e.id < o.id AND e.status IN ('pending', 'sending')
+          )
+        ORDER BY o.id
+        LIMIT 1
+    )
+    RETURNING id, chat_id, command, args, reply, attempts
+"""
+
+
+def _claim_next(conn: sqlite3.Connection) -> sqlite3.Row | None:
+    now = work_queue.now_ms()
+    stale_before = now - int(Config.TELEGRAM_OUTBOX_CLAIM_TIMEOUT_SECONDS) * 1000
+
+    def requeue_stale(c: sqlite3.Connection) -> None:
+        c.execute(
+            "UPDATE telegram_outbox SET status = 'pending', updated_at = ? WHERE status = 'sending' AND updated_at < ?",
+            (now, stale_before),
+        )
+
+    return work_queue.claim_next(conn, _CLAIM_SQL, (now, now), reclaim=requeue_stale)
+
+
+def _retry_delay_seconds(exc: Exception, attempts: int) -> float | None:
+    """Seconds until the next attempt, or None when retrying cannot help."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status == 429:
+        try:
+            retry_after = float(response.json().get("parameters", {}).get("retry_after"))
+        except (TypeError, ValueError, AttributeError):
+            retry_after = None
+        if retry_after:
+            return retry_after
+    elif status is not None and 400 <= status < 500:
+        return None
+    return work_queue.backoff_seconds(attempts, _BACKOFF_BASE_SECONDS, _BACKOFF_MAX_SECONDS)
+
+
+def _deliver(conn: sqlite3.Connection, row: sqlite3.Row) -> None:
+    reply = row["reply"]
+    try:
+        if reply is None:
+            reply = bot.command_reply(conn, row["command"], row["args"])
+            conn.execute(
+                "UPDATE telegram_outbox SET reply = ?, updated_at = ? WHERE id = ?",
+                (reply, work_queue.now_ms(), row["id"]),
+            )
+        bot.telegram_send_message(row["chat_id"], reply)
+    except Exception as exc:
+        delay = _retry_delay_seconds(exc, int(row["attempts"]))
+        give_up = delay is None or int(row["attempts"]) >= int(Config.TELEGRAM_OUTBOX_MAX_ATTEMPTS)
+        log = logger.error if give_up else logger.warning
+        log(
+            "telegram outbox %s chat=%s attempt %s failed%s: %s",
+            row["id"],
+            row["chat_id"],
+            row["attempts"],
+            " (giving up)" if give_up else "",
+            exc,
+            exc_info=not isinstance(exc, requests.RequestException),
+        )
+        now = work_queue.now_ms()
+        conn.execute(
+            """
+            UPDATE telegram_outbox
+            SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (
+                "failed" if give_up else "pending",
+                str(exc)[:500],
+                now + int((delay or 0) * 1000),
+                now,
+                row["id"],
+            ),
+        )
+        return
+    conn.execute(
+        "UPDATE telegram_outbox SET status = 'sent', last_error = NULL, updated_at = ? WHERE id = ?",
+        (work_queue.now_ms(), row["id"]),
+    )
+
+
+def next_attempt_in_seconds(conn: sqlite3.Connection) -> float | None:
+    """Seconds until the earliest pending row is due (0 when one is due now), None when idle."""
+    return work_queue.next_due_in_seconds(conn, "telegram_outbox", "pending")
+
+
+def process_outbox(db_path: str | None = None, max_rows: int | None = None) -> int:
+    """Build and send every claimable row (or ``max_rows``); returns rows handled."""
+    return work_queue.drain(
+        db_path or Config.DATABASE_PATH,
+        _claim_next,
+        _deliver,
+        max_rows=max_rows,
+        cleanup=lambda conn: work_queue.prune_finished(conn, "telegram_outbox", ("sent", "failed"), _RETENTION_MS),
+    )
+
+
+_sender = work_queue.QueueWorker("telegram-outbox", process_outbox, next_attempt_in_seconds)
+
+
+def dispatch_outbox(db_path: str | None = None) -> None:
+    """Hand queued commands to the sender (call after the queuing transaction commits)."""
+    work_queue.dispatch(_sender, Config.TELEGRAM_OUTBOX_WORKER, db_path)
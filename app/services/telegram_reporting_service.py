@@ -6,12 +6,20 @@ import sqlite3
 from datetime import date, datetime, time, timedelta, timezone
 from zoneinfo import ZoneInfo
 
+from config import Config
+
 from app.services import workflow_constants as WC
-from app.services.reporting_analytics_service import _submission_report_rows
+from app.services.data_versions import versions_key
+from app.services.reporting_analytics_service import REPORT_VERSION_TABLES, _submission_report_rows
 from app.services.submission_calculator import calculate_submission_total_with_fallback
+from app.services.workflow_occupancy import current_bag_for_station_kind
+from app.utils import cache_utils
 
 _NY = ZoneInfo("America/New_York")
 
+DAILY_SUMMARY_CACHE_NAMESPACE = "telegram_daily_summary"
+_PARTIAL_DAY_CACHE_SECONDS = 60.0
+
 
 def _ny_window_for_day(target_day: date) -> tuple[int, int]:
     start_local = datetime.combine(target_day, time.min).replace(tzinfo=_NY)
@@ -210,24 +218,38 @@ def build_daily_summary(
     }
 
 
+def cached_daily_summary(
+    conn: sqlite3.Connection,
+    day_iso: str | None = None,
+    *,
+    full_day: bool = False,
+) -> dict[str, object]:
+    """
+    ``build_daily_summary`` cached per NY day and report data version (``data_versions`` of the
+    submission tables) for ``TELEGRAM_DAILY_SUMMARY_CACHE_SECONDS``. Today's through-now summary is
+    kept at most ``_PARTIAL_DAY_CACHE_SECONDS`` so its "through" time stays current.
+    """
+    target_day = _parse_target_day(day_iso)
+    partial = not full_day and target_day == datetime.now(_NY).date()
+    ttl = float(Config.TELEGRAM_DAILY_SUMMARY_CACHE_SECONDS)
+    if partial:
+        ttl = min(ttl, _PARTIAL_DAY_CACHE_SECONDS)
+    if ttl <= 0:
+        return build_daily_summary(conn, target_day.isoformat(), full_day=not partial)
+    version = versions_key(conn, REPORT_VERSION_TABLES) or "unversioned"
+    return cache_utils.get_or_set(
+        (target_day.isoformat(), partial, version),
+        lambda: build_daily_summary(conn, target_day.isoformat(), full_day=not partial),
+        ttl,
+        namespace=DAILY_SUMMARY_CACHE_NAMESPACE,
+    )
+
+
 def get_station_current_bag(conn: sqlite3.Connection, station_kind: str) -> dict[str, object] | None:
+    """Bag currently occupying a ``station_kind`` (or combined) station; same resolver as the floor API."""
     if station_kind not in ("blister", "sealing", "packaging"):
         return None
-    row = conn.execute(
-        """
-        SELECT we.workflow_bag_id, we.occurred_at, ws.id AS station_id, ws.label AS station_label, ws.station_kind
-        FROM workflow_events we
-        JOIN workflow_stations ws ON ws.id = we.station_id
-        WHERE ws.station_kind IN (?, 'combined')
-          AND we.event_type = 'BAG_CLAIMED'
-        ORDER BY we.occurred_at DESC, we.id DESC
-        LIMIT 1
-        """,
-        (station_kind,),
-    ).fetchone()
-    if not row:
-        return None
-    return dict(row)
+    return current_bag_for_station_kind(conn, station_kind)
 
 
 def count_bags_blistered_today(conn: sqlite3.Connection, day_iso: str | None = None) -> dict[str, object]:
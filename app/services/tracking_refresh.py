@@ -0,0 +1,184 @@
+"""
+Batch carrier tracking refresh for the scheduled tracking job.
+
+Due shipments (undelivered, ``next_check_at`` reached) are grouped by carrier: FedEx numbers go
+out up to 30 per Track request, UPS numbers one request each over a pooled keep-alive session
+with at most ``TRACKING_UPS_CONCURRENCY`` in flight. Both clients back off on 429 and share one
+OAuth token per credentials; tokens are kept in ``carrier_tokens`` so the next run (a new process)
+reuses a still-valid token instead of requesting one every 15 minutes.
+
+Carrier calls run without a database connection; results are written in one transaction at the
+end, each with its own adaptive ``next_check_at`` (``tracking_service.next_check_at``).
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from config import Config
+
+from app.services.tracking_service import (
+    FEDEX_MAX_BATCH,
+    RECHECK_UNSUPPORTED_SECONDS,
+    FedExTrackingClient,
+    UPSTrackingClient,
+    carrier_kind,
+    next_check_at,
+    normalize_fedex_batch,
+    normalize_ups_response,
+    seed_tokens,
+    shared_tokens,
+    store_tracking_result,
+)
+
+logger = logging.getLogger(__name__)
+
+CARRIER_TOKENS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS carrier_tokens (
+        token_key TEXT PRIMARY KEY,
+        access_token TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        updated_at TEXT
+    )
+    """,
+)
+
+_DUE_SHIPMENTS_SQL = """
+    SELECT id, tracking_number, carrier, carrier_code
+    FROM shipments
+    WHERE delivered_at IS NULL
+      AND (tracking_status IS NULL OR tracking_status NOT LIKE '%Delivered%')
+      AND tracking_number IS NOT NULL AND TRIM(tracking_number) != ''
+      AND (next_check_at IS NULL OR next_check_at <= ?)
+    ORDER BY COALESCE(next_check_at, last_checked_at, created_at) ASC
+    LIMIT ?
+"""
+
+
+def ensure_carrier_tokens(conn: sqlite3.Connection) -> None:
+    for ddl in CARRIER_TOKENS_DDL:
+        conn.execute(ddl)
+
+
+def load_carrier_tokens(conn: sqlite3.Connection) -> None:
+    """Seed the process token cache from ``carrier_tokens`` (no-op before migrations)."""
+    try:
+        rows = conn.execute("SELECT token_key, access_token, expires_at FROM carrier_tokens").fetchall()
+    except sqlite3.OperationalError:
+        return
+    seed_tokens({row[0]: (row[1], float(row[2])) for row in rows})
+
+
+def save_carrier_tokens(conn: sqlite3.Connection) -> None:
+    now = time.time()
+    tokens = [(key, token, expires_at) for key, (token, expires_at) in shared_tokens().items() if token and expires_at > now]
+    if not tokens:
+        return
+    updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        conn.executemany(
+            """
+            INSERT INTO carrier_tokens (token_key, access_token, expires_at, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(token_key) DO UPDATE SET
+                access_token = excluded.access_token, expires_at = excluded.expires_at, updated_at = excluded.updated_at
+            """,
+            [(key, token, expires_at, updated_at) for key, token, expires_at in tokens],
+        )
+        conn.execute("DELETE FROM carrier_tokens WHERE expires_at < ?", (now,))
+    except sqlite3.OperationalError:
+        logger.debug("carrier_tokens not available; tokens not persisted", exc_info=True)
+
+
+def due_shipments(conn: sqlite3.Connection, limit: int) -> list[dict[str, Any]]:
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return [dict(row) for row in conn.execute(_DUE_SHIPMENTS_SQL, (now, limit)).fetchall()]
+
+
+def _fedex_chunk(client: FedExTrackingClient, chunk: list[dict[str, Any]]) -> list[tuple[dict[str, Any], Any]]:
+    try:
+        by_number = normalize_fedex_batch(client.track_many([s["tracking_number"] for s in chunk]))
+    except Exception as exc:
+        logger.warning("FedEx batch of %s failed: %s", len(chunk), exc)
+        return [(s, exc) for s in chunk]
+    return [(s, by_number.get(s["tracking_number"]) or LookupError("No FedEx result")) for s in chunk]
+
+
+def _ups_one(client: UPSTrackingClient, shipment: dict[str, Any]) -> list[tuple[dict[str, Any], Any]]:
+    try:
+        return [(shipment, normalize_ups_response(client.track(shipment["tracking_number"])))]
+    except Exception as exc:
+        logger.warning("UPS lookup for shipment %s failed: %s", shipment["id"], exc)
+        return [(shipment, exc)]
+
+
+def lookup_shipments(shipments: list[dict[str, Any]], concurrency: int | None = None) -> list[tuple[dict[str, Any], Any]]:
+    """
+    Call the carriers for ``shipments``; returns ``(shipment, normalized | Exception | None)``,
+    None for unsupported carriers. No database access, so it is safe to run off-connection.
+    """
+    concurrency = max(1, concurrency or Config.TRACKING_UPS_CONCURRENCY)
+    batch_size = max(1, min(Config.TRACKING_FEDEX_BATCH_SIZE, FEDEX_MAX_BATCH))
+    groups: dict[str | None, list[dict[str, Any]]] = {"ups": [], "fedex": [], None: []}
+    for shipment in shipments:
+        shipment["tracking_number"] = str(shipment["tracking_number"]).strip()
+        groups[carrier_kind(shipment.get("carrier"), shipment.get("carrier_code"))].append(shipment)
+
+    results: list[tuple[dict[str, Any], Any]] = [(s, None) for s in groups[None]]
+    if not groups["ups"] and not groups["fedex"]:
+        return results
+    ups = UPSTrackingClient(pool_size=concurrency)
+    fedex = FedExTrackingClient(pool_size=concurrency)
+    fedex_chunks = [groups["fedex"][i : i + batch_size] for i in range(0, len(groups["fedex"]), batch_size)]
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tracking") as pool:
+        futures = [pool.submit(_fedex_chunk, fedex, chunk) for chunk in fedex_chunks]
+        futures += [pool.submit(_ups_one, ups, shipment) for shipment in groups["ups"]]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def refresh_due_shipments(conn: sqlite3.Connection, limit: int | None = None, concurrency: int | None = None) -> dict[str, Any]:
+    """
+    Refresh every due shipment (up to ``limit``) and persist results on ``conn`` (committed).
+    Returns counts per outcome plus the refreshed ``shipments`` (id, carrier, status / error).
+    """
+    load_carrier_tokens(conn)
+    shipments = due_shipments(conn, limit or Config.TRACKING_REFRESH_LIMIT)
+    summary: dict[str, Any] = {"due": len(shipments), "updated": 0, "failed": 0, "unsupported": 0, "shipments": []}
+    if not shipments:
+        return summary
+
+    results = lookup_shipments(shipments, concurrency)
+    now = datetime.now(timezone.utc)
+    unsupported_at = (now + timedelta(seconds=RECHECK_UNSUPPORTED_SECONDS)).strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        for shipment, outcome in results:
+            entry = {"id": shipment["id"], "carrier": carrier_kind(shipment.get("carrier"), shipment.get("carrier_code"))}
+            if outcome is None:
+                conn.execute("UPDATE shipments SET next_check_at = ? WHERE id = ?", (unsupported_at, shipment["id"]))
+                summary["unsupported"] += 1
+                entry["error"] = "Carrier not supported"
+            elif isinstance(outcome, Exception):
+                conn.execute(
+                    "UPDATE shipments SET last_checked_at = CURRENT_TIMESTAMP, next_check_at = ? WHERE id = ?",
+                    (next_check_at(None, now), shipment["id"]),
+                )
+                summary["failed"] += 1
+                entry["error"] = str(outcome)
+            else:
+                store_tracking_result(conn, shipment["id"], outcome)
+                summary["updated"] += 1
+                entry["tracking_status"] = outcome.get("tracking_status")
+            summary["shipments"].append(entry)
+        save_carrier_tokens(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return summary
@@ -1,49 +1,168 @@
+import abc
+import hashlib
 import logging
 import sqlite3
+import threading
 import time
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import requests
 from config import Config
 
+from app.utils.http_retry import RetryingSession
+
 logger = logging.getLogger(__name__)
 
+_MAX_BACKOFF_SECONDS = 30.0
+# FedEx Track accepts up to 30 tracking numbers per request.
+FEDEX_MAX_BATCH = 30
+
+# OAuth tokens shared by every client instance in the process (key -> (token, expires_at epoch)).
+# tracking_refresh persists them so the next scheduled run reuses a still-valid token.
+_tokens: dict[str, tuple[str, float]] = {}
+_tokens_lock = threading.Lock()
+# Serializes token fetches per key; held across the token request, unlike _tokens_lock.
+_token_fetch_locks: dict[str, threading.Lock] = {}
+
+
+def carrier_kind(carrier: str | None, carrier_code: str | None = None) -> str | None:
+    """'ups' / 'fedex' for the carriers we can track, else None."""
+    carrier = (carrier or "").lower()
+    carrier_code = (carrier_code or "").lower()
+    if carrier in ("ups",) or carrier_code in ("ups", "ups_ground", "ups_air"):
+        return "ups"
+    if carrier in ("fedex", "fed ex", "fx") or carrier_code in ("fedex", "fx"):
+        return "fedex"
+    return None
+
+
+def _retryable_status(method: str, status: int) -> bool:
+    return status in (429, 503)
+
+
+def _cached_token(key: str) -> str | None:
+    with _tokens_lock:
+        cached = _tokens.get(key)
+    if cached and time.time() < cached[1] - 60:
+        return cached[0]
+    return None
+
+
+def _token_fetch_lock(key: str) -> threading.Lock:
+    with _tokens_lock:
+        return _token_fetch_locks.setdefault(key, threading.Lock())
+
+
+def shared_tokens() -> dict[str, tuple[str, float]]:
+    with _tokens_lock:
+        return dict(_tokens)
+
+
+def seed_tokens(tokens: dict[str, tuple[str, float]]) -> None:
+    """Load tokens (e.g. persisted by a previous run); unexpired in-process tokens are kept."""
+    now = time.time()
+    with _tokens_lock:
+        for key, (token, expires_at) in tokens.items():
+            if token and expires_at > now and key not in _tokens:
+                _tokens[key] = (token, expires_at)
+
+
+class _CarrierClient(abc.ABC):
+    """OAuth2 client-credentials token (shared per credentials) + pooled session with 429 backoff."""
 
-class UPSTrackingClient:
+    carrier = ""
+
+    def __init__(self, session: requests.Session | None = None, pool_size: int = 4):
+        self._http = RetryingSession(
+            self.carrier,
+            pool_size=pool_size,
+            max_retries=Config.TRACKING_MAX_RETRIES,
+            backoff_base=max(0, Config.TRACKING_BACKOFF_BASE_MS) / 1000.0,
+            max_backoff=_MAX_BACKOFF_SECONDS,
+            session=session,
+        )
+
+    @property
+    def token_key(self) -> str:
+        digest = hashlib.sha256(f"{self.base}|{self._client_id()}".encode()).hexdigest()[:16]
+        return f"{self.carrier}:{digest}"
+
+    @abc.abstractmethod
+    def _client_id(self) -> str:
+        """Credential identity the shared token is keyed on."""
+
+    @abc.abstractmethod
+    def _fetch_token(self) -> dict[str, Any]:
+        """Token endpoint response (``access_token``, ``expires_in``)."""
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """HTTP call over the pooled session; 429 / 503 are retried with Retry-After or exponential backoff."""
+        return self._http.send(method, url, retry_status=_retryable_status, **kwargs)
+
+    def _get_token(self) -> str:
+        key = self.token_key
+        token = _cached_token(key)
+        if token:
+            return token
+        # One fetch per credentials at a time, so concurrent lookups share a token request; the
+        # fetch (and its retry backoff) runs outside _tokens_lock so other carriers are not blocked.
+        with _token_fetch_lock(key):
+            token = _cached_token(key)
+            if token:
+                return token
+            payload = self._fetch_token()
+            token = payload.get("access_token")
+            expires_in = payload.get("expires_in", 3300)
+            with _tokens_lock:
+                _tokens[key] = (token, time.time() + int(expires_in))
+            return token
+
+    def _drop_token(self) -> None:
+        with _tokens_lock:
+            _tokens.pop(self.token_key, None)
+
+    def _authorized(self, method: str, url: str, headers: dict[str, str], **kwargs: Any) -> requests.Response:
+        """Send with the bearer token; a 401 (revoked / rotated token) refetches it once."""
+        response = None
+        for _ in range(2):
+            response = self._send(method, url, headers={**headers, "Authorization": f"Bearer {self._get_token()}"}, **kwargs)
+            if response.status_code != 401:
+                return response
+            self._drop_token()
+        return response
+
+
+class UPSTrackingClient(_CarrierClient):
     """Minimal UPS OAuth2 + Tracking API client."""
 
-    def __init__(self):
+    carrier = "ups"
+
+    def __init__(self, session: requests.Session | None = None, pool_size: int = 4):
+        super().__init__(session, pool_size)
         self.base = Config.UPS_API_BASE.rstrip('/')
         self.client_id = Config.UPS_CLIENT_ID
         self.client_secret = Config.UPS_CLIENT_SECRET
-        self._token: str | None = None
-        self._token_expiry: float = 0
 
-    def _get_token(self) -> str:
-        if self._token and time.time() < self._token_expiry - 60:
-            return self._token
+    def _client_id(self) -> str:
+        return self.client_id or ""
 
+    def _fetch_token(self) -> dict[str, Any]:
         token_url = f"{self.base}/security/v1/oauth/token"
         data = {"grant_type": "client_credentials"}
         auth = (self.client_id, self.client_secret)
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        resp = requests.post(token_url, data=data, auth=auth, headers=headers, timeout=20)
+        resp = self._send("POST", token_url, data=data, auth=auth, headers=headers, timeout=20)
         resp.raise_for_status()
-        payload = resp.json()
-        self._token = payload.get("access_token")
-        expires_in = payload.get("expires_in", 3300)
-        self._token_expiry = time.time() + int(expires_in)
-        return self._token
+        return resp.json()
 
     def track(self, tracking_number: str) -> dict[str, Any]:
-        token = self._get_token()
         url = f"{self.base}/api/track/v1/details/{tracking_number}"
         headers = {
-            "Authorization": f"Bearer {token}",
             "transId": str(int(time.time() * 1000)),
             "transactionSrc": Config.UPS_TRANSACTION_SRC or "TabletTracker",
         }
-        resp = requests.get(url, headers=headers, timeout=20)
+        resp = self._authorized("GET", url, headers, timeout=20)
         # UPS returns 200 on found; 404 for unknown
         if resp.status_code == 404:
             return {"status": "Unknown", "raw": resp.text}
@@ -93,20 +212,22 @@ def normalize_ups_response(data: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-class FedExTrackingClient:
+class FedExTrackingClient(_CarrierClient):
     """Minimal FedEx OAuth2 + Tracking API client."""
 
-    def __init__(self):
+    carrier = "fedex"
+
+    def __init__(self, session: requests.Session | None = None, pool_size: int = 4):
+        super().__init__(session, pool_size)
         self.base = (Config.FEDEX_BASE or 'https://apis.fedex.com').rstrip('/')
         self.api_key = Config.FEDEX_API_KEY
         self.api_secret = Config.FEDEX_API_SECRET
         self.account = Config.FEDEX_ACCOUNT_NUMBER
-        self._token: str | None = None
-        self._token_expiry: float = 0
 
-    def _get_token(self) -> str:
-        if self._token and time.time() < self._token_expiry - 60:
-            return self._token
+    def _client_id(self) -> str:
+        return self.api_key or ""
+
+    def _fetch_token(self) -> dict[str, Any]:
         url = f"{self.base}/oauth/token"
         # FedEx expects credentials in body (not Basic) for many accounts
         data = {
@@ -115,29 +236,27 @@ class FedExTrackingClient:
             "client_secret": self.api_secret,
         }
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        resp = requests.post(url, data=data, headers=headers, timeout=25)
+        resp = self._send("POST", url, data=data, headers=headers, timeout=25)
         try:
             resp.raise_for_status()
         except requests.HTTPError as e:
             raise requests.HTTPError(f"FedEx token error {resp.status_code}: {resp.text}") from e
-        payload = resp.json()
-        self._token = payload.get("access_token")
-        expires_in = payload.get("expires_in", 3300)
-        self._token_expiry = time.time() + int(expires_in)
-        return self._token
+        return resp.json()
 
     def track(self, tracking_number: str) -> dict[str, Any]:
-        token = self._get_token()
+        return self.track_many([tracking_number])
+
+    def track_many(self, tracking_numbers: list[str]) -> dict[str, Any]:
+        """One Track call for up to FEDEX_MAX_BATCH numbers; results are in ``output.completeTrackResults``."""
+        if len(tracking_numbers) > FEDEX_MAX_BATCH:
+            raise ValueError(f"FedEx accepts at most {FEDEX_MAX_BATCH} tracking numbers per request")
         url = f"{self.base}/track/v1/trackingnumbers"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
+        headers = {"Content-Type": "application/json"}
         body = {
-            "trackingInfo": [{"trackingNumberInfo": {"trackingNumber": tracking_number}}],
+            "trackingInfo": [{"trackingNumberInfo": {"trackingNumber": n}} for n in tracking_numbers],
             "includeDetailedScans": True,
         }
-        resp = requests.post(url, headers=headers, json=body, timeout=25)
+        resp = self._authorized("POST", url, headers, json=body, timeout=25)
         if resp.status_code == 404:
             return {"status": "Unknown", "raw": resp.text}
         try:
@@ -147,26 +266,23 @@ class FedExTrackingClient:
         return resp.json()
 
 
-def normalize_fedex_response(data: dict[str, Any]) -> dict[str, Any]:
+def _normalize_fedex_track_result(result: dict[str, Any], raw: dict[str, Any]) -> dict[str, Any]:
     status_text = "Unknown"
     est_delivery = None
     delivered_at = None
     last_checkpoint = None
     try:
-        shipments = data.get("output", {}).get("completeTrackResults", [])
-        if shipments:
-            result = shipments[0].get("trackResults", [{}])[0]
-            status_text = result.get("latestStatusDetail", {}).get("statusByLocale") or status_text
-            est = result.get("dateAndTimes", [])
-            for dt in est:
-                if dt.get("type") == "ESTIMATED_DELIVERY":
-                    est_delivery = dt.get("dateTime")
-                    break
-            scans = result.get("scanEvents", [])
-            if scans:
-                last_checkpoint = scans[0].get("date")
-            if (result.get("latestStatusDetail", {}).get("code") or "").lower() == "dlv":
-                delivered_at = result.get("dateAndTimes", [{}])[0].get("dateTime")
+        status_text = result.get("latestStatusDetail", {}).get("statusByLocale") or status_text
+        est = result.get("dateAndTimes", [])
+        for dt in est:
+            if dt.get("type") == "ESTIMATED_DELIVERY":
+                est_delivery = dt.get("dateTime")
+                break
+        scans = result.get("scanEvents", [])
+        if scans:
+            last_checkpoint = scans[0].get("date")
+        if (result.get("latestStatusDetail", {}).get("code") or "").lower() == "dlv":
+            delivered_at = result.get("dateAndTimes", [{}])[0].get("dateTime")
     except Exception as exc:
         logger.debug("Failed to parse FedEx response: %s", exc)
 
@@ -175,10 +291,100 @@ def normalize_fedex_response(data: dict[str, Any]) -> dict[str, Any]:
         "estimated_delivery": est_delivery,
         "delivered_at": delivered_at,
         "last_checkpoint": last_checkpoint,
-        "provider_raw": data,
+        "provider_raw": raw,
     }
 
 
+def normalize_fedex_response(data: dict[str, Any]) -> dict[str, Any]:
+    try:
+        shipments = data.get("output", {}).get("completeTrackResults", [])
+        result = shipments[0].get("trackResults", [{}])[0] if shipments else {}
+    except Exception as exc:
+        logger.debug("Failed to parse FedEx response: %s", exc)
+        result = {}
+    return _normalize_fedex_track_result(result, data)
+
+
+def normalize_fedex_batch(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """``{tracking_number: normalized}`` for a multi-number FedEx Track response."""
+    out: dict[str, dict[str, Any]] = {}
+    try:
+        shipments = data.get("output", {}).get("completeTrackResults", [])
+    except AttributeError:
+        return out
+    for shipment in shipments or []:
+        number = shipment.get("trackingNumber")
+        if not number:
+            continue
+        result = (shipment.get("trackResults") or [{}])[0]
+        out[str(number)] = _normalize_fedex_track_result(result, {"output": {"completeTrackResults": [shipment]}})
+    return out
+
+
+# Re-check cadence by distance to the carrier's ETA (see next_check_at).
+RECHECK_DUE_SECONDS = 30 * 60
+RECHECK_SOON_SECONDS = 2 * 3600
+RECHECK_FAR_SECONDS = 6 * 3600
+RECHECK_NO_ETA_SECONDS = 3 * 3600
+RECHECK_ERROR_SECONDS = 3600
+RECHECK_UNSUPPORTED_SECONDS = 24 * 3600
+
+
+def _utc_text(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def next_check_at(norm: dict[str, Any] | None, now: datetime | None = None) -> str | None:
+    """
+    When to look at a shipment again (UTC text comparable with CURRENT_TIMESTAMP): every 30 min
+    once it is due (ETA today, tomorrow or past), every 2 h within three days of the ETA, every
+    6 h when further out, 3 h without an ETA. None once delivered.
+    """
+    now = now or datetime.now(timezone.utc)
+    if norm is None:
+        return _utc_text(now + timedelta(seconds=RECHECK_ERROR_SECONDS))
+    if norm.get("delivered_at") or "delivered" in (norm.get("tracking_status") or "").lower():
+        return None
+    eta_text = str(norm.get("estimated_delivery") or "")[:10]
+    try:
+        eta = datetime.strptime(eta_text, "%Y-%m-%d").date()
+    except ValueError:
+        delay = RECHECK_NO_ETA_SECONDS
+    else:
+        days_out = (eta - now.date()).days
+        if days_out <= 1:
+            delay = RECHECK_DUE_SECONDS
+        elif days_out <= 3:
+            delay = RECHECK_SOON_SECONDS
+        else:
+            delay = RECHECK_FAR_SECONDS
+    return _utc_text(now + timedelta(seconds=delay))
+
+
+def store_tracking_result(conn: sqlite3.Connection, shipment_id: int, norm: dict[str, Any]) -> None:
+    conn.execute(
+        """
+        UPDATE shipments SET
+            tracking_status = ?,
+            estimated_delivery = COALESCE(?, estimated_delivery),
+            delivered_at = COALESCE(?, delivered_at),
+            last_checkpoint = ?,
+            last_checked_at = CURRENT_TIMESTAMP,
+            next_check_at = ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+        """,
+        (
+            norm.get("tracking_status"),
+            norm.get("estimated_delivery"),
+            norm.get("delivered_at"),
+            norm.get("last_checkpoint"),
+            next_check_at(norm),
+            shipment_id,
+        ),
+    )
+
+
 def refresh_shipment_row(conn: sqlite3.Connection, shipment_id: int) -> dict[str, Any]:
     """Fetch shipment, call provider, and persist results."""
     try:
@@ -191,15 +397,14 @@ def refresh_shipment_row(conn: sqlite3.Connection, shipment_id: int) -> dict[str
             return {"success": False, "error": "Shipment not found"}
 
         tracking_number = row[1]
-        carrier = (row[2] or "").lower()
-        carrier_code = (row[3] or "").lower()
+        kind = carrier_kind(row[2], row[3])
 
         # Currently support UPS and FedEx
-        if carrier in ("ups",) or carrier_code in ("ups", "ups_ground", "ups_air"):
+        if kind == "ups":
             client = UPSTrackingClient()
             raw = client.track(tracking_number)
             norm = normalize_ups_response(raw)
-        elif carrier in ("fedex", "fed ex", "fx") or carrier_code in ("fedex", "fx"):
+        elif kind == "fedex":
             client = FedExTrackingClient()
             try:
                 raw = client.track(tracking_number)
@@ -207,27 +412,9 @@ def refresh_shipment_row(conn: sqlite3.Connection, shipment_id: int) -> dict[str
             except Exception as exc:
                 return {"success": False, "error": str(exc)}
         else:
-            return {"success": False, "error": f"Carrier not supported: {carrier or carrier_code}"}
-
-        cur.execute(
-            """
-            UPDATE shipments SET
-                tracking_status = ?,
-                estimated_delivery = COALESCE(?, estimated_delivery),
-                delivered_at = COALESCE(?, delivered_at),
-                last_checkpoint = ?,
-                last_checked_at = CURRENT_TIMESTAMP,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-            """,
-            (
-                norm.get("tracking_status"),
-                norm.get("estimated_delivery"),
-                norm.get("delivered_at"),
-                norm.get("last_checkpoint"),
-                shipment_id,
-            ),
-        )
+            return {"success": False, "error": f"Carrier not supported: {(row[2] or row[3] or '').lower()}"}
+
+        store_tracking_result(conn, shipment_id, norm)
         conn.commit()
 
         return {"success": True, "shipment_id": shipment_id, "data": norm}
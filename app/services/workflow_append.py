@@ -7,8 +7,73 @@ import sqlite3
 import time
 from typing import Any
 
+from app.services.workflow_bag_state import record_workflow_event
 from app.services.workflow_payloads import normalize_payload
 
+# Hot payload fields mirrored into typed workflow_events columns so dashboard aggregates filter and
+# sum without json_extract: (column, payload key, SQL type). ``append_workflow_event`` fills them in
+# its INSERT and a trigger refills them when a payload is repaired, with the same values
+# ``CAST(json_extract(payload, ...) AS REAL)`` gave.
+PAYLOAD_COLUMNS: tuple[tuple[str, str, str], ...] = (
+    ("p_count_total", "count_total", "REAL"),
+    ("p_display_count", "display_count", "REAL"),
+    ("p_case_count", "case_count", "REAL"),
+    ("p_loose_display_count", "loose_display_count", "REAL"),
+    ("p_counter_start", "counter_start", "REAL"),
+    ("p_counter_end", "counter_end", "REAL"),
+    ("p_reason", "reason", "TEXT"),
+)
+
+
+def _payload_column_value(payload_sql: str, key: str, sql_type: str) -> str:
+    value = f"json_extract({payload_sql}, '$.{key}')"
+    return f"CAST({value} AS REAL)" if sql_type == "REAL" else value
+
+
+def _payload_column_assignments(payload_sql: str) -> str:
+    parts = [
+        f"{column} = CASE WHEN json_valid({payload_sql}) THEN {_payload_column_value(payload_sql, key, sql_type)} END"
+        for column, key, sql_type in PAYLOAD_COLUMNS
+    ]
+    return ",\n    ".join(parts)
+
+
+# Payload repairs only: appends fill the columns in their INSERT, so an append is a single write.
+WORKFLOW_EVENT_PAYLOAD_COLUMNS_DDL: tuple[str, ...] = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_workflow_events_payload_columns_upd
+    AFTER UPDATE OF payload ON workflow_events
+    BEGIN
+    UPDATE workflow_events SET
+    {_payload_column_assignments("NEW.payload")}
+    WHERE id = NEW.id;
+    END
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_workflow_events_type_occurred ON workflow_events(event_type, occurred_at)",
+    "CREATE INDEX IF NOT EXISTS ix_workflow_events_station_occurred ON workflow_events(station_id, occurred_at)",
+)
+
+WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL = (
+    f"UPDATE workflow_events SET\n    {_payload_column_assignments('payload')}"
+)
+
+_INSERT_WORKFLOW_EVENT_BASE_SQL = """
+    INSERT INTO workflow_events (
+        event_type, payload, occurred_at, workflow_bag_id, station_id, user_id, device_id
+    ) VALUES (:event_type, :payload, :occurred_at, :workflow_bag_id, :station_id, :user_id, :device_id)
+"""
+
+# The payload is always ``json.dumps`` output here, so no json_valid guard.
+_INSERT_WORKFLOW_EVENT_SQL = f"""
+    INSERT INTO workflow_events (
+        event_type, payload, occurred_at, workflow_bag_id, station_id, user_id, device_id,
+        {", ".join(column for column, _key, _type in PAYLOAD_COLUMNS)}
+    ) VALUES (
+        :event_type, :payload, :occurred_at, :workflow_bag_id, :station_id, :user_id, :device_id,
+        {", ".join(_payload_column_value(":payload", key, sql_type) for _col, key, sql_type in PAYLOAD_COLUMNS)}
+    )
+"""
+
 
 def utc_ms_now() -> int:
     return int(time.time() * 1000)
@@ -23,24 +88,56 @@ def append_workflow_event(
     station_id: int | None = None,
     user_id: int | None = None,
     device_id: str | None = None,
+    occurred_at: int | None = None,
 ) -> int:
-    """Insert one workflow_events row (caller controls transaction boundaries)."""
+    """
+    Insert one workflow_events row (caller controls transaction boundaries).
+
+    ``occurred_at`` (epoch ms, default now) is for events recorded earlier on a device, such as a
+    replayed offline queue; it is clamped to no later than now and no earlier than the bag's latest
+    event, so a bag's events stay in order.
+
+    The ``workflow_bag_state`` projection is updated in the same transaction. Daily rollups are not
+    touched here beyond their dirty-day triggers; they are refreshed off the write path (see
+    ``workflow_rollups``).
+    """
     p = normalize_payload(event_type, payload)
-    occurred_at = utc_ms_now()
-    cur = conn.execute(
-        """
-        INSERT INTO workflow_events (
-            event_type, payload, occurred_at, workflow_bag_id, station_id, user_id, device_id
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            event_type,
-            json.dumps(p),
-            occurred_at,
-            workflow_bag_id,
-            station_id,
-            user_id,
-            device_id,
-        ),
+    now = utc_ms_now()
+    if occurred_at is None:
+        occurred_at = now
+    else:
+        latest = conn.execute(
+            "SELECT MAX(occurred_at) FROM workflow_events WHERE workflow_bag_id = ?", (workflow_bag_id,)
+        ).fetchone()[0]
+        occurred_at = min(int(occurred_at), now)
+        if latest is not None:
+            occurred_at = max(occurred_at, int(latest))
+    params = {
+        "event_type": event_type,
+        "payload": json.dumps(p),
+        "occurred_at": occurred_at,
+        "workflow_bag_id": workflow_bag_id,
+        "station_id": station_id,
+        "user_id": user_id,
+        "device_id": device_id,
+    }
+    try:
+        cur = conn.execute(_INSERT_WORKFLOW_EVENT_SQL, params)
+    except sqlite3.OperationalError as exc:
+        if "no column named p_" not in str(exc):
+            raise
+        # workflow_events created before the payload columns (MigrationRunner adds them).
+        cur = conn.execute(_INSERT_WORKFLOW_EVENT_BASE_SQL, params)
+    event_id = int(cur.lastrowid)
+    record_workflow_event(
+        conn,
+        {
+            "id": event_id,
+            "event_type": event_type,
+            "payload": p,
+            "occurred_at": occurred_at,
+            "station_id": station_id,
+        },
+        workflow_bag_id,
     )
-    return int(cur.lastrowid)
+    return event_id
@@ -0,0 +1,722 @@
+"""Materialized per-bag and per-(bag, station) workflow state.
+
+``workflow_events`` remains the source of truth. ``append_workflow_event`` folds every new event into
+``workflow_bag_state`` / ``workflow_bag_station_state`` inside the caller's transaction, so floor scans
+and the ops TV read one row instead of replaying the bag's history on every poll.
+
+Readers fall back to folding events when the tables (or a row) are missing, so older databases and
+test bootstraps keep working. ``rebuild_workflow_bag_state`` replays events to verify the projection
+and repair drift (see ``scripts/rebuild_workflow_bag_state.py``).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+from itertools import groupby
+from typing import Any
+
+from app.services import workflow_constants as WC
+from app.services.workflow_shortages import apply_shortage_event
+
+HOLD_RELEASE_REASON = "out_of_packaging"
+
+# Station submits that can pause (or un-pause) the current station session.
+_STATION_SUBMIT_TYPES = frozenset(
+    {
+        WC.EVENT_BLISTER_COMPLETE,
+        WC.EVENT_SEALING_COMPLETE,
+        WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
+        WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
+        WC.EVENT_BOTTLE_STICKER_COMPLETE,
+        WC.EVENT_PACKAGING_SNAPSHOT,
+    }
+)
+# Normal (non-pause) completions that clear a hold-and-release for the session.
+_HOLD_CLEARING_TYPES = _STATION_SUBMIT_TYPES | {WC.EVENT_PACKAGING_TAKEN_FOR_ORDER}
+
+# Event types that finish the lane step for each station kind (non resume-lock submits only).
+LANE_EVENT_TYPES_BY_KIND: dict[str, frozenset[str]] = {
+    "blister": frozenset({WC.EVENT_BLISTER_COMPLETE}),
+    "sealing": frozenset({WC.EVENT_SEALING_COMPLETE}),
+    "combined": frozenset({WC.EVENT_SEALING_COMPLETE}),
+    "packaging": frozenset({WC.EVENT_PACKAGING_TAKEN_FOR_ORDER, WC.EVENT_PACKAGING_SNAPSHOT}),
+    "bottle_handpack": frozenset({WC.EVENT_BOTTLE_HANDPACK_COMPLETE}),
+    "bottle_cap_seal": frozenset({WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE}),
+    "bottle_stickering": frozenset({WC.EVENT_BOTTLE_STICKER_COMPLETE}),
+}
+_LANE_EVENT_TYPES = frozenset().union(*LANE_EVENT_TYPES_BY_KIND.values())
+
+_BAG_STATE_COLUMNS = (
+    "event_count",
+    "event_counts_json",
+    "latest_event_id",
+    "latest_event_type",
+    "latest_occurred_at",
+    "active_shortages_json",
+)
+_STATION_STATE_COLUMNS = (
+    "claimed",
+    "session_started_at",
+    "session_event_id",
+    "needs_resume",
+    "paused_at",
+    "pause_reason",
+    "pause_material_type",
+    "hold_reason",
+    "hold_material_type",
+    "lane_completions",
+    "last_event_id",
+    "last_occurred_at",
+)
+
+
+# Shared by MigrationRunner and the Alembic revision (both CREATE IF NOT EXISTS).
+WORKFLOW_BAG_STATE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS workflow_bag_state (
+        workflow_bag_id INTEGER PRIMARY KEY REFERENCES workflow_bags(id) ON DELETE CASCADE,
+        event_count INTEGER NOT NULL DEFAULT 0,
+        event_counts_json TEXT NOT NULL DEFAULT '{}',
+        latest_event_id INTEGER,
+        latest_event_type TEXT,
+        latest_occurred_at INTEGER,
+        active_shortages_json TEXT NOT NULL DEFAULT '{}',
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS workflow_bag_station_state (
+        workflow_bag_id INTEGER NOT NULL REFERENCES workflow_bags(id) ON DELETE CASCADE,
+        station_id INTEGER NOT NULL,
+        claimed INTEGER NOT NULL DEFAULT 0,
+        session_started_at INTEGER,
+        session_event_id INTEGER,
+        needs_resume INTEGER NOT NULL DEFAULT 0,
+        paused_at INTEGER,
+        pause_reason TEXT,
+        pause_material_type TEXT,
+        hold_reason TEXT,
+        hold_material_type TEXT,
+        lane_completions TEXT NOT NULL DEFAULT '[]',
+        last_event_id INTEGER,
+        last_occurred_at INTEGER,
+        PRIMARY KEY (workflow_bag_id, station_id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_workflow_bag_station_state_session
+    ON workflow_bag_station_state(station_id, session_started_at, session_event_id)
+    """,
+)
+
+
+# --- Pause semantics (shared with the floor API) ---------------------------------------------
+
+
+def pause_metadata(payload: dict) -> dict:
+    meta = payload.get("metadata") if isinstance(payload, dict) else None
+    return meta if isinstance(meta, dict) else {}
+
+
+def pause_reason_for_event(event_type: str, payload: dict) -> str | None:
+    """Machine-readable pause reason, when this event pauses station occupancy."""
+    if event_type == WC.EVENT_PACKAGING_SNAPSHOT:
+        reason = str(payload.get("reason") or "").strip()
+        if reason == "paused_end_of_day":
+            return "end_of_day"
+        if reason == HOLD_RELEASE_REASON:
+            return HOLD_RELEASE_REASON
+        return None
+    if event_type in (
+        WC.EVENT_BLISTER_COMPLETE,
+        WC.EVENT_SEALING_COMPLETE,
+        WC.EVENT_BOTTLE_HANDPACK_COMPLETE,
+        WC.EVENT_BOTTLE_CAP_SEAL_COMPLETE,
+        WC.EVENT_BOTTLE_STICKER_COMPLETE,
+    ):
+        meta = pause_metadata(payload)
+        reason = str(meta.get("reason") or "").strip()
+        if reason == HOLD_RELEASE_REASON:
+            return HOLD_RELEASE_REASON
+        if reason == "material_change" and event_type == WC.EVENT_BLISTER_COMPLETE:
+            return "material_change"
+        if meta.get("paused") or reason == "end_of_day":
+            return reason or "end_of_day"
+        return None
+    return None
+
+
+def is_resume_lock_pause_reason(reason: str | None) -> bool:
+    if reason is None:
+        return False
+    return reason != HOLD_RELEASE_REASON
+
+
+def is_resume_lock_pause_event(event_type: str, payload: dict) -> bool:
+    return is_resume_lock_pause_reason(pause_reason_for_event(event_type, payload))
+
+
+def is_hold_release_pause_event(event_type: str, payload: dict) -> bool:
+    return pause_reason_for_event(event_type, payload) == HOLD_RELEASE_REASON
+
+
+def is_pause_workflow_event(event_type: str, payload: dict) -> bool:
+    """True if this event represents a paused handoff at the station."""
+    return pause_reason_for_event(event_type, payload) is not None
+
+
+# --- Pure folds --------------------------------------------------------------------------------
+
+
+def _as_int(raw: Any) -> int | None:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def _event_payload(raw: Any) -> dict:
+    if isinstance(raw, dict):
+        return raw
+    try:
+        pl = json.loads(raw) if raw else {}
+    except (json.JSONDecodeError, TypeError):
+        pl = {}
+    return pl if isinstance(pl, dict) else {}
+
+
+def empty_bag_state(workflow_bag_id: int) -> dict[str, Any]:
+    return {
+        "workflow_bag_id": int(workflow_bag_id),
+        "event_count": 0,
+        "event_counts_by_type": {},
+        "latest_event_id": None,
+        "latest_event_type": None,
+        "latest_occurred_at": None,
+        "active_shortages": {},
+    }
+
+
+def apply_bag_event(state: dict[str, Any], event: dict[str, Any]) -> None:
+    """Fold one event (in ``(occurred_at, id)`` order) into a bag state dict."""
+    et = str(event.get("event_type") or "")
+    state["event_count"] += 1
+    counts = state["event_counts_by_type"]
+    counts[et] = counts.get(et, 0) + 1
+    state["latest_event_id"] = event.get("id")
+    state["latest_event_type"] = et
+    state["latest_occurred_at"] = event.get("occurred_at")
+    apply_shortage_event(state["active_shortages"], event)
+
+
+def empty_station_state(workflow_bag_id: int, station_id: int) -> dict[str, Any]:
+    return {
+        "workflow_bag_id": int(workflow_bag_id),
+        "station_id": int(station_id),
+        "claimed": False,
+        "session_started_at": None,
+        "session_event_id": None,
+        "needs_resume": False,
+        "paused_at": None,
+        "pause_reason": None,
+        "pause_material_type": None,
+        "hold_reason": None,
+        "hold_material_type": None,
+        "lane_completions": [],
+        "last_event_id": None,
+        "last_occurred_at": None,
+    }
+
+
+def apply_station_event(state: dict[str, Any], event: dict[str, Any]) -> None:
+    """Fold one station-scoped event (in ``(occurred_at, id)`` order) into a station state dict."""
+    et = str(event.get("event_type") or "")
+    pl = _event_payload(event.get("payload"))
+    state["last_event_id"] = event.get("id")
+    state["last_occurred_at"] = event.get("occurred_at")
+    if et in (WC.EVENT_BAG_CLAIMED, WC.EVENT_STATION_RESUMED):
+        if et == WC.EVENT_BAG_CLAIMED:
+            state["claimed"] = True
+        state["session_started_at"] = _as_int(event.get("occurred_at"))
+        state["session_event_id"] = event.get("id")
+        state["needs_resume"] = False
+        state["paused_at"] = None
+        state["pause_reason"] = None
+        state["pause_material_type"] = None
+        state["hold_reason"] = None
+        state["hold_material_type"] = None
+        return
+    reason = pause_reason_for_event(et, pl)
+    material_type = str(pause_metadata(pl).get("material_type") or "").strip().lower() or None
+    if et in _STATION_SUBMIT_TYPES:
+        if is_resume_lock_pause_reason(reason):
+            state["needs_resume"] = True
+            state["paused_at"] = _as_int(event.get("occurred_at"))
+            state["pause_reason"] = reason
+            state["pause_material_type"] = material_type
+        else:
+            state["needs_resume"] = False
+            state["paused_at"] = None
+            state["pause_reason"] = None
+            state["pause_material_type"] = None
+    if reason == HOLD_RELEASE_REASON:
+        state["hold_reason"] = HOLD_RELEASE_REASON
+        state["hold_material_type"] = material_type
+    elif et in _HOLD_CLEARING_TYPES and reason is None:
+        state["hold_reason"] = None
+        state["hold_material_type"] = None
+    if (
+        state["session_event_id"] is not None
+        and et in _LANE_EVENT_TYPES
+        and not is_resume_lock_pause_reason(reason)
+        and et not in state["lane_completions"]
+    ):
+        state["lane_completions"].append(et)
+
+
+def fold_bag_events(workflow_bag_id: int, events: Iterable[dict[str, Any]]) -> tuple[dict, dict[int, dict]]:
+    """Bag state + per-station states from a bag's ordered events."""
+    bag = empty_bag_state(workflow_bag_id)
+    stations: dict[int, dict] = {}
+    for event in events:
+        apply_bag_event(bag, event)
+        sid = event.get("station_id")
+        if sid is None:
+            continue
+        st = stations.get(int(sid))
+        if st is None:
+            st = stations[int(sid)] = empty_station_state(workflow_bag_id, int(sid))
+        apply_station_event(st, event)
+    return bag, stations
+
+
+def station_lane_finished(state: dict[str, Any], station_kind: str) -> bool:
+    """True when the station session completed the lane step for this station type."""
+    kind = (station_kind or "sealing").strip().lower()
+    wanted = LANE_EVENT_TYPES_BY_KIND.get(kind)
+    if not wanted:
+        return False
+    return any(et in wanted for et in state.get("lane_completions") or ())
+
+
+def station_pause_details(state: dict[str, Any]) -> dict[str, str] | None:
+    if not state.get("needs_resume") or not state.get("pause_reason"):
+        return None
+    out = {"reason": state["pause_reason"]}
+    if state.get("pause_material_type"):
+        out["material_type"] = state["pause_material_type"]
+    return out
+
+
+def station_hold_details(state: dict[str, Any]) -> dict[str, str] | None:
+    if not state.get("hold_reason"):
+        return None
+    out = {"reason": state["hold_reason"]}
+    if state.get("hold_material_type"):
+        out["material_type"] = state["hold_material_type"]
+    return out
+
+
+def bag_facts(state: dict[str, Any]) -> dict[str, Any]:
+    """``mechanical_bag_facts``-shaped dict (without ``events``) for display helpers."""
+    return {
+        "workflow_bag_id": state["workflow_bag_id"],
+        "event_count": state["event_count"],
+        "event_counts_by_type": dict(state["event_counts_by_type"]),
+        "latest_event_type": state["latest_event_type"],
+    }
+
+
+def active_shortages(state: dict[str, Any]) -> list[dict[str, Any]]:
+    return list(state["active_shortages"].values())
+
+
+# --- Storage -----------------------------------------------------------------------------------
+
+
+def _is_missing_table(exc: sqlite3.OperationalError) -> bool:
+    return "no such table" in str(exc).lower()
+
+
+def _event_from_row(row: Any) -> dict[str, Any]:
+    return {
+        "id": row[0],
+        "event_type": row[1],
+        "payload": _event_payload(row[2]),
+        "occurred_at": row[3],
+        "station_id": row[4],
+    }
+
+
+def _load_bag_events(conn: sqlite3.Connection, workflow_bag_id: int) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        """
+        SELECT id, event_type, payload, occurred_at, station_id
+        FROM workflow_events
+        WHERE workflow_bag_id = ?
+        ORDER BY occurred_at ASC, id ASC
+        """,
+        (int(workflow_bag_id),),
+    ).fetchall()
+    return [_event_from_row(r) for r in rows]
+
+
+def _load_station_events(
+    conn: sqlite3.Connection, workflow_bag_id: int, station_id: int
+) -> list[dict[str, Any]]:
+    rows = conn.execute(
+        """
+        SELECT id, event_type, payload, occurred_at, station_id
+        FROM workflow_events
+        WHERE workflow_bag_id = ? AND station_id = ?
+        ORDER BY occurred_at ASC, id ASC
+        """,
+        (int(workflow_bag_id), int(station_id)),
+    ).fetchall()
+    return [_event_from_row(r) for r in rows]
+
+
+def _bag_state_from_row(workflow_bag_id: int, row: Any) -> dict[str, Any]:
+    state = empty_bag_state(workflow_bag_id)
+    state["event_count"] = int(row[0] or 0)
+    state["event_counts_by_type"] = json.loads(row[1] or "{}")
+    state["latest_event_id"] = row[2]
+    state["latest_event_type"] = row[3]
+    state["latest_occurred_at"] = row[4]
+    state["active_shortages"] = json.loads(row[5] or "{}")
+    return state
+
+
+def _bag_state_values(state: dict[str, Any]) -> tuple:
+    return (
+        state["event_count"],
+        json.dumps(state["event_counts_by_type"], sort_keys=True),
+        state["latest_event_id"],
+        state["latest_event_type"],
+        state["latest_occurred_at"],
+        json.dumps(state["active_shortages"]),
+    )
+
+
+def _station_state_from_row(workflow_bag_id: int, station_id: int, row: Any) -> dict[str, Any]:
+    state = empty_station_state(workflow_bag_id, station_id)
+    state["claimed"] = bool(row[0])
+    state["session_started_at"] = row[1]
+    state["session_event_id"] = row[2]
+    state["needs_resume"] = bool(row[3])
+    state["paused_at"] = row[4]
+    state["pause_reason"] = row[5]
+    state["pause_material_type"] = row[6]
+    state["hold_reason"] = row[7]
+    state["hold_material_type"] = row[8]
+    state["lane_completions"] = json.loads(row[9] or "[]")
+    state["last_event_id"] = row[10]
+    state["last_occurred_at"] = row[11]
+    return state
+
+
+def _station_state_values(state: dict[str, Any]) -> tuple:
+    return (
+        1 if state["claimed"] else 0,
+        state["session_started_at"],
+        state["session_event_id"],
+        1 if state["needs_resume"] else 0,
+        state["paused_at"],
+        state["pause_reason"],
+        state["pause_material_type"],
+        state["hold_reason"],
+        state["hold_material_type"],
+        json.dumps(state["lane_completions"]),
+        state["last_event_id"],
+        state["last_occurred_at"],
+    )
+
+
+def _select_bag_row(conn: sqlite3.Connection, workflow_bag_id: int):
+    return conn.execute(
+        f"SELECT {', '.join(_BAG_STATE_COLUMNS)} FROM workflow_bag_state WHERE workflow_bag_id = ?",
+        (int(workflow_bag_id),),
+    ).fetchone()
+
+
+def _select_station_row(conn: sqlite3.Connection, workflow_bag_id: int, station_id: int):
+    return conn.execute(
+        f"""
+        SELECT {', '.join(_STATION_STATE_COLUMNS)}
+        FROM workflow_bag_station_state
+        WHERE workflow_bag_id = ? AND station_id = ?
+        """,
+        (int(workflow_bag_id), int(station_id)),
+    ).fetchone()
+
+
+def _write_bag_state(conn: sqlite3.Connection, state: dict[str, Any]) -> None:
+    cols = ("workflow_bag_id",) + _BAG_STATE_COLUMNS + ("updated_at",)
+    conn.execute(
+        f"INSERT OR REPLACE INTO workflow_bag_state ({', '.join(cols)}) "
+        f"VALUES ({', '.join('?' * len(cols))})",
+        (state["workflow_bag_id"],) + _bag_state_values(state) + (int(time.time() * 1000),),
+    )
+
+
+def _write_station_state(conn: sqlite3.Connection, state: dict[str, Any]) -> None:
+    cols = ("workflow_bag_id", "station_id") + _STATION_STATE_COLUMNS
+    conn.execute(
+        f"INSERT OR REPLACE INTO workflow_bag_station_state ({', '.join(cols)}) "
+        f"VALUES ({', '.join('?' * len(cols))})",
+        (state["workflow_bag_id"], state["station_id"]) + _station_state_values(state),
+    )
+
+
+def _sorts_after(event: dict[str, Any], occurred_at: Any, event_id: Any) -> bool:
+    if occurred_at is None or event_id is None:
+        return False
+    return (int(event["occurred_at"]), int(event["id"])) > (int(occurred_at), int(event_id))
+
+
+def record_workflow_event(conn: sqlite3.Connection, event: dict[str, Any], workflow_bag_id: int) -> None:
+    """
+    Fold a just-inserted event into the projection (same transaction as the insert).
+
+    Events that sort after the stored tail are applied incrementally; anything else (missing row,
+    clock skew) rebuilds the affected rows from ``workflow_events``.
+    """
+    try:
+        row = _select_bag_row(conn, workflow_bag_id)
+    except sqlite3.OperationalError as exc:
+        if _is_missing_table(exc):
+            return
+        raise
+    if row is not None and _sorts_after(event, row[4], row[2]):
+        bag = _bag_state_from_row(workflow_bag_id, row)
+        apply_bag_event(bag, event)
+    else:
+        bag, _stations = fold_bag_events(workflow_bag_id, _load_bag_events(conn, workflow_bag_id))
+    _write_bag_state(conn, bag)
+
+    station_id = event.get("station_id")
+    if station_id is None:
+        return
+    srow = _select_station_row(conn, workflow_bag_id, int(station_id))
+    if srow is not None and _sorts_after(event, srow[11], srow[10]):
+        station = _station_state_from_row(workflow_bag_id, int(station_id), srow)
+        apply_station_event(station, event)
+    else:
+        station = empty_station_state(workflow_bag_id, int(station_id))
+        for ev in _load_station_events(conn, workflow_bag_id, int(station_id)):
+            apply_station_event(station, ev)
+    _write_station_state(conn, station)
+
+
+def load_bag_state(conn: sqlite3.Connection, workflow_bag_id: int) -> dict[str, Any]:
+    """Stored bag state, or a fold of ``workflow_events`` when no row exists yet."""
+    try:
+        row = _select_bag_row(conn, workflow_bag_id)
+    except sqlite3.OperationalError as exc:
+        if not _is_missing_table(exc):
+            raise
+        row = None
+    if row is not None:
+        return _bag_state_from_row(workflow_bag_id, row)
+    bag, _stations = fold_bag_events(workflow_bag_id, _load_bag_events(conn, workflow_bag_id))
+    return bag
+
+
+def load_bag_states(conn: sqlite3.Connection, workflow_bag_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+    """``load_bag_state`` for many bags: one query for stored rows, event folds only for gaps."""
+    ids = sorted({int(w) for w in workflow_bag_ids})
+    out: dict[int, dict[str, Any]] = {}
+    try:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            rows = conn.execute(
+                f"""
+                SELECT workflow_bag_id, {', '.join(_BAG_STATE_COLUMNS)}
+                FROM workflow_bag_state
+                WHERE workflow_bag_id IN ({','.join('?' * len(chunk))})
+                """,
+                tuple(chunk),
+            ).fetchall()
+            for r in rows:
+                out[int(r[0])] = _bag_state_from_row(int(r[0]), tuple(r[1:]))
+    except sqlite3.OperationalError as exc:
+        if not _is_missing_table(exc):
+            raise
+    for wid in ids:
+        if wid not in out:
+            out[wid], _stations = fold_bag_events(wid, _load_bag_events(conn, wid))
+    return out
+
+
+def load_station_state(conn: sqlite3.Connection, workflow_bag_id: int, station_id: int) -> dict[str, Any]:
+    """Stored (bag, station) state, or a fold of that station's events when no row exists yet."""
+    try:
+        row = _select_station_row(conn, workflow_bag_id, station_id)
+    except sqlite3.OperationalError as exc:
+        if not _is_missing_table(exc):
+            raise
+        row = None
+    if row is not None:
+        return _station_state_from_row(workflow_bag_id, station_id, row)
+    state = empty_station_state(workflow_bag_id, station_id)
+    for ev in _load_station_events(conn, workflow_bag_id, station_id):
+        apply_station_event(state, ev)
+    return state
+
+
+def open_station_sessions(conn: sqlite3.Connection, station_id: int) -> list[dict[str, Any]] | None:
+    """
+    Station states with a claim/resume session for bags whose card is still assigned, newest session
+    first. ``None`` when the projection table does not exist (caller falls back to event scans).
+    """
+    sessions = open_sessions_by_station(conn, [station_id])
+    return None if sessions is None else sessions.get(int(station_id), [])
+
+
+def open_sessions_by_station(
+    conn: sqlite3.Connection, station_ids: Iterable[int] | None = None
+) -> dict[int, list[dict[str, Any]]] | None:
+    """``open_station_sessions`` for many stations (all stations when ``station_ids`` is None) in one query."""
+    cols = ", ".join(f"s.{c}" for c in _STATION_STATE_COLUMNS)
+    params: list[Any] = [WC.QR_CARD_STATUS_ASSIGNED]
+    station_filter = ""
+    if station_ids is not None:
+        ids = sorted({int(s) for s in station_ids})
+        if not ids:
+            return {}
+        station_filter = f"AND s.station_id IN ({','.join('?' * len(ids))})"
+        params.extend(ids)
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT s.workflow_bag_id, s.station_id, {cols}, qc.scan_token
+            FROM workflow_bag_station_state s
+            JOIN qr_cards qc
+              ON qc.assigned_workflow_bag_id = s.workflow_bag_id
+             AND qc.status = ?
+            WHERE s.session_event_id IS NOT NULL
+              {station_filter}
+            ORDER BY s.station_id ASC, s.session_started_at DESC, s.session_event_id DESC, qc.id ASC
+            """,
+            tuple(params),
+        ).fetchall()
+    except sqlite3.OperationalError as exc:
+        if _is_missing_table(exc):
+            return None
+        raise
+    out: dict[int, list[dict[str, Any]]] = {}
+    seen: set[tuple[int, int]] = set()
+    for r in rows:
+        wid, sid = int(r[0]), int(r[1])
+        if (wid, sid) in seen:
+            # Several assigned cards can point at one bag; keep the lowest card id.
+            continue
+        seen.add((wid, sid))
+        state = _station_state_from_row(wid, sid, tuple(r[2:-1]))
+        state["card_token"] = str(r[-1]).strip() if r[-1] else None
+        out.setdefault(sid, []).append(state)
+    return out
+
+
+def _events_by_bag(conn: sqlite3.Connection, workflow_bag_ids: list[int] | None):
+    if workflow_bag_ids is None:
+        cur = conn.execute(
+            """
+            SELECT id, event_type, payload, occurred_at, station_id, workflow_bag_id
+            FROM workflow_events
+            ORDER BY workflow_bag_id ASC, occurred_at ASC, id ASC
+            """
+        )
+        for wid, rows in groupby(cur, key=lambda r: int(r[5])):
+            yield wid, [_event_from_row(r) for r in rows]
+        return
+    for wid in workflow_bag_ids:
+        yield int(wid), _load_bag_events(conn, int(wid))
+
+
+def rebuild_workflow_bag_state(
+    conn: sqlite3.Connection,
+    workflow_bag_ids: Iterable[int] | None = None,
+    *,
+    repair: bool = True,
+) -> dict[str, Any]:
+    """
+    Replay ``workflow_events`` and compare against the stored projection.
+
+    Returns a drift report; with ``repair=True`` drifted/missing rows are rewritten and orphan station
+    rows removed (caller commits).
+    """
+    ids = None if workflow_bag_ids is None else sorted({int(b) for b in workflow_bag_ids})
+    stored_bags: dict[int, tuple] = {}
+    stored_stations: dict[tuple[int, int], tuple] = {}
+    bag_cols = ", ".join(_BAG_STATE_COLUMNS)
+    st_cols = ", ".join(_STATION_STATE_COLUMNS)
+    if ids is None:
+        bag_rows = conn.execute(f"SELECT workflow_bag_id, {bag_cols} FROM workflow_bag_state").fetchall()
+        st_rows = conn.execute(
+            f"SELECT workflow_bag_id, station_id, {st_cols} FROM workflow_bag_station_state"
+        ).fetchall()
+    else:
+        bag_rows, st_rows = [], []
+        for wid in ids:
+            bag_rows += conn.execute(
+                f"SELECT workflow_bag_id, {bag_cols} FROM workflow_bag_state WHERE workflow_bag_id = ?",
+                (wid,),
+            ).fetchall()
+            st_rows += conn.execute(
+                f"""
+                SELECT workflow_bag_id, station_id, {st_cols}
+                FROM workflow_bag_station_state WHERE workflow_bag_id = ?
+                """,
+                (wid,),
+            ).fetchall()
+    for r in bag_rows:
+        stored_bags[int(r[0])] = tuple(r[1:])
+    for r in st_rows:
+        stored_stations[(int(r[0]), int(r[1]))] = tuple(r[2:])
+
+    report: dict[str, Any] = {
+        "bags_checked": 0,
+        "bag_rows_drifted": 0,
+        "station_rows_drifted": 0,
+        "orphan_rows": 0,
+        "drifted_bag_ids": [],
+        "repaired": bool(repair),
+    }
+    seen_bags: set[int] = set()
+    for wid, events in _events_by_bag(conn, ids):
+        seen_bags.add(wid)
+        report["bags_checked"] += 1
+        bag, stations = fold_bag_events(wid, events)
+        drifted = False
+        stored = stored_bags.get(wid)
+        if stored is None or _bag_state_from_row(wid, stored) != bag:
+            report["bag_rows_drifted"] += 1
+            drifted = True
+            if repair:
+                _write_bag_state(conn, bag)
+        for sid, st in stations.items():
+            stored_st = stored_stations.pop((wid, sid), None)
+            if stored_st is None or _station_state_from_row(wid, sid, stored_st) != st:
+                report["station_rows_drifted"] += 1
+                drifted = True
+                if repair:
+                    _write_station_state(conn, st)
+        if drifted:
+            report["drifted_bag_ids"].append(wid)
+
+    orphan_bags = [wid for wid in stored_bags if wid not in seen_bags]
+    orphan_stations = list(stored_stations)
+    report["orphan_rows"] = len(orphan_bags) + len(orphan_stations)
+    if repair:
+        for wid in orphan_bags:
+            conn.execute("DELETE FROM workflow_bag_state WHERE workflow_bag_id = ?", (wid,))
+        for wid, sid in orphan_stations:
+            conn.execute(
+                "DELETE FROM workflow_bag_station_state WHERE workflow_bag_id = ? AND station_id = ?",
+                (wid, sid),
+            )
+    return report
@@ -0,0 +1,134 @@
+"""
+Batched floor event submission (``POST /workflow/floor/api/events/batch``).
+
+Tablets that lose the network queue their events locally and replay them in order once it comes
+back. Each event carries a client-generated ``idempotency_key``; the batch and single-event routes
+record the outcome of every accepted event in ``workflow_event_receipts`` in the same transaction
+as the append, so a replay of an event whose response was lost (including one sent online whose
+connection dropped after the commit) returns the stored result instead of appending it again.
+Replayed events keep their ``client_ts`` as ``occurred_at``, clamped by ``append_workflow_event``.
+
+Receipts older than ``FLOOR_EVENT_RECEIPT_RETENTION_DAYS`` are pruned by the batch route.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any
+
+from app.services.workflow_append import utc_ms_now
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 128
+
+WORKFLOW_EVENT_RECEIPTS_DDL: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS workflow_event_receipts (
+        idempotency_key TEXT PRIMARY KEY,
+        device_id TEXT,
+        event_id INTEGER,
+        workflow_bag_id INTEGER,
+        client_ts INTEGER,
+        result TEXT NOT NULL,
+        created_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_workflow_event_receipts_created ON workflow_event_receipts(created_at)",
+)
+
+
+def ensure_workflow_event_receipts(conn: sqlite3.Connection) -> None:
+    for ddl in WORKFLOW_EVENT_RECEIPTS_DDL:
+        conn.execute(ddl)
+
+
+def normalize_idempotency_key(value: Any) -> str | None:
+    """Stripped key, or None when absent; raises ``ValueError`` when longer than the column allows."""
+    key = str(value or "").strip()
+    if len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValueError(f"idempotency_key must be at most {MAX_IDEMPOTENCY_KEY_LENGTH} chars")
+    return key or None
+
+
+def parse_event_batch(data: dict[str, Any], *, max_events: int) -> list[dict[str, Any]]:
+    """
+    Normalize the ``events`` list of a batch body; raises ``ValueError`` for a malformed batch.
+
+    Per-event field checks (tokens, event type) are left to the append path so that one bad event
+    is reported in its own result instead of failing the whole batch.
+    """
+    events = data.get("events")
+    if not isinstance(events, list) or not events:
+        raise ValueError("events must be a non-empty list")
+    if len(events) > max_events:
+        raise ValueError(f"at most {max_events} events per batch")
+    default_device_id = (data.get("device_id") or "").strip() or None
+    out: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for index, ev in enumerate(events):
+        if not isinstance(ev, dict):
+            raise ValueError(f"events[{index}] must be an object")
+        key = str(ev.get("idempotency_key") or "").strip()
+        if not key or len(key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise ValueError(f"events[{index}].idempotency_key required (max {MAX_IDEMPOTENCY_KEY_LENGTH} chars)")
+        if key in seen:
+            raise ValueError(f"events[{index}].idempotency_key repeats an earlier event")
+        seen.add(key)
+        try:
+            client_ts = int(ev["client_ts"]) if ev.get("client_ts") is not None else None
+        except (TypeError, ValueError):
+            raise ValueError(f"events[{index}].client_ts must be epoch milliseconds") from None
+        payload = ev.get("payload") or {}
+        out.append(
+            {
+                "index": index,
+                "idempotency_key": key,
+                "client_ts": client_ts,
+                "station_token": str(ev.get("station_token") or "").strip(),
+                "card_token": str(ev.get("card_token") or "").strip(),
+                "event_type": str(ev.get("event_type") or "").strip(),
+                "payload": payload if isinstance(payload, dict) else {},
+                "device_id": str(ev.get("device_id") or "").strip() or default_device_id,
+            }
+        )
+    return out
+
+
+def load_event_receipts(conn: sqlite3.Connection, keys: list[str]) -> dict[str, dict[str, Any]]:
+    """Stored results for the keys already accepted (one query per batch)."""
+    if not keys:
+        return {}
+    placeholders = ",".join("?" * len(keys))
+    rows = conn.execute(
+        f"SELECT idempotency_key, result FROM workflow_event_receipts WHERE idempotency_key IN ({placeholders})",
+        keys,
+    ).fetchall()
+    return {str(row[0]): json.loads(row[1]) for row in rows}
+
+
+def store_event_receipt(conn: sqlite3.Connection, event: dict[str, Any], result: dict[str, Any]) -> None:
+    """Record an accepted event's result (caller's transaction)."""
+    conn.execute(
+        """
+        INSERT INTO workflow_event_receipts (
+            idempotency_key, device_id, event_id, workflow_bag_id, client_ts, result, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            event["idempotency_key"],
+            event.get("device_id"),
+            result.get("event_id"),
+            result.get("workflow_bag_id"),
+            event.get("client_ts"),
+            json.dumps(result),
+            utc_ms_now(),
+        ),
+    )
+
+
+def prune_event_receipts(conn: sqlite3.Connection, retention_days: int) -> int:
+    """Delete receipts older than ``retention_days`` (caller's transaction); returns rows removed."""
+    if retention_days <= 0:
+        return 0
+    cutoff = utc_ms_now() - int(retention_days) * 86_400_000
+    return conn.execute("DELETE FROM workflow_event_receipts WHERE created_at < ?", (cutoff,)).rowcount
@@ -0,0 +1,286 @@
+"""
+Server-Sent Events push channel for wallboards and floor stations.
+
+Each worker process runs one daemon "tail" thread while it has stream subscribers. The thread
+polls ``workflow_events`` by id (every row is written by ``append_workflow_event``), so appends
+made by *any* gunicorn worker reach every worker's subscribers with only SQLite available. New
+rows are kept in a bounded ring and fanned out to subscribers through a condition variable;
+the ops TV snapshot watermark is checked on the same tick so wallboards learn "snapshot changed"
+once per change instead of polling per client per interval.
+
+Streams are finite (``SSE_MAX_STREAM_SECONDS``); ``EventSource`` reconnects on its own and
+resumes from ``Last-Event-ID``. A subscriber that falls further behind than the ring gets a
+``resync`` event and should reload its view.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+_RING_SIZE = 1000
+_BATCH_LIMIT = 500
+
+
+def format_sse(data: Any, event: str | None = None, event_id: int | None = None) -> str:
+    """One SSE frame (``data`` is JSON-encoded)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def events_after(conn: sqlite3.Connection, after_id: int, limit: int = _BATCH_LIMIT) -> list[dict[str, Any]]:
+    """``workflow_events`` rows with ``id > after_id`` in id order (payload parsed)."""
+    rows = conn.execute(
+        """
+        SELECT id, event_type, payload, occurred_at, workflow_bag_id, station_id
+        FROM workflow_events
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (int(after_id), int(limit)),
+    ).fetchall()
+    out = []
+    for r in rows:
+        try:
+            payload = json.loads(r[2]) if r[2] else {}
+        except (TypeError, ValueError):
+            payload = {}
+        out.append(
+            {
+                "id": int(r[0]),
+                "event_type": r[1],
+                "payload": payload,
+                "occurred_at": r[3],
+                "workflow_bag_id": r[4],
+                "station_id": r[5],
+            }
+        )
+    return out
+
+
+def max_event_id(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM workflow_events").fetchone()
+    return int(row[0] or 0)
+
+
+class TooManySubscribers(RuntimeError):
+    """This worker already serves ``SSE_MAX_CLIENTS_PER_WORKER`` streams."""
+
+
+class WorkflowEventTail:
+    """Per-process tail of ``workflow_events`` shared by every SSE subscriber in the worker."""
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        watermark: Callable[[sqlite3.Connection], str],
+        poll_interval: float,
+    ) -> None:
+        self._connect = connect
+        self._watermark_fn = watermark
+        self._poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._ring: deque[dict[str, Any]] = deque(maxlen=_RING_SIZE)
+        self._last_id = 0
+        self._watermark = ""
+        self._subscribers = 0
+        self._thread: threading.Thread | None = None
+        self._primed = False
+
+    # -- subscriber side -------------------------------------------------------------------
+    def subscribe(self, max_subscribers: int) -> None:
+        with self._cond:
+            if self._subscribers >= max_subscribers:
+                raise TooManySubscribers()
+            if not self._primed:
+                conn = self._connect()
+                try:
+                    self._last_id = max_event_id(conn)
+                    self._watermark = self._watermark_fn(conn)
+                finally:
+                    conn.close()
+                self._primed = True
+            self._subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="workflow-event-tail", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self) -> None:
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def position(self) -> tuple[int, str]:
+        """(last event id seen, current snapshot watermark)."""
+        with self._cond:
+            return self._last_id, self._watermark
+
+    def wait(self, after_id: int, watermark: str, timeout: float) -> tuple[list[dict[str, Any]], str, bool]:
+        """
+        Block until there are events after ``after_id`` or the watermark moved (or timeout).
+        Returns (events, watermark, gap) where ``gap`` means the ring no longer covers ``after_id``.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._last_id <= after_id and self._watermark == watermark:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            gap = after_id < self._last_id and (not self._ring or after_id < self._ring[0]["id"] - 1)
+            events = [e for e in self._ring if e["id"] > after_id]
+            return events, self._watermark, gap
+
+    @property
+    def subscribers(self) -> int:
+        with self._cond:
+            return self._subscribers
+
+    # -- tail thread -----------------------------------------------------------------------
+    def poll_once(self) -> None:
+        """Read new rows and the watermark, then wake subscribers if anything moved."""
+        conn = self._connect()
+        try:
+            fresh = events_after(conn, self._last_id)
+            watermark = self._watermark_fn(conn)
+        finally:
+            conn.close()
+        with self._cond:
+            if not fresh and watermark == self._watermark:
+                return
+            self._ring.extend(fresh)
+            if fresh:
+                self._last_id = fresh[-1]["id"]
+            self._watermark = watermark
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._poll_interval)
+            with self._cond:
+                if self._subscribers <= 0:
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+            except sqlite3.Error:
+                LOGGER.warning("workflow event tail poll failed", exc_info=True)
+
+
+_tails: dict[str, WorkflowEventTail] = {}
+_tails_lock = threading.Lock()
+
+
+def get_tail() -> WorkflowEventTail:
+    """The tail for ``Config.DATABASE_PATH`` in this process (created on first use)."""
+    from app.services.ops_tv_snapshot_cache import snapshot_watermark
+    from app.utils.db_utils import get_read_db
+
+    with _tails_lock:
+        tail = _tails.get(Config.DATABASE_PATH)
+        if tail is None:
+            tail = _tails[Config.DATABASE_PATH] = WorkflowEventTail(
+                get_read_db, snapshot_watermark, Config.SSE_POLL_INTERVAL_MS / 1000.0
+            )
+        return tail
+
+
+class _SubscriberStream:
+    """Frames of one registered subscriber; ``close()`` unsubscribes even if it was never iterated."""
+
+    def __init__(self, tail: WorkflowEventTail, frames: Iterator[str]) -> None:
+        self._tail = tail
+        self._frames = frames
+        self._subscribed = True
+
+    def __iter__(self) -> _SubscriberStream:
+        return self
+
+    def __next__(self) -> str:
+        try:
+            return next(self._frames)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        self._frames.close()
+        if self._subscribed:
+            self._subscribed = False
+            self._tail.unsubscribe()
+
+
+def open_subscriber_stream(
+    *, last_event_id: int | None, include_payload: bool, notify_snapshot: bool
+) -> Iterator[str]:
+    """
+    Register a subscriber now (raises ``TooManySubscribers`` before any bytes are sent) and
+    return its frames; the subscription ends when they run out or the response closes them.
+    """
+    tail = get_tail()
+    tail.subscribe(int(Config.SSE_MAX_CLIENTS_PER_WORKER))
+    return _SubscriberStream(
+        tail,
+        stream_workflow_events(
+            tail,
+            last_event_id=last_event_id,
+            include_payload=include_payload,
+            notify_snapshot=notify_snapshot,
+            max_seconds=float(Config.SSE_MAX_STREAM_SECONDS),
+        ),
+    )
+
+
+def stream_workflow_events(
+    tail: WorkflowEventTail,
+    *,
+    last_event_id: int | None,
+    include_payload: bool,
+    notify_snapshot: bool,
+    max_seconds: float,
+    keepalive_seconds: float = 15.0,
+) -> Iterator[str]:
+    """
+    SSE frames for one subscriber: ``hello``, then ``workflow_event`` deltas (id = event id),
+    ``snapshot`` when the ops TV watermark changes, ``resync`` after a gap, and keep-alive
+    comments. Caller must have called ``tail.subscribe`` and owns the matching ``unsubscribe``.
+    """
+    head_id, watermark = tail.position()
+    after_id = head_id if last_event_id is None else min(int(last_event_id), head_id)
+    yield f"retry: {int(Config.SSE_RETRY_MS)}\n\n"
+    yield format_sse({"last_event_id": head_id, "watermark": watermark}, event="hello")
+    deadline = time.monotonic() + max_seconds
+    while time.monotonic() < deadline:
+        timeout = min(keepalive_seconds, max(0.0, deadline - time.monotonic()))
+        events, new_watermark, gap = tail.wait(after_id, watermark, timeout)
+        sent = False
+        if gap:
+            yield format_sse({"reason": "behind"}, event="resync")
+            sent = True
+        for ev in events:
+            delta = ev if include_payload else {k: v for k, v in ev.items() if k != "payload"}
+            yield format_sse(delta, event="workflow_event", event_id=ev["id"])
+            after_id = ev["id"]
+            sent = True
+        if new_watermark != watermark:
+            watermark = new_watermark
+            if notify_snapshot:
+                yield format_sse({"watermark": watermark}, event="snapshot")
+                sent = True
+        if not sent:
+            yield ": keep-alive\n\n"
@@ -1,4 +1,4 @@
-"""HTTP helpers: structured JSON errors + simple in-process rate limit for floor API."""
+"""HTTP helpers: structured JSON errors, simple in-process rate limit and SSE responses for floor API."""
 
 from __future__ import annotations
 
@@ -9,9 +9,12 @@ from collections.abc import Callable
 from functools import wraps
 from typing import Any
 
-from flask import Request, jsonify
+from config import Config
+from flask import Request, Response, jsonify
 from flask_limiter.util import get_remote_address
 
+from app.services.workflow_event_stream import TooManySubscribers, open_subscriber_stream
+
 LOGGER = logging.getLogger(__name__)
 
 _floor_buckets: dict[str, list[float]] = defaultdict(list)
@@ -57,3 +60,29 @@ def rate_limit_floor(f: Callable) -> Callable:
 def read_json_body(req: Request) -> dict[str, Any]:
     data = req.get_json(silent=True)
     return data if isinstance(data, dict) else {}
+
+
+def workflow_event_stream_response(req: Request, *, include_payload: bool, notify_snapshot: bool):
+    """
+    ``text/event-stream`` of workflow event deltas (see ``workflow_event_stream``). Answers 503
+    when SSE is disabled or this worker is at ``SSE_MAX_CLIENTS_PER_WORKER``; browsers then stay
+    on their polling fallback.
+    """
+    if not Config.SSE_ENABLED:
+        return workflow_json("WORKFLOW_STREAM_UNAVAILABLE", "Event stream disabled", status=503)
+    raw_last = (req.headers.get("Last-Event-ID") or req.args.get("last_event_id") or "").strip()
+    last_event_id = int(raw_last) if raw_last.isdigit() else None
+    try:
+        frames = open_subscriber_stream(
+            last_event_id=last_event_id,
+            include_payload=include_payload,
+            notify_snapshot=notify_snapshot,
+        )
+    except TooManySubscribers:
+        resp, status = workflow_json("WORKFLOW_STREAM_BUSY", "Too many open event streams", status=503)
+        resp.headers["Retry-After"] = "30"
+        return resp, status
+    resp = Response(frames, mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
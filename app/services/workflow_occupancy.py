@@ -0,0 +1,266 @@
+"""Set-based station occupancy shared by the floor API, the ops TV snapshot and Telegram ``/status``.
+
+``resolve_station_occupancy`` answers "which bag is at each station" for any number of stations with
+a fixed number of queries: station kinds, open sessions (``workflow_bag_station_state``), bag states,
+and one batched bag-identity lookup. When the projection tables are missing it falls back to the
+per-station event scans the floor API used before.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable
+from typing import Any
+
+from app.services import workflow_constants as WC
+from app.services.workflow_bag_state import (
+    active_shortages,
+    bag_facts,
+    load_bag_states,
+    load_station_state,
+    open_sessions_by_station,
+    station_hold_details,
+    station_lane_finished,
+    station_pause_details,
+)
+from app.services.workflow_read import display_stage_label, floor_bag_verifications, progress_summary
+
+
+def station_facts(
+    bag_state: dict[str, Any],
+    station_state: dict[str, Any],
+    *,
+    card_token: str | None,
+    verification: dict[str, Any],
+    production_flow: str,
+) -> dict[str, Any]:
+    """Floor ``facts`` payload for one (bag, station) from already-loaded state rows."""
+    facts = bag_facts(bag_state)
+    station_claimed = bool(station_state["claimed"])
+    station_needs_resume = bool(station_state["needs_resume"])
+    return {
+        "event_counts_by_type": facts["event_counts_by_type"],
+        "latest_event_type": facts["latest_event_type"],
+        "display_stage_label": display_stage_label(facts),
+        "progress_summary": progress_summary(facts),
+        "station_claimed": station_claimed,
+        "claim_required": not station_claimed,
+        "station_needs_resume": station_needs_resume,
+        "resume_required": bool(station_claimed and station_needs_resume),
+        "pause_details": station_pause_details(station_state),
+        "hold_details": station_hold_details(station_state),
+        "out_of_packaging_shortages": active_shortages(bag_state),
+        "occupancy_started_at_ms": station_state["session_started_at"],
+        "occupying_card_token": card_token,
+        "bag_verification": verification,
+        "production_flow": production_flow,
+    }
+
+
+def _station_kinds(conn: sqlite3.Connection, station_ids: list[int] | None) -> dict[int, str]:
+    where = ""
+    params: tuple = ()
+    if station_ids is not None:
+        if not station_ids:
+            return {}
+        where = f"WHERE id IN ({','.join('?' * len(station_ids))})"
+        params = tuple(station_ids)
+    try:
+        rows = conn.execute(
+            f"SELECT id, COALESCE(station_kind, 'sealing') AS station_kind FROM workflow_stations {where}",
+            params,
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = conn.execute(
+            f"SELECT id, 'sealing' AS station_kind FROM workflow_stations {where}",
+            params,
+        ).fetchall()
+    kinds = {int(r["id"]): (r["station_kind"] or "sealing") for r in rows}
+    for sid in station_ids or ():
+        kinds.setdefault(sid, "sealing")
+    return kinds
+
+
+def _assigned_card_tokens(conn: sqlite3.Connection, workflow_bag_ids: Iterable[int]) -> dict[int, str | None]:
+    ids = sorted({int(w) for w in workflow_bag_ids})
+    out: dict[int, str | None] = {wid: None for wid in ids}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i : i + 500]
+        rows = conn.execute(
+            f"""
+            SELECT assigned_workflow_bag_id AS wid, scan_token
+            FROM qr_cards
+            WHERE status = ?
+              AND assigned_workflow_bag_id IN ({','.join('?' * len(chunk))})
+            ORDER BY id DESC
+            """,
+            (WC.QR_CARD_STATUS_ASSIGNED, *chunk),
+        ).fetchall()
+        for r in rows:
+            # DESC so the lowest card id wins, matching ``ORDER BY id ASC LIMIT 1`` per bag.
+            tok = r["scan_token"]
+            out[int(r["wid"])] = str(tok).strip() if tok else None
+    return out
+
+
+def _event_scan_sessions(conn: sqlite3.Connection, station_id: int) -> list[dict[str, Any]]:
+    """Pre-projection fallback: sessions from BAG_CLAIMED / STATION_RESUMED rows at this station."""
+    rows = conn.execute(
+        """
+        SELECT DISTINCT we.workflow_bag_id AS wid
+        FROM workflow_events we
+        INNER JOIN qr_cards qc
+          ON qc.assigned_workflow_bag_id = we.workflow_bag_id
+         AND qc.status = ?
+        WHERE we.station_id = ?
+          AND we.event_type IN (?, ?)
+        """,
+        (
+            WC.QR_CARD_STATUS_ASSIGNED,
+            station_id,
+            WC.EVENT_BAG_CLAIMED,
+            WC.EVENT_STATION_RESUMED,
+        ),
+    ).fetchall()
+    wids = [int(r["wid"]) for r in rows]
+    tokens = _assigned_card_tokens(conn, wids)
+    sessions = []
+    for wid in wids:
+        state = load_station_state(conn, wid, station_id)
+        state["card_token"] = tokens.get(wid)
+        sessions.append(state)
+    sessions.sort(
+        key=lambda s: (s["session_started_at"] or 0, s["session_event_id"] or 0),
+        reverse=True,
+    )
+    return sessions
+
+
+def resolve_station_occupancy(
+    conn: sqlite3.Connection, station_ids: Iterable[int] | None = None
+) -> dict[int, dict | None]:
+    """
+    Occupancy for each station (all stations when ``station_ids`` is None): ``None`` when idle,
+    otherwise the dict the floor API returns (``status``, ``workflow_bag_id``, ``card_token``,
+    ``occupancy_started_at_ms``, ``paused_at_ms``, ``facts`` and ``packaging_slots`` for packaging).
+    """
+    ids = None if station_ids is None else sorted({int(s) for s in station_ids})
+    kinds = _station_kinds(conn, ids)
+    sessions_by_station = open_sessions_by_station(conn, kinds.keys())
+    if sessions_by_station is None:
+        sessions_by_station = {sid: _event_scan_sessions(conn, sid) for sid in kinds}
+
+    # Pick occupying sessions per station before loading any bag details.
+    picked: dict[int, list[dict[str, Any]]] = {}
+    for sid, kind in kinds.items():
+        sessions = sessions_by_station.get(sid) or []
+        if kind == "packaging":
+            active = [s for s in sessions if not station_lane_finished(s, "packaging")]
+            active.sort(key=lambda s: (s["session_started_at"] or 0, s["workflow_bag_id"]))
+            picked[sid] = active
+        elif sessions and not station_lane_finished(sessions[0], kind):
+            picked[sid] = [sessions[0]]
+        else:
+            picked[sid] = []
+
+    bag_ids = {s["workflow_bag_id"] for chosen in picked.values() for s in chosen}
+    bag_states = load_bag_states(conn, bag_ids) if bag_ids else {}
+    verifications = floor_bag_verifications(conn, bag_ids) if bag_ids else {}
+
+    def _facts(state: dict[str, Any]) -> dict[str, Any]:
+        wid = state["workflow_bag_id"]
+        verification = verifications.get(wid, {})
+        return station_facts(
+            bag_states[wid],
+            state,
+            card_token=state.get("card_token"),
+            verification=verification,
+            production_flow=verification.get("production_flow", "card"),
+        )
+
+    out: dict[int, dict | None] = {}
+    for sid, kind in kinds.items():
+        chosen = picked[sid]
+        if not chosen:
+            out[sid] = None
+            continue
+        if kind == "packaging":
+            slots: list[dict] = []
+            for state in chosen:
+                facts = _facts(state)
+                slots.append(
+                    {
+                        "workflow_bag_id": state["workflow_bag_id"],
+                        "card_token": state.get("card_token"),
+                        "production_flow": facts["production_flow"],
+                        "occupancy_started_at_ms": int(state["session_started_at"] or 0),
+                        "paused_at_ms": state["paused_at"] if facts["resume_required"] else None,
+                        "facts": facts,
+                        "status": "paused" if facts["resume_required"] else "occupied",
+                    }
+                )
+            primary = slots[0]
+            overall_paused = any(s["facts"].get("resume_required") for s in slots)
+            pause_primary = (
+                chosen[0]["paused_at"] if overall_paused and chosen[0]["needs_resume"] else None
+            )
+            out[sid] = {
+                "status": "paused" if overall_paused else "occupied",
+                "workflow_bag_id": primary["workflow_bag_id"],
+                "card_token": primary["card_token"],
+                "occupancy_started_at_ms": primary["occupancy_started_at_ms"],
+                "paused_at_ms": pause_primary,
+                "facts": primary["facts"],
+                "packaging_slots": slots,
+            }
+            continue
+        state = chosen[0]
+        facts = _facts(state)
+        status = "paused" if facts.get("resume_required") else "occupied"
+        out[sid] = {
+            "status": status,
+            "workflow_bag_id": state["workflow_bag_id"],
+            "card_token": state.get("card_token"),
+            "occupancy_started_at_ms": int(state["session_started_at"] or 0),
+            "paused_at_ms": state["paused_at"] if status == "paused" else None,
+            "facts": facts,
+        }
+    return out
+
+
+def station_occupancy(conn: sqlite3.Connection, station_id: int) -> dict | None:
+    """Occupancy for one station (see ``resolve_station_occupancy``)."""
+    return resolve_station_occupancy(conn, [station_id]).get(int(station_id))
+
+
+def current_bag_for_station_kind(conn: sqlite3.Connection, station_kind: str) -> dict[str, Any] | None:
+    """
+    Most recently started occupied station of ``station_kind`` (or ``combined``), for chat status.
+    Returns ``workflow_bag_id``, ``occurred_at``, ``station_id``, ``station_label`` and ``station_kind``.
+    """
+    try:
+        rows = conn.execute(
+            """
+            SELECT id, label, COALESCE(station_kind, 'sealing') AS station_kind
+            FROM workflow_stations
+            WHERE COALESCE(station_kind, 'sealing') IN (?, 'combined')
+            """,
+            (station_kind,),
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    stations = {int(r["id"]): dict(r) for r in rows}
+    best: dict[str, Any] | None = None
+    for sid, occ in resolve_station_occupancy(conn, stations.keys()).items():
+        if not occ:
+            continue
+        started = int(occ.get("occupancy_started_at_ms") or 0)
+        if best is None or started > best["occurred_at"]:
+            best = {
+                "workflow_bag_id": int(occ["workflow_bag_id"]),
+                "occurred_at": started,
+                "station_id": sid,
+                "station_label": stations[sid]["label"],
+                "station_kind": stations[sid]["station_kind"],
+            }
+    return best
@@ -80,95 +80,68 @@ def mechanical_bag_facts(conn: sqlite3.Connection, workflow_bag_id: int) -> dict
     }
 
 
-def production_flow_for_bag(conn: sqlite3.Connection, workflow_bag_id: int) -> str:
-    """Machine-readable flow derived from product config: ``card`` or ``bottle``."""
-    try:
-        row = conn.execute(
-            """
-            SELECT COALESCE(pd.is_bottle_product, 0) AS is_bottle_product,
-                   COALESCE(pd.is_variety_pack, 0) AS is_variety_pack
-            FROM workflow_bags wb
-            LEFT JOIN product_details pd ON pd.id = wb.product_id
-            WHERE wb.id = ?
-            """,
-            (int(workflow_bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        try:
-            row = conn.execute(
-                """
-                SELECT COALESCE(pd.is_bottle_product, 0) AS is_bottle_product,
-                       0 AS is_variety_pack
-                FROM workflow_bags wb
-                LEFT JOIN product_details pd ON pd.id = wb.product_id
-                WHERE wb.id = ?
-                """,
-                (int(workflow_bag_id),),
-            ).fetchone()
-        except sqlite3.OperationalError:
-            return "card"
-    if row:
-        r = dict(row)
-        if int(r.get("is_bottle_product") or 0) == 1 or int(r.get("is_variety_pack") or 0) == 1:
-            return "bottle"
-    return "card"
+def _in_chunks(ids: list[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
 
 
-def floor_bag_verification(conn: sqlite3.Connection, workflow_bag_id: int) -> dict[str, Any]:
-    """Human-readable bag identity for floor verification (product, box, bag, PO, shipment).
+def _flow_from_flags(is_bottle_product: Any, is_variety_pack: Any) -> str:
+    if int(is_bottle_product or 0) == 1 or int(is_variety_pack or 0) == 1:
+        return "bottle"
+    return "card"
 
-    Denormalized ``workflow_bags`` fields are used; when ``inventory_bag_id`` is set, receiving/PO
-    data supplements or overrides missing PO/shipment labels.
-    """
-    wid = int(workflow_bag_id)
-    try:
-        row = conn.execute(
-            """
-            SELECT wb.product_id, wb.box_number, wb.bag_number, wb.receipt_number, wb.inventory_bag_id,
-                   pd.product_name AS product_name,
-                   tt.tablet_type_name AS tablet_type_name
-            FROM workflow_bags wb
-            LEFT JOIN product_details pd ON pd.id = wb.product_id
-            LEFT JOIN bags b ON b.id = wb.inventory_bag_id
-            LEFT JOIN tablet_types tt ON tt.id = b.tablet_type_id
-            WHERE wb.id = ?
-            """,
-            (wid,),
-        ).fetchone()
-    except sqlite3.OperationalError:
+
+def production_flows_for_bags(conn: sqlite3.Connection, workflow_bag_ids) -> dict[int, str]:
+    """``production_flow_for_bag`` for many bags (one query per 500 ids); unknown bags map to ``card``."""
+    ids = sorted({int(w) for w in workflow_bag_ids})
+    out = {wid: "card" for wid in ids}
+    for chunk in _in_chunks(ids):
+        qmarks = ",".join("?" * len(chunk))
         try:
-            row = conn.execute(
-                """
-                SELECT wb.product_id, wb.box_number, wb.bag_number, wb.receipt_number, wb.inventory_bag_id,
-                       pd.product_name AS product_name, NULL AS tablet_type_name
+            rows = conn.execute(
+                f"""
+                SELECT wb.id AS wid,
+                       COALESCE(pd.is_bottle_product, 0) AS is_bottle_product,
+                       COALESCE(pd.is_variety_pack, 0) AS is_variety_pack
                 FROM workflow_bags wb
                 LEFT JOIN product_details pd ON pd.id = wb.product_id
-                WHERE wb.id = ?
+                WHERE wb.id IN ({qmarks})
                 """,
-                (wid,),
-            ).fetchone()
+                tuple(chunk),
+            ).fetchall()
         except sqlite3.OperationalError:
-            return {}
-    if not row:
-        return {}
-    wb = dict(row)
-    product_name = (wb.get("product_name") or "").strip() or None
-    tablet_type_name = (wb.get("tablet_type_name") or "").strip() or None
-    box_raw = wb.get("box_number")
-    bag_raw = wb.get("bag_number")
-    box_s = str(box_raw).strip() if box_raw is not None and str(box_raw).strip() else None
-    bag_s = str(bag_raw).strip() if bag_raw is not None and str(bag_raw).strip() else None
-    receipt_fallback = (wb.get("receipt_number") or "").strip() or None
-
-    po_number: str | None = None
-    shipment_label: str | None = receipt_fallback
-
-    inv_id = wb.get("inventory_bag_id")
-    if inv_id:
+            try:
+                rows = conn.execute(
+                    f"""
+                    SELECT wb.id AS wid,
+                           COALESCE(pd.is_bottle_product, 0) AS is_bottle_product,
+                           0 AS is_variety_pack
+                    FROM workflow_bags wb
+                    LEFT JOIN product_details pd ON pd.id = wb.product_id
+                    WHERE wb.id IN ({qmarks})
+                    """,
+                    tuple(chunk),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return out
+        for r in rows:
+            out[int(r["wid"])] = _flow_from_flags(r["is_bottle_product"], r["is_variety_pack"])
+    return out
+
+
+def production_flow_for_bag(conn: sqlite3.Connection, workflow_bag_id: int) -> str:
+    """Machine-readable flow derived from product config: ``card`` or ``bottle``."""
+    return production_flows_for_bags(conn, [workflow_bag_id])[int(workflow_bag_id)]
+
+
+def _inventory_rows_for_bags(conn: sqlite3.Connection, inventory_bag_ids: list[int]) -> dict[int, dict]:
+    out: dict[int, dict] = {}
+    for chunk in _in_chunks(inventory_bag_ids):
         try:
-            inv = conn.execute(
-                """
-                SELECT po.po_number AS po_number,
+            rows = conn.execute(
+                f"""
+                SELECT b.id AS inv_id,
+                       po.po_number AS po_number,
                        r.receive_name AS receive_name,
                        sb.box_number AS inv_box,
                        b.bag_number AS inv_bag
@@ -176,14 +149,81 @@ def floor_bag_verification(conn: sqlite3.Connection, workflow_bag_id: int) -> di
                 JOIN small_boxes sb ON b.small_box_id = sb.id
                 JOIN receiving r ON sb.receiving_id = r.id
                 LEFT JOIN purchase_orders po ON r.po_id = po.id
-                WHERE b.id = ?
+                WHERE b.id IN ({",".join("?" * len(chunk))})
                 """,
-                (int(inv_id),),
-            ).fetchone()
+                tuple(chunk),
+            ).fetchall()
         except sqlite3.OperationalError:
-            inv = None
-        if inv:
-            invd = dict(inv)
+            return out
+        for r in rows:
+            out[int(r["inv_id"])] = dict(r)
+    return out
+
+
+def floor_bag_verifications(conn: sqlite3.Connection, workflow_bag_ids) -> dict[int, dict[str, Any]]:
+    """``floor_bag_verification`` for many bags with a fixed number of queries; unknown bags map to ``{}``."""
+    ids = sorted({int(w) for w in workflow_bag_ids})
+    bag_rows: dict[int, dict] = {}
+    for chunk in _in_chunks(ids):
+        qmarks = ",".join("?" * len(chunk))
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT wb.id AS wid, wb.product_id, wb.box_number, wb.bag_number, wb.receipt_number,
+                       wb.inventory_bag_id,
+                       pd.product_name AS product_name,
+                       tt.tablet_type_name AS tablet_type_name
+                FROM workflow_bags wb
+                LEFT JOIN product_details pd ON pd.id = wb.product_id
+                LEFT JOIN bags b ON b.id = wb.inventory_bag_id
+                LEFT JOIN tablet_types tt ON tt.id = b.tablet_type_id
+                WHERE wb.id IN ({qmarks})
+                """,
+                tuple(chunk),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            try:
+                rows = conn.execute(
+                    f"""
+                    SELECT wb.id AS wid, wb.product_id, wb.box_number, wb.bag_number, wb.receipt_number,
+                           wb.inventory_bag_id,
+                           pd.product_name AS product_name, NULL AS tablet_type_name
+                    FROM workflow_bags wb
+                    LEFT JOIN product_details pd ON pd.id = wb.product_id
+                    WHERE wb.id IN ({qmarks})
+                    """,
+                    tuple(chunk),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return {wid: {} for wid in ids}
+        for r in rows:
+            bag_rows[int(r["wid"])] = dict(r)
+
+    inv_ids = sorted({int(wb["inventory_bag_id"]) for wb in bag_rows.values() if wb.get("inventory_bag_id")})
+    inventory = _inventory_rows_for_bags(conn, inv_ids) if inv_ids else {}
+    flows = production_flows_for_bags(conn, bag_rows.keys()) if bag_rows else {}
+
+    def _fmt_box_bag(label: str, raw: str | None) -> str | None:
+        if not raw:
+            return None
+        return f"{label} {raw}"
+
+    out: dict[int, dict[str, Any]] = {wid: {} for wid in ids}
+    for wid, wb in bag_rows.items():
+        product_name = (wb.get("product_name") or "").strip() or None
+        tablet_type_name = (wb.get("tablet_type_name") or "").strip() or None
+        box_raw = wb.get("box_number")
+        bag_raw = wb.get("bag_number")
+        box_s = str(box_raw).strip() if box_raw is not None and str(box_raw).strip() else None
+        bag_s = str(bag_raw).strip() if bag_raw is not None and str(bag_raw).strip() else None
+        receipt_fallback = (wb.get("receipt_number") or "").strip() or None
+
+        po_number: str | None = None
+        shipment_label: str | None = receipt_fallback
+
+        inv_id = wb.get("inventory_bag_id")
+        invd = inventory.get(int(inv_id)) if inv_id else None
+        if invd:
             po = invd.get("po_number")
             if po is not None and str(po).strip():
                 po_number = str(po).strip()
@@ -199,21 +239,26 @@ def floor_bag_verification(conn: sqlite3.Connection, workflow_bag_id: int) -> di
                 if ig is not None and str(ig).strip():
                     bag_s = str(ig).strip()
 
-    def _fmt_box_bag(label: str, raw: str | None) -> str | None:
-        if not raw:
-            return None
-        return f"{label} {raw}"
+        out[wid] = {
+            "product_name": product_name,
+            "tablet_type_name": tablet_type_name,
+            "production_flow": flows.get(wid, "card"),
+            "box_display": _fmt_box_bag("Box", box_s),
+            "bag_display": _fmt_box_bag("Bag", bag_s),
+            "po_number": po_number,
+            "receipt_number": receipt_fallback,
+            "shipment_label": shipment_label,
+        }
+    return out
 
-    return {
-        "product_name": product_name,
-        "tablet_type_name": tablet_type_name,
-        "production_flow": production_flow_for_bag(conn, workflow_bag_id),
-        "box_display": _fmt_box_bag("Box", box_s),
-        "bag_display": _fmt_box_bag("Bag", bag_s),
-        "po_number": po_number,
-        "receipt_number": receipt_fallback,
-        "shipment_label": shipment_label,
-    }
+
+def floor_bag_verification(conn: sqlite3.Connection, workflow_bag_id: int) -> dict[str, Any]:
+    """Human-readable bag identity for floor verification (product, box, bag, PO, shipment).
+
+    Denormalized ``workflow_bags`` fields are used; when ``inventory_bag_id`` is set, receiving/PO
+    data supplements or overrides missing PO/shipment labels.
+    """
+    return floor_bag_verifications(conn, [workflow_bag_id])[int(workflow_bag_id)]
 
 
 def display_stage_label(facts: dict[str, Any]) -> str:
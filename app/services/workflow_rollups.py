@@ -0,0 +1,472 @@
+"""
+Daily rollups of station / product / operator output from ``workflow_events``.
+
+Closed factory days (America/New_York) are aggregated once into:
+
+- ``workflow_rollup_station_hour`` — per day, station, hour and product
+- ``workflow_rollup_product_day`` — per day and product (every event, with or without a station)
+- ``workflow_rollup_operator_day`` — per day, station, user and product
+
+Packaging output is stored as ``pkg_displays`` + ``pkg_cases`` so readers apply the product's
+*current* ``displays_per_case`` exactly like the live SQL does. Durations are claim/resume → submit
+spans of 15 s – 24 h (same pairing and bounds as ``gather_station_analytics``).
+
+A day is rolled by re-aggregating it from events, so the tables never drift by accumulation.
+Appends only mark days: triggers record ``occurred_at`` of any insert / edit / delete that lands in
+an already-rolled day in ``workflow_rollup_dirty``. Readers use the tables only when they cover the
+requested days with nothing dirty; otherwise they run the same aggregation over raw events and start
+a background refresh (own connection and transaction, one per process at a time) that rolls the
+previous day(s) after midnight and re-rolls dirty days. ``scripts/refresh_workflow_rollups.py`` does
+the same from cron.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from config import Config
+
+from app.services.command_center_metrics_inputs import (
+    _START_EVENTS,
+    _STATION_OUTPUT_EVENTS,
+    WORKFLOW_OPS_PACKAGING_SNAPSHOT_REASONS,
+)
+from app.services.workflow_read import production_day_for_event_ms
+from app.services.workflow_txn import immediate_transaction
+
+LOGGER = logging.getLogger(__name__)
+
+_NY = ZoneInfo("America/New_York")
+
+# Closed days rolled when the tables are first created (the command center looks back 30 days).
+ROLLUP_BACKFILL_DAYS = 35
+
+_DAY_MS = 24 * 60 * 60_000
+_MIN_DURATION_MIN = 0.25
+_MAX_DURATION_MIN = 24 * 60.0
+
+MEASURES = ("outputs", "units", "tablets", "pkg_displays", "pkg_cases", "duration_min_sum", "duration_n")
+
+_TABLE_KEYS = {
+    "workflow_rollup_station_hour": ("station_id", "hour", "product_id"),
+    "workflow_rollup_product_day": ("product_id",),
+    "workflow_rollup_operator_day": ("station_id", "user_id", "product_id"),
+}
+
+_DIRTY_WHEN = "(SELECT through_ms FROM workflow_rollup_state WHERE id = 1)"
+
+WORKFLOW_ROLLUPS_DDL = (
+    *(
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            day TEXT NOT NULL,
+            {" ".join(f"{k} INTEGER NOT NULL," for k in keys)}
+            outputs INTEGER NOT NULL DEFAULT 0,
+            units REAL NOT NULL DEFAULT 0,
+            tablets REAL NOT NULL DEFAULT 0,
+            pkg_displays REAL NOT NULL DEFAULT 0,
+            pkg_cases REAL NOT NULL DEFAULT 0,
+            duration_min_sum REAL NOT NULL DEFAULT 0,
+            duration_n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, {", ".join(keys)})
+        )
+        """
+        for table, keys in _TABLE_KEYS.items()
+    ),
+    """
+    CREATE TABLE IF NOT EXISTS workflow_rollup_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        first_day TEXT NOT NULL,
+        rolled_through TEXT NOT NULL,
+        through_ms INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS workflow_rollup_dirty (occurred_at INTEGER NOT NULL)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_ins
+    AFTER INSERT ON workflow_events
+    WHEN NEW.occurred_at < {_DIRTY_WHEN}
+    BEGIN
+        INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (NEW.occurred_at);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_upd
+    AFTER UPDATE OF payload, occurred_at, event_type, station_id, workflow_bag_id, user_id ON workflow_events
+    WHEN OLD.occurred_at < {_DIRTY_WHEN} OR NEW.occurred_at < {_DIRTY_WHEN}
+    BEGIN
+        INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (OLD.occurred_at), (NEW.occurred_at);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_del
+    AFTER DELETE ON workflow_events
+    WHEN OLD.occurred_at < {_DIRTY_WHEN}
+    BEGIN
+        INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (OLD.occurred_at);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_bag_product
+    AFTER UPDATE OF product_id ON workflow_bags
+    WHEN OLD.product_id IS NOT NEW.product_id
+    BEGIN
+        INSERT INTO workflow_rollup_dirty (occurred_at)
+        SELECT occurred_at FROM workflow_events
+        WHERE workflow_bag_id = NEW.id AND occurred_at < {_DIRTY_WHEN};
+    END
+    """,
+)
+
+
+def day_start_ms(day: date) -> int:
+    """Epoch ms of local midnight starting ``day``."""
+    return int(datetime(day.year, day.month, day.day, tzinfo=_NY).timestamp() * 1000)
+
+
+def _sql_list(values: Iterable[str]) -> str:
+    return ", ".join(f"'{v}'" for v in sorted(values))
+
+
+def _aggregate_sql() -> str:
+    starts = _sql_list(_START_EVENTS)
+    outputs = _sql_list(_STATION_OUTPUT_EVENTS)
+    reasons = _sql_list(WORKFLOW_OPS_PACKAGING_SNAPSHOT_REASONS)
+    pkg = f"event_type = 'PACKAGING_SNAPSHOT' AND reason IN ({reasons})"
+    breakdown = "(p_case_count IS NOT NULL OR p_loose_display_count IS NOT NULL)"
+    in_range = f"duration_min BETWEEN {_MIN_DURATION_MIN} AND {_MAX_DURATION_MIN}"
+    return f"""
+        WITH ev AS (
+            SELECT we.id, we.occurred_at, we.event_type, we.workflow_bag_id,
+                   COALESCE(we.user_id, 0) AS user_id,
+                   COALESCE(
+                     NULLIF(we.station_id, 0),
+                     CASE WHEN json_valid(we.payload)
+                          THEN NULLIF(CAST(json_extract(we.payload, '$.station_id') AS INTEGER), 0) END,
+                     0
+                   ) AS station_id,
+                   COALESCE(wb.product_id, 0) AS product_id,
+                   we.p_count_total, we.p_case_count, we.p_loose_display_count, we.p_display_count,
+                   LOWER(COALESCE(we.p_reason, '')) AS reason
+            FROM workflow_events we
+            LEFT JOIN workflow_bags wb ON wb.id = we.workflow_bag_id
+            WHERE we.occurred_at >= :lookback_ms AND we.occurred_at < :end_ms
+              AND we.event_type IN ({starts}, {outputs})
+        ),
+        seq AS (
+            SELECT ev.*,
+                   LAG(event_type) OVER w AS prev_type,
+                   LAG(occurred_at) OVER w AS prev_at
+            FROM ev
+            WINDOW w AS (PARTITION BY station_id, workflow_bag_id ORDER BY occurred_at, id)
+        ),
+        outs AS (
+            SELECT seq.*,
+                   CASE WHEN prev_type IN ({starts}) AND occurred_at > prev_at
+                        THEN (occurred_at - prev_at) / 60000.0 END AS duration_min
+            FROM seq
+            WHERE occurred_at >= :start_ms AND event_type IN ({outputs})
+        )
+        SELECT (occurred_at - :start_ms) / 3600000 AS hour_idx, station_id, user_id, product_id,
+               COUNT(*) AS outputs,
+               SUM(CASE WHEN event_type <> 'PACKAGING_SNAPSHOT' AND p_count_total > 0
+                        THEN p_count_total ELSE 0 END) AS units,
+               SUM(CASE WHEN event_type IN ('BLISTER_COMPLETE', 'SEALING_COMPLETE')
+                        THEN COALESCE(p_count_total, 0) ELSE 0 END) AS tablets,
+               SUM(CASE WHEN {pkg} THEN
+                     CASE WHEN {breakdown} THEN COALESCE(p_loose_display_count, p_display_count, 0)
+                          ELSE COALESCE(p_display_count, p_count_total, 0) END
+                   ELSE 0 END) AS pkg_displays,
+               SUM(CASE WHEN {pkg} AND {breakdown} THEN COALESCE(p_case_count, 0) ELSE 0 END) AS pkg_cases,
+               SUM(CASE WHEN {in_range} THEN duration_min ELSE 0 END) AS duration_min_sum,
+               SUM(CASE WHEN {in_range} THEN 1 ELSE 0 END) AS duration_n
+        FROM outs
+        GROUP BY hour_idx, station_id, user_id, product_id
+    """
+
+
+_AGGREGATE_SQL = _aggregate_sql()
+
+
+def aggregate_events(conn: sqlite3.Connection, first_day: date, last_day: date) -> list[dict[str, Any]]:
+    """
+    Finest-grain rollup rows (day, hour, station_id, user_id, product_id + ``MEASURES``) for
+    ``first_day``..``last_day`` computed from raw events.
+    """
+    start_ms = day_start_ms(first_day)
+    end_ms = day_start_ms(last_day + timedelta(days=1))
+    rows = conn.execute(
+        _AGGREGATE_SQL,
+        {"lookback_ms": start_ms - _DAY_MS, "start_ms": start_ms, "end_ms": end_ms},
+    ).fetchall()
+    out = []
+    for r in rows:
+        hour_idx, station_id, user_id, product_id, *measures = tuple(r)
+        local = datetime.fromtimestamp((start_ms + int(hour_idx) * 3600_000) / 1000.0, tz=timezone.utc).astimezone(_NY)
+        out.append(
+            {
+                "day": local.date().isoformat(),
+                "hour": local.hour,
+                "station_id": int(station_id),
+                "user_id": int(user_id),
+                "product_id": int(product_id),
+                **{m: float(v or 0) for m, v in zip(MEASURES, measures, strict=True)},
+            }
+        )
+    return out
+
+
+def _group(rows: Iterable[dict[str, Any]], keys: tuple[str, ...]) -> dict[tuple, dict[str, float]]:
+    out: dict[tuple, dict[str, float]] = {}
+    for r in rows:
+        acc = out.setdefault(tuple(r[k] for k in keys), dict.fromkeys(MEASURES, 0.0))
+        for m in MEASURES:
+            acc[m] += r[m]
+    return out
+
+
+def _load_state(conn: sqlite3.Connection) -> tuple[date, date] | None:
+    row = conn.execute("SELECT first_day, rolled_through FROM workflow_rollup_state WHERE id = 1").fetchone()
+    if not row:
+        return None
+    return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+
+def _roll_days(conn: sqlite3.Connection, days: list[date]) -> None:
+    """Replace the rollup rows of ``days`` (contiguous runs are aggregated in one query)."""
+    runs: list[list[date]] = []
+    for d in sorted(days):
+        if runs and d - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(d)
+        else:
+            runs.append([d])
+    for run in runs:
+        grain = aggregate_events(conn, run[0], run[-1])
+        labels = [d.isoformat() for d in run]
+        marks = ", ".join("?" for _ in labels)
+        for table, keys in _TABLE_KEYS.items():
+            conn.execute(f"DELETE FROM {table} WHERE day IN ({marks})", labels)
+            rows = [r for r in grain if r["station_id"] > 0] if table == "workflow_rollup_station_hour" else grain
+            cols = ("day", *keys, *MEASURES)
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                [(*k, *m.values()) for k, m in _group(rows, ("day", *keys)).items()],
+            )
+
+
+def refresh_workflow_rollups(
+    conn: sqlite3.Connection,
+    *,
+    today: date | None = None,
+    backfill_days: int = ROLLUP_BACKFILL_DAYS,
+) -> dict[str, Any]:
+    """
+    Roll every closed day not rolled yet and re-roll dirty days (caller commits).
+
+    A change on day D can re-pair the first durations of D+1, so that day is re-rolled too.
+    """
+    today = today or production_day_for_event_ms(int(time.time() * 1000))
+    yesterday = today - timedelta(days=1)
+    state = _load_state(conn)
+    if state is None:
+        first_day = today - timedelta(days=backfill_days)
+        rolled_through = first_day - timedelta(days=1)
+    else:
+        first_day, rolled_through = state
+
+    days: set[date] = set()
+    for (at_ms,) in conn.execute("SELECT DISTINCT occurred_at / 3600000 * 3600000 FROM workflow_rollup_dirty"):
+        d = production_day_for_event_ms(int(at_ms))
+        days.update(x for x in (d, d + timedelta(days=1)) if first_day <= x <= rolled_through)
+    d = rolled_through + timedelta(days=1)
+    while d <= yesterday:
+        days.add(d)
+        d += timedelta(days=1)
+
+    if days:
+        _roll_days(conn, sorted(days))
+    conn.execute("DELETE FROM workflow_rollup_dirty")
+    through = max(rolled_through, yesterday)
+    conn.execute(
+        """
+        INSERT INTO workflow_rollup_state (id, first_day, rolled_through, through_ms, updated_at)
+        VALUES (1, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            rolled_through = excluded.rolled_through,
+            through_ms = excluded.through_ms,
+            updated_at = excluded.updated_at
+        """,
+        (
+            first_day.isoformat(),
+            through.isoformat(),
+            day_start_ms(through + timedelta(days=1)),
+            int(time.time()),
+        ),
+    )
+    return {
+        "first_day": first_day.isoformat(),
+        "rolled_through": through.isoformat(),
+        "days_rolled": [x.isoformat() for x in sorted(days)],
+    }
+
+
+def _refresh_due(conn: sqlite3.Connection, today: date) -> bool:
+    """A closed day is not rolled yet or a rolled day is dirty (False until the tables exist)."""
+    try:
+        row = conn.execute(
+            "SELECT through_ms, EXISTS(SELECT 1 FROM workflow_rollup_dirty) FROM workflow_rollup_state WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return False
+    return bool(row) and (int(row[0]) < day_start_ms(today) or bool(row[1]))
+
+
+def roll_closed_days_if_due(conn: sqlite3.Connection, now_ms: int | None = None) -> bool:
+    """
+    Roll yesterday once a new day has started and re-roll dirty days, in a ``BEGIN IMMEDIATE``
+    transaction of its own on ``conn`` (never inside a caller's write). Returns whether it rolled.
+    """
+    if not Config.WORKFLOW_ROLLUPS_ENABLED:
+        return False
+    today = production_day_for_event_ms(now_ms if now_ms is not None else int(time.time() * 1000))
+    if not _refresh_due(conn, today):
+        return False
+    with immediate_transaction(conn):
+        # Another worker may have rolled between the check and the write lock.
+        if not _refresh_due(conn, today):
+            return False
+        refresh_workflow_rollups(conn, today=today)
+    return True
+
+
+_refresh_lock = threading.Lock()
+
+
+def _refresh_in_background(db_path: str) -> None:
+    try:
+        conn = sqlite3.connect(db_path, timeout=float(Config.DB_BUSY_TIMEOUT_MS) / 1000)
+        try:
+            roll_closed_days_if_due(conn)
+        finally:
+            conn.close()
+    except Exception:
+        LOGGER.warning("workflow rollup refresh failed; readers fall back to raw events", exc_info=True)
+    finally:
+        _refresh_lock.release()
+
+
+def request_rollup_refresh(conn: sqlite3.Connection) -> threading.Thread | None:
+    """
+    Start a background refresh of ``conn``'s database when one is due and none is running in this
+    process (``WORKFLOW_ROLLUPS_BACKGROUND_REFRESH``); returns the thread.
+    """
+    if not (Config.WORKFLOW_ROLLUPS_ENABLED and Config.WORKFLOW_ROLLUPS_BACKGROUND_REFRESH):
+        return None
+    if not _refresh_due(conn, production_day_for_event_ms(int(time.time() * 1000))):
+        return None
+    row = conn.execute("PRAGMA database_list").fetchone()
+    db_path = row[2] if row else ""
+    if not db_path or not os.path.exists(db_path) or not _refresh_lock.acquire(blocking=False):
+        return None
+    thread = threading.Thread(target=_refresh_in_background, args=(db_path,), name="workflow-rollups", daemon=True)
+    try:
+        thread.start()
+    except RuntimeError:
+        _refresh_lock.release()
+        raise
+    return thread
+
+
+def _rollups_cover(conn: sqlite3.Connection, first_day: date, last_day: date) -> bool:
+    if not Config.WORKFLOW_ROLLUPS_ENABLED:
+        return False
+    try:
+        state = _load_state(conn)
+        dirty = conn.execute("SELECT 1 FROM workflow_rollup_dirty LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        return False
+    return state is not None and not dirty and state[0] <= first_day and last_day <= state[1]
+
+
+def _grouped_rows(
+    conn: sqlite3.Connection, table: str, keys: tuple[str, ...], first_day: date, last_day: date
+) -> dict[tuple, dict[str, float]]:
+    """``MEASURES`` summed by ("day", *keys, "product_id") from ``table`` or, if not covered, raw events."""
+    group = ("day", *keys, "product_id")
+    if not _rollups_cover(conn, first_day, last_day):
+        request_rollup_refresh(conn)
+        rows = aggregate_events(conn, first_day, last_day)
+        if table == "workflow_rollup_station_hour":
+            rows = [r for r in rows if r["station_id"] > 0]
+        return _group(rows, group)
+    sums = ", ".join(f"SUM({m})" for m in MEASURES)
+    cols = ", ".join(group)
+    out = {}
+    for r in conn.execute(
+        f"SELECT {cols}, {sums} FROM {table} WHERE day >= ? AND day <= ? GROUP BY {cols}",
+        (first_day.isoformat(), last_day.isoformat()),
+    ):
+        r = tuple(r)
+        out[r[: len(group)]] = {m: float(v or 0) for m, v in zip(MEASURES, r[len(group) :], strict=True)}
+    return out
+
+
+def _displays_per_case(conn: sqlite3.Connection, product_ids: Iterable[int]) -> dict[int, float]:
+    ids = sorted({int(p) for p in product_ids if p})
+    if not ids:
+        return {}
+    marks = ", ".join("?" for _ in ids)
+    rows = conn.execute(
+        f"SELECT id, COALESCE(displays_per_case, 0) FROM product_details WHERE id IN ({marks})", ids
+    ).fetchall()
+    return {int(r[0]): float(r[1] or 0) for r in rows}
+
+
+def _with_displays(conn: sqlite3.Connection, grouped: dict[tuple, dict[str, float]]) -> dict[tuple, dict[str, float]]:
+    """Collapse the trailing product_id key, adding ``displays`` = pkg_displays + pkg_cases × DPC."""
+    dpc = _displays_per_case(conn, (k[-1] for k in grouped))
+    out: dict[tuple, dict[str, float]] = {}
+    for key, m in grouped.items():
+        acc = out.setdefault(key[:-1], dict.fromkeys((*MEASURES, "displays"), 0.0))
+        for name in MEASURES:
+            acc[name] += m[name]
+        acc["displays"] += m["pkg_displays"] + m["pkg_cases"] * dpc.get(key[-1], 0.0)
+    return out
+
+
+def station_day_totals(
+    conn: sqlite3.Connection, first_day: date, last_day: date
+) -> dict[int, dict[str, dict[str, float]]]:
+    """{station_id: {day: measures + displays}} for stationed events on ``first_day``..``last_day``."""
+    out: dict[int, dict[str, dict[str, float]]] = defaultdict(dict)
+    grouped = _grouped_rows(conn, "workflow_rollup_station_hour", ("station_id",), first_day, last_day)
+    for (day, station_id), m in _with_displays(conn, grouped).items():
+        out[int(station_id)][day] = m
+    return dict(out)
+
+
+def display_totals_by_day(conn: sqlite3.Connection, first_day: date, last_day: date) -> dict[str, float]:
+    """{day: packaging displays} across all products (final + pause submits)."""
+    grouped = _grouped_rows(conn, "workflow_rollup_product_day", (), first_day, last_day)
+    return {key[0]: m["displays"] for key, m in _with_displays(conn, grouped).items()}
+
+
+def operator_day_totals(
+    conn: sqlite3.Connection, first_day: date, last_day: date
+) -> dict[tuple[int, int], dict[str, dict[str, float]]]:
+    """{(station_id, user_id): {day: measures + displays}}; user_id / station_id 0 = not recorded."""
+    out: dict[tuple[int, int], dict[str, dict[str, float]]] = defaultdict(dict)
+    grouped = _grouped_rows(conn, "workflow_rollup_operator_day", ("station_id", "user_id"), first_day, last_day)
+    for (day, station_id, user_id), m in _with_displays(conn, grouped).items():
+        out[(int(station_id), int(user_id))][day] = m
+    return dict(out)
@@ -60,6 +60,22 @@ def _shortage_for_event(event: dict[str, Any]) -> dict[str, Any] | None:
     return None
 
 
+def apply_shortage_event(active: dict[str, dict[str, Any]], event: dict[str, Any]) -> None:
+    """Fold one event into ``active`` (stage -> shortage), as ``active_out_of_packaging_shortages`` does."""
+    et = str(event.get("event_type") or "")
+    shortage = _shortage_for_event(event)
+    if shortage:
+        active[shortage["stage"]] = shortage
+        return
+
+    if et == WC.EVENT_SEALING_COMPLETE:
+        active.pop("sealing", None)
+    elif et == WC.EVENT_PACKAGING_SNAPSHOT:
+        active.pop("packaging", None)
+    elif et == WC.EVENT_BAG_FINALIZED:
+        active.clear()
+
+
 def active_out_of_packaging_shortages(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Return unresolved out-of-packaging states from the event fold.
 
@@ -68,18 +84,7 @@ def active_out_of_packaging_shortages(events: list[dict[str, Any]]) -> list[dict
     """
     active: dict[str, dict[str, Any]] = {}
     for event in events:
-        et = str(event.get("event_type") or "")
-        shortage = _shortage_for_event(event)
-        if shortage:
-            active[shortage["stage"]] = shortage
-            continue
-
-        if et == WC.EVENT_SEALING_COMPLETE:
-            active.pop("sealing", None)
-        elif et == WC.EVENT_PACKAGING_SNAPSHOT:
-            active.pop("packaging", None)
-        elif et == WC.EVENT_BAG_FINALIZED:
-            active.clear()
+        apply_shortage_event(active, event)
     return list(active.values())
 
 
@@ -10,6 +10,8 @@ from collections.abc import Callable, Generator
 from contextlib import contextmanager
 from typing import TypeVar
 
+from app.utils.db_pool import record_busy_retry
+
 LOGGER = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -60,7 +62,9 @@ def run_with_busy_retry(
                 raise
             if attempt >= MAX_BUSY_ATTEMPTS:
                 LOGGER.error("%s SQLITE_BUSY exhausted after %s attempts", op_name, attempt)
+                record_busy_retry(op_name, exhausted=True)
                 raise
+            record_busy_retry(op_name)
             if attempt > 1:
                 LOGGER.warning("%s retry %s/%s after SQLITE_BUSY", op_name, attempt, MAX_BUSY_ATTEMPTS)
             time.sleep(_jitter_ms())
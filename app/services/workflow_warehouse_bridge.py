@@ -17,6 +17,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from app.services import workflow_constants as WC
+from app.services.bag_ledger import bag_ledger_counts
 from app.services.workflow_variety_sources import source_payload_for_parent
 from app.services.product_tablet_allowlist import (
     allowed_tablet_type_ids_for_product,
@@ -30,6 +31,7 @@ from app.services.production_submission_helpers import (
 from app.services.receipt_product_chain import assert_receipt_product_chain
 from app.utils.eastern_datetime import utc_now_naive_string
 from app.utils.receive_tracking import find_bag_for_submission_allowlist
+from app.utils.schema_registry import table_columns
 
 LOGGER = logging.getLogger(__name__)
 
@@ -138,99 +140,9 @@ def _norm_flavor_name(raw: Any) -> str:
 
 
 def _bag_remaining_tablets(conn: sqlite3.Connection, bag_id: int) -> int:
-    try:
-        bag = conn.execute(
-            "SELECT bag_label_count, pill_count FROM bags WHERE id = ?",
-            (int(bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        bag = conn.execute(
-            "SELECT bag_label_count, NULL AS pill_count FROM bags WHERE id = ?",
-            (int(bag_id),),
-        ).fetchone()
-    if not bag:
-        return 0
-    original_count = int((dict(bag).get("bag_label_count") or dict(bag).get("pill_count") or 0))
-    packaged_total = conn.execute(
-        """
-        SELECT COALESCE(SUM(
-            (COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +
-            (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0))
-        ), 0) AS total
-        FROM warehouse_submissions ws
-        LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-        WHERE ws.bag_id = ? AND ws.submission_type = 'packaged'
-        """,
-        (int(bag_id),),
-    ).fetchone()
-    bottle_direct = conn.execute(
-        """
-        SELECT COALESCE(SUM(
-            COALESCE(ws.bottles_made, 0) * COALESCE(pd.tablets_per_bottle, 0)
-        ), 0) AS total
-        FROM warehouse_submissions ws
-        LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-        WHERE ws.submission_type = 'bottle' AND ws.bag_id = ?
-        """,
-        (int(bag_id),),
-    ).fetchone()
-    try:
-        machine_total = conn.execute(
-            """
-            SELECT COALESCE(SUM(
-                CASE
-                  WHEN COALESCE(m.machine_role, 'sealing') = 'blister'
-                    THEN COALESCE(ws.tablets_pressed_into_cards, 0)
-                  ELSE MAX(
-                    COALESCE(ws.tablets_pressed_into_cards, 0),
-                    (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0)),
-                    COALESCE(ws.loose_tablets, 0)
-                  )
-                END
-            ), 0) AS total
-            FROM warehouse_submissions ws
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            LEFT JOIN machines m ON ws.machine_id = m.id
-            WHERE ws.bag_id = ? AND COALESCE(ws.submission_type, 'packaged') = 'machine'
-            """,
-            (int(bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        machine_total = None
-    try:
-        repack_total = conn.execute(
-            """
-            SELECT COALESCE(SUM(
-                (COALESCE(ws.displays_made, 0) * COALESCE(pd.packages_per_display, 0) * COALESCE(pd.tablets_per_package, 0)) +
-                (COALESCE(ws.packs_remaining, 0) * COALESCE(pd.tablets_per_package, 0))
-            ), 0) AS total
-            FROM warehouse_submissions ws
-            LEFT JOIN product_details pd ON ws.product_name = pd.product_name
-            WHERE ws.bag_id = ? AND COALESCE(ws.submission_type, 'packaged') = 'repack'
-            """,
-            (int(bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        repack_total = None
-    try:
-        bottle_junction = conn.execute(
-            """
-            SELECT COALESCE(SUM(sbd.tablets_deducted), 0) AS total
-            FROM submission_bag_deductions sbd
-            WHERE sbd.bag_id = ?
-            """,
-            (int(bag_id),),
-        ).fetchone()
-    except sqlite3.OperationalError:
-        bottle_junction = None
-    already_used = (
-        int(dict(packaged_total).get("total") or 0 if packaged_total else 0)
-        + int(dict(bottle_direct).get("total") or 0 if bottle_direct else 0)
-        + int(dict(bottle_junction).get("total") or 0 if bottle_junction else 0)
-        + int(dict(machine_total).get("total") or 0 if machine_total else 0)
-        + int(dict(repack_total).get("total") or 0 if repack_total else 0)
-    )
-    return max(0, original_count - already_used)
+    """Received minus packaged, bottle, variety, machine and repack usage (``bag_ledger.remaining``)."""
+    row = bag_ledger_counts(conn, [int(bag_id)]).get(int(bag_id))
+    return int(row["remaining"] or 0) if row else 0
 
 
 def _delete_bottle_submissions_for_receipts(conn: sqlite3.Connection, receipts: list[str]) -> None:
@@ -258,33 +170,9 @@ def _delete_bottle_submissions_for_receipts(conn: sqlite3.Connection, receipts:
     )
 
 
-def _ensure_packaging_case_columns(conn: sqlite3.Connection) -> dict[str, bool]:
-    try:
-        cols = {row[1] for row in conn.execute("PRAGMA table_info(warehouse_submissions)").fetchall()}
-    except Exception:
-        cols = set()
-    has_case_count = "case_count" in cols
-    has_loose_display_count = "loose_display_count" in cols
-    if not has_case_count:
-        try:
-            conn.execute("ALTER TABLE warehouse_submissions ADD COLUMN case_count INTEGER DEFAULT 0")
-            has_case_count = True
-        except sqlite3.OperationalError:
-            pass
-    if not has_loose_display_count:
-        try:
-            conn.execute("ALTER TABLE warehouse_submissions ADD COLUMN loose_display_count INTEGER DEFAULT 0")
-            has_loose_display_count = True
-        except sqlite3.OperationalError:
-            pass
-    return {"case_count": has_case_count, "loose_display_count": has_loose_display_count}
-
-
-def _table_columns(conn: sqlite3.Connection, table_name: str) -> set[str]:
-    try:
-        return {str(row[1]) for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()}
-    except sqlite3.OperationalError:
-        return set()
+def _packaging_case_columns(conn: sqlite3.Connection) -> dict[str, bool]:
+    cols = table_columns(conn, "warehouse_submissions")
+    return {"case_count": "case_count" in cols, "loose_display_count": "loose_display_count" in cols}
 
 
 def _display_count_from_packaging_payload(
@@ -636,7 +524,7 @@ def upsert_packaged_from_workflow_packaging(
     # QR workflow sync rows should not add noisy auto-notes.
     admin_notes = None
 
-    case_columns = _ensure_packaging_case_columns(conn)
+    case_columns = _packaging_case_columns(conn)
     if case_columns.get("case_count") and case_columns.get("loose_display_count"):
         conn.execute(
             """
@@ -876,7 +764,7 @@ def upsert_bottle_from_workflow_packaging(
                 {"error": "Scan the variety source bag QR cards at hand pack before packaging."},
             )
         qmarks = ",".join("?" for _ in source_bag_ids)
-        bag_cols = _table_columns(conn, "bags")
+        bag_cols = table_columns(conn, "bags")
         pill_expr = "b.pill_count" if "pill_count" in bag_cols else "NULL"
         po_expr = "COALESCE(b.po_id, r.po_id)" if "po_id" in bag_cols else "r.po_id"
         source_rows = conn.execute(
@@ -0,0 +1,312 @@
+"""
+Zoho receive push queue (``zoho_push_jobs``) and its background worker.
+
+``POST /api/bag/<id>/push_to_zoho`` only runs the local checks and records a job; a daemon thread per
+app worker then performs the push (``push_bag_receive``: PO line refresh, chart rendering, purchase
+receive and attachment), so staff can queue many bags without waiting on Zoho round trips:
+
+- one active job per bag: pushing a bag that is already queued or running returns that job;
+- jobs are claimed with ``BEGIN IMMEDIATE`` + ``UPDATE ... RETURNING``, so several app workers can
+  share the queue; a PO with a running job is not claimed by another worker (its bags go one at a
+  time, so each push sees the quantity the previous one received), and the worker keeps draining
+  the PO it is on so that PO's lines are refreshed from Zoho once per batch;
+- a push that fails before any purchase receive exists (Zoho unreachable or rate limited) is
+  retried with exponential backoff up to ``ZOHO_PUSH_MAX_ATTEMPTS``; every other outcome is final and
+  its payload is stored for the UI (``GET /api/zoho/push-jobs``);
+- a job whose worker stopped mid-push is failed, not retried, after
+  ``ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS``: Zoho may already hold the receive.
+
+With ``ZOHO_PUSH_WORKER`` off (the default: synchronous workers never run app threads) no thread is
+started and the push route runs the due jobs of the pushed bag's PO inline, at most
+``_INLINE_MAX_JOBS`` per request (the rest, and due retries, run on the next push for that PO); the
+status route only reads.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from typing import Any
+
+from config import Config
+
+from app.services import sqlite_work_queue as work_queue
+from app.services.zoho_receive_push import ZohoPushRetry, push_bag_receive
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+_BACKOFF_BASE_SECONDS = 5.0
+_BACKOFF_MAX_SECONDS = 300.0
+_RETENTION_MS = 7 * 86_400_000
+# Inline mode: jobs one push request may run (its own bag plus earlier jobs queued for the same PO).
+_INLINE_MAX_JOBS = 5
+_STALE_ERROR = (
+    "The push worker stopped while this bag was being pushed. Check Zoho for the purchase receive "
+    "before pushing this bag again."
+)
+
+ZOHO_PUSH_JOBS_DDL: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS zoho_push_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bag_id INTEGER NOT NULL,
+        po_id INTEGER,
+        custom_notes TEXT,
+        requested_by TEXT,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at INTEGER NOT NULL,
+        http_status INTEGER,
+        result TEXT,
+        last_error TEXT,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_zoho_push_jobs_active_bag
+    ON zoho_push_jobs(bag_id) WHERE status IN ('queued', 'running')
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_zoho_push_jobs_status ON zoho_push_jobs(status, next_attempt_at)",
+    "CREATE INDEX IF NOT EXISTS ix_zoho_push_jobs_bag ON zoho_push_jobs(bag_id, id)",
+)
+
+# Columns returned to API clients (``result`` is decoded).
+_PUBLIC_FIELDS = (
+    "id",
+    "bag_id",
+    "po_id",
+    "status",
+    "attempts",
+    "http_status",
+    "last_error",
+    "created_at",
+    "updated_at",
+)
+
+
+def ensure_zoho_push_jobs(conn: sqlite3.Connection) -> None:
+    for ddl in ZOHO_PUSH_JOBS_DDL:
+        conn.execute(ddl)
+
+
+def public_job(row: sqlite3.Row | dict[str, Any] | None) -> dict[str, Any] | None:
+    if row is None:
+        return None
+    job = dict(row)
+    out = {key: job.get(key) for key in _PUBLIC_FIELDS}
+    out["result"] = json.loads(job["result"]) if job.get("result") else None
+    return out
+
+
+def enqueue_push(
+    conn: sqlite3.Connection,
+    *,
+    bag_id: int,
+    po_id: int | None,
+    custom_notes: str | None = None,
+    requested_by: str | None = None,
+) -> tuple[dict[str, Any], bool]:
+    """
+    Queue a push for ``bag_id`` (caller commits, then calls ``dispatch_push_queue``). Returns the job
+    and whether it is new; a bag that is already queued or running keeps its job.
+
+    The insert relies on ``ux_zoho_push_jobs_active_bag`` instead of a check-then-insert, so two
+    concurrent pushes of one bag get the same job rather than a constraint error.
+    """
+    now = work_queue.now_ms()
+    row = conn.execute(
+        """
+        INSERT INTO zoho_push_jobs (
+            bag_id, po_id, custom_notes, requested_by, next_attempt_at, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT DO NOTHING
+        RETURNING *
+        """,
+        (bag_id, po_id, custom_notes, requested_by, now, now, now),
+    ).fetchone()
+    if row is not None:
+        return dict(row), True
+    active = conn.execute(
+        "SELECT * FROM zoho_push_jobs WHERE bag_id = ? AND status IN ('queued', 'running')",
+        (bag_id,),
+    ).fetchone()
+    return dict(active), False
+
+
+def latest_jobs_for_bags(conn: sqlite3.Connection, bag_ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Newest job per bag for ``bag_ids`` (one query)."""
+    if not bag_ids:
+        return {}
+    placeholders = ",".join("?" * len(bag_ids))
+    rows = conn.execute(
+        f"""
+        SELECT * FROM zoho_push_jobs
+        WHERE id IN (
+            SELECT MAX(id) FROM zoho_push_jobs WHERE bag_id IN ({placeholders}) GROUP BY bag_id
+        )
+        """,
+        bag_ids,
+    ).fetchall()
+    return {int(row["bag_id"]): dict(row) for row in rows}
+
+
+def queue_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    """Number of queued and running jobs."""
+    counts = dict.fromkeys(ACTIVE_STATUSES, 0)
+    for status, n in conn.execute(
+        "SELECT status, COUNT(*) FROM zoho_push_jobs WHERE status IN ('queued', 'running') GROUP BY status"
+    ).fetchall():
+        counts[str(status)] = int(n)
+    return counts
+
+
+_CLAIM_SQL = """
+    UPDATE zoho_push_jobs
+    SET status = 'running', attempts = attempts + 1, updated_at = ?
+    WHERE id = (
+        SELECT j.id FROM zoho_push_jobs j
+        WHERE j.status = 'queued' AND j.next_attempt_at <= ?
+          AND (? = 0 OR j.po_id IS ?)
+          AND NOT EXISTS (
+            SELECT 1 FROM zoho_push_jobs r
+            WHERE r.status = 'running' AND r.po_id IS j.po_id
+          )
+        ORDER BY (j.po_id IS ?) DESC, j.id
+        LIMIT 1
+    )
+    RETURNING id, bag_id, po_id, custom_notes, attempts
+"""
+
+
+def _claim_next(
+    conn: sqlite3.Connection, prefer_po_id: int | None = None, only_po: bool = False
+) -> sqlite3.Row | None:
+    now = work_queue.now_ms()
+    stale_before = now - int(Config.ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS) * 1000
+
+    def fail_stale(c: sqlite3.Connection) -> None:
+        c.execute(
+            """
+            UPDATE zoho_push_jobs
+            SET status = 'failed', http_status = 500, last_error = ?, result = ?, updated_at = ?
+            WHERE status = 'running' AND updated_at < ?
+            """,
+            (_STALE_ERROR, json.dumps({"success": False, "error": _STALE_ERROR}), now, stale_before),
+        )
+
+    return work_queue.claim_next(
+        conn, _CLAIM_SQL, (now, now, int(only_po), prefer_po_id, prefer_po_id), reclaim=fail_stale
+    )
+
+
+def _finish(conn: sqlite3.Connection, job_id: int, payload: dict[str, Any], status: int) -> None:
+    ok = bool(payload.get("success"))
+    conn.execute(
+        """
+        UPDATE zoho_push_jobs
+        SET status = ?, http_status = ?, result = ?, last_error = ?, updated_at = ?
+        WHERE id = ?
+        """,
+        (
+            "done" if ok else "failed",
+            status,
+            json.dumps(payload, default=str),
+            None if ok else str(payload.get("error") or "")[:500],
+            work_queue.now_ms(),
+            job_id,
+        ),
+    )
+
+
+def _run_job(conn: sqlite3.Connection, job: sqlite3.Row, refreshed_po_ids: set[int]) -> None:
+    attempts = int(job["attempts"])
+    try:
+        payload, status = push_bag_receive(
+            int(job["bag_id"]), job["custom_notes"], refreshed_po_ids=refreshed_po_ids
+        )
+    except ZohoPushRetry as exc:
+        give_up = attempts >= int(Config.ZOHO_PUSH_MAX_ATTEMPTS)
+        (logger.error if give_up else logger.warning)(
+            "zoho push job %s bag=%s attempt %s failed%s: %s",
+            job["id"],
+            job["bag_id"],
+            attempts,
+            " (giving up)" if give_up else "",
+            exc,
+        )
+        if give_up:
+            _finish(conn, job["id"], exc.payload, exc.status)
+            return
+        delay = work_queue.backoff_seconds(attempts, _BACKOFF_BASE_SECONDS, _BACKOFF_MAX_SECONDS)
+        now = work_queue.now_ms()
+        conn.execute(
+            """
+            UPDATE zoho_push_jobs
+            SET status = 'queued', last_error = ?, next_attempt_at = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (str(exc)[:500], now + int(delay * 1000), now, job["id"]),
+        )
+        # The next attempt reads the PO again.
+        refreshed_po_ids.discard(job["po_id"])
+        return
+    except Exception as exc:
+        logger.exception("zoho push job %s bag=%s failed", job["id"], job["bag_id"])
+        payload, status = {"success": False, "error": f"Failed to push to Zoho: {exc}"}, 500
+    _finish(conn, job["id"], payload, status)
+
+
+def next_attempt_in_seconds(conn: sqlite3.Connection) -> float | None:
+    """Seconds until the earliest queued job is due (0 when one is due now), None when idle."""
+    return work_queue.next_due_in_seconds(conn, "zoho_push_jobs", "queued")
+
+
+def process_push_queue(
+    db_path: str | None = None, max_jobs: int | None = None, *, only_po: bool = False, po_id: int | None = None
+) -> int:
+    """
+    Push every claimable job (or ``max_jobs``), draining one PO before the next; returns jobs handled.
+    ``only_po`` limits the pass to ``po_id``'s jobs.
+    """
+    current: dict[str, Any] = {"po_id": po_id, "refreshed_po_ids": set()}
+
+    def claim(conn: sqlite3.Connection) -> sqlite3.Row | None:
+        return _claim_next(conn, current["po_id"], only_po)
+
+    def handle(conn: sqlite3.Connection, job: sqlite3.Row) -> None:
+        if job["po_id"] != current["po_id"]:
+            current["po_id"] = job["po_id"]
+            current["refreshed_po_ids"] = set()
+        _run_job(conn, job, current["refreshed_po_ids"])
+
+    return work_queue.drain(
+        db_path or Config.DATABASE_PATH,
+        claim,
+        handle,
+        max_rows=max_jobs,
+        cleanup=lambda conn: work_queue.prune_finished(conn, "zoho_push_jobs", ("done", "failed"), _RETENTION_MS),
+    )
+
+
+_worker = work_queue.QueueWorker("zoho-push-queue", process_push_queue, next_attempt_in_seconds)
+
+
+def dispatch_push_queue(db_path: str | None = None, *, po_id: int | None = None) -> None:
+    """
+    Hand queued pushes to the worker (call after the queuing transaction commits). Inline, push only
+    ``po_id``'s due jobs, at most ``_INLINE_MAX_JOBS``, so one request never drains the whole queue.
+    """
+    db_path = db_path or Config.DATABASE_PATH
+    if Config.ZOHO_PUSH_WORKER:
+        _worker.wake(db_path)
+    else:
+        process_push_queue(db_path, max_jobs=_INLINE_MAX_JOBS, only_po=True, po_id=po_id)
+
+
+def resume_push_worker(db_path: str | None = None) -> None:
+    """Wake this process's worker for jobs left queued (e.g. by a restarted worker); no-op inline."""
+    if Config.ZOHO_PUSH_WORKER:
+        _worker.wake(db_path or Config.DATABASE_PATH)
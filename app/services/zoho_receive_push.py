@@ -0,0 +1,826 @@
+"""
+Push a closed bag to Zoho Inventory as a purchase receive.
+
+``push_bag_receive`` holds the whole push (PO line refresh, split across the main and overs PO,
+chart attachment) and returns the JSON payload and HTTP status the push route has always answered
+with. It runs on the Zoho push queue worker (``app.services.zoho_push_queue``), not on the request.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any
+
+from app.services.chart_service import generate_bag_chart_image
+from app.services.purchase_order_service import create_or_update_overs_po_for_push
+from app.services.receiving_service import (
+    build_zoho_receive_notes,
+    extract_shipment_number,
+    get_bag_with_packaged_count,
+)
+from app.services.zoho_service import zoho_api
+from app.utils.db_utils import db_read_only, db_transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ZohoPushRetry(Exception):
+    """
+    Zoho could not be read, or rate-limited the receive, before any purchase receive was created,
+    so the push is safe to retry. ``payload`` and ``status`` are the answer recorded once the retries run out.
+    """
+
+    def __init__(self, payload: dict[str, Any], status: int):
+        super().__init__(payload.get('error'))
+        self.payload = payload
+        self.status = status
+
+
+def _parse_zoho_po_quantity(value):
+    """Parse quantity fields from Zoho JSON (may be int, float, or string)."""
+    try:
+        if value is None:
+            return 0
+        return int(round(float(value)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _extract_zoho_receive_id_from_result(result):
+    """Parse Zoho purchase receive create response for receive id."""
+    if not result or not isinstance(result, dict):
+        return None
+    if result.get('purchasereceive'):
+        pr = result['purchasereceive']
+        return (
+            pr.get('purchasereceive_id') or pr.get('purchase_receive_id')
+            or pr.get('id') or pr.get('receive_id')
+        )
+    return (
+        result.get('purchasereceive_id') or result.get('purchase_receive_id')
+        or result.get('id') or result.get('receive_id')
+    )
+
+
+def _line_stats_from_zoho_line(line: dict) -> dict:
+    """Build receive stats dict from one Zoho PO line item (GET purchaseorders/{id})."""
+    return {
+        'line_item_name': line.get('name') or 'Unknown',
+        'ordered': _parse_zoho_po_quantity(line.get('quantity')),
+        'received_in_zoho_before_push': _parse_zoho_po_quantity(line.get('quantity_received')),
+        'matched_line_item_id': str(line.get('line_item_id', '') or ''),
+    }
+
+
+def get_zoho_po_line_receive_stats(zoho_po_id, zoho_line_item_id, inventory_item_id=None):
+    """
+    Fetch ordered quantity and quantity_received for one PO line from Zoho GET purchaseorders/{id}.
+
+    Matches by line_item_id first; if not found (stale ID after Zoho edits), matches a unique line by item_id.
+
+    Zoho error 36012 is enforced against Zoho's own received totals, not TabletTracker's po_lines.good_count
+    (which tracks in-app credits and can be zero even when Zoho already shows receives).
+    """
+    if not zoho_po_id or not zoho_line_item_id:
+        return None
+    po_details = zoho_api.get_purchase_order_details(zoho_po_id)
+    if not po_details or not isinstance(po_details, dict):
+        return None
+    po = po_details.get('purchaseorder')
+    if not po:
+        return None
+    lines = po.get('line_items') or []
+    zid = str(zoho_line_item_id)
+    for line in lines:
+        if str(line.get('line_item_id', '')) == zid:
+            return _line_stats_from_zoho_line(line)
+    if inventory_item_id:
+        inv = str(inventory_item_id)
+        matches = [li for li in lines if str(li.get('item_id') or '') == inv]
+        if len(matches) == 1:
+            logger.warning(
+                f"Zoho PO {zoho_po_id}: stored line_item_id {zid} not in GET response; "
+                f"using unique line matched by item_id {inv}"
+            )
+            return _line_stats_from_zoho_line(matches[0])
+        if len(matches) > 1:
+            logger.warning(
+                f"Zoho PO {zoho_po_id}: multiple lines for item_id {inv}; cannot resolve line stats"
+            )
+    return None
+
+
+def _resolve_zoho_line_item_id_for_po_item(zoho_po_id, inventory_item_id) -> str | None:
+    """
+    GET purchaseorders/{id} and return line_item_id for the line whose item_id matches inventory_item_id.
+
+    Use this for overs PO (and any multi-line PO) so we never post a receive to the wrong flavor line when
+    SQLite po_lines.zoho_line_item_id is stale or duplicated across items.
+    """
+    if not zoho_po_id or not inventory_item_id:
+        return None
+    po_details = zoho_api.get_purchase_order_details(zoho_po_id)
+    if not po_details or not isinstance(po_details, dict):
+        return None
+    po = po_details.get('purchaseorder')
+    if not po:
+        return None
+    inv = str(inventory_item_id)
+    matches = [li for li in (po.get('line_items') or []) if str(li.get('item_id') or '') == inv]
+    if len(matches) == 1:
+        lid = str(matches[0].get('line_item_id') or '').strip()
+        return lid or None
+    if len(matches) > 1:
+        logger.warning(
+            f"Zoho PO {zoho_po_id}: multiple lines for item_id {inv}; cannot pick line_item_id"
+        )
+    return None
+
+
+def _update_bag_zoho_push(conn, bag_id: int, zoho_receive_id, zoho_receive_overs_id) -> None:
+    """Mark bag pushed; raises RuntimeError if no row was updated."""
+    cur = conn.execute(
+        '''
+        UPDATE bags
+        SET zoho_receive_pushed = 1,
+            zoho_receive_id = ?,
+            zoho_receive_overs_id = ?
+        WHERE id = ?
+        ''',
+        (zoho_receive_id, zoho_receive_overs_id, bag_id),
+    )
+    if cur.rowcount != 1:
+        raise RuntimeError(
+            f'Expected to update 1 bag row (id={bag_id}), updated {cur.rowcount}. '
+            'Zoho may have recorded the receive; check Zoho and do not retry blindly.'
+        )
+
+
+def bag_push_precheck(bag: dict[str, Any] | None) -> tuple[dict[str, Any], int] | None:
+    """Local checks that reject a push before it is queued; returns ``(payload, status)`` or None."""
+    if not bag:
+        return {'success': False, 'error': 'Bag not found'}, 404
+    if bag.get('status') != 'Closed':
+        return {
+            'success': False,
+            'error': 'Bag must be closed before pushing to Zoho. Please close the bag first.'
+        }, 400
+    if bag.get('zoho_receive_pushed'):
+        return {
+            'success': False,
+            'error': 'This bag has already been pushed to Zoho.',
+            'zoho_receive_id': bag.get('zoho_receive_id')
+        }, 400
+    if not bag.get('zoho_po_id'):
+        return {
+            'success': False,
+            'error': (
+                'Cannot push to Zoho: PO does not have a Zoho PO ID. '
+                'Run Sync Zoho POs once so this receive is linked to Zoho, or assign a synced PO.'
+            ),
+        }, 400
+    return None
+
+
+def push_bag_receive(
+    bag_id: int, custom_notes: str | None = None, *, refreshed_po_ids: set[int] | None = None
+) -> tuple[dict[str, Any], int]:
+    """
+    Create the Zoho purchase receive(s) for a closed bag; returns ``(payload, http_status)``.
+
+    Creates a purchase receive in Zoho Inventory with:
+    - Line item quantity = packaged_count
+    - Notes with shipment/box/bag info and counts
+    - Chart image attachment showing received vs packaged
+
+    ``refreshed_po_ids`` collects local PO ids whose lines were already refreshed from Zoho, so a
+    batch of bags on one PO refreshes it once. Raises ``ZohoPushRetry`` only before a receive is created.
+    """
+    try:
+        # Get bag with all required details (re-checked: the bag may have changed while queued)
+        bag = get_bag_with_packaged_count(bag_id)
+        rejected = bag_push_precheck(bag)
+        if rejected:
+            return rejected
+        zoho_po_id = bag['zoho_po_id']
+
+        # Refresh PO lines from Zoho so local zoho_line_item_id stays current without manual Sync before every push
+        if refreshed_po_ids is None or bag['po_id'] not in refreshed_po_ids:
+            try:
+                with db_transaction() as conn:
+                    zoho_api.refresh_tablet_po_lines(conn, bag['po_id'], zoho_po_id)
+                if refreshed_po_ids is not None:
+                    refreshed_po_ids.add(bag['po_id'])
+            except Exception as e:
+                logger.warning(f"refresh_tablet_po_lines (parent PO) skipped: {e}")
+        bag = get_bag_with_packaged_count(bag_id)
+        if not bag:
+            return {'success': False, 'error': 'Bag not found'}, 404
+
+        zoho_line_item_id = bag.get('zoho_line_item_id')
+        if not zoho_line_item_id:
+            return {
+                'success': False,
+                'error': (
+                    'Cannot push to Zoho: no tablet line item for this product on the PO in Zoho '
+                    '(or it is not linked in TabletTracker tablet types). '
+                    'Check Zoho has a line for this inventory item, then run Sync Zoho POs if needed.'
+                ),
+            }, 400
+
+        # Get values for notes
+        receive_name = bag.get('receive_name', '')
+        logger.info(f"📝 Building notes - receive_name from DB: '{receive_name}'")
+        shipment_number = extract_shipment_number(receive_name)
+        logger.info(f"📝 Extracted shipment_number: '{shipment_number}'")
+        box_number = bag.get('box_number', 1)
+        bag_number = bag.get('bag_number', 1)
+        bag_label_count = bag.get('bag_label_count', 0) or 0
+        packaged_count = bag.get('packaged_count', 0) or 0
+
+        # Generate chart image with context information (attach to main PO receive when splitting)
+        chart_image = generate_bag_chart_image(
+            bag_label_count=bag_label_count,
+            packaged_count=packaged_count,
+            tablet_type_name=bag.get('tablet_type_name'),
+            box_number=bag.get('box_number'),
+            bag_number=bag.get('bag_number'),
+            receive_name=receive_name
+        )
+        chart_filename = f"bag_{bag_id}_stats.png" if chart_image else None
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        stats = get_zoho_po_line_receive_stats(
+            zoho_po_id, zoho_line_item_id, bag.get('inventory_item_id')
+        )
+        if stats is None:
+            raise ZohoPushRetry({
+                'success': False,
+                'error': (
+                    'Could not read this PO line from Zoho (line may have been restructured). '
+                    'Try Push again after a moment, or run Sync Zoho POs once if the PO changed in Zoho.'
+                ),
+            }, 400)
+
+        effective_line_id = str(zoho_line_item_id or '').strip()
+        mid = (stats.get('matched_line_item_id') or '').strip()
+        if mid and mid != effective_line_id:
+            logger.warning(
+                f"Bag {bag_id}: Zoho line_item_id from GET ({mid}) differs from DB ({effective_line_id}); "
+                'using Zoho value for this receive'
+            )
+            effective_line_id = mid
+            try:
+                with db_transaction() as conn:
+                    conn.execute(
+                        '''
+                        UPDATE po_lines SET zoho_line_item_id = ?
+                        WHERE po_id = ? AND inventory_item_id = ?
+                        ''',
+                        (mid, bag['po_id'], bag['inventory_item_id']),
+                    )
+            except Exception as e:
+                logger.warning(f"Could not persist corrected zoho_line_item_id: {e}")
+
+        # Split push: main PO + overs PO when packaged count exceeds remaining capacity on the main line
+        if packaged_count > 0:
+            ordered = stats['ordered']
+            recv_zoho = stats['received_in_zoho_before_push']
+            remaining_zoho = max(0, ordered - recv_zoho)
+            if packaged_count > remaining_zoho:
+                main_qty = remaining_zoho
+                overs_qty = packaged_count - main_qty
+                parent_po_number = bag.get('po_number') or ''
+                overs_po_number = f"{parent_po_number}-OVERS"
+                overs_zoho_po_id = None
+                overs_zoho_line_id = None
+                overs_local_po_id = None
+                with db_read_only() as conn:
+                    opro = conn.execute(
+                        'SELECT id, zoho_po_id FROM purchase_orders WHERE po_number = ?',
+                        (overs_po_number,),
+                    ).fetchone()
+                    if opro:
+                        opro = dict(opro)
+                        overs_local_po_id = opro['id']
+                        overs_zoho_po_id = opro.get('zoho_po_id')
+                        plr = conn.execute(
+                            '''
+                            SELECT zoho_line_item_id FROM po_lines
+                            WHERE po_id = ? AND inventory_item_id = ?
+                            ''',
+                            (opro['id'], bag.get('inventory_item_id')),
+                        ).fetchone()
+                        if plr and plr['zoho_line_item_id']:
+                            overs_zoho_line_id = plr['zoho_line_item_id']
+                if not overs_zoho_po_id:
+                    name = stats['line_item_name']
+                    ordered = stats['ordered']
+                    recv_zoho = stats['received_in_zoho_before_push']
+                    error_detail = f'''❌ Zoho Quantity Limit — split required
+
+📦 Product: {name}
+
+📊 This PO line in Zoho (before this push):
+  • Ordered: {ordered:,} tablets
+  • Already received in Zoho: {recv_zoho:,} tablets
+  • Remaining capacity on the main line: {remaining_zoho:,} tablets
+
+This bag’s packaged quantity ({packaged_count:,}) exceeds that remaining capacity. Receiving the full bag requires an overs PO with this tablet line synced in TabletTracker.
+
+Use “Create / add to overs PO” below, then run **Sync Zoho POs** so the overs line gets a Zoho line item ID, then push again.
+
+🎒 Split if pushed: main PO {main_qty:,} tablets + overs PO {overs_qty:,} tablets.'''
+                    return {
+                        'success': False,
+                        'error': error_detail,
+                        'zoho_push_overs': {
+                            'parent_po_id': bag['po_id'],
+                            'overage_tablets': overs_qty,
+                            'inventory_item_id': bag.get('inventory_item_id'),
+                            'line_item_name': name,
+                        },
+                    }, 400
+
+                if overs_local_po_id is not None and (
+                    refreshed_po_ids is None or overs_local_po_id not in refreshed_po_ids
+                ):
+                    try:
+                        with db_transaction() as conn:
+                            zoho_api.refresh_tablet_po_lines(conn, overs_local_po_id, overs_zoho_po_id)
+                        if refreshed_po_ids is not None:
+                            refreshed_po_ids.add(overs_local_po_id)
+                    except Exception as e:
+                        logger.warning(f"refresh_tablet_po_lines (overs PO) skipped: {e}")
+
+                # Always resolve overs line from Zoho by item_id — SQLite can point at the wrong flavor line
+                # when the overs PO has multiple tablet lines (stale or duplicate zoho_line_item_id).
+                resolved_overs_line = _resolve_zoho_line_item_id_for_po_item(
+                    overs_zoho_po_id, bag.get('inventory_item_id')
+                )
+                if not resolved_overs_line:
+                    name = stats.get('line_item_name') or bag.get('tablet_type_name') or 'Line item'
+                    err_detail = (
+                        '❌ Overs PO is missing this product line in Zoho.\n\n'
+                        f'📦 Product: {name}\n\n'
+                        'TabletTracker found the overs PO, but Zoho has no line whose inventory item '
+                        'matches this bag’s tablet type. Add the line with **Create / add to overs PO** '
+                        'below, then push again (Sync is optional; push refreshes lines).\n\n'
+                        f'🎒 Overage for overs PO: {overs_qty:,} tablets.'
+                    )
+                    return {
+                        'success': False,
+                        'error': err_detail,
+                        'zoho_push_overs': {
+                            'parent_po_id': bag['po_id'],
+                            'overage_tablets': overs_qty,
+                            'inventory_item_id': bag.get('inventory_item_id'),
+                            'line_item_name': name,
+                        },
+                    }, 400
+                if overs_zoho_line_id and str(overs_zoho_line_id) != str(resolved_overs_line):
+                    logger.warning(
+                        f"Bag {bag_id}: overs PO line_item_id from SQLite ({overs_zoho_line_id}) "
+                        f"differs from Zoho GET ({resolved_overs_line}); using Zoho value for receive"
+                    )
+                overs_zoho_line_id = resolved_overs_line
+                if overs_local_po_id is not None:
+                    try:
+                        with db_transaction() as conn:
+                            conn.execute(
+                                '''
+                                UPDATE po_lines SET zoho_line_item_id = ?
+                                WHERE po_id = ? AND inventory_item_id = ?
+                                ''',
+                                (resolved_overs_line, overs_local_po_id, bag['inventory_item_id']),
+                            )
+                    except Exception as e:
+                        logger.warning(f"Could not persist overs po_lines zoho_line_item_id: {e}")
+
+                logger.info(
+                    f"Split Zoho push bag {bag_id}: main_qty={main_qty} overs_qty={overs_qty}"
+                )
+                # Overs PO is still a normal PO line in Zoho: ordered − already_received must cover overs_qty.
+                # Without this check, Zoho returns "Quantity recorded cannot be more than quantity ordered".
+                overs_stats = get_zoho_po_line_receive_stats(
+                    overs_zoho_po_id, overs_zoho_line_id, bag.get('inventory_item_id')
+                )
+                if not overs_stats:
+                    raise ZohoPushRetry({
+                        'success': False,
+                        'error': (
+                            'Could not read the overs PO line from Zoho before push. '
+                            'Try **Sync Zoho POs** once, or confirm the overs PO has a line for this product.'
+                        ),
+                    }, 400)
+                ov_ordered = overs_stats['ordered']
+                ov_recv = overs_stats['received_in_zoho_before_push']
+                ov_remaining = max(0, ov_ordered - ov_recv)
+                name_ov = overs_stats.get('line_item_name') or stats.get('line_item_name') or 'Line item'
+                if overs_qty > ov_remaining:
+                    shortfall = overs_qty - ov_remaining
+                    inv_id = bag.get('inventory_item_id')
+                    if not inv_id:
+                        return {
+                            'success': False,
+                            'error': (
+                                'Cannot bump overs PO: this bag has no inventory item id. '
+                                'Re-save the bag or contact support.'
+                            ),
+                        }, 400
+                    logger.info(
+                        f"Bag {bag_id}: overs PO needs +{shortfall:,} ordered on draft line "
+                        f"(have {ov_remaining:,} receive room; need {overs_qty:,}). Bumping via Zoho PUT."
+                    )
+                    bump = create_or_update_overs_po_for_push(
+                        bag['po_id'],
+                        shortfall,
+                        inv_id,
+                        name_ov,
+                    )
+                    if not bump.get('success'):
+                        err_detail = (
+                            f'Could not raise the overs PO draft line in Zoho by **{shortfall:,}** tablets.\n\n'
+                            f'{bump.get("error") or "Unknown error"}\n\n'
+                            f'You can try **Create / add to overs PO** manually, then push again.'
+                        )
+                        return {
+                            'success': False,
+                            'error': err_detail,
+                            'zoho_push_overs': {
+                                'parent_po_id': bag['po_id'],
+                                'overage_tablets': shortfall,
+                                'inventory_item_id': bag.get('inventory_item_id'),
+                                'line_item_name': name_ov,
+                            },
+                        }, 400
+                    if overs_local_po_id is not None and overs_zoho_po_id:
+                        try:
+                            with db_transaction() as conn:
+                                zoho_api.refresh_tablet_po_lines(conn, overs_local_po_id, overs_zoho_po_id)
+                        except Exception as e:
+                            logger.warning(f"refresh_tablet_po_lines after overs bump (bag {bag_id}): {e}")
+                    # Re-resolve line id in case Zoho merged lines; re-read capacity
+                    resolved_after = _resolve_zoho_line_item_id_for_po_item(
+                        overs_zoho_po_id, bag.get('inventory_item_id')
+                    )
+                    if resolved_after:
+                        overs_zoho_line_id = resolved_after
+                    overs_stats = get_zoho_po_line_receive_stats(
+                        overs_zoho_po_id, overs_zoho_line_id, bag.get('inventory_item_id')
+                    )
+                    if not overs_stats:
+                        return {
+                            'success': False,
+                            'error': (
+                                'Overs PO was updated in Zoho, but TabletTracker could not re-read the line. '
+                                'Try **Sync Zoho POs**, then push again.'
+                            ),
+                        }, 400
+                    ov_ordered = overs_stats['ordered']
+                    ov_recv = overs_stats['received_in_zoho_before_push']
+                    ov_remaining = max(0, ov_ordered - ov_recv)
+                    if overs_qty > ov_remaining:
+                        return {
+                            'success': False,
+                            'error': (
+                                f'After bumping the overs draft line, Zoho still shows only **{ov_remaining:,}** tablets '
+                                f'receivable (need **{overs_qty:,}**). Check the overs PO in Zoho for duplicate lines '
+                                f'or sync issues, then try again.'
+                            ),
+                        }, 400
+
+                rid_main = None
+                if main_qty > 0:
+                    notes_main = build_zoho_receive_notes(
+                        shipment_number=shipment_number,
+                        box_number=box_number,
+                        bag_number=bag_number,
+                        bag_label_count=bag_label_count,
+                        packaged_count=main_qty,
+                        batch_number=bag.get('batch_number'),
+                        batch_source=bag.get('batch_source'),
+                        custom_notes=custom_notes,
+                        split_main_qty=main_qty,
+                        split_overs_qty=overs_qty,
+                        split_receive_role='main',
+                    )
+                    result_main = zoho_api.create_purchase_receive(
+                        purchaseorder_id=zoho_po_id,
+                        line_items=[{'line_item_id': effective_line_id, 'quantity': main_qty}],
+                        date=today,
+                        notes=notes_main,
+                        image_bytes=chart_image if chart_image else None,
+                        image_filename=chart_filename
+                    )
+                    if result_main is None:
+                        logger.error(
+                            "Zoho API returned None on split main receive — timeout or network failure"
+                        )
+                        return {
+                            'success': False,
+                            'error': (
+                                'Could not reach Zoho or the request timed out on the main PO receive. '
+                                'Check your network and Zoho status.'
+                            ),
+                        }, 500
+                    if result_main.get('code') is not None and result_main.get('code') != 0:
+                        em = result_main.get('message', 'Unknown Zoho API error')
+                        logger.error(f"Zoho split main receive error: {em}")
+                        payload = {'success': False, 'error': f'Zoho error (main PO receive): {em}'}
+                        if result_main.get('code') == 429:
+                            raise ZohoPushRetry(payload, 503)
+                        return payload, 500
+                    rid_main = _extract_zoho_receive_id_from_result(result_main)
+                    if not rid_main:
+                        logger.error(
+                            f"Zoho main receive returned no receive id (bag {bag_id}): {json.dumps(result_main, default=str)[:2000]}"
+                        )
+                        return {
+                            'success': False,
+                            'error': (
+                                'Zoho did not return a purchase receive id for the main PO line. '
+                                'Check Zoho for duplicate receives before retrying.'
+                            ),
+                        }, 500
+
+                notes_ov = build_zoho_receive_notes(
+                    shipment_number=shipment_number,
+                    box_number=box_number,
+                    bag_number=bag_number,
+                    bag_label_count=bag_label_count,
+                    packaged_count=overs_qty,
+                    batch_number=bag.get('batch_number'),
+                    batch_source=bag.get('batch_source'),
+                    custom_notes=custom_notes,
+                    split_main_qty=main_qty,
+                    split_overs_qty=overs_qty,
+                    split_receive_role='overs',
+                )
+                result_overs = zoho_api.create_purchase_receive(
+                    purchaseorder_id=overs_zoho_po_id,
+                    line_items=[{'line_item_id': overs_zoho_line_id, 'quantity': overs_qty}],
+                    date=today,
+                    notes=notes_ov,
+                    image_bytes=None,
+                    image_filename=None
+                )
+                if result_overs is None:
+                    logger.error(
+                        "Zoho API returned None on overs PO receive — timeout or network failure"
+                    )
+                    return {
+                        'success': False,
+                        'error': (
+                            'Main PO receive may have succeeded but overs PO receive failed or timed out. '
+                            'Check Zoho for duplicate receives before retrying.'
+                        ),
+                    }, 500
+                if result_overs.get('code') is not None and result_overs.get('code') != 0:
+                    em = result_overs.get('message', 'Unknown Zoho API error')
+                    logger.error(f"Zoho overs receive error: {em}")
+                    return {'success': False, 'error': f'Zoho error (overs PO receive): {em}'}, 500
+                rid_overs = _extract_zoho_receive_id_from_result(result_overs)
+                if not rid_overs:
+                    logger.error(
+                        f"Zoho overs receive returned no receive id (bag {bag_id}): {json.dumps(result_overs, default=str)[:2000]}"
+                    )
+                    return {
+                        'success': False,
+                        'error': (
+                            'Zoho did not return a purchase receive id for the overs PO line. '
+                            'Check Zoho for duplicate receives before retrying.'
+                        ),
+                    }, 500
+
+                with db_transaction() as conn:
+                    _update_bag_zoho_push(
+                        conn,
+                        bag_id,
+                        str(rid_main) if rid_main else None,
+                        str(rid_overs) if rid_overs else None,
+                    )
+
+                bag_info = f"{bag.get('tablet_type_name', 'Unknown')} - Box {box_number}, Bag {bag_number}"
+                split_msg = f'Successfully pushed {bag_info} to Zoho (split: main + overs PO)'
+                if main_qty <= 0:
+                    split_msg = (
+                        f'Successfully pushed {bag_info} to Zoho on the overs PO only. '
+                        f'Zoho shows the main line as full (ordered {ordered:,}, already received {recv_zoho:,}). '
+                        f'Overs receive: {overs_qty:,} tablets.'
+                    )
+                return {
+                    'success': True,
+                    'zoho_receive_pushed': True,
+                    'message': split_msg,
+                    'zoho_receive_id': str(rid_main) if rid_main else None,
+                    'zoho_receive_overs_id': str(rid_overs) if rid_overs else None,
+                    'split_main_qty': main_qty,
+                    'split_overs_qty': overs_qty,
+                }, 200
+
+        # Single receive path
+        notes = build_zoho_receive_notes(
+            shipment_number=shipment_number,
+            box_number=box_number,
+            bag_number=bag_number,
+            bag_label_count=bag_label_count,
+            packaged_count=packaged_count,
+            batch_number=bag.get('batch_number'),
+            batch_source=bag.get('batch_source'),
+            custom_notes=custom_notes
+        )
+
+        line_items = [{
+            'line_item_id': effective_line_id,
+            'quantity': packaged_count
+        }]
+
+        logger.info(f"Pushing bag {bag_id} to Zoho:")
+        logger.info(f"  - Zoho PO ID: {zoho_po_id}")
+        logger.info(f"  - Zoho Line Item ID (effective): {effective_line_id}")
+        logger.info(f"  - Line items: {line_items}")
+        logger.info(f"  - Date: {today}")
+        logger.info(f"  - Has chart image: {bool(chart_image)}")
+
+        result = zoho_api.create_purchase_receive(
+            purchaseorder_id=zoho_po_id,
+            line_items=line_items,
+            date=today,
+            notes=notes,
+            image_bytes=chart_image if chart_image else None,
+            image_filename=chart_filename
+        )
+
+        if result is None:
+            logger.error("Zoho API returned None — timeout or network failure (no JSON body)")
+            return {
+                'success': False,
+                'error': (
+                    'Could not reach Zoho or the request timed out. Check your network, Zoho Inventory status, '
+                    'and that ZOHO_* credentials in .env are valid. See Flask logs for details.'
+                )
+            }, 500
+
+        # Check for errors in Zoho response
+        if result.get('code') is not None and result.get('code') != 0:
+            error_code = result.get('code')
+            error_msg = result.get('message', 'Unknown Zoho API error')
+            logger.error(f"Zoho API error (code {error_code}): {error_msg}")
+
+            if error_code == 429:
+                raise ZohoPushRetry({
+                    'success': False,
+                    'error': f'Zoho is rate limiting purchase receives: {error_msg}'
+                }, 503)
+
+            if error_code == -1:
+                return {
+                    'success': False,
+                    'error': f'Zoho authentication/configuration error: {error_msg}'
+                }, 500
+
+            # Handle specific error codes with helpful messages
+            if error_code == 36012:
+                # Quantity recorded cannot be more than quantity ordered (Zoho-side rule).
+                # Use live Zoho PO line (quantity + quantity_received), not local po_lines.good_count
+                # (local counts reflect TabletTracker credits, not Zoho receives).
+                stats = get_zoho_po_line_receive_stats(
+                    zoho_po_id, effective_line_id, bag.get('inventory_item_id')
+                )
+                if stats:
+                    name = stats['line_item_name']
+                    ordered = stats['ordered']
+                    recv_zoho = stats['received_in_zoho_before_push']
+                    remaining_zoho = max(0, ordered - recv_zoho)
+                    total_after_push = recv_zoho + packaged_count
+                    overage = max(0, total_after_push - ordered)
+                    error_detail = f'''❌ Zoho Quantity Limit Exceeded
+
+📦 Product: {name}
+
+📊 This PO line in Zoho (before this push):
+  • Ordered: {ordered:,} tablets
+  • Already received in Zoho: {recv_zoho:,} tablets
+  • Remaining you can still receive: {remaining_zoho:,} tablets
+
+🎒 This bag (this push):
+  • Quantity you are trying to push: {packaged_count:,} tablets
+
+📈 If this push succeeded, Zoho would show:
+  • Total received: {recv_zoho:,} + {packaged_count:,} = {total_after_push:,} tablets
+  • Overage (amount past the order): {overage:,} tablets
+
+⚠️ Zoho enforces strict limits — you cannot receive more than ordered on the line.
+
+💡 Options:
+  1. Reduce this bag’s packaged quantity (e.g. adjust submissions) so the push stays within remaining capacity.
+  2. Increase the ordered quantity on this line in Zoho (then sync POs here).
+  3. Receive the excess on another PO / overs order in Zoho.
+
+Zoho API: {error_msg}'''
+                    payload = {
+                        'success': False,
+                        'error': error_detail,
+                    }
+                    if overage > 0:
+                        payload['zoho_push_overs'] = {
+                            'parent_po_id': bag['po_id'],
+                            'overage_tablets': overage,
+                            'inventory_item_id': bag.get('inventory_item_id'),
+                            'line_item_name': name,
+                        }
+                    return payload, 400
+
+                # Fallback: could not read PO from Zoho — keep local context only for product name / ordered
+                try:
+                    with db_read_only() as conn:
+                        po_line_info = conn.execute('''
+                        SELECT pl.line_item_name, pl.quantity_ordered
+                        FROM po_lines pl
+                        WHERE pl.po_id = (SELECT po_id FROM receiving WHERE id = (
+                            SELECT receiving_id FROM small_boxes WHERE id = (
+                                SELECT small_box_id FROM bags WHERE id = ?
+                            )
+                        ))
+                        AND pl.inventory_item_id = ?
+                        LIMIT 1
+                    ''', (bag_id, bag.get('inventory_item_id'))).fetchone()
+                    line_hint = ''
+                    if po_line_info:
+                        pl = dict(po_line_info)
+                        line_hint = (
+                            f"\n\n📦 (from TabletTracker DB) Product: {pl.get('line_item_name', 'Unknown')}\n"
+                            f"   Ordered on file: {pl.get('quantity_ordered', 0):,} tablets — "
+                            "verify in Zoho; local DB may not match Zoho received totals."
+                        )
+                except Exception as e:
+                    logger.error(f"Error getting PO line fallback details: {e}")
+                    line_hint = ''
+
+                error_detail = f'''❌ Zoho Quantity Limit Exceeded
+
+Could not load this PO line from Zoho to show “already received” exactly as Zoho sees it (required for a precise breakdown). Open Zoho Inventory, Purchase Orders, this PO, and compare Ordered vs Received on the line; Zoho rejects when (received + this push) is greater than ordered.
+
+🎒 This push quantity: {packaged_count:,} tablets
+
+Zoho’s rule: total received after this push would exceed the ordered quantity on the line.{line_hint}
+
+💡 Options:
+  1. Reduce packaged quantity for this bag, or split receiving in Zoho.
+  2. Increase ordered quantity on the PO line in Zoho, then sync POs here.
+  3. Use another PO for excess quantity.
+
+Zoho API: {error_msg}'''
+                return {
+                    'success': False,
+                    'error': error_detail
+                }, 400
+            else:
+                return {
+                    'success': False,
+                    'error': f'Zoho API error (code {error_code}): {error_msg}'
+                }, 500
+
+        # Get the created receive ID - try multiple possible field names
+        zoho_receive_id = None
+        if result.get('purchasereceive'):
+            zoho_receive_id = (
+                result['purchasereceive'].get('purchasereceive_id') or
+                result['purchasereceive'].get('purchase_receive_id') or
+                result['purchasereceive'].get('id') or
+                result['purchasereceive'].get('receive_id')
+            )
+            logger.info(f"Extracted zoho_receive_id from purchasereceive: {zoho_receive_id}")
+        else:
+            # Try direct fields in case response structure is different
+            zoho_receive_id = (
+                result.get('purchasereceive_id') or
+                result.get('purchase_receive_id') or
+                result.get('id') or
+                result.get('receive_id')
+            )
+            logger.info(f"Extracted zoho_receive_id from root: {zoho_receive_id}")
+
+        # Log the full response if receive ID is still None (for debugging)
+        if not zoho_receive_id:
+            logger.warning(f"⚠️ Could not extract zoho_receive_id. Full response: {json.dumps(result, indent=2, default=str)[:1000]}")
+
+        # Update bag to mark as pushed
+        with db_transaction() as conn:
+            _update_bag_zoho_push(conn, bag_id, zoho_receive_id, None)
+
+        bag_info = f"{bag.get('tablet_type_name', 'Unknown')} - Box {box_number}, Bag {bag_number}"
+        logger.info(f"Successfully pushed bag {bag_id} to Zoho receive {zoho_receive_id}")
+
+        return {
+            'success': True,
+            'zoho_receive_pushed': True,
+            'message': f'Successfully pushed {bag_info} to Zoho',
+            'zoho_receive_id': zoho_receive_id
+        }, 200
+    except ZohoPushRetry:
+        raise
+    except Exception as e:
+        logger.exception(f"Error pushing bag {bag_id} to Zoho: {str(e)}")
+        return {'success': False, 'error': f'Failed to push to Zoho: {str(e)}'}, 500
@@ -1,12 +1,43 @@
 import json
 import logging
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 
 import requests
 from config import Config
 
+from app.services.zoho_sync_state import publish_sync_progress, read_sync_state, utc_now_text, write_sync_state
+from app.utils.http_retry import RetryingSession
+
 logger = logging.getLogger(__name__)
 
+# Cap on any single backoff sleep, including a server-supplied Retry-After.
+_MAX_BACKOFF_SECONDS = 60.0
+_ZOHO_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+
+def _retryable_status(method, status):
+    return status == 429 or (method == 'GET' and status >= 500)
+
+
+class ZohoSyncError(RuntimeError):
+    """Listing purchase orders from Zoho failed part-way through."""
+
+
+def _format_zoho_time(value):
+    """Aware datetime -> Zoho timestamp text (``2026-10-16T09:30:00+0000``)."""
+    return value.astimezone(timezone.utc).strftime(_ZOHO_TIME_FORMAT)
+
+
+def _parse_zoho_time(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value).strip(), _ZOHO_TIME_FORMAT)
+    except ValueError:
+        return None
+
 
 class ZohoInventoryAPI:
     def __init__(self):
@@ -16,6 +47,25 @@ class ZohoInventoryAPI:
         self.access_token = None
         self.token_expires_at = None
         self._extra_headers = dict(Config.ZOHO_SERVICE_EXTRA_HEADERS or {})
+        self.sync_workers = max(1, Config.ZOHO_SYNC_WORKERS)
+        # Shared keep-alive session; its pool is sized for the sync's detail-fetch workers.
+        self._http = RetryingSession(
+            'Zoho',
+            pool_size=self.sync_workers,
+            max_retries=Config.ZOHO_MAX_RETRIES,
+            backoff_base=max(0, Config.ZOHO_BACKOFF_BASE_MS) / 1000.0,
+            max_backoff=_MAX_BACKOFF_SECONDS,
+        )
+        self._token_lock = threading.Lock()
+
+    def _send(self, method, url, **kwargs):
+        """
+        One HTTP call over the shared session with rate-limit-aware retries.
+
+        429 is retried for every method (Zoho rejected the call without acting on it) and honours
+        Retry-After; 5xx responses, timeouts and connection errors are retried for GET only.
+        """
+        return self._http.send(method, url, retry_status=_retryable_status, retry_errors_for=('GET',), **kwargs)
 
     def _merge_headers(self, headers):
         merged = dict(self._extra_headers)
@@ -26,6 +76,13 @@ class ZohoInventoryAPI:
         """Get a fresh access token using refresh token"""
         if self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at:
             return self.access_token
+        # Concurrent detail fetches share one refresh instead of each requesting a token.
+        with self._token_lock:
+            if self.access_token and self.token_expires_at and datetime.now() < self.token_expires_at:
+                return self.access_token
+            return self._refresh_access_token()
+
+    def _refresh_access_token(self):
 
         url = self.token_url
         data = {
@@ -43,7 +100,7 @@ class ZohoInventoryAPI:
 
         try:
             # Add timeout to prevent hanging (30 seconds)
-            response = requests.post(url, data=data, headers=self._merge_headers({}), timeout=30)
+            response = self._send('POST', url, data=data, headers=self._merge_headers({}), timeout=30)
             response.raise_for_status()
             token_data = response.json()
 
@@ -105,11 +162,9 @@ class ZohoInventoryAPI:
         timeout = 30
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=timeout)
-            elif method == 'POST':
-                response = requests.post(url, headers=headers, params=params, json=data, timeout=timeout)
-            elif method == 'PUT':
-                response = requests.put(url, headers=headers, params=params, json=data, timeout=timeout)
+                response = self._send('GET', url, headers=headers, params=params, timeout=timeout)
+            elif method in ('POST', 'PUT'):
+                response = self._send(method, url, headers=headers, params=params, json=data, timeout=timeout)
             else:
                 logger.error(f"Unsupported HTTP method for Zoho API: {method}")
                 return None
@@ -367,7 +422,7 @@ class ZohoInventoryAPI:
             # Prepare the file for upload
             files = {'attachment': (filename, file_bytes, 'image/png')}
 
-            response = requests.post(url, headers=headers, params=params, files=files, timeout=30)
+            response = self._send('POST', url, headers=headers, params=params, files=files, timeout=30)
 
             logger.info(f"📎 Attachment upload response status: {response.status_code}")
             logger.info(f"📎 Attachment upload response body: {response.text[:500]}")
@@ -450,511 +505,639 @@ class ZohoInventoryAPI:
                 )
         return True
 
-    def sync_tablet_pos_to_db(self, db_conn):
-        """Sync ONLY tablet POs from Zoho to local database"""
-        # Get all POs (open, closed, draft, etc.)
-        pos_data = self.get_purchase_orders(status='all')
+    def iter_purchase_orders(self, modified_since=None, per_page=None, on_page=None):
+        """
+        Yield every purchase order across all list pages, most recently modified first.
 
-        if not pos_data:
-            return (
-                False,
-                "Failed to fetch POs from Zoho - API returned no data. Check Zoho API credentials and connection.",
-            )
+        ``modified_since`` (Zoho timestamp text) is passed as Zoho's ``last_modified_time`` filter and
+        listing also stops at the first older PO. Sorting newest-first means a PO edited mid-listing
+        moves onto a page already read (a duplicate, dropped here) rather than past the one being read.
+        Raises ``ZohoSyncError`` when a page cannot be fetched.
+        """
+        per_page = per_page or Config.ZOHO_SYNC_PAGE_SIZE
+        since = _parse_zoho_time(modified_since)
+        seen = set()
+        page = 1
+        while True:
+            params = {
+                'page': page,
+                'per_page': per_page,
+                'sort_column': 'last_modified_time',
+                'sort_order': 'D',
+            }
+            if modified_since:
+                params['last_modified_time'] = modified_since
+            data = self.make_request('purchaseorders', extra_params=params)
+            if not data:
+                raise ZohoSyncError(
+                    f"Failed to fetch POs from Zoho (page {page}) - API returned no data. "
+                    "Check Zoho API credentials and connection."
+                )
+            if 'purchaseorders' not in data:
+                error_msg = data.get('message', 'Unknown error') if isinstance(data, dict) else 'Invalid response format'
+                raise ZohoSyncError(f"Failed to fetch POs from Zoho (page {page}): {error_msg}")
+
+            orders = data.get('purchaseorders') or []
+            if on_page:
+                on_page(page, len(orders))
+            for po in orders:
+                modified = _parse_zoho_time(po.get('last_modified_time'))
+                if since and modified and modified < since:
+                    return
+                if po.get('purchaseorder_id') in seen:
+                    continue
+                seen.add(po.get('purchaseorder_id'))
+                yield po
+
+            if not orders or not (data.get('page_context') or {}).get('has_more_page'):
+                return
+            page += 1
+
+    def _fetch_po_details(self, purchase_orders, on_result=None):
+        """Fetch ``purchaseorders/{id}`` for each PO on a bounded pool; returns ``({zoho_po_id: details}, failures)``."""
+        details = {}
+        failures = 0
+        if not purchase_orders:
+            return details, failures
+        workers = max(1, min(self.sync_workers, len(purchase_orders)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zoho-po') as pool:
+            futures = {
+                pool.submit(self.get_purchase_order_details, po['purchaseorder_id']): po for po in purchase_orders
+            }
+            for future in as_completed(futures):
+                po = futures[future]
+                try:
+                    body = future.result()
+                except Exception as e:  # noqa: BLE001 - one bad PO must not abort the batch
+                    logger.error(f"Error fetching Zoho PO {po.get('purchaseorder_number')}: {e}")
+                    body = None
+                if body and 'purchaseorder' in body:
+                    details[po['purchaseorder_id']] = body
+                else:
+                    failures += 1
+                    logger.warning(f"⚠️  No line item details for PO {po.get('purchaseorder_number')}")
+                if on_result:
+                    on_result(len(details), failures)
+        return details, failures
 
-        if 'purchaseorders' not in pos_data:
-            error_msg = (
-                pos_data.get('message', 'Unknown error') if isinstance(pos_data, dict) else 'Invalid response format'
-            )
-            return False, f"Failed to fetch POs from Zoho: {error_msg}"
+    def sync_tablet_pos_to_db(self, db_conn, full=False):
+        """
+        Sync ONLY tablet POs from Zoho to local database.
 
-        synced_count = 0
+        Incremental by default: only POs modified since the stored cursor (``zoho_sync_state``) are
+        listed; ``full=True`` or a missing cursor lists everything. Line item details are fetched
+        concurrently before any local writes, then applied on ``db_conn``. The cursor only advances
+        when every detail fetch succeeded, so a partial sync is retried next time.
+        """
+        state = read_sync_state(db_conn) or {}
+        since = None if full else state.get('cursor')
+        started = datetime.now(timezone.utc)
+        progress = {
+            'status': 'running',
+            'mode': 'incremental' if since else 'full',
+            'started_at': started.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': None,
+            'pages': 0,
+            'listed': 0,
+            'tablet_pos': 0,
+            'details_fetched': 0,
+            'detail_failures': 0,
+            'synced': 0,
+            'message': None,
+        }
+        publish_sync_progress(db_conn, **progress)
+        try:
+            return self._sync_tablet_pos(db_conn, state, since, started, progress)
+        except Exception as e:
+            # Pending upserts hold this connection's write lock, so the side connection could not
+            # record the failure; the caller rolls the transaction back on the way out anyway.
+            if db_conn.in_transaction:
+                db_conn.rollback()
+            progress.update(status='failed', finished_at=utc_now_text(), message=str(e))
+            publish_sync_progress(db_conn, **progress)
+            raise
+
+    def _sync_tablet_pos(self, db_conn, state, since, started, progress):
+        """List, fetch and upsert tablet POs for ``sync_tablet_pos_to_db``; updates ``progress`` in place."""
+
+        def on_page(page, count):
+            progress['pages'] = page
+            progress['listed'] += count
+            publish_sync_progress(db_conn, **progress)
+
+        def on_result(fetched, failed):
+            progress['details_fetched'], progress['detail_failures'] = fetched, failed
+            if (fetched + failed) % 10 == 0:
+                publish_sync_progress(db_conn, **progress)
+
+        tablet_pos = []
         skipped_count = 0
-        total_pos = len(pos_data.get('purchaseorders', []))
-        logger.info(f"📊 Processing {total_pos} total POs from Zoho...")
+        try:
+            for po in self.iter_purchase_orders(modified_since=since, on_page=on_page):
+                if self._is_tablet_po(po):
+                    tablet_pos.append(po)
+                else:
+                    skipped_count += 1
+                    logger.debug(f"⏭️  Skipping non-tablet PO: {po.get('purchaseorder_number', '')} (tablets field not marked)")
+        except ZohoSyncError as e:
+            progress.update(status='failed', finished_at=utc_now_text(), message=str(e))
+            publish_sync_progress(db_conn, **progress)
+            return False, str(e)
+
+        progress['tablet_pos'] = len(tablet_pos)
+        logger.info(
+            f"📊 {progress['listed']} POs listed from Zoho ({progress['mode']}), fetching details for {len(tablet_pos)} tablet POs..."
+        )
+        details, failures = self._fetch_po_details(tablet_pos, on_result=on_result)
 
-        for idx, po in enumerate(pos_data['purchaseorders'], 1):
-            if idx % 10 == 0:
-                logger.debug(
-                    f"📊 Progress: {idx}/{total_pos} POs processed ({synced_count} synced, {skipped_count} skipped)"
-                )
-            # Check if it's a tablet PO AND not closed
-            is_tablet_po = False
-            po_number = po.get('purchaseorder_number', '')
-            ref_num = (po.get('reference_number') or '').strip()
-            is_overs_po = po_number.upper().endswith('-OVERS') or ref_num.upper().endswith('-OVERS')
-
-            # Check the tablets custom field (the one you just marked in Zoho)
-            if po.get('cf_tablets_unformatted') in [True, 'true', 'True', 1, '1']:
-                is_tablet_po = True
-                logger.debug(
-                    f"✅ Tablet PO found: {po_number} (cf_tablets_unformatted = {po.get('cf_tablets_unformatted')})"
+        # Get all configured tablet inventory_item_ids to filter line items
+        tablet_item_ids = db_conn.execute('''
+            SELECT inventory_item_id FROM tablet_types WHERE inventory_item_id IS NOT NULL AND inventory_item_id != ''
+        ''').fetchall()
+        tablet_item_ids_set = {row['inventory_item_id'] for row in tablet_item_ids}
+
+        synced_count = 0
+        for po in tablet_pos:
+            self._upsert_tablet_po(db_conn, po, details.get(po['purchaseorder_id']), tablet_item_ids_set)
+            synced_count += 1
+
+        # Update remaining quantities for all POs after sync
+        db_conn.execute('''
+            UPDATE purchase_orders
+            SET remaining_quantity = ordered_quantity - current_good_count - current_damaged_count,
+                ordered_quantity = (
+                    SELECT COALESCE(SUM(quantity_ordered), 0)
+                    FROM po_lines
+                    WHERE po_id = purchase_orders.id
                 )
-            elif po.get('cf_tablets') in [True, 'true', 'True', 1, '1']:
-                is_tablet_po = True
-                logger.debug(f"✅ Tablet PO found: {po_number} (cf_tablets = {po.get('cf_tablets')})")
-
-            # Also check if it's an overs PO (ends with -OVERS)
-            if is_overs_po:
-                is_tablet_po = True
-                logger.debug(f"✅ Overs PO detected: {po_number}")
-
-            if not is_tablet_po:
-                skipped_count += 1
-                logger.debug(f"⏭️  Skipping non-tablet PO: {po_number} (tablets field not marked)")
-                continue
+            WHERE id IN (
+                SELECT DISTINCT po_id FROM po_lines
+            )
+        ''')
 
-            # We'll sync closed POs too, but mark them properly for separate display
+        # Re-evaluate flagged submissions after PO sync
+        # Some submissions may now have only 1 match after POs were closed
+        try:
+            from app.services.bag_matching_service import reevaluate_flagged_submissions
 
-            # Check if PO already exists - get current closed status too
-            existing = db_conn.execute(
-                'SELECT id, closed FROM purchase_orders WHERE zoho_po_id = ?', (po['purchaseorder_id'],)
-            ).fetchone()
+            auto_assigned = reevaluate_flagged_submissions(db_conn)
+            if auto_assigned > 0:
+                logger.info(f"Auto-assigned {auto_assigned} previously flagged submissions after PO sync")
+        except Exception as e:
+            logger.warning(f"Error during submission re-evaluation: {e}")
 
-            # Map Zoho status - check multiple status fields
-            zoho_status = po.get('status', '').upper()
-            po.get('delivery_status', '').upper()
-            po.get('reference_number', '')
+        message = f"✅ Synced {synced_count} tablet POs, skipped {skipped_count} non-tablet POs"
+        if failures:
+            message += f" ({failures} POs without line item details; will retry next sync)"
+            cursor = state.get('cursor')
+        else:
+            overlap = timedelta(seconds=Config.ZOHO_SYNC_CURSOR_OVERLAP_SECONDS)
+            cursor = _format_zoho_time(started - overlap)
+        progress.update(
+            status='partial' if failures else 'ok',
+            finished_at=utc_now_text(),
+            synced=synced_count,
+            message=message,
+        )
+        write_sync_state(db_conn, cursor=cursor, **progress)
+        return True, message
+
+    @staticmethod
+    def _is_tablet_po(po):
+        """Tablet POs carry the ``cf_tablets`` custom field or an ``-OVERS`` number/reference."""
+        po_number = po.get('purchaseorder_number', '')
+        ref_num = (po.get('reference_number') or '').strip()
+        if po.get('cf_tablets_unformatted') in [True, 'true', 'True', 1, '1']:
+            logger.debug(f"✅ Tablet PO found: {po_number} (cf_tablets_unformatted = {po.get('cf_tablets_unformatted')})")
+            return True
+        if po.get('cf_tablets') in [True, 'true', 'True', 1, '1']:
+            logger.debug(f"✅ Tablet PO found: {po_number} (cf_tablets = {po.get('cf_tablets')})")
+            return True
+        if po_number.upper().endswith('-OVERS') or ref_num.upper().endswith('-OVERS'):
+            logger.debug(f"✅ Overs PO detected: {po_number}")
+            return True
+        return False
+
+    def _upsert_tablet_po(self, db_conn, po, po_details, tablet_item_ids_set):
+        """Upsert one tablet PO, its tablet line items, inferred tablet type and internal status."""
+        po_number = po.get('purchaseorder_number', '')
+        ref_num = (po.get('reference_number') or '').strip()
+        is_overs_po = po_number.upper().endswith('-OVERS') or ref_num.upper().endswith('-OVERS')
+
+        # Check if PO already exists - get current closed status too
+        existing = db_conn.execute(
+            'SELECT id, closed FROM purchase_orders WHERE zoho_po_id = ?', (po['purchaseorder_id'],)
+        ).fetchone()
 
-            # Check for billing-related fields (CLOSED in UI = BILL CREATED)
-            billing_status = po.get('billing_status', '').upper()
-            billed_status = po.get('billed_status', '').upper()
-            is_billed = po.get('is_billed', False)
-            bill_count = po.get('bills_count', 0)
+        # Map Zoho status - check multiple status fields
+        zoho_status = po.get('status', '').upper()
+        po.get('delivery_status', '').upper()
+        po.get('reference_number', '')
 
-            # Check for "received" tracking fields (when you mark as received in Zoho)
-            received_date = (
-                po.get('received_date', '') or po.get('delivery_date', '') or po.get('actual_delivery_date', '')
-            )
-            is_received = po.get('is_received', False) or po.get('delivered', False)
-            receives_count = po.get('receives_count', 0) or po.get('receipts_count', 0)
+        # Check for billing-related fields (CLOSED in UI = BILL CREATED)
+        billing_status = po.get('billing_status', '').upper()
+        billed_status = po.get('billed_status', '').upper()
+        is_billed = po.get('is_billed', False)
+        bill_count = po.get('bills_count', 0)
 
-            # Check your custom status field
-            custom_status = po.get('cf_status', '') or po.get('cf_status_unformatted', '')
+        # Check for "received" tracking fields (when you mark as received in Zoho)
+        received_date = (
+            po.get('received_date', '') or po.get('delivery_date', '') or po.get('actual_delivery_date', '')
+        )
+        is_received = po.get('is_received', False) or po.get('delivered', False)
+        receives_count = po.get('receives_count', 0) or po.get('receipts_count', 0)
 
-            # Debug all relevant fields
-            logger.debug(
-                f"PO {po['purchaseorder_number']}: status='{zoho_status}', billing_status='{billing_status}', is_billed={is_billed}, bills_count={bill_count}"
-            )
-            logger.debug(
-                f"  received_date='{received_date}', is_received={is_received}, receives_count={receives_count}, custom_status='{custom_status}'"
-            )
+        # Check your custom status field
+        custom_status = po.get('cf_status', '') or po.get('cf_status_unformatted', '')
 
-            # Check for the REAL closed status fields from debug output
-            order_status = po.get('order_status', '').upper()
-            current_sub_status = po.get('current_sub_status', '').upper()
-            billed_status = po.get('billed_status', '').upper()
-
-            # Also check the main status field (it might be "closed" directly)
-            main_status = po.get('status', '').upper()
-
-            # Check if PO is CANCELLED (separate from closed)
-            is_cancelled = (
-                order_status == 'CANCELLED'
-                or order_status == 'CANCELED'
-                or current_sub_status == 'CANCELLED'
-                or current_sub_status == 'CANCELED'
-                or main_status == 'CANCELLED'
-                or main_status == 'CANCELED'
-                or 'CANCELLED' in main_status
-                or 'CANCELLED' in order_status
-                or 'CANCELLED' in current_sub_status
-                or 'CANCELED' in main_status
-                or 'CANCELED' in order_status
-                or 'CANCELED' in current_sub_status
-            )
+        # Debug all relevant fields
+        logger.debug(
+            f"PO {po['purchaseorder_number']}: status='{zoho_status}', billing_status='{billing_status}', is_billed={is_billed}, bills_count={bill_count}"
+        )
+        logger.debug(
+            f"  received_date='{received_date}', is_received={is_received}, receives_count={receives_count}, custom_status='{custom_status}'"
+        )
 
-            # Additional check: if status contains "cancel" or "cancelled" anywhere
-            if not is_cancelled:
-                status_str = f"{main_status} {order_status} {current_sub_status} {billed_status}".upper()
-                if 'CANCEL' in status_str or 'CANCELLED' in status_str:
-                    is_cancelled = True
-
-            # CLOSED in Zoho UI can be indicated by:
-            # 1. order_status = "CLOSED"
-            # 2. current_sub_status = "CLOSED"
-            # 3. billed_status = "BILLED"
-            # 4. main status = "CLOSED"
-            # 5. Any status containing "CLOSED" or "CLOSE"
-            # Note: CANCELLED is handled separately above
-            is_closed = (
-                order_status == 'CLOSED'
-                or current_sub_status == 'CLOSED'
-                or billed_status == 'BILLED'
-                or main_status == 'CLOSED'
-                or 'CLOSED' in main_status
-                or 'CLOSED' in order_status
-                or 'CLOSED' in current_sub_status
-                or (is_billed and bill_count > 0)
-            )
+        # Check for the REAL closed status fields from debug output
+        order_status = po.get('order_status', '').upper()
+        current_sub_status = po.get('current_sub_status', '').upper()
+        billed_status = po.get('billed_status', '').upper()
+
+        # Also check the main status field (it might be "closed" directly)
+        main_status = po.get('status', '').upper()
+
+        # Check if PO is CANCELLED (separate from closed)
+        is_cancelled = (
+            order_status == 'CANCELLED'
+            or order_status == 'CANCELED'
+            or current_sub_status == 'CANCELLED'
+            or current_sub_status == 'CANCELED'
+            or main_status == 'CANCELLED'
+            or main_status == 'CANCELED'
+            or 'CANCELLED' in main_status
+            or 'CANCELLED' in order_status
+            or 'CANCELLED' in current_sub_status
+            or 'CANCELED' in main_status
+            or 'CANCELED' in order_status
+            or 'CANCELED' in current_sub_status
+        )
+
+        # Additional check: if status contains "cancel" or "cancelled" anywhere
+        if not is_cancelled:
+            status_str = f"{main_status} {order_status} {current_sub_status} {billed_status}".upper()
+            if 'CANCEL' in status_str or 'CANCELLED' in status_str:
+                is_cancelled = True
+
+        # CLOSED in Zoho UI can be indicated by:
+        # 1. order_status = "CLOSED"
+        # 2. current_sub_status = "CLOSED"
+        # 3. billed_status = "BILLED"
+        # 4. main status = "CLOSED"
+        # 5. Any status containing "CLOSED" or "CLOSE"
+        # Note: CANCELLED is handled separately above
+        is_closed = (
+            order_status == 'CLOSED'
+            or current_sub_status == 'CLOSED'
+            or billed_status == 'BILLED'
+            or main_status == 'CLOSED'
+            or 'CLOSED' in main_status
+            or 'CLOSED' in order_status
+            or 'CLOSED' in current_sub_status
+            or (is_billed and bill_count > 0)
+        )
+
+        # Additional check: if status contains "close" or "closed" anywhere
+        if not is_closed:
+            status_str = f"{main_status} {order_status} {current_sub_status} {billed_status}".upper()
+            if 'CLOSE' in status_str or 'CLOSED' in status_str:
+                is_closed = True
 
-            # Additional check: if status contains "close" or "closed" anywhere
-            if not is_closed:
-                status_str = f"{main_status} {order_status} {current_sub_status} {billed_status}".upper()
-                if 'CLOSE' in status_str or 'CLOSED' in status_str:
-                    is_closed = True
+        # Log cancelled status specifically for debugging
+        if is_cancelled:
+            logger.warning(
+                f"⚠️  CANCELLED PO detected: {po['purchaseorder_number']} - setting internal_status to 'Cancelled'"
+            )
 
-            # Log cancelled status specifically for debugging
+        logger.debug(
+            f"PO {po['purchaseorder_number']}: status='{main_status}', order_status='{order_status}', current_sub_status='{current_sub_status}', billed_status='{billed_status}'"
+        )
+        logger.debug(f"Final status determination: cancelled={is_cancelled}, closed={is_closed}")
+
+        # Get PO creation date from Zoho (they use 'date' field for PO date)
+        po_date = po.get('date', '') or po.get('created_time', '') or po.get('purchaseorder_date', '')
+        vendor_id = po.get('vendor_id') or po.get('contact_id') or None
+        vendor_name = po.get('vendor_name') or po.get('contact_name') or None
+
+        # Detect parent PO for overs POs (e.g., PO-00127-OVERS -> PO-00127).
+        # Zoho auto-number may assign a different purchaseorder_number; reference_number may hold ...-OVERS.
+        parent_po_number = None
+        overs_label = None
+        if is_overs_po:
+            if po_number.upper().endswith('-OVERS'):
+                overs_label = po_number
+            elif ref_num.upper().endswith('-OVERS'):
+                overs_label = ref_num
+            if overs_label:
+                parent_po_number = overs_label[:-6]
+                logger.info(f"📋 Overs PO Zoho#={po_number} ref={ref_num!r} → parent PO: {parent_po_number}")
+
+        # Store human overs label in SQLite when reference carries ...-OVERS but Zoho # does not
+        stored_po_number = po_number
+        if ref_num.upper().endswith('-OVERS') and not po_number.upper().endswith('-OVERS'):
+            stored_po_number = ref_num
+
+        if existing:
+            # Convert Row to dict for .get() method access
+            existing = dict(existing)
+
+            # Get current status
+            current_internal_status = existing.get('internal_status', 'Active')
+            was_closed = bool(existing.get('closed', False))
+            was_cancelled = current_internal_status == 'Cancelled'
+            po_id = existing['id']
+
+            # Determine new internal status
             if is_cancelled:
-                logger.warning(
-                    f"⚠️  CANCELLED PO detected: {po['purchaseorder_number']} - setting internal_status to 'Cancelled'"
-                )
+                new_internal_status = 'Cancelled'
+                # Cancelled POs should also be marked as closed to prevent submissions
+                is_now_closed = True
+            elif is_closed:
+                # Only update to closed if not already cancelled (preserve cancelled status)
+                if current_internal_status != 'Cancelled':
+                    new_internal_status = current_internal_status  # Keep existing status if already set
+                else:
+                    new_internal_status = 'Cancelled'  # Keep cancelled status
+                is_now_closed = True
+            else:
+                # PO is open - reset cancelled status if it was cancelled before
+                if was_cancelled:
+                    new_internal_status = 'Active'  # Reset from cancelled to active
+                else:
+                    new_internal_status = current_internal_status  # Keep existing status
+                is_now_closed = False
 
+            # Update existing PO with proper status and tablet type
+            status_msg = "CANCELLED" if is_cancelled else ("CLOSED" if is_closed else "OPEN")
             logger.debug(
-                f"PO {po['purchaseorder_number']}: status='{main_status}', order_status='{order_status}', current_sub_status='{current_sub_status}', billed_status='{billed_status}'"
+                f"Updating existing PO {po['purchaseorder_number']}: zoho_status='{zoho_status}', closed={is_now_closed}, internal_status='{new_internal_status}'"
             )
-            logger.debug(f"Final status determination: cancelled={is_cancelled}, closed={is_closed}")
-
-            # Get PO creation date from Zoho (they use 'date' field for PO date)
-            po_date = po.get('date', '') or po.get('created_time', '') or po.get('purchaseorder_date', '')
-            vendor_id = po.get('vendor_id') or po.get('contact_id') or None
-            vendor_name = po.get('vendor_name') or po.get('contact_name') or None
-
-            # Detect parent PO for overs POs (e.g., PO-00127-OVERS -> PO-00127).
-            # Zoho auto-number may assign a different purchaseorder_number; reference_number may hold ...-OVERS.
-            parent_po_number = None
-            overs_label = None
-            if is_overs_po:
-                if po_number.upper().endswith('-OVERS'):
-                    overs_label = po_number
-                elif ref_num.upper().endswith('-OVERS'):
-                    overs_label = ref_num
-                if overs_label:
-                    parent_po_number = overs_label[:-6]
-                    logger.info(f"📋 Overs PO Zoho#={po_number} ref={ref_num!r} → parent PO: {parent_po_number}")
-
-            # Store human overs label in SQLite when reference carries ...-OVERS but Zoho # does not
-            stored_po_number = po_number
-            if ref_num.upper().endswith('-OVERS') and not po_number.upper().endswith('-OVERS'):
-                stored_po_number = ref_num
 
-            if existing:
-                # Convert Row to dict for .get() method access
-                existing = dict(existing)
-
-                # Get current status
-                current_internal_status = existing.get('internal_status', 'Active')
-                was_closed = bool(existing.get('closed', False))
-                was_cancelled = current_internal_status == 'Cancelled'
-                po_id = existing['id']
-
-                # Determine new internal status
-                if is_cancelled:
-                    new_internal_status = 'Cancelled'
-                    # Cancelled POs should also be marked as closed to prevent submissions
-                    is_now_closed = True
-                elif is_closed:
-                    # Only update to closed if not already cancelled (preserve cancelled status)
-                    if current_internal_status != 'Cancelled':
-                        new_internal_status = current_internal_status  # Keep existing status if already set
-                    else:
-                        new_internal_status = 'Cancelled'  # Keep cancelled status
-                    is_now_closed = True
+            # Update created_at only if we have a date from Zoho and current created_at is different
+            if po_date and po_date != existing.get('created_at', '')[:10]:
+                db_conn.execute(
+                    '''
+                    UPDATE purchase_orders
+                    SET po_number = ?, vendor_id = ?, vendor_name = ?, zoho_status = ?, closed = ?, internal_status = ?, parent_po_number = ?, created_at = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE zoho_po_id = ?
+                ''',
+                    (
+                        stored_po_number,
+                        vendor_id,
+                        vendor_name,
+                        zoho_status,
+                        is_now_closed,
+                        new_internal_status,
+                        parent_po_number,
+                        po_date,
+                        po['purchaseorder_id'],
+                    ),
+                )
+            else:
+                # Always update closed status and internal status - this is critical for preventing assignments
+                db_conn.execute(
+                    '''
+                    UPDATE purchase_orders
+                    SET po_number = ?, vendor_id = ?, vendor_name = ?, zoho_status = ?, closed = ?, internal_status = ?, parent_po_number = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE zoho_po_id = ?
+                ''',
+                    (
+                        stored_po_number,
+                        vendor_id,
+                        vendor_name,
+                        zoho_status,
+                        is_now_closed,
+                        new_internal_status,
+                        parent_po_number,
+                        po['purchaseorder_id'],
+                    ),
+                )
+
+            # Log status changes
+            if (was_closed != is_now_closed) or (was_cancelled != is_cancelled):
+                if (is_now_closed and not was_closed) or (is_cancelled and not was_cancelled):
+                    logger.warning(f"⚠️  PO {po['purchaseorder_number']} changed from OPEN to {status_msg}")
+                else:
+                    logger.info(f"✅ PO {po['purchaseorder_number']} changed from CLOSED/CANCELLED to OPEN")
+            elif was_closed == is_now_closed and was_cancelled == is_cancelled:
+                if is_now_closed:
+                    status_display = "cancelled" if is_cancelled else "closed"
+                    logger.debug(
+                        f"✅ Updated PO {po['purchaseorder_number']}: {status_display}={is_now_closed} (already {status_display})"
+                    )
                 else:
-                    # PO is open - reset cancelled status if it was cancelled before
-                    if was_cancelled:
-                        new_internal_status = 'Active'  # Reset from cancelled to active
-                    else:
-                        new_internal_status = current_internal_status  # Keep existing status
-                    is_now_closed = False
-
-                # Update existing PO with proper status and tablet type
-                status_msg = "CANCELLED" if is_cancelled else ("CLOSED" if is_closed else "OPEN")
-                logger.debug(
-                    f"Updating existing PO {po['purchaseorder_number']}: zoho_status='{zoho_status}', closed={is_now_closed}, internal_status='{new_internal_status}'"
+                    logger.debug(f"✅ Updated PO {po['purchaseorder_number']}: closed={is_now_closed} (still open)")
+        else:
+            # Insert new PO with proper status and creation date
+            # Determine internal status for new PO
+            if is_cancelled:
+                new_internal_status = 'Cancelled'
+                is_now_closed = True  # Cancelled POs should be closed
+            elif is_closed:
+                new_internal_status = 'Active'  # Will be updated later based on workflow
+                is_now_closed = True
+            else:
+                new_internal_status = 'Active'
+                is_now_closed = False
+
+            if po_date:
+                cursor = db_conn.execute(
+                    '''
+                    INSERT INTO purchase_orders (po_number, zoho_po_id, vendor_id, vendor_name, zoho_status, closed, internal_status, parent_po_number, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                    (
+                        stored_po_number,
+                        po['purchaseorder_id'],
+                        vendor_id,
+                        vendor_name,
+                        zoho_status,
+                        is_now_closed,
+                        new_internal_status,
+                        parent_po_number,
+                        po_date,
+                    ),
+                )
+            else:
+                cursor = db_conn.execute(
+                    '''
+                    INSERT INTO purchase_orders (po_number, zoho_po_id, vendor_id, vendor_name, zoho_status, closed, internal_status, parent_po_number)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                    (
+                        stored_po_number,
+                        po['purchaseorder_id'],
+                        vendor_id,
+                        vendor_name,
+                        zoho_status,
+                        is_now_closed,
+                        new_internal_status,
+                        parent_po_number,
+                    ),
                 )
+            po_id = cursor.lastrowid
+
+        # Determine actual tablet type from line items
+        tablet_types_found = []
+
+        # Sync line items - ONLY sync tablet line items (filter out non-tablet items)
+        if po_details and 'purchaseorder' in po_details:
+            for line in po_details['purchaseorder'].get('line_items', []):
+                item_id = line.get('item_id', '')
+                line_item_id = line.get('line_item_id', '')  # Zoho's unique ID for this line item
+
+                # Only sync line items that match configured tablet types
+                if item_id and item_id not in tablet_item_ids_set:
+                    logger.debug(
+                        f"⏭️  Skipping non-tablet line item '{line['name']}' (ID: {item_id}) - not in tablet_types"
+                    )
+                    continue
+
+                # Check if line item already exists
+                existing_line = db_conn.execute(
+                    'SELECT id FROM po_lines WHERE po_id = ? AND inventory_item_id = ?', (po_id, item_id)
+                ).fetchone()
 
-                # Update created_at only if we have a date from Zoho and current created_at is different
-                if po_date and po_date != existing.get('created_at', '')[:10]:
+                if existing_line:
+                    # Convert Row to dict
+                    existing_line = dict(existing_line)
+
+                    # Update existing line (including zoho_line_item_id)
                     db_conn.execute(
                         '''
-                        UPDATE purchase_orders
-                        SET po_number = ?, vendor_id = ?, vendor_name = ?, zoho_status = ?, closed = ?, internal_status = ?, parent_po_number = ?, created_at = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE zoho_po_id = ?
+                        UPDATE po_lines
+                        SET line_item_name = ?, quantity_ordered = ?, zoho_line_item_id = ?
+                        WHERE id = ?
                     ''',
-                        (
-                            stored_po_number,
-                            vendor_id,
-                            vendor_name,
-                            zoho_status,
-                            is_now_closed,
-                            new_internal_status,
-                            parent_po_number,
-                            po_date,
-                            po['purchaseorder_id'],
-                        ),
+                        (line['name'], line['quantity'], line_item_id, existing_line['id']),
                     )
                 else:
-                    # Always update closed status and internal status - this is critical for preventing assignments
+                    # Insert new line (only tablet items reach here)
                     db_conn.execute(
                         '''
-                        UPDATE purchase_orders
-                        SET po_number = ?, vendor_id = ?, vendor_name = ?, zoho_status = ?, closed = ?, internal_status = ?, parent_po_number = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE zoho_po_id = ?
+                        INSERT INTO po_lines
+                        (po_id, po_number, inventory_item_id, line_item_name, quantity_ordered, zoho_line_item_id)
+                        VALUES (?, ?, ?, ?, ?, ?)
                     ''',
-                        (
-                            stored_po_number,
-                            vendor_id,
-                            vendor_name,
-                            zoho_status,
-                            is_now_closed,
-                            new_internal_status,
-                            parent_po_number,
-                            po['purchaseorder_id'],
-                        ),
+                        (po_id, stored_po_number, item_id, line['name'], line['quantity'], line_item_id),
+                    )
+                    logger.debug(
+                        f"✅ Synced tablet line item '{line['name']}' (ID: {item_id}, LineID: {line_item_id})"
                     )
 
-                # Log status changes
-                if (was_closed != is_now_closed) or (was_cancelled != is_cancelled):
-                    if (is_now_closed and not was_closed) or (is_cancelled and not was_cancelled):
-                        logger.warning(f"⚠️  PO {po['purchaseorder_number']} changed from OPEN to {status_msg}")
-                    else:
-                        logger.info(f"✅ PO {po['purchaseorder_number']} changed from CLOSED/CANCELLED to OPEN")
-                elif was_closed == is_now_closed and was_cancelled == is_cancelled:
-                    if is_now_closed:
-                        status_display = "cancelled" if is_cancelled else "closed"
-                        logger.debug(
-                            f"✅ Updated PO {po['purchaseorder_number']}: {status_display}={is_now_closed} (already {status_display})"
-                        )
-                    else:
-                        logger.debug(f"✅ Updated PO {po['purchaseorder_number']}: closed={is_now_closed} (still open)")
-            else:
-                # Insert new PO with proper status and creation date
-                # Determine internal status for new PO
-                if is_cancelled:
-                    new_internal_status = 'Cancelled'
-                    is_now_closed = True  # Cancelled POs should be closed
-                elif is_closed:
-                    new_internal_status = 'Active'  # Will be updated later based on workflow
-                    is_now_closed = True
-                else:
-                    new_internal_status = 'Active'
-                    is_now_closed = False
+                # Extract tablet type using inventory_item_id from configured tablet types
+                # (Only tablet items reach this point due to filtering above)
+                matched_this_line = False
 
-                if po_date:
-                    cursor = db_conn.execute(
+                if item_id:
+                    # Look up the tablet type by inventory_item_id
+                    tablet_type_match = db_conn.execute(
                         '''
-                        INSERT INTO purchase_orders (po_number, zoho_po_id, vendor_id, vendor_name, zoho_status, closed, internal_status, parent_po_number, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        SELECT tablet_type_name
+                        FROM tablet_types
+                        WHERE inventory_item_id = ?
                     ''',
-                        (
-                            stored_po_number,
-                            po['purchaseorder_id'],
-                            vendor_id,
-                            vendor_name,
-                            zoho_status,
-                            is_now_closed,
-                            new_internal_status,
-                            parent_po_number,
-                            po_date,
-                        ),
-                    )
-                else:
-                    cursor = db_conn.execute(
-                        '''
-                        INSERT INTO purchase_orders (po_number, zoho_po_id, vendor_id, vendor_name, zoho_status, closed, internal_status, parent_po_number)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''',
-                        (
-                            stored_po_number,
-                            po['purchaseorder_id'],
-                            vendor_id,
-                            vendor_name,
-                            zoho_status,
-                            is_now_closed,
-                            new_internal_status,
-                            parent_po_number,
-                        ),
-                    )
-                po_id = cursor.lastrowid
-
-            # Determine actual tablet type from line items
-            tablet_types_found = []
-
-            # Sync line items - ONLY sync tablet line items (filter out non-tablet items)
-            po_details = self.get_purchase_order_details(po['purchaseorder_id'])
-            if po_details and 'purchaseorder' in po_details:
-                # Get all configured tablet inventory_item_ids to filter line items
-                tablet_item_ids = db_conn.execute('''
-                    SELECT inventory_item_id FROM tablet_types WHERE inventory_item_id IS NOT NULL AND inventory_item_id != ''
-                ''').fetchall()
-                tablet_item_ids_set = {row['inventory_item_id'] for row in tablet_item_ids}
-
-                for line in po_details['purchaseorder'].get('line_items', []):
-                    item_id = line.get('item_id', '')
-                    line_item_id = line.get('line_item_id', '')  # Zoho's unique ID for this line item
-
-                    # Only sync line items that match configured tablet types
-                    if item_id and item_id not in tablet_item_ids_set:
-                        logger.debug(
-                            f"⏭️  Skipping non-tablet line item '{line['name']}' (ID: {item_id}) - not in tablet_types"
-                        )
-                        continue
-
-                    # Check if line item already exists
-                    existing_line = db_conn.execute(
-                        'SELECT id FROM po_lines WHERE po_id = ? AND inventory_item_id = ?', (po_id, item_id)
+                        (item_id,),
                     ).fetchone()
 
-                    if existing_line:
+                    if tablet_type_match:
                         # Convert Row to dict
-                        existing_line = dict(existing_line)
-
-                        # Update existing line (including zoho_line_item_id)
-                        db_conn.execute(
-                            '''
-                            UPDATE po_lines
-                            SET line_item_name = ?, quantity_ordered = ?, zoho_line_item_id = ?
-                            WHERE id = ?
-                        ''',
-                            (line['name'], line['quantity'], line_item_id, existing_line['id']),
-                        )
-                    else:
-                        # Insert new line (only tablet items reach here)
-                        db_conn.execute(
-                            '''
-                            INSERT INTO po_lines
-                            (po_id, po_number, inventory_item_id, line_item_name, quantity_ordered, zoho_line_item_id)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        ''',
-                            (po_id, stored_po_number, item_id, line['name'], line['quantity'], line_item_id),
-                        )
+                        tablet_type_match = dict(tablet_type_match)
+                        tablet_types_found.append(tablet_type_match['tablet_type_name'])
+                        matched_this_line = True
                         logger.debug(
-                            f"✅ Synced tablet line item '{line['name']}' (ID: {item_id}, LineID: {line_item_id})"
+                            f"✅ Matched line item '{line['name']}' (ID: {item_id}) to tablet type: {tablet_type_match['tablet_type_name']}"
                         )
 
-                    # Extract tablet type using inventory_item_id from configured tablet types
-                    # (Only tablet items reach this point due to filtering above)
-                    matched_this_line = False
-
-                    if item_id:
-                        # Look up the tablet type by inventory_item_id
-                        tablet_type_match = db_conn.execute(
-                            '''
-                            SELECT tablet_type_name
-                            FROM tablet_types
-                            WHERE inventory_item_id = ?
-                        ''',
-                            (item_id,),
-                        ).fetchone()
-
-                        if tablet_type_match:
-                            # Convert Row to dict
-                            tablet_type_match = dict(tablet_type_match)
-                            tablet_types_found.append(tablet_type_match['tablet_type_name'])
-                            matched_this_line = True
-                            logger.debug(
-                                f"✅ Matched line item '{line['name']}' (ID: {item_id}) to tablet type: {tablet_type_match['tablet_type_name']}"
-                            )
-
-                    # Fallback: Extract tablet type from line item name if no ID match for this specific line
-                    if not matched_this_line:
-                        item_name = line.get('name', '').lower()
-                        if 'fix' in item_name:
-                            if 'energy' in item_name:
-                                tablet_types_found.append('FIX Energy')
-                            elif 'focus' in item_name:
-                                tablet_types_found.append('FIX Focus')
-                            elif 'relax' in item_name:
-                                tablet_types_found.append('FIX Relax')
-                        elif '7oh' in item_name or '7-oh' in item_name:
-                            if 'xl' in item_name:
-                                tablet_types_found.append('XL 7OH')
-                            else:
-                                tablet_types_found.append('7OH')
-                        elif 'pseudo' in item_name:
-                            if 'xl' in item_name:
-                                tablet_types_found.append('XL Pseudo')
-                            else:
-                                tablet_types_found.append('Pseudo')
-                        elif 'hybrid' in item_name:
-                            if 'xl' in item_name:
-                                tablet_types_found.append('XL Hybrid')
-                            else:
-                                tablet_types_found.append('Hybrid')
-
-            # Auto-progress internal status based on Zoho actions
-            current_internal = db_conn.execute(
-                'SELECT internal_status FROM purchase_orders WHERE id = ?', (po_id,)
-            ).fetchone()
-
-            if current_internal:
-                current_internal = dict(current_internal)
-
-            current_status = current_internal['internal_status'] if current_internal else 'Draft'
-            new_internal_status = current_status
-
-            # Set internal status based on Zoho workflow progression
-            if zoho_status == 'DRAFT':
-                new_internal_status = 'Draft'
-            elif zoho_status == 'ISSUED':
-                new_internal_status = 'Issued'
-            elif zoho_status == 'RECEIVED':
-                new_internal_status = 'Received'
-                logger.info(f"Auto-progressed {po['purchaseorder_number']} to Received (Zoho status={zoho_status})")
-            elif zoho_status == 'PARTIALLY_RECEIVED':
-                new_internal_status = 'Partially Received'
-                logger.info(
-                    f"Detected partial receive for {po['purchaseorder_number']} - waiting for additional shipments"
-                )
-            elif receives_count > 0 or received_date or is_received:
-                new_internal_status = 'Received'
-                logger.info(
-                    f"Auto-progressed {po['purchaseorder_number']} to Received (receives_count={receives_count}, received_date={received_date})"
-                )
+                # Fallback: Extract tablet type from line item name if no ID match for this specific line
+                if not matched_this_line:
+                    item_name = line.get('name', '').lower()
+                    if 'fix' in item_name:
+                        if 'energy' in item_name:
+                            tablet_types_found.append('FIX Energy')
+                        elif 'focus' in item_name:
+                            tablet_types_found.append('FIX Focus')
+                        elif 'relax' in item_name:
+                            tablet_types_found.append('FIX Relax')
+                    elif '7oh' in item_name or '7-oh' in item_name:
+                        if 'xl' in item_name:
+                            tablet_types_found.append('XL 7OH')
+                        else:
+                            tablet_types_found.append('7OH')
+                    elif 'pseudo' in item_name:
+                        if 'xl' in item_name:
+                            tablet_types_found.append('XL Pseudo')
+                        else:
+                            tablet_types_found.append('Pseudo')
+                    elif 'hybrid' in item_name:
+                        if 'xl' in item_name:
+                            tablet_types_found.append('XL Hybrid')
+                        else:
+                            tablet_types_found.append('Hybrid')
+
+        # Auto-progress internal status based on Zoho actions
+        current_internal = db_conn.execute(
+            'SELECT internal_status FROM purchase_orders WHERE id = ?', (po_id,)
+        ).fetchone()
 
-            logger.debug(
-                f"Set internal status for {po['purchaseorder_number']}: {current_status} → {new_internal_status}"
+        if current_internal:
+            current_internal = dict(current_internal)
+
+        current_status = current_internal['internal_status'] if current_internal else 'Draft'
+        new_internal_status = current_status
+
+        # Set internal status based on Zoho workflow progression
+        if zoho_status == 'DRAFT':
+            new_internal_status = 'Draft'
+        elif zoho_status == 'ISSUED':
+            new_internal_status = 'Issued'
+        elif zoho_status == 'RECEIVED':
+            new_internal_status = 'Received'
+            logger.info(f"Auto-progressed {po['purchaseorder_number']} to Received (Zoho status={zoho_status})")
+        elif zoho_status == 'PARTIALLY_RECEIVED':
+            new_internal_status = 'Partially Received'
+            logger.info(
+                f"Detected partial receive for {po['purchaseorder_number']} - waiting for additional shipments"
             )
-
-            # Update PO with inferred tablet type and internal status
-            if tablet_types_found:
-                tablet_type = ', '.join(set(tablet_types_found))
-                db_conn.execute(
-                    '''
-                    UPDATE purchase_orders
-                    SET tablet_type = ?, internal_status = ?
-                    WHERE id = ?
-                ''',
-                    (tablet_type, new_internal_status, po_id),
-                )
-            else:
-                db_conn.execute(
-                    '''
-                    UPDATE purchase_orders
-                    SET internal_status = ?
-                    WHERE id = ?
-                ''',
-                    (new_internal_status, po_id),
-                )
-
-            synced_count += 1
-
-        # Update remaining quantities for all POs after sync
-        db_conn.execute('''
-            UPDATE purchase_orders
-            SET remaining_quantity = ordered_quantity - current_good_count - current_damaged_count,
-                ordered_quantity = (
-                    SELECT COALESCE(SUM(quantity_ordered), 0)
-                    FROM po_lines
-                    WHERE po_id = purchase_orders.id
-                )
-            WHERE id IN (
-                SELECT DISTINCT po_id FROM po_lines
+        elif receives_count > 0 or received_date or is_received:
+            new_internal_status = 'Received'
+            logger.info(
+                f"Auto-progressed {po['purchaseorder_number']} to Received (receives_count={receives_count}, received_date={received_date})"
             )
-        ''')
 
-        # Re-evaluate flagged submissions after PO sync
-        # Some submissions may now have only 1 match after POs were closed
-        try:
-            from app.services.bag_matching_service import reevaluate_flagged_submissions
-
-            auto_assigned = reevaluate_flagged_submissions(db_conn)
-            if auto_assigned > 0:
-                logger.info(f"Auto-assigned {auto_assigned} previously flagged submissions after PO sync")
-        except Exception as e:
-            logger.warning(f"Error during submission re-evaluation: {e}")
+        logger.debug(
+            f"Set internal status for {po['purchaseorder_number']}: {current_status} → {new_internal_status}"
+        )
 
-        return True, f"✅ Synced {synced_count} tablet POs, skipped {skipped_count} non-tablet POs"
+        # Update PO with inferred tablet type and internal status
+        if tablet_types_found:
+            tablet_type = ', '.join(set(tablet_types_found))
+            db_conn.execute(
+                '''
+                UPDATE purchase_orders
+                SET tablet_type = ?, internal_status = ?
+                WHERE id = ?
+            ''',
+                (tablet_type, new_internal_status, po_id),
+            )
+        else:
+            db_conn.execute(
+                '''
+                UPDATE purchase_orders
+                SET internal_status = ?
+                WHERE id = ?
+            ''',
+                (new_internal_status, po_id),
+            )
 
 
 def parse_zoho_item_weight_grams(item_response):
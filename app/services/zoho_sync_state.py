@@ -0,0 +1,111 @@
+"""
+Progress / cursor record for Zoho syncs (one row per sync kind in ``zoho_sync_state``).
+
+The final row (status, counts, next cursor) is written on the sync's own connection so it commits
+with the synced data. While a sync is still talking to Zoho, progress is published through a
+short-lived side connection so other requests can poll it; those writes are best-effort.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PO_SYNC = "purchase_orders"
+
+ZOHO_SYNC_STATE_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS zoho_sync_state (
+        name TEXT PRIMARY KEY,
+        cursor TEXT,
+        status TEXT NOT NULL DEFAULT 'idle',
+        mode TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        pages INTEGER NOT NULL DEFAULT 0,
+        listed INTEGER NOT NULL DEFAULT 0,
+        tablet_pos INTEGER NOT NULL DEFAULT 0,
+        details_fetched INTEGER NOT NULL DEFAULT 0,
+        detail_failures INTEGER NOT NULL DEFAULT 0,
+        synced INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        updated_at TEXT
+    )
+    """,
+)
+
+_FIELDS = (
+    "cursor",
+    "status",
+    "mode",
+    "started_at",
+    "finished_at",
+    "pages",
+    "listed",
+    "tablet_pos",
+    "details_fetched",
+    "detail_failures",
+    "synced",
+    "message",
+)
+
+
+def utc_now_text() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def read_sync_state(conn, name: str = PO_SYNC) -> dict[str, Any] | None:
+    try:
+        row = conn.execute("SELECT * FROM zoho_sync_state WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    return {key: row[key] for key in row.keys()}
+
+
+def write_sync_state(conn, name: str = PO_SYNC, **fields: Any) -> bool:
+    """Upsert ``fields`` for ``name``; False when the table is missing (migrations not run)."""
+    unknown = set(fields) - set(_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown zoho_sync_state fields: {sorted(unknown)}")
+    columns = ["name", *fields, "updated_at"]
+    values = [name, *fields.values(), utc_now_text()]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+    try:
+        conn.execute(
+            f"""
+            INSERT INTO zoho_sync_state ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT(name) DO UPDATE SET {updates}
+            """,
+            values,
+        )
+    except sqlite3.OperationalError as exc:
+        logger.warning("zoho_sync_state not writable: %s", exc)
+        return False
+    return True
+
+
+def publish_sync_progress(conn, name: str = PO_SYNC, **fields: Any) -> None:
+    """Commit progress through a side connection to ``conn``'s database file (best-effort)."""
+    try:
+        path = next((r[2] for r in conn.execute("PRAGMA database_list") if r[1] == "main"), "")
+    except sqlite3.Error:
+        path = ""
+    if not path:
+        return
+    try:
+        side = sqlite3.connect(path, timeout=0.5)
+    except sqlite3.Error:
+        return
+    try:
+        if write_sync_state(side, name, **fields):
+            side.commit()
+    except sqlite3.Error as exc:
+        logger.debug("zoho sync progress not recorded: %s", exc)
+    finally:
+        side.close()
@@ -142,7 +142,7 @@ def employee_required(f: Callable) -> Callable:
 
 def get_employee_role(username: str) -> str | None:
     """
-    Get the role of an employee.
+    Get the role of an employee (from the per-process profile cache).
 
     Args:
         username: Employee username
@@ -150,10 +150,10 @@ def get_employee_role(username: str) -> str | None:
     Returns:
         Employee role or None if not found
     """
-    from app.utils.db_utils import db_query
+    from app.services.employee_profiles import get_employee_profile
 
-    result = db_query('SELECT role FROM employees WHERE username = ? AND is_active = 1', (username,), fetch_one=True)
-    return result['role'] if result else None
+    profile = get_employee_profile(username=username)
+    return profile.role if profile and profile.is_active else None
 
 
 def has_permission(username: str, required_permission: str) -> bool:
@@ -1,51 +1,300 @@
 """
-Simple in-memory TTL cache for expensive read-only data (dashboard, report summaries).
+In-memory cache for expensive read-only data (dashboard, report summaries, snapshot bookkeeping).
 Reduces repeated DB load when users refresh or switch tabs.
+
+One bounded LRU per process (``CACHE_MAX_ENTRIES``) with per-entry TTLs:
+
+- expired entries are dropped on read and by a periodic sweep on write, and the least recently
+  used entry is evicted when the cache is full;
+- a cached ``None`` is a hit (``get`` takes a ``default`` to tell it from a miss);
+- ``get_or_set`` runs one build per key at a time (concurrent callers wait for it), can serve a
+  stale value for ``stale_seconds`` while one background build refreshes it, and can keep
+  ``None`` results for a shorter ``negative_ttl``;
+- keys live in namespaces that can be invalidated as a whole;
+- hit / miss / eviction counters are reported by ``stats()`` (``GET /api/admin/cache``).
 """
 
+import logging
 import threading
 import time
-from collections.abc import Callable
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
 from typing import Any
 
-_lock = threading.Lock()
-_store: dict = {}  # key -> (value, expiry_ts)
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_SWEEP_INTERVAL_SECONDS = 30.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class TTLCache:
+    """Bounded LRU with TTLs, single-flight builds, stale-while-revalidate and namespaces."""
 
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, int(max_entries))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._store: OrderedDict[tuple[str, Hashable], _Entry] = OrderedDict()
+        self._flights: dict[tuple[str, Hashable], _Flight] = {}
+        self._stats: Counter = Counter()
+        self._namespace_stats: dict[str, Counter] = {}
+        self._last_sweep = clock()
 
-def _now() -> float:
-    return time.monotonic()
+    # --- bookkeeping (callers hold self._lock) -------------------------------------------------
 
+    def _count(self, namespace: str, name: str) -> None:
+        self._stats[name] += 1
+        self._namespace_stats.setdefault(namespace, Counter())[name] += 1
 
-def get(key: str) -> Any | None:
-    """Return cached value if present and not expired, else None."""
-    with _lock:
-        entry = _store.get(key)
+    def _lookup(self, k: tuple[str, Hashable], now: float, serve_stale: bool = True) -> tuple[str | None, Any]:
+        """('fresh' | 'stale' | None, value); counts the hit or miss (a stale entry the caller will not serve is a miss)."""
+        entry = self._store.get(k)
+        if entry is not None and now >= entry.stale_until:
+            del self._store[k]
+            self._stats["expirations"] += 1
+            entry = None
         if entry is None:
-            return None
-        val, expiry = entry
-        if _now() >= expiry:
-            del _store[key]
-            return None
-        return val
+            self._count(k[0], "misses")
+            return None, None
+        self._store.move_to_end(k)
+        if now < entry.expires_at:
+            self._count(k[0], "hits")
+            return "fresh", entry.value
+        self._count(k[0], "stale_hits" if serve_stale else "misses")
+        return "stale", entry.value
+
+    def _sweep(self, now: float) -> None:
+        expired = [k for k, entry in self._store.items() if now >= entry.stale_until]
+        for k in expired:
+            del self._store[k]
+        self._stats["expirations"] += len(expired)
+        self._last_sweep = now
+
+    # --- plain access --------------------------------------------------------------------------
+
+    def get(self, key: Hashable, default: Any = None, namespace: str = "") -> Any:
+        """Cached value (fresh only), or ``default``."""
+        with self._lock:
+            state, value = self._lookup((namespace, key), self._clock(), serve_stale=False)
+        return value if state == "fresh" else default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float, namespace: str = "", stale_seconds: float = 0.0) -> None:
+        now = self._clock()
+        k = (namespace, key)
+        with self._lock:
+            if now - self._last_sweep >= _SWEEP_INTERVAL_SECONDS:
+                self._sweep(now)
+            self._store[k] = _Entry(value, now + ttl_seconds, now + ttl_seconds + max(0.0, stale_seconds))
+            self._store.move_to_end(k)
+            while len(self._store) > self.max_entries:
+                evicted, _ = self._store.popitem(last=False)
+                self._count(evicted[0], "evictions")
+
+    def delete(self, key: Hashable, namespace: str = "") -> bool:
+        with self._lock:
+            return self._store.pop((namespace, key), None) is not None
+
+    def invalidate(self, namespace: str) -> int:
+        """Drop every entry in ``namespace``; returns how many were removed."""
+        with self._lock:
+            keys = [k for k in self._store if k[0] == namespace]
+            for k in keys:
+                del self._store[k]
+            self._count(namespace, "invalidations")
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries and counters."""
+        with self._lock:
+            self._store.clear()
+            self._stats.clear()
+            self._namespace_stats.clear()
+
+    # --- builds --------------------------------------------------------------------------------
+
+    def single_flight(self, key: Hashable, fn: Callable[[], Any], namespace: str = "") -> Any:
+        """
+        Run ``fn`` once for concurrent callers with the same key: the first caller builds, the
+        others wait and receive its result (or exception). Nothing is cached.
+        """
+        k = (namespace, key)
+        with self._lock:
+            flight = self._flights.get(k)
+            leader = flight is None
+            if leader:
+                flight = self._flights[k] = _Flight()
+            else:
+                self._count(namespace, "coalesced")
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = fn()
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(k, None)
+            flight.done.set()
+
+    def _build(self, k, builder, ttl_seconds, stale_seconds, negative_ttl) -> Any:
+        with self._lock:
+            self._count(k[0], "builds")
+        try:
+            value = builder()
+        except Exception:
+            with self._lock:
+                self._count(k[0], "build_errors")
+            raise
+        ttl = negative_ttl if value is None and negative_ttl is not None else ttl_seconds
+        if ttl > 0:
+            self.set(k[1], value, ttl, namespace=k[0], stale_seconds=stale_seconds)
+        return value
 
+    def _build_unless_fresh(self, k, builder, ttl_seconds, stale_seconds, negative_ttl) -> Any:
+        # A caller that waited on another build may find the value already stored.
+        with self._lock:
+            entry = self._store.get(k)
+            if entry is not None and self._clock() < entry.expires_at:
+                return entry.value
+        return self._build(k, builder, ttl_seconds, stale_seconds, negative_ttl)
 
-def set(key: str, value: Any, ttl_seconds: float) -> None:
+    def _refresh_in_background(self, k, builder, ttl_seconds, stale_seconds, negative_ttl) -> None:
+        with self._lock:
+            if k in self._flights:
+                return
+
+        def run():
+            try:
+                self.single_flight(
+                    k[1],
+                    lambda: self._build_unless_fresh(k, builder, ttl_seconds, stale_seconds, negative_ttl),
+                    namespace=k[0],
+                )
+            except Exception:
+                logger.warning("Background cache refresh failed for %s", k, exc_info=True)
+
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        builder: Callable[[], Any],
+        ttl_seconds: float,
+        namespace: str = "",
+        stale_seconds: float = 0.0,
+        negative_ttl: float | None = None,
+    ) -> Any:
+        """
+        Return the cached value or build it (once across concurrent callers) and cache it.
+
+        ``stale_seconds``: after the TTL, keep serving the old value for this long while a single
+        background build refreshes it (the builder must not depend on the caller's connection).
+        ``negative_ttl``: TTL used instead of ``ttl_seconds`` when the builder returns ``None``.
+        """
+        k = (namespace, key)
+        with self._lock:
+            state, value = self._lookup(k, self._clock())
+        if state == "fresh":
+            return value
+        if state == "stale":
+            self._refresh_in_background(k, builder, ttl_seconds, stale_seconds, negative_ttl)
+            return value
+        return self.single_flight(
+            key,
+            lambda: self._build_unless_fresh(k, builder, ttl_seconds, stale_seconds, negative_ttl),
+            namespace=namespace,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            sizes = Counter(k[0] for k in self._store)
+            totals = dict(self._stats)
+            namespaces = {
+                ns or "(default)": {**dict(counts), "entries": sizes.get(ns, 0)}
+                for ns, counts in sorted(self._namespace_stats.items())
+            }
+            for ns, size in sizes.items():
+                namespaces.setdefault(ns or "(default)", {"entries": size})
+            in_flight = len(self._flights)
+        lookups = totals.get("hits", 0) + totals.get("stale_hits", 0) + totals.get("misses", 0)
+        return {
+            "entries": sum(sizes.values()),
+            "max_entries": self.max_entries,
+            "in_flight": in_flight,
+            "hit_ratio": round((totals.get("hits", 0) + totals.get("stale_hits", 0)) / lookups, 4) if lookups else None,
+            **{name: totals.get(name, 0) for name in (
+                "hits", "stale_hits", "misses", "builds", "build_errors", "coalesced",
+                "evictions", "expirations", "invalidations",
+            )},
+            "namespaces": namespaces,
+        }
+
+
+_cache = TTLCache(max_entries=Config.CACHE_MAX_ENTRIES)
+
+
+def get(key: Hashable, default: Any = None, namespace: str = "") -> Any:
+    """Return cached value if present and not expired, else ``default``."""
+    return _cache.get(key, default, namespace)
+
+
+def set(key: Hashable, value: Any, ttl_seconds: float, namespace: str = "", stale_seconds: float = 0.0) -> None:
     """Store value with TTL in seconds."""
-    with _lock:
-        _store[key] = (value, _now() + ttl_seconds)
+    _cache.set(key, value, ttl_seconds, namespace, stale_seconds)
+
+
+def get_or_set(
+    key: Hashable,
+    builder: Callable[[], Any],
+    ttl_seconds: float,
+    namespace: str = "",
+    stale_seconds: float = 0.0,
+    negative_ttl: float | None = None,
+) -> Any:
+    """Return cached value or call builder() once (see ``TTLCache.get_or_set``), cache and return it."""
+    return _cache.get_or_set(key, builder, ttl_seconds, namespace, stale_seconds, negative_ttl)
+
+
+def single_flight(key: Hashable, fn: Callable[[], Any], namespace: str = "") -> Any:
+    """Run ``fn`` once for concurrent callers with the same key (result not cached)."""
+    return _cache.single_flight(key, fn, namespace)
+
+
+def delete(key: Hashable, namespace: str = "") -> bool:
+    return _cache.delete(key, namespace)
+
+
+def invalidate(namespace: str) -> int:
+    """Drop every entry in ``namespace`` (e.g. after a write that affects all of its keys)."""
+    return _cache.invalidate(namespace)
 
 
-def get_or_set(key: str, builder: Callable[[], Any], ttl_seconds: float) -> Any:
-    """Return cached value or call builder(), cache and return. Builder must be side-effect free for caching."""
-    val = get(key)
-    if val is not None:
-        return val
-    val = builder()
-    set(key, val, ttl_seconds)
-    return val
+def stats() -> dict[str, Any]:
+    """Hit / miss / eviction counters and sizes for this worker process."""
+    return _cache.stats()
 
 
 def clear() -> None:
-    """Clear all cached entries (e.g. for tests)."""
-    with _lock:
-        _store.clear()
+    """Clear all cached entries and counters (e.g. for tests)."""
+    _cache.clear()
@@ -0,0 +1,277 @@
+"""
+Per-process SQLite connection pool used by ``db_utils.get_db()``.
+
+- Separate reader and writer pools so polling reads never queue behind writers.
+- New connections are tuned once (WAL, synchronous, cache/mmap size, busy timeout)
+  and keep a larger prepared-statement cache for the life of the connection.
+- ``conn.close()`` hands the connection back to its pool (any open transaction is
+  rolled back first), so existing ``try/finally: conn.close()`` call sites are pooled
+  without changes.
+- The pool is a reuse cache, not a concurrency limit: checkout never blocks and
+  opens a new connection whenever no idle one is available; ``DB_POOL_MAX_IDLE``
+  only caps how many idle connections are kept for reuse.
+- Counters for checkouts, reuse and SQLITE_BUSY retries are exposed via
+  ``pool_metrics()``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any
+
+from config import Config
+
+from app.utils.sql_instrumentation import InstrumentedConnection
+
+LOGGER = logging.getLogger(__name__)
+
+READER = "reader"
+WRITER = "writer"
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+_pools_lock = threading.Lock()
+_pools: dict[tuple[str, str], ConnectionPool] = {}
+# Connections inherited across fork() belong to the parent; keep references so they are never closed here.
+_parent_pools: list[ConnectionPool] = []
+
+_metrics_lock = threading.Lock()
+_metrics: dict[str, Any] = {}
+
+
+def _reset_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+        for role in (READER, WRITER):
+            _metrics[role] = {
+                "checkouts": 0,
+                "reused": 0,
+                "opened": 0,
+                "discarded": 0,
+            }
+        _metrics["busy_retries"] = {}
+        _metrics["busy_exhausted"] = {}
+
+
+_reset_metrics()
+
+
+def _file_identity(path: str) -> tuple[int, int] | None:
+    """(device, inode) of the database file; changes when a restore replaces the file."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+def _pragma_choice(value: Any, allowed: set[str], default: str) -> str:
+    text = str(value or "").strip().upper()
+    return text if text in allowed else default
+
+
+class PooledConnection(InstrumentedConnection):
+    """sqlite3 connection whose ``close()`` returns it to the owning pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: ConnectionPool | None = None
+        self._checked_out = False
+
+    def close(self) -> None:
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        if not self._checked_out:
+            # Double close: the connection is already back in the pool.
+            return
+        self._checked_out = False
+        pool.release(self)
+
+    def discard(self) -> None:
+        """Really close the underlying sqlite3 handle."""
+        self._pool = None
+        self._checked_out = False
+        try:
+            super().close()
+        except sqlite3.Error as exc:
+            LOGGER.debug("Pooled connection close failed: %s", exc)
+
+
+def _open_connection(path: str) -> PooledConnection:
+    busy_timeout_ms = max(0, int(getattr(Config, "DB_BUSY_TIMEOUT_MS", 5000)))
+    conn = sqlite3.connect(
+        path,
+        timeout=busy_timeout_ms / 1000.0,
+        check_same_thread=False,
+        cached_statements=max(0, int(getattr(Config, "DB_STATEMENT_CACHE_SIZE", 256))),
+        factory=PooledConnection,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    journal_mode = _pragma_choice(getattr(Config, "DB_JOURNAL_MODE", "WAL"), _JOURNAL_MODES, "WAL")
+    try:
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    except sqlite3.OperationalError as exc:
+        # Another process may hold a lock while the file is first switched to WAL; it is persistent.
+        LOGGER.debug("journal_mode=%s not applied: %s", journal_mode, exc)
+    synchronous = _pragma_choice(getattr(Config, "DB_SYNCHRONOUS", "NORMAL"), _SYNCHRONOUS_MODES, "NORMAL")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    cache_kb = int(getattr(Config, "DB_CACHE_SIZE_KB", 16384))
+    if cache_kb > 0:
+        conn.execute(f"PRAGMA cache_size = -{cache_kb}")
+    mmap_size = int(getattr(Config, "DB_MMAP_SIZE", 0))
+    if mmap_size >= 0:
+        conn.execute(f"PRAGMA mmap_size = {mmap_size}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+class ConnectionPool:
+    """LIFO stack of idle connections for one database file and role.
+
+    Checkout never waits: an empty stack means a freshly opened connection.
+    """
+
+    def __init__(self, path: str, role: str, max_idle: int):
+        self.path = path
+        self.role = role
+        self.max_idle = max(0, int(max_idle))
+        self._idle: list[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._file_id = _file_identity(path)
+
+    def checkout(self) -> PooledConnection:
+        file_id = _file_identity(self.path)
+        conn: PooledConnection | None = None
+        stale: list[PooledConnection] = []
+        with self._lock:
+            if file_id != self._file_id:
+                stale, self._idle = self._idle, []
+                self._file_id = file_id
+            elif self._idle:
+                conn = self._idle.pop()
+        for old in stale:
+            old.discard()
+        reused = conn is not None
+        if conn is None:
+            conn = _open_connection(self.path)
+            conn._pool = self
+        conn._checked_out = True
+        _record_checkout(self.role, reused=reused, discarded=len(stale))
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error as exc:
+            LOGGER.debug("Discarding pooled connection after reset failure: %s", exc)
+            conn.discard()
+            _record_discard(self.role)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.discard()
+        _record_discard(self.role)
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+
+def _pool_for(role: str) -> ConnectionPool:
+    path = Config.DATABASE_PATH
+    key = (path, role)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(path, role, getattr(Config, "DB_POOL_MAX_IDLE", 8))
+            _pools[key] = pool
+        return pool
+
+
+def checkout(role: str = WRITER) -> sqlite3.Connection:
+    """Borrow a tuned connection for ``Config.DATABASE_PATH``; ``close()`` returns it."""
+    return _pool_for(READER if role == READER else WRITER).checkout()
+
+
+def close_all_pools() -> None:
+    """Close every idle pooled connection (tests, restores, shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def _forget_parent_pools() -> None:
+    with _pools_lock:
+        _parent_pools.extend(_pools.values())
+        _pools.clear()
+    _reset_metrics()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_parent_pools)
+
+
+def _record_checkout(role: str, *, reused: bool, discarded: int) -> None:
+    with _metrics_lock:
+        m = _metrics[role]
+        m["checkouts"] += 1
+        if reused:
+            m["reused"] += 1
+        else:
+            m["opened"] += 1
+        m["discarded"] += discarded
+
+
+def _record_discard(role: str) -> None:
+    with _metrics_lock:
+        _metrics[role]["discarded"] += 1
+
+
+def record_busy_retry(op_name: str, *, exhausted: bool = False) -> None:
+    """Count one SQLITE_BUSY retry (or final give-up) for ``op_name``."""
+    key = "busy_exhausted" if exhausted else "busy_retries"
+    with _metrics_lock:
+        counts = _metrics[key]
+        counts[op_name] = counts.get(op_name, 0) + 1
+
+
+def pool_metrics() -> dict[str, Any]:
+    """Snapshot of pool counters for this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    idle: dict[str, int] = {READER: 0, WRITER: 0}
+    for pool in pools:
+        idle[pool.role] = idle.get(pool.role, 0) + pool.idle_count()
+    with _metrics_lock:
+        out: dict[str, Any] = {"pid": os.getpid()}
+        for role in (READER, WRITER):
+            m = dict(_metrics[role])
+            m["idle"] = idle.get(role, 0)
+            out[role] = m
+        out["busy_retries"] = dict(_metrics["busy_retries"])
+        out["busy_exhausted"] = dict(_metrics["busy_exhausted"])
+    return out
+
+
+def reset_pool_metrics() -> None:
+    """Zero counters (tests)."""
+    _reset_metrics()
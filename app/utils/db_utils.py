@@ -2,6 +2,7 @@
 Database utility functions for blueprints to import.
 
 This module provides:
+- Pooled connections (see ``app.utils.db_pool``) behind ``get_db()`` / ``get_read_db()``
 - Context managers for safe database connections
 - Query execution helpers
 - Repository pattern classes for common entities
@@ -16,6 +17,9 @@ from typing import Any
 
 from config import Config
 
+from app.utils import db_pool
+from app.utils.sql_instrumentation import InstrumentedConnection
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -39,14 +43,32 @@ def _safe_close(conn: sqlite3.Connection | None) -> None:
         LOGGER.debug("Connection close failed: %s", exc)
 
 
-def get_db() -> sqlite3.Connection:
-    """Get a database connection with Row factory"""
-    conn = sqlite3.connect(Config.DATABASE_PATH)
+def _connect_unpooled() -> sqlite3.Connection:
+    conn = sqlite3.connect(Config.DATABASE_PATH, factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
     conn.execute('PRAGMA foreign_keys = ON')
     return conn
 
 
+def get_db() -> sqlite3.Connection:
+    """
+    Get a (writer pool) database connection with Row factory.
+
+    ``conn.close()`` returns the connection to the per-process pool; uncommitted
+    work is rolled back exactly as a real close would.
+    """
+    if not Config.DB_POOL_ENABLED:
+        return _connect_unpooled()
+    return db_pool.checkout(db_pool.WRITER)
+
+
+def get_read_db() -> sqlite3.Connection:
+    """Get a connection from the reader pool for request paths that never write."""
+    if not Config.DB_POOL_ENABLED:
+        return _connect_unpooled()
+    return db_pool.checkout(db_pool.READER)
+
+
 @contextmanager
 def db_connection(read_only: bool = False) -> Iterator[sqlite3.Connection]:
     """
@@ -109,7 +131,7 @@ def db_read_only() -> Iterator[sqlite3.Connection]:
     """
     conn = None
     try:
-        conn = get_db()
+        conn = get_read_db()
         yield conn
     finally:
         _safe_close(conn)
@@ -129,7 +151,7 @@ def db_query(query: str, params: tuple | None = None, fetch_one: bool = False) -
     """
     conn = None
     try:
-        conn = get_db()
+        conn = get_read_db()
         if params:
             result = conn.execute(query, params)
         else:
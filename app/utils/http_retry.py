@@ -0,0 +1,100 @@
+"""
+Pooled ``requests`` session with rate-limit-aware retries, shared by the outbound API clients
+(Zoho Inventory, UPS / FedEx tracking).
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Container
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, retry_after: str | None = None) -> float:
+    """Seconds before retry ``attempt + 1``: a valid Retry-After, else jittered exponential backoff; capped at ``maximum``."""
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), maximum)
+        except ValueError:
+            pass
+    delay = base * (2**attempt)
+    return min(delay + random.uniform(0, delay), maximum)
+
+
+class RetryingSession:
+    """Keep-alive session built on first use (pool sized for ``pool_size`` threads) plus a retry loop."""
+
+    def __init__(
+        self,
+        label: str,
+        *,
+        pool_size: int,
+        max_retries: int,
+        backoff_base: float,
+        max_backoff: float,
+        session: requests.Session | None = None,
+    ) -> None:
+        self.label = label
+        self.pool_size = pool_size
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = max(0.0, backoff_base)
+        self.max_backoff = max_backoff
+        self._session = session
+        self._lock = threading.Lock()
+
+    def http(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(self.pool_size, 4))
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def backoff_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        return backoff_delay(attempt, self.backoff_base, self.max_backoff, retry_after)
+
+    def send(
+        self,
+        method: str,
+        url: str,
+        *,
+        retry_status: Callable[[str, int], bool],
+        retry_errors_for: Container[str] = (),
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        One HTTP call with up to ``max_retries`` retries.
+
+        A response is retried when ``retry_status(method, status)`` is true, honouring Retry-After;
+        timeouts and connection errors are retried only for methods in ``retry_errors_for``.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.http().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if method not in retry_errors_for or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning("%s %s %s failed (%s); retry %s in %.1fs", self.label, method, url, e, attempt + 1, delay)
+            else:
+                status = response.status_code
+                if not retry_status(method, status) or attempt >= self.max_retries:
+                    return response
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    "%s %s %s returned HTTP %s; retry %s in %.1fs", self.label, method, url, status, attempt + 1, delay
+                )
+            attempt += 1
+            time.sleep(delay)
@@ -4,6 +4,8 @@ Lightweight performance instrumentation for baseline and post-refactor compariso
 - Request-level timing (path, duration_ms) for dashboard and API routes.
 - Optional query-level timing for heavy SQL blocks.
 - Server-Timing response header when enabled for frontend visibility.
+- Per-request SQL totals (see ``app.utils.sql_instrumentation``) in the request log line and as
+  ``db`` / ``db-count`` / ``render`` Server-Timing entries (tracked paths, when enabled).
 """
 
 import logging
@@ -11,6 +13,8 @@ import time
 from collections.abc import Callable
 from contextlib import contextmanager
 
+from app.utils.sql_instrumentation import server_timing_entries
+
 logger = logging.getLogger(__name__)
 
 # Paths we care about for baseline (dashboard + report APIs)
@@ -53,11 +57,20 @@ def _perf_enabled(app) -> bool:
     return bool(app.config.get("PERF_LOGGING", app.config.get("DEBUG", False)))
 
 
-def log_request_duration(path: str, duration_ms: float, app) -> None:
-    """Log request duration for tracked paths. Call from after_request."""
+def log_request_duration(path: str, duration_ms: float, app, sql_stats=None) -> None:
+    """Log request duration (and SQL totals when instrumented) for tracked paths. Call from after_request."""
     if not should_log_perf(path) or not _perf_enabled(app):
         return
-    app.logger.info("perf_request path=%s duration_ms=%.2f", path, duration_ms)
+    if sql_stats is None:
+        app.logger.info("perf_request path=%s duration_ms=%.2f", path, duration_ms)
+        return
+    app.logger.info(
+        "perf_request path=%s duration_ms=%.2f db_ms=%.2f db_count=%d",
+        path,
+        duration_ms,
+        sql_stats.total_ms,
+        sql_stats.count,
+    )
 
 
 def add_server_timing_header(response, path: str, duration_ms: float, app) -> None:
@@ -66,3 +79,12 @@ def add_server_timing_header(response, path: str, duration_ms: float, app) -> No
         return
     # Server-Timing: total;dur=123.45
     response.headers.setdefault("Server-Timing", f"total;dur={duration_ms:.2f}")
+
+
+def add_sql_server_timing(response, path: str, duration_ms: float, sql_stats, app) -> None:
+    """Prepend db / db-count / render entries to Server-Timing (same gate as the total). Call from after_request."""
+    if not should_log_perf(path) or not _perf_enabled(app):
+        return
+    entries = server_timing_entries(sql_stats, duration_ms)
+    entries.append(response.headers.get("Server-Timing") or f"total;dur={duration_ms:.2f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
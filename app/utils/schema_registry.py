@@ -0,0 +1,66 @@
+"""
+Per-process catalog of tables and their columns.
+
+Request paths that adapt to optional columns (older databases) ask this registry instead of
+running ``PRAGMA table_info`` each time. The whole catalog is loaded in one query per database and
+kept while ``PRAGMA schema_version`` is unchanged; any DDL (a migration, an ``ALTER TABLE`` from
+another worker) bumps the version, and the next lookup reloads.
+
+DDL itself belongs in ``MigrationRunner``; request code only reads the catalog.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+_lock = threading.Lock()
+# database file -> (schema_version, {table: frozenset(columns)})
+_catalogs: dict[str, tuple[int, dict[str, frozenset[str]]]] = {}
+
+_STAMP_SQL = (
+    "SELECT (SELECT file FROM pragma_database_list WHERE name = 'main'),"
+    " (SELECT schema_version FROM pragma_schema_version)"
+)
+_CATALOG_SQL = """
+    SELECT m.name, p.name
+    FROM sqlite_master m
+    JOIN pragma_table_info(m.name) p
+    WHERE m.type IN ('table', 'view')
+"""
+
+
+def _catalog(conn: sqlite3.Connection) -> dict[str, frozenset[str]]:
+    row = conn.execute(_STAMP_SQL).fetchone()
+    # In-memory databases have no file name; they are cached per connection.
+    key = row[0] or f":memory:{id(conn)}"
+    version = int(row[1])
+    cached = _catalogs.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    columns: dict[str, set[str]] = {}
+    for table, column in conn.execute(_CATALOG_SQL).fetchall():
+        columns.setdefault(str(table), set()).add(str(column))
+    catalog = {table: frozenset(cols) for table, cols in columns.items()}
+    with _lock:
+        _catalogs[key] = (version, catalog)
+    return catalog
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> frozenset[str]:
+    """Column names of ``table`` (empty when it does not exist)."""
+    return _catalog(conn).get(table, frozenset())
+
+
+def has_table(conn: sqlite3.Connection, table: str) -> bool:
+    return table in _catalog(conn)
+
+
+def has_column(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    return column in _catalog(conn).get(table, frozenset())
+
+
+def clear_schema_registry() -> None:
+    """Forget every cached catalog (tests)."""
+    with _lock:
+        _catalogs.clear()
@@ -0,0 +1,29 @@
+"""
+Long-lived process pools for CPU-bound work off the request threads (bag check totals, report jobs).
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+class SpawnPool:
+    """Lazily created spawn pool (fork is unsafe under a threaded server); resized only if ``workers`` changes."""
+
+    def __init__(self) -> None:
+        self._pool: ProcessPoolExecutor | None = None
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def get(self, workers: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+                self._workers = workers
+                atexit.register(self._pool.shutdown, wait=False)
+            return self._pool
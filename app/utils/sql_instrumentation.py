@@ -0,0 +1,238 @@
+"""
+Per-request SQL instrumentation at the connection layer.
+
+Every connection handed out by ``db_utils.get_db()`` / ``get_read_db()`` (pooled or not) is an
+``InstrumentedConnection`` whose cursors time ``execute`` / ``executemany`` / ``executescript`` and
+``fetchone`` / ``fetchmany`` / ``fetchall``. While a request is active (``begin_request`` in
+``before_request``) the timings are added to that request's ``SqlRequestStats``:
+
+- query count and time, reported as ``Server-Timing`` entries (``db``, ``db-count``, ``render``);
+- statements slower than ``SQL_SLOW_QUERY_MS`` are logged once per request with their
+  ``EXPLAIN QUERY PLAN`` (plans are cached per normalized statement for a while);
+- normalized statements executed ``SQL_N_PLUS_ONE_THRESHOLD`` or more times in one request are
+  logged as likely N+1 loops.
+
+Outside a request (scripts, background threads) the hooks cost one context-variable lookup.
+Rows consumed by iterating a cursor (``for row in cur``) are not timed; ``execute`` (which runs
+the statement to its first row) and the ``fetch*`` calls are.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import Config
+
+from app.utils import cache_utils
+
+LOGGER = logging.getLogger(__name__)
+
+_EXPLAIN_NAMESPACE = "sql_explain"
+_EXPLAIN_TTL_SECONDS = 600.0
+_MAX_LOGGED_SQL = 2000
+
+_current: ContextVar[SqlRequestStats | None] = ContextVar("sql_request_stats", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape for grouping: literals -> ``?``, ``IN (?, ?, ...)`` -> ``(?...)``, one-line."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _IN_LIST.sub("(?...)", text)
+
+
+@dataclass
+class SqlRequestStats:
+    """Counters for one request."""
+
+    label: str = ""
+    count: int = 0
+    total_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    statement_ms: Counter = field(default_factory=Counter)
+    slow: list[tuple[str, float]] = field(default_factory=list)
+
+    def n_plus_one(self, threshold: int) -> list[tuple[str, int, float]]:
+        """(statement, executions, total ms) for repeated statements, most frequent first."""
+        return [
+            (sql, n, self.statement_ms[sql])
+            for sql, n in self.statements.most_common()
+            if n >= threshold and not sql.upper().startswith(("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"))
+        ]
+
+
+def begin_request(label: str = "") -> Token:
+    return _current.set(SqlRequestStats(label=label))
+
+
+def current_stats() -> SqlRequestStats | None:
+    return _current.get()
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params: Any) -> str:
+    key = normalize_sql(sql)
+    cached = cache_utils.get(key, namespace=_EXPLAIN_NAMESPACE)
+    if cached is not None:
+        return cached
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        plan = "; ".join(str(row[-1]) for row in rows) or "(no plan)"
+    except sqlite3.Error as exc:
+        plan = f"(explain failed: {exc})"
+    cache_utils.set(key, plan, _EXPLAIN_TTL_SECONDS, namespace=_EXPLAIN_NAMESPACE)
+    return plan
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that adds its statement time to the active request's stats."""
+
+    _stats: SqlRequestStats | None = None
+    _key = ""
+    _sql = ""
+    _params: Any = ()
+    _elapsed = 0.0
+    _slow_logged = False
+
+    def _start(self, sql: str, params: Any) -> SqlRequestStats | None:
+        stats = _current.get()
+        self._stats = stats
+        if stats is not None:
+            self._key = normalize_sql(sql)
+            self._sql, self._params = sql, params
+            self._elapsed = 0.0
+            self._slow_logged = False
+            stats.count += 1
+            stats.statements[self._key] += 1
+        return stats
+
+    def _record(self, stats: SqlRequestStats, elapsed_ms: float, explain: bool = True) -> None:
+        stats.total_ms += elapsed_ms
+        stats.statement_ms[self._key] += elapsed_ms
+        self._elapsed += elapsed_ms
+        threshold = float(Config.SQL_SLOW_QUERY_MS)
+        if self._slow_logged or threshold <= 0 or self._elapsed < threshold:
+            return
+        self._slow_logged = True
+        stats.slow.append((self._key, self._elapsed))
+        plan = _explain(self.connection, self._sql, self._params) if explain else "(script)"
+        LOGGER.warning(
+            "slow_sql %.1f ms path=%s sql=%s plan=%s",
+            self._elapsed,
+            stats.label,
+            self._key[:_MAX_LOGGED_SQL],
+            plan,
+        )
+
+    def execute(self, sql, parameters=(), /):
+        stats = self._start(sql, parameters)
+        if stats is None:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        stats = self._start(sql, ())
+        if stats is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000, explain=False)
+
+    def executescript(self, sql_script, /):
+        stats = self._start(sql_script, ())
+        if stats is None:
+            return super().executescript(sql_script)
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000, explain=False)
+
+    def fetchone(self):
+        stats = self._stats
+        if stats is None:
+            return super().fetchone()
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000)
+
+    def fetchmany(self, size=None):
+        stats = self._stats
+        size = self.arraysize if size is None else size
+        if stats is None:
+            return super().fetchmany(size)
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(size)
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000)
+
+    def fetchall(self):
+        stats = self._stats
+        if stats is None:
+            return super().fetchall()
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._record(stats, (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including ``conn.execute``) are ``InstrumentedCursor``."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self.cursor().executescript(sql_script)
+
+
+def server_timing_entries(stats: SqlRequestStats, total_ms: float) -> list[str]:
+    """``Server-Timing`` entries for a finished request: db time, query count, time outside SQL."""
+    return [
+        f"db;dur={stats.total_ms:.2f}",
+        f'db-count;desc="{stats.count}"',
+        f"render;dur={max(total_ms - stats.total_ms, 0.0):.2f}",
+    ]
+
+
+def report_request(stats: SqlRequestStats) -> None:
+    """Log likely N+1 statements for a finished request."""
+    threshold = int(Config.SQL_N_PLUS_ONE_THRESHOLD)
+    if threshold <= 1:
+        return
+    for sql, executions, ms in stats.n_plus_one(threshold):
+        LOGGER.warning(
+            "sql_n_plus_one path=%s executions=%d total_ms=%.1f sql=%s", stats.label, executions, ms, sql[:_MAX_LOGGED_SQL]
+        )
@@ -91,6 +91,22 @@ class Config:
     )
     ZOHO_SERVICE_EXTRA_HEADERS = _parse_zoho_service_extra_headers()
 
+    # PO sync: list page size, concurrent detail fetches, and retry/backoff for 429 and transient errors.
+    # The incremental cursor is rewound by the overlap so POs edited while a sync runs are re-listed.
+    ZOHO_SYNC_PAGE_SIZE = _env_int("ZOHO_SYNC_PAGE_SIZE", 200)
+    ZOHO_SYNC_WORKERS = _env_int("ZOHO_SYNC_WORKERS", 4)
+    ZOHO_MAX_RETRIES = _env_int("ZOHO_MAX_RETRIES", 4)
+    ZOHO_BACKOFF_BASE_MS = _env_int("ZOHO_BACKOFF_BASE_MS", 1000)
+    ZOHO_SYNC_CURSOR_OVERLAP_SECONDS = _env_int("ZOHO_SYNC_CURSOR_OVERLAP_SECONDS", 300)
+    # Bag receive pushes go through the zoho_push_jobs table, retrying Zoho read/rate-limit failures with
+    # backoff. Off (the default), the push request runs its PO's due jobs inline; on, a worker thread per
+    # app worker pushes them. Only turn it on where app threads run (the Docker image's gthread workers
+    # set it) -- on synchronous uWSGI workers (PythonAnywhere) jobs would stay queued. See docs/DEPLOYMENT.md.
+    # A push still running after the claim timeout is failed (Zoho may already hold the receive).
+    ZOHO_PUSH_WORKER = _env_flag("ZOHO_PUSH_WORKER", False)
+    ZOHO_PUSH_MAX_ATTEMPTS = _env_int("ZOHO_PUSH_MAX_ATTEMPTS", 5)
+    ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS = _env_int("ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS", 900)
+
     # Reverse proxy (nginx): trust X-Forwarded-*; optional subpath via X-Forwarded-Prefix
     BEHIND_PROXY = _env_flag("BEHIND_PROXY")
     TRUSTED_PROXY_COUNT = _env_int("TRUSTED_PROXY_COUNT", 1)
@@ -110,6 +126,14 @@ class Config:
     FEDEX_ACCOUNT_NUMBER = os.environ.get('FEDEX_ACCOUNT_NUMBER')
     FEDEX_BASE = os.environ.get('FEDEX_BASE', 'https://apis.fedex.com')
 
+    # Scheduled tracking refresh (scripts/tracking_job.py): shipments per run, UPS lookups in flight,
+    # FedEx numbers per Track request (max 30), and retries / backoff base on HTTP 429 / 503.
+    TRACKING_REFRESH_LIMIT = _env_int("TRACKING_REFRESH_LIMIT", 200)
+    TRACKING_UPS_CONCURRENCY = _env_int("TRACKING_UPS_CONCURRENCY", 4)
+    TRACKING_FEDEX_BATCH_SIZE = _env_int("TRACKING_FEDEX_BATCH_SIZE", 30)
+    TRACKING_MAX_RETRIES = _env_int("TRACKING_MAX_RETRIES", 3)
+    TRACKING_BACKOFF_BASE_MS = _env_int("TRACKING_BACKOFF_BASE_MS", 1000)
+
     # Telegram bot settings
     TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "").strip()
     TELEGRAM_ALLOWED_CHAT_IDS = _parse_int_list_env("TELEGRAM_ALLOWED_CHAT_IDS")
@@ -119,6 +143,15 @@ class Config:
     # Optional TELEGRAM_WEBHOOK_PATH_SECRET: random path segment instead of putting TELEGRAM_BOT_TOKEN in the URL.
     TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "").strip()
     TELEGRAM_WEBHOOK_PATH_SECRET = os.environ.get("TELEGRAM_WEBHOOK_PATH_SECRET", "").strip()
+    # Webhook replies go through the telegram_outbox table, retrying failed sends with backoff. Off (the
+    # default), the webhook request drains it inline; on, a sender thread per app worker does. Only turn it
+    # on where app threads run (the Docker image's gthread workers set it) -- synchronous uWSGI workers on
+    # PythonAnywhere never run them, so replies would sit in the outbox. See docs/DEPLOYMENT.md.
+    TELEGRAM_OUTBOX_WORKER = _env_flag("TELEGRAM_OUTBOX_WORKER", False)
+    TELEGRAM_OUTBOX_MAX_ATTEMPTS = _env_int("TELEGRAM_OUTBOX_MAX_ATTEMPTS", 6)
+    TELEGRAM_OUTBOX_CLAIM_TIMEOUT_SECONDS = _env_int("TELEGRAM_OUTBOX_CLAIM_TIMEOUT_SECONDS", 120)
+    # /daily summaries are cached per day and submission data version (today's partial day: <= 60 s).
+    TELEGRAM_DAILY_SUMMARY_CACHE_SECONDS = _env_int("TELEGRAM_DAILY_SUMMARY_CACHE_SECONDS", 600)
 
     # Database (set DATABASE_PATH in Docker to a mounted volume, e.g. /data/tablet_counter.db)
     _config_dir = os.path.dirname(os.path.abspath(__file__))
@@ -142,9 +175,81 @@ class Config:
     ENV = os.environ.get('FLASK_ENV', 'development')
     TESTING = False
 
+    # SQLite connection pool + pragmas (per worker process; see app/utils/db_pool.py)
+    DB_POOL_ENABLED = _env_flag("DB_POOL_ENABLED", True)
+    DB_POOL_MAX_IDLE = _env_int("DB_POOL_MAX_IDLE", 8)
+    DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL").strip() or "WAL"
+    DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL").strip() or "NORMAL"
+    DB_CACHE_SIZE_KB = _env_int("DB_CACHE_SIZE_KB", 16384)
+    DB_MMAP_SIZE = _env_int("DB_MMAP_SIZE", 268435456)
+    DB_BUSY_TIMEOUT_MS = _env_int("DB_BUSY_TIMEOUT_MS", 5000)
+    DB_STATEMENT_CACHE_SIZE = _env_int("DB_STATEMENT_CACHE_SIZE", 256)
+
+    # Skip MigrationRunner on boot while the schema fingerprint recorded by its last clean run
+    # matches (same code, same schema). Off = run every migration check on every boot.
+    MIGRATIONS_SKIP_WHEN_CURRENT = _env_flag("MIGRATIONS_SKIP_WHEN_CURRENT", True)
+
+    # In-process LRU cache (app/utils/cache_utils.py): max entries per worker across all namespaces.
+    CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 2048)
+
+    # Ops TV / command-center snapshot cache (file per factory date, shared by all workers)
+    OPS_TV_SNAPSHOT_CACHE_ENABLED = _env_flag("OPS_TV_SNAPSHOT_CACHE_ENABLED", True)
+    OPS_TV_SNAPSHOT_CACHE_DIR = os.environ.get("OPS_TV_SNAPSHOT_CACHE_DIR", "").strip()
+    OPS_TV_SNAPSHOT_MAX_AGE_SECONDS = _env_int("OPS_TV_SNAPSHOT_MAX_AGE_SECONDS", 20)
+    OPS_TV_SNAPSHOT_PAST_MAX_AGE_SECONDS = _env_int("OPS_TV_SNAPSHOT_PAST_MAX_AGE_SECONDS", 600)
+
+    # Server-Sent Events push channel (/command-center/ops-tv/api/stream, /workflow/floor/api/stream).
+    # Each open stream holds a request thread for up to SSE_MAX_STREAM_SECONDS, so streams are off unless
+    # the server runs threaded workers (the Docker image: gunicorn gthread, 8 threads, sets SSE_ENABLED=1).
+    # Keep SSE_MAX_CLIENTS_PER_WORKER well below the thread count; on sync workers (uWSGI on
+    # PythonAnywhere) leave it off -- pages poll instead. See docs/DEPLOYMENT.md.
+    SSE_ENABLED = _env_flag("SSE_ENABLED", False)
+    SSE_POLL_INTERVAL_MS = _env_int("SSE_POLL_INTERVAL_MS", 500)
+    SSE_MAX_CLIENTS_PER_WORKER = _env_int("SSE_MAX_CLIENTS_PER_WORKER", 4)
+    SSE_MAX_STREAM_SECONDS = _env_int("SSE_MAX_STREAM_SECONDS", 300)
+    SSE_RETRY_MS = _env_int("SSE_RETRY_MS", 3000)
+
+    # Offline floor queue replay (/workflow/floor/api/events/batch): max events per batch and how
+    # long idempotency receipts of accepted events are kept.
+    FLOOR_EVENT_BATCH_MAX_EVENTS = _env_int("FLOOR_EVENT_BATCH_MAX_EVENTS", 100)
+    FLOOR_EVENT_RECEIPT_RETENTION_DAYS = _env_int("FLOOR_EVENT_RECEIPT_RETENTION_DAYS", 14)
+
+    # Daily rollups of station / product / operator output (closed days); off = always scan raw events.
+    # Readers that find closed days not yet rolled (or edited) start a refresh on a background thread;
+    # off = only MigrationRunner and scripts/refresh_workflow_rollups.py (cron) roll them.
+    WORKFLOW_ROLLUPS_ENABLED = _env_flag("WORKFLOW_ROLLUPS_ENABLED", True)
+    WORKFLOW_ROLLUPS_BACKGROUND_REFRESH = _env_flag("WORKFLOW_ROLLUPS_BACKGROUND_REFRESH", True)
+
+    # Stage-yield report: processes for the batched per-bag totals (0/1 = in-process; windows of
+    # more than one 500-bag chunk only). Pool workers are spawned once per app worker and reused.
+    STAGE_YIELD_WORKERS = _env_int("STAGE_YIELD_WORKERS", 0)
+
+    # Employee role / language cache used by role_required and the locale selector. Admin edits
+    # invalidate it at once in every worker; this only bounds staleness for out-of-app edits.
+    EMPLOYEE_PROFILE_CACHE_SECONDS = _env_int("EMPLOYEE_PROFILE_CACHE_SECONDS", 300)
+
+    # Background PDF reports (report_jobs queue): render processes per app worker, where finished
+    # PDFs are kept (default: report_cache/ next to the database), how long an unchanged-data result
+    # is reused, when a silent running job is re-queued, and how long results / job rows are kept.
+    # Each render process is a separate spawned interpreter started on the first report, so the
+    # total is REPORT_JOB_WORKERS x gunicorn workers (4 with the Docker image); workers share one
+    # queue, so 1 per app worker already renders up to 4 reports at once.
+    REPORT_JOB_WORKERS = _env_int("REPORT_JOB_WORKERS", 1)
+    REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", "")
+    REPORT_CACHE_MAX_AGE_SECONDS = _env_int("REPORT_CACHE_MAX_AGE_SECONDS", 3600)
+    REPORT_JOB_TIMEOUT_SECONDS = _env_int("REPORT_JOB_TIMEOUT_SECONDS", 600)
+    REPORT_RESULT_RETENTION_SECONDS = _env_int("REPORT_RESULT_RETENTION_SECONDS", 86400)
+
     # Performance baseline logging (request/query timing). Default: same as DEBUG.
     PERF_LOGGING = _env_flag('PERF_LOGGING') or os.environ.get('FLASK_ENV') == 'development'
 
+    # Per-request SQL instrumentation on every get_db()/get_read_db() connection: Server-Timing
+    # db / db-count / render entries (tracked paths with PERF_LOGGING only), slow statements logged with EXPLAIN QUERY PLAN (0 = off),
+    # and a warning when one statement shape runs this many times in a request (0 = off).
+    SQL_INSTRUMENTATION = _env_flag("SQL_INSTRUMENTATION", True)
+    SQL_SLOW_QUERY_MS = _env_int("SQL_SLOW_QUERY_MS", 200)
+    SQL_N_PLUS_ONE_THRESHOLD = _env_int("SQL_N_PLUS_ONE_THRESHOLD", 20)
+
 
 def _validate_self_hosted_zoho():
     """Docker image sets TABLETTRACKER_SELF_HOSTED=1; all Zoho traffic must use the integration service."""
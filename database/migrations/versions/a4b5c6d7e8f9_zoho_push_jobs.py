@@ -0,0 +1,57 @@
+"""zoho_push_jobs: queued bag pushes to Zoho purchase receives
+
+The push route records a job per bag and returns at once; a worker thread per app worker performs
+the pushes, one PO at a time, with retries for Zoho read and rate-limit failures
+(app.services.zoho_push_queue).
+
+Revision ID: a4b5c6d7e8f9
+Revises: z3a4b5c6d7e8
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "a4b5c6d7e8f9"
+down_revision: Union[str, Sequence[str], None] = "z3a4b5c6d7e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS zoho_push_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bag_id INTEGER NOT NULL,
+            po_id INTEGER,
+            custom_notes TEXT,
+            requested_by TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,
+            http_status INTEGER,
+            result TEXT,
+            last_error TEXT,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_zoho_push_jobs_active_bag
+        ON zoho_push_jobs(bag_id) WHERE status IN ('queued', 'running')
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_zoho_push_jobs_status ON zoho_push_jobs(status, next_attempt_at)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_zoho_push_jobs_bag ON zoho_push_jobs(bag_id, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_zoho_push_jobs_bag")
+    op.execute("DROP INDEX IF EXISTS ix_zoho_push_jobs_status")
+    op.execute("DROP INDEX IF EXISTS ux_zoho_push_jobs_active_bag")
+    op.execute("DROP TABLE IF EXISTS zoho_push_jobs")
@@ -0,0 +1,56 @@
+"""workflow_events: fill payload columns in the INSERT, drop the insert trigger
+
+append_workflow_event (the only write path) now sets the p_* columns in its INSERT, so the AFTER
+INSERT trigger that updated each new row is dropped; the UPDATE OF payload trigger stays for repairs.
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "b5c6d7e8f9a0"
+down_revision: Union[str, Sequence[str], None] = "a4b5c6d7e8f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    ("p_count_total", "count_total", "REAL"),
+    ("p_display_count", "display_count", "REAL"),
+    ("p_case_count", "case_count", "REAL"),
+    ("p_loose_display_count", "loose_display_count", "REAL"),
+    ("p_counter_start", "counter_start", "REAL"),
+    ("p_counter_end", "counter_end", "REAL"),
+    ("p_reason", "reason", "TEXT"),
+)
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_workflow_events_payload_columns_ins")
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if not sa.inspect(conn).has_table("workflow_events"):
+        return
+    parts = []
+    for column, key, sql_type in _COLUMNS:
+        value = f"json_extract(NEW.payload, '$.{key}')"
+        if sql_type == "REAL":
+            value = f"CAST({value} AS REAL)"
+        parts.append(f"{column} = CASE WHEN json_valid(NEW.payload) THEN {value} END")
+    assignments = ",\n    ".join(parts)
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_workflow_events_payload_columns_ins
+        AFTER INSERT ON workflow_events
+        BEGIN
+        UPDATE workflow_events SET
+        {assignments}
+        WHERE id = NEW.id;
+        END
+        """
+    )
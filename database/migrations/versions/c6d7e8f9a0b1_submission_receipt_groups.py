@@ -0,0 +1,108 @@
+"""submission_receipt_groups: indexed receipt groups for the submissions list
+
+One row per receipt group and list bucket (tab x archived) with every group sort key, plus a
+per-bucket group count. Maintenance triggers and the backfill are installed by MigrationRunner on
+start (app.services.submission_receipt_groups.ensure_submission_receipt_groups) once every source
+column they reference exists; until then the list aggregates from source rows.
+
+Revision ID: c6d7e8f9a0b1
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "c6d7e8f9a0b1"
+down_revision: Union[str, Sequence[str], None] = "a4b5c6d7e8f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# index name suffix -> key columns (tab, archived, <keys>, last_id)
+_SORT_INDEXES = (
+    ("created", "k_created"),
+    ("receipt_head", "k_receipt_head, k_receipt_tail"),
+    ("total", "k_total"),
+    ("product", "k_product"),
+    ("employee_min", "k_employee_min"),
+    ("employee_max", "k_employee_max"),
+    ("bag_start_asc", "k_bag_start_asc"),
+    ("bag_start_desc", "k_bag_start_desc"),
+    ("bag_end_asc", "k_bag_end_asc"),
+    ("bag_end_desc", "k_bag_end_desc"),
+)
+
+_TRIGGERS = (
+    "trg_receipt_groups_ws_ins",
+    "trg_receipt_groups_ws_upd",
+    "trg_receipt_groups_ws_del",
+    "trg_receipt_groups_po_ins",
+    "trg_receipt_groups_po_upd",
+    "trg_receipt_groups_po_del",
+    "trg_receipt_groups_pd_ins",
+    "trg_receipt_groups_pd_upd",
+    "trg_receipt_groups_pd_del",
+    "trg_receipt_groups_tt_upd",
+    "trg_receipt_groups_machines_upd",
+    "trg_receipt_groups_sbd_ins",
+    "trg_receipt_groups_sbd_upd",
+    "trg_receipt_groups_sbd_del",
+    "trg_receipt_group_counts_ins",
+    "trg_receipt_group_counts_del",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submission_receipt_groups (
+            group_key TEXT NOT NULL,
+            tab TEXT NOT NULL,
+            archived INTEGER NOT NULL,
+            k_created NOT NULL,
+            k_receipt_head NOT NULL,
+            k_receipt_tail NOT NULL,
+            k_total NOT NULL,
+            k_product NOT NULL,
+            k_employee_min NOT NULL,
+            k_employee_max NOT NULL,
+            k_bag_start_asc NOT NULL,
+            k_bag_start_desc NOT NULL,
+            k_bag_end_asc NOT NULL,
+            k_bag_end_desc NOT NULL,
+            last_id INTEGER NOT NULL,
+            PRIMARY KEY (group_key, tab, archived)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS submission_receipt_group_counts (
+            tab TEXT NOT NULL,
+            archived INTEGER NOT NULL,
+            groups INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (tab, archived)
+        )
+        """
+    )
+    for suffix, columns in _SORT_INDEXES:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_srg_{suffix} ON submission_receipt_groups"
+            f"(tab, archived, {columns}, last_id)"
+        )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_ws_receipt_number ON warehouse_submissions(receipt_number)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ws_po_receipt ON warehouse_submissions(assigned_po_id, receipt_number)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_sbd_submission_id ON submission_bag_deductions(submission_id)")
+
+
+def downgrade() -> None:
+    for name in _TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP INDEX IF EXISTS ix_sbd_submission_id")
+    op.execute("DROP INDEX IF EXISTS ix_ws_po_receipt")
+    for suffix, _ in _SORT_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS ix_srg_{suffix}")
+    op.execute("DROP TABLE IF EXISTS submission_receipt_group_counts")
+    op.execute("DROP TABLE IF EXISTS submission_receipt_groups")
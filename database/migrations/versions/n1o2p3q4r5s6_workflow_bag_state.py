@@ -0,0 +1,67 @@
+"""workflow_bag_state / workflow_bag_station_state projection tables
+
+Rows are maintained by append_workflow_event; existing history is backfilled by MigrationRunner on
+first start (or scripts/rebuild_workflow_bag_state.py).
+
+Revision ID: n1o2p3q4r5s6
+Revises: m7n8o9p0q1r2
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "n1o2p3q4r5s6"
+down_revision: Union[str, Sequence[str], None] = "m7n8o9p0q1r2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS workflow_bag_state (
+            workflow_bag_id INTEGER PRIMARY KEY REFERENCES workflow_bags(id) ON DELETE CASCADE,
+            event_count INTEGER NOT NULL DEFAULT 0,
+            event_counts_json TEXT NOT NULL DEFAULT '{}',
+            latest_event_id INTEGER,
+            latest_event_type TEXT,
+            latest_occurred_at INTEGER,
+            active_shortages_json TEXT NOT NULL DEFAULT '{}',
+            updated_at INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS workflow_bag_station_state (
+            workflow_bag_id INTEGER NOT NULL REFERENCES workflow_bags(id) ON DELETE CASCADE,
+            station_id INTEGER NOT NULL,
+            claimed INTEGER NOT NULL DEFAULT 0,
+            session_started_at INTEGER,
+            session_event_id INTEGER,
+            needs_resume INTEGER NOT NULL DEFAULT 0,
+            paused_at INTEGER,
+            pause_reason TEXT,
+            pause_material_type TEXT,
+            hold_reason TEXT,
+            hold_material_type TEXT,
+            lane_completions TEXT NOT NULL DEFAULT '[]',
+            last_event_id INTEGER,
+            last_occurred_at INTEGER,
+            PRIMARY KEY (workflow_bag_id, station_id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_workflow_bag_station_state_session
+        ON workflow_bag_station_state(station_id, session_started_at, session_event_id)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_workflow_bag_station_state_session")
+    op.execute("DROP TABLE IF EXISTS workflow_bag_station_state")
+    op.execute("DROP TABLE IF EXISTS workflow_bag_state")
@@ -0,0 +1,89 @@
+"""typed hot payload columns + composite indexes on workflow_events
+
+p_count_total / p_display_count / p_case_count / p_loose_display_count / p_counter_start /
+p_counter_end / p_reason mirror the JSON payload keys; triggers keep them filled on insert and
+payload update, and existing rows are backfilled here.
+
+Revision ID: o2p3q4r5s6t7
+Revises: n1o2p3q4r5s6
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "o2p3q4r5s6t7"
+down_revision: Union[str, Sequence[str], None] = "n1o2p3q4r5s6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    ("p_count_total", "count_total", sa.Float()),
+    ("p_display_count", "display_count", sa.Float()),
+    ("p_case_count", "case_count", sa.Float()),
+    ("p_loose_display_count", "loose_display_count", sa.Float()),
+    ("p_counter_start", "counter_start", sa.Float()),
+    ("p_counter_end", "counter_end", sa.Float()),
+    ("p_reason", "reason", sa.Text()),
+)
+
+
+def _assignments(payload_sql: str) -> str:
+    parts = []
+    for column, key, col_type in _COLUMNS:
+        value = f"json_extract({payload_sql}, '$.{key}')"
+        if isinstance(col_type, sa.Float):
+            value = f"CAST({value} AS REAL)"
+        parts.append(f"{column} = CASE WHEN json_valid({payload_sql}) THEN {value} END")
+    return ",\n    ".join(parts)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if not inspector.has_table("workflow_events"):
+        return
+    cols = {c["name"] for c in inspector.get_columns("workflow_events")}
+    missing = [(name, col_type) for name, _key, col_type in _COLUMNS if name not in cols]
+    if missing:
+        with op.batch_alter_table("workflow_events", schema=None) as batch_op:
+            for name, col_type in missing:
+                batch_op.add_column(sa.Column(name, col_type, nullable=True))
+    for suffix, event in (("ins", "INSERT"), ("upd", "UPDATE OF payload")):
+        op.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_workflow_events_payload_columns_{suffix}
+            AFTER {event} ON workflow_events
+            BEGIN
+            UPDATE workflow_events SET
+            {_assignments("NEW.payload")}
+            WHERE id = NEW.id;
+            END
+            """
+        )
+    op.execute(f"UPDATE workflow_events SET\n    {_assignments('payload')}")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_events_type_occurred ON workflow_events(event_type, occurred_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_events_station_occurred ON workflow_events(station_id, occurred_at)"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_workflow_events_type")
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if not inspector.has_table("workflow_events"):
+        return
+    op.execute("DROP TRIGGER IF EXISTS trg_workflow_events_payload_columns_ins")
+    op.execute("DROP TRIGGER IF EXISTS trg_workflow_events_payload_columns_upd")
+    op.execute("DROP INDEX IF EXISTS ix_workflow_events_station_occurred")
+    op.execute("DROP INDEX IF EXISTS ix_workflow_events_type_occurred")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_workflow_events_type ON workflow_events(event_type)")
+    cols = {c["name"] for c in inspector.get_columns("workflow_events")}
+    with op.batch_alter_table("workflow_events", schema=None) as batch_op:
+        for name, _key, _col_type in _COLUMNS:
+            if name in cols:
+                batch_op.drop_column(name)
@@ -0,0 +1,133 @@
+"""workflow_rollup_* daily rollup tables + dirty-day triggers
+
+Closed days are rolled by MigrationRunner on first start (or scripts/refresh_workflow_rollups.py) and
+then by a background refresh started by readers once a new day has begun.
+
+Revision ID: p3q4r5s6t7u8
+Revises: o2p3q4r5s6t7
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "p3q4r5s6t7u8"
+down_revision: Union[str, Sequence[str], None] = "o2p3q4r5s6t7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_MEASURE_COLUMNS = """
+            outputs INTEGER NOT NULL DEFAULT 0,
+            units REAL NOT NULL DEFAULT 0,
+            tablets REAL NOT NULL DEFAULT 0,
+            pkg_displays REAL NOT NULL DEFAULT 0,
+            pkg_cases REAL NOT NULL DEFAULT 0,
+            duration_min_sum REAL NOT NULL DEFAULT 0,
+            duration_n INTEGER NOT NULL DEFAULT 0,
+"""
+
+_THROUGH_MS = "(SELECT through_ms FROM workflow_rollup_state WHERE id = 1)"
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS workflow_rollup_station_hour (
+            day TEXT NOT NULL,
+            station_id INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            {_MEASURE_COLUMNS}
+            PRIMARY KEY (day, station_id, hour, product_id)
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS workflow_rollup_product_day (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            {_MEASURE_COLUMNS}
+            PRIMARY KEY (day, product_id)
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS workflow_rollup_operator_day (
+            day TEXT NOT NULL,
+            station_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            {_MEASURE_COLUMNS}
+            PRIMARY KEY (day, station_id, user_id, product_id)
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS workflow_rollup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            first_day TEXT NOT NULL,
+            rolled_through TEXT NOT NULL,
+            through_ms INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute("CREATE TABLE IF NOT EXISTS workflow_rollup_dirty (occurred_at INTEGER NOT NULL)")
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_ins
+        AFTER INSERT ON workflow_events
+        WHEN NEW.occurred_at < {_THROUGH_MS}
+        BEGIN
+            INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (NEW.occurred_at);
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_upd
+        AFTER UPDATE OF payload, occurred_at, event_type, station_id, workflow_bag_id, user_id ON workflow_events
+        WHEN OLD.occurred_at < {_THROUGH_MS} OR NEW.occurred_at < {_THROUGH_MS}
+        BEGIN
+            INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (OLD.occurred_at), (NEW.occurred_at);
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_del
+        AFTER DELETE ON workflow_events
+        WHEN OLD.occurred_at < {_THROUGH_MS}
+        BEGIN
+            INSERT INTO workflow_rollup_dirty (occurred_at) VALUES (OLD.occurred_at);
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_workflow_rollup_dirty_bag_product
+        AFTER UPDATE OF product_id ON workflow_bags
+        WHEN OLD.product_id IS NOT NEW.product_id
+        BEGIN
+            INSERT INTO workflow_rollup_dirty (occurred_at)
+            SELECT occurred_at FROM workflow_events
+            WHERE workflow_bag_id = NEW.id AND occurred_at < {_THROUGH_MS};
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    for trigger in ("ins", "upd", "del", "bag_product"):
+        op.execute(f"DROP TRIGGER IF EXISTS trg_workflow_rollup_dirty_{trigger}")
+    for table in (
+        "workflow_rollup_dirty",
+        "workflow_rollup_state",
+        "workflow_rollup_operator_day",
+        "workflow_rollup_product_day",
+        "workflow_rollup_station_hour",
+    ):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
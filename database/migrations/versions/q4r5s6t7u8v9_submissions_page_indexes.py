@@ -0,0 +1,29 @@
+"""indexes for the SQL-paginated submissions list
+
+ix_ws_receipt_number serves the page-row fetch (receipt IN (...)); ix_ws_product_po narrows the
+per-bag running-total window scan to the page's products / POs.
+
+Revision ID: q4r5s6t7u8v9
+Revises: p3q4r5s6t7u8
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "q4r5s6t7u8v9"
+down_revision: Union[str, Sequence[str], None] = "p3q4r5s6t7u8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_ws_receipt_number ON warehouse_submissions(receipt_number)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ws_product_po ON warehouse_submissions(product_name, assigned_po_id, created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_ws_product_po")
+    op.execute("DROP INDEX IF EXISTS ix_ws_receipt_number")
@@ -0,0 +1,44 @@
+"""zoho_sync_state: incremental PO sync cursor + progress record
+
+One row per sync kind (``purchase_orders``); the cursor is the Zoho last-modified timestamp the
+next incremental sync lists from.
+
+Revision ID: r5s6t7u8v9w0
+Revises: q4r5s6t7u8v9
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "r5s6t7u8v9w0"
+down_revision: Union[str, Sequence[str], None] = "q4r5s6t7u8v9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS zoho_sync_state (
+            name TEXT PRIMARY KEY,
+            cursor TEXT,
+            status TEXT NOT NULL DEFAULT 'idle',
+            mode TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            pages INTEGER NOT NULL DEFAULT 0,
+            listed INTEGER NOT NULL DEFAULT 0,
+            tablet_pos INTEGER NOT NULL DEFAULT 0,
+            details_fetched INTEGER NOT NULL DEFAULT 0,
+            detail_failures INTEGER NOT NULL DEFAULT 0,
+            synced INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            updated_at TEXT
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS zoho_sync_state")
@@ -0,0 +1,61 @@
+"""bag_ledger per-bag tablet ledger
+
+Maintenance triggers and the backfill are installed by MigrationRunner on start
+(app.services.bag_ledger.ensure_bag_ledger) once every source column they reference exists;
+until then readers compute from source rows.
+
+Revision ID: s6t7u8v9w0x1
+Revises: r5s6t7u8v9w0
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "s6t7u8v9w0x1"
+down_revision: Union[str, Sequence[str], None] = "r5s6t7u8v9w0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRIGGER_SUFFIXES = (
+    "ws_ins",
+    "ws_upd",
+    "ws_del",
+    "sbd_ins",
+    "sbd_upd",
+    "sbd_del",
+    "bags_ins",
+    "bags_upd",
+    "bags_del",
+    "pd_ins",
+    "pd_upd",
+    "pd_del",
+    "machines_upd",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bag_ledger (
+            bag_id INTEGER PRIMARY KEY REFERENCES bags(id) ON DELETE CASCADE,
+            received INTEGER NOT NULL DEFAULT 0,
+            packaged INTEGER NOT NULL DEFAULT 0,
+            packaged_loose INTEGER NOT NULL DEFAULT 0,
+            bottle INTEGER NOT NULL DEFAULT 0,
+            variety_deducted INTEGER NOT NULL DEFAULT 0,
+            machine INTEGER NOT NULL DEFAULT 0,
+            repack INTEGER NOT NULL DEFAULT 0,
+            packaged_count INTEGER NOT NULL DEFAULT 0,
+            remaining INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_sbd_bag_id ON submission_bag_deductions(bag_id)")
+
+
+def downgrade() -> None:
+    for suffix in _TRIGGER_SUFFIXES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_bag_ledger_{suffix}")
+    op.execute("DROP INDEX IF EXISTS ix_sbd_bag_id")
+    op.execute("DROP TABLE IF EXISTS bag_ledger")
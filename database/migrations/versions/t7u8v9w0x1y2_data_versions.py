@@ -0,0 +1,44 @@
+"""data_versions change counters
+
+Bump triggers on the watched tables are installed by MigrationRunner on start
+(app.services.data_versions.ensure_data_versions), which also seeds the counters.
+
+Revision ID: t7u8v9w0x1y2
+Revises: s6t7u8v9w0x1
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "t7u8v9w0x1y2"
+down_revision: Union[str, Sequence[str], None] = "s6t7u8v9w0x1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_WATCHED_TABLES = (
+    "warehouse_submissions",
+    "bags",
+    "receiving",
+    "purchase_orders",
+    "workflow_events",
+    "app_settings",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    for table in _WATCHED_TABLES:
+        for suffix in ("ins", "upd", "del"):
+            op.execute(f"DROP TRIGGER IF EXISTS trg_data_versions_{table}_{suffix}")
+    op.execute("DROP TABLE IF EXISTS data_versions")
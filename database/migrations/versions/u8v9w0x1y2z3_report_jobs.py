@@ -0,0 +1,46 @@
+"""report_jobs queue for background PDF reports
+
+Revision ID: u8v9w0x1y2z3
+Revises: t7u8v9w0x1y2
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "u8v9w0x1y2z3"
+down_revision: Union[str, Sequence[str], None] = "t7u8v9w0x1y2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id TEXT PRIMARY KEY,
+            report_type TEXT NOT NULL,
+            params TEXT NOT NULL,
+            cache_key TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            filename TEXT,
+            result_path TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_report_jobs_status ON report_jobs(status, created_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_report_jobs_cache_key ON report_jobs(cache_key)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_report_jobs_cache_key")
+    op.execute("DROP INDEX IF EXISTS ix_report_jobs_status")
+    op.execute("DROP TABLE IF EXISTS report_jobs")
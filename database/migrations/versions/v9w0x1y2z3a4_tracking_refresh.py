@@ -0,0 +1,43 @@
+"""tracking refresh: shipments.next_check_at + carrier_tokens
+
+- shipments.next_check_at: TIMESTAMP (adaptive re-check time, NULL = due now)
+- carrier_tokens: OAuth access tokens reused across scheduled tracking runs
+
+Revision ID: v9w0x1y2z3a4
+Revises: u8v9w0x1y2z3
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "v9w0x1y2z3a4"
+down_revision: Union[str, Sequence[str], None] = "u8v9w0x1y2z3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "next_check_at" not in [col["name"] for col in inspector.get_columns("shipments")]:
+        with op.batch_alter_table("shipments", schema=None) as batch_op:
+            batch_op.add_column(sa.Column("next_check_at", sa.TIMESTAMP(), nullable=True))
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS carrier_tokens (
+            token_key TEXT PRIMARY KEY,
+            access_token TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            updated_at TEXT
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS carrier_tokens")
+    inspector = sa.inspect(op.get_bind())
+    if "next_check_at" in [col["name"] for col in inspector.get_columns("shipments")]:
+        with op.batch_alter_table("shipments", schema=None) as batch_op:
+            batch_op.drop_column("next_check_at")
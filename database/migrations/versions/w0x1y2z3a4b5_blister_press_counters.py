@@ -0,0 +1,58 @@
+"""blister press counters
+
+- blister_press_events: press count per BLISTER_COMPLETE event (corrections applied)
+- blister_press_counters: running press total per workflow station
+
+Maintenance triggers and the one-time backfill are installed by MigrationRunner on start
+(app.services.blister_press_counter.ensure_blister_press_counters).
+
+Revision ID: w0x1y2z3a4b5
+Revises: v9w0x1y2z3a4
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "w0x1y2z3a4b5"
+down_revision: Union[str, Sequence[str], None] = "v9w0x1y2z3a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TRIGGERS = (
+    "trg_blister_press_events_ins",
+    "trg_blister_press_events_upd",
+    "trg_blister_press_events_del",
+    "trg_blister_press_workflow_events_ins",
+    "trg_blister_press_workflow_events_correction",
+    "trg_blister_press_workflow_events_upd",
+    "trg_blister_press_workflow_events_del",
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blister_press_events (
+            event_id INTEGER PRIMARY KEY,
+            station_id INTEGER NOT NULL,
+            presses REAL NOT NULL DEFAULT 0
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blister_press_counters (
+            station_id INTEGER PRIMARY KEY,
+            presses REAL NOT NULL DEFAULT 0,
+            events INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    for name in _TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS blister_press_counters")
+    op.execute("DROP TABLE IF EXISTS blister_press_events")
@@ -0,0 +1,33 @@
+"""schema_state: fingerprint of the last clean MigrationRunner run
+
+init_db skips the runner while the stored fingerprint matches the code and schema
+(app.models.migrations.schema_is_current); the row is written by the runner.
+
+Revision ID: x1y2z3a4b5c6
+Revises: w0x1y2z3a4b5
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "x1y2z3a4b5c6"
+down_revision: Union[str, Sequence[str], None] = "w0x1y2z3a4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            fingerprint TEXT NOT NULL,
+            recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS schema_state")
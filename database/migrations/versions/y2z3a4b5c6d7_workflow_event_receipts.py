@@ -0,0 +1,41 @@
+"""workflow_event_receipts: idempotency keys of batched floor events
+
+One row per event accepted through /workflow/floor/api/events/batch, written in the same
+transaction as the append, so replayed batches return the stored result.
+
+Revision ID: y2z3a4b5c6d7
+Revises: x1y2z3a4b5c6
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "y2z3a4b5c6d7"
+down_revision: Union[str, Sequence[str], None] = "x1y2z3a4b5c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS workflow_event_receipts (
+            idempotency_key TEXT PRIMARY KEY,
+            device_id TEXT,
+            event_id INTEGER,
+            workflow_bag_id INTEGER,
+            client_ts INTEGER,
+            result TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_workflow_event_receipts_created ON workflow_event_receipts(created_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_workflow_event_receipts_created")
+    op.execute("DROP TABLE IF EXISTS workflow_event_receipts")
@@ -0,0 +1,49 @@
+"""telegram_outbox: queued Telegram commands and their replies
+
+The webhook records each chat command here and acknowledges at once; a sender thread per app
+worker builds and sends the replies with per-chat ordering and retries
+(app.services.telegram_outbox).
+
+Revision ID: z3a4b5c6d7e8
+Revises: y2z3a4b5c6d7
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "z3a4b5c6d7e8"
+down_revision: Union[str, Sequence[str], None] = "y2z3a4b5c6d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS telegram_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            update_id INTEGER UNIQUE,
+            chat_id INTEGER NOT NULL,
+            command TEXT NOT NULL,
+            args TEXT NOT NULL DEFAULT '',
+            reply TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at INTEGER NOT NULL,
+            last_error TEXT,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_telegram_outbox_chat ON telegram_outbox(chat_id, status, id)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_telegram_outbox_status ON telegram_outbox(status, next_attempt_at)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_telegram_outbox_status")
+    op.execute("DROP INDEX IF EXISTS ix_telegram_outbox_chat")
+    op.execute("DROP TABLE IF EXISTS telegram_outbox")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF report generation: cold render vs the data_versions-keyed result cache, and
+several queued jobs drained by the report process pool.
+
+Builds a throwaway SQLite file with N purchase orders (a handful of submissions each) and reports:
+
+  cold    -- render_report for the production report (what every /api/reports/production did)
+  cached  -- report_cache_key + cached_report_path + read of the stored PDF (unchanged data)
+  jobs    -- wall time for --jobs distinct vendor reports submitted at once and drained by
+             --workers pool processes (skipped when --jobs is 0)
+
+  python scripts/bench_report_jobs.py                   # 200 POs
+  python scripts/bench_report_jobs.py --pos 500 --jobs 4 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.models.schema import SchemaManager
+from app.services import report_jobs
+from config import Config
+
+
+def _build(path: str, n_pos: int) -> None:
+    SchemaManager(path).initialize_all_tables()
+    conn = sqlite3.connect(path)
+    for name, decl in (("bag_id", "INTEGER"), ("needs_review", "INTEGER DEFAULT 0")):
+        if name not in {r[1] for r in conn.execute("PRAGMA table_info(warehouse_submissions)")}:
+            conn.execute(f"ALTER TABLE warehouse_submissions ADD COLUMN {name} {decl}")
+    conn.executemany(
+        "INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (?, ?, ?)",
+        [(i, f"Flavor {i}", f"INV-{i}") for i in range(1, 11)],
+    )
+    conn.executemany(
+        "INSERT INTO purchase_orders (id, po_number, tablet_type, ordered_quantity, created_at) VALUES (?, ?, ?, 10000, ?)",
+        [(i, f"PO-{i}", f"Flavor {i % 10 + 1}", f"2026-0{i % 9 + 1}-01") for i in range(1, n_pos + 1)],
+    )
+    conn.executemany(
+        """
+        INSERT INTO warehouse_submissions (employee_name, product_name, assigned_po_id, displays_made, packs_remaining, created_at)
+        VALUES ('op', ?, ?, ?, 2, ?)
+        """,
+        [
+            (f"Product {po % 10 + 1}", po, 5 + k, f"2026-0{po % 9 + 1}-{k + 2:02d} 10:00:00")
+            for po in range(1, n_pos + 1)
+            for k in range(5)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--pos", type=int, default=200)
+    p.add_argument("--jobs", type=int, default=4)
+    p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    cache_dir = tempfile.mkdtemp()
+    Config.REPORT_CACHE_DIR = cache_dir
+    try:
+        _build(path, args.pos)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        params = report_jobs.normalize_report_params({})
+
+        def cold():
+            return report_jobs.render_report(path, params)
+
+        key = report_jobs.report_cache_key(conn, params)
+        report_jobs.store_report(key, cold())
+
+        def cached():
+            hit = report_jobs.cached_report_path(report_jobs.report_cache_key(conn, params))
+            with open(hit, "rb") as fh:
+                return fh.read()
+
+        cold_ms = _median_ms(cold, args.repeat)
+        cached_ms = _median_ms(cached, args.repeat)
+
+        jobs_ms = float("nan")
+        if args.jobs:
+            for k in range(args.jobs):
+                report_jobs.submit_report_job(
+                    conn, report_jobs.normalize_report_params({"report_type": "vendor", "po_numbers": [f"PO-{k + 1}"]})
+                )
+            conn.commit()
+            pool = report_jobs._process_pool.get(max(1, args.workers))
+            wait([pool.submit(int, 0) for _ in range(args.workers)])  # spawn workers before timing
+            start = time.perf_counter()
+            wait([pool.submit(report_jobs.run_report_jobs, path, cache_dir) for _ in range(args.workers)])
+            jobs_ms = (time.perf_counter() - start) * 1000
+            done = conn.execute("SELECT COUNT(*) FROM report_jobs WHERE status = 'done'").fetchone()[0]
+            if done != args.jobs:
+                print(f"  only {done} of {args.jobs} jobs finished", file=sys.stderr)
+                return 1
+        conn.close()
+    finally:
+        os.remove(path)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"pos={args.pos} jobs={args.jobs} workers={args.workers}")
+    print(f"{'cold':>8} {'cached':>8} {'jobs':>8}   (ms)")
+    print(f"{cold_ms:>8.1f} {cached_ms:>8.2f} {jobs_ms:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark the stage-yield report: per-bag compute_bag_check_totals vs the batched variant.
+
+Builds a throwaway SQLite file with N bags (one blister run, one or two sealing runs and one or
+two packaged counts each; every tenth row left unassigned and matched by item / bag / PO) and
+reports the latency of the per-bag totals for every bag:
+
+  per-bag  -- compute_bag_check_totals once per bag (what aggregate_stage_yield did)
+  batch    -- compute_bag_check_totals_batch in-process
+  pool     -- compute_bag_check_totals_batch over --workers processes (skipped when --workers < 2)
+
+Results of all three are compared before timing.
+
+  python scripts/bench_stage_yield.py                     # 3000 bags
+  python scripts/bench_stage_yield.py --bags 500 --workers 4 --max-ratio 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.models.schema import SchemaManager
+from app.services.bag_check_totals import compute_bag_check_totals, compute_bag_check_totals_batch
+
+BAGS_PER_BOX = 20
+
+
+def _build(path: str, n_bags: int) -> None:
+    SchemaManager(path).initialize_all_tables()
+    conn = sqlite3.connect(path)
+    if "bag_id" not in {r[1] for r in conn.execute("PRAGMA table_info(warehouse_submissions)")}:
+        conn.execute("ALTER TABLE warehouse_submissions ADD COLUMN bag_id INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ws_bag_id ON warehouse_submissions(bag_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ws_assigned_po_id ON warehouse_submissions(assigned_po_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ws_receipt_number ON warehouse_submissions(receipt_number)")
+    conn.executemany(
+        "INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (?, ?, ?)",
+        [(i, f"Flavor {i}", f"INV-{i}") for i in range(1, 21)],
+    )
+    conn.executemany(
+        "INSERT INTO product_details (tablet_type_id, product_name, packages_per_display, tablets_per_package) VALUES (?, ?, 10, 4)",
+        [(i, f"Product {i}") for i in range(1, 21)],
+    )
+    conn.executemany(
+        "INSERT INTO machines (id, machine_name, machine_role) VALUES (?, ?, ?)",
+        [(101, "Blister 1", "blister"), (102, "Sealer 1", "sealing"), (103, "Sealer 2", "sealing")],
+    )
+    n_boxes = (n_bags + BAGS_PER_BOX - 1) // BAGS_PER_BOX
+    conn.executemany("INSERT INTO purchase_orders (id, po_number) VALUES (?, ?)", [(i, f"PO-{i}") for i in range(1, n_boxes + 1)])
+    conn.executemany("INSERT INTO receiving (id, po_id) VALUES (?, ?)", [(i, i) for i in range(1, n_boxes + 1)])
+    conn.executemany("INSERT INTO small_boxes (id, receiving_id, box_number) VALUES (?, ?, 1)", [(i, i) for i in range(1, n_boxes + 1)])
+
+    rng = random.Random(13)
+    base = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, 0))
+    bags, rows = [], []
+    for bag_id in range(1, n_bags + 1):
+        box = (bag_id - 1) // BAGS_PER_BOX + 1
+        bag_number = (bag_id - 1) % BAGS_PER_BOX + 1
+        tt = rng.randint(1, 20)
+        bags.append((bag_id, box, tt, bag_number, 20000))
+        runs = [("machine", 101, 0)] + [("machine", rng.choice((102, 103)), 0)] * rng.randint(1, 2)
+        runs += [("packaged", None, 1)] * rng.randint(1, 2)
+        for step, (sub_type, machine_id, receipt) in enumerate(runs):
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(base + bag_id * 3600 + step * 600))
+            unassigned = rng.random() < 0.1
+            rows.append(
+                (
+                    "op",
+                    None if unassigned else bag_id,
+                    f"INV-{tt}",
+                    bag_number,
+                    1,
+                    box,
+                    sub_type,
+                    f"Product {tt}",
+                    f"R-{bag_id}" if receipt else None,
+                    rng.randint(0, 20),
+                    rng.randint(0, 9),
+                    machine_id,
+                    ts,
+                )
+            )
+    conn.executemany(
+        "INSERT INTO bags (id, small_box_id, tablet_type_id, bag_number, bag_label_count) VALUES (?, ?, ?, ?, ?)", bags
+    )
+    conn.executemany(
+        """
+        INSERT INTO warehouse_submissions (
+            employee_name, bag_id, inventory_item_id, bag_number, box_number, assigned_po_id, submission_type,
+            product_name, receipt_number, displays_made, packs_remaining, machine_id, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--bags", type=int, default=3000)
+    p.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument(
+        "--max-ratio",
+        type=float,
+        default=0.0,
+        help="Exit 1 when the in-process batch is slower than this multiple of per-bag (0 = report only)",
+    )
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        _build(path, args.bags)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        bag_ids = list(range(1, args.bags + 1))
+
+        def per_bag():
+            return {bid: compute_bag_check_totals(conn, bid) for bid in bag_ids}
+
+        def batch():
+            return compute_bag_check_totals_batch(conn, bag_ids)
+
+        def pool():
+            return compute_bag_check_totals_batch(conn, bag_ids, workers=args.workers)
+
+        expected = per_bag()
+        if batch() != expected or (args.workers > 1 and pool() != expected):
+            print("  batched totals differ from per-bag totals", file=sys.stderr)
+            return 1
+
+        per_bag_ms = _median_ms(per_bag, args.repeat)
+        batch_ms = _median_ms(batch, args.repeat)
+        pool_ms = _median_ms(pool, args.repeat) if args.workers > 1 else float("nan")
+        conn.close()
+    finally:
+        os.remove(path)
+
+    print(f"bags={args.bags} workers={args.workers}")
+    print(f"{'per-bag':>8} {'batch':>8} {'pool':>8}   (ms)")
+    print(f"{per_bag_ms:>8.1f} {batch_ms:>8.1f} {pool_ms:>8.1f}")
+    if args.max_ratio and batch_ms > args.max_ratio * per_bag_ms:
+        print(f"  batch is {batch_ms / per_bag_ms:.2f}x per-bag (limit {args.max_ratio}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
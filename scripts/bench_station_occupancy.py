@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark station occupancy: the pre-batching per-station code vs one batched resolve.
+
+Builds a throwaway SQLite file with N stations (a quarter of them packaging), one occupied bag per
+station plus history, then reports SQL statement count and latency for:
+
+  before -- ``_current_station_occupancy(conn, sid)`` for every station, as the floor API and ops TV
+            ran it before ``resolve_station_occupancy`` existed. The code is taken from git
+            (``--baseline-rev``, default: the parent of the commit that added
+            app/services/workflow_occupancy.py) and run in a subprocess against the same database.
+  batch  -- ``resolve_station_occupancy(conn)`` once
+
+  python scripts/bench_station_occupancy.py --stations 5 10 20 40 --events-per-bag 30
+  python scripts/bench_station_occupancy.py --no-projection   # event-scan fallback path
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The baseline worker runs this file against an exported older tree.
+ROOT = os.environ.get("BENCH_BASELINE_TREE") or REPO
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _build(path: str, n_stations: int, events_per_bag: int, projection: bool) -> None:
+    from app.models.migrations import MigrationRunner
+    from app.services import workflow_constants as WC
+    from app.services.workflow_append import append_workflow_event
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    MigrationRunner(conn.cursor()).run_all()
+    conn.execute("DELETE FROM workflow_stations")
+    conn.execute("DELETE FROM qr_cards")
+    if not projection:
+        conn.execute("DROP TABLE IF EXISTS workflow_bag_station_state")
+        conn.execute("DROP TABLE IF EXISTS workflow_bag_state")
+    now = int(time.time() * 1000)
+    for i in range(n_stations):
+        kind = "packaging" if i % 4 == 3 else ("blister" if i % 2 else "sealing")
+        sid = conn.execute(
+            "INSERT INTO workflow_stations (station_scan_token, label, station_kind) VALUES (?, ?, ?)",
+            (f"bench-st-{i}", f"Station {i}", kind),
+        ).lastrowid
+        # One finished bag (history) and one occupying bag per station.
+        for occupied in (False, True):
+            wid = conn.execute(
+                "INSERT INTO workflow_bags (created_at, box_number, bag_number) VALUES (?, ?, ?)",
+                (now, str(i), "2" if occupied else "1"),
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO qr_cards (label, scan_token, status, assigned_workflow_bag_id) VALUES (?, ?, ?, ?)",
+                (
+                    f"bench-{i}-{int(occupied)}",
+                    f"bench-card-{i}-{int(occupied)}",
+                    WC.QR_CARD_STATUS_ASSIGNED if occupied else WC.QR_CARD_STATUS_IDLE,
+                    wid if occupied else None,
+                ),
+            )
+            append_workflow_event(conn, WC.EVENT_BAG_CLAIMED, {"station_id": sid}, wid, station_id=sid)
+            submit = WC.EVENT_PACKAGING_SNAPSHOT if kind == "packaging" else (
+                WC.EVENT_BLISTER_COMPLETE if kind == "blister" else WC.EVENT_SEALING_COMPLETE
+            )
+            for _ in range(max(0, events_per_bag - 2)):
+                append_workflow_event(
+                    conn, WC.EVENT_STATION_RESUMED, {"station_id": sid}, wid, station_id=sid
+                )
+            if not occupied:
+                payload = {"reason": "final_submit", "display_count": 1} if kind == "packaging" else {"count_total": 10}
+                append_workflow_event(conn, submit, payload, wid, station_id=sid)
+    conn.commit()
+    conn.close()
+
+
+def _measure(conn: sqlite3.Connection, fn, repeat: int) -> tuple[int, float]:
+    statements = [0]
+
+    def _trace(_sql: str) -> None:
+        statements[0] += 1
+
+    fn()  # warm statement cache
+    conn.set_trace_callback(_trace)
+    fn()
+    conn.set_trace_callback(None)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statements[0], statistics.median(timings)
+
+
+def _occupants(result: dict) -> dict[str, int | None]:
+    """Station id -> occupying bag id; the comparable part of both implementations' output."""
+    return {str(sid): (occ or {}).get("workflow_bag_id") for sid, occ in result.items()}
+
+
+def _open(path: str) -> tuple[sqlite3.Connection, list[int]]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    sids = [int(r["id"]) for r in conn.execute("SELECT id FROM workflow_stations")]
+    return conn, sids
+
+
+def _baseline_worker(path: str, repeat: int) -> int:
+    """Run inside the exported baseline tree: per-station loop, printed as JSON."""
+    from app.blueprints.workflow_floor import _current_station_occupancy
+
+    conn, sids = _open(path)
+
+    def _before(conn=conn, sids=sids):
+        return {sid: _current_station_occupancy(conn, sid) for sid in sids}
+
+    occupants = _occupants(_before())
+    stmts, ms = _measure(conn, _before, repeat)
+    conn.close()
+    print(json.dumps({"statements": stmts, "ms": ms, "occupants": occupants}))
+    return 0
+
+
+def _baseline_rev(requested: str | None) -> str:
+    if requested:
+        return requested
+    added = subprocess.run(
+        ["git", "log", "-1", "--format=%H", "--diff-filter=A", "--", "app/services/workflow_occupancy.py"],
+        cwd=REPO,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    if not added:
+        raise SystemExit("could not find the commit that added workflow_occupancy.py; pass --baseline-rev")
+    return f"{added}^"
+
+
+def _export_tree(rev: str) -> str:
+    tree = tempfile.mkdtemp(prefix="bench-occupancy-")
+    archive = subprocess.run(
+        ["git", "archive", rev, "app", "config.py", "__version__.py"], cwd=REPO, check=True, capture_output=True
+    ).stdout
+    with tempfile.TemporaryFile() as fh:
+        fh.write(archive)
+        fh.seek(0)
+        with tarfile.open(fileobj=fh) as tar:
+            tar.extractall(tree, filter="data")
+    return tree
+
+
+def _run_baseline(tree: str, path: str, repeat: int) -> dict:
+    env = {**os.environ, "BENCH_BASELINE_TREE": tree, "SKIP_ZOHO_SERVICE_CHECK": "1"}
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--baseline-worker", path, "--repeat", str(repeat)],
+        cwd=tree,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--stations", type=int, nargs="+", default=[5, 10, 20, 40])
+    p.add_argument("--events-per-bag", type=int, default=20)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--no-projection", action="store_true", help="Drop workflow_bag_state tables first")
+    p.add_argument("--baseline-rev", help="Git revision holding the pre-batching code")
+    p.add_argument("--baseline-worker", metavar="DB", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.baseline_worker:
+        return _baseline_worker(args.baseline_worker, args.repeat)
+
+    from app.services.workflow_occupancy import resolve_station_occupancy
+
+    rev = _baseline_rev(args.baseline_rev)
+    tree = _export_tree(rev)
+    print(f"baseline: {rev}")
+    print(f"{'stations':>8} {'before stmts':>12} {'before ms':>9} {'batch stmts':>11} {'batch ms':>9}")
+    try:
+        for n in args.stations:
+            fd, path = tempfile.mkstemp(suffix=".db")
+            os.close(fd)
+            try:
+                _build(path, n, args.events_per_bag, projection=not args.no_projection)
+                before = _run_baseline(tree, path, args.repeat)
+                conn, sids = _open(path)
+
+                def _batch(conn=conn, sids=sids):
+                    return resolve_station_occupancy(conn, sids)
+
+                if _occupants(_batch()) != before["occupants"]:
+                    print(f"  occupants differ between baseline and batch at {n} stations", file=sys.stderr)
+                    return 1
+                batch_q, batch_ms = _measure(conn, _batch, args.repeat)
+                conn.close()
+                print(
+                    f"{n:>8} {before['statements']:>12} {before['ms']:>9.2f} {batch_q:>11} {batch_ms:>9.2f}"
+                )
+            finally:
+                os.remove(path)
+    finally:
+        shutil.rmtree(tree, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
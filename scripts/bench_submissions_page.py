@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark the warehouse /submissions list: SQL receipt-group pagination vs loading every row.
+
+Builds a throwaway SQLite file with N warehouse submissions (about three per receipt, a tenth
+without a receipt) and reports the latency of one page of 15 receipt groups -- page keys, page
+rows and per-bag running totals -- for:
+
+  full     -- every filtered row loaded and enriched in Python, then grouped (what the page did)
+  page 1   -- first page (receipt-group index)
+  offset   -- a deep page by OFFSET (page-number links)
+  keyset   -- the same deep page through the Next cursor
+  filtered -- first page aggregated from source rows (the path taken when a list filter is set)
+
+  python scripts/bench_submissions_page.py                     # 100k rows
+  python scripts/bench_submissions_page.py --rows 20000 --max-ratio 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.models.schema import SchemaManager
+from app.services.submission_list_enrichment import apply_bag_running_totals
+from app.services.submission_query_service import apply_resolved_bag_fields
+from app.services.submission_receipt_groups import ensure_submission_receipt_groups
+from app.services.submissions_view_service import (
+    SUBMISSION_LIST_SELECT,
+    fetch_bag_running_totals,
+    fetch_receipt_group_page,
+    fetch_receipt_group_rows,
+)
+
+PER_PAGE = 15
+WHERE = " AND (po.closed IS NULL OR po.closed = FALSE) AND COALESCE(ws.submission_type, 'packaged') IN ('packaged', 'machine', 'repack')"
+SCOPE = ("packaged_machine", False)
+
+
+def _build(path: str, n_rows: int) -> None:
+    SchemaManager(path).initialize_all_tables()
+    conn = sqlite3.connect(path)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(warehouse_submissions)")}
+    for name, decl in (("bag_id", "INTEGER"), ("needs_review", "BOOLEAN DEFAULT 0")):
+        if name not in cols:
+            conn.execute(f"ALTER TABLE warehouse_submissions ADD COLUMN {name} {decl}")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ws_created_at ON warehouse_submissions(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ws_receipt_number ON warehouse_submissions(receipt_number)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS ix_ws_product_po ON warehouse_submissions(product_name, assigned_po_id, created_at)"
+    )
+    products = [f"Product {i}" for i in range(40)]
+    conn.executemany(
+        "INSERT INTO product_details (product_name, packages_per_display, tablets_per_package) VALUES (?, 10, 2)",
+        [(p,) for p in products],
+    )
+    conn.executemany(
+        "INSERT INTO purchase_orders (id, po_number, closed) VALUES (?, ?, ?)",
+        [(i, f"PO-{i}", 1 if i % 10 == 0 else 0) for i in range(1, 201)],
+    )
+    rng = random.Random(8)
+    base = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, 0))
+    rows = []
+    for i in range(n_rows):
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(base + i * 300))
+        receipt = None if rng.random() < 0.1 else f"{1000 + i // 3}-{1 + i // 3000}"
+        rows.append(
+            (
+                f"Employee {rng.randint(1, 30)}",
+                rng.choice(products),
+                rng.randint(1, 200),
+                rng.randint(1, 20),
+                rng.randint(1, 30),
+                rng.choice(("packaged", "packaged", "machine", "repack")),
+                rng.randint(0, 40),
+                rng.randint(0, 9),
+                rng.randint(0, 50),
+                receipt,
+                ts,
+                ts,
+                ts,
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO warehouse_submissions (
+            employee_name, product_name, assigned_po_id, box_number, bag_number, submission_type,
+            displays_made, packs_remaining, loose_tablets, receipt_number, created_at, bag_start_time, bag_end_time
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    ensure_submission_receipt_groups(conn)
+    conn.commit()
+    conn.close()
+
+
+def _sql_page(conn, page: int, cursor: str | None = None, scope: tuple[str, bool] | None = SCOPE) -> dict:
+    result = fetch_receipt_group_page(
+        conn, WHERE, [], "created_at", "desc", page=page, per_page=PER_PAGE, cursor=cursor, scope=scope
+    )
+    rows = [dict(r) for r in fetch_receipt_group_rows(conn, WHERE, [], result["group_keys"])]
+    for row in rows:
+        apply_resolved_bag_fields(row)
+    fetch_bag_running_totals(conn, WHERE, [], rows)
+    return result
+
+
+def _full(conn) -> int:
+    running = {}
+    groups = set()
+    for row in conn.execute(SUBMISSION_LIST_SELECT + WHERE + " ORDER BY ws.created_at ASC"):
+        sub = dict(row)
+        apply_resolved_bag_fields(sub)
+        bag_key = (sub["assigned_po_id"], sub["product_name"], f"{sub['box_number']}/{sub['bag_number']}")
+        totals = running.setdefault(bag_key, {"bag": 0, "machine": 0, "packaged": 0})
+        kind = sub["submission_type"] or "packaged"
+        if kind == "bag":
+            totals["bag"] += sub["loose_tablets"] or 0
+        elif kind in totals:
+            totals[kind] += sub["calculated_total"] or 0
+        apply_bag_running_totals(
+            sub, bag_total=totals["bag"], machine_total=totals["machine"], packaged_total=totals["packaged"]
+        )
+        groups.add(sub["receipt_number"] or f"null:{sub['id']}")
+    return len(groups)
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument(
+        "--max-ratio",
+        type=float,
+        default=0.0,
+        help="Exit 1 when the deep keyset page is slower than this multiple of page 1 (0 = report only)",
+    )
+    args = p.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        _build(path, args.rows)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        first = _sql_page(conn, 1)
+        deep = max(1, first["total_pages"] - 1)
+        before_deep = _sql_page(conn, deep - 1) if deep > 1 else first
+        if _sql_page(conn, deep, before_deep["next_cursor"])["group_keys"] != _sql_page(conn, deep)["group_keys"]:
+            print("  keyset and offset pages differ", file=sys.stderr)
+            return 1
+        if _sql_page(conn, deep, scope=None)["group_keys"] != _sql_page(conn, deep)["group_keys"]:
+            print("  indexed and aggregated pages differ", file=sys.stderr)
+            return 1
+
+        full_ms = _median_ms(lambda: _full(conn), max(1, args.repeat // 2))
+        page1_ms = _median_ms(lambda: _sql_page(conn, 1), args.repeat)
+        offset_ms = _median_ms(lambda: _sql_page(conn, deep), args.repeat)
+        keyset_ms = _median_ms(lambda: _sql_page(conn, deep, before_deep["next_cursor"]), args.repeat)
+        filtered_ms = _median_ms(lambda: _sql_page(conn, 1, scope=None), max(1, args.repeat // 2))
+        conn.close()
+    finally:
+        os.remove(path)
+
+    print(f"rows={args.rows} groups={first['total']} pages={first['total_pages']} deep page={deep}")
+    print(f"{'full':>8} {'page 1':>8} {'offset':>8} {'keyset':>8} {'filtered':>8}   (ms)")
+    print(f"{full_ms:>8.1f} {page1_ms:>8.1f} {offset_ms:>8.1f} {keyset_ms:>8.1f} {filtered_ms:>8.1f}")
+    if args.max_ratio and keyset_ms > args.max_ratio * page1_ms:
+        print(f"  deep keyset page is {keyset_ms / page1_ms:.1f}x page 1 (limit {args.max_ratio}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Replay workflow_events into workflow_bag_state / workflow_bag_station_state and report drift.
+
+  # Verify only (exit code 3 when any drift is found)
+  DATABASE_PATH=/path/to/tablet_counter.db python scripts/rebuild_workflow_bag_state.py --verify-only
+
+  # Repair everything, or just a few bags
+  DATABASE_PATH=... python scripts/rebuild_workflow_bag_state.py
+  DATABASE_PATH=... python scripts/rebuild_workflow_bag_state.py --bag-id 12 --bag-id 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.services.workflow_bag_state import WORKFLOW_BAG_STATE_DDL, rebuild_workflow_bag_state
+from app.services.workflow_txn import immediate_transaction
+from app.utils.db_utils import get_db
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--bag-id", type=int, action="append", dest="bag_ids", help="workflow_bags.id (repeatable)")
+    p.add_argument("--verify-only", action="store_true", help="Report drift without rewriting rows")
+    args = p.parse_args()
+
+    conn = get_db()
+    try:
+        with immediate_transaction(conn):
+            for ddl in WORKFLOW_BAG_STATE_DDL:
+                conn.execute(ddl)
+            report = rebuild_workflow_bag_state(conn, args.bag_ids, repair=not args.verify_only)
+    finally:
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+    drifted = report["drifted_bag_ids"] or report["orphan_rows"]
+    if args.verify_only and drifted:
+        return 3
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
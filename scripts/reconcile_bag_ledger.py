@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Recompute bag_ledger from submissions / deductions and report drift (normally kept current by triggers).
+
+  # Report only
+  DATABASE_PATH=/path/to/tablet_counter.db python scripts/reconcile_bag_ledger.py
+
+  # Rewrite drifted / missing rows; exit status 1 when drift was found (for cron alerts)
+  DATABASE_PATH=... python scripts/reconcile_bag_ledger.py --fix
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.services.bag_ledger import ensure_bag_ledger, reconcile_bag_ledger
+from app.services.workflow_txn import immediate_transaction
+from app.utils.db_utils import get_db
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--fix", action="store_true", help="Rewrite drifted, missing and orphaned ledger rows")
+    p.add_argument("--limit", type=int, default=50, help="Max drift entries to print")
+    args = p.parse_args()
+
+    conn = get_db()
+    try:
+        with immediate_transaction(conn):
+            if not ensure_bag_ledger(conn):
+                print("bag_ledger not supported by this schema (run migrations first)", file=sys.stderr)
+                return 2
+            report = reconcile_bag_ledger(conn, fix=args.fix, limit=args.limit)
+    finally:
+        conn.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    return 1 if report["drifted"] or report["missing"] or report["orphaned"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Re-evaluate flagged (needs_review) submissions in one batch and auto-assign unique bag matches.
+
+Normally runs after each Zoho PO sync; use this to clear a large backlog or to preview counts.
+
+  DATABASE_PATH=/path/to/tablet_counter.db python scripts/reevaluate_flagged_submissions.py
+
+  # Report what would be assigned without writing
+  DATABASE_PATH=... python scripts/reevaluate_flagged_submissions.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.services.bag_matching_service import match_flagged_submissions
+from app.utils.db_utils import get_db
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dry-run", action="store_true", help="Roll back instead of committing the assignments")
+    args = p.parse_args()
+
+    conn = get_db()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            report = match_flagged_submissions(conn)
+        except Exception:
+            conn.rollback()
+            raise
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    finally:
+        conn.close()
+
+    report["dry_run"] = args.dry_run
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Roll closed factory days into the workflow_rollup_* tables (also done in the background when a reader finds days due).
+
+  # Catch up: roll any closed day not rolled yet and re-roll days edited since
+  DATABASE_PATH=/path/to/tablet_counter.db python scripts/refresh_workflow_rollups.py
+
+  # Rebuild the last 60 days from scratch
+  DATABASE_PATH=... python scripts/refresh_workflow_rollups.py --rebuild --days 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.services.workflow_rollups import (
+    ROLLUP_BACKFILL_DAYS,
+    WORKFLOW_ROLLUPS_DDL,
+    refresh_workflow_rollups,
+)
+from app.services.workflow_txn import immediate_transaction
+from app.utils.db_utils import get_db
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--rebuild", action="store_true", help="Drop rollup state and roll every day again")
+    p.add_argument("--days", type=int, default=ROLLUP_BACKFILL_DAYS, help="Closed days to roll on (re)build")
+    args = p.parse_args()
+
+    conn = get_db()
+    try:
+        with immediate_transaction(conn):
+            for ddl in WORKFLOW_ROLLUPS_DDL:
+                conn.execute(ddl)
+            if args.rebuild:
+                conn.execute("DELETE FROM workflow_rollup_state")
+            report = refresh_workflow_rollups(conn, backfill_days=args.days)
+    finally:
+        conn.close()
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,56 +1,51 @@
+#!/usr/bin/env python3
 """
-PythonAnywhere scheduled job: refresh shipments that are not delivered.
-Run every 15 minutes.
+Scheduled job: refresh carrier tracking for shipments that are not delivered and are due for a
+re-check (run every 15 minutes; shipments far from their ETA are only looked up every few hours).
+
+FedEx numbers are batched per Track request and UPS lookups run concurrently; see
+app/services/tracking_refresh.py and the TRACKING_* settings.
+
+  DATABASE_PATH=/path/to/tablet_counter.db python scripts/tracking_job.py
+  DATABASE_PATH=... python scripts/tracking_job.py --limit 50 --concurrency 2
 """
-import sqlite3
-from tracking_service import refresh_shipment_row
-
-def ensure_schema(conn: sqlite3.Connection) -> None:
-    cur = conn.cursor()
-    # Add tracking columns if missing (safe no-ops if already exist)
-    cur.execute("PRAGMA table_info(shipments)")
-    existing = {row[1] for row in cur.fetchall()}
-    needed = {
-        "carrier_code": "TEXT",
-        "tracking_status": "TEXT",
-        "last_checkpoint": "TEXT",
-        "delivered_at": "DATE",
-        "last_checked_at": "TIMESTAMP",
-    }
-    for col, coltype in needed.items():
-        if col not in existing:
-            try:
-                cur.execute(f"ALTER TABLE shipments ADD COLUMN {col} {coltype}")
-            except Exception:
-                pass
-    conn.commit()
-
-def main():
-    conn = sqlite3.connect('tablet_counter.db')
-    conn.row_factory = sqlite3.Row
-    ensure_schema(conn)
-
-    # Select shipments that likely need updates
-    rows = conn.execute(
-        """
-        SELECT id FROM shipments
-        WHERE (
-            tracking_status IS NULL OR tracking_status NOT LIKE '%Delivered%'
-        )
-        ORDER BY COALESCE(last_checked_at, created_at) ASC
-        LIMIT 50
-        """
-    ).fetchall()
-
-    for r in rows:
-        try:
-            res = refresh_shipment_row(conn, r['id'])
-            print('Refreshed', r['id'], res.get('data', {}).get('tracking_status'))
-        except Exception as e:
-            print('Error refreshing', r['id'], e)
-
-    conn.close()
-
-if __name__ == '__main__':
-    main()
 
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.services.tracking_refresh import refresh_due_shipments
+from app.utils.db_utils import get_db
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--limit", type=int, default=None, help="Max shipments per run (default TRACKING_REFRESH_LIMIT)")
+    p.add_argument("--concurrency", type=int, default=None, help="UPS lookups in flight (default TRACKING_UPS_CONCURRENCY)")
+    args = p.parse_args()
+
+    conn = get_db()
+    try:
+        summary = refresh_due_shipments(conn, limit=args.limit, concurrency=args.concurrency)
+    finally:
+        conn.close()
+
+    for entry in summary["shipments"]:
+        if "error" in entry:
+            print("Error refreshing", entry["id"], entry["error"])
+        else:
+            print("Refreshed", entry["id"], entry["tracking_status"])
+    print(
+        f"due={summary['due']} updated={summary['updated']} failed={summary['failed']} unsupported={summary['unsupported']}"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,6 +7,7 @@
   var html = htmVendor.bind(React.createElement);
   var useEffect = React.useEffect;
   var useMemo = React.useMemo;
+  var useRef = React.useRef;
   var useState = React.useState;
   var FALLBACK_NAV_ITEMS = [
     { label: "Overview", tab: "overview" },
@@ -91,6 +92,27 @@
     return out.length ? out : FALLBACK_NAV_ITEMS;
   }
 
+  // Side-panel refresh for the wallboard: ``load`` runs when ``key`` changes and on every
+  // ``streamTick`` (stream snapshot/resync); the 5 s poll only runs once per ``liveIdleMs`` while
+  // the stream is up, so a live wallboard stops polling on a fixed timer.
+  function useStreamRefresh(load, key, streamTick, streamLiveRef, liveIdleMs) {
+    var lastAtRef = useRef(0);
+    useEffect(function () {
+      if (!key) return;
+      lastAtRef.current = Date.now();
+      load();
+    }, [key, streamTick]);
+    useEffect(function () {
+      if (!key) return undefined;
+      var id = setInterval(function () {
+        if (streamLiveRef.current && Date.now() - lastAtRef.current < liveIdleMs) return;
+        lastAtRef.current = Date.now();
+        load();
+      }, 5000);
+      return function () { clearInterval(id); };
+    }, [key]);
+  }
+
   function asNum(v) {
     var n = Number(v);
     return Number.isFinite(n) ? n : null;
@@ -891,6 +913,10 @@
     var compressorsState = useState([]);
     var compressors = compressorsState[0];
     var setCompressors = compressorsState[1];
+    var streamTickState = useState(0);
+    var streamTick = streamTickState[0];
+    var setStreamTick = streamTickState[1];
+    var streamLiveRef = useRef(false);
     var dateState = useState(function () {
       try {
         return new URLSearchParams(window.location.search).get("date") || todayIsoDate();
@@ -926,9 +952,11 @@
       if (n && n.textContent) {
         try { setSnap(JSON.parse(n.textContent)); } catch (e) {}
       }
+      var lastLoadAt = 0;
       function load() {
+        lastLoadAt = Date.now();
         var url = props.snapshotUrl + (props.snapshotUrl.indexOf("?") >= 0 ? "&" : "?") + "date=" + encodeURIComponent(selectedDate);
-        fetch(url, { credentials: "same-origin" }).then(function (r) { return r.json(); }).then(function (out) {
+        fetch(url, { credentials: "same-origin", cache: "no-cache" }).then(function (r) { return r.json(); }).then(function (out) {
           setSnap(out);
           try {
             var u = new URL(window.location.href);
@@ -937,10 +965,27 @@
           } catch (e) {}
         }).catch(function () {});
       }
+      function changed() {
+        load();
+        setStreamTick(function (n) { return n + 1; });
+      }
       load();
-      var id = setInterval(load, 5000);
-      return function () { clearInterval(id); };
-    }, [props.snapshotUrl, selectedDate, saveTick]);
+      // Push channel: reload as soon as a floor scan changes the snapshot; while the stream is up
+      // the 5 s poll only refreshes clock-driven figures every 30 s.
+      var es = null;
+      if (window.EventSource && props.streamUrl) {
+        es = new EventSource(props.streamUrl);
+        es.addEventListener("hello", function () { streamLiveRef.current = true; });
+        es.addEventListener("snapshot", changed);
+        es.addEventListener("resync", changed);
+        es.onerror = function () { streamLiveRef.current = false; };
+      }
+      var id = setInterval(function () {
+        if (streamLiveRef.current && Date.now() - lastLoadAt < 30000) return;
+        load();
+      }, 5000);
+      return function () { clearInterval(id); if (es) es.close(); streamLiveRef.current = false; };
+    }, [props.snapshotUrl, props.streamUrl, selectedDate, saveTick]);
 
     var boot = readBoot();
     var navRaw = Array.isArray(boot.nav) && boot.nav.length ? boot.nav : FALLBACK_NAV_ITEMS;
@@ -1566,21 +1611,17 @@
         .catch(function () {});
     }
 
-    useEffect(function () {
-      if (blisterStationId) loadMaterialSummary(blisterStationId);
-    }, [blisterStationId]);
-
-    useEffect(function () {
-      if (!blisterStationId) return undefined;
-      var id = setInterval(function () { loadMaterialSummary(blisterStationId); }, 5000);
-      return function () { clearInterval(id); };
-    }, [blisterStationId]);
-
-    useEffect(function () {
-      loadCompressors();
-      var id = setInterval(loadCompressors, 5000);
-      return function () { clearInterval(id); };
-    }, []);
+    // Press counts arrive as workflow events, which change the snapshot watermark: the material
+    // summary reloads with the snapshot. Compressor status is not part of the stream, so it only
+    // gets the slow fallback poll while the stream is live.
+    useStreamRefresh(
+      function () { loadMaterialSummary(blisterStationId); },
+      blisterStationId,
+      streamTick,
+      streamLiveRef,
+      60000
+    );
+    useStreamRefresh(loadCompressors, "compressors", 0, streamLiveRef, 60000);
 
     useEffect(function () {
       function onHashChange() {
@@ -1711,5 +1752,5 @@
 
   var root = document.getElementById("mes-root");
   if (!root) return;
-  ReactDOM.createRoot(root).render(html`<${App} snapshotUrl=${root.getAttribute("data-snapshot-url") || ""} />`);
+  ReactDOM.createRoot(root).render(html`<${App} snapshotUrl=${root.getAttribute("data-snapshot-url") || ""} streamUrl=${root.getAttribute("data-stream-url") || ""} />`);
 })();
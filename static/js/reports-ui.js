@@ -892,6 +892,63 @@
         }
     }
 
+    function setPdfStatus(msg, isError) {
+        var el = document.getElementById('reports_pdf_status');
+        if (!el) return;
+        el.textContent = msg || '';
+        el.classList.toggle('hidden', !msg);
+        el.classList.toggle('text-red-600', !!isError);
+        el.classList.toggle('text-gray-500', !isError);
+    }
+
+    /** PDF body for /api/reports/jobs from the analytics filters (PO id → po_number via filtersCache). */
+    function pdfReportBody() {
+        var type = document.getElementById('reports_pdf_type');
+        var df = document.getElementById('reports_date_from');
+        var dt = document.getElementById('reports_date_to');
+        var f = document.getElementById('reports_flavor');
+        var po = document.getElementById('reports_analytics_po');
+        var body = { report_type: (type && type.value) || 'production' };
+        if (df && df.value) body.start_date = df.value;
+        if (dt && dt.value) body.end_date = dt.value;
+        if (f && f.value) body.tablet_type_id = f.value;
+        if (po && po.value && filtersCache) {
+            var all = (filtersCache.pos_open || filtersCache.pos || []).concat(filtersCache.pos_closed || []);
+            var match = all.find(function (p) { return String(p.id) === String(po.value); });
+            if (match && match.po_number) body.po_numbers = [match.po_number];
+        }
+        return body;
+    }
+
+    /** Queue the PDF, poll the job until it finishes, then download it (rendering runs off the request thread). */
+    async function generatePdfReport() {
+        var btn = document.getElementById('reports_pdf_generate');
+        if (btn) btn.disabled = true;
+        setPdfStatus('Queuing report…');
+        try {
+            var data = await apiCall('/api/reports/jobs', {
+                method: 'POST',
+                headers: getCSRFHeaders(),
+                body: JSON.stringify(pdfReportBody()),
+            });
+            var job = data.job;
+            while (job.status === 'queued' || job.status === 'running') {
+                setPdfStatus((job.message || 'Working') + ' — ' + Math.round((job.progress || 0) * 100) + '%');
+                await new Promise(function (resolve) { setTimeout(resolve, 1000); });
+                job = (await apiCall('/api/reports/jobs/' + encodeURIComponent(job.id), {
+                    requestKey: 'reports-pdf-job',
+                })).job;
+            }
+            if (job.status !== 'done') throw new Error(job.error || 'Report failed');
+            setPdfStatus('Report ready — downloading.');
+            window.location.href = '/api/reports/jobs/' + encodeURIComponent(job.id) + '/download';
+        } catch (e) {
+            if (e.name !== 'AbortError') setPdfStatus(e.message || 'Report failed', true);
+        } finally {
+            if (btn) btn.disabled = false;
+        }
+    }
+
     async function refreshVersion() {
         var data = await apiCall('/api/reports/updates', { requestKey: 'reports-updates' });
         if (!data.success || !data.version) return;
@@ -950,6 +1007,14 @@
             });
         }
 
+        var pdfBtn = document.getElementById('reports_pdf_generate');
+        if (pdfBtn) {
+            pdfBtn.addEventListener('click', function (e) {
+                e.preventDefault();
+                generatePdfReport();
+            });
+        }
+
         var vendor = document.getElementById('reports_vendor');
         var flavor = document.getElementById('reports_flavor');
         var apo = document.getElementById('reports_analytics_po');
@@ -23,6 +23,8 @@
   /** Packaging can hold two active slots: one card run + one bottle run. */
   let expectedOccupantCardTokens = [];
   let packagingOccupancySlots = [];
+  /** Workflow bags occupying this station (last poll); stream deltas for them trigger a refresh. */
+  let occupantWorkflowBagIds = [];
   /** Showing scan/input to verify card after Pause / End / Resume. */
   let occupancyVerifyOpen = false;
   let lastOccupancyVerifyMode = null;
@@ -190,6 +192,12 @@
     }, ms);
   }
 
+  /** Success text for an event; says so when the entry only went to the offline queue. */
+  function sentText(result, message) {
+    if (!result || !result.queued) return message;
+    return 'Saved on this tablet, not sent yet — ' + message;
+  }
+
   function fullscreenSubmitOk(message) {
     showFullscreenSuccess(message, undefined, function () {
       refreshStationOccupancy().catch(function () {});
@@ -1989,6 +1997,38 @@
       refreshStationOccupancy().catch(function () {});
     }
   }
+  /** Live updates: refresh occupancy when another device scans here or moves one of our bags. */
+  function startWorkflowEventStream() {
+    const stationToken = document.getElementById('wf-station-token').value;
+    if (!window.EventSource || !stationToken || !window.WF_EVENT_STREAM) return;
+    let pending = null;
+    const es = new EventSource('/workflow/floor/api/stream?station_token=' + encodeURIComponent(stationToken));
+    function scheduleRefresh() {
+      if (pending) return;
+      pending = setTimeout(function () {
+        pending = null;
+        if (occupancyVerifyOpen) return;
+        refreshStationOccupancy().catch(function () {});
+      }, 300);
+    }
+    es.addEventListener('workflow_event', function (ev) {
+      let delta = null;
+      try {
+        delta = JSON.parse(ev.data);
+      } catch (e) {
+        return;
+      }
+      const sid = Number(window.WF_STATION_ID || 0);
+      if (
+        (sid && Number(delta.station_id) === sid) ||
+        occupantWorkflowBagIds.indexOf(Number(delta.workflow_bag_id)) >= 0
+      ) {
+        scheduleRefresh();
+      }
+    });
+    es.addEventListener('resync', scheduleRefresh);
+    window.addEventListener('beforeunload', () => es.close());
+  }
   async function refreshStationOccupancy() {
     const stationToken = document.getElementById('wf-station-token').value;
     if (!stationToken) return;
@@ -2005,6 +2045,7 @@
       expectedOccupantCardToken = null;
       expectedOccupantCardTokens = [];
       packagingOccupancySlots = [];
+      occupantWorkflowBagIds = [];
       occupancyVerifyOpen = false;
       occupancyGateIntentEndRun = false;
       loadedBagProductionFlow = null;
@@ -2022,6 +2063,11 @@
     stationHasOccupantApi = true;
     occupancyIsPaused = occ.status === 'paused';
     packagingOccupancySlots = Array.isArray(occ.packaging_slots) ? occ.packaging_slots : [];
+    occupantWorkflowBagIds = (packagingOccupancySlots.length ? packagingOccupancySlots : [occ])
+      .map(function (slot) {
+        return Number(slot && slot.workflow_bag_id) || 0;
+      })
+      .filter(Boolean);
     expectedOccupantCardTokens = packagingOccupancySlots
       .map(function (slot) {
         return slot && slot.card_token ? String(slot.card_token).trim() : '';
@@ -2097,7 +2143,7 @@
       packagingUiPhase = 'pick';
     }
     configureStationActions();
-    showFullscreenSuccess('Bag claimed at this station.', undefined, function () {
+    showFullscreenSuccess(sentText(data, 'Bag claimed at this station.'), undefined, function () {
       refreshStationOccupancy().catch(function () {});
     });
   }
@@ -2115,7 +2161,7 @@
     }
     if (kind === 'blister' || kind === 'combined') {
       const countTotal = selectedCountTotal();
-      await emitEvent('BLISTER_COMPLETE', {
+      const sent = await emitEvent('BLISTER_COMPLETE', {
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
       });
@@ -2124,13 +2170,13 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('submit');
-      statusLine('Blister count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Blister count submitted.');
+      statusLine(sentText(sent, 'Blister count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Blister count submitted.'));
       return;
     }
     if (kind === 'sealing') {
       const countTotal = selectedCountTotal();
-      await emitEvent('SEALING_COMPLETE', {
+      const sent = await emitEvent('SEALING_COMPLETE', {
         station_id: window.WF_STATION_ID || 1,
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
@@ -2140,12 +2186,12 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('submit');
-      statusLine('Sealing count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Sealing count submitted.');
+      statusLine(sentText(sent, 'Sealing count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Sealing count submitted.'));
       return;
     }
     if (kind === 'bottle_handpack') {
-      await emitEvent('BOTTLE_HANDPACK_COMPLETE', {
+      const sent = await emitEvent('BOTTLE_HANDPACK_COMPLETE', {
         employee_name: requiredEmployeeName(),
         source_card_tokens: sourceBagTokens(),
       });
@@ -2156,13 +2202,13 @@
       clearSourceBagTokens();
       configureStationActions();
       startCooldownAfterSuccess('submit');
-      statusLine('Bottle hand-pack count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Bottle hand-pack saved.');
+      statusLine(sentText(sent, 'Bottle hand-pack count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Bottle hand-pack saved.'));
       return;
     }
     if (kind === 'bottle_cap_seal') {
       const countTotal = selectedCountTotal();
-      await emitEvent('BOTTLE_CAP_SEAL_COMPLETE', {
+      const sent = await emitEvent('BOTTLE_CAP_SEAL_COMPLETE', {
         station_id: window.WF_STATION_ID || 1,
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
@@ -2172,12 +2218,12 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('submit');
-      statusLine('Bottle seal count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Bottle seal count submitted.');
+      statusLine(sentText(sent, 'Bottle seal count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Bottle seal count submitted.'));
       return;
     }
     if (kind === 'bottle_stickering') {
-      await emitEvent('BOTTLE_STICKER_COMPLETE', {
+      const sent = await emitEvent('BOTTLE_STICKER_COMPLETE', {
         station_id: window.WF_STATION_ID || 1,
         employee_name: requiredEmployeeName(),
       });
@@ -2186,8 +2232,8 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('submit');
-      statusLine('Bottle sticker count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Bottle sticker count submitted.');
+      statusLine(sentText(sent, 'Bottle sticker count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Bottle sticker count submitted.'));
       return;
     }
     throw new Error('Unsupported station kind: ' + kind);
@@ -2196,7 +2242,7 @@
     ensureLoadedBag();
     assertActionCooldown('submitBlister');
     const countTotal = selectedCountTotal();
-    await emitEvent('BLISTER_COMPLETE', {
+    const sent = await emitEvent('BLISTER_COMPLETE', {
       count_total: countTotal,
       employee_name: requiredEmployeeName(),
     });
@@ -2205,14 +2251,14 @@
     clearEmployeeNameField();
     configureStationActions();
     startCooldownAfterSuccess('submitBlister');
-    statusLine('Blister count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-    fullscreenSubmitOk('Blister count submitted.');
+    statusLine(sentText(sent, 'Blister count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+    fullscreenSubmitOk(sentText(sent, 'Blister count submitted.'));
   }
   async function saveSealingCountOnly() {
     ensureLoadedBag();
     assertActionCooldown('submitSeal');
     const countTotal = selectedCountTotal();
-    await emitEvent('SEALING_COMPLETE', {
+    const sent = await emitEvent('SEALING_COMPLETE', {
       station_id: window.WF_STATION_ID || 1,
       count_total: countTotal,
       employee_name: requiredEmployeeName(),
@@ -2222,8 +2268,8 @@
     clearEmployeeNameField();
     configureStationActions();
     startCooldownAfterSuccess('submitSeal');
-    statusLine('Sealing count submitted.' + MSG_SCAN_NEXT_CARD, 'success');
-    fullscreenSubmitOk('Sealing count submitted.');
+    statusLine(sentText(sent, 'Sealing count submitted.' + MSG_SCAN_NEXT_CARD), 'success');
+    fullscreenSubmitOk(sentText(sent, 'Sealing count submitted.'));
   }
   async function handPackRestAfterBlister() {
     ensureLoadedBag();
@@ -2236,7 +2282,7 @@
     }
     assertActionCooldown('handpackRest');
     const countTotal = selectedCountTotal();
-    await emitEvent('BLISTER_COMPLETE', {
+    const sent = await emitEvent('BLISTER_COMPLETE', {
       count_total: countTotal,
       employee_name: requiredEmployeeName(),
       metadata: {
@@ -2250,10 +2296,10 @@
     configureStationActions();
     startCooldownAfterSuccess('handpackRest');
     statusLine(
-      'Blister count submitted and flagged for hand-packed remainder.' + MSG_SCAN_NEXT_CARD,
+      sentText(sent, 'Blister count submitted and flagged for hand-packed remainder.' + MSG_SCAN_NEXT_CARD),
       'success'
     );
-    fullscreenSubmitOk('Hand-pack remainder saved.');
+    fullscreenSubmitOk(sentText(sent, 'Hand-pack remainder saved.'));
   }
   async function pauseWithCount() {
     ensureLoadedBag();
@@ -2262,7 +2308,7 @@
     const kind = stationKind();
     if (kind === 'packaging') {
       if (hasOutOfPackagingShortage('sealing')) {
-        await emitEvent('PACKAGING_SNAPSHOT', {
+        const sent = await emitEvent('PACKAGING_SNAPSHOT', {
           case_count: selectedPackagingCaseCount(),
           display_count: optionalNonNegativeInt('wf-loose-displays', 'Displays not in a full case'),
           packs_remaining: optionalNonNegativeInt('wf-packs-remaining', 'Single cards / bottles remaining'),
@@ -2281,11 +2327,11 @@
         configureStationActions();
         refreshStationOccupancy().catch(function () {});
         startCooldownAfterSuccess('pause');
-        statusLine(MSG_PARTIAL_PACKAGING_SAVED + MSG_SCAN_NEXT_CARD, 'success');
-        fullscreenSubmitOk('Partial packaging count saved.');
+        statusLine(sentText(sent, MSG_PARTIAL_PACKAGING_SAVED + MSG_SCAN_NEXT_CARD), 'success');
+        fullscreenSubmitOk(sentText(sent, 'Partial packaging count saved.'));
         return;
       }
-      await emitEvent('PACKAGING_SNAPSHOT', {
+      const sent = await emitEvent('PACKAGING_SNAPSHOT', {
         case_count: selectedPackagingCaseCount(),
         display_count: optionalNonNegativeInt('wf-loose-displays', 'Displays not in a full case'),
         packs_remaining: optionalNonNegativeInt('wf-packs-remaining', 'Single cards / bottles remaining'),
@@ -2299,15 +2345,15 @@
       packagingUiPhase = 'pick';
       configureStationActions();
       startCooldownAfterSuccess('pause');
-      statusLine(MSG_PAUSE_RESUME_TOMORROW, 'success');
-      showFullscreenSuccess('Pause saved. Station is paused.', undefined, function () {
+      statusLine(sentText(sent, MSG_PAUSE_RESUME_TOMORROW), 'success');
+      showFullscreenSuccess(sentText(sent, 'Pause saved. Station is paused.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
     }
     if (kind === 'blister' || kind === 'combined') {
       const countTotal = selectedCountTotal();
-      await emitEvent('BLISTER_COMPLETE', {
+      const sent = await emitEvent('BLISTER_COMPLETE', {
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
         metadata: { paused: true, reason: 'end_of_day' },
@@ -2316,15 +2362,15 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('pause');
-      statusLine(MSG_PAUSE_RESUME_TOMORROW, 'success');
-      showFullscreenSuccess('Pause saved. Station is paused.', undefined, function () {
+      statusLine(sentText(sent, MSG_PAUSE_RESUME_TOMORROW), 'success');
+      showFullscreenSuccess(sentText(sent, 'Pause saved. Station is paused.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
     }
     if (kind === 'sealing') {
       const countTotal = selectedCountTotal();
-      await emitEvent('SEALING_COMPLETE', {
+      const sent = await emitEvent('SEALING_COMPLETE', {
         station_id: window.WF_STATION_ID || 1,
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
@@ -2334,8 +2380,8 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('pause');
-      statusLine(MSG_PAUSE_RESUME_TOMORROW, 'success');
-      showFullscreenSuccess('Pause saved. Station is paused.', undefined, function () {
+      statusLine(sentText(sent, MSG_PAUSE_RESUME_TOMORROW), 'success');
+      showFullscreenSuccess(sentText(sent, 'Pause saved. Station is paused.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
@@ -2356,15 +2402,15 @@
       if (kind === 'bottle_handpack') {
         bottlePayload.source_card_tokens = sourceBagTokens();
       }
-      await emitEvent(bottleEventType, bottlePayload);
+      const sent = await emitEvent(bottleEventType, bottlePayload);
       clearCountField();
       clearEmployeeNameField();
       clearQaCheckedField();
       clearSourceBagTokens();
       configureStationActions();
       startCooldownAfterSuccess('pause');
-      statusLine(MSG_PAUSE_RESUME_TOMORROW, 'success');
-      showFullscreenSuccess('Pause saved. Station is paused.', undefined, function () {
+      statusLine(sentText(sent, MSG_PAUSE_RESUME_TOMORROW), 'success');
+      showFullscreenSuccess(sentText(sent, 'Pause saved. Station is paused.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
@@ -2377,7 +2423,7 @@
     assertActionCooldown('hold');
     const kind = stationKind();
     if (kind === 'packaging') {
-      await emitEvent('PACKAGING_SNAPSHOT', {
+      const sent = await emitEvent('PACKAGING_SNAPSHOT', {
         case_count: selectedPackagingCaseCount(),
         display_count: optionalNonNegativeInt('wf-loose-displays', 'Displays not in a full case'),
         packs_remaining: optionalNonNegativeInt('wf-packs-remaining', 'Single cards / bottles remaining'),
@@ -2392,15 +2438,15 @@
       packagingUiPhase = 'pick';
       configureStationActions();
       startCooldownAfterSuccess('hold');
-      statusLine(MSG_HOLD_RELEASED, 'success');
-      showFullscreenSuccess('Out of Packaging hold saved. Station released.', undefined, function () {
+      statusLine(sentText(sent, MSG_HOLD_RELEASED), 'success');
+      showFullscreenSuccess(sentText(sent, 'Out of Packaging hold saved. Station released.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
     }
     if (kind === 'sealing') {
       const countTotal = selectedCountTotal();
-      await emitEvent('SEALING_COMPLETE', {
+      const sent = await emitEvent('SEALING_COMPLETE', {
         station_id: window.WF_STATION_ID || 1,
         count_total: countTotal,
         employee_name: requiredEmployeeName(),
@@ -2410,8 +2456,8 @@
       clearEmployeeNameField();
       configureStationActions();
       startCooldownAfterSuccess('hold');
-      statusLine(MSG_HOLD_RELEASED, 'success');
-      showFullscreenSuccess('Out of Packaging hold saved. Station released.', undefined, function () {
+      statusLine(sentText(sent, MSG_HOLD_RELEASED), 'success');
+      showFullscreenSuccess(sentText(sent, 'Out of Packaging hold saved. Station released.'), undefined, function () {
         refreshStationOccupancy().catch(function () {});
       });
       return;
@@ -2430,7 +2476,7 @@
     assertActionCooldown('materialChange');
     const countTotal = selectedCountTotal();
     const materialType = selectedMaterialType();
-    await emitEvent('BLISTER_COMPLETE', {
+    const sent = await emitEvent('BLISTER_COMPLETE', {
       count_total: countTotal,
       employee_name: requiredEmployeeName(),
       reason: 'material_change',
@@ -2448,10 +2494,10 @@
     closeMaterialChangePanel();
     startCooldownAfterSuccess('materialChange');
     statusLine(
-      'Material change saved (' + materialType.toUpperCase() + '). Station is paused until Resume.',
+      sentText(sent, 'Material change saved (' + materialType.toUpperCase() + '). Station is paused until Resume.'),
       'success'
     );
-    showFullscreenSuccess('Material change saved.', undefined, function () {
+    showFullscreenSuccess(sentText(sent, 'Material change saved.'), undefined, function () {
       refreshStationOccupancy().catch(function () {});
     });
   }
@@ -2471,20 +2517,41 @@
       },
     };
     payload.station_id = window.WF_STATION_ID || 1;
-    await emitEvent('OPERATOR_CHANGE', payload);
+    const sent = await emitEvent('OPERATOR_CHANGE', payload);
     clearCountField();
     clearEmployeeNameField();
     occupancyGateForcedAction = null;
     occupancyGateIntentEndRun = false;
     configureStationActions();
-    statusLine('Operator change saved with current count.', 'success');
-    fullscreenSubmitOk('Operator change saved.');
+    statusLine(sentText(sent, 'Operator change saved with current count.'), 'success');
+    fullscreenSubmitOk(sentText(sent, 'Operator change saved.'));
   }
   async function submitPackagingAndFinalize() {
     ensureLoadedBag();
     assertActionCooldown('submit');
     var isLimitedCardsMode = hasOutOfPackagingShortage('sealing');
-    await emitEvent('PACKAGING_SNAPSHOT', {
+    const stationToken = document.getElementById('wf-station-token').value;
+    const cardToken = productInput() ? String(productInput().value || '').trim() : '';
+    if (!isLimitedCardsMode) {
+      // Finalize goes straight to the server, so it must not overtake queued entries (its own
+      // snapshot included): send them first and refuse while any are still waiting.
+      await flushEventQueue().catch(function () {});
+      if (loadEventQueue().length) {
+        throw new Error(
+          'Entries saved on this tablet have not been sent yet. Finalize this bag once they are sent.'
+        );
+      }
+    }
+    var pending = pendingFinalSnapshot;
+    if (pending && (pending.cardToken !== cardToken || rejectedEventKeys[pending.key])) {
+      pendingFinalSnapshot = pending = null;
+    }
+    if (pending && !isLimitedCardsMode) {
+      // An earlier attempt already recorded this bag's final count (now sent): finalize only.
+      await finalizePackagingBag(stationToken, cardToken);
+      return;
+    }
+    const sent = await emitEvent('PACKAGING_SNAPSHOT', {
       case_count: selectedPackagingCaseCount(),
       display_count: optionalNonNegativeInt('wf-loose-displays', 'Displays not in a full case'),
       packs_remaining: optionalNonNegativeInt('wf-packs-remaining', 'Single cards / bottles remaining'),
@@ -2505,18 +2572,29 @@
       configureStationActions();
       refreshStationOccupancy().catch(function () {});
       startCooldownAfterSuccess('submit');
-      statusLine(MSG_PARTIAL_PACKAGING_SAVED + MSG_SCAN_NEXT_CARD, 'success');
-      fullscreenSubmitOk('Partial packaging count saved.');
+      statusLine(sentText(sent, MSG_PARTIAL_PACKAGING_SAVED + MSG_SCAN_NEXT_CARD), 'success');
+      fullscreenSubmitOk(sentText(sent, 'Partial packaging count saved.'));
       return;
     }
-    const stationToken = document.getElementById('wf-station-token').value;
-    const cardToken = productInput() ? String(productInput().value || '').trim() : '';
+    pendingFinalSnapshot = { cardToken: cardToken, key: sent.idempotency_key || null };
+    if (sent.queued) {
+      // The connection dropped: finalize after the snapshot is sent, without recording it again.
+      statusLine(
+        sentText(sent, 'Packaging count saved. Tap Submit again once it is sent to finalize the bag.'),
+        'success'
+      );
+      return;
+    }
+    await finalizePackagingBag(stationToken, cardToken);
+  }
+  async function finalizePackagingBag(stationToken, cardToken) {
     await postJson('/workflow/floor/api/finalize', {
       station_token: stationToken,
       card_token: cardToken,
       device_id: deviceId(),
       page_session_id: pageSessionId(),
     });
+    pendingFinalSnapshot = null;
     clearCountField();
     clearEmployeeNameField();
     clearPackagingSnapshotFields();
@@ -2535,7 +2613,7 @@
       throw new Error('Taken for delivery is only for packaging stations.');
     }
     assertActionCooldown('taken');
-    await emitEvent('PACKAGING_TAKEN_FOR_ORDER', {
+    const sent = await emitEvent('PACKAGING_TAKEN_FOR_ORDER', {
       displays_taken: selectedTakenDisplaysTotal(),
       employee_name: requiredEmployeeName(),
       note: 'taken_for_delivery',
@@ -2547,21 +2625,134 @@
     configureStationActions();
     setActionsEnabled(true);
     startCooldownAfterSuccess('taken');
-    statusLine('Taken-for-order displays recorded.' + MSG_SCAN_NEXT_CARD, 'success');
-    fullscreenSubmitOk('Taken-for-order recorded.');
+    statusLine(sentText(sent, 'Taken-for-order displays recorded.' + MSG_SCAN_NEXT_CARD), 'success');
+    fullscreenSubmitOk(sentText(sent, 'Taken-for-order recorded.'));
+  }
+  /** Offline queue: events recorded while the network is down, replayed in order via the batch API. */
+  var WF_EVENT_QUEUE_KEY = 'wf_event_queue';
+  var EVENT_QUEUE_BATCH_SIZE = 50;
+  var EVENT_QUEUE_FLUSH_MS = 15 * 1000;
+  var eventQueueFlushing = false;
+  /** Keys of queued entries the server rejected on replay (this page load). */
+  var rejectedEventKeys = {};
+  /** Final packaging snapshot that went to the queue; the next Submit for that card only finalizes. */
+  var pendingFinalSnapshot = null;
+  function loadEventQueue() {
+    try {
+      var q = JSON.parse(localStorage.getItem(WF_EVENT_QUEUE_KEY) || '[]');
+      return Array.isArray(q) ? q : [];
+    } catch (e) {
+      return [];
+    }
+  }
+  function saveEventQueue(q) {
+    if (q.length) {
+      localStorage.setItem(WF_EVENT_QUEUE_KEY, JSON.stringify(q));
+    } else {
+      localStorage.removeItem(WF_EVENT_QUEUE_KEY);
+    }
+    renderEventQueueStatus(q.length);
+  }
+  function renderEventQueueStatus(n) {
+    var el = document.getElementById('wf-event-queue');
+    if (!el) return;
+    if (n > 0) {
+      el.textContent = n + (n === 1 ? ' entry' : ' entries') + ' saved on this tablet — sending when the network is back.';
+      el.classList.remove('hidden');
+    } else {
+      el.textContent = '';
+      el.classList.add('hidden');
+    }
+  }
+  function enqueueEvent(ev) {
+    var q = loadEventQueue();
+    q.push(ev);
+    saveEventQueue(q);
+  }
+  async function flushEventQueue() {
+    if (eventQueueFlushing || navigator.onLine === false) return;
+    var q = loadEventQueue();
+    if (!q.length) return;
+    eventQueueFlushing = true;
+    try {
+      var batch = q.slice(0, EVENT_QUEUE_BATCH_SIZE);
+      var r;
+      try {
+        r = await fetch('/workflow/floor/api/events/batch', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ device_id: deviceId(), page_session_id: pageSessionId(), events: batch }),
+        });
+      } catch (e) {
+        return;
+      }
+      // Busy / rate limited / server error: keep everything and retry on the next tick.
+      if (r.status === 429 || r.status >= 500) return;
+      var data = await r.json().catch(() => ({}));
+      var done = {};
+      var rejected = [];
+      if (r.ok && Array.isArray(data.results)) {
+        data.results.forEach(function (res, i) {
+          if (!res) return;
+          done[batch[i].idempotency_key] = true;
+          if (!res.ok) {
+            rejectedEventKeys[batch[i].idempotency_key] = true;
+            rejected.push(batch[i].event_type + ': ' + (res.message || res.code || 'rejected'));
+          }
+        });
+      } else {
+        // The batch itself was refused (malformed): drop it so it cannot block later entries.
+        batch.forEach(function (ev) {
+          done[ev.idempotency_key] = true;
+          rejectedEventKeys[ev.idempotency_key] = true;
+        });
+        rejected.push(data.message || 'Saved entries could not be sent (' + r.status + ').');
+      }
+      // Re-read: events may have been queued while the request was in flight.
+      saveEventQueue(
+        loadEventQueue().filter(function (ev) {
+          return !done[ev.idempotency_key];
+        })
+      );
+      if (rejected.length) {
+        statusLine('Saved entries not accepted by the server — ' + rejected.join('; '), 'error');
+      }
+      refreshStationOccupancy().catch(function () {});
+    } finally {
+      eventQueueFlushing = false;
+    }
+    if (loadEventQueue().length) flushEventQueue().catch(function () {});
   }
   async function emitEvent(eventType, payload) {
     const stationToken = document.getElementById('wf-station-token').value;
     const inp = productInput();
     const cardToken = inp ? inp.value.trim() : '';
-    const data = await postJson('/workflow/floor/api/event', {
+    const ev = {
+      idempotency_key: (crypto.randomUUID && crypto.randomUUID()) || (Date.now() + '-' + Math.random()),
+      client_ts: Date.now(),
       station_token: stationToken,
       card_token: cardToken,
       device_id: deviceId(),
-      page_session_id: pageSessionId(),
       event_type: eventType,
       payload: payload || {},
-    });
+    };
+    // Keep order: while entries are waiting, new ones go behind them.
+    if (navigator.onLine === false || loadEventQueue().length) {
+      enqueueEvent(ev);
+      flushEventQueue().catch(function () {});
+      return { ok: true, queued: true, idempotency_key: ev.idempotency_key };
+    }
+    let data;
+    try {
+      data = await postJson('/workflow/floor/api/event', Object.assign({ page_session_id: pageSessionId() }, ev));
+    } catch (e) {
+      // fetch() rejects with TypeError on a network failure. The server may still have committed
+      // the event (the connection can drop after the commit); queueing is safe because the replay
+      // carries the same idempotency_key and the server returns the stored result instead.
+      if (!(e instanceof TypeError)) throw e;
+      enqueueEvent(ev);
+      return { ok: true, queued: true, idempotency_key: ev.idempotency_key };
+    }
     applyStationFacts(data);
     refreshStationOccupancy().catch(function () {});
     return data;
@@ -2577,7 +2768,7 @@
     if (data.idempotent_duplicate) {
       statusLine('Station already resumed.', 'success');
     } else {
-      statusLine('Station resumed — enter counts for this run.', 'success');
+      statusLine(sentText(data, 'Station resumed — enter counts for this run.'), 'success');
     }
     if (stationKind() === 'packaging') {
       packagingUiPhase = 'pick';
@@ -2587,6 +2778,10 @@
   }
   document.addEventListener('DOMContentLoaded', () => {
     loadEmployeeNameFromStorage();
+    renderEventQueueStatus(loadEventQueue().length);
+    window.addEventListener('online', () => flushEventQueue().catch(function () {}));
+    setInterval(() => flushEventQueue().catch(function () {}), EVENT_QUEUE_FLUSH_MS);
+    flushEventQueue().catch(function () {});
     resetLoadedBagState(false);
     configureStationActions();
     applyOccupancyGateUi();
@@ -2600,6 +2795,7 @@
       .catch(function (e) {
         statusLine(String(e), 'error');
       });
+    startWorkflowEventStream();
     const inp = productInput();
     if (inp) {
       inp.addEventListener('input', () => {
@@ -1,4 +1,33 @@
 """Pytest: relax Zoho integration URL requirement (Docker sets TABLETTRACKER_SELF_HOSTED)."""
 import os
+import sqlite3
+import tempfile
 
 os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+
+# Columns the Alembic chain adds on top of the base schema that service tests read.
+MIGRATED_COLUMNS = (
+    ("warehouse_submissions", "bag_id", "INTEGER"),
+    ("warehouse_submissions", "needs_review", "INTEGER DEFAULT 0"),
+    ("warehouse_submissions", "submission_type", "TEXT DEFAULT 'packaged'"),
+    ("warehouse_submissions", "tablets_pressed_into_cards", "INTEGER DEFAULT 0"),
+    ("receiving", "closed", "BOOLEAN DEFAULT FALSE"),
+)
+
+
+def make_schema_db() -> str:
+    """Temp SQLite file with the base schema plus ``MIGRATED_COLUMNS``; the caller unlinks it."""
+    from app.models.schema import SchemaManager
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    SchemaManager(path).initialize_all_tables()
+    conn = sqlite3.connect(path)
+    try:
+        for table, name, decl in MIGRATED_COLUMNS:
+            if name not in {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
@@ -1,11 +1,13 @@
 """Regression tests for auth on previously open API and page routes."""
 
 import os
+import sqlite3
 import tempfile
 import unittest
 from unittest.mock import patch
 
 from app import create_app
+from app.services.telegram_outbox import ensure_telegram_outbox
 from config import Config
 
 
@@ -35,9 +37,24 @@ class TestApiSecuredRoutes(unittest.TestCase):
 
 class TestTelegramWebhookAuth(unittest.TestCase):
     def setUp(self):
+        self._orig = (Config.DATABASE_PATH, Config.TELEGRAM_OUTBOX_WORKER)
+        fd, self._db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        conn = sqlite3.connect(self._db_path)
+        ensure_telegram_outbox(conn)
+        conn.commit()
+        conn.close()
+        # Accepted commands are queued here and, with no sender thread, replied to inline.
+        Config.DATABASE_PATH = self._db_path
+        Config.TELEGRAM_OUTBOX_WORKER = False
         self.app = create_app()
         self.client = self.app.test_client()
 
+    def tearDown(self):
+        Config.DATABASE_PATH, Config.TELEGRAM_OUTBOX_WORKER = self._orig
+        if os.path.exists(self._db_path):
+            os.remove(self._db_path)
+
     def test_webhook_accepts_header_secret_without_path(self):
         with patch("config.Config.TELEGRAM_BOT_TOKEN", "abc"), patch(
             "config.Config.TELEGRAM_WEBHOOK_SECRET", "supersecret"
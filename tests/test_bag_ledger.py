@@ -0,0 +1,106 @@
+"""bag_ledger: triggers keep rows equal to the source recomputation; reconcile reports and fixes drift."""
+import os
+import sqlite3
+import unittest
+
+from app.services.bag_ledger import (
+    LEDGER_COLUMNS,
+    bag_ledger_counts,
+    ensure_bag_ledger,
+    ledger_source_sql,
+    reconcile_bag_ledger,
+)
+
+from tests.conftest import make_schema_db
+
+
+class TestBagLedger(unittest.TestCase):
+    def setUp(self):
+        self.path = make_schema_db()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO product_details (id, product_name, packages_per_display, tablets_per_package, tablets_per_bottle)
+            VALUES (1, 'Cherry Card', 10, 2, NULL), (2, 'Cherry Bottle', NULL, NULL, 30);
+            INSERT INTO machines (id, machine_name, machine_role) VALUES (101, 'Sealer', 'sealing'), (102, 'Blister', 'blister');
+            INSERT INTO bags (id, bag_number, bag_label_count, pill_count) VALUES (1, 1, 1000, NULL), (2, 2, 0, 500);
+            """
+        )
+        # Existing history is backfilled when the ledger is installed.
+        self._submit("Cherry Card", "packaged", 1, displays_made=3, packs_remaining=1, loose_tablets=5)
+        self.assertTrue(ensure_bag_ledger(self.conn))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _submit(self, product, sub_type, bag_id, **counts):
+        cols = ["employee_name", "product_name", "submission_type", "bag_id", *counts]
+        cur = self.conn.execute(
+            f"INSERT INTO warehouse_submissions ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+            ("op", product, sub_type, bag_id, *counts.values()),
+        )
+        return cur.lastrowid
+
+    def _assert_ledger_matches_source(self):
+        source = {r[0]: tuple(r[1:]) for r in self.conn.execute(ledger_source_sql("1=1"))}
+        ledger = {
+            r[0]: tuple(r[1:]) for r in self.conn.execute(f"SELECT bag_id, {', '.join(LEDGER_COLUMNS)} FROM bag_ledger")
+        }
+        self.assertEqual(ledger, source)
+
+    def test_triggers_follow_every_write_path(self):
+        row = bag_ledger_counts(self.conn, [1])[1]
+        self.assertEqual((row["packaged"], row["packaged_loose"], row["packaged_count"]), (62, 5, 67))
+        self.assertEqual(row["remaining"], 1000 - 62)
+
+        bottle_id = self._submit("Cherry Bottle", "bottle", 1, bottles_made=2)
+        self._submit("Cherry Card", "machine", 1, tablets_pressed_into_cards=40, packs_remaining=30, machine_id=101)
+        blister_id = self._submit("Cherry Card", "machine", 2, tablets_pressed_into_cards=40, packs_remaining=30, machine_id=102)
+        self._submit("Cherry Card", "repack", 2, displays_made=1)
+        self.conn.execute("INSERT INTO submission_bag_deductions (submission_id, bag_id, tablets_deducted) VALUES (?, 2, 25)", (bottle_id,))
+        self._assert_ledger_matches_source()
+        self.assertEqual(bag_ledger_counts(self.conn, [1])[1]["machine"], 60)
+        self.assertEqual(bag_ledger_counts(self.conn, [2])[2]["remaining"], 500 - 40 - 20 - 25)
+
+        self.conn.execute("UPDATE warehouse_submissions SET bag_id = 1 WHERE id = ?", (blister_id,))
+        self.conn.execute("UPDATE product_details SET tablets_per_package = 3 WHERE id = 1")
+        self.conn.execute("UPDATE machines SET machine_role = 'blister' WHERE id = 101")
+        self.conn.execute("UPDATE bags SET bag_label_count = 900 WHERE id = 1")
+        self.conn.execute("DELETE FROM warehouse_submissions WHERE id = ?", (bottle_id,))
+        self.conn.execute("DELETE FROM submission_bag_deductions")
+        self.conn.execute("INSERT INTO bags (id, bag_number, bag_label_count) VALUES (3, 3, 10)")
+        self._assert_ledger_matches_source()
+        self.assertEqual(bag_ledger_counts(self.conn, [3])[3]["remaining"], 10)
+
+        self.conn.execute("DELETE FROM bags WHERE id = 3")
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM bag_ledger WHERE bag_id = 3").fetchone())
+
+    def test_bottle_reservation_counts_read_the_ledger(self):
+        from app.blueprints.api_receiving.routes_bags_zoho import _reservable_counts
+
+        bottle_id = self._submit("Cherry Bottle", "bottle", 1, bottles_made=2)
+        self.conn.execute("INSERT INTO submission_bag_deductions (submission_id, bag_id, tablets_deducted) VALUES (?, 1, 25)", (bottle_id,))
+        self._submit("Cherry Card", "machine", 1, tablets_pressed_into_cards=40, machine_id=102)
+        # Cards + bottles + variety deductions; loose tablets and machine counts stay reservable.
+        self.assertEqual(_reservable_counts(bag_ledger_counts(self.conn, [1])[1]), (1000, 62 + 60 + 25, 1000 - 147))
+        self.assertEqual(_reservable_counts(None), (0, 0, 0))
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.assertEqual(reconcile_bag_ledger(self.conn)["drifted"], 0)
+        self.conn.execute("UPDATE bag_ledger SET packaged = 0, packaged_count = 1 WHERE bag_id = 1")
+        self.conn.execute("DELETE FROM bag_ledger WHERE bag_id = 2")
+
+        report = reconcile_bag_ledger(self.conn, fix=True)
+        self.assertEqual((report["bags"], report["drifted"], report["missing"], report["fixed"]), (2, 1, 1, 2))
+        self.assertEqual(
+            {(d["column"], d["ledger"], d["source"]) for d in report["drift"]},
+            {("packaged", 0, 62), ("packaged_count", 1, 67)},
+        )
+        self._assert_ledger_matches_source()
+
+
+if __name__ == "__main__":
+    unittest.main()
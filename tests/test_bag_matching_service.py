@@ -0,0 +1,94 @@
+"""Batch flagged-submission matcher agrees with per-row find_matching_bags."""
+import os
+import sqlite3
+import unittest
+
+from app.services.bag_matching_service import find_matching_bags, match_flagged_submissions
+
+from tests.conftest import make_schema_db
+
+
+class TestMatchFlaggedSubmissions(unittest.TestCase):
+    def setUp(self):
+        self.path = make_schema_db()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry', 'INV-1'), (2, 'Lime', 'INV-2');
+            INSERT INTO product_details (id, product_name, tablet_type_id) VALUES (1, 'Lime Display', 2);
+            INSERT INTO purchase_orders (id, po_number, closed) VALUES (1, 'PO-1', 0), (2, 'PO-2', 0), (3, 'PO-3', 1);
+            INSERT INTO receiving (id, po_id) VALUES (1, 1), (2, 2), (3, 3);
+            INSERT INTO small_boxes (id, receiving_id, box_number) VALUES (1, 1, 1), (2, 2, 1), (3, 3, 2), (4, 1, 3);
+            -- (Cherry, box 1, bag 1) is open on two POs; bag 2 only on PO-1; box 2 lives on the closed PO-3.
+            INSERT INTO bags (id, small_box_id, bag_number, tablet_type_id, status) VALUES
+                (1, 1, 1, 1, 'Available'), (2, 2, 1, 1, 'Available'), (3, 1, 2, 1, 'Available'),
+                (4, 3, 1, 1, 'Available'), (5, 4, 5, 2, 'Closed'), (6, 1, 7, 2, 'Available');
+            """
+        )
+        subs = [
+            # (inventory_item_id, product_name, box, bag, type)
+            ("INV-1", "Cherry", 1, 1, "packaged"),  # ambiguous
+            ("INV-1", "Cherry", "1", "2", "packaged"),  # text numbers, unique
+            ("INV-1", "Cherry", 2, 1, "packaged"),  # closed PO only
+            (None, "Lime Display", None, 5, "packaged"),  # product fallback, closed bag allowed
+            (None, "Lime Display", "", 5, "machine"),  # closed bag excluded
+            ("INV-2", "Lime", " ", 7, None),  # blank box -> flavor match
+            ("INV-1", "Cherry", 1, None, "packaged"),  # no bag number
+            ("INV-9", "Unknown", 1, 1, "packaged"),  # no tablet type
+        ]
+        for inv, product, box, bag, sub_type in subs:
+            self.conn.execute(
+                """
+                INSERT INTO warehouse_submissions
+                    (employee_name, inventory_item_id, product_name, box_number, bag_number, submission_type, needs_review)
+                VALUES ('op', ?, ?, ?, ?, ?, 1)
+                """,
+                (inv, product, box, bag, sub_type),
+            )
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _expected_assignments(self):
+        """Per-row reference: the pre-batch loop over find_matching_bags."""
+        tt_by_item = {r["inventory_item_id"]: r["id"] for r in self.conn.execute("SELECT * FROM tablet_types")}
+        tt_by_product = {r["product_name"]: r["tablet_type_id"] for r in self.conn.execute("SELECT * FROM product_details")}
+        expected = {}
+        for sub in self.conn.execute("SELECT * FROM warehouse_submissions WHERE needs_review = 1 AND bag_id IS NULL"):
+            sub = dict(sub)
+            sub["tablet_type_id"] = tt_by_item.get(sub["inventory_item_id"]) or tt_by_product.get(sub["product_name"])
+            if not sub["tablet_type_id"] or not sub["bag_number"]:
+                continue
+            bags = find_matching_bags(self.conn, sub, sub["submission_type"] != "packaged")
+            if len(bags) == 1:
+                expected[sub["id"]] = (bags[0]["bag_id"], bags[0]["po_id"])
+        return expected
+
+    def test_batch_matches_per_row_reference(self):
+        expected = self._expected_assignments()
+        self.assertEqual(expected, {2: (3, 1), 4: (5, 1), 6: (6, 1)})
+
+        report = match_flagged_submissions(self.conn)
+        self.assertEqual(
+            {k: report[k] for k in ("flagged", "eligible", "assigned", "ambiguous", "unmatched")},
+            {"flagged": 8, "eligible": 6, "assigned": 3, "ambiguous": 1, "unmatched": 2},
+        )
+        rows = self.conn.execute("SELECT id, bag_id, assigned_po_id, needs_review FROM warehouse_submissions").fetchall()
+        assigned = {r["id"]: (r["bag_id"], r["assigned_po_id"]) for r in rows if r["bag_id"] is not None}
+        self.assertEqual(assigned, expected)
+        self.assertEqual({r["id"] for r in rows if r["needs_review"] == 0}, set(expected))
+
+    def test_closing_a_po_resolves_ambiguous_match(self):
+        match_flagged_submissions(self.conn)
+        self.conn.execute("UPDATE purchase_orders SET closed = 1 WHERE id = 2")
+        report = match_flagged_submissions(self.conn)
+        self.assertEqual((report["flagged"], report["assigned"]), (5, 1))
+        row = self.conn.execute("SELECT bag_id, assigned_po_id FROM warehouse_submissions WHERE id = 1").fetchone()
+        self.assertEqual(tuple(row), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,10 @@
 """Tests for bag stage-yield (running totals) and aggregate reporting."""
+import os
 import sqlite3
+import tempfile
 import unittest
 
-from app.services.bag_check_totals import compute_bag_check_totals
+from app.services.bag_check_totals import compute_bag_check_totals, compute_bag_check_totals_batch
 from app.services.reporting_analytics_service import aggregate_stage_yield
 
 
@@ -118,6 +120,46 @@ class TestBagStageYield(unittest.TestCase):
         self.assertEqual(t["n"], 1)
         self.assertIsNotNone(t["weighted_mean"])
 
+    def _add_matching_bags(self):
+        """Bag 2 matches by receipt and unassigned item/bag/PO rows; bag 3 is unresolvable (no box)."""
+        self.conn.executescript(
+            """
+            INSERT INTO bags (id, small_box_id, tablet_type_id, bag_number, bag_label_count, pill_count)
+                VALUES (2, 1, 1, 4, 500, NULL), (3, NULL, 1, 9, 100, NULL);
+            INSERT INTO warehouse_submissions (id, bag_id, inventory_item_id, bag_number, box_number, assigned_po_id,
+                submission_type, product_name, receipt_number, displays_made, packs_remaining, machine_id, created_at)
+            VALUES
+                (4, NULL, 'INV-1', 4, NULL, 55, 'machine', 'Prod A', 'R-9', 0, 6, 20, '2026-04-23 08:00:00'),
+                (5, 2, 'INV-1', 4, 3, 55, 'machine', 'Prod A', NULL, 2, 0, 10, '2026-04-23 07:00:00'),
+                (6, NULL, 'INV-7', NULL, NULL, NULL, 'packaged', 'Prod A', 'R-9', 1, 1, NULL, '2026-04-23 09:00:00'),
+                (7, NULL, 'INV-1', 4, 8, 55, 'packaged', 'Prod A', NULL, 3, 0, NULL, '2026-04-23 09:30:00');
+            """
+        )
+
+    def test_batch_matches_single_bag_totals(self):
+        self._add_matching_bags()
+        expected = {bid: compute_bag_check_totals(self.conn, bid) for bid in (1, 2)}
+        self.assertEqual(compute_bag_check_totals(self.conn, 3), {})
+        self.assertEqual(expected[2]["packaged_tablets_total"], 24)
+
+        self.assertEqual(compute_bag_check_totals_batch(self.conn, [2, 1, 3, 2, 99]), expected)
+        self.assertEqual(compute_bag_check_totals_batch(self.conn, [1, 2, 3], chunk_size=1), expected)
+        self.assertEqual(compute_bag_check_totals_batch(self.conn, []), {})
+
+    def test_batch_process_pool_on_file_database(self):
+        self._add_matching_bags()
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            disk = sqlite3.connect(path)
+            self.conn.backup(disk)
+            disk.row_factory = sqlite3.Row
+            expected = compute_bag_check_totals_batch(disk, [1, 2, 3])
+            self.assertEqual(compute_bag_check_totals_batch(disk, [1, 2, 3], workers=2, chunk_size=1), expected)
+            disk.close()
+        finally:
+            os.unlink(path)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,108 @@
+"""blister_press_counter: triggers keep per-station press totals in step with workflow_events."""
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app.models.schema import SchemaManager
+from app.services.blister_press_counter import (
+    _scan_press_count,
+    blister_press_count,
+    ensure_blister_press_counters,
+    rebuild_blister_press_counters,
+)
+from app.services.workflow_append import WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL
+
+
+class TestBlisterPressCounter(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _event(self, event_type, payload, station_id=None):
+        cur = self.conn.execute(
+            """
+            INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id, station_id)
+            VALUES (?, ?, 1000, 1, ?)
+            """,
+            (event_type, json.dumps(payload), station_id),
+        )
+        # Raw rows skip append_workflow_event; fill the typed payload columns it would have set.
+        self.conn.execute(f"{WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL} WHERE id = ?", (cur.lastrowid,))
+        return cur.lastrowid
+
+    def _counts(self, *stations):
+        return [blister_press_count(self.conn, sid) for sid in stations]
+
+    def test_appends_corrections_and_deletes(self):
+        first = self._event("BLISTER_COMPLETE", {"counter_start": 100, "counter_end": 140}, station_id=7)
+        self._event("BLISTER_COMPLETE", {"count_total": 25}, station_id=7)
+        self._event("BLISTER_COMPLETE", {"station_id": 8, "count_total": 10})
+        self._event("SEALING_COMPLETE", {"count_total": 99}, station_id=7)
+        self.assertEqual(self._counts(7, 8, 9), [65.0, 10.0, 0.0])
+        self.assertEqual(self._counts(7, 8), [_scan_press_count(self.conn, 7), _scan_press_count(self.conn, 8)])
+
+        second = self.conn.execute(
+            "SELECT MAX(id) FROM workflow_events WHERE event_type = 'BLISTER_COMPLETE' AND station_id = 7"
+        ).fetchone()[0]
+        for count in (30, 20):
+            self._event(
+                "SUBMISSION_CORRECTED",
+                {
+                    "target_event_id": second,
+                    "corrected_event_type": "BLISTER_COMPLETE",
+                    "corrected_payload": {"count_total": count},
+                },
+                station_id=7,
+            )
+        self.assertEqual(self._counts(7), [60.0])
+
+        self.conn.execute("DELETE FROM workflow_events WHERE id = ?", (first,))
+        self.assertEqual(self._counts(7), [20.0])
+        row = self.conn.execute("SELECT events FROM blister_press_counters WHERE station_id = 7").fetchone()
+        self.assertEqual(row["events"], 1)
+
+    def test_rebuild_matches_triggers(self):
+        target = self._event("BLISTER_COMPLETE", {"count_total": 12}, station_id=3)
+        self._event("BLISTER_COMPLETE", {"counter_start": 5, "counter_end": 9}, station_id=3)
+        self._event(
+            "SUBMISSION_CORRECTED",
+            {"target_event_id": target, "corrected_event_type": "BLISTER_COMPLETE", "corrected_payload": {"count_total": 2}},
+        )
+        live = self._counts(3)
+        self.assertEqual(live, [6.0])
+        self.conn.execute("DELETE FROM blister_press_counters")
+        rebuild_blister_press_counters(self.conn)
+        self.assertEqual(self._counts(3), live)
+
+    def test_backfills_when_tables_start_empty(self):
+        # A database from before the counter: no triggers, no tables.
+        for (name,) in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_blister_press%'"
+        ).fetchall():
+            self.conn.execute(f"DROP TRIGGER {name}")
+        for ddl in ("DROP TABLE blister_press_events", "DROP TABLE blister_press_counters"):
+            self.conn.execute(ddl)
+        self.assertEqual(self._counts(4), [0.0])
+        self.conn.execute(
+            "INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id, station_id) "
+            "VALUES ('BLISTER_COMPLETE', '{\"count_total\": 8}', 1000, 1, 4)"
+        )
+        self.conn.execute(WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL)
+        # Without the table the reader falls back to scanning events.
+        self.assertEqual(self._counts(4), [8.0])
+        self.assertTrue(ensure_blister_press_counters(self.conn))
+        self.assertEqual(self._counts(4), [8.0])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM blister_press_events").fetchone()[0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,3 +36,95 @@ class TestCacheUtils(unittest.TestCase):
         cache_set('a', 1, 60.0)
         clear()
         self.assertIsNone(get('a'))
+
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        from app.utils.cache_utils import TTLCache
+
+        self.now = [1000.0]
+        self.cache = TTLCache(max_entries=3, clock=lambda: self.now[0])
+
+    def test_none_is_cached_and_lru_evicts(self):
+        self.cache.set('none', None, 60)
+        self.assertIsNone(self.cache.get('none', default='miss'))
+        for key in ('a', 'b'):
+            self.cache.set(key, key, 60)
+        self.cache.get('none')  # most recently used
+        self.cache.set('c', 'c', 60)
+        self.assertEqual(self.cache.get('a', default='miss'), 'miss')
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (3, 1))
+
+    def test_namespaces_and_negative_ttl(self):
+        self.cache.set(1, 'x', 60, namespace='po')
+        self.cache.set(1, 'y', 60, namespace='rx')
+        self.assertEqual(self.cache.invalidate('po'), 1)
+        self.assertEqual((self.cache.get(1, namespace='po'), self.cache.get(1, namespace='rx')), (None, 'y'))
+
+        calls = []
+
+        def lookup():
+            calls.append(1)  # not found -> None
+        self.cache.get_or_set('missing', lookup, 60, negative_ttl=5)
+        self.cache.get_or_set('missing', lookup, 60, negative_ttl=5)
+        self.now[0] += 6
+        self.cache.get_or_set('missing', lookup, 60, negative_ttl=5)
+        self.assertEqual(len(calls), 2)
+
+    def test_single_flight_build(self):
+        import threading
+        import time
+
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return 'built'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get_or_set('k', slow, 60))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual((len(calls), results), (1, ['built'] * 8))
+        self.assertEqual(self.cache.stats()['coalesced'] + self.cache.stats()['hits'], 7)
+
+    def test_stale_while_revalidate(self):
+        import threading
+
+        version = [1]
+        rebuilt = threading.Event()
+
+        def build():
+            if version[0] > 1:
+                rebuilt.set()
+            return version[0]
+
+        self.assertEqual(self.cache.get_or_set('k', build, 10, stale_seconds=30), 1)
+        version[0] = 2
+        self.now[0] += 15
+        self.assertEqual(self.cache.get_or_set('k', build, 10, stale_seconds=30), 1)  # stale, refresh started
+        self.assertTrue(rebuilt.wait(5))
+        for _ in range(100):
+            if self.cache.get('k') == 2:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(self.cache.get_or_set('k', build, 10, stale_seconds=30), 2)
+        self.now[0] += 100  # past the stale window: a plain miss
+        self.assertIsNone(self.cache.get('k'))
+        self.assertEqual(self.cache.stats()['stale_hits'], 1)
+
+    def test_plain_get_counts_stale_entry_as_miss(self):
+        self.cache.set('k', 'v', 10, stale_seconds=30)
+        self.now[0] += 15
+        self.assertEqual(self.cache.get('k', default='miss'), 'miss')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['stale_hits'], stats['misses']), (0, 0, 1))
+        self.assertEqual(self.cache.get_or_set('k', lambda: 'new', 10, stale_seconds=30), 'v')  # still served stale
+        self.assertEqual(self.cache.stats()['stale_hits'], 1)
@@ -0,0 +1,91 @@
+"""data_versions: triggers bump per-table counters; /api/versions and report fingerprint read them."""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app import create_app
+from app.models import database as database_module
+from app.models.schema import SchemaManager
+from app.services.data_versions import WATCHED_TABLES, read_data_versions, versions_key
+from app.services.reporting_analytics_service import get_report_fingerprint
+from app.services.workflow_append import append_workflow_event
+from config import Config
+
+
+class TestDataVersions(unittest.TestCase):
+    def setUp(self):
+        self._orig_db = Config.DATABASE_PATH
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+
+    def tearDown(self):
+        self.conn.close()
+        Config.DATABASE_PATH = self._orig_db
+        database_module._migrations_run = False
+        os.unlink(self.path)
+
+    def _bumped(self, sql, params=()):
+        before = read_data_versions(self.conn)
+        self.conn.execute(sql, params)
+        after = read_data_versions(self.conn)
+        return {name for name in after if after[name] != before[name]}
+
+    def test_triggers_bump_only_the_written_table(self):
+        self.assertEqual(set(read_data_versions(self.conn)), set(WATCHED_TABLES))
+        self.assertEqual(
+            self._bumped("INSERT INTO purchase_orders (id, po_number) VALUES (1, 'PO-1')"), {"purchase_orders"}
+        )
+        self.assertEqual(
+            self._bumped("INSERT INTO warehouse_submissions (id, employee_name, product_name) VALUES (1, 'op', 'A')"),
+            {"warehouse_submissions"},
+        )
+        fingerprint = get_report_fingerprint(self.conn)
+        # Edits keep COUNT(*) / MAX(id) unchanged; the counters still move.
+        self.assertEqual(
+            self._bumped("UPDATE warehouse_submissions SET displays_made = 3 WHERE id = 1"), {"warehouse_submissions"}
+        )
+        self.assertNotEqual(get_report_fingerprint(self.conn), fingerprint)
+        self.assertEqual(self._bumped("DELETE FROM purchase_orders WHERE id = 1"), {"purchase_orders"})
+        self.assertEqual(self._bumped("UPDATE machines SET machine_name = 'M' WHERE id = 1"), set())
+
+        self.conn.execute("DROP TABLE data_versions")
+        self.assertIsNone(versions_key(self.conn, ("bags",)))
+        self.assertEqual(len(get_report_fingerprint(self.conn)), 32)
+
+    def test_workflow_append_bumps_once(self):
+        self.conn.execute("INSERT INTO workflow_bags (id, created_at) VALUES (1, 1)")
+        before = read_data_versions(self.conn)["workflow_events"]
+        event_id = append_workflow_event(self.conn, "BLISTER_COMPLETE", {"count_total": 5}, 1, station_id=2)
+        self.assertEqual(read_data_versions(self.conn)["workflow_events"], before + 1)
+        # A payload repair is one change, not one per refilled typed column.
+        self.conn.execute("UPDATE workflow_events SET payload = '{\"count_total\": 6}' WHERE id = ?", (event_id,))
+        self.assertEqual(read_data_versions(self.conn)["workflow_events"], before + 2)
+
+    def test_api_versions_endpoint(self):
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        client = create_app().test_client()
+        self.assertEqual(client.get("/api/versions").status_code, 401)
+        with client.session_transaction() as s:
+            s["admin_authenticated"] = True
+
+        r = client.get("/api/versions")
+        self.assertEqual(r.status_code, 200)
+        versions = r.get_json()["versions"]
+        self.assertEqual(versions, read_data_versions(self.conn))
+        self.assertEqual(client.get("/api/versions", headers={"If-None-Match": r.headers["ETag"]}).status_code, 304)
+
+        self.conn.execute("INSERT INTO bags (bag_number) VALUES (1)")
+        self.conn.commit()
+        r2 = client.get("/api/versions", headers={"If-None-Match": r.headers["ETag"]})
+        self.assertEqual(r2.status_code, 200)
+        self.assertEqual(r2.get_json()["versions"]["bags"], versions["bags"] + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
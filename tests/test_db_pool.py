@@ -0,0 +1,121 @@
+"""Tests for the per-process SQLite connection pool."""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app.utils import db_pool, db_utils
+from config import Config
+
+
+class TestDbPool(unittest.TestCase):
+    def setUp(self):
+        fd, self._db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self._orig_path = Config.DATABASE_PATH
+        Config.DATABASE_PATH = self._db_path
+        db_pool.close_all_pools()
+        db_pool.reset_pool_metrics()
+
+    def tearDown(self):
+        db_pool.close_all_pools()
+        Config.DATABASE_PATH = self._orig_path
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self._db_path + suffix)
+            except OSError:
+                pass
+
+    def test_connection_is_tuned(self):
+        conn = db_utils.get_db()
+        try:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertIs(conn.row_factory, sqlite3.Row)
+        finally:
+            conn.close()
+
+    def test_close_returns_connection_to_pool(self):
+        first = db_utils.get_db()
+        first.close()
+        second = db_utils.get_db()
+        second.close()
+        self.assertIs(first, second)
+        stats = db_pool.pool_metrics()["writer"]
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_reader_and_writer_pools_are_separate(self):
+        writer = db_utils.get_db()
+        writer.close()
+        with db_utils.db_read_only() as reader:
+            self.assertIsNot(reader, writer)
+        stats = db_pool.pool_metrics()
+        self.assertEqual(stats["reader"]["checkouts"], 1)
+        self.assertEqual(stats["writer"]["checkouts"], 1)
+
+    def test_release_rolls_back_uncommitted_work(self):
+        with db_utils.db_transaction() as conn:
+            conn.execute("CREATE TABLE t (v INTEGER)")
+        conn = db_utils.get_db()
+        conn.execute("INSERT INTO t (v) VALUES (1)")
+        conn.close()
+        conn = db_utils.get_db()
+        try:
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+        finally:
+            conn.close()
+
+    def test_double_close_does_not_duplicate_pool_entry(self):
+        conn = db_utils.get_db()
+        conn.close()
+        conn.close()
+        self.assertEqual(db_pool.pool_metrics()["writer"]["idle"], 1)
+
+    def test_replaced_database_file_drops_idle_connections(self):
+        conn = db_utils.get_db()
+        conn.execute("CREATE TABLE old_t (v INTEGER)")
+        conn.commit()
+        conn.close()
+        os.remove(self._db_path)
+        fresh = sqlite3.connect(self._db_path)
+        fresh.execute("CREATE TABLE new_t (v INTEGER)")
+        fresh.commit()
+        fresh.close()
+        conn = db_utils.get_db()
+        try:
+            names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.assertIn("new_t", names)
+            self.assertNotIn("old_t", names)
+        finally:
+            conn.close()
+
+    def test_busy_retry_metrics(self):
+        from app.services.workflow_txn import run_with_busy_retry
+
+        attempts = [0]
+
+        def _flaky():
+            attempts[0] += 1
+            if attempts[0] < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return "ok"
+
+        self.assertEqual(run_with_busy_retry(_flaky, op_name="unit_test"), "ok")
+        self.assertEqual(db_pool.pool_metrics()["busy_retries"].get("unit_test"), 2)
+
+    def test_pool_disabled_returns_plain_connection(self):
+        Config.DB_POOL_ENABLED = False
+        try:
+            conn = db_utils.get_db()
+            self.assertNotIsInstance(conn, db_pool.PooledConnection)
+            conn.close()
+        finally:
+            Config.DB_POOL_ENABLED = True
+
+
+if __name__ == "__main__":
+    unittest.main()
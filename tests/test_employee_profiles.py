@@ -0,0 +1,90 @@
+"""Employee profile cache behind role_required / locale selection: no per-request queries, admin edits invalidate."""
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.models import database as database_module
+from app.models.schema import SchemaManager
+from app.services import employee_profiles
+from app.utils.auth_utils import get_employee_role
+from config import Config
+
+
+class TestEmployeeProfiles(unittest.TestCase):
+    def setUp(self):
+        self._orig_db = Config.DATABASE_PATH
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+        conn = sqlite3.connect(self.path)
+        cur = conn.execute(
+            "INSERT INTO employees (username, full_name, password_hash, role, preferred_language) VALUES ('lead', 'Lead', 'x', 'warehouse_staff', 'es')"
+        )
+        self.employee_id = cur.lastrowid
+        conn.commit()
+        conn.close()
+        employee_profiles.clear_employee_profiles()
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        app = create_app()
+        app.config["WTF_CSRF_ENABLED"] = False
+        self.client = app.test_client()
+
+    def tearDown(self):
+        Config.DATABASE_PATH = self._orig_db
+        database_module._migrations_run = False
+        employee_profiles.clear_employee_profiles()
+        for path in (self.path, f"{self.path}.employees-version"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def _login(self, **extra):
+        with self.client.session_transaction() as s:
+            s.clear()
+            s.update(employee_authenticated=True, employee_id=self.employee_id, employee_username="lead", **extra)
+
+    def test_role_checks_use_cache_until_admin_edit(self):
+        self._login()
+        with mock.patch.object(employee_profiles, "_load", wraps=employee_profiles._load) as load:
+            self.assertEqual(self.client.get("/api/reports/po-summary").status_code, 403)
+            self.assertEqual(self.client.get("/api/reports/po-summary").status_code, 403)
+            self.assertEqual(get_employee_role("lead"), "warehouse_staff")
+            self.assertEqual(load.call_count, 1)
+
+            with self.client.session_transaction() as s:
+                s["admin_authenticated"] = True
+            r = self.client.post(f"/api/update_employee_role/{self.employee_id}", json={"role": "manager"})
+            self.assertEqual(r.status_code, 200)
+            self._login()
+            self.assertEqual(self.client.get("/api/reports/po-summary").status_code, 200)
+            self.assertEqual(load.call_count, 2)
+
+            with self.client.session_transaction() as s:
+                s["admin_authenticated"] = True
+            self.client.post(f"/api/toggle_employee/{self.employee_id}")
+            self.assertIsNone(get_employee_role("lead"))
+
+    def test_other_worker_bump_and_locale(self):
+        self.assertEqual(employee_profiles.get_employee_profile(employee_id=self.employee_id).preferred_language, "es")
+        conn = sqlite3.connect(self.path)
+        conn.execute("UPDATE employees SET role = 'admin', preferred_language = 'en' WHERE id = ?", (self.employee_id,))
+        conn.commit()
+        conn.close()
+        self.assertEqual(get_employee_role("lead"), "warehouse_staff")  # cached
+
+        # Another worker's bump only touches the stamp file.
+        stamp = f"{self.path}.employees-version"
+        with open(stamp, "a"):
+            pass
+        os.utime(stamp, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+        self.assertEqual(get_employee_role("lead"), "admin")
+        self.assertEqual(employee_profiles.get_employee_profile(employee_id=self.employee_id).preferred_language, "en")
+
+
+if __name__ == "__main__":
+    unittest.main()
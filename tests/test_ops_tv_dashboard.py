@@ -8,6 +8,7 @@ from pathlib import Path
 from app import create_app
 from app.models import database as database_module
 from app.models.migrations import MigrationRunner
+from app.services import ops_tv_snapshot_cache
 from config import Config
 
 
@@ -34,6 +35,7 @@ class TestOpsTvDashboard(unittest.TestCase):
         self.client = _admin_client(self.app)
 
     def tearDown(self):
+        ops_tv_snapshot_cache.clear()
         Config.DATABASE_PATH = self._orig_db
         database_module._migrations_run = False
         if os.path.exists(self._db_path):
@@ -81,6 +83,29 @@ class TestOpsTvDashboard(unittest.TestCase):
             self.assertIn("perf_tier", m)
             break
 
+    def test_snapshot_etag_and_watermark_invalidation(self):
+        r1 = self.client.get("/command-center/ops-tv/api/snapshot")
+        self.assertEqual(r1.status_code, 200)
+        etag = r1.headers.get("ETag")
+        self.assertTrue(etag)
+        self.assertNotIn("no-store", r1.headers.get("Cache-Control", ""))
+
+        r2 = self.client.get("/command-center/ops-tv/api/snapshot", headers={"If-None-Match": etag})
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2.data, b"")
+
+        # Served from the shared entry: same body, same generated_at_ms.
+        r3 = self.client.get("/command-center/ops-tv/api/snapshot")
+        self.assertEqual(r3.get_json()["generated_at_ms"], r1.get_json()["generated_at_ms"])
+
+        conn = sqlite3.connect(self._db_path)
+        conn.execute("INSERT INTO workflow_stations (station_scan_token, label) VALUES ('etag-st', 'New bench')")
+        conn.commit()
+        conn.close()
+        r4 = self.client.get("/command-center/ops-tv/api/snapshot", headers={"If-None-Match": etag})
+        self.assertEqual(r4.status_code, 200)
+        self.assertNotEqual(r4.headers.get("ETag"), etag)
+
     def test_oee_clamped_to_100_in_metrics_layer(self):
         source = Path("static/js/ops-metrics.js").read_text(encoding="utf-8")
         self.assertIn("Math.min(100", source)
@@ -129,6 +154,13 @@ class TestOpsTvDashboard(unittest.TestCase):
         self.assertIn("Bottle line not integrated yet", source)
         self.assertIn("forceNotIntegrated", source)
 
+    def test_side_panels_follow_stream_instead_of_fixed_poll(self):
+        source = Path("static/js/mes/command-center-app.js").read_text(encoding="utf-8")
+        self.assertIn('es.addEventListener("snapshot", changed)', source)
+        self.assertIn("useStreamRefresh(loadCompressors", source)
+        self.assertNotIn("setInterval(loadCompressors, 5000)", source)
+        self.assertNotIn("setInterval(function () { loadMaterialSummary(blisterStationId); }, 5000)", source)
+
     def test_lot_trace_panel_exists(self):
         source = Path("static/js/mes/command-center-app.js").read_text(encoding="utf-8")
         self.assertIn("LIVE BAG GENEALOGY / LOT TRACE", source)
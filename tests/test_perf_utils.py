@@ -1,6 +1,14 @@
 """Tests for performance instrumentation utilities."""
+import sqlite3
 import unittest
-from app.utils.perf_utils import should_log_perf, query_timer, PERF_TRACKED_PREFIXES
+from unittest.mock import patch
+
+from flask import Flask, Response
+
+from app.utils import sql_instrumentation
+from app.utils.perf_utils import should_log_perf, query_timer, add_sql_server_timing, PERF_TRACKED_PREFIXES
+from app.utils.sql_instrumentation import InstrumentedConnection, normalize_sql
+from config import Config
 
 
 class TestPerfUtils(unittest.TestCase):
@@ -28,3 +36,95 @@ class TestPerfUtils(unittest.TestCase):
         self.assertEqual(log_calls[0][0], 'test_query')
         self.assertIsInstance(log_calls[0][1], (int, float))
         self.assertGreaterEqual(log_calls[0][1], 0)
+
+
+class TestSqlInstrumentation(unittest.TestCase):
+    def setUp(self):
+        from app.utils import cache_utils
+        cache_utils.clear()
+        self.conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+        self.conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+        self.conn.executemany('INSERT INTO t (name) VALUES (?)', [('a',), ('b',), ('c',)])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT *\n  FROM t WHERE id IN (1, 2, 3) AND name = 'x''y'"),
+            'SELECT * FROM t WHERE id IN (?...) AND name = ?',
+        )
+        self.assertEqual(normalize_sql('SELECT * FROM t WHERE id = ?'), normalize_sql('SELECT * FROM t WHERE id = 7'))
+
+    def test_counts_only_inside_request(self):
+        self.assertIsNone(sql_instrumentation.current_stats())
+        token = sql_instrumentation.begin_request('/x')
+        try:
+            for i in range(3):
+                self.conn.execute('SELECT name FROM t WHERE id = ?', (i,)).fetchone()
+            self.conn.cursor().execute('SELECT COUNT(*) FROM t').fetchall()
+            stats = sql_instrumentation.current_stats()
+        finally:
+            sql_instrumentation.end_request(token)
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.statements['SELECT name FROM t WHERE id = ?'], 3)
+        self.assertGreaterEqual(stats.total_ms, 0)
+        self.assertIsNone(sql_instrumentation.current_stats())
+        self.conn.execute('SELECT 1').fetchall()
+        self.assertEqual(stats.count, 4)
+
+    def test_slow_statement_logged_with_plan(self):
+        token = sql_instrumentation.begin_request('/slow')
+        try:
+            with patch.object(Config, 'SQL_SLOW_QUERY_MS', 1e-9), self.assertLogs(
+                'app.utils.sql_instrumentation', level='WARNING'
+            ) as logs:
+                self.conn.execute('SELECT name FROM t WHERE id = ?', (1,)).fetchall()
+            stats = sql_instrumentation.current_stats()
+        finally:
+            sql_instrumentation.end_request(token)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('slow_sql', logs.output[0])
+        self.assertIn('INTEGER PRIMARY KEY', logs.output[0])
+        self.assertEqual(len(stats.slow), 1)
+
+    def test_n_plus_one_reported(self):
+        token = sql_instrumentation.begin_request('/loop')
+        try:
+            for i in range(5):
+                self.conn.execute(f'SELECT name FROM t WHERE id = {i}').fetchone()
+            self.conn.execute('SELECT COUNT(*) FROM t').fetchone()
+            stats = sql_instrumentation.current_stats()
+        finally:
+            sql_instrumentation.end_request(token)
+        with patch.object(Config, 'SQL_N_PLUS_ONE_THRESHOLD', 5), self.assertLogs(
+            'app.utils.sql_instrumentation', level='WARNING'
+        ) as logs:
+            sql_instrumentation.report_request(stats)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('executions=5', logs.output[0])
+        self.assertIn('SELECT name FROM t WHERE id = ?', logs.output[0])
+
+    def test_server_timing_entries(self):
+        response = Response('ok')
+        response.headers['Server-Timing'] = 'total;dur=10.00'
+        stats = sql_instrumentation.SqlRequestStats(count=3, total_ms=4.0)
+        app = Flask(__name__)
+        app.config['PERF_LOGGING'] = True
+        add_sql_server_timing(response, '/api/reports/trends', 10.0, stats, app)
+        self.assertEqual(
+            response.headers['Server-Timing'],
+            'db;dur=4.00, db-count;desc="3", render;dur=6.00, total;dur=10.00',
+        )
+
+    def test_server_timing_entries_follow_perf_gate(self):
+        stats = sql_instrumentation.SqlRequestStats(count=3, total_ms=4.0)
+        app = Flask(__name__)
+        app.config['PERF_LOGGING'] = True
+        untracked = Response('ok')
+        add_sql_server_timing(untracked, '/login', 10.0, stats, app)
+        self.assertNotIn('Server-Timing', untracked.headers)
+        app.config['PERF_LOGGING'] = False
+        disabled = Response('ok')
+        add_sql_server_timing(disabled, '/api/reports/trends', 10.0, stats, app)
+        self.assertNotIn('Server-Timing', disabled.headers)
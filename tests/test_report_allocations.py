@@ -0,0 +1,104 @@
+"""Report allocation resolver: per-flavor packed output without per-row queries."""
+import os
+import sqlite3
+import unittest
+
+from app.services.reporting_analytics_service import (
+    ReportAllocationResolver,
+    _submission_report_rows,
+    build_dimensions,
+    build_po_overview,
+    build_trends,
+)
+
+from tests.conftest import make_schema_db
+
+
+class TestReportAllocationResolver(unittest.TestCase):
+    def setUp(self):
+        self.path = make_schema_db()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry', 'INV-1'), (2, 'Lime', 'INV-2');
+            INSERT INTO product_details (id, product_name, tablet_type_id, packages_per_display, tablets_per_package, tablets_per_bottle)
+            VALUES (1, 'Cherry Card', 1, 10, 2, NULL), (2, 'Lime Bottle', 2, NULL, NULL, 30), (3, 'Variety Bottle', 1, NULL, NULL, 60);
+            INSERT INTO purchase_orders (id, po_number) VALUES (1, 'PO-1');
+            INSERT INTO po_lines (po_id, inventory_item_id, line_item_name, quantity_ordered)
+            VALUES (1, 'INV-1', 'Cherry', 5000), (1, 'INV-2', 'Lime', 3000), (1, 'INV-9', 'Mystery', 10);
+            INSERT INTO receiving (id, po_id, received_date) VALUES (1, 1, '2026-03-01');
+            INSERT INTO small_boxes (id, receiving_id, box_number) VALUES (1, 1, 1);
+            INSERT INTO bags (id, small_box_id, bag_number, tablet_type_id, bag_label_count) VALUES (1, 1, 1, 1, 1000), (2, 1, 2, 2, 1000);
+            """
+        )
+        self._add_day("2026-03-02")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _add_day(self, day):
+        def submit(product, sub_type, **counts):
+            cols = ["employee_name", "product_name", "submission_type", "assigned_po_id", "created_at", *counts]
+            cur = self.conn.execute(
+                f"INSERT INTO warehouse_submissions ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                ("op", product, sub_type, 1, f"{day} 10:00:00", *counts.values()),
+            )
+            return cur.lastrowid
+
+        submit("Cherry Card", "packaged", displays_made=2, packs_remaining=1, bag_id=1)  # 42
+        submit("cherry-card", "packaged", displays_made=1, cards_reopened=3)  # no config; ripped cards -> Cherry by name
+        submit(" lime bottle", "bottle", bottles_made=2)  # tablets_per_bottle by TRIM(LOWER()) -> 60
+        variety = submit("Variety Bottle", "bottle", bottles_made=1)
+        self.conn.executemany(
+            "INSERT INTO submission_bag_deductions (submission_id, bag_id, tablets_deducted) VALUES (?, ?, ?)",
+            [(variety, 1, 25), (variety, 2, 35)],
+        )
+        submit("Cherry Card", "machine", displays_made=9)  # not packed output
+
+    def _count_queries(self, fn):
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            self.conn.set_trace_callback(None)
+        return len(statements)
+
+    def test_resolver_splits_output_by_flavor(self):
+        subs = _submission_report_rows(self.conn, date_from="2026-03-01", date_to="2026-03-31")
+        resolver = ReportAllocationResolver(self.conn, subs)
+        allocations = [resolver.allocations(sub) for sub in subs]
+        self.assertEqual(
+            allocations,
+            [[(1, 42, 1)], [], [(2, 60, -1)], [(1, 25, 1), (2, 35, 1)], []],
+        )
+        self.assertEqual(resolver.flavor(subs[1]), (1, "Cherry"))
+
+        dims = build_dimensions(self.conn, "2026-03-01", "2026-03-31")
+        self.assertEqual({r["tablet_type_id"]: r["packed"] for r in dims["top_flavors"]}, {1: 67, 2: 95})
+        self.assertEqual(dims["ripped_cards_by_flavor"], [{"tablet_type_id": 1, "flavor": "Cherry", "ripped_cards": 3}])
+        trends = build_trends(self.conn, "2026-03-01", "2026-03-31", tablet_type_id=2)
+        self.assertEqual([(p["date"], p["packed"]) for p in trends["series"]], [("2026-03-01", 0), ("2026-03-02", 95)])
+
+        overview = build_po_overview(self.conn, 1)
+        rows = {r["flavor"]: (r["ordered"], r["received"], r["packed"]) for r in overview["rows"]}
+        self.assertEqual(rows["Cherry"], (5000, 1000, 67))
+        self.assertEqual(rows["Lime"], (3000, 1000, 95))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        reports = (
+            lambda: build_dimensions(self.conn, "2026-03-01", "2026-03-31"),
+            lambda: build_trends(self.conn, "2026-03-01", "2026-03-31"),
+            lambda: build_po_overview(self.conn, 1),
+        )
+        before = [self._count_queries(fn) for fn in reports]
+        for day in range(3, 13):
+            self._add_day(f"2026-03-{day:02d}")
+        self.assertEqual([self._count_queries(fn) for fn in reports], before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Background PDF report jobs: queue, render with progress, result cache keyed on data_versions."""
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from app import create_app
+from app.models import database as database_module
+from app.services import report_jobs
+from config import Config
+
+from tests.conftest import make_schema_db
+
+
+class TestReportJobs(unittest.TestCase):
+    def setUp(self):
+        self._orig = (Config.DATABASE_PATH, Config.REPORT_CACHE_DIR)
+        self.path = make_schema_db()
+        self.cache_dir = tempfile.mkdtemp()
+        Config.REPORT_CACHE_DIR = self.cache_dir
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry', 'INV-1');
+            INSERT INTO purchase_orders (id, po_number, tablet_type, ordered_quantity) VALUES (1, 'PO-1', 'Cherry', 5000);
+            INSERT INTO warehouse_submissions (employee_name, product_name, assigned_po_id, displays_made, created_at)
+            VALUES ('op', 'Cherry Card', 1, 4, '2026-03-02 10:00:00');
+            """
+        )
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        Config.DATABASE_PATH, Config.REPORT_CACHE_DIR = self._orig
+        database_module._migrations_run = False
+        os.unlink(self.path)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _submit(self, body):
+        job = report_jobs.submit_report_job(self.conn, report_jobs.normalize_report_params(body))
+        self.conn.commit()
+        return job
+
+    def test_job_runs_and_identical_request_is_served_from_cache(self):
+        with self.assertRaises(ValueError):
+            report_jobs.normalize_report_params({"start_date": "03/02/2026"})
+        body = {"po_numbers": ["PO-1"], "start_date": "2026-03-01"}
+        job = self._submit(body)
+        self.assertEqual(job["status"], "queued")
+        self.assertEqual(self._submit(body)["id"], job["id"])  # joins the queued job
+
+        self.assertEqual(report_jobs.run_report_jobs(self.path, self.cache_dir), 1)
+        row = report_jobs.get_report_job(self.conn, job["id"])
+        self.assertEqual((row["status"], row["progress"], row["attempts"]), ("done", 1, 1))
+        with open(row["result_path"], "rb") as fh:
+            self.assertTrue(fh.read().startswith(b"%PDF"))
+
+        cached = self._submit(body)
+        self.assertNotEqual(cached["id"], job["id"])
+        self.assertEqual((cached["status"], cached["result_path"]), ("done", row["result_path"]))
+
+        self.conn.execute("UPDATE warehouse_submissions SET displays_made = 5")
+        self.conn.commit()
+        self.assertEqual(self._submit(body)["status"], "queued")
+
+    def test_stale_running_job_is_requeued_then_failed(self):
+        job = self._submit({})
+        old = "2000-01-01 00:00:00"
+        self.conn.execute("UPDATE report_jobs SET status = 'running', attempts = 1, updated_at = ? WHERE id = ?", (old, job["id"]))
+        self.assertTrue(report_jobs.job_is_stale(report_jobs.get_report_job(self.conn, job["id"])))
+        report_jobs.requeue_stale_jobs(self.conn)
+        self.assertEqual(report_jobs.get_report_job(self.conn, job["id"])["status"], "queued")
+        self.conn.execute("UPDATE report_jobs SET status = 'running', attempts = 2, updated_at = ? WHERE id = ?", (old, job["id"]))
+        report_jobs.requeue_stale_jobs(self.conn)
+        self.assertEqual(report_jobs.get_report_job(self.conn, job["id"])["status"], "failed")
+
+    def test_api_submit_poll_and_download(self):
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        app = create_app()
+        app.config["WTF_CSRF_ENABLED"] = False
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s["admin_authenticated"] = True
+
+        self.assertEqual(client.post("/api/reports/jobs", json={"report_type": "receive"}).status_code, 400)
+        r = client.post("/api/reports/jobs", json={"report_type": "vendor"})
+        self.assertEqual(r.status_code, 202)
+        job_id = r.get_json()["job"]["id"]
+        deadline = time.monotonic() + 60
+        while True:
+            job = client.get(f"/api/reports/jobs/{job_id}").get_json()["job"]
+            if job["status"] in ("done", "failed") or time.monotonic() > deadline:
+                break
+            time.sleep(0.2)
+        self.assertEqual(job["status"], "done", job)
+        r = client.get(f"/api/reports/jobs/{job_id}/download")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.data.startswith(b"%PDF"))
+        self.assertEqual(client.get("/api/reports/jobs/missing").status_code, 404)
+
+        # A job whose worker died is resolved by polling, without another submission.
+        self.conn.execute(
+            "UPDATE report_jobs SET status = 'running', attempts = 2, updated_at = '2000-01-01 00:00:00' WHERE id = ?",
+            (job_id,),
+        )
+        self.conn.commit()
+        job = client.get(f"/api/reports/jobs/{job_id}").get_json()["job"]
+        self.assertEqual((job["status"], job["error"]), ("failed", "Worker stopped responding"))
+
+        sync = client.post("/api/reports/production", json={"report_type": "vendor"})
+        self.assertEqual(sync.status_code, 200)
+        self.assertEqual(sync.data, r.data)  # served from the job's cached file
+
+
+if __name__ == "__main__":
+    unittest.main()
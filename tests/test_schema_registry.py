@@ -0,0 +1,101 @@
+"""Schema registry catalog and the MigrationRunner fingerprint fast path."""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.models import database as database_module
+from app.models.migrations import MigrationRunner, schema_is_current
+from app.models.schema import SchemaManager
+from app.utils.schema_registry import clear_schema_registry, has_column, has_table, table_columns
+from config import Config
+
+
+class TestSchemaRegistry(unittest.TestCase):
+    def setUp(self):
+        clear_schema_registry()
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT)")
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def test_catalog_reloads_after_ddl_from_any_connection(self):
+        self.assertEqual(table_columns(self.conn, "widgets"), {"id", "name"})
+        self.assertFalse(has_table(self.conn, "gadgets"))
+        other = sqlite3.connect(self.path)
+        try:
+            other.execute("ALTER TABLE widgets ADD COLUMN color TEXT")
+            other.execute("CREATE TABLE gadgets (id INTEGER PRIMARY KEY)")
+            other.commit()
+        finally:
+            other.close()
+        self.assertTrue(has_column(self.conn, "widgets", "color"))
+        self.assertTrue(has_table(self.conn, "gadgets"))
+        self.assertEqual(table_columns(self.conn, "missing"), frozenset())
+
+    def test_catalog_is_not_reloaded_while_schema_is_unchanged(self):
+        table_columns(self.conn, "widgets")
+        queries = []
+        self.conn.set_trace_callback(queries.append)
+        try:
+            for _ in range(3):
+                self.assertTrue(has_column(self.conn, "widgets", "name"))
+        finally:
+            self.conn.set_trace_callback(None)
+        self.assertFalse([q for q in queries if "pragma_table_info" in q])
+
+
+class TestMigrationFingerprint(unittest.TestCase):
+    def setUp(self):
+        self._orig_db = Config.DATABASE_PATH
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+
+    def tearDown(self):
+        Config.DATABASE_PATH = self._orig_db
+        database_module._migrations_run = False
+        os.unlink(self.path)
+
+    def _current(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return schema_is_current(conn)
+        finally:
+            conn.close()
+
+    def test_init_db_skips_runner_until_schema_changes(self):
+        self.assertTrue(self._current())
+        with patch.object(MigrationRunner, "run_all") as run_all:
+            database_module.init_db()
+        run_all.assert_not_called()
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE scratch (id INTEGER)")
+        conn.commit()
+        conn.close()
+        self.assertFalse(self._current())
+        database_module._migrations_run = False
+        database_module.init_db()
+        self.assertTrue(self._current())
+
+    def test_moved_request_path_ddl_runs_in_migrations(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            self.assertTrue({"cost", "tank_size"} <= table_columns(conn, "compressors"))
+            self.assertTrue(has_table(conn, "blister_material_rolls"))
+            self.assertTrue({"area_name", "compressor_json"} <= table_columns(conn, "machines"))
+            self.assertTrue({"case_count", "loose_display_count"} <= table_columns(conn, "warehouse_submissions"))
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
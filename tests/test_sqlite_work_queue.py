@@ -0,0 +1,84 @@
+"""Shared SQLite work-queue helpers: claim, drain, backoff, due time and inline dispatch."""
+import os
+import tempfile
+import unittest
+
+from app.services import sqlite_work_queue as work_queue
+
+_CLAIM_SQL = """
+    UPDATE jobs SET status = 'running', updated_at = ?
+    WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND next_attempt_at <= ? ORDER BY id LIMIT 1)
+    RETURNING id
+"""
+
+
+class TestSqliteWorkQueue(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.conn = work_queue.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE jobs (id INTEGER PRIMARY KEY, status TEXT NOT NULL, next_attempt_at INTEGER NOT NULL, updated_at INTEGER NOT NULL)"
+        )
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _add(self, status="queued", next_attempt_at=0, updated_at=None):
+        now = work_queue.now_ms()
+        self.conn.execute(
+            "INSERT INTO jobs (status, next_attempt_at, updated_at) VALUES (?, ?, ?)",
+            (status, next_attempt_at, now if updated_at is None else updated_at),
+        )
+
+    def _claim(self, conn):
+        now = work_queue.now_ms()
+
+        def requeue_stale(c):
+            c.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running' AND updated_at < ?", (now - 1000,))
+
+        return work_queue.claim_next(conn, _CLAIM_SQL, (now, now), reclaim=requeue_stale)
+
+    def test_claim_reclaims_stale_rows_first(self):
+        self._add(status="running", updated_at=0)
+        row = self._claim(self.conn)
+        self.assertEqual(row["id"], 1)
+        self.assertIsNone(self._claim(self.conn))
+        self.assertFalse(self.conn.in_transaction)
+
+    def test_drain_handles_due_rows_then_cleans_up(self):
+        for _ in range(3):
+            self._add()
+        self._add(next_attempt_at=work_queue.now_ms() + 60_000)
+        handled = []
+
+        def handle(conn, row):
+            handled.append(row["id"])
+            conn.execute("UPDATE jobs SET status = 'done', updated_at = 0 WHERE id = ?", (row["id"],))
+
+        def cleanup(conn):
+            work_queue.prune_finished(conn, "jobs", ("done",), 1000)
+
+        self.assertEqual(work_queue.drain(self.path, self._claim, handle, max_rows=2, cleanup=cleanup), 2)
+        self.assertEqual(work_queue.drain(self.path, self._claim, handle, cleanup=cleanup), 1)
+        self.assertEqual(handled, [1, 2, 3])
+        self.assertEqual([r[0] for r in self.conn.execute("SELECT id FROM jobs")], [4])
+        due = work_queue.next_due_in_seconds(self.conn, "jobs", "queued")
+        self.assertTrue(0 < due <= 60)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual(
+            [work_queue.backoff_seconds(n, 2.0, 10.0) for n in (1, 2, 3, 4)],
+            [2.0, 4.0, 8.0, 10.0],
+        )
+
+    def test_dispatch_drains_inline_when_worker_is_off(self):
+        calls = []
+        worker = work_queue.QueueWorker("test-queue", calls.append)
+        work_queue.dispatch(worker, False, self.path)
+        self.assertEqual(calls, [self.path])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+"""submission_receipt_groups: triggers keep the index equal to source, and indexed pages match aggregated ones."""
+import os
+import sqlite3
+import unittest
+
+from app.services.submission_receipt_groups import (
+    ensure_submission_receipt_groups,
+    receipt_group_count,
+    reconcile_submission_receipt_groups,
+)
+from app.services.submissions_view_service import append_submission_archive_tab_filters, fetch_receipt_group_page
+
+from tests.conftest import make_schema_db
+
+CLEAN = {"drifted": 0, "missing": 0, "orphaned": 0, "counts_drifted": 0}
+
+
+class TestSubmissionReceiptGroups(unittest.TestCase):
+    def setUp(self):
+        self.path = make_schema_db()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO purchase_orders (id, po_number, closed) VALUES (1, 'PO-1', 0), (2, 'PO-2', 1), (3, 'PO-3', 0);
+            INSERT INTO product_details (product_name, packages_per_display, tablets_per_package, tablets_per_bottle)
+            VALUES ('Cherry', 10, 2, NULL), ('Lime', 5, 4, NULL), ('Cherry Bottle', NULL, NULL, 30);
+            INSERT INTO machines (id, machine_name, machine_role) VALUES (101, 'Sealer', 'sealing');
+            INSERT INTO bags (id, bag_number, bag_label_count) VALUES (1, 1, 1000);
+            """
+        )
+        # Existing history is backfilled when the index is installed; the rest goes through triggers.
+        for i in range(20):
+            self._submit(i)
+        self.assertTrue(ensure_submission_receipt_groups(self.conn))
+        for i in range(20, 45):
+            self._submit(i)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _submit(self, i, **overrides):
+        receipt = None if i % 7 == 0 else f"{100 + i // 3}-{i % 3 + 1}"
+        if i % 11 == 0:
+            receipt = "bad-receipt"
+        values = {
+            "employee_name": f"Emp {chr(65 + i % 5)}",
+            "product_name": "Cherry" if i % 4 else "Lime",
+            "assigned_po_id": (1, 2, 3)[i % 3],
+            "submission_type": ("packaged", "bag", "machine", "repack")[i % 4],
+            "machine_id": 101 if i % 4 == 2 else None,
+            "displays_made": i % 3,
+            "packs_remaining": i % 5,
+            "loose_tablets": (i * 7) % 13,
+            "tablets_pressed_into_cards": i * 3,
+            "receipt_number": receipt,
+            "created_at": f"2026-03-{1 + i % 20:02d} {8 + i % 10:02d}:15:00",
+            "bag_start_time": f"2026-03-{1 + i % 20:02d} 07:00:00" if i % 3 else None,
+            "bag_end_time": f"2026-03-{1 + (i * 3) % 20:02d} 18:00:00" if i % 5 else "",
+        }
+        values.update(overrides)
+        cur = self.conn.execute(
+            f"INSERT INTO warehouse_submissions ({', '.join(values)}) VALUES ({', '.join('?' for _ in values)})",
+            tuple(values.values()),
+        )
+        return cur.lastrowid
+
+    def _assert_clean(self):
+        report = reconcile_submission_receipt_groups(self.conn)
+        self.assertEqual({k: report[k] for k in CLEAN}, CLEAN)
+        return report
+
+    def test_triggers_follow_every_write_path(self):
+        self._assert_clean()
+        bottle_id = self._submit(50, product_name="Cherry Bottle", submission_type="bottle", bottles_made=2)
+        self.conn.execute(
+            "INSERT INTO submission_bag_deductions (submission_id, bag_id, tablets_deducted) VALUES (?, 1, 45)",
+            (bottle_id,),
+        )
+        self.conn.execute("UPDATE warehouse_submissions SET receipt_number = '900-1' WHERE id = 5")
+        self.conn.execute("UPDATE warehouse_submissions SET receipt_number = NULL WHERE id = 6")
+        self.conn.execute("UPDATE warehouse_submissions SET displays_made = 40, employee_name = 'Zed' WHERE id = 9")
+        self.conn.execute("DELETE FROM warehouse_submissions WHERE id IN (2, 14)")
+        self.conn.execute("UPDATE purchase_orders SET closed = 1 WHERE id = 3")
+        self.conn.execute("UPDATE purchase_orders SET closed = 0 WHERE id = 2")
+        self.conn.execute("UPDATE product_details SET tablets_per_package = 7 WHERE product_name = 'Cherry'")
+        self.conn.execute("UPDATE machines SET machine_role = 'blister' WHERE id = 101")
+        self.conn.execute("DELETE FROM purchase_orders WHERE id = 1")
+        self._assert_clean()
+
+    def test_indexed_pages_match_aggregated_pages(self):
+        self.conn.execute("UPDATE purchase_orders SET closed = 1 WHERE id = 3")
+        for tab in ("packaged_machine", "bag"):
+            for archived in (False, True):
+                where = append_submission_archive_tab_filters("", archived, tab)
+                for sort_by in ("created_at", "receipt_number", "total", "product_name", "employee_name",
+                                "bag_start", "bag_end"):
+                    for sort_order in ("asc", "desc"):
+                        case = (tab, archived, sort_by, sort_order)
+                        pages = {}
+                        for scope in (None, (tab, archived)):
+                            keys, page, cursor = [], 1, None
+                            while True:
+                                result = fetch_receipt_group_page(
+                                    self.conn, where, [], sort_by, sort_order,
+                                    page=page, per_page=4, cursor=cursor, scope=scope,
+                                )
+                                keys.extend(result["group_keys"])
+                                if not result["next_cursor"]:
+                                    break
+                                page, cursor = page + 1, result["next_cursor"]
+                            pages[scope is None] = (keys, result["total"])
+                        self.assertEqual(pages[True], pages[False], case)
+                        self.assertEqual(pages[True][1], receipt_group_count(self.conn, tab, archived), case)
+
+        # Cursors are interchangeable between the two paths.
+        where = append_submission_archive_tab_filters("", False, "packaged_machine")
+        first = fetch_receipt_group_page(self.conn, where, [], "total", "desc", page=1, per_page=4)
+        indexed = fetch_receipt_group_page(
+            self.conn, where, [], "total", "desc", page=2, per_page=4,
+            cursor=first["next_cursor"], scope=("packaged_machine", False),
+        )
+        offset = fetch_receipt_group_page(self.conn, where, [], "total", "desc", page=2, per_page=4)
+        self.assertEqual(indexed["group_keys"], offset["group_keys"])
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.conn.execute("UPDATE submission_receipt_groups SET k_total = -1 WHERE group_key = 'rec:108-1'")
+        self.conn.execute("DELETE FROM submission_receipt_groups WHERE group_key = 'null:8'")
+        self.conn.execute("UPDATE submission_receipt_group_counts SET groups = groups + 5")
+        report = reconcile_submission_receipt_groups(self.conn, fix=True)
+        self.assertEqual((report["drifted"], report["missing"]), (1, 1))
+        self.assertGreater(report["counts_drifted"], 0)
+        self.assertEqual(report["fixed"], report["groups"])
+        self._assert_clean()
+
+
+if __name__ == "__main__":
+    unittest.main()
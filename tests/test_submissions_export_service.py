@@ -0,0 +1,102 @@
+"""Streaming submissions CSV export: SQL ordering, running totals, layouts, gzip."""
+import csv
+import gzip
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app.models.schema import SchemaManager
+from app.services.submissions_export_service import EXPORT_COLUMNS, gzip_chunks, iter_submissions_csv
+from app.services.submissions_view_service import (
+    append_submission_archive_tab_filters,
+    build_submissions_export_query,
+)
+
+
+class TestSubmissionsExport(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO purchase_orders (id, po_number, closed) VALUES (1, 'PO-1', 0);
+            INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry 10mg', 'INV-1');
+            INSERT INTO product_details (id, product_name, tablet_type_id, packages_per_display, tablets_per_package)
+            VALUES (1, 'Cherry', 1, 10, 2), (2, 'Cherry Bulk', 1, 10, NULL);
+            """
+        )
+        rows = [
+            ("100-1", "2026-01-01 08:00:00", "packaged", "Cherry", 1, 1, 40, 1, 0, None),
+            ("100-2", "2026-01-02 08:00:00", "packaged", "Cherry", 1, 1, 40, 2, 0, None),
+            ("100-1", "2026-01-03 08:00:00", "packaged", "Cherry", 1, 1, 40, 1, 0, None),
+            (None, "2026-01-04 08:00:00", "packaged", "Cherry Bulk", 2, 1, None, 1, 3, "INV-1"),
+            ("100-2", "2026-01-05 08:00:00", "repack", "Cherry", 1, 1, 40, 0, 0, None),
+        ]
+        self.conn.executemany(
+            """
+            INSERT INTO warehouse_submissions (
+                receipt_number, created_at, submission_type, product_name, box_number, bag_number,
+                bag_label_count, displays_made, packs_remaining, inventory_item_id, employee_name,
+                assigned_po_id, loose_tablets
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'Emp', 1, 0)
+            """,
+            rows,
+        )
+        self.conn.commit()
+        self.where = append_submission_archive_tab_filters("", False, "packaged_machine")
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _export(self, sort_by, sort_order, *, layout="report", group_receipts=True, chunk_rows=2):
+        sql, params = build_submissions_export_query(
+            self.where, [], sort_by, sort_order, group_receipts=group_receipts
+        )
+        text = "".join(iter_submissions_csv(self.conn, sql, params, layout=layout, chunk_rows=chunk_rows))
+        return list(csv.reader(io.StringIO(text)))
+
+    def test_created_at_desc_merges_receipt_less_rows_and_keeps_running_totals(self):
+        rows = self._export("created_at", "desc", layout="columnar")
+        self.assertEqual(rows[0], [name for name, _label in EXPORT_COLUMNS])
+        col = {name: i for i, name in enumerate(rows[0])}
+        body = rows[1:]
+        self.assertEqual([r[col["submission_id"]] for r in body], ["5", "4", "3", "2", "1"])
+        # Running packaged total per bag follows the export sort order.
+        self.assertEqual([r[col["cumulative_bag_tablets"]] for r in body], ["0", "26", "20", "60", "80"])
+        self.assertEqual(
+            [r[col["count_status"]] for r in body], ["repack_po", "no_bag_label", "under", "over", "over"]
+        )
+        # Product without tablets_per_package falls back to the first product of its inventory item.
+        self.assertEqual(body[1][col["total_tablets"]], "26")
+
+    def test_total_desc_groups_receipts_then_receipt_less_rows(self):
+        rows = self._export("total", "desc")
+        self.assertEqual(rows[0][0], "Submission Date")
+        self.assertEqual(len(rows[0]), len([1 for _name, label in EXPORT_COLUMNS if label]))
+        created = [r[1] for r in rows[1:]]
+        self.assertEqual(
+            created,
+            ["2026-01-02 08:00:00", "2026-01-05 08:00:00", "2026-01-01 08:00:00", "2026-01-03 08:00:00",
+             "2026-01-04 08:00:00"],
+        )
+        self.assertEqual(rows[2][19], "Repack PO")
+
+        ungrouped = self._export("total", "desc", group_receipts=False)
+        self.assertEqual(ungrouped[1][1], "2026-01-02 08:00:00")
+        self.assertEqual(ungrouped[2][1], "2026-01-04 08:00:00")
+
+    def test_gzip_stream_round_trips(self):
+        sql, params = build_submissions_export_query(self.where, [], "created_at", "asc")
+        plain = "".join(iter_submissions_csv(self.conn, sql, params, chunk_rows=1))
+        packed = b"".join(gzip_chunks(iter_submissions_csv(self.conn, sql, params, chunk_rows=1)))
+        self.assertEqual(gzip.decompress(packed).decode("utf-8"), plain)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,22 @@
 """Unit tests for submissions view query helpers."""
+import os
+import sqlite3
 import unittest
 
+from app.services.submission_list_enrichment import apply_bag_running_totals
+from app.services.submission_query_service import apply_resolved_bag_fields
 from app.services.submissions_view_service import (
+    SUBMISSION_LIST_SELECT,
     append_submission_common_filters,
     append_submission_archive_tab_filters,
     append_submission_sort,
+    fetch_bag_running_totals,
+    fetch_receipt_group_page,
+    fetch_receipt_group_rows,
 )
 
+from tests.conftest import make_schema_db
+
 
 class TestSubmissionsViewService(unittest.TestCase):
     def test_append_common_filters(self):
@@ -47,3 +57,154 @@ class TestSubmissionsViewService(unittest.TestCase):
         self.assertIn('CASE WHEN ws.receipt_number IS NULL THEN 1 ELSE 0 END', query)
         self.assertIn('CAST(SUBSTR(ws.receipt_number', query)
 
+
+
+class TestReceiptGroupPagination(unittest.TestCase):
+    """Receipt grouping, ordering and running totals computed in SQL for the warehouse list."""
+
+    WHERE = " AND (po.closed IS NULL OR po.closed = FALSE)"
+
+    def setUp(self):
+        self.path = make_schema_db()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            INSERT INTO purchase_orders (id, po_number, closed) VALUES (1, 'PO-1', 0), (2, 'PO-2', 1);
+            INSERT INTO product_details (product_name, packages_per_display, tablets_per_package)
+            VALUES ('Cherry', 10, 2), ('Lime', 5, 4);
+            INSERT INTO small_boxes (id, box_number) VALUES (1, 3);
+            INSERT INTO bags (id, small_box_id, bag_number, bag_label_count) VALUES (1, 1, 7, 60);
+            """
+        )
+        rows = []
+        for i in range(40):
+            receipt = None if i % 7 == 0 else f"{100 + i // 3}-{i % 3 + 1}"
+            if i % 11 == 0:
+                receipt = "bad-receipt"
+            rows.append(
+                (
+                    f"Emp {chr(65 + i % 5)}",
+                    "Cherry" if i % 4 else "Lime",
+                    1 if i % 9 else 2,
+                    1 if i % 2 else None,
+                    3 if i % 2 else None,
+                    7 if i % 2 else None,
+                    ("packaged", "bag", "machine", "packaged")[i % 4],
+                    i % 3,
+                    i % 5,
+                    (i * 7) % 13,
+                    receipt,
+                    f"2026-03-{1 + i % 20:02d} {8 + i % 10:02d}:15:00",
+                    f"2026-03-{1 + i % 20:02d} 07:00:00" if i % 3 else None,
+                    f"2026-03-{1 + (i * 3) % 20:02d} 18:00:00" if i % 5 else "",
+                )
+            )
+        self.conn.executemany(
+            """
+            INSERT INTO warehouse_submissions (
+                employee_name, product_name, assigned_po_id, bag_id, box_number, bag_number,
+                submission_type, displays_made, packs_remaining, loose_tablets, receipt_number,
+                created_at, bag_start_time, bag_end_time
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _walk(self, sort_by, sort_order, *, use_cursor):
+        keys, page, cursor = [], 1, None
+        while True:
+            result = fetch_receipt_group_page(
+                self.conn, self.WHERE, [], sort_by, sort_order, page=page, per_page=4, cursor=cursor
+            )
+            self.assertEqual(result["page"], page)
+            keys.extend(result["group_keys"])
+            if not result["next_cursor"]:
+                return keys, result["total"]
+            page, cursor = page + 1, (result["next_cursor"] if use_cursor else None)
+
+    def test_keyset_walk_matches_offset_pages(self):
+        for sort_by in ("created_at", "receipt_number", "total", "product_name", "employee_name", "bag_start", "bag_end"):
+            for sort_order in ("asc", "desc"):
+                offset_keys, total = self._walk(sort_by, sort_order, use_cursor=False)
+                keyset_keys, _ = self._walk(sort_by, sort_order, use_cursor=True)
+                self.assertEqual(keyset_keys, offset_keys, (sort_by, sort_order))
+                self.assertEqual(len(set(offset_keys)), total)
+
+        last = fetch_receipt_group_page(self.conn, self.WHERE, [], "total", "desc", page=3, per_page=4)
+        back = fetch_receipt_group_page(
+            self.conn, self.WHERE, [], "total", "desc", page=2, per_page=4, cursor=last["prev_cursor"]
+        )
+        offset = fetch_receipt_group_page(self.conn, self.WHERE, [], "total", "desc", page=2, per_page=4)
+        self.assertEqual(back["group_keys"], offset["group_keys"])
+
+    def test_group_order_matches_python_aggregation(self):
+        rows = [dict(r) for r in self.conn.execute(SUBMISSION_LIST_SELECT + self.WHERE).fetchall()]
+        groups = {}
+        for row in rows:
+            receipt = row["receipt_number"]
+            key = f"rec:{receipt}" if receipt else f"null:{row['id']}"
+            groups.setdefault(key, []).append(row)
+
+        def total(key):
+            return sum(r["calculated_total"] or 0 for r in groups[key])
+
+        expected = sorted(groups, key=lambda k: (total(k), max(r["id"] for r in groups[k])), reverse=True)
+        keys, _ = self._walk("total", "desc", use_cursor=True)
+        self.assertEqual(keys, expected)
+
+        with_end = [k for k in keys if any(r["bag_end_time"] for r in groups[k])]
+        keys, _ = self._walk("bag_end", "asc", use_cursor=True)
+        # Receipts without any bag end time sort last in both directions.
+        self.assertEqual(set(keys[: len(with_end)]), set(with_end))
+
+    def test_page_rows_show_legacy_packaged_displays(self):
+        self.conn.execute("UPDATE warehouse_submissions SET case_count = 2, loose_display_count = 1 WHERE id = 4")
+        page = fetch_receipt_group_page(self.conn, self.WHERE, [], "created_at", "asc", page=1, per_page=40)
+        rows = [dict(r) for r in fetch_receipt_group_rows(self.conn, self.WHERE, [], page["group_keys"])]
+        for row in rows:
+            apply_resolved_bag_fields(row)
+            apply_bag_running_totals(row, bag_total=0, machine_total=0, packaged_total=0)
+        by_id = {row["id"]: row for row in rows}
+
+        legacy = by_id[8]
+        self.assertEqual(legacy["submission_type"], "packaged")
+        self.assertTrue(legacy["packaged_legacy_displays_only"])
+        self.assertIsNone(legacy["case_count"])
+        self.assertEqual(legacy["loose_display_count"], legacy["displays_made"])
+
+        split = by_id[4]
+        self.assertNotIn("packaged_legacy_displays_only", split)
+        self.assertEqual((split["case_count"], split["loose_display_count"]), (2, 1))
+
+    def test_running_totals_match_chronological_enrichment(self):
+        running = {}
+        expected = {}
+        for row in self.conn.execute(SUBMISSION_LIST_SELECT + self.WHERE + " ORDER BY ws.created_at, ws.id"):
+            sub = dict(row)
+            apply_resolved_bag_fields(sub)
+            bag_key = (sub["assigned_po_id"], sub["product_name"], f"{sub['box_number']}/{sub['bag_number']}")
+            totals = running.setdefault(bag_key, {"bag": 0, "machine": 0, "packaged": 0})
+            kind = sub["submission_type"] or "packaged"
+            if kind == "bag":
+                totals["bag"] += sub["loose_tablets"] or 0
+            elif kind in totals:
+                totals[kind] += sub["calculated_total"] or 0
+            expected[sub["id"]] = (totals["bag"], totals["machine"], totals["packaged"])
+
+        page = fetch_receipt_group_page(self.conn, self.WHERE, [], "created_at", "desc", page=2, per_page=4)
+        rows = [dict(r) for r in fetch_receipt_group_rows(self.conn, self.WHERE, [], page["group_keys"])]
+        self.assertTrue(rows)
+        for row in rows:
+            apply_resolved_bag_fields(row)
+        totals = fetch_bag_running_totals(self.conn, self.WHERE, [], rows)
+        for row in rows:
+            got = totals[row["id"]]
+            self.assertEqual(
+                (got["bag_total"], got["machine_total"], got["packaged_total"]), expected[row["id"]], row["id"]
+            )
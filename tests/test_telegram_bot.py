@@ -8,9 +8,12 @@ from datetime import date, datetime
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
+import requests
 from app import create_app
 from app.services import telegram_bot_service as tbot
+from app.services import telegram_outbox as tout
 from app.services import telegram_reporting_service as trs
+from app.utils import cache_utils
 
 _NY = ZoneInfo("America/New_York")
 
@@ -20,6 +23,14 @@ class TestTelegramBot(unittest.TestCase):
         self.db_tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
         self.db_tmp.close()
         os.environ["DATABASE_PATH"] = self.db_tmp.name
+        # The webhook queues into this database; with no sender thread it drains the outbox inline,
+        # so replies are sent before it returns.
+        for config_patch in (
+            patch("config.Config.DATABASE_PATH", self.db_tmp.name),
+            patch("config.Config.TELEGRAM_OUTBOX_WORKER", False),
+        ):
+            config_patch.start()
+            self.addCleanup(config_patch.stop)
         self.app = create_app()
         self.client = self.app.test_client()
 
@@ -46,6 +57,7 @@ class TestTelegramBot(unittest.TestCase):
                 );
                 """
             )
+            tout.ensure_telegram_outbox(conn)
             conn.commit()
             conn.close()
 
@@ -176,5 +188,94 @@ class TestTelegramBot(unittest.TestCase):
         self.assertFalse(trs._submission_included_through(sub_late, target, as_of))
 
 
+
+class TestTelegramOutbox(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        conn = sqlite3.connect(self.path)
+        tout.ensure_telegram_outbox(conn)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def _enqueue(self, chat_id, text, update_id=None):
+        cmd, args = tbot.parse_command(text)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                return tout.enqueue_command(conn, chat_id=chat_id, command=cmd, args=args, update_id=update_id)
+        finally:
+            conn.close()
+
+    def _rows(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT chat_id, command, status, attempts FROM telegram_outbox ORDER BY id").fetchall()
+        finally:
+            conn.close()
+
+    def _make_due(self):
+        conn = sqlite3.connect(self.path)
+        with conn:
+            conn.execute("UPDATE telegram_outbox SET next_attempt_at = 0")
+        conn.close()
+
+    def test_redelivered_and_repeated_commands_are_coalesced(self):
+        self.assertEqual(self._enqueue(111, "/help", update_id=1), "queued")
+        self.assertEqual(self._enqueue(111, "/help", update_id=2), "coalesced")
+        self.assertEqual(self._enqueue(222, "/help", update_id=3), "queued")
+        with patch("app.services.telegram_bot_service.telegram_send_message") as send_mock:
+            self.assertEqual(tout.process_outbox(self.path), 2)
+        self.assertEqual(send_mock.call_count, 2)
+        self.assertEqual(self._enqueue(111, "/help", update_id=1), "duplicate")
+
+    def test_failed_send_is_retried_and_keeps_chat_order(self):
+        self._enqueue(111, "/help")
+        self._enqueue(111, "/counts yesterday")
+        self._enqueue(222, "/help")
+        sent = []
+
+        def flaky_send(chat_id, text):
+            if not sent and chat_id == 111:
+                sent.append(None)
+                raise requests.ConnectionError("network down")
+            sent.append((chat_id, text.splitlines()[0]))
+
+        with patch("app.services.telegram_bot_service.telegram_send_message", side_effect=flaky_send):
+            tout.process_outbox(self.path)
+            # Chat 111's second command waits behind the first one's backoff; chat 222 is not held up.
+            self.assertEqual(sent[1:], [(222, "Available commands:")])
+            self.assertEqual([r[2] for r in self._rows()], ["pending", "pending", "sent"])
+            self._make_due()
+            tout.process_outbox(self.path)
+        self.assertEqual(sent[2:], [(111, "Available commands:"), (111, "Usage: /counts today")])
+        self.assertEqual([(r[2], r[3]) for r in self._rows()], [("sent", 2), ("sent", 1), ("sent", 1)])
+
+    def test_client_error_is_not_retried(self):
+        self._enqueue(111, "/help")
+        self._enqueue(111, "/start")
+        response = requests.Response()
+        response.status_code = 400
+        error = requests.HTTPError("400 chat not found", response=response)
+        with patch("app.services.telegram_bot_service.telegram_send_message", side_effect=[error, None]) as send_mock:
+            tout.process_outbox(self.path)
+        self.assertEqual(send_mock.call_count, 2)
+        self.assertEqual([r[2] for r in self._rows()], ["failed", "sent"])
+
+    def test_daily_summary_cached_per_version(self):
+        cache_utils.invalidate(trs.DAILY_SUMMARY_CACHE_NAMESPACE)
+        built = {"day": "2026-01-10", "total_displays_made": 3}
+        with patch.object(trs, "build_daily_summary", return_value=built) as build_mock, patch.object(
+            trs, "versions_key", side_effect=["v1", "v1", "v2"]
+        ):
+            for _ in range(3):
+                self.assertEqual(trs.cached_daily_summary(None, "2026-01-10"), built)
+        self.assertEqual(build_mock.call_count, 2)
+        build_mock.assert_called_with(None, "2026-01-10", full_day=True)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,217 @@
+"""Tracking refresh against a local fake UPS / FedEx server: batching, 429 backoff, shared tokens, scheduling."""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.models.schema import SchemaManager
+from app.services import tracking_service
+from app.services.tracking_refresh import refresh_due_shipments
+from app.services.tracking_service import next_check_at
+from config import Config
+
+FAR_ETA = (date.today() + timedelta(days=10)).isoformat()
+
+
+class _FakeCarrier(BaseHTTPRequestHandler):
+    calls = Counter()
+    fedex_batches = []
+    throttled = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers:
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path in ("/security/v1/oauth/token", "/oauth/token"):
+            self.calls["token" + self.path] += 1
+            return self._reply(200, {"access_token": "tok", "expires_in": 3600})
+        if self.path == "/track/v1/trackingnumbers":
+            self.calls["fedex"] += 1
+            numbers = [i["trackingNumberInfo"]["trackingNumber"] for i in json.loads(body)["trackingInfo"]]
+            self.fedex_batches.append(len(numbers))
+            results = [
+                {
+                    "trackingNumber": n,
+                    "trackResults": [
+                        {
+                            "latestStatusDetail": {"statusByLocale": "In transit", "code": "IT"},
+                            "dateAndTimes": [{"type": "ESTIMATED_DELIVERY", "dateTime": f"{FAR_ETA}T12:00:00"}],
+                        }
+                    ],
+                }
+                for n in numbers
+                if n != "FX-MISSING"
+            ]
+            return self._reply(200, {"output": {"completeTrackResults": results}})
+        self._reply(404, {})
+
+    def do_GET(self):
+        if self.headers.get("Authorization") != "Bearer tok":
+            return self._reply(401, {})
+        number = self.path.rsplit("/", 1)[-1]
+        self.calls["ups"] += 1
+        if number == "1Z-SLOW" and number not in self.throttled:
+            self.throttled.add(number)
+            return self._reply(429, {}, headers=[("Retry-After", "0")])
+        status = "Delivered" if number == "1Z-DONE" else "On the way"
+        self._reply(
+            200,
+            {
+                "trackResponse": {
+                    "shipment": [
+                        {
+                            "package": [{"activity": [{"status": {"description": status}}], "deliveryDate": []}],
+                            "currentStatus": {"description": status},
+                            "deliveryDetails": {"date": "20260301"},
+                        }
+                    ]
+                }
+            },
+        )
+
+
+class TestTrackingRefresh(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeCarrier)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._orig = {k: getattr(Config, k) for k in ("UPS_API_BASE", "FEDEX_BASE", "UPS_CLIENT_ID", "UPS_CLIENT_SECRET", "TRACKING_FEDEX_BATCH_SIZE")}
+        Config.UPS_API_BASE = Config.FEDEX_BASE = base
+        Config.UPS_CLIENT_ID, Config.UPS_CLIENT_SECRET = "ups-id", "ups-secret"
+        Config.TRACKING_FEDEX_BATCH_SIZE = 30
+        _FakeCarrier.calls.clear()
+        _FakeCarrier.fedex_batches.clear()
+        _FakeCarrier.throttled.clear()
+        tracking_service._tokens.clear()
+
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        rows = [(f"FX-{i}", "FedEx") for i in range(35)] + [("FX-MISSING", "fedex")]
+        rows += [(f"1Z-{i}", "UPS") for i in range(5)] + [("1Z-SLOW", "ups"), ("1Z-DONE", "UPS"), ("DHL-1", "DHL")]
+        self.conn.executemany("INSERT INTO shipments (tracking_number, carrier) VALUES (?, ?)", rows)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        for key, value in self._orig.items():
+            setattr(Config, key, value)
+        tracking_service._tokens.clear()
+        self.conn.close()
+        os.unlink(self.path)
+
+    def test_refresh_batches_fedex_and_backs_off_on_429(self):
+        summary = refresh_due_shipments(self.conn, limit=100, concurrency=3)
+        self.assertEqual((summary["due"], summary["updated"], summary["failed"], summary["unsupported"]), (44, 42, 1, 1))
+        self.assertEqual(sorted(_FakeCarrier.fedex_batches), [6, 30])
+        self.assertEqual(_FakeCarrier.calls["ups"], 8)  # 7 numbers + one 429 retry
+        self.assertEqual(_FakeCarrier.calls["token/oauth/token"], 1)
+        self.assertEqual(_FakeCarrier.calls["token/security/v1/oauth/token"], 1)
+
+        row = self.conn.execute("SELECT * FROM shipments WHERE tracking_number = 'FX-3'").fetchone()
+        self.assertEqual((row["tracking_status"], row["estimated_delivery"][:10]), ("In transit", FAR_ETA))
+        self.assertGreater(row["next_check_at"], (datetime.now(timezone.utc) + timedelta(hours=5)).strftime("%Y-%m-%d %H:%M:%S"))
+        done = self.conn.execute("SELECT * FROM shipments WHERE tracking_number = '1Z-DONE'").fetchone()
+        self.assertIsNone(done["next_check_at"])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM carrier_tokens").fetchone()[0], 2)
+
+        # Nothing is due on the next run; a new process reuses the persisted tokens.
+        tracking_service._tokens.clear()
+        self.assertEqual(refresh_due_shipments(self.conn)["due"], 0)
+        self.conn.execute("UPDATE shipments SET next_check_at = NULL")
+        self.assertEqual(refresh_due_shipments(self.conn)["due"], 43)
+        self.assertEqual(_FakeCarrier.calls["token/oauth/token"], 1)
+        self.assertEqual(_FakeCarrier.calls["token/security/v1/oauth/token"], 1)
+
+    def test_next_check_cadence_follows_eta(self):
+        now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+        def hours(norm):
+            return (datetime.strptime(next_check_at(norm, now), "%Y-%m-%d %H:%M:%S") - now.replace(tzinfo=None)).seconds / 3600
+
+        self.assertEqual(hours({"estimated_delivery": "2026-03-02"}), 0.5)
+        self.assertEqual(hours({"estimated_delivery": "2026-03-03T10:00:00"}), 2)
+        self.assertEqual(hours({"estimated_delivery": "2026-03-20"}), 6)
+        self.assertEqual(hours({"estimated_delivery": None}), 3)
+        self.assertIsNone(next_check_at({"tracking_status": "Delivered"}, now))
+
+
+class _StubClient(tracking_service._CarrierClient):
+    carrier = "stub"
+
+    def __init__(self, client_id, fetch):
+        super().__init__()
+        self.base = "https://stub.invalid"
+        self.client_id = client_id
+        self.fetch = fetch
+
+    def _client_id(self):
+        return self.client_id
+
+    def _fetch_token(self):
+        return self.fetch()
+
+
+class TestSharedTokens(unittest.TestCase):
+    def setUp(self):
+        tracking_service._tokens.clear()
+
+    def tearDown(self):
+        tracking_service._tokens.clear()
+
+    def test_carrier_client_requires_token_hooks(self):
+        with self.assertRaises(TypeError):
+            tracking_service._CarrierClient()
+
+    def test_slow_token_fetch_blocks_only_its_own_credentials(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return {"access_token": "slow", "expires_in": 3600}
+
+        slow = _StubClient("a", slow_fetch)
+        fast = _StubClient("b", lambda: {"access_token": "fast", "expires_in": 3600})
+        waiter = _StubClient("a", lambda: {"access_token": "second", "expires_in": 3600})
+        results = {}
+        threads = [threading.Thread(target=lambda: results.__setitem__("slow", slow._get_token()))]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads.append(threading.Thread(target=lambda: results.__setitem__("waiter", waiter._get_token())))
+        threads[1].start()
+
+        other = threading.Thread(target=lambda: results.__setitem__("fast", fast._get_token()))
+        other.start()
+        other.join(2)
+        self.assertEqual(results, {"fast": "fast"})
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        # The second lookup for the same credentials waited for and reused the first fetch.
+        self.assertEqual(results, {"fast": "fast", "slow": "slow", "waiter": "slow"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+"""workflow_bag_state projection: maintained on append, equal to the event fold, rebuildable."""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app.services import workflow_bag_state as WBS
+
+
+def _bootstrap(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE workflow_stations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_scan_token TEXT NOT NULL UNIQUE,
+            label TEXT NOT NULL,
+            station_code TEXT,
+            station_kind TEXT
+        );
+        CREATE TABLE workflow_bags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at INTEGER NOT NULL,
+            product_id INTEGER,
+            box_number TEXT,
+            bag_number TEXT,
+            receipt_number TEXT,
+            inventory_bag_id INTEGER
+        );
+        CREATE TABLE product_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_name TEXT,
+            is_bottle_product INTEGER DEFAULT 0,
+            is_variety_pack INTEGER DEFAULT 0
+        );
+        CREATE TABLE qr_cards (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            label TEXT,
+            scan_token TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL DEFAULT 'idle',
+            assigned_workflow_bag_id INTEGER REFERENCES workflow_bags(id)
+        );
+        CREATE TABLE workflow_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            occurred_at INTEGER NOT NULL,
+            workflow_bag_id INTEGER NOT NULL REFERENCES workflow_bags(id),
+            station_id INTEGER REFERENCES workflow_stations(id),
+            user_id INTEGER,
+            device_id TEXT
+        );
+        INSERT INTO workflow_stations (station_scan_token, label, station_kind) VALUES ('st1', 'S1', 'sealing');
+        INSERT INTO workflow_stations (station_scan_token, label, station_kind) VALUES ('st2', 'P1', 'packaging');
+        INSERT INTO qr_cards (label, scan_token, status) VALUES ('C0', 'tok0', 'idle');
+        INSERT INTO qr_cards (label, scan_token, status) VALUES ('C1', 'tok1', 'idle');
+        """
+    )
+    for ddl in WBS.WORKFLOW_BAG_STATE_DDL:
+        conn.execute(ddl)
+    conn.commit()
+
+
+class TestWorkflowBagState(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        _bootstrap(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _sealing_hold_then_packaging(self) -> int:
+        from app.services.workflow_append import append_workflow_event
+        from app.services.workflow_finalize import create_workflow_bag_with_card
+
+        bag_id, _ = create_workflow_bag_with_card(
+            self.conn, product_id=None, box_number="1", bag_number="7", receipt_number=None, user_id=None
+        )
+        append_workflow_event(self.conn, "BAG_CLAIMED", {"station_id": 1, "station_kind": "sealing"}, bag_id, station_id=1)
+        append_workflow_event(
+            self.conn,
+            "SEALING_COMPLETE",
+            {"station_id": 1, "count_total": 53, "metadata": {"paused": True, "reason": "out_of_packaging"}},
+            bag_id,
+            station_id=1,
+        )
+        append_workflow_event(self.conn, "BAG_CLAIMED", {"station_id": 2, "station_kind": "packaging"}, bag_id, station_id=2)
+        append_workflow_event(
+            self.conn,
+            "PACKAGING_SNAPSHOT",
+            {"case_count": 0, "loose_display_count": 3, "reason": "paused_end_of_day"},
+            bag_id,
+            station_id=2,
+        )
+        self.conn.commit()
+        return bag_id
+
+    def test_projection_matches_event_fold(self):
+        bag_id = self._sealing_hold_then_packaging()
+        events = WBS._load_bag_events(self.conn, bag_id)
+        folded_bag, folded_stations = WBS.fold_bag_events(bag_id, events)
+
+        self.assertEqual(WBS.load_bag_state(self.conn, bag_id), folded_bag)
+        self.assertEqual(set(folded_stations), {1, 2})
+        for sid, expected in folded_stations.items():
+            self.assertEqual(WBS.load_station_state(self.conn, bag_id, sid), expected)
+
+        sealing = WBS.load_station_state(self.conn, bag_id, 1)
+        self.assertEqual(WBS.station_hold_details(sealing), {"reason": "out_of_packaging"})
+        self.assertTrue(WBS.station_lane_finished(sealing, "sealing"))
+        packaging = WBS.load_station_state(self.conn, bag_id, 2)
+        self.assertTrue(packaging["needs_resume"])
+        self.assertEqual(WBS.station_pause_details(packaging), {"reason": "end_of_day"})
+        self.assertEqual([s["stage"] for s in WBS.active_shortages(folded_bag)], ["sealing"])
+
+    def test_floor_facts_identical_with_and_without_projection(self):
+        from app.blueprints.workflow_floor import _current_station_occupancy, _station_facts_payload
+
+        bag_id = self._sealing_hold_then_packaging()
+        with_rows = [_station_facts_payload(self.conn, bag_id, sid) for sid in (1, 2)]
+        occupancy = _current_station_occupancy(self.conn, 2)
+        self.assertEqual(occupancy["status"], "paused")
+        self.assertEqual(occupancy["workflow_bag_id"], bag_id)
+
+        self.conn.execute("DROP TABLE workflow_bag_station_state")
+        self.conn.execute("DROP TABLE workflow_bag_state")
+        without_rows = [_station_facts_payload(self.conn, bag_id, sid) for sid in (1, 2)]
+        self.assertEqual(with_rows, without_rows)
+        self.assertEqual(_current_station_occupancy(self.conn, 2), occupancy)
+
+    def test_batch_occupancy_matches_per_station(self):
+        from app.services.workflow_occupancy import (
+            current_bag_for_station_kind,
+            resolve_station_occupancy,
+            station_occupancy,
+        )
+
+        bag_id = self._sealing_hold_then_packaging()
+        batch = resolve_station_occupancy(self.conn)
+        self.assertEqual(set(batch), {1, 2})
+        for sid in (1, 2):
+            self.assertEqual(batch[sid], station_occupancy(self.conn, sid))
+        # Sealing lane finished (held submit) so only the packaging station is occupied.
+        self.assertIsNone(batch[1])
+        self.assertEqual([s["workflow_bag_id"] for s in batch[2]["packaging_slots"]], [bag_id])
+
+        current = current_bag_for_station_kind(self.conn, "packaging")
+        self.assertEqual((current["workflow_bag_id"], current["station_id"]), (bag_id, 2))
+        self.assertIsNone(current_bag_for_station_kind(self.conn, "sealing"))
+
+    def test_rebuild_detects_and_repairs_drift(self):
+        bag_id = self._sealing_hold_then_packaging()
+        clean = WBS.rebuild_workflow_bag_state(self.conn, repair=False)
+        self.assertEqual(clean["bags_checked"], 1)
+        self.assertEqual(clean["drifted_bag_ids"], [])
+
+        self.conn.execute("UPDATE workflow_bag_state SET event_count = 99 WHERE workflow_bag_id = ?", (bag_id,))
+        self.conn.execute(
+            "DELETE FROM workflow_bag_station_state WHERE workflow_bag_id = ? AND station_id = 2", (bag_id,)
+        )
+        self.conn.execute(
+            "INSERT INTO workflow_bag_station_state (workflow_bag_id, station_id) VALUES (?, 9)", (bag_id,)
+        )
+        report = WBS.rebuild_workflow_bag_state(self.conn, [bag_id], repair=True)
+        self.assertEqual(report["drifted_bag_ids"], [bag_id])
+        self.assertEqual(report["bag_rows_drifted"], 1)
+        self.assertEqual(report["station_rows_drifted"], 1)
+        self.assertEqual(report["orphan_rows"], 1)
+
+        again = WBS.rebuild_workflow_bag_state(self.conn, repair=False)
+        self.assertEqual(again["drifted_bag_ids"], [])
+        self.assertEqual(again["orphan_rows"], 0)
+        self.assertEqual(WBS.load_bag_state(self.conn, bag_id)["event_count"], 5)
+
+    def test_out_of_order_event_rebuilds_row(self):
+        from app.services.workflow_append import append_workflow_event
+
+        bag_id = self._sealing_hold_then_packaging()
+        # Simulate clock skew: the stored tail is in the future relative to the next append.
+        self.conn.execute("UPDATE workflow_events SET occurred_at = occurred_at + 3600000 WHERE workflow_bag_id = ?", (bag_id,))
+        WBS.rebuild_workflow_bag_state(self.conn, repair=True)
+        append_workflow_event(self.conn, "STATION_RESUMED", {"station_id": 2}, bag_id, station_id=2)
+        report = WBS.rebuild_workflow_bag_state(self.conn, repair=False)
+        self.assertEqual(report["drifted_bag_ids"], [])
+        self.assertTrue(WBS.load_station_state(self.conn, bag_id, 2)["needs_resume"])
+        self.assertEqual(WBS.load_bag_state(self.conn, bag_id)["latest_event_type"], "PACKAGING_SNAPSHOT")
+
+
+if __name__ == "__main__":
+    unittest.main()
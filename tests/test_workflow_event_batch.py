@@ -0,0 +1,256 @@
+"""Batched floor events: /workflow/floor/api/events/batch (offline queue replay)."""
+import os
+import sqlite3
+import time
+import unittest
+from unittest.mock import patch
+
+from app.services.production_submission_helpers import ProductionSubmissionError
+from app.services.workflow_event_batch import parse_event_batch
+
+from tests.conftest import make_schema_db
+
+BATCH_URL = "/workflow/floor/api/events/batch"
+EVENT_URL = "/workflow/floor/api/event"
+
+
+def _event(key, card, event_type, payload=None, station="st-seal"):
+    return {
+        "idempotency_key": key,
+        "client_ts": 1_700_000_000_000,
+        "station_token": station,
+        "card_token": card,
+        "event_type": event_type,
+        "payload": payload or {},
+    }
+
+
+class TestParseEventBatch(unittest.TestCase):
+    def test_rejects_malformed_batches(self):
+        with self.assertRaises(ValueError):
+            parse_event_batch({"events": []}, max_events=5)
+        with self.assertRaises(ValueError):
+            parse_event_batch({"events": [_event("a", "c", "BAG_CLAIMED")] * 2}, max_events=5)
+        with self.assertRaises(ValueError):
+            parse_event_batch({"events": [_event(str(i), "c", "BAG_CLAIMED") for i in range(6)]}, max_events=5)
+        with self.assertRaises(ValueError):
+            parse_event_batch({"events": [{**_event("a", "c", "BAG_CLAIMED"), "client_ts": "soon"}]}, max_events=5)
+
+    def test_device_id_defaults_to_batch_level(self):
+        events = parse_event_batch(
+            {"device_id": "tab-1", "events": [_event("a", "c", "BAG_CLAIMED"), {**_event("b", "c", "X"), "device_id": "tab-2"}]},
+            max_events=5,
+        )
+        self.assertEqual([e["device_id"] for e in events], ["tab-1", "tab-2"])
+        self.assertEqual([e["index"] for e in events], [0, 1])
+
+
+class TestEventBatchRoute(unittest.TestCase):
+    def setUp(self):
+        from app import create_app
+        from app.models import database as database_module
+        from config import Config
+
+        self.Config = Config
+        self._saved_path = Config.DATABASE_PATH
+        self.path = make_schema_db()
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO product_details (id, product_name) VALUES (1, 'Card product')")
+        conn.execute("INSERT INTO workflow_bags (id, created_at, product_id) VALUES (1, 0, 1), (2, 0, 1)")
+        conn.execute(
+            """
+            INSERT INTO qr_cards (label, scan_token, status, assigned_workflow_bag_id) VALUES
+                ('C1', 'card-1', 'assigned', 1),
+                ('C2', 'card-2', 'assigned', 2),
+                ('C3', 'card-3', 'idle', NULL)
+            """
+        )
+        conn.execute(
+            "INSERT INTO workflow_stations (station_scan_token, label, station_kind) VALUES ('st-seal', 'Seal', 'sealing')"
+        )
+        conn.commit()
+        conn.close()
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        self.Config.DATABASE_PATH = self._saved_path
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _events(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT workflow_bag_id, event_type FROM workflow_events ORDER BY id").fetchall()
+        finally:
+            conn.close()
+
+    def test_appends_in_order_and_replay_is_idempotent(self):
+        batch = {
+            "device_id": "tab-1",
+            "events": [
+                _event("k1", "card-1", "BAG_CLAIMED"),
+                _event("k2", "card-1", "SEALING_COMPLETE", {"count_total": 10}),
+            ],
+        }
+        r = self.client.post(BATCH_URL, json=batch)
+        self.assertEqual(r.status_code, 200)
+        body = r.get_json()
+        self.assertEqual(body["accepted"], 2)
+        first, second = body["results"]
+        self.assertTrue(first["ok"] and second["ok"])
+        self.assertLess(first["event_id"], second["event_id"])
+        self.assertTrue(second["facts"]["station_claimed"])
+        self.assertEqual(self._events(), [(1, "BAG_CLAIMED"), (1, "SEALING_COMPLETE")])
+
+        replay = self.client.post(BATCH_URL, json=batch).get_json()
+        self.assertTrue(all(res["duplicate"] for res in replay["results"]))
+        self.assertEqual([res["event_id"] for res in replay["results"]], [first["event_id"], second["event_id"]])
+        self.assertEqual(len(self._events()), 2)
+
+    def test_replayed_events_keep_clamped_client_time(self):
+        now = int(time.time() * 1000)
+        batch = {
+            "events": [
+                {**_event("t1", "card-1", "BAG_CLAIMED"), "client_ts": now - 60_000},
+                # Clock stepped back on the tablet: not before the bag's previous event.
+                {**_event("t2", "card-1", "SEALING_COMPLETE", {"count_total": 3}), "client_ts": now - 120_000},
+                # Clock ahead of the server: not in the future.
+                {**_event("t3", "card-2", "BAG_CLAIMED"), "client_ts": now + 3_600_000},
+            ]
+        }
+        self.assertEqual(self.client.post(BATCH_URL, json=batch).get_json()["accepted"], 3)
+        conn = sqlite3.connect(self.path)
+        try:
+            times = [row[0] for row in conn.execute("SELECT occurred_at FROM workflow_events ORDER BY id")]
+        finally:
+            conn.close()
+        self.assertEqual(times[:2], [now - 60_000, now - 60_000])
+        self.assertLessEqual(times[2], int(time.time() * 1000))
+        self.assertGreaterEqual(times[2], now)
+
+    def test_single_event_retry_is_idempotent(self):
+        ev = _event("s1", "card-1", "BAG_CLAIMED")
+        first = self.client.post(EVENT_URL, json=ev).get_json()
+        self.assertTrue(first["ok"])
+        self.assertNotIn("duplicate", first)
+        # Response lost after the commit: the page retries online, then from its offline queue.
+        again = self.client.post(EVENT_URL, json=ev).get_json()
+        self.assertTrue(again["duplicate"])
+        self.assertEqual(again["event_id"], first["event_id"])
+        self.assertIn("facts", again)
+        replay = self.client.post(BATCH_URL, json={"events": [ev]}).get_json()
+        self.assertTrue(replay["results"][0]["duplicate"])
+        self.assertEqual(self._events(), [(1, "BAG_CLAIMED")])
+
+    def test_rejection_skips_rest_of_card_only(self):
+        batch = {
+            "events": [
+                _event("a1", "card-3", "BAG_CLAIMED"),
+                _event("b1", "card-1", "BAG_CLAIMED"),
+                _event("a2", "card-3", "SEALING_COMPLETE", {"count_total": 4}),
+                _event("b2", "card-1", "SEALING_COMPLETE", {"count_total": 5}),
+            ]
+        }
+        results = self.client.post(BATCH_URL, json=batch).get_json()["results"]
+        self.assertEqual(results[0]["code"], "WORKFLOW_VALIDATION")
+        self.assertEqual(results[2]["code"], "WORKFLOW_BATCH_SKIPPED")
+        self.assertTrue(results[1]["ok"] and results[3]["ok"])
+        self.assertEqual(self._events(), [(1, "BAG_CLAIMED"), (1, "SEALING_COMPLETE")])
+
+        # Rejected keys are not recorded: a corrected retry under the same key is applied.
+        retry = self.client.post(BATCH_URL, json={"events": [_event("a1", "card-2", "BAG_CLAIMED")]}).get_json()
+        self.assertTrue(retry["results"][0]["ok"])
+        self.assertNotIn("duplicate", retry["results"][0])
+
+    def test_bridge_failure_rejects_that_event(self):
+        calls = []
+
+        def failing_bridge(conn, bag_id, event_type, payload, station_row, *, event_id=None):
+            calls.append((bag_id, event_type))
+            if bag_id == 1 and event_type == "SEALING_COMPLETE":
+                raise ProductionSubmissionError(400, {"error": "Machine not configured"})
+            return None
+
+        batch = {
+            "events": [
+                _event("b1", "card-1", "BAG_CLAIMED"),
+                _event("b2", "card-1", "SEALING_COMPLETE", {"count_total": 5}),
+                _event("c1", "card-2", "BAG_CLAIMED"),
+            ]
+        }
+        with patch("app.blueprints.workflow_floor.sync_workflow_warehouse_events", failing_bridge):
+            results = self.client.post(BATCH_URL, json=batch).get_json()["results"]
+        self.assertEqual(calls, [(1, "BAG_CLAIMED"), (1, "SEALING_COMPLETE"), (2, "BAG_CLAIMED")])
+        self.assertTrue(results[0]["ok"])
+        self.assertEqual(results[1]["code"], "WORKFLOW_MACHINE_SYNC")
+        self.assertTrue(results[2]["ok"])
+        self.assertEqual(self._events(), [(1, "BAG_CLAIMED"), (2, "BAG_CLAIMED")])
+
+    def test_each_pause_bridges_to_its_own_machine_row(self):
+        # Every SEALING_COMPLETE gets its own receipt, count and end time, so the bridge has to
+        # run per event; one pass per bag at the end of the batch would only see the last pause.
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'T', 'inv-1')")
+        conn.execute("UPDATE product_details SET tablet_type_id = 1, packages_per_display = 10, tablets_per_package = 10")
+        machine_id = conn.execute(
+            "INSERT INTO machines (machine_name, machine_role, cards_per_turn) VALUES ('Sealer X', 'sealing', 1)"
+        ).lastrowid
+        conn.execute("UPDATE workflow_stations SET machine_id = ?", (machine_id,))
+        conn.commit()
+        conn.close()
+
+        t0 = 1_700_000_000_000
+        batch = {
+            "events": [
+                _event("p1", "card-1", "BAG_CLAIMED"),
+                {**_event("p2", "card-1", "SEALING_COMPLETE", {"count_total": 6}), "client_ts": t0 + 60_000},
+                {**_event("p3", "card-1", "SEALING_COMPLETE", {"count_total": 4}), "client_ts": t0 + 180_000},
+            ]
+        }
+        results = self.client.post(BATCH_URL, json=batch).get_json()["results"]
+        synced = [r["warehouse_sync"] for r in results[1:]]
+        self.assertEqual([s["count_total"] for s in synced], [6, 4])
+        self.assertNotEqual(synced[0]["receipt_number"], synced[1]["receipt_number"])
+
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                "SELECT receipt_number, displays_made, bag_end_time FROM warehouse_submissions ORDER BY id"
+            ).fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(
+            rows,
+            [
+                (synced[0]["receipt_number"], 6, "2023-11-14 22:14:20"),
+                (synced[1]["receipt_number"], 4, "2023-11-14 22:16:20"),
+            ],
+        )
+
+    def test_events_apply_in_submitted_order_across_cards(self):
+        batch = {
+            "events": [
+                _event("o1", "card-1", "BAG_CLAIMED"),
+                _event("o2", "card-2", "BAG_CLAIMED"),
+                _event("o3", "card-1", "SEALING_COMPLETE", {"count_total": 5}),
+            ]
+        }
+        results = self.client.post(BATCH_URL, json=batch).get_json()["results"]
+        self.assertEqual([r["event_id"] for r in results], sorted(r["event_id"] for r in results))
+        self.assertEqual(self._events(), [(1, "BAG_CLAIMED"), (2, "BAG_CLAIMED"), (1, "SEALING_COMPLETE")])
+        self.assertNotIn("facts", results[0])
+        self.assertIn("facts", results[1])
+        self.assertIn("facts", results[2])
+
+    def test_malformed_batch_is_rejected_whole(self):
+        r = self.client.post(BATCH_URL, json={"events": [{"card_token": "card-1"}]})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.get_json()["code"], "WORKFLOW_VALIDATION")
+        self.assertEqual(self._events(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""SSE push channel: per-process tail of workflow_events and the stream endpoints."""
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.services import workflow_event_stream as WES
+
+
+def _frames_by_event(frames):
+    out = []
+    for frame in frames:
+        lines = [line for line in frame.strip().splitlines() if ": " in line and not line.startswith(":")]
+        fields = dict(line.split(": ", 1) for line in lines)
+        data = json.loads(fields["data"]) if "data" in fields else None
+        out.append((fields.get("event"), fields.get("id"), data))
+    return out
+
+
+class TestWorkflowEventTail(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """
+            CREATE TABLE workflow_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                occurred_at INTEGER NOT NULL,
+                workflow_bag_id INTEGER NOT NULL,
+                station_id INTEGER
+            )
+            """
+        )
+        conn.commit()
+        conn.close()
+        # Long interval: the background thread stays asleep and the test drives poll_once().
+        self.tail = WES.WorkflowEventTail(
+            lambda: sqlite3.connect(self.path), lambda c: str(WES.max_event_id(c)), poll_interval=60
+        )
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def _append(self, event_type, station_id=1, bag_id=7):
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """
+            INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id, station_id)
+            VALUES (?, ?, 1, ?, ?)
+            """,
+            (event_type, json.dumps({"station_id": station_id, "count_total": 5}), bag_id, station_id),
+        )
+        conn.commit()
+        conn.close()
+
+    def test_streams_deltas_and_snapshot_notice(self):
+        self._append("BAG_CLAIMED")
+        self.tail.subscribe(max_subscribers=2)
+        frames = WES.stream_workflow_events(
+            self.tail,
+            last_event_id=None,
+            include_payload=False,
+            notify_snapshot=True,
+            max_seconds=5,
+            keepalive_seconds=0.05,
+        )
+        self.assertTrue(next(frames).startswith("retry:"))
+        hello = _frames_by_event([next(frames)])[0]
+        self.assertEqual(hello[0], "hello")
+        self.assertEqual(hello[2]["last_event_id"], 1)
+        self.assertEqual(next(frames), ": keep-alive\n\n")
+
+        self._append("SEALING_COMPLETE")
+        self.tail.poll_once()
+        event, event_id, data = _frames_by_event([next(frames)])[0]
+        self.assertEqual((event, event_id), ("workflow_event", "2"))
+        self.assertEqual(data["event_type"], "SEALING_COMPLETE")
+        self.assertNotIn("payload", data)
+        self.assertEqual(_frames_by_event([next(frames)])[0][:1], ("snapshot",))
+        frames.close()
+        self.tail.unsubscribe()
+
+    def test_subscriber_limit_and_gap_resync(self):
+        self.tail.subscribe(max_subscribers=1)
+        with self.assertRaises(WES.TooManySubscribers):
+            self.tail.subscribe(max_subscribers=1)
+        for _ in range(3):
+            self._append("STATION_RESUMED")
+        self.tail.poll_once()
+        events, _wm, gap = self.tail.wait(after_id=0, watermark="", timeout=0)
+        self.assertFalse(gap)
+        self.assertEqual([e["id"] for e in events], [1, 2, 3])
+
+        # A reconnect whose Last-Event-ID predates the ring must reload instead of missing rows.
+        self.tail._ring.popleft()
+        _events, _wm, gap = self.tail.wait(after_id=0, watermark="", timeout=0)
+        self.assertTrue(gap)
+        self.tail.unsubscribe()
+        self.assertEqual(self.tail.subscribers, 0)
+
+    def test_stream_closed_before_first_frame_unsubscribes(self):
+        with patch.object(WES, "get_tail", return_value=self.tail):
+            frames = WES.open_subscriber_stream(last_event_id=None, include_payload=False, notify_snapshot=False)
+        self.assertEqual(self.tail.subscribers, 1)
+        frames.close()
+        frames.close()
+        self.assertEqual(self.tail.subscribers, 0)
+
+
+class TestWorkflowEventStreamRoutes(unittest.TestCase):
+    def setUp(self):
+        from app import create_app
+        from app.models import database as database_module
+        from app.models.migrations import MigrationRunner
+        from config import Config
+
+        self.Config = Config
+        self._saved = (Config.DATABASE_PATH, Config.SSE_MAX_STREAM_SECONDS, Config.SSE_ENABLED)
+        fd, self._db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        Config.DATABASE_PATH = self._db_path
+        Config.SSE_MAX_STREAM_SECONDS = 0
+        Config.SSE_ENABLED = True
+        database_module._migrations_run = False
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        conn = sqlite3.connect(self._db_path)
+        MigrationRunner(conn.cursor()).run_all()
+        conn.execute("INSERT INTO workflow_stations (station_scan_token, label) VALUES ('sse-st', 'SSE bench')")
+        conn.commit()
+        conn.close()
+        self.app = create_app()
+
+    def tearDown(self):
+        self.Config.DATABASE_PATH, self.Config.SSE_MAX_STREAM_SECONDS, self.Config.SSE_ENABLED = self._saved
+        if os.path.exists(self._db_path):
+            os.remove(self._db_path)
+
+    def test_floor_stream_requires_known_station(self):
+        c = self.app.test_client()
+        self.assertEqual(c.get("/workflow/floor/api/stream").status_code, 400)
+        self.assertEqual(c.get("/workflow/floor/api/stream?station_token=nope").status_code, 404)
+        r = c.get("/workflow/floor/api/stream?station_token=sse-st")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.mimetype.startswith("text/event-stream"))
+        self.assertIn(b"event: hello", r.data)
+
+    def test_ops_tv_stream_requires_dashboard_and_can_be_disabled(self):
+        anon = self.app.test_client()
+        self.assertIn(anon.get("/command-center/ops-tv/api/stream").status_code, (302, 401))
+        admin = self.app.test_client()
+        with admin.session_transaction() as s:
+            s["admin_authenticated"] = True
+        self.assertEqual(admin.get("/command-center/ops-tv/api/stream").status_code, 200)
+        self.Config.SSE_ENABLED = False
+        self.assertEqual(admin.get("/command-center/ops-tv/api/stream").status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Typed hot payload columns on workflow_events: backfill, fill on append, repair trigger, index use."""
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from app.models.migrations import MigrationRunner
+from app.services.command_center_metrics_inputs import (
+    packaging_display_total_from_payload,
+    sql_packaging_equiv_displays,
+)
+from app.services.workflow_append import PAYLOAD_COLUMNS, append_workflow_event
+
+_LEGACY_PAYLOADS = (
+    {"count_total": 53, "reason": "final_submit"},
+    {"case_count": "2", "loose_display_count": 3, "reason": "paused_end_of_day"},
+    {"display_count": 7.5, "counter_start": 100, "counter_end": 140},
+    {"metadata": {"reason": "out_of_packaging"}},
+)
+
+
+class TestWorkflowEventsPayloadColumns(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        # Pre-migration shape: events written before the typed columns existed.
+        self.conn.executescript(
+            """
+            CREATE TABLE workflow_bags (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at INTEGER NOT NULL);
+            CREATE TABLE workflow_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                occurred_at INTEGER NOT NULL,
+                workflow_bag_id INTEGER NOT NULL REFERENCES workflow_bags(id),
+                station_id INTEGER,
+                user_id INTEGER,
+                device_id TEXT
+            );
+            INSERT INTO workflow_bags (created_at) VALUES (1);
+            """
+        )
+        for i, payload in enumerate(_LEGACY_PAYLOADS):
+            self.conn.execute(
+                "INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id) VALUES (?, ?, ?, 1)",
+                ("PACKAGING_SNAPSHOT", json.dumps(payload), 1000 + i),
+            )
+        self.conn.execute(
+            "INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id) VALUES (?, ?, ?, 1)",
+            ("PACKAGING_SNAPSHOT", "{not json", 2000),
+        )
+        self.conn.commit()
+        MigrationRunner(self.conn.cursor()).run_all()
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _assert_columns_match_json(self):
+        rows = self.conn.execute("SELECT * FROM workflow_events ORDER BY id").fetchall()
+        self.assertTrue(rows)
+        for row in rows:
+            for column, key, sql_type in PAYLOAD_COLUMNS:
+                if not row["payload"].startswith("{not"):
+                    cast = "CAST(json_extract(?, ?) AS REAL)" if sql_type == "REAL" else "json_extract(?, ?)"
+                    expected = self.conn.execute(f"SELECT {cast}", (row["payload"], f"$.{key}")).fetchone()[0]
+                else:
+                    expected = None
+                self.assertEqual(row[column], expected, (row["id"], column))
+
+    def test_backfill_append_and_repair_match_json_extract(self):
+        self._assert_columns_match_json()
+        triggers = {
+            r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()
+        }
+        self.assertNotIn("trg_workflow_events_payload_columns_ins", triggers)
+        append_workflow_event(
+            self.conn,
+            "SEALING_COMPLETE",
+            {"count_total": 12},
+            1,
+            station_id=3,
+        )
+        self.conn.execute(
+            "UPDATE workflow_events SET payload = ? WHERE id = 1",
+            (json.dumps({"count_total": 60, "reason": "partial_packaging"}),),
+        )
+        self._assert_columns_match_json()
+        self.assertEqual(
+            self.conn.execute("SELECT p_count_total, p_reason FROM workflow_events WHERE id = 1").fetchone()[:],
+            (60.0, "partial_packaging"),
+        )
+
+    def test_packaging_equiv_displays_matches_python(self):
+        rows = self.conn.execute(
+            f"""
+            SELECT we.payload, {sql_packaging_equiv_displays(dpc_sql="4")} AS displays
+            FROM workflow_events we
+            WHERE json_valid(we.payload)
+            ORDER BY we.id
+            """
+        ).fetchall()
+        for row in rows:
+            expected = packaging_display_total_from_payload(json.loads(row["payload"]), 4)
+            self.assertAlmostEqual(row["displays"], expected)
+
+    def test_type_and_station_ranges_use_composite_indexes(self):
+        def plan(sql):
+            return " ".join(r[3] for r in self.conn.execute("EXPLAIN QUERY PLAN " + sql, (0, 1, 2)).fetchall())
+
+        self.assertIn(
+            "ix_workflow_events_type_occurred",
+            plan("SELECT SUM(p_count_total) FROM workflow_events WHERE event_type = ? AND occurred_at >= ? AND occurred_at < ?"),
+        )
+        self.assertIn(
+            "ix_workflow_events_station_occurred",
+            plan("SELECT COUNT(*) FROM workflow_events WHERE station_id = ? AND occurred_at >= ? AND occurred_at < ?"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
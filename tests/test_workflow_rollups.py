@@ -0,0 +1,155 @@
+"""Daily rollups: parity with raw aggregation, dirty-day re-rolls, rollover on append, station analytics."""
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+
+from app.models.migrations import MigrationRunner
+from app.services import workflow_rollups as R
+from app.services.command_center_metrics_inputs import gather_station_analytics
+from app.services.workflow_append import WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL, append_workflow_event
+from app.services.workflow_read import production_day_for_event_ms
+from config import Config
+
+_H = 3600_000
+
+
+class TestWorkflowRollups(unittest.TestCase):
+    def setUp(self):
+        self._saved_enabled = (Config.WORKFLOW_ROLLUPS_ENABLED, Config.WORKFLOW_ROLLUPS_BACKGROUND_REFRESH)
+        Config.WORKFLOW_ROLLUPS_BACKGROUND_REFRESH = False
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(
+            """
+            CREATE TABLE product_details (id INTEGER PRIMARY KEY, product_name TEXT, displays_per_case INTEGER);
+            CREATE TABLE employees (id INTEGER PRIMARY KEY, username TEXT, full_name TEXT);
+            INSERT INTO product_details (id, product_name, displays_per_case) VALUES (1, 'Cherry', 4);
+            INSERT INTO employees (id, username, full_name) VALUES (2, 'op2', 'Operator Two');
+            """
+        )
+        MigrationRunner(self.conn.cursor()).run_all()
+        self.conn.execute("INSERT INTO workflow_bags (id, created_at, product_id) VALUES (1, 1, 1)")
+        self.conn.commit()
+        self.today = production_day_for_event_ms(int(time.time() * 1000))
+        self.yesterday = self.today - timedelta(days=1)
+        self.y0 = R.day_start_ms(self.yesterday)
+
+    def tearDown(self):
+        Config.WORKFLOW_ROLLUPS_ENABLED, Config.WORKFLOW_ROLLUPS_BACKGROUND_REFRESH = self._saved_enabled
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _insert(self, event_type, payload, at_ms, station_id, user_id=2):
+        cur = self.conn.execute(
+            """
+            INSERT INTO workflow_events (event_type, payload, occurred_at, workflow_bag_id, station_id, user_id)
+            VALUES (?, ?, ?, 1, ?, ?)
+            """,
+            (event_type, json.dumps(payload), at_ms, station_id, user_id),
+        )
+        # Raw rows skip append_workflow_event; fill the typed payload columns it would have set.
+        self.conn.execute(f"{WORKFLOW_EVENT_PAYLOAD_COLUMNS_BACKFILL} WHERE id = ?", (cur.lastrowid,))
+        return cur.lastrowid
+
+    def _seed_closed_days(self):
+        self._insert("BAG_CLAIMED", {}, self.y0 + 9 * _H, 5)
+        blister_id = self._insert("BLISTER_COMPLETE", {"count_total": 100}, self.y0 + 9 * _H + 30 * 60_000, 5)
+        self._insert(
+            "PACKAGING_SNAPSHOT",
+            {"case_count": 2, "loose_display_count": 3, "reason": "final_submit"},
+            self.y0 + 10 * _H,
+            6,
+        )
+        self._insert("PACKAGING_SNAPSHOT", {"display_count": 50, "reason": "label_scan"}, self.y0 + 11 * _H, 6)
+        self._insert("SEALING_COMPLETE", {"count_total": 40}, self.y0 - 14 * _H, 7)
+        self.conn.commit()
+        return blister_id
+
+    def _history(self):
+        return R.station_day_totals(self.conn, self.today - timedelta(days=7), self.yesterday)
+
+    def test_rollups_match_raw_and_re_roll_dirty_days(self):
+        blister_id = self._seed_closed_days()
+        # Inserts into already-rolled days are marked dirty, so readers scan raw events meanwhile.
+        self.assertFalse(R._rollups_cover(self.conn, self.yesterday, self.yesterday))
+        raw = self._history()
+        R.refresh_workflow_rollups(self.conn, today=self.today)
+        self.assertTrue(R._rollups_cover(self.conn, self.today - timedelta(days=7), self.yesterday))
+        self.assertEqual(self._history(), raw)
+
+        y = self.yesterday.isoformat()
+        blister = raw[5][y]
+        self.assertEqual((blister["units"], blister["tablets"], blister["outputs"]), (100.0, 100.0, 1.0))
+        self.assertEqual((blister["duration_min_sum"], blister["duration_n"]), (30.0, 1.0))
+        self.assertEqual(raw[6][y]["displays"], 11.0)
+        self.assertEqual(raw[7][(self.yesterday - timedelta(days=1)).isoformat()]["tablets"], 40.0)
+
+        # displays_per_case is applied at read time; no re-roll needed.
+        self.conn.execute("UPDATE product_details SET displays_per_case = 6 WHERE id = 1")
+        self.assertEqual(R.display_totals_by_day(self.conn, self.yesterday, self.yesterday), {y: 15.0})
+
+        self.conn.execute(
+            "UPDATE workflow_events SET payload = ? WHERE id = ?", (json.dumps({"count_total": 120}), blister_id)
+        )
+        self.assertFalse(R._rollups_cover(self.conn, self.yesterday, self.yesterday))
+        report = R.refresh_workflow_rollups(self.conn, today=self.today)
+        self.assertIn(y, report["days_rolled"])
+        self.assertEqual(self._history()[5][y]["tablets"], 120.0)
+        self.assertEqual(R.operator_day_totals(self.conn, self.yesterday, self.yesterday)[(5, 2)][y]["outputs"], 1.0)
+
+    def _state(self):
+        return self.conn.execute("SELECT rolled_through FROM workflow_rollup_state").fetchone()[0]
+
+    def test_append_only_marks_and_reader_rolls_in_background(self):
+        two_days_ago = self.yesterday - timedelta(days=1)
+        self.conn.execute(
+            "UPDATE workflow_rollup_state SET rolled_through = ?, through_ms = ?",
+            (two_days_ago.isoformat(), self.y0),
+        )
+        self._seed_closed_days()
+        append_workflow_event(self.conn, "SEALING_COMPLETE", {"count_total": 12}, 1, station_id=7)
+        self.conn.commit()
+        # The append's transaction rolled nothing.
+        self.assertEqual(self._state(), two_days_ago.isoformat())
+
+        # A reader falls back to raw events and hands the roll to a background thread.
+        Config.WORKFLOW_ROLLUPS_BACKGROUND_REFRESH = True
+        self.assertEqual(self._history()[5][self.yesterday.isoformat()]["tablets"], 100.0)
+        self.assertTrue(R._refresh_lock.acquire(timeout=10))
+        R._refresh_lock.release()
+        self.assertEqual(self._state(), self.yesterday.isoformat())
+        self.assertTrue(R._rollups_cover(self.conn, self.yesterday, self.yesterday))
+        self.assertEqual(self._history()[5][self.yesterday.isoformat()]["tablets"], 100.0)
+        # Nothing due any more: no second refresh.
+        self.assertIsNone(R.request_rollup_refresh(self.conn))
+
+    def test_station_analytics_history_matches_raw_scan(self):
+        self._seed_closed_days()
+        R.refresh_workflow_rollups(self.conn, today=self.today)
+        today_start = R.day_start_ms(self.today)
+        self._insert("BAG_CLAIMED", {}, today_start + 60_000, 5)
+        self._insert("BLISTER_COMPLETE", {"count_total": 10}, today_start + 21 * 60_000, 5)
+        self.conn.commit()
+        machines = [{"id": 5, "station_kind": "blister", "cards_per_turn": 2, "display_name": "Blister 1"}]
+        now_ms = today_start + 2 * _H
+
+        rolled = gather_station_analytics(self.conn, machines, day_start_ms=today_start, now_ms=now_ms)
+        Config.WORKFLOW_ROLLUPS_ENABLED = False
+        raw = gather_station_analytics(self.conn, machines, day_start_ms=today_start, now_ms=now_ms)
+        self.assertEqual(rolled, raw)
+
+        st = rolled["stations"]["5"]
+        self.assertEqual(st["dailyTrend30"][29:], [200.0, 20.0])
+        self.assertEqual(st["avgDurationTodayMinutes"], 20.0)
+        self.assertEqual(st["avgDuration7dMinutes"], 25.0)
+        self.assertEqual(st["operatorRows"][0]["operator"], "Operator Two")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+"""Zoho PO sync against a local API stub: pagination, 429 backoff, incremental cursor, partial failures."""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from app.models.schema import SchemaManager
+from app.services.zoho_service import ZohoInventoryAPI, _format_zoho_time, _parse_zoho_time
+from app.services.zoho_sync_state import read_sync_state
+from config import Config
+
+
+class _ZohoStub:
+    """Minimal Zoho Inventory: token, paginated purchaseorders (last_modified_time filter), details."""
+
+    def __init__(self):
+        old = _format_zoho_time(datetime.now(timezone.utc) - timedelta(days=2))
+        self.orders = {
+            f"Z{i}": {
+                "purchaseorder_id": f"Z{i}",
+                "purchaseorder_number": f"PO-{i:05d}",
+                "status": "issued",
+                "date": f"2026-01-0{i}",
+                "last_modified_time": old,
+                "cf_tablets": i != 2,
+                "quantity": 100 * i,
+            }
+            for i in range(1, 6)
+        }
+        self.fail_details = set()
+        self.rate_limit_next_list = True
+        self.list_params = []
+        self.token_calls = 0
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+    def handle(self, handler):
+        url = urlparse(handler.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            self.client_ports.add(handler.client_address[1])
+            if url.path == "/oauth/token":
+                self.token_calls += 1
+                return 200, {"access_token": "tok", "expires_in": 3600}
+            if url.path == "/inventory/purchaseorders":
+                if self.rate_limit_next_list:
+                    self.rate_limit_next_list = False
+                    return 429, {"code": 429, "message": "Too many requests"}
+                self.list_params.append(query)
+                return 200, self._list_page(query)
+            po_id = url.path.rsplit("/", 1)[-1]
+            if po_id in self.fail_details:
+                return 500, {"code": 500, "message": "boom"}
+            po = self.orders[po_id]
+            line = {"item_id": "INV-1", "line_item_id": f"L{po_id}", "name": "Cherry 10mg", "quantity": po["quantity"]}
+            return 200, {"purchaseorder": {**po, "line_items": [line]}}
+
+    def _list_page(self, query):
+        rows = sorted(self.orders.values(), key=lambda po: (po["last_modified_time"], po["purchaseorder_id"]), reverse=True)
+        since = _parse_zoho_time(query.get("last_modified_time"))
+        if since:
+            rows = [po for po in rows if _parse_zoho_time(po["last_modified_time"]) >= since]
+        page, per_page = int(query["page"]), int(query["per_page"])
+        chunk = rows[(page - 1) * per_page : page * per_page]
+        return {
+            "purchaseorders": [{k: v for k, v in po.items() if k != "quantity"} for po in chunk],
+            "page_context": {"page": page, "per_page": per_page, "has_more_page": page * per_page < len(rows)},
+        }
+
+
+def _handler_for(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            status, body = stub.handle(self)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class TestZohoPoSync(unittest.TestCase):
+    _CONFIG = (
+        "ZOHO_INVENTORY_API_BASE",
+        "ZOHO_TOKEN_URL",
+        "ZOHO_CLIENT_ID",
+        "ZOHO_CLIENT_SECRET",
+        "ZOHO_REFRESH_TOKEN",
+        "ZOHO_SERVICE_EXTRA_HEADERS",
+        "ZOHO_SYNC_PAGE_SIZE",
+        "ZOHO_SYNC_WORKERS",
+        "ZOHO_MAX_RETRIES",
+        "ZOHO_BACKOFF_BASE_MS",
+    )
+
+    def setUp(self):
+        self.stub = _ZohoStub()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self.stub))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+        self._saved = {name: getattr(Config, name) for name in self._CONFIG}
+        Config.ZOHO_INVENTORY_API_BASE = f"{base}/inventory"
+        Config.ZOHO_TOKEN_URL = f"{base}/oauth/token"
+        Config.ZOHO_CLIENT_ID = Config.ZOHO_CLIENT_SECRET = Config.ZOHO_REFRESH_TOKEN = "x"
+        Config.ZOHO_SERVICE_EXTRA_HEADERS = {}
+        Config.ZOHO_SYNC_PAGE_SIZE = 2
+        Config.ZOHO_SYNC_WORKERS = 3
+        Config.ZOHO_MAX_RETRIES = 1
+        Config.ZOHO_BACKOFF_BASE_MS = 1
+        self.api = ZohoInventoryAPI()
+
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        SchemaManager(self.path).initialize_all_tables()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry 10mg', 'INV-1')")
+        self.conn.commit()
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(Config, name, value)
+        self.server.shutdown()
+        self.server.server_close()
+        self.conn.close()
+        os.unlink(self.path)
+
+    def _sync(self, **kwargs):
+        ok, message = self.api.sync_tablet_pos_to_db(self.conn, **kwargs)
+        self.conn.commit()
+        return ok, message
+
+    def _ordered(self):
+        rows = self.conn.execute(
+            "SELECT po.zoho_po_id, pl.quantity_ordered FROM purchase_orders po JOIN po_lines pl ON pl.po_id = po.id"
+        ).fetchall()
+        return {r["zoho_po_id"]: r["quantity_ordered"] for r in rows}
+
+    def test_full_sync_paginates_and_fetches_details_over_shared_session(self):
+        ok, message = self._sync()
+        self.assertTrue(ok, message)
+        self.assertEqual(self._ordered(), {"Z1": 100, "Z3": 300, "Z4": 400, "Z5": 500})
+        self.assertEqual([int(p["page"]) for p in self.stub.list_params], [1, 2, 3])
+        self.assertNotIn("last_modified_time", self.stub.list_params[0])
+        self.assertEqual(self.stub.token_calls, 1)
+        # Keep-alive: at most one connection per detail worker plus the listing connection.
+        self.assertLessEqual(len(self.stub.client_ports), Config.ZOHO_SYNC_WORKERS + 1)
+
+        state = read_sync_state(self.conn)
+        self.assertEqual((state["status"], state["mode"]), ("ok", "full"))
+        self.assertEqual((state["pages"], state["listed"], state["tablet_pos"], state["synced"]), (3, 5, 4, 4))
+        self.assertLess(_parse_zoho_time(state["cursor"]), datetime.now(timezone.utc))
+
+    def test_incremental_sync_lists_only_modified_pos(self):
+        self._sync()
+        self.stub.list_params.clear()
+        self.stub.orders["Z3"].update(quantity=333, last_modified_time=_format_zoho_time(datetime.now(timezone.utc)))
+
+        ok, message = self._sync()
+        self.assertTrue(ok, message)
+        state = read_sync_state(self.conn)
+        self.assertEqual((state["mode"], state["listed"], state["synced"]), ("incremental", 1, 1))
+        self.assertIn("last_modified_time", self.stub.list_params[0])
+        self.assertEqual(self._ordered()["Z3"], 333)
+
+        self._sync(full=True)
+        self.assertEqual(read_sync_state(self.conn)["listed"], 5)
+
+    def test_detail_failure_keeps_po_and_does_not_advance_cursor(self):
+        self.stub.fail_details.add("Z4")
+        ok, message = self._sync()
+        self.assertTrue(ok, message)
+        self.assertIn("1 POs without line item details", message)
+        state = read_sync_state(self.conn)
+        self.assertEqual((state["status"], state["detail_failures"], state["cursor"]), ("partial", 1, None))
+        self.assertNotIn("Z4", self._ordered())
+        self.assertIsNotNone(self.conn.execute("SELECT 1 FROM purchase_orders WHERE zoho_po_id = 'Z4'").fetchone())
+
+        self.stub.fail_details.clear()
+        self._sync()
+        self.assertEqual(self._ordered()["Z4"], 400)
+        self.assertIsNotNone(read_sync_state(self.conn)["cursor"])
+
+    def test_upsert_error_marks_sync_failed(self):
+        with mock.patch.object(ZohoInventoryAPI, "_upsert_tablet_po", side_effect=sqlite3.IntegrityError("boom")):
+            with self.assertRaises(sqlite3.IntegrityError):
+                self.api.sync_tablet_pos_to_db(self.conn)
+        state = read_sync_state(self.conn)
+        self.assertEqual((state["status"], state["message"]), ("failed", "boom"))
+        self.assertIsNotNone(state["finished_at"])
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM purchase_orders").fetchone())
+
+
+if __name__ == "__main__":
+    unittest.main()
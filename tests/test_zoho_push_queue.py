@@ -0,0 +1,208 @@
+"""Zoho receive push queue: per-bag jobs, per-PO draining, retries, and the push / status routes."""
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from app.models import database as database_module
+from app.services import zoho_push_queue
+from app.services.zoho_receive_push import ZohoPushRetry
+from config import Config
+
+from tests.conftest import make_schema_db
+
+
+class TestZohoPushQueue(unittest.TestCase):
+    def setUp(self):
+        self._orig = (
+            Config.DATABASE_PATH,
+            Config.ZOHO_PUSH_WORKER,
+            Config.ZOHO_PUSH_MAX_ATTEMPTS,
+            Config.ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS,
+        )
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        Config.DATABASE_PATH = self.path
+        Config.ZOHO_PUSH_WORKER = False
+        Config.ZOHO_PUSH_MAX_ATTEMPTS = 2
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        zoho_push_queue.ensure_zoho_push_jobs(self.conn)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        (
+            Config.DATABASE_PATH,
+            Config.ZOHO_PUSH_WORKER,
+            Config.ZOHO_PUSH_MAX_ATTEMPTS,
+            Config.ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS,
+        ) = self._orig
+        os.unlink(self.path)
+
+    def _enqueue(self, bag_id, po_id):
+        job, created = zoho_push_queue.enqueue_push(self.conn, bag_id=bag_id, po_id=po_id)
+        self.conn.commit()
+        return job, created
+
+    def _jobs(self):
+        return {
+            row["bag_id"]: dict(row)
+            for row in self.conn.execute("SELECT * FROM zoho_push_jobs ORDER BY id").fetchall()
+        }
+
+    def test_one_active_job_per_bag(self):
+        job, created = self._enqueue(1, 10)
+        again, created_again = self._enqueue(1, 10)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again["id"], job["id"])
+
+    def test_drains_one_po_at_a_time_and_shares_refresh_set(self):
+        for bag_id, po_id in ((1, 10), (2, 20), (3, 10), (4, 20)):
+            self._enqueue(bag_id, po_id)
+        calls = []
+
+        def fake_push(bag_id, custom_notes=None, *, refreshed_po_ids=None):
+            calls.append((bag_id, id(refreshed_po_ids)))
+            if bag_id == 4:
+                return {"success": False, "error": "Zoho error"}, 500
+            return {"success": True, "zoho_receive_pushed": True, "zoho_receive_id": f"R{bag_id}"}, 200
+
+        with patch.object(zoho_push_queue, "push_bag_receive", fake_push):
+            self.assertEqual(zoho_push_queue.process_push_queue(self.path), 4)
+
+        self.assertEqual([bag for bag, _ in calls], [1, 3, 2, 4])
+        self.assertEqual(calls[0][1], calls[1][1])
+        self.assertNotEqual(calls[1][1], calls[2][1])
+        jobs = self._jobs()
+        self.assertEqual(jobs[1]["status"], "done")
+        self.assertEqual(json.loads(jobs[1]["result"])["zoho_receive_id"], "R1")
+        self.assertEqual((jobs[4]["status"], jobs[4]["http_status"], jobs[4]["last_error"]), ("failed", 500, "Zoho error"))
+
+    def test_retry_then_give_up(self):
+        self._enqueue(1, 10)
+        retry = ZohoPushRetry({"success": False, "error": "Could not read this PO line from Zoho"}, 400)
+        with patch.object(zoho_push_queue, "push_bag_receive", side_effect=retry):
+            zoho_push_queue.process_push_queue(self.path)
+            job = self._jobs()[1]
+            self.assertEqual((job["status"], job["attempts"]), ("queued", 1))
+            self.assertGreater(job["next_attempt_at"], int(time.time() * 1000))
+            # Not due yet: nothing claimed.
+            self.assertEqual(zoho_push_queue.process_push_queue(self.path), 0)
+            self.conn.execute("UPDATE zoho_push_jobs SET next_attempt_at = 0")
+            self.conn.commit()
+            zoho_push_queue.process_push_queue(self.path)
+        job = self._jobs()[1]
+        self.assertEqual((job["status"], job["attempts"], job["http_status"]), ("failed", 2, 400))
+        self.assertIn("Could not read", json.loads(job["result"])["error"])
+
+    def test_inline_dispatch_runs_only_this_po_and_is_capped(self):
+        for bag_id in range(1, 9):
+            self._enqueue(bag_id, 10)
+        self._enqueue(20, 20)
+        with patch.object(zoho_push_queue, "push_bag_receive", return_value=({"success": True}, 200)) as push:
+            zoho_push_queue.dispatch_push_queue(self.path, po_id=10)
+        self.assertEqual([c.args[0] for c in push.call_args_list], [1, 2, 3, 4, 5])
+        self.assertEqual(self._jobs()[20]["status"], "queued")
+
+    def test_stale_running_job_is_failed_not_retried(self):
+        self._enqueue(1, 10)
+        self.conn.execute("UPDATE zoho_push_jobs SET status = 'running', updated_at = 0")
+        self.conn.commit()
+        Config.ZOHO_PUSH_CLAIM_TIMEOUT_SECONDS = 1
+        with patch.object(zoho_push_queue, "push_bag_receive") as push:
+            zoho_push_queue.process_push_queue(self.path)
+        push.assert_not_called()
+        job = self._jobs()[1]
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("Check Zoho", job["last_error"])
+
+
+class TestZohoPushRoutes(unittest.TestCase):
+    def setUp(self):
+        from app import create_app
+
+        self._orig = (Config.DATABASE_PATH, Config.ZOHO_PUSH_WORKER)
+        self.path = make_schema_db()
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            """
+            INSERT INTO tablet_types (id, tablet_type_name, inventory_item_id) VALUES (1, 'Cherry', 'INV-1');
+            INSERT INTO purchase_orders (id, po_number, zoho_po_id) VALUES (1, 'PO-1', 'ZPO-1');
+            INSERT INTO receiving (id, po_id, receive_name) VALUES (1, 1, 'PO-1-1');
+            INSERT INTO small_boxes (id, receiving_id, box_number) VALUES (1, 1, 1);
+            INSERT INTO bags (id, small_box_id, bag_number, tablet_type_id, status) VALUES
+                (1, 1, 1, 1, 'Closed'),
+                (2, 1, 2, 1, 'Available');
+            """
+        )
+        conn.commit()
+        conn.close()
+        Config.DATABASE_PATH = self.path
+        database_module._migrations_run = False
+        os.environ.setdefault("SKIP_ZOHO_SERVICE_CHECK", "1")
+        app = create_app()
+        app.config["WTF_CSRF_ENABLED"] = False
+        self.client = app.test_client()
+        with self.client.session_transaction() as s:
+            s["admin_authenticated"] = True
+
+    def tearDown(self):
+        Config.DATABASE_PATH, Config.ZOHO_PUSH_WORKER = self._orig
+        database_module._migrations_run = False
+        os.unlink(self.path)
+
+    def test_push_is_queued_and_status_is_polled(self):
+        Config.ZOHO_PUSH_WORKER = True
+        with patch.object(zoho_push_queue, "dispatch_push_queue") as dispatch, patch.object(
+            zoho_push_queue, "resume_push_worker"
+        ) as resume:
+            r = self.client.post("/api/bag/1/push_to_zoho", json={"custom_notes": "late truck"})
+            self.assertEqual(r.status_code, 202)
+            body = r.get_json()
+            self.assertTrue(body["queued"])
+            self.assertEqual(body["job"]["status"], "queued")
+            dispatch.assert_called_once()
+
+            again = self.client.post("/api/bag/1/push_to_zoho", json={}).get_json()
+            self.assertEqual(again["job"]["id"], body["job"]["id"])
+
+            status = self.client.get("/api/zoho/push-jobs?bag_ids=1,2").get_json()
+            resume.assert_called_once()
+        self.assertEqual(list(status["jobs"]), ["1"])
+        self.assertEqual(status["counts"], {"queued": 1, "running": 0})
+
+        # Local checks still answer at once.
+        self.assertEqual(self.client.post("/api/bag/2/push_to_zoho", json={}).status_code, 400)
+        self.assertEqual(self.client.post("/api/bag/99/push_to_zoho", json={}).status_code, 404)
+
+    def test_status_poll_does_not_push_inline(self):
+        Config.ZOHO_PUSH_WORKER = False
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        zoho_push_queue.enqueue_push(conn, bag_id=1, po_id=1)
+        conn.commit()
+        conn.close()
+        with patch.object(zoho_push_queue, "push_bag_receive") as push:
+            status = self.client.get("/api/zoho/push-jobs?bag_ids=1").get_json()
+        push.assert_not_called()
+        self.assertEqual(status["jobs"]["1"]["status"], "queued")
+
+    def test_inline_mode_returns_push_result(self):
+        Config.ZOHO_PUSH_WORKER = False
+        result = ({"success": False, "error": "Zoho API error (code 1): nope"}, 500)
+        with patch.object(zoho_push_queue, "push_bag_receive", return_value=result) as push:
+            r = self.client.post("/api/bag/1/push_to_zoho", json={"custom_notes": "late truck"})
+        self.assertEqual(push.call_args.args, (1, "late truck"))
+        self.assertEqual(r.status_code, 500)
+        body = r.get_json()
+        self.assertEqual(body["error"], "Zoho API error (code 1): nope")
+        self.assertEqual(body["job"]["status"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()